@@ -0,0 +1,61 @@
+"""
+Style catalog benchmark: a 200-report AMC bundle with and without memoized styles.
+
+"uncached" clears the style catalog before every report, which reproduces the
+previous behaviour of building every style sheet from scratch per render.
+
+Run from backend/:
+    MONGO_URL=mongodb://localhost DB_NAME=bench python -m benchmarks.bench_pdf_styles [reports]
+"""
+import sys
+import time
+import tracemalloc
+
+from benchmarks.pdf_fixtures import make_amc, make_project, use_default_pdf_settings
+
+use_default_pdf_settings()
+
+from routes.amc_pdf import get_amc_styles, render_amc_main_pdf  # noqa: E402
+from routes.pdf_styles import clear_style_catalog  # noqa: E402
+
+
+def style_acquisition(reports: int, cached: bool) -> dict:
+    """Time and memory held by the style sheets of `reports` concurrent renders"""
+    clear_style_catalog()
+    get_amc_styles()
+    tracemalloc.start()
+    started = time.perf_counter()
+    sheets = []
+    for _ in range(reports):
+        if not cached:
+            clear_style_catalog()
+        sheets.append(get_amc_styles())
+    elapsed = time.perf_counter() - started
+    held, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"ms_per_report": elapsed * 1000 / reports, "kib_per_report": held / 1024 / reports}
+
+
+def bundle(reports: int, cached: bool) -> dict:
+    """Render the main section of `reports` AMC reports"""
+    clear_style_catalog()
+    amcs = [(make_amc(i), make_project(i)) for i in range(reports)]
+    wall, cpu = time.perf_counter(), time.process_time()
+    for amc, project in amcs:
+        if not cached:
+            clear_style_catalog()
+        render_amc_main_pdf(amc, project, {}, [], [], [])
+    return {"wall_s": time.perf_counter() - wall, "cpu_s": time.process_time() - cpu}
+
+
+def main(reports: int = 200):
+    print(f"AMC bundle of {reports} reports")
+    for label, fn in (("style sheets", style_acquisition), ("full render", bundle)):
+        uncached, cached = fn(reports, cached=False), fn(reports, cached=True)
+        for key in uncached:
+            saved = (1 - cached[key] / uncached[key]) * 100 if uncached[key] else 0
+            print(f"  {label:13} {key:15} uncached={uncached[key]:10.3f}  cached={cached[key]:10.3f}  ({saved:.0f}% less)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -0,0 +1,262 @@
+"""
+Collection-scan audit for GET endpoints.
+
+Calls every GET /api route in-process (httpx ASGI transport) against a seeded
+database, captures the find/aggregate/count/distinct commands each one issues,
+and replays them through explain(). Any winning plan containing a COLLSCAN is
+reported with its route and filter shape; the exit code is non-zero when
+unexpected scans are found, so missing indexes in utils/indexes.py
+registrations show up before production does.
+
+Scans that no index can avoid are allowed: unfiltered reads (full listings,
+totals), and the small settings-style collections in ALLOWED_COLLECTIONS.
+
+Run from backend/ against the database seeded by benchmarks/seed_data.py:
+    MONGO_URL=mongodb://localhost:27017 DB_NAME=erp_load python -m benchmarks.seed_data --scale 0.1
+    MONGO_URL=mongodb://localhost:27017 DB_NAME=erp_load python -m benchmarks.index_audit [--json report.json]
+"""
+import argparse
+import asyncio
+import copy
+import json
+import re
+import sys
+import time
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+from pymongo import monitoring
+
+ADMIN_CREDENTIALS = {"email": "admin@enerzia.com", "password": "admin123"}
+
+AUDITED_COMMANDS = {"find", "aggregate", "count", "distinct"}
+
+# Routes that render files or stream long responses; their queries are the
+# same as the list endpoints they are built from
+SKIP_PATH = re.compile(r"pdf|export|download|excel|preview-file|/files?/|logo|image|photo|report-html")
+
+# Collections holding a handful of configuration documents
+ALLOWED_COLLECTIONS = {
+    "settings", "organization_settings", "company_settings", "general_settings",
+    "pdf_template_settings", "zoho_settings", "roles", "departments",
+    "report_export_jobs",
+}
+
+# Path parameter -> (collection, field) used to pick a real value, so detail
+# endpoints follow their usual code path instead of returning 404
+PARAM_SOURCES: Dict[str, Tuple[str, str]] = {
+    "project_id": ("projects", "id"),
+    "user_id": ("users", "id"),
+    "emp_id": ("hr_employees", "emp_id"),
+    "customer_id": ("customers", "id"),
+    "amc_id": ("amcs", "id"),
+    "contract_id": ("amcs", "id"),
+    "report_id": ("test_reports", "id"),
+    "order_id": ("sales_orders", "id"),
+    "expense_id": ("expenses_v2", "id"),
+    "enquiry_id": ("sales_enquiries", "id"),
+    "quotation_id": ("sales_quotations", "id"),
+    "po_id": ("purchase_orders_v2", "id"),
+    "request_id": ("purchase_requests", "id"),
+    "meeting_id": ("weekly_meetings", "id"),
+    "inspection_id": ("scheduled_inspections", "id"),
+    "record_id": ("hr_payroll", "id"),
+}
+
+FIXED_PARAMS = {
+    "month": str(date.today().month),
+    "year": str(date.today().year),
+    "department": "PROJECTS",
+    "category": "PSS",
+    "equipment_type": "transformer",
+    "fiscal_year": f"{date.today().year}-{(date.today().year + 1) % 100:02d}",
+    "collection_name": "projects",
+}
+
+MISSING_VALUE = "index-audit-missing"
+
+
+class CommandCapture(monitoring.CommandListener):
+    """Collects read commands issued while a route is being audited"""
+
+    def __init__(self):
+        self.route: Optional[str] = None
+        self.commands: List[Tuple[str, str, dict]] = []
+
+    def started(self, event):
+        if self.route and event.command_name in AUDITED_COMMANDS:
+            self.commands.append((self.route, event.database_name, copy.deepcopy(dict(event.command))))
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+# Registered before the backend creates its Mongo clients
+capture = CommandCapture()
+monitoring.register(capture)
+
+
+def shape(value):
+    """Filter with literal values replaced, so equal query shapes are explained once"""
+    if isinstance(value, dict):
+        return {k: shape(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        if all(not isinstance(v, (dict, list, tuple)) for v in value):
+            return [1]
+        return [shape(v) for v in value]
+    return 1
+
+
+def _filter(command: dict) -> dict:
+    name = next(iter(command))
+    if name == "find":
+        return command.get("filter") or {}
+    if name in ("count", "distinct"):
+        return command.get("query") or {}
+    pipeline = command.get("pipeline") or []
+    if pipeline and "$match" in pipeline[0]:
+        return pipeline[0]["$match"]
+    return {}
+
+
+def _explainable(command: dict) -> dict:
+    return {k: v for k, v in command.items() if not k.startswith("$") and k not in ("lsid", "txnNumber", "batchSize")}
+
+
+def collscans(plan) -> List[dict]:
+    """COLLSCAN stages anywhere inside the winning plans of an explain() result"""
+    found = []
+
+    def walk(node, winning: bool):
+        if isinstance(node, dict):
+            if winning and node.get("stage") == "COLLSCAN":
+                found.append(node)
+            for key, child in node.items():
+                if key == "rejectedPlans":
+                    continue
+                walk(child, winning or key in ("winningPlan", "queryPlan"))
+        elif isinstance(node, list):
+            for child in node:
+                walk(child, winning)
+
+    walk(plan, False)
+    return found
+
+
+async def resolve_params(db, path: str) -> Dict[str, str]:
+    values = {}
+    for name in re.findall(r"{(\w+)(?::\w+)?}", path):
+        if name in FIXED_PARAMS:
+            values[name] = FIXED_PARAMS[name]
+        elif name in PARAM_SOURCES:
+            collection, field = PARAM_SOURCES[name]
+            doc = await db[collection].find_one({field: {"$exists": True}}, {"_id": 0, field: 1})
+            values[name] = str(doc[field]) if doc else MISSING_VALUE
+        else:
+            values[name] = MISSING_VALUE
+    return values
+
+
+async def audit(timeout: float = 15.0) -> dict:
+    import httpx
+    from fastapi.routing import APIRoute
+
+    import server
+    from core.database import db
+    from utils.indexes import apply_indexes
+
+    summary = await apply_indexes(db)
+    print(f"Indexes: {summary['created']} created, {summary['existing']} existing, {len(summary['failed'])} failed")
+
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://audit") as client:
+        login = await client.post("/api/auth/login", json=ADMIN_CREDENTIALS)
+        login.raise_for_status()
+        client.headers["Authorization"] = f"Bearer {login.json()['token']}"
+
+        routes = sorted({
+            r.path for r in server.app.routes
+            if isinstance(r, APIRoute) and "GET" in r.methods and r.path.startswith("/api")
+            and not SKIP_PATH.search(r.path)
+        })
+        statuses: Dict[str, int] = {}
+        for path in routes:
+            params = await resolve_params(db, path)
+            url = re.sub(r"{(\w+)(?::\w+)?}", lambda m: params[m.group(1)], path)
+            capture.route = path
+            try:
+                response = await asyncio.wait_for(client.get(url), timeout)
+                statuses[path] = response.status_code
+            except Exception as e:
+                statuses[path] = 0
+                print(f"  ! {path}: {type(e).__name__}: {e}", file=sys.stderr)
+            finally:
+                capture.route = None
+
+    # Explain each distinct (collection, command, filter shape) once
+    seen = set()
+    findings, explained = [], 0
+    for route, database, command in capture.commands:
+        name = next(iter(command))
+        collection = command[name]
+        query = _filter(command)
+        key = (collection, name, json.dumps(shape(query), sort_keys=True, default=str))
+        if key in seen or not isinstance(collection, str):
+            continue
+        seen.add(key)
+        try:
+            plan = await db.client[database].command({"explain": _explainable(command), "verbosity": "queryPlanner"})
+        except Exception as e:
+            print(f"  ! explain {collection}.{name} from {route}: {e}", file=sys.stderr)
+            continue
+        explained += 1
+        if not collscans(plan):
+            continue
+        findings.append({
+            "route": route,
+            "collection": collection,
+            "command": name,
+            "filter": json.loads(key[2]),
+            "allowed": not query or collection in ALLOWED_COLLECTIONS,
+        })
+
+    return {
+        "routes": len(statuses),
+        "errors": sorted(p for p, s in statuses.items() if s == 0 or s >= 500),
+        "queries_explained": explained,
+        "collscans": findings,
+        "unexpected": [f for f in findings if not f["allowed"]],
+    }
+
+
+def print_report(result: dict):
+    print(f"\n{result['routes']} routes called, {result['queries_explained']} query shapes explained")
+    for finding in result["collscans"]:
+        marker = "  allowed" if finding["allowed"] else "COLLSCAN "
+        print(f"{marker} {finding['collection']}.{finding['command']} {json.dumps(finding['filter'])}  <- {finding['route']}")
+    if result["errors"]:
+        print(f"\nRoutes that failed: {', '.join(result['errors'])}")
+    print(f"\n{len(result['unexpected'])} unexpected collection scans")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fail on collection scans issued by GET endpoints")
+    parser.add_argument("--timeout", type=float, default=15.0, help="seconds allowed per request")
+    parser.add_argument("--json", help="write the full result to this file")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    result = asyncio.run(audit(args.timeout))
+    print_report(result)
+    print(f"Finished in {time.perf_counter() - started:.1f}s")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+    sys.exit(1 if result["unexpected"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+"""
+Scripted load scenarios against a running backend.
+
+Scenarios (each virtual user loops until the duration elapses):
+    dashboard   dashboard burst: stats, breakdowns, project list, weekly billing, AMC list
+    payroll     payroll run: bulk payroll preview for the current month, employee list
+    amc_pdf     AMC report PDF generation for random AMCs
+    portal      customer portal browsing as seeded portal customers
+
+Reports latency percentiles (p50/p90/p95/p99/max) and throughput per
+endpoint, plus server-side Mongo commands per request when the backend
+exposes /api/admin/performance/routes.
+
+Typical local run:
+    mongod --dbpath /tmp/erp-load &
+    MONGO_URL=mongodb://localhost:27017 DB_NAME=erp_load python -m benchmarks.seed_data --scale 1
+    MONGO_URL=mongodb://localhost:27017 DB_NAME=erp_load uvicorn server:app --port 8001 --workers 1 &
+    python -m benchmarks.load_test --base-url http://localhost:8001 --users 20 --duration 30
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import sys
+import time
+from datetime import date
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+ADMIN_CREDENTIALS = {"email": "admin@enerzia.com", "password": "admin123"}
+
+# Portal accounts created by benchmarks/seed_data.py (kept here so the load
+# generator runs without the backend's Mongo settings)
+PORTAL_EMAIL = "customer{}@loadtest.example.com"
+PORTAL_PASSWORD = "loadtest123"
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an ascending list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values), math.ceil(pct / 100 * len(sorted_values))) - 1)
+    return sorted_values[rank]
+
+
+class Recorder:
+    """Latencies and outcomes per endpoint label"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+        self.bytes: Dict[str, int] = {}
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+
+    async def call(self, client: httpx.AsyncClient, label: str, method: str, url: str, **kwargs) -> Optional[httpx.Response]:
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            response = None
+        elapsed = time.perf_counter() - started
+        self.latencies.setdefault(label, []).append(elapsed)
+        if response is None or response.status_code >= 400:
+            self.errors[label] = self.errors.get(label, 0) + 1
+        else:
+            self.bytes[label] = self.bytes.get(label, 0) + len(response.content)
+        return response
+
+    def summary(self) -> List[dict]:
+        wall = (self.finished or time.perf_counter()) - self.started
+        rows = []
+        for label, values in sorted(self.latencies.items()):
+            values = sorted(values)
+            rows.append({
+                "endpoint": label,
+                "requests": len(values),
+                "errors": self.errors.get(label, 0),
+                "rps": round(len(values) / wall, 2) if wall else 0,
+                "p50_ms": round(percentile(values, 50) * 1000, 1),
+                "p90_ms": round(percentile(values, 90) * 1000, 1),
+                "p95_ms": round(percentile(values, 95) * 1000, 1),
+                "p99_ms": round(percentile(values, 99) * 1000, 1),
+                "max_ms": round(values[-1] * 1000, 1),
+                "avg_kb": round(self.bytes.get(label, 0) / max(1, len(values) - self.errors.get(label, 0)) / 1024, 1),
+            })
+        return rows
+
+
+class Context:
+    """Shared state discovered before the run (tokens, ids)"""
+
+    def __init__(self, admin_token: str, amc_ids: List[str], portal_accounts: List[str]):
+        self.admin_token = admin_token
+        self.amc_ids = amc_ids
+        self.portal_accounts = portal_accounts
+
+    @property
+    def admin_headers(self) -> dict:
+        return {"Authorization": f"Bearer {self.admin_token}"}
+
+
+# =============== SCENARIOS ===============
+
+async def dashboard_user(client: httpx.AsyncClient, ctx: Context, rec: Recorder, rng: random.Random, deadline: float):
+    headers = ctx.admin_headers
+    while time.perf_counter() < deadline:
+        await asyncio.gather(
+            rec.call(client, "GET /api/dashboard/stats", "GET", "/api/dashboard/stats", headers=headers),
+            rec.call(client, "GET /api/dashboard/this-week-breakdown", "GET", "/api/dashboard/this-week-breakdown", headers=headers),
+            rec.call(client, "GET /api/dashboard/active-projects-breakdown", "GET", "/api/dashboard/active-projects-breakdown", headers=headers),
+        )
+        await rec.call(client, "GET /api/projects", "GET", "/api/projects", headers=headers)
+        await rec.call(client, "GET /api/billing/weekly", "GET", "/api/billing/weekly", headers=headers)
+        await rec.call(client, "GET /api/amc", "GET", "/api/amc", headers=headers)
+
+
+async def payroll_user(client: httpx.AsyncClient, ctx: Context, rec: Recorder, rng: random.Random, deadline: float):
+    headers = ctx.admin_headers
+    today = date.today()
+    while time.perf_counter() < deadline:
+        await rec.call(client, "GET /api/hr/employees", "GET", "/api/hr/employees", headers=headers)
+        await rec.call(client, "POST /api/hr/payroll/preview", "POST", "/api/hr/payroll/preview", headers=headers,
+                       json={"month": today.month, "year": today.year, "fetch_attendance": True})
+
+
+async def amc_pdf_user(client: httpx.AsyncClient, ctx: Context, rec: Recorder, rng: random.Random, deadline: float):
+    if not ctx.amc_ids:
+        return
+    while time.perf_counter() < deadline:
+        amc_id = rng.choice(ctx.amc_ids)
+        await rec.call(client, "GET /api/amc-report/{amc_id}/pdf", "GET", f"/api/amc-report/{amc_id}/pdf",
+                       headers=ctx.admin_headers)
+
+
+async def portal_user(client: httpx.AsyncClient, ctx: Context, rec: Recorder, rng: random.Random, deadline: float):
+    if not ctx.portal_accounts:
+        return
+    response = await rec.call(client, "POST /api/customer-portal/login", "POST", "/api/customer-portal/login",
+                              json={"email": rng.choice(ctx.portal_accounts), "password": PORTAL_PASSWORD})
+    if response is None or response.status_code != 200:
+        return
+    # Portal endpoints take the session token as a query parameter
+    params = {"token": response.json()["token"]}
+    while time.perf_counter() < deadline:
+        await rec.call(client, "GET /api/customer-portal/dashboard", "GET", "/api/customer-portal/dashboard", params=params)
+        amcs = await rec.call(client, "GET /api/customer-portal/amcs", "GET", "/api/customer-portal/amcs", params=params)
+        await rec.call(client, "GET /api/customer-portal/reports", "GET", "/api/customer-portal/reports", params=params)
+        await rec.call(client, "GET /api/customer-portal/projects", "GET", "/api/customer-portal/projects", params=params)
+        if amcs is not None and amcs.status_code == 200 and amcs.json().get("amcs"):
+            amc_id = rng.choice(amcs.json()["amcs"])["id"]
+            await rec.call(client, "GET /api/customer-portal/amcs/{amc_id}", "GET",
+                           f"/api/customer-portal/amcs/{amc_id}", params=params)
+        await asyncio.sleep(rng.uniform(0.1, 0.5))  # think time
+
+
+SCENARIOS: Dict[str, Callable[..., Awaitable[None]]] = {
+    "dashboard": dashboard_user,
+    "payroll": payroll_user,
+    "amc_pdf": amc_pdf_user,
+    "portal": portal_user,
+}
+
+
+# =============== RUNNER ===============
+
+async def prepare(client: httpx.AsyncClient, portal_users: int) -> Context:
+    response = await client.post("/api/auth/login", json=ADMIN_CREDENTIALS)
+    response.raise_for_status()
+    token = response.json()["token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    amcs = await client.get("/api/amc", params={"limit": 200}, headers=headers)
+    amc_ids = [a["id"] for a in amcs.json().get("amcs", [])] if amcs.status_code == 200 else []
+    accounts = [PORTAL_EMAIL.format(i) for i in range(portal_users)]
+    return Context(token, amc_ids, accounts)
+
+
+async def run_scenario(base_url: str, name: str, users: int, duration: float, ctx: Context, seed: int) -> Recorder:
+    recorder = Recorder()
+    deadline = time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=users * 3, max_keepalive_connections=users * 3)
+    async with httpx.AsyncClient(base_url=base_url, timeout=120, limits=limits) as client:
+        await asyncio.gather(*[
+            SCENARIOS[name](client, ctx, recorder, random.Random(seed + n), deadline) for n in range(users)
+        ])
+    recorder.finished = time.perf_counter()
+    return recorder
+
+
+async def server_route_summary(base_url: str, ctx: Context) -> Dict[str, dict]:
+    """Server-side per-route stats from the performance middleware, if available"""
+    async with httpx.AsyncClient(base_url=base_url, timeout=30) as client:
+        response = await client.get("/api/admin/performance/routes", params={"limit": 500}, headers=ctx.admin_headers)
+        if response.status_code != 200:
+            return {}
+        return {f"{r['method']} {r['route']}": r for r in response.json().get("routes", [])}
+
+
+def print_table(name: str, rows: List[dict], server: Dict[str, dict]):
+    print(f"\n== {name} ==")
+    print(f"{'endpoint':46} {'reqs':>6} {'err':>4} {'rps':>7} {'p50':>8} {'p90':>8} {'p95':>8} {'p99':>8} {'max':>8} {'mongo/req':>9}")
+    for r in rows:
+        mongo = server.get(r["endpoint"], {}).get("avg_mongo_commands", "")
+        print(f"{r['endpoint'][:46]:46} {r['requests']:6d} {r['errors']:4d} {r['rps']:7.1f} {r['p50_ms']:8.1f} "
+              f"{r['p90_ms']:8.1f} {r['p95_ms']:8.1f} {r['p99_ms']:8.1f} {r['max_ms']:8.1f} {mongo:>9}")
+
+
+async def main_async(args) -> int:
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=60) as client:
+        ctx = await prepare(client, args.portal_users)
+    results = {}
+    for name in args.scenarios.split(","):
+        name = name.strip()
+        if name not in SCENARIOS:
+            print(f"Unknown scenario {name!r}; choose from {', '.join(SCENARIOS)}")
+            return 2
+        async with httpx.AsyncClient(base_url=args.base_url, timeout=30) as client:
+            await client.post("/api/admin/performance/reset", headers=ctx.admin_headers)
+        users = args.pdf_users if name == "amc_pdf" else args.users
+        recorder = await run_scenario(args.base_url, name, users, args.duration, ctx, args.seed)
+        rows = recorder.summary()
+        server = await server_route_summary(args.base_url, ctx)
+        print_table(f"{name}: {users} users x {args.duration:.0f}s", rows, server)
+        results[name] = {"users": users, "duration": args.duration, "endpoints": rows}
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(results, f, indent=2)
+    failed = sum(r["errors"] for scenario in results.values() for r in scenario["endpoints"])
+    return 1 if failed and args.fail_on_errors else 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Run load scenarios against a backend")
+    parser.add_argument("--base-url", default="http://localhost:8001")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--users", type=int, default=20, help="virtual users per scenario")
+    parser.add_argument("--pdf-users", type=int, default=4, help="virtual users for amc_pdf")
+    parser.add_argument("--portal-users", type=int, default=50, help="seeded portal accounts to log in as")
+    parser.add_argument("--duration", type=float, default=30, help="seconds per scenario")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--report", help="write per-endpoint results as JSON to this file")
+    parser.add_argument("--fail-on-errors", action="store_true")
+    return asyncio.run(main_async(parser.parse_args(argv)))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,293 @@
+"""
+Offline fixtures for PDF benchmarks.
+
+Generators read PDF template settings from MongoDB; use_default_pdf_settings()
+points them at the built-in defaults so renders need no database or network.
+The synthetic documents mirror the fields the generators read.
+"""
+import random
+from datetime import date, timedelta
+
+from routes import pdf_base, pdf_template_settings
+
+
+def use_default_pdf_settings():
+    """Serve the default PDF template settings instead of reading MongoDB"""
+    defaults = pdf_template_settings.get_default_settings()
+    pdf_template_settings.get_pdf_settings_sync = lambda: defaults
+    pdf_base.get_pdf_settings_sync = lambda: defaults
+    pdf_base._cached_settings = None
+    pdf_base._cache_time = None
+    return defaults
+
+
+def _day(offset: int) -> str:
+    return (date(2025, 1, 1) + timedelta(days=offset)).isoformat()
+
+
+def make_amc(index: int = 0, visits: int = 4, equipment: int = 8, annexures: int = 0, statutory: int = 0,
+             seed: int = 0) -> dict:
+    rng = random.Random(seed + index)
+    equipment_types = ["transformer", "panel", "acb", "vcb", "earth-pit", "ups", "dg", "lightning-arrestor"]
+    return {
+        "id": f"amc-{index}",
+        "amc_no": f"AMC/2025/{index:04d}",
+        "status": "active",
+        "project_id": f"project-{index}",
+        "customer_info": {
+            "customer_name": f"Customer {index} Industries Pvt Ltd",
+            "site_location": "Chennai",
+            "contact_person": "Facility Manager",
+            "contact_email": f"facility{index}@example.com",
+            "contact_phone": "9876543210",
+        },
+        "service_provider": {"company_name": "Enerzia Power Solutions", "engineer_name": "Service Engineer"},
+        "contract_details": {
+            "contract_no": f"CON-{index:04d}",
+            "start_date": _day(0),
+            "end_date": _day(364),
+            "contract_value": 250000 + index,
+            "scope_of_work": "Preventive maintenance of HT/LT electrical installations. " * 3,
+        },
+        "equipment_list": [
+            {
+                "equipment_type": equipment_types[i % len(equipment_types)],
+                "equipment_name": f"{equipment_types[i % len(equipment_types)].upper()} {i + 1}",
+                "quantity": rng.randint(1, 4),
+                "service_frequency": "quarterly",
+                "last_service_date": _day(30 * i),
+                "next_service_date": _day(30 * i + 90),
+            }
+            for i in range(equipment)
+        ],
+        "service_visits": [
+            {
+                "visit_id": f"visit-{index}-{v}",
+                "visit_date": _day(90 * v),
+                "visit_type": "scheduled",
+                "status": "completed",
+                "technician_name": "Technician",
+                "equipment_serviced": [f"Equipment {e}" for e in range(3)],
+                "spare_parts_used": [{"name": "Fuse 10A", "quantity": 2}],
+                "remarks": "All parameters within limits.",
+            }
+            for v in range(visits)
+        ],
+        "statutory_documents": [
+            {
+                "document_type": "calibration_certificate",
+                "document_name": f"Statutory certificate {d + 1}",
+                "reference_no": f"STAT-{d + 1}",
+                "file_url": f"/api/uploads/statutory_document/amc-{index}-{d + 1}.pdf",
+            }
+            for d in range(statutory)
+        ],
+        "annexure": [
+            {"type": "certificate", "name": f"Calibration certificate {a + 1}", "reference": f"CERT-{a + 1}"}
+            for a in range(annexures)
+        ],
+    }
+
+
+def make_project(index: int = 0) -> dict:
+    return {
+        "id": f"project-{index}",
+        "pid_no": f"PID/25-26/{index:03d}",
+        "project_name": f"Electrical maintenance - site {index}",
+        "client": f"Customer {index} Industries Pvt Ltd",
+        "location": "Chennai",
+    }
+
+
+def make_equipment_report(equipment_type: str, index: int = 0, rows: int = 12) -> dict:
+    """Test report with the common header fields plus generic checklist and results rows"""
+    return {
+        "id": f"report-{equipment_type}-{index}",
+        "report_no": f"{equipment_type.upper()}/2025/{index:04d}",
+        "equipment_type": equipment_type,
+        "report_type": "Periodical Maintenance",
+        "report_date": _day(index),
+        "test_date": _day(index),
+        "date_of_testing": _day(index),
+        "next_due_date": _day(index + 365),
+        "customer_name": f"Customer {index} Industries Pvt Ltd",
+        "customer_info": {
+            "customer_name": f"Customer {index} Industries Pvt Ltd",
+            "site_location": "Chennai",
+            "contact_person": "Facility Manager",
+            "contact_email": f"facility{index}@example.com",
+            "contact_phone": "9876543210",
+        },
+        "site_location": "Chennai",
+        "project_name": f"Electrical maintenance - site {index}",
+        "equipment_name": f"{equipment_type.upper()} {index + 1}",
+        "equipment_location": "Main LT room",
+        "location": "Main LT room",
+        "make": "Schneider Electric",
+        "model": "MX-2000",
+        "serial_no": f"SN{index:06d}",
+        "equipment_details": {"make": "Schneider Electric", "model": "MX-2000", "serial_no": f"SN{index:06d}", "rating": "1600A"},
+        "engineer_name": "Service Engineer",
+        "tested_by": "Service Engineer",
+        "witnessed_by": "Facility Manager",
+        "checklist": [
+            {"id": i + 1, "item": f"Inspection point {i + 1} checked for tightness and condition", "status": "yes", "remarks": "OK"}
+            for i in range(rows)
+        ],
+        "test_results": [
+            {"parameter": f"Parameter {i + 1}", "acceptance": "> 100 MΩ", "measured": f"{500 + i * 10} MΩ", "status": "OK"}
+            for i in range(rows)
+        ],
+        "remarks": "Equipment found in healthy condition.",
+        "overall_result": "satisfactory",
+        "overall_condition": "good",
+    }
+
+
+def make_transformer_report(index: int = 0, taps: int = 9) -> dict:
+    report = make_equipment_report("transformer", index)
+    report.update({
+        "rating_kva": "2000",
+        "transformer_type": "Oil cooled",
+        "voltage_ratio_hv": "11000",
+        "voltage_ratio_lv": "433",
+        "vector_group": "Dyn11",
+        "no_of_tapping": str(taps),
+        "test_instruments": [
+            {"name": "Insulation tester", "make": "Megger", "model": "MIT525", "serial": f"MIT{i}"} for i in range(3)
+        ],
+        "ratio_tests": [
+            {"tap": str(t + 1), "hv_voltage": "11000", "measured_1u2u": "25.4", "measured_1v2v": "25.4", "measured_1w2w": "25.4"}
+            for t in range(taps)
+        ],
+        "oil_bdv_before_value": "45",
+        "oil_bdv_after_value": "60",
+        "oil_bdv_remarks": "Oil filtered",
+    })
+    return report
+
+
+def _thermal_image(seed: int, size=(640, 480)) -> str:
+    """Data URI of a JPEG with a smooth hot spot, similar in weight to camera output"""
+    import base64
+    import io
+
+    from PIL import Image, ImageDraw, ImageFilter
+
+    rng = random.Random(seed)
+    image = Image.new("RGB", size, (30, 0, 90))
+    draw = ImageDraw.Draw(image)
+    cx, cy = rng.randint(100, size[0] - 100), rng.randint(100, size[1] - 100)
+    for r in range(220, 0, -10):
+        heat = 255 - r
+        draw.ellipse((cx - r, cy - r, cx + r, cy + r), fill=(heat, heat // 2, max(0, 90 - heat // 3)))
+    for _ in range(400):
+        x, y = rng.randrange(size[0]), rng.randrange(size[1])
+        draw.point((x, y), fill=(rng.randrange(256), rng.randrange(128), rng.randrange(128)))
+    image = image.filter(ImageFilter.GaussianBlur(2))
+    out = io.BytesIO()
+    image.save(out, "JPEG", quality=85)
+    return "data:image/jpeg;base64," + base64.b64encode(out.getvalue()).decode()
+
+
+def make_ir_report(index: int = 0, images: int = 10) -> dict:
+    """IR thermography report with `images` inspection items, each with original and thermal photos"""
+    risks = ["Critical", "Warning", "Check & Monitor", "Normal"]
+    return {
+        "id": f"ir-{index}",
+        "report_no": f"IR/2025/{index:04d}",
+        "report_type": "ir-thermography",
+        "document_details": {
+            "client": f"Customer {index} Industries Pvt Ltd",
+            "location": "Chennai",
+            "date_of_ir_study": _day(index),
+            "prepared_by": "Thermography Engineer",
+        },
+        "inspection_items": [
+            {
+                "panel": f"MCC-{i // 4 + 1}",
+                "feeder": f"Outgoing feeder {i + 1}",
+                "location": "Substation",
+                "original_image": _thermal_image(seed=2 * i),
+                "thermal_image": _thermal_image(seed=2 * i + 1),
+                "max_temperature": str(40 + i % 50),
+                "min_temperature": "32",
+                "risk_category": risks[i % len(risks)],
+                "observation": "Hot spot observed at the incoming terminal.",
+                "recommendation": "Retighten terminations during the next shutdown.",
+            }
+            for i in range(images)
+        ],
+    }
+
+
+def make_schedule(index: int = 0, tasks: int = 40, tasks_per_phase: int = 8) -> dict:
+    """Project schedule with `tasks` sub-items spread over phases"""
+    phases = []
+    for p in range(0, tasks, tasks_per_phase):
+        count = min(tasks_per_phase, tasks - p)
+        phases.append({
+            "name": f"Phase {len(phases) + 1}",
+            "start": _day(p * 3),
+            "end": _day(p * 3 + count * 3),
+            "progress": 50,
+            "subItems": [
+                {
+                    "description": f"Task {p + t + 1}: cable laying and termination",
+                    "quantity": 10 + t,
+                    "unit": "Nos",
+                    "start_date": _day((p + t) * 3),
+                    "end_date": _day((p + t) * 3 + 5),
+                }
+                for t in range(count)
+            ],
+        })
+    return {
+        "schedule_name": f"Execution schedule {index}",
+        "start_date": _day(0),
+        "end_date": _day(tasks * 3 + 5),
+        "status": "in_progress",
+        "notes": "Dates subject to site readiness.",
+        "customer_info": {"name": f"Customer {index} Industries Pvt Ltd", "location": "Chennai"},
+        "phases": phases,
+        "milestones": [{"name": f"Milestone {m + 1}", "date": _day(m * 30), "completed": m < 2} for m in range(4)],
+    }
+
+
+def make_payroll_record(index: int = 0) -> dict:
+    earnings = {"basic": 30000, "hra": 12000, "da": 3000, "conveyance": 1600, "medical": 1250,
+                "special_allowance": 5000, "other_allowance": 0}
+    deductions = {"epf": 3600, "esic": 0, "esic_applicable": False, "professional_tax": 200,
+                  "lop_deduction": 0, "advance_emi": 0, "other_deductions": 0}
+    gross = sum(earnings.values())
+    total_deductions = sum(v for k, v in deductions.items() if k != "esic_applicable")
+    return {
+        "id": f"payroll-{index}",
+        "emp_id": f"EMP{index:04d}",
+        "emp_name": f"Employee {index}",
+        "department": "Projects",
+        "designation": "Site Engineer",
+        "bank_account": "123456789012",
+        "bank_ifsc": "HDFC0001234",
+        "month": 3,
+        "year": 2025,
+        "days_in_month": 31,
+        "working_days": 26,
+        "present_days": 26,
+        "lop_days": 0,
+        "earnings": earnings,
+        "deductions": deductions,
+        "gross_salary": gross,
+        "total_deductions": total_deductions,
+        "net_salary": gross - total_deductions,
+        "employer_contributions": {"epf": 3600, "esic": 0},
+        "ctc": (gross + 3600) * 12,
+    }
+
+
+def make_employee(index: int = 0) -> dict:
+    return {
+        "emp_id": f"EMP{index:04d}",
+        "name": f"Employee {index}",
+        "statutory": {"pan_number": "ABCDE1234F", "uan_number": "100200300400"},
+    }
@@ -0,0 +1,266 @@
+"""
+PDF generation benchmark suite with golden-size and time budgets.
+
+Every case renders a synthetic report offline (no MongoDB, no network) in a
+forked child process and records:
+
+    seconds   best wall time of `repeat` renders after one warm-up render
+    rss_mb    peak resident set size of the rendering process
+    pages     page count of the output
+    bytes     output size
+
+The results are checked against benchmarks/pdf_budgets.json:
+
+    max_seconds / max_rss_mb   upper limits
+    pages                      exact golden page count
+    bytes                      golden size, allowed to drift by `bytes_tolerance`
+
+Run from backend/:
+    MONGO_URL=mongodb://localhost DB_NAME=bench python -m benchmarks.pdf_suite
+    python -m benchmarks.pdf_suite --only ir_ --report results.json
+    python -m benchmarks.pdf_suite --update-budgets   # after an intended change
+
+Set PDF_BENCH_TIME_SCALE (e.g. 2) on machines slower than the one that
+recorded the budgets.
+
+The exit status is 1 when any budget is exceeded.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import time
+from io import BytesIO
+from typing import Callable, Dict, List, Optional
+
+from benchmarks import pdf_fixtures as fx
+
+BUDGETS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pdf_budgets.json")
+
+# Headroom applied by --update-budgets over the measured values
+TIME_HEADROOM = 2.0
+RSS_HEADROOM = 1.5
+BYTES_TOLERANCE = 0.10
+
+# Multiplies every max_seconds budget, for machines slower than the one the budgets were recorded on
+TIME_SCALE = float(os.environ.get("PDF_BENCH_TIME_SCALE", "1"))
+
+
+def _equipment_types() -> List[str]:
+    from routes.equipment_pdf import EQUIPMENT_INFO
+    return sorted(EQUIPMENT_INFO)
+
+
+def _equipment(equipment_type: str) -> Callable[[], BytesIO]:
+    def render():
+        from routes.equipment_pdf import generate_equipment_pdf_buffer
+        return generate_equipment_pdf_buffer(fx.make_equipment_report(equipment_type), {}, equipment_type)
+    return render
+
+
+def _transformer() -> BytesIO:
+    from routes.transformer_pdf import generate_pdf_buffer
+    return generate_pdf_buffer(fx.make_transformer_report(), {})
+
+
+def _ir(images: int) -> Callable[[], BytesIO]:
+    def render():
+        from routes.ir_thermography_pdf import render_ir_thermography_pdf
+        return render_ir_thermography_pdf(fx.make_ir_report(images=images), {})
+    return render
+
+
+def _amc(annexures: int, statutory: int = 0) -> Callable[[], BytesIO]:
+    def render():
+        """Main AMC report, `annexures` attached equipment test reports, statutory section and back cover"""
+        from PyPDF2 import PdfReader, PdfWriter
+
+        from routes.amc_pdf import append_amc_closing_pages, get_amc_styles, render_amc_main_pdf
+        from routes.equipment_pdf import generate_equipment_pdf_buffer
+
+        types = ["acb", "vcb", "panel", "earth-pit", "dg", "relay"]
+        reports = [fx.make_equipment_report(types[i % len(types)], index=i) for i in range(annexures)]
+        amc = fx.make_amc(annexures=annexures, statutory=statutory)
+        writer = PdfWriter()
+        for page in PdfReader(render_amc_main_pdf(amc, fx.make_project(), {}, [], reports, [])).pages:
+            writer.add_page(page)
+        for report in reports:
+            attached = generate_equipment_pdf_buffer(report, {}, report["equipment_type"])
+            for page in PdfReader(attached).pages:
+                writer.add_page(page)
+        # Uploaded statutory files are absent offline; their listing and separator pages still render
+        append_amc_closing_pages(writer, amc, get_amc_styles(), False, 2 if reports else 1)
+        output = BytesIO()
+        writer.write(output)
+        return output
+    return render
+
+
+def _schedule(tasks: int) -> Callable[[], BytesIO]:
+    def render():
+        from routes.project_schedule_pdf import generate_project_schedule_pdf
+        return generate_project_schedule_pdf(fx.make_schedule(tasks=tasks), fx.make_project())
+    return render
+
+
+def _payslip() -> BytesIO:
+    from routes.payslip_pdf import generate_payslip_pdf
+    return generate_payslip_pdf(fx.make_payroll_record(), fx.make_employee())
+
+
+def _hr_payslip() -> BytesIO:
+    from routes.hr_payslip_pdf import generate_payslip_pdf
+    return generate_payslip_pdf(fx.make_payroll_record(), fx.make_employee(), {})
+
+
+def cases() -> Dict[str, Callable[[], BytesIO]]:
+    """All benchmark cases by name"""
+    registry = {f"equipment_{t}": _equipment(t) for t in _equipment_types()}
+    registry["transformer"] = _transformer
+    for images in (1, 10, 40):
+        registry[f"ir_{images}_images"] = _ir(images)
+    for annexures in (0, 5, 20):
+        registry[f"amc_{annexures}_annexures"] = _amc(annexures)
+    registry["amc_5_annexures_statutory"] = _amc(5, statutory=3)
+    for tasks in (10, 50, 150, 300):
+        registry[f"schedule_{tasks}_tasks"] = _schedule(tasks)
+    registry["payslip"] = _payslip
+    registry["hr_payslip"] = _hr_payslip
+    return registry
+
+
+def _page_count(data: bytes) -> int:
+    from PyPDF2 import PdfReader
+    return len(PdfReader(BytesIO(data)).pages)
+
+
+def _measure(render: Callable[[], BytesIO], repeat: int) -> dict:
+    fx.use_default_pdf_settings()
+    # Warm-up: imports, font metrics, style catalog and logo registry
+    data = render().getvalue()
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        data = render().getvalue()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    # ru_maxrss is in KiB on Linux
+    rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return {"seconds": round(best, 4), "rss_mb": round(rss_mb, 1), "pages": _page_count(data), "bytes": len(data)}
+
+
+def _child(conn, render, repeat):
+    try:
+        conn.send(_measure(render, repeat))
+    except Exception as e:
+        conn.send({"error": f"{type(e).__name__}: {e}"})
+    finally:
+        conn.close()
+
+
+def run_case(name: str, render: Callable[[], BytesIO], repeat: int = 3) -> dict:
+    """Measure one case in a forked process so peak RSS is per case"""
+    context = multiprocessing.get_context("fork")
+    parent, child = context.Pipe(duplex=False)
+    process = context.Process(target=_child, args=(child, render, repeat))
+    process.start()
+    child.close()
+    try:
+        result = parent.recv()
+    except EOFError:
+        result = {"error": "render process exited without a result"}
+    process.join()
+    return {"case": name, **result}
+
+
+def run_suite(only: Optional[str] = None, repeat: int = 3) -> List[dict]:
+    return [run_case(name, render, repeat) for name, render in cases().items() if not only or only in name]
+
+
+def load_budgets(path: str = BUDGETS_PATH) -> dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def check_budget(result: dict, budget: Optional[dict]) -> List[str]:
+    """Budget violations for one result (empty when within budget)"""
+    if "error" in result:
+        return [result["error"]]
+    if not budget:
+        return ["no budget recorded (run with --update-budgets)"]
+    violations = []
+    max_seconds = budget["max_seconds"] * TIME_SCALE
+    if result["seconds"] > max_seconds:
+        violations.append(f"time {result['seconds']:.3f}s > {max_seconds:.3f}s")
+    if result["rss_mb"] > budget["max_rss_mb"]:
+        violations.append(f"peak RSS {result['rss_mb']:.1f} MB > {budget['max_rss_mb']:.1f} MB")
+    if result["pages"] != budget["pages"]:
+        violations.append(f"pages {result['pages']} != {budget['pages']}")
+    tolerance = budget.get("bytes_tolerance", BYTES_TOLERANCE)
+    if abs(result["bytes"] - budget["bytes"]) > budget["bytes"] * tolerance:
+        violations.append(f"size {result['bytes']} B differs from {budget['bytes']} B by more than {tolerance:.0%}")
+    return violations
+
+
+def budgets_from(results: List[dict], previous: dict) -> dict:
+    """Budgets with headroom over the measured results, keeping cases that were not run"""
+    budgets = dict(previous)
+    for r in results:
+        if "error" in r:
+            continue
+        budgets[r["case"]] = {
+            "max_seconds": round(max(r["seconds"] * TIME_HEADROOM, 0.25), 3),
+            "max_rss_mb": round(r["rss_mb"] * RSS_HEADROOM, 1),
+            "pages": r["pages"],
+            "bytes": r["bytes"],
+            "bytes_tolerance": BYTES_TOLERANCE,
+        }
+    return dict(sorted(budgets.items()))
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--only", help="run cases whose name contains this text")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--report", help="write the results and violations as JSON to this file")
+    parser.add_argument("--update-budgets", action="store_true", help="record the results as the new budgets")
+    args = parser.parse_args(argv)
+
+    results = run_suite(args.only, args.repeat)
+    budgets = load_budgets()
+    failed = 0
+    print(f"{'case':32} {'seconds':>9} {'rss MB':>8} {'pages':>6} {'bytes':>10}")
+    for r in results:
+        if "error" in r:
+            print(f"{r['case']:32} ERROR {r['error']}")
+        else:
+            print(f"{r['case']:32} {r['seconds']:9.3f} {r['rss_mb']:8.1f} {r['pages']:6d} {r['bytes']:10d}")
+        if not args.update_budgets:
+            r["violations"] = check_budget(r, budgets.get(r["case"]))
+            for violation in r["violations"]:
+                print(f"  ✗ {violation}")
+            failed += bool(r["violations"])
+
+    if args.update_budgets:
+        with open(BUDGETS_PATH, "w") as f:
+            json.dump(budgets_from(results, budgets), f, indent=2)
+            f.write("\n")
+        print(f"Budgets written to {BUDGETS_PATH}")
+        failed = sum("error" in r for r in results)
+    elif failed:
+        print(f"{failed} of {len(results)} cases exceeded their budget")
+    else:
+        print(f"All {len(results)} cases within budget")
+
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(results, f, indent=2)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,497 @@
+"""
+Synthetic data generator for load testing.
+
+Seeds a MongoDB database with a production-sized, reproducible dataset:
+customers (portal accounts), projects, sales orders, AMCs with service visits,
+equipment and IR thermography test reports with images, employees with a
+year of attendance, and order expenses.
+
+Distributions follow the shape of real data rather than uniform noise:
+- customer popularity is long-tailed (a few customers own most projects)
+- PO and order values are log-normal
+- statuses are weighted toward ongoing/completed work
+- dates skew toward the recent past
+- attendance skips Sundays, with about 7% leave and 3% half days
+
+Every seeded document carries seed_tag="loadtest" so --purge removes exactly
+what was generated. The admin login used by the tests (admin@enerzia.com /
+admin123) is created when missing.
+
+Run from backend/ against a local mongod (never a shared database):
+    MONGO_URL=mongodb://localhost:27017 DB_NAME=erp_load \\
+        python -m benchmarks.seed_data --scale 1 [--purge]
+"""
+import argparse
+import asyncio
+import math
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Iterable, List
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from benchmarks import pdf_fixtures as fx
+
+SEED_TAG = "loadtest"
+PORTAL_PASSWORD = "loadtest123"
+BATCH_SIZE = 1000
+
+# Counts at --scale 1
+BASE_COUNTS = {
+    "customers": 150,
+    "projects": 2000,
+    "orders": 2500,
+    "amcs": 300,
+    "reports": 1500,
+    "employees": 120,
+    "expenses": 20000,
+}
+
+SEEDED_COLLECTIONS = [
+    "customers", "projects", "sales_orders", "amcs", "test_reports", "hr_employees",
+    "attendance", "expenses_v2",
+]
+
+CATEGORIES = ["PSS", "AS", "OSS", "CS"]
+DEPARTMENTS = ["PROJECTS", "SALES", "ACCOUNTS", "HR", "OPERATIONS", "PURCHASE"]
+PROJECT_STATUSES = (["Ongoing", "Completed", "Need to Start", "Invoiced", "Partially Invoiced"], [45, 30, 10, 10, 5])
+ORDER_STATUSES = (["pending", "confirmed", "in_progress", "completed", "cancelled"], [15, 25, 30, 25, 5])
+EXPENSE_CATEGORIES = (
+    ["material_purchase", "labor", "transport", "site_expenses", "subcontractor", "equipment_rental", "misc"],
+    [35, 20, 12, 12, 10, 6, 5],
+)
+EQUIPMENT_TYPES = ["acb", "vcb", "mccb", "panel", "earth-pit", "dg", "relay", "ups", "transformer", "lightning-arrestor"]
+CITIES = ["Chennai", "Bengaluru", "Hyderabad", "Coimbatore", "Pune", "Mumbai", "Madurai", "Hosur"]
+TODAY = date.today()
+
+
+def _weighted(rng: random.Random, choices) -> str:
+    values, weights = choices
+    return rng.choices(values, weights)[0]
+
+
+def _recent_day(rng: random.Random, span_days: int = 730) -> date:
+    """Day in the past span_days, skewed toward recent dates"""
+    return TODAY - timedelta(days=int(span_days * rng.random() ** 1.6))
+
+
+def _dmy(d: date) -> str:
+    return d.strftime("%d/%m/%Y")
+
+
+def _amount(rng: random.Random, median: float, sigma: float = 1.0) -> float:
+    return round(rng.lognormvariate(math.log(median), sigma), 2)
+
+
+class Pool:
+    """Long-tailed popularity: pick() favours the first entries (Zipf-like)"""
+
+    def __init__(self, items: List[dict], exponent: float = 1.1):
+        self.items = items
+        self.weights = [1 / (i + 1) ** exponent for i in range(len(items))]
+
+    def pick(self, rng: random.Random) -> dict:
+        return rng.choices(self.items, self.weights)[0]
+
+
+# =============== GENERATORS ===============
+
+def make_customers(rng: random.Random, count: int, password_hash: str) -> List[dict]:
+    customers = []
+    for i in range(count):
+        company = f"{rng.choice(['Sri', 'New', 'Global', 'United', 'Southern', 'Prime'])} " \
+                  f"{rng.choice(['Textiles', 'Pharma', 'Foods', 'Auto Components', 'Steels', 'Hospitals', 'IT Park'])} {i}"
+        customers.append({
+            "id": str(uuid.uuid4()),
+            "email": f"customer{i}@loadtest.example.com",
+            "password_hash": password_hash,
+            "name": f"Facility Manager {i}",
+            "company_name": company,
+            "contact_number": f"98{rng.randint(10000000, 99999999)}",
+            "is_active": True,
+            "linked_amcs": [],
+            "created_at": datetime.now(timezone.utc),
+            "city": rng.choice(CITIES),
+            "seed_tag": SEED_TAG,
+        })
+    return customers
+
+
+def make_projects(rng: random.Random, count: int, customers: Pool) -> Iterable[dict]:
+    for i in range(count):
+        customer = customers.pick(rng)
+        started = _recent_day(rng)
+        po_amount = _amount(rng, 450000, 1.1)
+        status = _weighted(rng, PROJECT_STATUSES)
+        completion = 100 if status in ("Completed", "Invoiced") else round(rng.uniform(0, 95), 1)
+        invoiced = po_amount if status == "Invoiced" else round(po_amount * completion / 100 * rng.uniform(0.5, 1), 2)
+        budget = round(po_amount * rng.uniform(0.6, 0.9), 2)
+        yield {
+            "id": str(uuid.uuid4()),
+            "pid_no": f"PID/LT/{i:06d}",
+            "category": rng.choice(CATEGORIES),
+            "department": rng.choice(DEPARTMENTS[:2]),
+            "po_number": f"PO-LT-{i:06d}",
+            "client": customer["company_name"],
+            "customer_id": customer["id"],
+            "location": customer["city"],
+            "project_name": f"{rng.choice(['HT panel', 'LT panel', 'Earthing', 'Cabling', 'Solar', 'Substation'])} works {i}",
+            "vendor": "Enerzia",
+            "status": status,
+            "engineer_in_charge": f"Engineer {rng.randint(1, 25)}",
+            "project_date": _dmy(started),
+            "completion_date": _dmy(started + timedelta(days=rng.randint(30, 240))),
+            "po_amount": po_amount,
+            "balance": round(po_amount - invoiced, 2),
+            "invoiced_amount": invoiced,
+            "completion_percentage": completion,
+            "this_week_billing": round(po_amount * rng.uniform(0.02, 0.1), 2) if rng.random() < 0.15 else 0,
+            "budget": budget,
+            "actual_expenses": round(budget * rng.uniform(0.3, 1.1), 2),
+            "pid_savings": 0,
+            "work_items": [
+                {"description": f"Work item {w + 1}", "quantity": rng.randint(1, 50), "unit": "Nos", "status": "pending"}
+                for w in range(rng.randint(2, 12))
+            ],
+            "created_at": datetime.combine(started, datetime.min.time(), timezone.utc),
+            "updated_at": datetime.now(timezone.utc),
+            "seed_tag": SEED_TAG,
+        }
+
+
+def make_orders(rng: random.Random, count: int, customers: Pool) -> Iterable[dict]:
+    for i in range(count):
+        customer = customers.pick(rng)
+        ordered = _recent_day(rng)
+        items = [
+            {"description": f"Item {n + 1}", "quantity": rng.randint(1, 20), "unit": "Nos",
+             "rate": _amount(rng, 15000, 0.9)}
+            for n in range(rng.randint(1, 15))
+        ]
+        for item in items:
+            item["amount"] = round(item["quantity"] * item["rate"], 2)
+        subtotal = round(sum(item["amount"] for item in items), 2)
+        gst = round(subtotal * 0.18, 2)
+        yield {
+            "id": str(uuid.uuid4()),
+            "order_no": f"LT-PO-{i:06d}",
+            "po_number": f"LT-PO-{i:06d}",
+            "customer_id": customer["id"],
+            "customer_name": customer["company_name"],
+            "customer_email": customer["email"],
+            "date": _dmy(ordered),
+            "po_date": _dmy(ordered),
+            "delivery_date": _dmy(ordered + timedelta(days=rng.randint(15, 120))),
+            "order_type": "purchase_order",
+            "items": items,
+            "subtotal": subtotal,
+            "gst_percent": 18,
+            "gst_amount": gst,
+            "total_amount": round(subtotal + gst, 2),
+            "category": rng.choice(CATEGORIES),
+            "status": _weighted(rng, ORDER_STATUSES),
+            "payment_status": rng.choice(["unpaid", "partial", "paid"]),
+            "created_at": datetime.combine(ordered, datetime.min.time(), timezone.utc),
+            "updated_at": datetime.now(timezone.utc),
+            "seed_tag": SEED_TAG,
+        }
+
+
+def make_reports(rng: random.Random, count: int, projects: List[dict], ir_share: float, ir_images: int) -> Iterable[dict]:
+    """Equipment test reports, with a share of IR thermography reports carrying images"""
+    # IR images are expensive to encode; a small set is reused across reports
+    image_bank = [fx._thermal_image(seed) for seed in range(max(2, ir_images * 2))]
+    for i in range(count):
+        project = rng.choice(projects)
+        tested = _recent_day(rng, 365)
+        if rng.random() < ir_share:
+            report = fx.make_ir_report(i, images=0)
+            report["inspection_items"] = [
+                {
+                    "panel": f"MCC-{n // 4 + 1}", "feeder": f"Feeder {n + 1}", "location": project["location"],
+                    "original_image": rng.choice(image_bank), "thermal_image": rng.choice(image_bank),
+                    "max_temperature": str(round(rng.gauss(55, 12), 1)), "min_temperature": "31",
+                    "risk_category": rng.choices(["Critical", "Warning", "Check & Monitor", "Normal"], [5, 10, 25, 60])[0],
+                    "observation": "Hot spot observed at the incoming terminal.",
+                    "recommendation": "Retighten terminations.",
+                }
+                for n in range(ir_images)
+            ]
+            report["equipment_type"] = "ir-thermography"
+        else:
+            report = fx.make_equipment_report(rng.choice(EQUIPMENT_TYPES), i, rows=rng.randint(6, 20))
+        report.update({
+            "id": str(uuid.uuid4()),
+            "report_no": f"LT/{report.get('equipment_type', 'report').upper()}/{i:06d}",
+            "project_id": project["id"],
+            "customer_id": project["customer_id"],
+            "customer_name": project["client"],
+            "status": rng.choice(["draft", "completed", "completed", "approved"]),
+            "test_date": tested.isoformat(),
+            "created_at": datetime.combine(tested, datetime.min.time(), timezone.utc).isoformat(),
+            "seed_tag": SEED_TAG,
+        })
+        yield report
+
+
+def make_amcs(rng: random.Random, count: int, projects: List[dict], reports: List[dict], visits: int) -> Iterable[dict]:
+    reports_by_project: Dict[str, List[dict]] = {}
+    for report in reports:
+        reports_by_project.setdefault(report["project_id"], []).append(report)
+    for i in range(count):
+        project = rng.choice(projects)
+        amc = fx.make_amc(i, visits=visits, equipment=rng.randint(3, 12), seed=rng.randint(0, 10 ** 6))
+        linked = reports_by_project.get(project["id"], [])
+        for visit in amc["service_visits"]:
+            visit["status"] = rng.choice(["completed", "completed", "scheduled"])
+            sample = rng.sample(linked, min(len(linked), rng.randint(0, 4)))
+            visit["test_report_ids"] = [r["id"] for r in sample if r["equipment_type"] != "ir-thermography"]
+            visit["ir_thermography_report_ids"] = [r["id"] for r in sample if r["equipment_type"] == "ir-thermography"]
+        amc.update({
+            "id": str(uuid.uuid4()),
+            "amc_no": f"AMC/LT/{i:05d}",
+            "project_id": project["id"],
+            "customer_id": project["customer_id"],
+            "status": rng.choices(["active", "expired", "renewed"], [70, 20, 10])[0],
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "seed_tag": SEED_TAG,
+        })
+        amc["customer_info"]["customer_name"] = project["client"]
+        yield amc
+
+
+def make_employees(rng: random.Random, count: int) -> List[dict]:
+    employees = []
+    for i in range(count):
+        basic = round(_amount(rng, 22000, 0.5), -2)
+        salary = {
+            "basic": basic, "hra": round(basic * 0.4, -1), "da": round(basic * 0.1, -1),
+            "conveyance": 1600, "medical": 1250, "special_allowance": round(basic * 0.2, -1), "other_allowance": 0,
+        }
+        employees.append({
+            "id": str(uuid.uuid4()),
+            "emp_id": f"LT{i:05d}",
+            "name": f"Employee {i}",
+            "email": f"employee{i}@loadtest.example.com",
+            "department": rng.choice(DEPARTMENTS),
+            "designation": rng.choice(["Engineer", "Technician", "Executive", "Manager", "Supervisor"]),
+            "join_date": _recent_day(rng, 3000).isoformat(),
+            "employment_type": "permanent",
+            "status": "active",
+            "bank_details": {"account_number": f"{rng.randint(10 ** 11, 10 ** 12 - 1)}", "ifsc_code": "HDFC0001234",
+                             "bank_name": "HDFC Bank", "branch": "Main"},
+            "statutory": {"pan_number": "ABCDE1234F", "uan_number": f"{rng.randint(10 ** 11, 10 ** 12 - 1)}"},
+            "salary": salary,
+            "gross_salary": sum(salary.values()),
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "seed_tag": SEED_TAG,
+        })
+    return employees
+
+
+def make_attendance(rng: random.Random, employees: List[dict], days: int = 365) -> Iterable[dict]:
+    """One record per working day (Sundays off) for the past `days` days"""
+    for employee in employees:
+        for offset in range(days):
+            day = TODAY - timedelta(days=offset)
+            if day.weekday() == 6:
+                continue
+            roll = rng.random()
+            status = "absent" if roll < 0.04 else "leave" if roll < 0.07 else "half_day" if roll < 0.10 else "present"
+            check_in = None
+            check_out = None
+            hours = 0
+            if status in ("present", "half_day"):
+                start = max(7.5, rng.gauss(9.4, 0.3))
+                hours = round(4 + rng.random() if status == "half_day" else rng.gauss(8.8, 0.7), 2)
+                check_in = f"{int(start):02d}:{int(start % 1 * 60):02d}"
+                end = min(23.9, start + hours)
+                check_out = f"{int(end):02d}:{int(end % 1 * 60):02d}"
+            yield {
+                "user_id": employee["id"],
+                "user_name": employee["name"],
+                "date": day.isoformat(),
+                "month": day.month,
+                "year": day.year,
+                "check_in": check_in,
+                "check_out": check_out,
+                "status": status,
+                "work_hours": hours,
+                "overtime": max(0, round(hours - 9, 2)),
+                "created_at": datetime.combine(day, datetime.min.time(), timezone.utc).isoformat(),
+                "seed_tag": SEED_TAG,
+            }
+
+
+def make_expenses(rng: random.Random, count: int, orders: Pool) -> Iterable[dict]:
+    for i in range(count):
+        order = orders.pick(rng)
+        spent = _recent_day(rng, 540)
+        status = rng.choices(["pending", "submitted", "approved", "rejected"], [15, 20, 60, 5])[0]
+        yield {
+            "id": str(uuid.uuid4()),
+            "expense_no": f"EXP/LT/{i:07d}",
+            "order_id": order["id"],
+            "order_no": order["order_no"],
+            "customer_name": order["customer_name"],
+            "category": _weighted(rng, EXPENSE_CATEGORIES),
+            "description": "Site expense",
+            "amount": _amount(rng, 4500, 1.2),
+            "date": _dmy(spent),
+            "vendor": f"Vendor {rng.randint(1, 300)}",
+            "payment_mode": rng.choice(["cash", "bank", "upi", "credit"]),
+            "attachments": [],
+            "approval_status": status,
+            "approval_history": [],
+            "created_at": datetime.combine(spent, datetime.min.time(), timezone.utc),
+            "updated_at": datetime.now(timezone.utc),
+            "seed_tag": SEED_TAG,
+        }
+
+
+# =============== WRITING ===============
+
+async def insert_batches(collection, docs: Iterable[dict]) -> int:
+    batch, total = [], 0
+    for doc in docs:
+        batch.append(doc)
+        if len(batch) >= BATCH_SIZE:
+            await collection.insert_many(batch, ordered=False)
+            total += len(batch)
+            batch = []
+    if batch:
+        await collection.insert_many(batch, ordered=False)
+        total += len(batch)
+    return total
+
+
+async def purge(db) -> Dict[str, int]:
+    customer_ids = await db.customers.distinct("id", {"seed_tag": SEED_TAG})
+    result = await db.customer_document_index.delete_many({"customer_id": {"$in": customer_ids}})
+    removed = {"customer_document_index": result.deleted_count}
+    for name in SEEDED_COLLECTIONS:
+        result = await db[name].delete_many({"seed_tag": SEED_TAG})
+        removed[name] = result.deleted_count
+    return removed
+
+
+async def ensure_admin(db, password_hash: str):
+    if not await db.users.find_one({"email": "admin@enerzia.com"}):
+        await db.users.insert_one({
+            "id": str(uuid.uuid4()),
+            "email": "admin@enerzia.com",
+            "name": "Load Test Admin",
+            "password": password_hash,
+            "role": "super_admin",
+            "department": None,
+            "is_active": True,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "seed_tag": SEED_TAG,
+        })
+
+
+async def seed(db, counts: Dict[str, int], visits: int = 4, ir_share: float = 0.2, ir_images: int = 4,
+               attendance_days: int = 365, seed_value: int = 1) -> Dict[str, int]:
+    from core.security import get_password_hash
+    from utils.customer_documents import rebuild_customer_documents
+
+    rng = random.Random(seed_value)
+    written = {}
+
+    def log(name, count, started):
+        written[name] = count
+        print(f"  {name:14} {count:>9,} docs  {time.perf_counter() - started:6.1f}s")
+
+    started = time.perf_counter()
+    await ensure_admin(db, get_password_hash("admin123"))
+    customers = make_customers(rng, counts["customers"], get_password_hash(PORTAL_PASSWORD))
+    await db.customers.insert_many(customers)
+    log("customers", len(customers), started)
+    customer_pool = Pool(customers)
+
+    started = time.perf_counter()
+    projects = list(make_projects(rng, counts["projects"], customer_pool))
+    log("projects", await insert_batches(db.projects, projects), started)
+
+    started = time.perf_counter()
+    orders = list(make_orders(rng, counts["orders"], customer_pool))
+    log("sales_orders", await insert_batches(db.sales_orders, orders), started)
+
+    started = time.perf_counter()
+    reports = list(make_reports(rng, counts["reports"], projects, ir_share, ir_images))
+    log("test_reports", await insert_batches(db.test_reports, reports), started)
+
+    started = time.perf_counter()
+    amcs = list(make_amcs(rng, counts["amcs"], projects, reports, visits))
+    log("amcs", await insert_batches(db.amcs, amcs), started)
+    customers_by_id = {c["id"]: c for c in customers}
+    for amc in amcs:
+        customers_by_id[amc["customer_id"]]["linked_amcs"].append(amc["id"])
+    for customer in customers:
+        if customer["linked_amcs"]:
+            await db.customers.update_one({"id": customer["id"]}, {"$set": {"linked_amcs": customer["linked_amcs"]}})
+
+    started = time.perf_counter()
+    employees = make_employees(rng, counts["employees"])
+    log("hr_employees", await insert_batches(db.hr_employees, employees), started)
+
+    started = time.perf_counter()
+    log("attendance", await insert_batches(db.attendance, make_attendance(rng, employees, attendance_days)), started)
+
+    started = time.perf_counter()
+    log("expenses_v2", await insert_batches(db.expenses_v2, make_expenses(rng, counts["expenses"], Pool(orders, 0.8))), started)
+
+    started = time.perf_counter()
+    for customer in customers:
+        await rebuild_customer_documents(db, customer)
+    log("portal index", len(customers), started)
+    return written
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Seed a local database with synthetic ERP data")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiplier for all base counts")
+    for name, count in BASE_COUNTS.items():
+        parser.add_argument(f"--{name}", type=int, help=f"override count (default {count} x scale)")
+    parser.add_argument("--visits", type=int, default=4, help="service visits per AMC")
+    parser.add_argument("--ir-share", type=float, default=0.2, help="share of reports that are IR thermography")
+    parser.add_argument("--ir-images", type=int, default=4, help="inspection images per IR report")
+    parser.add_argument("--attendance-days", type=int, default=365)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--purge", action="store_true", help="remove previously seeded documents first")
+    parser.add_argument("--purge-only", action="store_true", help="remove seeded documents and exit")
+    args = parser.parse_args(argv)
+
+    mongo_url = os.environ.get("MONGO_URL", "mongodb://localhost:27017")
+    db_name = os.environ.get("DB_NAME")
+    if not db_name:
+        print("Set DB_NAME to the local load-test database")
+        return 2
+    counts = {
+        name: getattr(args, name) if getattr(args, name) is not None else max(1, int(count * args.scale))
+        for name, count in BASE_COUNTS.items()
+    }
+
+    async def run():
+        db = AsyncIOMotorClient(mongo_url)[db_name]
+        if args.purge or args.purge_only:
+            removed = await purge(db)
+            print(f"Purged {sum(removed.values()):,} seeded documents")
+            if args.purge_only:
+                return
+        print(f"Seeding {db_name} at {mongo_url}")
+        started = time.perf_counter()
+        written = await seed(db, counts, args.visits, args.ir_share, args.ir_images, args.attendance_days, args.seed)
+        print(f"Wrote {sum(written.values()):,} documents in {time.perf_counter() - started:.1f}s")
+        print(f"Portal logins: customer0..{counts['customers'] - 1}@loadtest.example.com / {PORTAL_PASSWORD}")
+
+    asyncio.run(run())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
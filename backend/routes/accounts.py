@@ -2,17 +2,16 @@
 Accounts Department Routes
 Handles invoices, payments, TDS, GST, tasks and projections for the Accounts department
 """
-import io
 import uuid
 from datetime import datetime, timezone
 from typing import Optional, List
 from fastapi import APIRouter, HTTPException, Depends, UploadFile, File
 from pydantic import BaseModel, Field, ConfigDict
-import pandas as pd
 
 # Import shared dependencies from core modules
 from core.database import db
 from core.security import get_current_user, require_auth
+from utils.bulk_import import Column, read_excel_upload, normalize_frame, import_records
 
 router = APIRouter(prefix="/accounts", tags=["Accounts Department"])
 
@@ -649,163 +648,107 @@ async def get_dashboard_stats(current_user: dict = Depends(get_current_user)):
 
 # ==================== IMPORT ROUTES ====================
 
-@router.post("/import/invoices")
-async def import_invoices_excel(file: UploadFile = File(...), current_user: dict = Depends(require_auth)):
-    """Import invoices from Excel file"""
+INVOICE_IMPORT_COLUMNS = {
+    'invoice_no': Column(['invoice no', 'invoice_no'], default=lambda i: f'INV-{i+1}'),
+    'invoice_type': Column(['type', 'invoice_type'], kind='lower', default='domestic'),
+    'customer_name': Column(['customer name', 'customer_name', 'customer'], default='Unknown'),
+    'date': Column(['date'], default=''),
+    'gst_no': Column(['gst no', 'gst_no', 'gstin']),
+    'basic': Column(['basic'], kind='float', default=0),
+    'sgst': Column(['sgst'], kind='float', default=0),
+    'cgst': Column(['cgst'], kind='float', default=0),
+    'igst': Column(['igst'], kind='float', default=0),
+    'round_off': Column(['round off', 'round_off'], kind='float', default=0),
+    'amount': Column(['amount', 'total'], kind='float', default=0),
+}
+
+OVERDUE_IMPORT_COLUMNS = {
+    'invoice_no': Column(['invoice no', 'invoice_no'], default=lambda i: f'INV-{i+1}'),
+    'customer_name': Column(['customer name', 'customer_name', 'customer'], default='Unknown'),
+    'date': Column(['date', 'invoice date'], default=''),
+    'due_date': Column(['due date', 'due_date'], default=''),
+    'amount': Column(['amount', 'total'], kind='float', default=0),
+    'balance_due': Column(['balance due', 'balance_due', 'balance'], kind='float', default=0),
+}
+
+RETENTION_IMPORT_COLUMNS = {
+    'invoice_no': Column(['invoice no', 'invoice_no'], default=lambda i: f'RET-{i+1}'),
+    'customer_name': Column(['customer name', 'customer_name', 'customer'], default='Unknown'),
+    'category': Column(['category'], default=''),
+    'date': Column(['date', 'invoice date'], default=''),
+    'due_date': Column(['due date', 'due_date'], default=''),
+    'amount': Column(['amount', 'total'], kind='float', default=0),
+    'balance_due': Column(['balance due', 'balance_due', 'balance'], kind='float', default=0),
+}
+
+TASK_IMPORT_COLUMNS = {
+    'task_name': Column(['task name', 'task_name', 'task'], default=lambda i: f'Task-{i+1}'),
+    'description': Column(['description']),
+    'assigned_to': Column(['assigned to', 'assigned_to'], default='Unassigned'),
+    'due_date': Column(['due date', 'due_date'], default=''),
+    'priority': Column(['priority'], kind='lower', default='medium'),
+    'status': Column(['status'], kind='lower', default='pending'),
+    'category': Column(['category'], kind='lower', default='general'),
+    'related_customer': Column(['customer', 'related_customer']),
+    'remarks': Column(['remarks']),
+}
+
+
+async def _run_excel_import(file: UploadFile, collection, columns: dict, model, label: str, dry_run: bool):
+    """Shared body of the accounts Excel imports: normalise, validate in batches, bulk insert"""
     if not file.filename.endswith(('.xlsx', '.xls')):
         raise HTTPException(status_code=400, detail="Only Excel files are supported")
     
     try:
         contents = await file.read()
-        df = pd.read_excel(io.BytesIO(contents))
-        df.columns = df.columns.str.strip().str.lower()
-        
-        imported_count = 0
-        errors = []
-        
-        for index, row in df.iterrows():
-            try:
-                data = {
-                    'invoice_no': str(row.get('invoice no', row.get('invoice_no', f'INV-{index+1}'))),
-                    'invoice_type': str(row.get('type', row.get('invoice_type', 'domestic'))).lower(),
-                    'customer_name': str(row.get('customer name', row.get('customer_name', row.get('customer', 'Unknown')))),
-                    'date': str(row.get('date', '')),
-                    'gst_no': str(row.get('gst no', row.get('gst_no', row.get('gstin', '')))) if pd.notna(row.get('gst no', row.get('gst_no', row.get('gstin')))) else None,
-                    'basic': float(row.get('basic', 0)) if pd.notna(row.get('basic')) else 0,
-                    'sgst': float(row.get('sgst', 0)) if pd.notna(row.get('sgst')) else 0,
-                    'cgst': float(row.get('cgst', 0)) if pd.notna(row.get('cgst')) else 0,
-                    'igst': float(row.get('igst', 0)) if pd.notna(row.get('igst')) else 0,
-                    'round_off': float(row.get('round off', row.get('round_off', 0))) if pd.notna(row.get('round off', row.get('round_off'))) else 0,
-                    'amount': float(row.get('amount', row.get('total', 0))) if pd.notna(row.get('amount', row.get('total'))) else 0,
-                }
-                
-                obj = Invoice(**data)
-                doc = obj.model_dump()
-                doc['created_at'] = doc['created_at'].isoformat()
-                await db.accounts_invoices.insert_one(doc)
-                imported_count += 1
-            except Exception as e:
-                errors.append(f"Row {index + 2}: {str(e)}")
-        
-        return {"message": f"Successfully imported {imported_count} invoices", "imported": imported_count, "errors": errors if errors else None}
+        df = read_excel_upload(contents)
+        frame = normalize_frame(df, columns)
+        report = await import_records(collection, frame, model, dry_run=dry_run)
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Error processing file: {str(e)}")
+    
+    if dry_run:
+        message = f"Dry run: {report.valid} of {report.total_rows} {label} would be imported"
+    else:
+        message = f"Successfully imported {report.imported} {label}"
+    return {"message": message, **report.to_dict()}
+
+
+@router.post("/import/invoices")
+async def import_invoices_excel(
+    file: UploadFile = File(...),
+    dry_run: bool = False,
+    current_user: dict = Depends(require_auth)
+):
+    """Import invoices from Excel file"""
+    return await _run_excel_import(file, db.accounts_invoices, INVOICE_IMPORT_COLUMNS, Invoice, "invoices", dry_run)
 
 
 @router.post("/import/overdue")
-async def import_overdue_excel(file: UploadFile = File(...), current_user: dict = Depends(require_auth)):
+async def import_overdue_excel(
+    file: UploadFile = File(...),
+    dry_run: bool = False,
+    current_user: dict = Depends(require_auth)
+):
     """Import overdue invoices from Excel file"""
-    if not file.filename.endswith(('.xlsx', '.xls')):
-        raise HTTPException(status_code=400, detail="Only Excel files are supported")
-    
-    try:
-        contents = await file.read()
-        df = pd.read_excel(io.BytesIO(contents))
-        df.columns = df.columns.str.strip().str.lower()
-        
-        imported_count = 0
-        errors = []
-        
-        for index, row in df.iterrows():
-            try:
-                data = {
-                    'invoice_no': str(row.get('invoice no', row.get('invoice_no', f'INV-{index+1}'))),
-                    'customer_name': str(row.get('customer name', row.get('customer_name', row.get('customer', 'Unknown')))),
-                    'date': str(row.get('date', row.get('invoice date', ''))),
-                    'due_date': str(row.get('due date', row.get('due_date', ''))),
-                    'amount': float(row.get('amount', row.get('total', 0))) if pd.notna(row.get('amount', row.get('total'))) else 0,
-                    'balance_due': float(row.get('balance due', row.get('balance_due', row.get('balance', 0)))) if pd.notna(row.get('balance due', row.get('balance_due', row.get('balance')))) else 0,
-                }
-                
-                obj = OverdueInvoice(**data)
-                doc = obj.model_dump()
-                doc['created_at'] = doc['created_at'].isoformat()
-                await db.accounts_overdue.insert_one(doc)
-                imported_count += 1
-            except Exception as e:
-                errors.append(f"Row {index + 2}: {str(e)}")
-        
-        return {"message": f"Successfully imported {imported_count} overdue invoices", "imported": imported_count, "errors": errors if errors else None}
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Error processing file: {str(e)}")
+    return await _run_excel_import(file, db.accounts_overdue, OVERDUE_IMPORT_COLUMNS, OverdueInvoice, "overdue invoices", dry_run)
 
 
 @router.post("/import/retention")
-async def import_retention_excel(file: UploadFile = File(...), current_user: dict = Depends(require_auth)):
+async def import_retention_excel(
+    file: UploadFile = File(...),
+    dry_run: bool = False,
+    current_user: dict = Depends(require_auth)
+):
     """Import retention invoices from Excel file"""
-    if not file.filename.endswith(('.xlsx', '.xls')):
-        raise HTTPException(status_code=400, detail="Only Excel files are supported")
-    
-    try:
-        contents = await file.read()
-        df = pd.read_excel(io.BytesIO(contents))
-        df.columns = df.columns.str.strip().str.lower()
-        
-        imported_count = 0
-        errors = []
-        
-        for index, row in df.iterrows():
-            try:
-                data = {
-                    'invoice_no': str(row.get('invoice no', row.get('invoice_no', f'RET-{index+1}'))),
-                    'customer_name': str(row.get('customer name', row.get('customer_name', row.get('customer', 'Unknown')))),
-                    'category': str(row.get('category', '')) if pd.notna(row.get('category')) else '',
-                    'date': str(row.get('date', row.get('invoice date', ''))),
-                    'due_date': str(row.get('due date', row.get('due_date', ''))),
-                    'amount': float(row.get('amount', row.get('total', 0))) if pd.notna(row.get('amount', row.get('total'))) else 0,
-                    'balance_due': float(row.get('balance due', row.get('balance_due', row.get('balance', 0)))) if pd.notna(row.get('balance due', row.get('balance_due', row.get('balance')))) else 0,
-                }
-                
-                obj = RetentionInvoice(**data)
-                doc = obj.model_dump()
-                doc['created_at'] = doc['created_at'].isoformat()
-                await db.accounts_retention.insert_one(doc)
-                imported_count += 1
-            except Exception as e:
-                errors.append(f"Row {index + 2}: {str(e)}")
-        
-        return {"message": f"Successfully imported {imported_count} retention invoices", "imported": imported_count, "errors": errors if errors else None}
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Error processing file: {str(e)}")
+    return await _run_excel_import(file, db.accounts_retention, RETENTION_IMPORT_COLUMNS, RetentionInvoice, "retention invoices", dry_run)
 
 
 @router.post("/import/tasks")
-async def import_tasks_excel(file: UploadFile = File(...), current_user: dict = Depends(require_auth)):
+async def import_tasks_excel(
+    file: UploadFile = File(...),
+    dry_run: bool = False,
+    current_user: dict = Depends(require_auth)
+):
     """Import tasks from Excel file"""
-    if not file.filename.endswith(('.xlsx', '.xls')):
-        raise HTTPException(status_code=400, detail="Only Excel files are supported")
-    
-    try:
-        contents = await file.read()
-        df = pd.read_excel(io.BytesIO(contents))
-        df.columns = df.columns.str.strip().str.lower()
-        
-        imported_count = 0
-        errors = []
-        
-        for index, row in df.iterrows():
-            try:
-                data = {
-                    'task_name': str(row.get('task name', row.get('task_name', row.get('task', f'Task-{index+1}')))),
-                    'description': str(row.get('description', '')) if pd.notna(row.get('description')) else None,
-                    'assigned_to': str(row.get('assigned to', row.get('assigned_to', 'Unassigned'))),
-                    'due_date': str(row.get('due date', row.get('due_date', ''))),
-                    'priority': str(row.get('priority', 'medium')).lower(),
-                    'status': str(row.get('status', 'pending')).lower(),
-                    'category': str(row.get('category', 'general')).lower(),
-                    'related_customer': str(row.get('customer', row.get('related_customer', ''))) if pd.notna(row.get('customer', row.get('related_customer'))) else None,
-                    'remarks': str(row.get('remarks', '')) if pd.notna(row.get('remarks')) else None,
-                }
-                
-                obj = TaskItem(**data)
-                doc = obj.model_dump()
-                doc['created_at'] = doc['created_at'].isoformat()
-                doc['updated_at'] = doc['updated_at'].isoformat()
-                await db.accounts_tasks.insert_one(doc)
-                imported_count += 1
-            except Exception as e:
-                errors.append(f"Row {index + 2}: {str(e)}")
-        
-        return {"message": f"Successfully imported {imported_count} tasks", "imported": imported_count, "errors": errors if errors else None}
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Error processing file: {str(e)}")
+    return await _run_excel_import(file, db.accounts_tasks, TASK_IMPORT_COLUMNS, TaskItem, "tasks", dry_run)
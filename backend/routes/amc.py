@@ -12,6 +12,10 @@ import uuid
 
 # Import caching utilities
 from utils.cache import cache, CacheTTL
+from utils.customer_identity import assign_customer_id, relink_customer_id
+from utils.customer_documents import refresh_documents_for_amc, remove_document
+from utils.due_items import due_within, refresh_due_items
+from utils.streaming import find_by_ids
 
 router = APIRouter()
 
@@ -194,25 +198,12 @@ async def get_amc_dashboard_stats():
         "contract_details.end_date": {"$lte": next_30_days, "$gte": today}
     })
     
-    # Get upcoming service visits
-    upcoming_visits = []
-    amcs_cursor = db.amcs.find(
-        {"status": "active"},
-        {"_id": 0, "id": 1, "amc_no": 1, "project_id": 1, "service_visits": 1}
-    )
-    
-    async for amc in amcs_cursor:
-        for visit in amc.get("service_visits", []):
-            if visit.get("status") == "scheduled" and visit.get("visit_date", "") >= today:
-                upcoming_visits.append({
-                    "amc_id": amc["id"],
-                    "amc_no": amc.get("amc_no"),
-                    "visit": visit
-                })
-    
-    # Sort by date and get top 10
-    upcoming_visits.sort(key=lambda x: x["visit"]["visit_date"])
-    upcoming_visits = upcoming_visits[:10]
+    # Next 10 scheduled service visits from the due_items index
+    due = await due_within(db, 366, kinds=["amc_visit"], include_overdue=False, limit=10)
+    upcoming_visits = [
+        {"amc_id": item["source_id"], "amc_no": item.get("reference_no"), "visit": item["detail"]}
+        for item in due["items"]
+    ]
     
     result = {
         "total_amcs": total_amcs,
@@ -253,10 +244,7 @@ async def get_amc(amc_id: str):
     if amc.get("service_visits"):
         for visit in amc["service_visits"]:
             if visit.get("test_report_ids"):
-                test_reports = await db.test_reports.find(
-                    {"id": {"$in": visit["test_report_ids"]}},
-                    {"_id": 0}
-                ).to_list(100)
+                test_reports = await find_by_ids(db.test_reports, visit["test_report_ids"])
                 
                 # Sort reports by equipment_list order, then by report_no
                 def sort_key(report):
@@ -307,7 +295,10 @@ async def create_amc(amc_data: AMCCreate):
         "updated_at": datetime.now(timezone.utc).isoformat()
     }
     
+    await assign_customer_id(db, "amcs", amc_doc)
     await db.amcs.insert_one(amc_doc)
+    await refresh_documents_for_amc(db, amc_doc["id"])
+    await refresh_due_items(db, "amc_visit", [amc_doc["id"]])
     
     # Invalidate AMC cache
     await cache.invalidate_pattern("amc:*")
@@ -352,6 +343,10 @@ async def update_amc(amc_id: str, amc_data: AMCUpdate):
         update_data["status"] = amc_data.status
     
     await db.amcs.update_one({"id": amc_id}, {"$set": update_data})
+    await relink_customer_id(db, "amcs", amc_id, update_data)
+    # Visits may have gained or lost report attachments
+    await refresh_documents_for_amc(db, amc_id)
+    await refresh_due_items(db, "amc_visit", [amc_id])
     
     # Invalidate AMC cache
     await cache.invalidate_pattern("amc:*")
@@ -368,6 +363,9 @@ async def delete_amc(amc_id: str):
     result = await db.amcs.delete_one({"id": amc_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="AMC not found")
+    await refresh_documents_for_amc(db, amc_id)
+    await remove_document(db, "amc_report", amc_id)
+    await refresh_due_items(db, "amc_visit", [amc_id])
     
     # Invalidate AMC cache
     await cache.invalidate_pattern("amc:*")
@@ -424,6 +422,8 @@ async def clone_amc(amc_id: str):
     
     # Insert cloned AMC
     await db.amcs.insert_one(cloned_amc)
+    await refresh_documents_for_amc(db, cloned_amc["id"])
+    await refresh_due_items(db, "amc_visit", [cloned_amc["id"]])
     
     # Invalidate cache
     await cache.invalidate_pattern("amc:*")
@@ -451,6 +451,7 @@ async def add_service_visit(amc_id: str, visit: AMCServiceVisit):
             "$set": {"updated_at": datetime.now(timezone.utc).isoformat()}
         }
     )
+    await refresh_due_items(db, "amc_visit", [amc_id])
     
     return {"message": "Service visit added", "visit_id": visit_data["visit_id"]}
 
@@ -475,6 +476,7 @@ async def update_service_visit(amc_id: str, visit_id: str, visit: AMCServiceVisi
     
     if result.modified_count == 0:
         raise HTTPException(status_code=404, detail="AMC or service visit not found")
+    await refresh_due_items(db, "amc_visit", [amc_id])
     
     return {"message": "Service visit updated"}
 
@@ -499,6 +501,7 @@ async def link_test_report(amc_id: str, visit_id: str, test_report_id: str):
     
     if result.modified_count == 0:
         raise HTTPException(status_code=404, detail="AMC or service visit not found")
+    await refresh_due_items(db, "amc_visit", [amc_id])
     
     return {"message": "Test report linked to service visit"}
 
@@ -524,17 +527,9 @@ async def get_amc_equipment_reports(amc_id: str):
     for visit in amc.get("service_visits", []):
         report_ids.extend(visit.get("test_report_ids", []))
     
-    # Get unique report IDs
-    report_ids = list(set(report_ids))
-    
     # Fetch all test reports
-    test_reports = []
-    if report_ids:
-        test_reports = await db.test_reports.find(
-            {"id": {"$in": report_ids}},
-            {"_id": 0}
-        ).to_list(100)
-        
+    test_reports = await find_by_ids(db.test_reports, report_ids)
+    if test_reports:
         # Sort reports by equipment_list order, then by report_no
         def sort_key(report):
             eq_type = report.get("equipment_type", "").lower()
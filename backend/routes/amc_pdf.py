@@ -8,7 +8,7 @@ from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch, mm
 from reportlab.platypus import (
     SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle,
-    PageBreak, Image, ListFlowable, ListItem
+    PageBreak, ListFlowable, ListItem
 )
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT, TA_JUSTIFY
 from reportlab.graphics.shapes import Drawing, Rect
@@ -25,7 +25,7 @@ import os
 from routes.pdf_base import (
     format_date_ddmmyyyy,
     get_template_settings,
-    get_pdf_logo_path,
+    get_pdf_logo,
     get_pdf_primary_color,
     get_pdf_company_name,
     get_pdf_website,
@@ -36,6 +36,8 @@ from routes.pdf_base import (
     is_back_cover_enabled,
     get_pdf_company_info
 )
+from routes.pdf_styles import memoized_styles
+from utils.streaming import find_by_ids
 
 router = APIRouter()
 
@@ -46,12 +48,40 @@ LIGHT_GRAY = colors.HexColor('#f5f5f5')
 BORDER_COLOR = colors.HexColor('#cccccc')
 TEXT_DARK = colors.HexColor('#333333')
 
+# Shared TableStyle templates. A TableStyle is only read when applied to a
+# table, so one instance serves every table and every render.
+
+# Full-width blue section banner ("SECTION - A: ...")
+SECTION_HEADER_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, -1), PRIMARY_BLUE),
+    ('TEXTCOLOR', (0, 0), (-1, -1), colors.white),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 12),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
+    ('TOPPADDING', (0, 0), (-1, -1), 10),
+])
+
+# Blue header row over a centered grid
+BLUE_HEADER_ROW_GRID_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), PRIMARY_BLUE),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+    ('GRID', (0, 0), (-1, -1), 0.5, BORDER_COLOR),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 9),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+    ('TOPPADDING', (0, 0), (-1, -1), 6),
+])
+
 
 def get_db():
     from server import db
     return db
 
 
+@memoized_styles
 def get_amc_styles():
     """Get custom styles for AMC report - matching IR Thermography style"""
     styles = getSampleStyleSheet()
@@ -101,6 +131,95 @@ def get_amc_styles():
         splitLongWords=True,
     ))
     
+    # Table cell styles used by the report sections
+    styles.add(ParagraphStyle(
+        name='CellWrap',
+        fontSize=10,
+        fontName='Helvetica',
+        leading=12,
+        wordWrap='CJK',
+        splitLongWords=True,
+    ))
+    
+    styles.add(ParagraphStyle(
+        name='SpareWrap',
+        fontSize=9,
+        fontName='Helvetica',
+        leading=11,
+        wordWrap='CJK',
+        splitLongWords=True,
+    ))
+    
+    styles.add(ParagraphStyle(
+        name='SpareCenter',
+        fontSize=9,
+        fontName='Helvetica',
+        leading=11,
+        alignment=TA_CENTER,
+    ))
+    
+    styles.add(ParagraphStyle(
+        name='CellWrapSmall',
+        fontSize=8,
+        fontName='Helvetica',
+        leading=10,
+        wordWrap='CJK',
+        splitLongWords=True,
+    ))
+    
+    styles.add(ParagraphStyle(
+        name='CellCenterSmall',
+        fontSize=8,
+        fontName='Helvetica',
+        leading=10,
+        alignment=TA_CENTER,
+    ))
+    
+    styles.add(ParagraphStyle(
+        name='TableCellWrap',
+        fontSize=9,
+        fontName='Helvetica',
+        leading=11,
+        wordWrap='CJK',
+    ))
+    
+    styles.add(ParagraphStyle(
+        name='TableCellCenter',
+        fontSize=9,
+        fontName='Helvetica',
+        leading=11,
+        alignment=TA_CENTER,
+    ))
+    
+    # Notes shown when a section has no data
+    styles.add(ParagraphStyle(name='Note', fontSize=9, textColor=colors.gray, fontName='Helvetica-Oblique'))
+    styles.add(ParagraphStyle(name='NoteSmall', fontSize=8, textColor=colors.gray, fontName='Helvetica-Oblique'))
+    
+    # Annexure separator pages
+    styles.add(ParagraphStyle(
+        name='SeparatorHeader',
+        fontSize=20,
+        fontName='Helvetica-Bold',
+        textColor=PRIMARY_BLUE,
+        alignment=TA_CENTER,
+        spaceAfter=20,
+    ))
+    styles.add(ParagraphStyle(
+        name='SeparatorTitle',
+        fontSize=16,
+        fontName='Helvetica-Bold',
+        textColor=PRIMARY_BLUE,
+        alignment=TA_CENTER,
+        spaceAfter=30,
+    ))
+    styles.add(ParagraphStyle(
+        name='SeparatorSubtitle',
+        fontSize=11,
+        fontName='Helvetica',
+        textColor=TEXT_DARK,
+        alignment=TA_CENTER,
+    ))
+    
     return styles
 
 
@@ -113,7 +232,7 @@ def draw_cover_page(canvas_obj, doc, amc, project, org_settings):
     template_settings = get_template_settings()
     cover_settings = get_cover_page_settings()
     company_info = get_pdf_company_info()
-    logo_path = get_pdf_logo_path()
+    logo = get_pdf_logo()
     company_name = get_pdf_company_name()
     website = get_pdf_website()
     
@@ -143,15 +262,14 @@ def draw_cover_page(canvas_obj, doc, amc, project, org_settings):
     # =====================================================
     # COMPANY LOGO - Top Left (if enabled)
     # =====================================================
-    if cover_settings.get('show_logo', True) and logo_path:
+    if cover_settings.get('show_logo', True) and logo:
         c.saveState()
         
-        if os.path.exists(logo_path):
-            try:
-                c.drawImage(logo_path, 35, height - 90, width=180, height=60, 
-                           preserveAspectRatio=True, mask='auto')
-            except Exception as e:
-                print(f"Error drawing cover logo: {e}")
+        try:
+            c.drawImage(logo.scaled(180, 60), 35, height - 90, width=180, height=60, 
+                       preserveAspectRatio=True, mask='auto')
+        except Exception as e:
+            print(f"Error drawing cover logo: {e}")
         
         c.restoreState()
     
@@ -310,7 +428,7 @@ def draw_header_footer(canvas_obj, doc, amc, page_num):
     # Get template settings
     hf_settings = get_header_footer_settings()
     primary_orange = get_pdf_primary_color()
-    logo_path = get_pdf_logo_path()
+    logo = get_pdf_logo()
     company_name = get_pdf_company_name()
     website = get_pdf_website()
     
@@ -338,15 +456,14 @@ def draw_header_footer(canvas_obj, doc, amc, page_num):
     header_y = height - 30
     
     # Draw logo on right side - properly aligned (if enabled)
-    if hf_settings.get('show_header_logo', True) and logo_path:
+    if hf_settings.get('show_header_logo', True) and logo:
         logo_width = 100
         logo_height = 35
-        if os.path.exists(logo_path):
-            try:
-                c.drawImage(logo_path, width - margin - logo_width, header_y - 20, 
-                           width=logo_width, height=logo_height, preserveAspectRatio=True, mask='auto')
-            except Exception as e:
-                print(f"Error drawing logo: {e}")
+        try:
+            c.drawImage(logo.scaled(logo_width, logo_height), width - margin - logo_width, header_y - 20, 
+                       width=logo_width, height=logo_height, preserveAspectRatio=True, mask='auto')
+        except Exception as e:
+            print(f"Error drawing logo: {e}")
     
     # Report title on left - aligned with logo
     # HEADER section (if enabled)
@@ -448,15 +565,7 @@ def create_table_of_contents(amc, styles, ir_reports_count=0, test_reports_count
         [['CONTENTS']],
         colWidths=[515]
     )
-    header_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, -1), PRIMARY_BLUE),
-        ('TEXTCOLOR', (0, 0), (-1, -1), colors.white),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 12),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
-        ('TOPPADDING', (0, 0), (-1, -1), 10),
-    ]))
+    header_table.setStyle(SECTION_HEADER_STYLE)
     elements.append(header_table)
     elements.append(Spacer(1, 15))
     
@@ -527,15 +636,7 @@ def create_executive_summary(amc, project, styles, risk_data=None):
         [['SECTION - B: EXECUTIVE SUMMARY']],
         colWidths=[515]
     )
-    header_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, -1), PRIMARY_BLUE),
-        ('TEXTCOLOR', (0, 0), (-1, -1), colors.white),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 12),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
-        ('TOPPADDING', (0, 0), (-1, -1), 10),
-    ]))
+    header_table.setStyle(SECTION_HEADER_STYLE)
     elements.append(header_table)
     elements.append(Spacer(1, 15))
     
@@ -662,15 +763,7 @@ def create_document_details_section(amc, project, styles):
         [['SECTION - A: DOCUMENT DETAILS']],
         colWidths=[515]
     )
-    header_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, -1), PRIMARY_BLUE),
-        ('TEXTCOLOR', (0, 0), (-1, -1), colors.white),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 12),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
-        ('TOPPADDING', (0, 0), (-1, -1), 10),
-    ]))
+    header_table.setStyle(SECTION_HEADER_STYLE)
     elements.append(header_table)
     elements.append(Spacer(1, 15))
     
@@ -714,14 +807,7 @@ def create_document_details_section(amc, project, styles):
     email = customer_info.get('email') or (project.get('contact_email', '') if project else '')
     
     # Create paragraph style for wrapping text in cells
-    cell_wrap_style = ParagraphStyle(
-        'CellWrap',
-        fontSize=10,
-        fontName='Helvetica',
-        leading=12,
-        wordWrap='CJK',
-        splitLongWords=True,
-    )
+    cell_wrap_style = styles['CellWrap']
     
     customer_data = [
         ['CUSTOMER NAME', Paragraph(customer_name, cell_wrap_style)],
@@ -792,15 +878,7 @@ def create_scope_of_work_section(amc, styles):
         [['SECTION - C: SCOPE & OBJECTIVE OF AMC']],
         colWidths=[515]
     )
-    header_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, -1), PRIMARY_BLUE),
-        ('TEXTCOLOR', (0, 0), (-1, -1), colors.white),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 12),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
-        ('TOPPADDING', (0, 0), (-1, -1), 10),
-    ]))
+    header_table.setStyle(SECTION_HEADER_STYLE)
     elements.append(header_table)
     elements.append(Spacer(1, 15))
     
@@ -871,15 +949,7 @@ def create_equipment_list_section(amc, styles):
         [['SECTION - D: AMC EQUIPMENT LIST']],
         colWidths=[515]
     )
-    header_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, -1), PRIMARY_BLUE),
-        ('TEXTCOLOR', (0, 0), (-1, -1), colors.white),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 12),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
-        ('TOPPADDING', (0, 0), (-1, -1), 10),
-    ]))
+    header_table.setStyle(SECTION_HEADER_STYLE)
     elements.append(header_table)
     elements.append(Spacer(1, 15))
     
@@ -930,15 +1000,7 @@ def create_spare_consumables_section(amc, styles):
         [['SECTION - F: SPARE & CONSUMABLES USED']],
         colWidths=[515]
     )
-    header_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, -1), PRIMARY_BLUE),
-        ('TEXTCOLOR', (0, 0), (-1, -1), colors.white),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 12),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
-        ('TOPPADDING', (0, 0), (-1, -1), 10),
-    ]))
+    header_table.setStyle(SECTION_HEADER_STYLE)
     elements.append(header_table)
     elements.append(Spacer(1, 15))
     
@@ -953,21 +1015,8 @@ def create_spare_consumables_section(amc, styles):
     
     if spare_parts:
         # Create paragraph style for wrapping text in cells
-        cell_wrap_style = ParagraphStyle(
-            'SpareWrap',
-            fontSize=9,
-            fontName='Helvetica',
-            leading=11,
-            wordWrap='CJK',
-            splitLongWords=True,
-        )
-        cell_center_style = ParagraphStyle(
-            'SpareCenter',
-            fontSize=9,
-            fontName='Helvetica',
-            leading=11,
-            alignment=TA_CENTER,
-        )
+        cell_wrap_style = styles['SpareWrap']
+        cell_center_style = styles['SpareCenter']
         
         spare_data = [['S.No', 'ITEM DESCRIPTION', 'PART NO.', 'QTY', 'UNIT', 'REMARKS']]
         
@@ -1035,15 +1084,7 @@ def create_service_visits_section(amc, styles):
         [['SECTION - E: SERVICE SCHEDULE & VISITS']],
         colWidths=[515]
     )
-    header_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, -1), PRIMARY_BLUE),
-        ('TEXTCOLOR', (0, 0), (-1, -1), colors.white),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 12),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
-        ('TOPPADDING', (0, 0), (-1, -1), 10),
-    ]))
+    header_table.setStyle(SECTION_HEADER_STYLE)
     elements.append(header_table)
     elements.append(Spacer(1, 15))
     
@@ -1051,21 +1092,8 @@ def create_service_visits_section(amc, styles):
     
     if service_visits:
         # Create paragraph style for wrapping text in cells
-        cell_wrap_style = ParagraphStyle(
-            'CellWrapSmall',
-            fontSize=8,
-            fontName='Helvetica',
-            leading=10,
-            wordWrap='CJK',
-            splitLongWords=True,
-        )
-        cell_center_style = ParagraphStyle(
-            'CellCenterSmall',
-            fontSize=8,
-            fontName='Helvetica',
-            leading=10,
-            alignment=TA_CENTER,
-        )
+        cell_wrap_style = styles['CellWrapSmall']
+        cell_center_style = styles['CellCenterSmall']
         
         sv_data = [['S.No', 'VISIT DATE', 'VISIT TYPE', 'STATUS', 'TECHNICIAN', 'EQUIPMENT', 'REMARKS']]
         
@@ -1115,15 +1143,7 @@ def create_test_reports_section(amc, test_reports, styles, has_ir_reports=False)
         [[f'SECTION - {section_letter}: EQUIPMENT TEST REPORTS']],
         colWidths=[515]
     )
-    header_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, -1), PRIMARY_BLUE),
-        ('TEXTCOLOR', (0, 0), (-1, -1), colors.white),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 12),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
-        ('TOPPADDING', (0, 0), (-1, -1), 10),
-    ]))
+    header_table.setStyle(SECTION_HEADER_STYLE)
     elements.append(header_table)
     elements.append(Spacer(1, 15))
     
@@ -1160,7 +1180,7 @@ def create_test_reports_section(amc, test_reports, styles, has_ir_reports=False)
         elements.append(report_table)
         elements.append(Spacer(1, 15))
         elements.append(Paragraph("<i>Note: Detailed test reports are attached as separate documents in the annexure.</i>", 
-            ParagraphStyle('Note', fontSize=9, textColor=colors.gray, fontName='Helvetica-Oblique')))
+            styles['Note']))
     else:
         elements.append(Paragraph("No equipment test reports linked to this AMC.", styles['AMCBodyText']))
     
@@ -1177,15 +1197,7 @@ def create_ir_thermography_section(amc, ir_reports, styles):
         [['SECTION - G: IR THERMOGRAPHY REPORTS']],
         colWidths=[515]
     )
-    header_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, -1), PRIMARY_BLUE),
-        ('TEXTCOLOR', (0, 0), (-1, -1), colors.white),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 12),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
-        ('TOPPADDING', (0, 0), (-1, -1), 10),
-    ]))
+    header_table.setStyle(SECTION_HEADER_STYLE)
     elements.append(header_table)
     elements.append(Spacer(1, 15))
     
@@ -1211,24 +1223,14 @@ def create_ir_thermography_section(amc, ir_reports, styles):
             ])
         
         ir_table = Table(ir_data, colWidths=[35, 120, 100, 100, 160])
-        ir_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), PRIMARY_BLUE),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-            ('GRID', (0, 0), (-1, -1), 0.5, BORDER_COLOR),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 9),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-            ('TOPPADDING', (0, 0), (-1, -1), 6),
-        ]))
+        ir_table.setStyle(BLUE_HEADER_ROW_GRID_STYLE)
         elements.append(ir_table)
         elements.append(Spacer(1, 15))
         elements.append(Paragraph("<i>C=Critical, W=Warning, CM=Check & Monitor, N=Normal</i>", 
-            ParagraphStyle('Note', fontSize=8, textColor=colors.gray, fontName='Helvetica-Oblique')))
+            styles['NoteSmall']))
         elements.append(Spacer(1, 10))
         elements.append(Paragraph("<i>Note: Detailed IR Thermography reports are attached as separate documents in the annexure.</i>", 
-            ParagraphStyle('Note', fontSize=9, textColor=colors.gray, fontName='Helvetica-Oblique')))
+            styles['Note']))
     else:
         elements.append(Paragraph("No IR thermography reports linked to this AMC.", styles['AMCBodyText']))
     
@@ -1245,15 +1247,7 @@ def create_service_reports_section(amc, service_reports, styles):
         [['SECTION - I: SERVICE REPORTS']],
         colWidths=[515]
     )
-    header_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, -1), PRIMARY_BLUE),
-        ('TEXTCOLOR', (0, 0), (-1, -1), colors.white),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 12),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
-        ('TOPPADDING', (0, 0), (-1, -1), 10),
-    ]))
+    header_table.setStyle(SECTION_HEADER_STYLE)
     elements.append(header_table)
     elements.append(Spacer(1, 15))
     
@@ -1262,20 +1256,8 @@ def create_service_reports_section(amc, service_reports, styles):
         elements.append(Spacer(1, 10))
         
         # Cell style for wrapping text
-        cell_style = ParagraphStyle(
-            'TableCellWrap',
-            fontSize=9,
-            fontName='Helvetica',
-            leading=11,
-            wordWrap='CJK'
-        )
-        cell_style_center = ParagraphStyle(
-            'TableCellCenter',
-            fontSize=9,
-            fontName='Helvetica',
-            leading=11,
-            alignment=TA_CENTER
-        )
+        cell_style = styles['TableCellWrap']
+        cell_style_center = styles['TableCellCenter']
         
         # Updated headers for service_requests collection
         report_data = [['S.No', 'SRN NO', 'CATEGORY', 'CUSTOMER/SITE', 'SERVICE DATE', 'STATUS']]
@@ -1313,7 +1295,7 @@ def create_service_reports_section(amc, service_reports, styles):
         elements.append(report_table)
         elements.append(Spacer(1, 15))
         elements.append(Paragraph("<i>Note: Detailed service reports are attached in the annexure section.</i>", 
-            ParagraphStyle('Note', fontSize=9, textColor=colors.gray, fontName='Helvetica-Oblique')))
+            styles['Note']))
     else:
         elements.append(Paragraph("No service reports linked to this AMC.", styles['AMCBodyText']))
     
@@ -1333,15 +1315,7 @@ def create_statutory_documents_section(amc, styles, has_ir_reports=False):
         [[f'SECTION - {section_letter}: STATUTORY DOCUMENTS & ATTACHMENTS']],
         colWidths=[515]
     )
-    header_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, -1), PRIMARY_BLUE),
-        ('TEXTCOLOR', (0, 0), (-1, -1), colors.white),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 12),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
-        ('TOPPADDING', (0, 0), (-1, -1), 10),
-    ]))
+    header_table.setStyle(SECTION_HEADER_STYLE)
     elements.append(header_table)
     elements.append(Spacer(1, 15))
     
@@ -1385,22 +1359,12 @@ def create_statutory_documents_section(amc, styles, has_ir_reports=False):
             ])
         
         doc_table = Table(doc_data, colWidths=[35, 150, 200, 130])
-        doc_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), PRIMARY_BLUE),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-            ('GRID', (0, 0), (-1, -1), 0.5, BORDER_COLOR),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 9),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-            ('TOPPADDING', (0, 0), (-1, -1), 6),
-        ]))
+        doc_table.setStyle(BLUE_HEADER_ROW_GRID_STYLE)
         elements.append(doc_table)
         elements.append(Spacer(1, 15))
         elements.append(Paragraph(
             "<i>Note: Detailed statutory documents and calibration certificates are attached at the end of this report.</i>",
-            ParagraphStyle('Note', fontSize=9, textColor=colors.gray, fontName='Helvetica-Oblique')
+            styles['Note']
         ))
     else:
         # No documents attached
@@ -1440,22 +1404,20 @@ def create_back_cover(styles):
     company_info = get_pdf_company_info()
     company_name = get_pdf_company_name()
     website = get_pdf_website()
-    logo_path = get_pdf_logo_path()
+    logo = get_pdf_logo()
     primary_orange = get_pdf_primary_color()
     
     elements.append(Spacer(1, 180))
     
     # Company Logo (if enabled)
-    if back_settings.get('show_logo', True) and logo_path:
+    if back_settings.get('show_logo', True) and logo:
         try:
-            if os.path.exists(logo_path):
-                logo = Image(logo_path, width=200, height=80)
-                logo_table = Table([[logo]], colWidths=[515])
-                logo_table.setStyle(TableStyle([
-                    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ]))
-                elements.append(logo_table)
-                elements.append(Spacer(1, 40))
+            logo_table = Table([[logo.image(200, 80)]], colWidths=[515])
+            logo_table.setStyle(TableStyle([
+                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ]))
+            elements.append(logo_table)
+            elements.append(Spacer(1, 40))
         except Exception as e:
             pass
     
@@ -1563,108 +1525,8 @@ def create_back_cover(styles):
     return elements
 
 
-async def generate_amc_report_pdf(amc_id: str):
-    """Generate complete AMC report PDF with enhanced formatting and attached reports"""
-    from PyPDF2 import PdfReader, PdfWriter
-    
-    db = get_db()
-    
-    # Get AMC data
-    amc = await db.amcs.find_one({"id": amc_id}, {"_id": 0})
-    if not amc:
-        raise HTTPException(status_code=404, detail="AMC not found")
-    
-    # Get project data
-    project = await db.projects.find_one({"id": amc.get("project_id")}, {"_id": 0})
-    
-    # Get organization settings
-    org_settings = await db.settings.find_one({"type": "organization"}, {"_id": 0})
-    if org_settings:
-        org_settings = org_settings.get("settings", {})
-    
-    # Get linked test reports
-    report_ids = []
-    ir_report_ids = []
-    service_report_ids = []
-    for visit in amc.get("service_visits", []):
-        report_ids.extend(visit.get("test_report_ids", []))
-        ir_report_ids.extend(visit.get("ir_thermography_report_ids", []))
-        service_report_ids.extend(visit.get("service_report_ids", []))
-    
-    # Build equipment type order from equipment_list for sorting
-    equipment_order = {}
-    for idx, eq in enumerate(amc.get("equipment_list", [])):
-        eq_type = eq.get("equipment_type", "").lower()
-        if eq_type and eq_type not in equipment_order:
-            equipment_order[eq_type] = idx
-    
-    def sort_reports_by_equipment(reports):
-        """Sort reports by equipment_list order, then by report_no"""
-        def sort_key(report):
-            eq_type = report.get("equipment_type", "").lower()
-            order = equipment_order.get(eq_type, 999)
-            report_no = report.get("report_no", "")
-            return (order, report_no)
-        return sorted(reports, key=sort_key)
-    
-    test_reports = []
-    if report_ids:
-        test_reports = await db.test_reports.find(
-            {"id": {"$in": list(set(report_ids))}},
-            {"_id": 0}
-        ).to_list(100)
-        test_reports = sort_reports_by_equipment(test_reports)
-    
-    # Fallback: If no linked reports found but project exists, try to get reports by project_id
-    if not test_reports and project:
-        project_id = project.get('id')
-        if project_id:
-            test_reports = await db.test_reports.find(
-                {"project_id": project_id, "equipment_type": {"$ne": "ir-thermography"}},
-                {"_id": 0}
-            ).to_list(50)
-            test_reports = sort_reports_by_equipment(test_reports)
-    
-    ir_reports = []
-    if ir_report_ids:
-        # First try test_reports collection (where IR thermography reports may be stored)
-        ir_reports = await db.test_reports.find(
-            {"id": {"$in": list(set(ir_report_ids))}},
-            {"_id": 0}
-        ).to_list(100)
-        
-        # If not found, try ir_thermography_reports collection
-        if not ir_reports:
-            ir_reports = await db.ir_thermography_reports.find(
-                {"id": {"$in": list(set(ir_report_ids))}},
-                {"_id": 0}
-            ).to_list(100)
-    
-    # Fallback: If no IR reports found but project exists, get IR reports by project_id
-    if not ir_reports and project:
-        project_id = project.get('id')
-        if project_id:
-            # Try test_reports with ir-thermography type
-            ir_reports = await db.test_reports.find(
-                {"project_id": project_id, "equipment_type": "ir-thermography"},
-                {"_id": 0}
-            ).to_list(50)
-            
-            # Also try dedicated ir_thermography_reports collection
-            if not ir_reports:
-                ir_reports = await db.ir_thermography_reports.find(
-                    {"project_id": project_id},
-                    {"_id": 0}
-                ).to_list(50)
-    
-    # Get service reports from service_requests collection (Electrical, HVAC, Fire Protection, etc.)
-    service_reports = []
-    if service_report_ids:
-        service_reports = await db.service_requests.find(
-            {"id": {"$in": list(set(service_report_ids))}},
-            {"_id": 0}
-        ).to_list(100)
-    
+def render_amc_main_pdf(amc, project, org_settings, ir_reports, test_reports, service_reports):
+    """Render the main AMC report (cover, sections A-I) without annexures; returns a BytesIO"""
     # Calculate risk data from IR reports
     risk_data = None
     if ir_reports:
@@ -1753,6 +1615,263 @@ async def generate_amc_report_pdf(amc_id: str):
     # Build PDF
     doc.build(elements, onFirstPage=on_page, onLaterPages=on_page_later)
     buffer.seek(0)
+    return buffer
+
+
+def append_amc_closing_pages(writer, amc, styles, has_ir_reports, annexure_num):
+    """Append the statutory documents section, uploaded statutory PDFs and back cover to `writer`"""
+    from PyPDF2 import PdfReader
+
+    sep_header = styles['SeparatorHeader']
+    sep_title = styles['SeparatorTitle']
+    sep_subtitle = styles['SeparatorSubtitle']
+    
+    # FOURTH: Add Statutory Documents Section (the listing page) AFTER service reports
+    # This section lists all statutory documents before the actual PDFs are attached
+    statutory_docs = amc.get('statutory_documents', []) or []
+    annexure_docs = amc.get('annexure', []) or []
+    all_docs = annexure_docs + statutory_docs
+    docs_with_files = [doc for doc in statutory_docs if doc.get('file_url')]
+    
+    if all_docs or docs_with_files:
+        # Create the statutory documents section page
+        stat_section_buffer = BytesIO()
+        stat_section_doc = SimpleDocTemplate(
+            stat_section_buffer,
+            pagesize=A4,
+            rightMargin=40,
+            leftMargin=40,
+            topMargin=70,
+            bottomMargin=50
+        )
+        
+        stat_section_elements = []
+        
+        # Section letter depends on whether IR reports exist
+        section_letter = 'I' if has_ir_reports else 'H'
+        
+        # Section Header
+        stat_header = Table(
+            [[f'SECTION - {section_letter}: STATUTORY DOCUMENTS & ATTACHMENTS']],
+            colWidths=[515]
+        )
+        stat_header.setStyle(SECTION_HEADER_STYLE)
+        stat_section_elements.append(stat_header)
+        stat_section_elements.append(Spacer(1, 15))
+        
+        # Description
+        stat_section_elements.append(Paragraph(
+            "The following statutory documents, calibration certificates and attachments are linked to this AMC:",
+            styles['AMCBodyText']
+        ))
+        stat_section_elements.append(Spacer(1, 10))
+        
+        if all_docs:
+            # Create table listing the documents
+            doc_data = [['S.No', 'DOCUMENT TYPE', 'DOCUMENT NAME', 'REFERENCE NO.']]
+            
+            doc_type_labels = {
+                'calibration_certificate': 'Calibration Certificate',
+                'test_certificate': 'Test Certificate',
+                'compliance_certificate': 'Compliance Certificate',
+                'safety_certificate': 'Safety Certificate',
+                'warranty_document': 'Warranty Document',
+                'manufacturer_datasheet': 'Manufacturer Datasheet',
+                'installation_certificate': 'Installation Certificate',
+                'other': 'Other Document'
+            }
+            
+            for i, doc in enumerate(all_docs):
+                doc_type = doc.get('type', doc.get('document_type', 'other'))
+                doc_type_label = doc_type_labels.get(doc_type, doc_type.replace('_', ' ').title())
+                
+                doc_data.append([
+                    str(i + 1),
+                    doc_type_label,
+                    doc.get('name', doc.get('document_name', '-')),
+                    doc.get('reference', doc.get('reference_no', '-'))
+                ])
+            
+            doc_table = Table(doc_data, colWidths=[35, 150, 200, 130])
+            doc_table.setStyle(BLUE_HEADER_ROW_GRID_STYLE)
+            stat_section_elements.append(doc_table)
+        else:
+            stat_section_elements.append(Paragraph("No statutory documents attached.", styles['AMCBodyText']))
+        
+        stat_section_elements.append(Spacer(1, 15))
+        
+        if docs_with_files:
+            stat_section_elements.append(Paragraph(
+                f"<i>Note: {len(docs_with_files)} document(s) with uploaded files are attached in the following pages.</i>",
+                styles['Note']
+            ))
+        
+        stat_section_doc.build(stat_section_elements)
+        stat_section_buffer.seek(0)
+        stat_section_reader = PdfReader(stat_section_buffer)
+        for page in stat_section_reader.pages:
+            writer.add_page(page)
+    
+    # FOURTH: Attach actual Statutory Document PDFs (uploaded PDFs)
+    if docs_with_files:
+        # Create separator page for statutory documents annexure
+        separator_buffer_stat = BytesIO()
+        separator_doc_stat = SimpleDocTemplate(
+            separator_buffer_stat,
+            pagesize=A4,
+            rightMargin=40,
+            leftMargin=40,
+            topMargin=70,
+            bottomMargin=50
+        )
+        sep_elements_stat = []
+        sep_elements_stat.append(Spacer(1, 250))
+        sep_elements_stat.append(Paragraph(f"ANNEXURE - {annexure_num}", sep_header))
+        sep_elements_stat.append(Paragraph("Statutory Documents & Certificates", sep_title))
+        sep_elements_stat.append(Paragraph(f"The following {len(docs_with_files)} statutory document(s) are attached.", sep_subtitle))
+        
+        separator_doc_stat.build(sep_elements_stat)
+        separator_buffer_stat.seek(0)
+        sep_reader_stat = PdfReader(separator_buffer_stat)
+        for page in sep_reader_stat.pages:
+            writer.add_page(page)
+        
+        # Attach each uploaded statutory document PDF
+        UPLOADS_DIR = "/app/uploads"
+        for doc in docs_with_files:
+            try:
+                file_url = doc.get('file_url', '')
+                if file_url:
+                    # Extract file path from URL (e.g., /api/uploads/statutory_document/filename.pdf)
+                    # Handle both formats: /api/uploads/category/file or /uploads/file
+                    if file_url.startswith('/api/uploads/'):
+                        file_path = os.path.join(UPLOADS_DIR, file_url.replace('/api/uploads/', ''))
+                    elif file_url.startswith('/uploads/'):
+                        file_path = os.path.join(UPLOADS_DIR, file_url.replace('/uploads/', ''))
+                    else:
+                        file_path = os.path.join(UPLOADS_DIR, file_url)
+                    
+                    if os.path.exists(file_path) and file_path.lower().endswith('.pdf'):
+                        stat_pdf = PdfReader(file_path)
+                        for page in stat_pdf.pages:
+                            writer.add_page(page)
+                        print(f"Attached statutory document: {doc.get('document_name', file_url)}")
+                    else:
+                        print(f"Statutory document not found or not PDF: {file_path}")
+            except Exception as e:
+                print(f"Error attaching statutory document {doc.get('document_name', '')}: {e}")
+    
+    # LAST: Add Back Cover page (NO header/footer - like thermography report)
+    back_cover_buffer = BytesIO()
+    back_cover_doc = SimpleDocTemplate(
+        back_cover_buffer,
+        pagesize=A4,
+        rightMargin=40,
+        leftMargin=40,
+        topMargin=50,
+        bottomMargin=50
+    )
+    back_cover_elements = create_back_cover(styles)
+    back_cover_doc.build(back_cover_elements)
+    back_cover_buffer.seek(0)
+    back_cover_reader = PdfReader(back_cover_buffer)
+    for page in back_cover_reader.pages:
+        writer.add_page(page)
+
+
+async def generate_amc_report_pdf(amc_id: str):
+    """Generate complete AMC report PDF with enhanced formatting and attached reports"""
+    from PyPDF2 import PdfReader, PdfWriter
+    
+    db = get_db()
+    
+    # Get AMC data
+    amc = await db.amcs.find_one({"id": amc_id}, {"_id": 0})
+    if not amc:
+        raise HTTPException(status_code=404, detail="AMC not found")
+    
+    # Get project data
+    project = await db.projects.find_one({"id": amc.get("project_id")}, {"_id": 0})
+    
+    # Get organization settings
+    org_settings = await db.settings.find_one({"type": "organization"}, {"_id": 0})
+    if org_settings:
+        org_settings = org_settings.get("settings", {})
+    
+    # Get linked test reports
+    report_ids = []
+    ir_report_ids = []
+    service_report_ids = []
+    for visit in amc.get("service_visits", []):
+        report_ids.extend(visit.get("test_report_ids", []))
+        ir_report_ids.extend(visit.get("ir_thermography_report_ids", []))
+        service_report_ids.extend(visit.get("service_report_ids", []))
+    
+    # Build equipment type order from equipment_list for sorting
+    equipment_order = {}
+    for idx, eq in enumerate(amc.get("equipment_list", [])):
+        eq_type = eq.get("equipment_type", "").lower()
+        if eq_type and eq_type not in equipment_order:
+            equipment_order[eq_type] = idx
+    
+    def sort_reports_by_equipment(reports):
+        """Sort reports by equipment_list order, then by report_no"""
+        def sort_key(report):
+            eq_type = report.get("equipment_type", "").lower()
+            order = equipment_order.get(eq_type, 999)
+            report_no = report.get("report_no", "")
+            return (order, report_no)
+        return sorted(reports, key=sort_key)
+    
+    test_reports = []
+    if report_ids:
+        test_reports = await find_by_ids(db.test_reports, report_ids)
+        test_reports = sort_reports_by_equipment(test_reports)
+    
+    # Fallback: If no linked reports found but project exists, try to get reports by project_id
+    if not test_reports and project:
+        project_id = project.get('id')
+        if project_id:
+            test_reports = await db.test_reports.find(
+                {"project_id": project_id, "equipment_type": {"$ne": "ir-thermography"}},
+                {"_id": 0}
+            ).to_list(50)
+            test_reports = sort_reports_by_equipment(test_reports)
+    
+    ir_reports = []
+    if ir_report_ids:
+        # First try test_reports collection (where IR thermography reports may be stored)
+        ir_reports = await find_by_ids(db.test_reports, ir_report_ids)
+        
+        # If not found, try ir_thermography_reports collection
+        if not ir_reports:
+            ir_reports = await find_by_ids(db.ir_thermography_reports, ir_report_ids)
+    
+    # Fallback: If no IR reports found but project exists, get IR reports by project_id
+    if not ir_reports and project:
+        project_id = project.get('id')
+        if project_id:
+            # Try test_reports with ir-thermography type
+            ir_reports = await db.test_reports.find(
+                {"project_id": project_id, "equipment_type": "ir-thermography"},
+                {"_id": 0}
+            ).to_list(50)
+            
+            # Also try dedicated ir_thermography_reports collection
+            if not ir_reports:
+                ir_reports = await db.ir_thermography_reports.find(
+                    {"project_id": project_id},
+                    {"_id": 0}
+                ).to_list(50)
+    
+    # Get service reports from service_requests collection (Electrical, HVAC, Fire Protection, etc.)
+    service_reports = []
+    if service_report_ids:
+        service_reports = await find_by_ids(db.service_requests, service_report_ids)
+    
+    # Main report pages (cover and sections)
+    buffer = render_amc_main_pdf(amc, project, org_settings, ir_reports, test_reports, service_reports)
+    styles = get_amc_styles()
     
     # =====================================================
     # ATTACH ACTUAL REPORTS AND BACK COVER
@@ -1766,30 +1885,10 @@ async def generate_amc_report_pdf(amc_id: str):
         for page in main_reader.pages:
             writer.add_page(page)
         
-        # Define reusable styles for separator pages
-        sep_header = ParagraphStyle(
-            'SeparatorHeader',
-            fontSize=20,
-            fontName='Helvetica-Bold',
-            textColor=PRIMARY_BLUE,
-            alignment=TA_CENTER,
-            spaceAfter=20
-        )
-        sep_title = ParagraphStyle(
-            'SeparatorTitle',
-            fontSize=16,
-            fontName='Helvetica-Bold',
-            textColor=PRIMARY_BLUE,
-            alignment=TA_CENTER,
-            spaceAfter=30
-        )
-        sep_subtitle = ParagraphStyle(
-            'SeparatorSubtitle',
-            fontSize=11,
-            fontName='Helvetica',
-            textColor=TEXT_DARK,
-            alignment=TA_CENTER
-        )
+        # Reusable styles for separator pages
+        sep_header = styles['SeparatorHeader']
+        sep_title = styles['SeparatorTitle']
+        sep_subtitle = styles['SeparatorSubtitle']
         
         annexure_num = 1
         
@@ -1920,175 +2019,7 @@ async def generate_amc_report_pdf(amc_id: str):
             
             annexure_num += 1
         
-        # FOURTH: Add Statutory Documents Section (the listing page) AFTER service reports
-        # This section lists all statutory documents before the actual PDFs are attached
-        statutory_docs = amc.get('statutory_documents', []) or []
-        annexure_docs = amc.get('annexure', []) or []
-        all_docs = annexure_docs + statutory_docs
-        docs_with_files = [doc for doc in statutory_docs if doc.get('file_url')]
-        
-        if all_docs or docs_with_files:
-            # Create the statutory documents section page
-            stat_section_buffer = BytesIO()
-            stat_section_doc = SimpleDocTemplate(
-                stat_section_buffer,
-                pagesize=A4,
-                rightMargin=40,
-                leftMargin=40,
-                topMargin=70,
-                bottomMargin=50
-            )
-            
-            stat_section_elements = []
-            
-            # Section letter depends on whether IR reports exist
-            section_letter = 'I' if has_ir_reports else 'H'
-            
-            # Section Header
-            stat_header = Table(
-                [[f'SECTION - {section_letter}: STATUTORY DOCUMENTS & ATTACHMENTS']],
-                colWidths=[515]
-            )
-            stat_header.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, -1), PRIMARY_BLUE),
-                ('TEXTCOLOR', (0, 0), (-1, -1), colors.white),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, -1), 12),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
-                ('TOPPADDING', (0, 0), (-1, -1), 10),
-            ]))
-            stat_section_elements.append(stat_header)
-            stat_section_elements.append(Spacer(1, 15))
-            
-            # Description
-            stat_section_elements.append(Paragraph(
-                "The following statutory documents, calibration certificates and attachments are linked to this AMC:",
-                styles['AMCBodyText']
-            ))
-            stat_section_elements.append(Spacer(1, 10))
-            
-            if all_docs:
-                # Create table listing the documents
-                doc_data = [['S.No', 'DOCUMENT TYPE', 'DOCUMENT NAME', 'REFERENCE NO.']]
-                
-                doc_type_labels = {
-                    'calibration_certificate': 'Calibration Certificate',
-                    'test_certificate': 'Test Certificate',
-                    'compliance_certificate': 'Compliance Certificate',
-                    'safety_certificate': 'Safety Certificate',
-                    'warranty_document': 'Warranty Document',
-                    'manufacturer_datasheet': 'Manufacturer Datasheet',
-                    'installation_certificate': 'Installation Certificate',
-                    'other': 'Other Document'
-                }
-                
-                for i, doc in enumerate(all_docs):
-                    doc_type = doc.get('type', doc.get('document_type', 'other'))
-                    doc_type_label = doc_type_labels.get(doc_type, doc_type.replace('_', ' ').title())
-                    
-                    doc_data.append([
-                        str(i + 1),
-                        doc_type_label,
-                        doc.get('name', doc.get('document_name', '-')),
-                        doc.get('reference', doc.get('reference_no', '-'))
-                    ])
-                
-                doc_table = Table(doc_data, colWidths=[35, 150, 200, 130])
-                doc_table.setStyle(TableStyle([
-                    ('BACKGROUND', (0, 0), (-1, 0), PRIMARY_BLUE),
-                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-                    ('GRID', (0, 0), (-1, -1), 0.5, BORDER_COLOR),
-                    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                    ('FONTSIZE', (0, 0), (-1, -1), 9),
-                    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                    ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-                    ('TOPPADDING', (0, 0), (-1, -1), 6),
-                ]))
-                stat_section_elements.append(doc_table)
-            else:
-                stat_section_elements.append(Paragraph("No statutory documents attached.", styles['AMCBodyText']))
-            
-            stat_section_elements.append(Spacer(1, 15))
-            
-            if docs_with_files:
-                stat_section_elements.append(Paragraph(
-                    f"<i>Note: {len(docs_with_files)} document(s) with uploaded files are attached in the following pages.</i>",
-                    ParagraphStyle('Note', fontSize=9, textColor=colors.gray, fontName='Helvetica-Oblique')
-                ))
-            
-            stat_section_doc.build(stat_section_elements)
-            stat_section_buffer.seek(0)
-            stat_section_reader = PdfReader(stat_section_buffer)
-            for page in stat_section_reader.pages:
-                writer.add_page(page)
-        
-        # FOURTH: Attach actual Statutory Document PDFs (uploaded PDFs)
-        if docs_with_files:
-            # Create separator page for statutory documents annexure
-            separator_buffer_stat = BytesIO()
-            separator_doc_stat = SimpleDocTemplate(
-                separator_buffer_stat,
-                pagesize=A4,
-                rightMargin=40,
-                leftMargin=40,
-                topMargin=70,
-                bottomMargin=50
-            )
-            sep_elements_stat = []
-            sep_elements_stat.append(Spacer(1, 250))
-            sep_elements_stat.append(Paragraph(f"ANNEXURE - {annexure_num}", sep_header))
-            sep_elements_stat.append(Paragraph("Statutory Documents & Certificates", sep_title))
-            sep_elements_stat.append(Paragraph(f"The following {len(docs_with_files)} statutory document(s) are attached.", sep_subtitle))
-            
-            separator_doc_stat.build(sep_elements_stat)
-            separator_buffer_stat.seek(0)
-            sep_reader_stat = PdfReader(separator_buffer_stat)
-            for page in sep_reader_stat.pages:
-                writer.add_page(page)
-            
-            # Attach each uploaded statutory document PDF
-            UPLOADS_DIR = "/app/uploads"
-            for doc in docs_with_files:
-                try:
-                    file_url = doc.get('file_url', '')
-                    if file_url:
-                        # Extract file path from URL (e.g., /api/uploads/statutory_document/filename.pdf)
-                        # Handle both formats: /api/uploads/category/file or /uploads/file
-                        if file_url.startswith('/api/uploads/'):
-                            file_path = os.path.join(UPLOADS_DIR, file_url.replace('/api/uploads/', ''))
-                        elif file_url.startswith('/uploads/'):
-                            file_path = os.path.join(UPLOADS_DIR, file_url.replace('/uploads/', ''))
-                        else:
-                            file_path = os.path.join(UPLOADS_DIR, file_url)
-                        
-                        if os.path.exists(file_path) and file_path.lower().endswith('.pdf'):
-                            stat_pdf = PdfReader(file_path)
-                            for page in stat_pdf.pages:
-                                writer.add_page(page)
-                            print(f"Attached statutory document: {doc.get('document_name', file_url)}")
-                        else:
-                            print(f"Statutory document not found or not PDF: {file_path}")
-                except Exception as e:
-                    print(f"Error attaching statutory document {doc.get('document_name', '')}: {e}")
-        
-        # LAST: Add Back Cover page (NO header/footer - like thermography report)
-        back_cover_buffer = BytesIO()
-        back_cover_doc = SimpleDocTemplate(
-            back_cover_buffer,
-            pagesize=A4,
-            rightMargin=40,
-            leftMargin=40,
-            topMargin=50,
-            bottomMargin=50
-        )
-        back_cover_elements = create_back_cover(styles)
-        back_cover_doc.build(back_cover_elements)
-        back_cover_buffer.seek(0)
-        back_cover_reader = PdfReader(back_cover_buffer)
-        for page in back_cover_reader.pages:
-            writer.add_page(page)
+        append_amc_closing_pages(writer, amc, styles, bool(ir_reports), annexure_num)
         
         # Write combined PDF
         output_buffer = BytesIO()
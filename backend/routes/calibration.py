@@ -10,6 +10,7 @@ import uuid
 
 # Import caching utilities
 from utils.cache import cache, CacheTTL
+from utils.due_items import due_within, refresh_due_items
 
 router = APIRouter()
 
@@ -310,6 +311,7 @@ async def create_calibration_contract(contract_data: CalibrationContractCreate):
     }
     
     await db.calibration_contracts.insert_one(contract_doc)
+    await refresh_due_items(db, "calibration", [contract_id])
     
     # Invalidate cache
     await cache.invalidate_pattern("calibration:*")
@@ -368,6 +370,7 @@ async def update_calibration_contract(contract_id: str, contract_data: Calibrati
         {"id": contract_id},
         {"$set": update_data}
     )
+    await refresh_due_items(db, "calibration", [contract_id])
     
     # Invalidate cache
     await cache.invalidate_pattern("calibration:*")
@@ -384,6 +387,7 @@ async def delete_calibration_contract(contract_id: str):
     result = await db.calibration_contracts.delete_one({"id": contract_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Calibration contract not found")
+    await refresh_due_items(db, "calibration", [contract_id])
     
     # Invalidate cache
     await cache.invalidate_pattern("calibration:*")
@@ -411,6 +415,7 @@ async def add_calibration_visit(contract_id: str, visit: CalibrationVisit):
             "$set": {"updated_at": datetime.now(timezone.utc).isoformat()}
         }
     )
+    await refresh_due_items(db, "calibration", [contract_id])
     
     # Invalidate cache
     await cache.invalidate_pattern("calibration:*")
@@ -437,6 +442,7 @@ async def update_calibration_visit(contract_id: str, visit_id: str, visit_data:
     
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Contract or visit not found")
+    await refresh_due_items(db, "calibration", [contract_id])
     
     # Invalidate cache
     await cache.invalidate_pattern("calibration:*")
@@ -446,40 +452,28 @@ async def update_calibration_visit(contract_id: str, visit_id: str, visit_data:
 
 @router.get("/{contract_id}/due-meters")
 async def get_due_meters(contract_id: str, days_ahead: int = 30):
-    """Get meters due for calibration within specified days"""
+    """Get meters due for calibration within specified days (latest certificate per meter)"""
     db = get_db()
     
     contract = await db.calibration_contracts.find_one(
-        {"id": contract_id}, {"_id": 0}
+        {"id": contract_id}, {"_id": 0, "id": 1}
     )
     if not contract:
         raise HTTPException(status_code=404, detail="Contract not found")
     
-    today = datetime.now()
-    future_date = today + timedelta(days=days_ahead)
-    
-    due_meters = []
-    
-    for visit in contract.get("calibration_visits", []):
-        for result in visit.get("test_results", []):
-            next_due = result.get("next_due_date", "")
-            if next_due:
-                try:
-                    due_date = datetime.strptime(next_due, "%Y-%m-%d")
-                    if due_date <= future_date:
-                        due_meters.append({
-                            "meter_id": result.get("meter_id"),
-                            "meter_type": result.get("meter_type"),
-                            "certificate_no": result.get("certificate_no"),
-                            "last_calibration": result.get("calibration_date"),
-                            "next_due_date": next_due,
-                            "days_remaining": (due_date - today).days
-                        })
-                except ValueError:
-                    pass
-    
-    # Sort by days remaining
-    due_meters.sort(key=lambda x: x.get("days_remaining", 999))
+    due = await due_within(db, days_ahead, kinds=["calibration"], source_id=contract_id, limit=1000)
+    
+    due_meters = [
+        {
+            "meter_id": item["detail"].get("meter_id"),
+            "meter_type": item["detail"].get("meter_type"),
+            "certificate_no": item["detail"].get("certificate_no"),
+            "last_calibration": item.get("last_done"),
+            "next_due_date": item["due_on"],
+            "days_remaining": item["days_remaining"]
+        }
+        for item in due["items"]
+    ]
     
     return {
         "contract_id": contract_id,
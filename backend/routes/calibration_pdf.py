@@ -8,7 +8,7 @@ from reportlab.lib.pagesizes import A4
 from reportlab.lib import colors
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import mm
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image, PageBreak
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT, TA_JUSTIFY
 from PyPDF2 import PdfReader, PdfWriter
 from io import BytesIO
@@ -19,7 +19,7 @@ import os
 from routes.pdf_base import (
     format_date_ddmmyyyy,
     get_template_settings,
-    get_pdf_logo_path,
+    get_pdf_logo,
     get_pdf_primary_color,
     get_pdf_company_name,
     get_pdf_website,
@@ -30,6 +30,8 @@ from routes.pdf_base import (
     is_back_cover_enabled,
     get_pdf_company_info
 )
+from routes.pdf_assets import registry as pdf_assets
+from routes.pdf_styles import memoized_styles
 
 router = APIRouter()
 
@@ -42,6 +44,44 @@ BORDER_COLOR = colors.HexColor('#e2e8f0')
 SUCCESS_GREEN = colors.HexColor('#22c55e')
 ERROR_RED = colors.HexColor('#ef4444')
 
+# Shared TableStyle templates. A TableStyle is only read when applied to a
+# table, so one instance serves every table and every render.
+
+# Full-width blue section banner
+SECTION_HEADER_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, -1), PRIMARY_BLUE),
+    ('TEXTCOLOR', (0, 0), (-1, -1), colors.white),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 12),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
+    ('TOPPADDING', (0, 0), (-1, -1), 10),
+])
+
+# Label/value pairs: columns 0 and 2 are bold grey labels
+LABEL_COLUMNS_GRID_STYLE = TableStyle([
+    ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+    ('FONTNAME', (2, 0), (2, -1), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 9),
+    ('GRID', (0, 0), (-1, -1), 0.5, BORDER_COLOR),
+    ('BACKGROUND', (0, 0), (0, -1), LIGHT_GRAY),
+    ('BACKGROUND', (2, 0), (2, -1), LIGHT_GRAY),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('TOPPADDING', (0, 0), (-1, -1), 5),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 5),
+])
+
+# Two-column label/value table
+LABEL_COLUMN_GRID_STYLE = TableStyle([
+    ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 10),
+    ('GRID', (0, 0), (-1, -1), 0.5, BORDER_COLOR),
+    ('BACKGROUND', (0, 0), (0, -1), LIGHT_GRAY),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('TOPPADDING', (0, 0), (-1, -1), 8),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+])
+
 # Meter type labels
 METER_TYPES = {
     'energy_meter': 'Energy Meter',
@@ -81,6 +121,7 @@ def format_date_ddmmyyyy(date_str):
         return date_str
 
 
+@memoized_styles
 def get_styles():
     """Get custom styles for the PDF"""
     styles = getSampleStyleSheet()
@@ -154,11 +195,10 @@ def create_certificate_header(contract, styles, certificate_no=""):
     elements = []
     
     # Logo
-    logo_path = "/app/frontend/public/logo.png"
-    if os.path.exists(logo_path):
+    logo = pdf_assets.file("/app/frontend/public/logo.png")
+    if logo:
         try:
-            logo = Image(logo_path, width=60, height=40)
-            elements.append(logo)
+            elements.append(logo.image(60, 40))
         except Exception:
             pass
     
@@ -213,17 +253,7 @@ def create_customer_section(contract, styles):
     ]
     
     table = Table(data, colWidths=[90, 160, 80, 155])
-    table.setStyle(TableStyle([
-        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-        ('FONTNAME', (2, 0), (2, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 9),
-        ('GRID', (0, 0), (-1, -1), 0.5, BORDER_COLOR),
-        ('BACKGROUND', (0, 0), (0, -1), LIGHT_GRAY),
-        ('BACKGROUND', (2, 0), (2, -1), LIGHT_GRAY),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('TOPPADDING', (0, 0), (-1, -1), 5),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 5),
-    ]))
+    table.setStyle(LABEL_COLUMNS_GRID_STYLE)
     elements.append(table)
     elements.append(Spacer(1, 15))
     
@@ -245,17 +275,7 @@ def create_meter_details_section(meter, styles):
     ]
     
     table = Table(data, colWidths=[80, 165, 80, 160])
-    table.setStyle(TableStyle([
-        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-        ('FONTNAME', (2, 0), (2, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 9),
-        ('GRID', (0, 0), (-1, -1), 0.5, BORDER_COLOR),
-        ('BACKGROUND', (0, 0), (0, -1), LIGHT_GRAY),
-        ('BACKGROUND', (2, 0), (2, -1), LIGHT_GRAY),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('TOPPADDING', (0, 0), (-1, -1), 5),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 5),
-    ]))
+    table.setStyle(LABEL_COLUMNS_GRID_STYLE)
     elements.append(table)
     elements.append(Spacer(1, 15))
     
@@ -277,17 +297,7 @@ def create_calibration_results_section(test_result, styles):
     ]
     
     info_table = Table(info_data, colWidths=[100, 145, 100, 140])
-    info_table.setStyle(TableStyle([
-        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-        ('FONTNAME', (2, 0), (2, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 9),
-        ('GRID', (0, 0), (-1, -1), 0.5, BORDER_COLOR),
-        ('BACKGROUND', (0, 0), (0, -1), LIGHT_GRAY),
-        ('BACKGROUND', (2, 0), (2, -1), LIGHT_GRAY),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('TOPPADDING', (0, 0), (-1, -1), 5),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 5),
-    ]))
+    info_table.setStyle(LABEL_COLUMNS_GRID_STYLE)
     elements.append(info_table)
     elements.append(Spacer(1, 10))
     
@@ -519,7 +529,7 @@ def draw_calibration_cover_page(c, width, height, contract, project, org_setting
     # Get template settings
     cover_settings = get_cover_page_settings()
     company_info = get_pdf_company_info()
-    logo_path = get_pdf_logo_path()
+    logo = get_pdf_logo()
     company_name = get_pdf_company_name()
     website = get_pdf_website()
     
@@ -546,15 +556,14 @@ def draw_calibration_cover_page(c, width, height, contract, project, org_setting
     # =====================================================
     # COMPANY LOGO - Top Left (if enabled)
     # =====================================================
-    if cover_settings.get('show_logo', True) and logo_path:
+    if cover_settings.get('show_logo', True) and logo:
         c.saveState()
         
-        if os.path.exists(logo_path):
-            try:
-                c.drawImage(logo_path, 35, height - 90, width=180, height=60, 
-                           preserveAspectRatio=True, mask='auto')
-            except Exception as e:
-                print(f"Error drawing cover logo: {e}")
+        try:
+            c.drawImage(logo.scaled(180, 60), 35, height - 90, width=180, height=60, 
+                       preserveAspectRatio=True, mask='auto')
+        except Exception as e:
+            print(f"Error drawing cover logo: {e}")
         
         c.restoreState()
     
@@ -712,7 +721,7 @@ def draw_calibration_header_footer(canvas_obj, doc, contract, page_num):
     # Get template settings
     hf_settings = get_header_footer_settings()
     primary_orange = get_pdf_primary_color()
-    logo_path = get_pdf_logo_path()
+    logo = get_pdf_logo()
     company_name = get_pdf_company_name()
     website = get_pdf_website()
     
@@ -740,15 +749,14 @@ def draw_calibration_header_footer(canvas_obj, doc, contract, page_num):
     header_y = height - 30
     
     # Draw logo on right side - properly aligned (if enabled)
-    if hf_settings.get('show_header_logo', True) and logo_path:
+    if hf_settings.get('show_header_logo', True) and logo:
         logo_width = 100
         logo_height = 35
-        if os.path.exists(logo_path):
-            try:
-                c.drawImage(logo_path, width - margin - logo_width, header_y - 20, 
-                           width=logo_width, height=logo_height, preserveAspectRatio=True, mask='auto')
-            except Exception as e:
-                print(f"Error drawing logo: {e}")
+        try:
+            c.drawImage(logo.scaled(logo_width, logo_height), width - margin - logo_width, header_y - 20, 
+                       width=logo_width, height=logo_height, preserveAspectRatio=True, mask='auto')
+        except Exception as e:
+            print(f"Error drawing logo: {e}")
     
     # Report title on left - aligned with logo (like AMC)
     # HEADER section (if enabled)
@@ -807,15 +815,7 @@ def create_calibration_toc(contract, styles, test_reports_count=0):
         [['CONTENTS']],
         colWidths=[515]
     )
-    header_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, -1), PRIMARY_BLUE),
-        ('TEXTCOLOR', (0, 0), (-1, -1), colors.white),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 12),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
-        ('TOPPADDING', (0, 0), (-1, -1), 10),
-    ]))
+    header_table.setStyle(SECTION_HEADER_STYLE)
     elements.append(header_table)
     elements.append(Spacer(1, 15))
     
@@ -867,15 +867,7 @@ def create_calibration_executive_summary(contract, project, styles):
     elements = []
     
     header = Table([['SECTION - A: EXECUTIVE SUMMARY']], colWidths=[515])
-    header.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, -1), PRIMARY_BLUE),
-        ('TEXTCOLOR', (0, 0), (-1, -1), colors.white),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 12),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
-        ('TOPPADDING', (0, 0), (-1, -1), 10),
-    ]))
+    header.setStyle(SECTION_HEADER_STYLE)
     elements.append(header)
     elements.append(Spacer(1, 15))
     
@@ -925,15 +917,7 @@ def create_calibration_contract_details(contract, styles):
     elements = []
     
     header = Table([['SECTION - B: CONTRACT DETAILS']], colWidths=[515])
-    header.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, -1), PRIMARY_BLUE),
-        ('TEXTCOLOR', (0, 0), (-1, -1), colors.white),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 12),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
-        ('TOPPADDING', (0, 0), (-1, -1), 10),
-    ]))
+    header.setStyle(SECTION_HEADER_STYLE)
     elements.append(header)
     elements.append(Spacer(1, 15))
     
@@ -949,15 +933,7 @@ def create_calibration_contract_details(contract, styles):
     ]
     
     details_table = Table(details_data, colWidths=[180, 335])
-    details_table.setStyle(TableStyle([
-        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('GRID', (0, 0), (-1, -1), 0.5, BORDER_COLOR),
-        ('BACKGROUND', (0, 0), (0, -1), LIGHT_GRAY),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('TOPPADDING', (0, 0), (-1, -1), 8),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-    ]))
+    details_table.setStyle(LABEL_COLUMN_GRID_STYLE)
     elements.append(details_table)
     elements.append(PageBreak())
     
@@ -969,15 +945,7 @@ def create_calibration_customer_info(contract, styles):
     elements = []
     
     header = Table([['SECTION - C: CUSTOMER INFORMATION']], colWidths=[515])
-    header.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, -1), PRIMARY_BLUE),
-        ('TEXTCOLOR', (0, 0), (-1, -1), colors.white),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 12),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
-        ('TOPPADDING', (0, 0), (-1, -1), 10),
-    ]))
+    header.setStyle(SECTION_HEADER_STYLE)
     elements.append(header)
     elements.append(Spacer(1, 15))
     
@@ -992,15 +960,7 @@ def create_calibration_customer_info(contract, styles):
     ]
     
     customer_table = Table(customer_data, colWidths=[180, 335])
-    customer_table.setStyle(TableStyle([
-        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('GRID', (0, 0), (-1, -1), 0.5, BORDER_COLOR),
-        ('BACKGROUND', (0, 0), (0, -1), LIGHT_GRAY),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('TOPPADDING', (0, 0), (-1, -1), 8),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-    ]))
+    customer_table.setStyle(LABEL_COLUMN_GRID_STYLE)
     elements.append(customer_table)
     elements.append(PageBreak())
     
@@ -1012,15 +972,7 @@ def create_calibration_service_provider(contract, styles):
     elements = []
     
     header = Table([['SECTION - D: SERVICE PROVIDER DETAILS']], colWidths=[515])
-    header.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, -1), PRIMARY_BLUE),
-        ('TEXTCOLOR', (0, 0), (-1, -1), colors.white),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 12),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
-        ('TOPPADDING', (0, 0), (-1, -1), 10),
-    ]))
+    header.setStyle(SECTION_HEADER_STYLE)
     elements.append(header)
     elements.append(Spacer(1, 15))
     
@@ -1036,15 +988,7 @@ def create_calibration_service_provider(contract, styles):
     ]
     
     provider_table = Table(provider_data, colWidths=[180, 335])
-    provider_table.setStyle(TableStyle([
-        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('GRID', (0, 0), (-1, -1), 0.5, BORDER_COLOR),
-        ('BACKGROUND', (0, 0), (0, -1), LIGHT_GRAY),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('TOPPADDING', (0, 0), (-1, -1), 8),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-    ]))
+    provider_table.setStyle(LABEL_COLUMN_GRID_STYLE)
     elements.append(provider_table)
     elements.append(PageBreak())
     
@@ -1056,15 +1000,7 @@ def create_calibration_scope_section(contract, styles):
     elements = []
     
     header = Table([['SECTION - E: SCOPE OF CALIBRATION SERVICES']], colWidths=[515])
-    header.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, -1), PRIMARY_BLUE),
-        ('TEXTCOLOR', (0, 0), (-1, -1), colors.white),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 12),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
-        ('TOPPADDING', (0, 0), (-1, -1), 10),
-    ]))
+    header.setStyle(SECTION_HEADER_STYLE)
     elements.append(header)
     elements.append(Spacer(1, 15))
     
@@ -1114,15 +1050,7 @@ def create_calibration_meter_list(contract, styles):
     elements = []
     
     header = Table([['SECTION - F: METER/EQUIPMENT LIST']], colWidths=[515])
-    header.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, -1), PRIMARY_BLUE),
-        ('TEXTCOLOR', (0, 0), (-1, -1), colors.white),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 12),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
-        ('TOPPADDING', (0, 0), (-1, -1), 10),
-    ]))
+    header.setStyle(SECTION_HEADER_STYLE)
     elements.append(header)
     elements.append(Spacer(1, 15))
     
@@ -1175,15 +1103,7 @@ def create_calibration_visits_section(contract, styles):
     elements = []
     
     header = Table([['SECTION - G: CALIBRATION SCHEDULE & VISITS']], colWidths=[515])
-    header.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, -1), PRIMARY_BLUE),
-        ('TEXTCOLOR', (0, 0), (-1, -1), colors.white),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 12),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
-        ('TOPPADDING', (0, 0), (-1, -1), 10),
-    ]))
+    header.setStyle(SECTION_HEADER_STYLE)
     elements.append(header)
     elements.append(Spacer(1, 15))
     
@@ -1241,15 +1161,7 @@ def create_calibration_test_reports_section(contract, test_reports, styles):
     elements = []
     
     header = Table([['SECTION - H: EQUIPMENT TEST REPORTS']], colWidths=[515])
-    header.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, -1), PRIMARY_BLUE),
-        ('TEXTCOLOR', (0, 0), (-1, -1), colors.white),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 12),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
-        ('TOPPADDING', (0, 0), (-1, -1), 10),
-    ]))
+    header.setStyle(SECTION_HEADER_STYLE)
     elements.append(header)
     elements.append(Spacer(1, 15))
     
@@ -1301,15 +1213,7 @@ def create_calibration_documents_section(contract, styles, has_test_reports=Fals
     section_letter = 'I' if has_test_reports else 'H'
     
     header = Table([[f'SECTION - {section_letter}: DOCUMENTS & ATTACHMENTS']], colWidths=[515])
-    header.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, -1), PRIMARY_BLUE),
-        ('TEXTCOLOR', (0, 0), (-1, -1), colors.white),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 12),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
-        ('TOPPADDING', (0, 0), (-1, -1), 10),
-    ]))
+    header.setStyle(SECTION_HEADER_STYLE)
     elements.append(header)
     elements.append(Spacer(1, 15))
     
@@ -1392,22 +1296,20 @@ def create_calibration_back_cover(styles):
     company_info = get_pdf_company_info()
     company_name = get_pdf_company_name()
     website = get_pdf_website()
-    logo_path = get_pdf_logo_path()
+    logo = get_pdf_logo()
     primary_orange = get_pdf_primary_color()
     
     elements.append(Spacer(1, 180))
     
     # Company Logo (if enabled)
-    if back_settings.get('show_logo', True) and logo_path:
+    if back_settings.get('show_logo', True) and logo:
         try:
-            if os.path.exists(logo_path):
-                logo = Image(logo_path, width=200, height=80)
-                logo_table = Table([[logo]], colWidths=[515])
-                logo_table.setStyle(TableStyle([
-                    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ]))
-                elements.append(logo_table)
-                elements.append(Spacer(1, 40))
+            logo_table = Table([[logo.image(200, 80)]], colWidths=[515])
+            logo_table.setStyle(TableStyle([
+                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ]))
+            elements.append(logo_table)
+            elements.append(Spacer(1, 40))
         except Exception as e:
             pass
     
@@ -10,6 +10,8 @@ import uuid
 
 from core.database import db
 from core.security import require_auth, get_password_hash
+from utils.customer_identity import assign_customer_id, resolve_customer_id
+from utils.customer_documents import refresh_customer_documents
 
 router = APIRouter(prefix="/api/customer-hub", tags=["Customer Hub"])
 
@@ -140,6 +142,7 @@ async def create_customer(data: CustomerCreate, current_user: dict = Depends(req
         "created_at": datetime.now(timezone.utc),
         "created_by": current_user.get("id")
     }
+    await assign_customer_id(db, "customers", customer_doc)
     
     await db.customers.insert_one(customer_doc)
     
@@ -163,10 +166,19 @@ async def update_customer(
     update_data["updated_at"] = datetime.now(timezone.utc)
     update_data["updated_by"] = current_user.get("id")
     
+    # Re-resolve the canonical customer when identifying fields change
+    if {"company_name", "gst_number", "email"} & update_data.keys():
+        merged = {**customer, **update_data}
+        update_data["customer_id"] = await resolve_customer_id(
+            db, name=merged.get("company_name"), gst=merged.get("gst_number"), email=merged.get("email")
+        )
+    
     await db.customers.update_one(
         {"id": customer_id},
         {"$set": update_data}
     )
+    if "customer_id" in update_data or "email" in update_data:
+        await refresh_customer_documents(db, [customer_id])
     
     updated = await db.customers.find_one({"id": customer_id}, {"_id": 0, "password_hash": 0})
     return updated
@@ -178,6 +190,7 @@ async def delete_customer(customer_id: str, current_user: dict = Depends(require
     result = await db.customers.delete_one({"id": customer_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Customer not found")
+    await db.customer_document_index.delete_many({"customer_id": customer_id})
     return {"message": "Customer deleted successfully"}
 
 
@@ -205,6 +218,7 @@ async def link_projects_to_customer(
         {"id": customer_id},
         {"$addToSet": {"linked_projects": {"$each": project_ids}}}
     )
+    await refresh_customer_documents(db, [customer_id])
     
     return {"message": f"Linked {len(project_ids)} project(s) to customer"}
 
@@ -223,6 +237,7 @@ async def unlink_project_from_customer(
     
     if result.modified_count == 0:
         raise HTTPException(status_code=404, detail="Customer or project link not found")
+    await refresh_customer_documents(db, [customer_id])
     
     return {"message": "Project unlinked from customer"}
 
@@ -262,11 +277,16 @@ async def auto_link_by_company_name(customer_id: str, current_user: dict = Depen
     if not company_name:
         raise HTTPException(status_code=400, detail="Customer has no company name set")
     
-    # Find projects where client matches company name (case-insensitive)
-    matching_projects = await db.projects.find(
-        {"client": {"$regex": company_name, "$options": "i"}},
-        {"_id": 0, "id": 1}
-    ).to_list(500)
+    # Projects are linked through the canonical customer_id, which covers
+    # every resolved spelling of the company name
+    canonical_id = customer.get("customer_id") or await assign_customer_id(db, "customers", customer)
+    if canonical_id:
+        if not customer.get("customer_id"):
+            await db.customers.update_one({"id": customer_id}, {"$set": {"customer_id": canonical_id}})
+        query = {"customer_id": canonical_id}
+    else:
+        query = {"client": company_name}
+    matching_projects = await db.projects.find(query, {"_id": 0, "id": 1}).to_list(500)
     
     project_ids = [p["id"] for p in matching_projects]
     
@@ -275,6 +295,7 @@ async def auto_link_by_company_name(customer_id: str, current_user: dict = Depen
             {"id": customer_id},
             {"$addToSet": {"linked_projects": {"$each": project_ids}}}
         )
+        await refresh_customer_documents(db, [customer_id])
     
     return {
         "message": f"Auto-linked {len(project_ids)} project(s) matching '{company_name}'",
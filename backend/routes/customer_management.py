@@ -9,7 +9,7 @@ Provides comprehensive customer analysis including:
 - New Customer Targeting
 """
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
 from datetime import datetime, timezone, timedelta
@@ -18,6 +18,17 @@ import os
 import re
 from motor.motor_asyncio import AsyncIOMotorClient
 
+from core.security import require_admin
+from utils.search import search_entity_ids
+from utils.customer_identity import resolve_customer_id, customer_cluster_ids, run_customer_resolution
+from utils.customer_metrics import (
+    CLOSED_STATUSES, FOLLOW_UP_DAYS, FOLLOW_UP_STATUSES, SEGMENTS, SORT_FIELDS, WON_STATUSES, high_value_threshold,
+    rebuild_customer_metrics, segment_counts, segment_customers, segment_filters,
+)
+from utils.sales_cube import cube_slice, months_back, rebuild_sales_cube, rollup, slice_total
+from utils.scheduler import scheduled_job
+from utils.streaming import find_by_ids
+
 router = APIRouter(prefix="/customer-management", tags=["Customer Management"])
 
 # MongoDB connection
@@ -49,53 +60,31 @@ async def get_customer_overview():
         # Total customers
         total_customers = await db.clients.count_documents({"customer_type": "domestic"})
         
-        # Active customers (with at least one enquiry/order in last 6 months)
-        six_months_ago = datetime.now(timezone.utc) - timedelta(days=180)
+        # Active customers (with at least one enquiry in last 6 months)
+        active_customers = await db.customer_metrics.count_documents(segment_filters(None)["active"])
         
-        # Get customers with recent activity
-        recent_enquiries = await db.sales_enquiries.distinct("company_name", {
-            "created_at": {"$gte": six_months_ago}
-        })
-        active_customers = len(recent_enquiries)
+        enquiries = await cube_slice(db, "enquiry", ["status"])
         
-        # Total pipeline value (all non-declined enquiries)
-        pipeline = db.sales_enquiries.aggregate([
-            {"$match": {"status": {"$nin": ["declined", "invoiced"]}}},
-            {"$group": {"_id": None, "total": {"$sum": {"$ifNull": ["$value", 0]}}}}
+        # Total pipeline value (all open and accepted enquiries)
+        pipeline_value = slice_total(enquiries, "value", status=[
+            status for status in {e["status"] for e in enquiries} if status not in ("declined", "invoiced")
         ])
-        pipeline_result = await pipeline.to_list(1)
-        pipeline_value = pipeline_result[0]["total"] if pipeline_result else 0
         
         # Total revenue (accepted/invoiced orders)
-        revenue_pipeline = db.sales_enquiries.aggregate([
-            {"$match": {"status": {"$in": ["accepted", "invoiced"]}}},
-            {"$group": {"_id": None, "total": {"$sum": {"$ifNull": ["$value", 0]}}}}
-        ])
-        revenue_result = await revenue_pipeline.to_list(1)
-        total_revenue = revenue_result[0]["total"] if revenue_result else 0
+        total_revenue = slice_total(enquiries, "value", status=WON_STATUSES)
         
         # Enquiry stats
-        total_enquiries = await db.sales_enquiries.count_documents({})
-        new_enquiries = await db.sales_enquiries.count_documents({"status": "new"})
-        quoted_enquiries = await db.sales_enquiries.count_documents({"status": "quoted"})
-        won_enquiries = await db.sales_enquiries.count_documents({"status": {"$in": ["accepted", "invoiced"]}})
-        lost_enquiries = await db.sales_enquiries.count_documents({"status": "declined"})
+        total_enquiries = slice_total(enquiries)
+        won_enquiries = slice_total(enquiries, status=WON_STATUSES)
         
         # Conversion rate
         conversion_rate = (won_enquiries / total_enquiries * 100) if total_enquiries > 0 else 0
         
         # Top customers by value
-        top_customers_pipeline = db.sales_enquiries.aggregate([
-            {"$match": {"status": {"$in": ["accepted", "invoiced"]}}},
-            {"$group": {
-                "_id": "$company_name",
-                "total_value": {"$sum": {"$ifNull": ["$value", 0]}},
-                "order_count": {"$sum": 1}
-            }},
-            {"$sort": {"total_value": -1}},
-            {"$limit": 10}
-        ])
-        top_customers = await top_customers_pipeline.to_list(10)
+        top_customers = sorted(
+            await cube_slice(db, "enquiry", ["customer"], {"status": {"$in": WON_STATUSES}}),
+            key=lambda c: c["value"], reverse=True
+        )[:10]
         
         return {
             "summary": {
@@ -107,16 +96,16 @@ async def get_customer_overview():
             },
             "enquiry_stats": {
                 "total": total_enquiries,
-                "new": new_enquiries,
-                "quoted": quoted_enquiries,
+                "new": slice_total(enquiries, status="new"),
+                "quoted": slice_total(enquiries, status="quoted"),
                 "won": won_enquiries,
-                "lost": lost_enquiries
+                "lost": slice_total(enquiries, status="declined")
             },
             "top_customers": [
                 {
-                    "name": c["_id"],
-                    "total_value": c["total_value"],
-                    "order_count": c["order_count"]
+                    "name": c["customer_name"],
+                    "total_value": c["value"],
+                    "order_count": c["count"]
                 } for c in top_customers
             ]
         }
@@ -128,66 +117,35 @@ async def get_customer_overview():
 async def get_customer_360(customer_name: str):
     """Get complete 360° view of a specific customer"""
     try:
-        # Use bson.Regex for proper regex matching
-        name_regex = Regex(re.escape(customer_name), "i")
-        
-        # Find customer details
+        # Find customer details: exact name first, then the canonical customer
+        # resolved from name variants (see utils/customer_identity.py)
         customer = await db.clients.find_one(
-            {"name": name_regex, "customer_type": "domestic"},
+            {"name": customer_name, "customer_type": "domestic"},
             {"_id": 0}
         )
+        canonical_id = (customer.get("merged_into") or customer.get("id")) if customer else \
+            await resolve_customer_id(db, name=customer_name)
+        if canonical_id and (not customer or customer.get("id") != canonical_id):
+            customer = await db.clients.find_one({"id": canonical_id}, {"_id": 0}) or customer
+        
+        # One indexed query per collection on the backfilled customer_id, plus
+        # exact name matches among records not linked yet; case-insensitive
+        # name match only for customers that have not been resolved
+        if canonical_id:
+            cluster_ids = await customer_cluster_ids(db, canonical_id)
+            names = list(dict.fromkeys(n for n in [customer_name, (customer or {}).get("name")] if n))
+            unlinked = {"customer_id": {"$in": [None, ""]}}
+            linked = {"customer_id": {"$in": cluster_ids}}
+            enquiry_query = {"$or": [linked, {**unlinked, "company_name": {"$in": names}}]}
+            quotation_query = order_query = {"$or": [linked, {**unlinked, "customer_name": {"$in": names}}]}
+        else:
+            name_regex = Regex(re.escape(customer_name), "i")
+            enquiry_query = {"company_name": name_regex}
+            quotation_query = order_query = {"customer_name": name_regex}
         
-        customer_id = customer.get("id") if customer else None
-        
-        # Get all enquiries for this customer - by customer_id first, then by name
-        enquiries = []
-        if customer_id:
-            enquiries = await db.sales_enquiries.find(
-                {"customer_id": customer_id},
-                {"_id": 0}
-            ).sort("created_at", -1).to_list(100)
-        
-        # Fallback to name matching if no customer_id results
-        if not enquiries:
-            enquiries = await db.sales_enquiries.find(
-                {"company_name": customer_name},
-                {"_id": 0}
-            ).sort("created_at", -1).to_list(100)
-        
-        # If no exact match, try regex
-        if not enquiries:
-            enquiries = await db.sales_enquiries.find(
-                {"company_name": name_regex},
-                {"_id": 0}
-            ).sort("created_at", -1).to_list(100)
-        
-        # Get all quotations for this customer
-        quotations = []
-        if customer_id:
-            quotations = await db.sales_quotations.find(
-                {"customer_id": customer_id},
-                {"_id": 0}
-            ).sort("created_at", -1).to_list(100)
-        
-        if not quotations:
-            quotations = await db.sales_quotations.find(
-                {"customer_name": name_regex},
-                {"_id": 0}
-            ).sort("created_at", -1).to_list(100)
-        
-        # Get all orders for this customer
-        orders = []
-        if customer_id:
-            orders = await db.sales_orders.find(
-                {"customer_id": customer_id},
-                {"_id": 0}
-            ).sort("created_at", -1).to_list(100)
-        
-        if not orders:
-            orders = await db.sales_orders.find(
-                {"customer_name": name_regex},
-                {"_id": 0}
-            ).sort("created_at", -1).to_list(100)
+        enquiries = await db.sales_enquiries.find(enquiry_query, {"_id": 0}).sort("created_at", -1).to_list(100)
+        quotations = await db.sales_quotations.find(quotation_query, {"_id": 0}).sort("created_at", -1).to_list(100)
+        orders = await db.sales_orders.find(order_query, {"_id": 0}).sort("created_at", -1).to_list(100)
         
         # Calculate enquiry metrics
         total_enquiries = len(enquiries)
@@ -259,7 +217,7 @@ async def get_customer_360(customer_name: str):
         
         return {
             "customer": customer,
-            "customer_id": customer_id,
+            "customer_id": canonical_id,
             "metrics": {
                 "total_enquiries": total_enquiries,
                 "total_enquiry_value": total_enquiry_value,
@@ -304,21 +262,24 @@ async def get_customer_360_by_id(customer_id: str):
         
         customer_name = customer.get("name", "")
         
+        # Include duplicate client records merged into the same canonical customer
+        cluster_ids = await customer_cluster_ids(db, customer.get("merged_into") or customer_id)
+        
         # Get all enquiries by customer_id
         enquiries = await db.sales_enquiries.find(
-            {"customer_id": customer_id},
+            {"customer_id": {"$in": cluster_ids}},
             {"_id": 0}
         ).sort("created_at", -1).to_list(100)
         
         # Get all quotations by customer_id
         quotations = await db.sales_quotations.find(
-            {"customer_id": customer_id},
+            {"customer_id": {"$in": cluster_ids}},
             {"_id": 0}
         ).sort("created_at", -1).to_list(100)
         
         # Get all orders by customer_id
         orders = await db.sales_orders.find(
-            {"customer_id": customer_id},
+            {"customer_id": {"$in": cluster_ids}},
             {"_id": 0}
         ).sort("created_at", -1).to_list(100)
         
@@ -360,95 +321,35 @@ async def get_customer_360_by_id(customer_id: str):
 async def get_enquiry_analysis():
     """Get comprehensive enquiry analysis"""
     try:
-        # Status distribution
-        status_pipeline = db.sales_enquiries.aggregate([
-            {"$group": {
-                "_id": "$status",
-                "count": {"$sum": 1},
-                "value": {"$sum": {"$ifNull": ["$value", 0]}}
-            }}
-        ])
-        status_dist = await status_pipeline.to_list(20)
-        
-        # Category distribution
-        category_pipeline = db.sales_enquiries.aggregate([
-            {"$match": {"category": {"$ne": None}}},
-            {"$group": {
-                "_id": "$category",
-                "count": {"$sum": 1},
-                "value": {"$sum": {"$ifNull": ["$value", 0]}}
-            }},
-            {"$sort": {"count": -1}}
-        ])
-        category_dist = await category_pipeline.to_list(10)
+        rows = await cube_slice(db, "enquiry", ["status", "category", "department", "priority", "month"])
         
-        # Department distribution
-        dept_pipeline = db.sales_enquiries.aggregate([
-            {"$match": {"department": {"$ne": None}}},
-            {"$group": {
-                "_id": "$department",
-                "count": {"$sum": 1},
-                "value": {"$sum": {"$ifNull": ["$value", 0]}}
-            }},
-            {"$sort": {"count": -1}}
-        ])
-        dept_dist = await dept_pipeline.to_list(10)
+        def distribution(dim: str, limit: int = 10) -> List[tuple]:
+            groups = [(k, v) for k, v in rollup(rows, dim).items() if k is not None]
+            return sorted(groups, key=lambda g: g[1]["count"], reverse=True)[:limit]
         
         # Monthly enquiry trend (last 12 months)
-        monthly_pipeline = db.sales_enquiries.aggregate([
-            {"$match": {"created_at": {"$gte": datetime.now(timezone.utc) - timedelta(days=365)}}},
-            {"$group": {
-                "_id": {
-                    "year": {"$year": "$created_at"},
-                    "month": {"$month": "$created_at"}
-                },
-                "count": {"$sum": 1},
-                "value": {"$sum": {"$ifNull": ["$value", 0]}}
-            }},
-            {"$sort": {"_id.year": 1, "_id.month": 1}}
-        ])
-        monthly_trend = await monthly_pipeline.to_list(12)
-        
-        # Priority distribution
-        priority_pipeline = db.sales_enquiries.aggregate([
-            {"$match": {"priority": {"$ne": None}}},
-            {"$group": {
-                "_id": "$priority",
-                "count": {"$sum": 1}
-            }}
-        ])
-        priority_dist = await priority_pipeline.to_list(5)
+        first_month = months_back(12)
+        monthly_trend = sorted((k, v) for k, v in rollup(rows, "month").items() if k and k >= first_month)
         
         # Top companies by enquiry count
-        top_companies_pipeline = db.sales_enquiries.aggregate([
-            {"$group": {
-                "_id": "$company_name",
-                "count": {"$sum": 1},
-                "value": {"$sum": {"$ifNull": ["$value", 0]}}
-            }},
-            {"$sort": {"count": -1}},
-            {"$limit": 10}
-        ])
-        top_companies = await top_companies_pipeline.to_list(10)
+        top_companies = sorted(
+            await cube_slice(db, "enquiry", ["customer"]), key=lambda c: c["count"], reverse=True
+        )[:10]
         
         # Conversion funnel
-        total = await db.sales_enquiries.count_documents({})
-        quoted = await db.sales_enquiries.count_documents({"status": {"$in": ["quoted", "negotiation", "accepted", "invoiced"]}})
-        won = await db.sales_enquiries.count_documents({"status": {"$in": ["accepted", "invoiced"]}})
+        total = slice_total(rows)
+        quoted = slice_total(rows, status=["quoted", "negotiation"] + WON_STATUSES)
+        won = slice_total(rows, status=WON_STATUSES)
         
         return {
-            "status_distribution": [{"status": s["_id"], "count": s["count"], "value": s["value"]} for s in status_dist],
-            "category_distribution": [{"category": c["_id"], "count": c["count"], "value": c["value"]} for c in category_dist],
-            "department_distribution": [{"department": d["_id"], "count": d["count"], "value": d["value"]} for d in dept_dist],
-            "monthly_trend": [
-                {
-                    "month": f"{m['_id']['year']}-{m['_id']['month']:02d}",
-                    "count": m["count"],
-                    "value": m["value"]
-                } for m in monthly_trend
+            "status_distribution": [
+                {"status": k, "count": v["count"], "value": v["value"]} for k, v in rollup(rows, "status").items()
             ],
-            "priority_distribution": [{"priority": p["_id"], "count": p["count"]} for p in priority_dist],
-            "top_companies": [{"name": c["_id"], "count": c["count"], "value": c["value"]} for c in top_companies],
+            "category_distribution": [{"category": k, **v} for k, v in distribution("category")],
+            "department_distribution": [{"department": k, **v} for k, v in distribution("department")],
+            "monthly_trend": [{"month": k, **v} for k, v in monthly_trend],
+            "priority_distribution": [{"priority": k, "count": v["count"]} for k, v in distribution("priority", 5)],
+            "top_companies": [{"name": c["customer_name"], "count": c["count"], "value": c["value"]} for c in top_companies],
             "conversion_funnel": {
                 "total_enquiries": total,
                 "quoted": quoted,
@@ -463,58 +364,62 @@ async def get_enquiry_analysis():
 
 # ============== QUOTE ANALYSIS ==============
 
+QUOTE_AGING_BUCKETS = [(7, "0-7 days"), (14, "8-14 days"), (30, "15-30 days")]
+QUOTE_AGING_OLDEST = "30+ days"
+
+
 @router.get("/quote-analysis")
 async def get_quote_analysis():
     """Get quote/quotation analysis"""
     try:
-        # Quotations from enquiries that reached quoted status
-        quoted_enquiries = await db.sales_enquiries.find(
-            {"status": {"$in": ["quoted", "negotiation", "accepted", "invoiced", "declined"]}},
-            {"_id": 0}
-        ).to_list(1000)
-        
-        total_quotes = len(quoted_enquiries)
-        accepted = [q for q in quoted_enquiries if q.get("status") in ["accepted", "invoiced"]]
-        declined = [q for q in quoted_enquiries if q.get("status") == "declined"]
-        pending = [q for q in quoted_enquiries if q.get("status") in ["quoted", "negotiation"]]
+        # Enquiries that reached quoted status
+        rows = await cube_slice(db, "enquiry", ["status"], {"status": {"$in": FOLLOW_UP_STATUSES + CLOSED_STATUSES}})
         
-        total_quote_value = sum(q.get("value", 0) or 0 for q in quoted_enquiries)
-        accepted_value = sum(q.get("value", 0) or 0 for q in accepted)
-        declined_value = sum(q.get("value", 0) or 0 for q in declined)
-        pending_value = sum(q.get("value", 0) or 0 for q in pending)
+        total_quotes = slice_total(rows)
+        accepted_count = slice_total(rows, status=WON_STATUSES)
+        total_quote_value = slice_total(rows, "value")
         
-        win_rate = (len(accepted) / total_quotes * 100) if total_quotes > 0 else 0
+        win_rate = (accepted_count / total_quotes * 100) if total_quotes > 0 else 0
         avg_quote_value = (total_quote_value / total_quotes) if total_quotes > 0 else 0
         
-        # Quote aging (days since created for pending quotes)
-        aging_buckets = {"0-7 days": 0, "8-14 days": 0, "15-30 days": 0, "30+ days": 0}
+        # Quote aging (days since created for pending quotes), bucketed in the database
         now = datetime.now(timezone.utc)
-        for q in pending:
-            if q.get("created_at"):
-                days = safe_datetime_diff(now, q["created_at"])
-                if days <= 7:
-                    aging_buckets["0-7 days"] += 1
-                elif days <= 14:
-                    aging_buckets["8-14 days"] += 1
-                elif days <= 30:
-                    aging_buckets["15-30 days"] += 1
-                else:
-                    aging_buckets["30+ days"] += 1
+        aging_rows = await db.sales_enquiries.aggregate([
+            {"$match": {"status": {"$in": FOLLOW_UP_STATUSES}, "created_at": {"$type": "date"}}},
+            {"$group": {
+                "_id": {"$switch": {
+                    "branches": [
+                        {"case": {"$gt": ["$created_at", now - timedelta(days=days + 1)]}, "then": label}
+                        for days, label in QUOTE_AGING_BUCKETS
+                    ],
+                    "default": QUOTE_AGING_OLDEST
+                }},
+                "count": {"$sum": 1}
+            }}
+        ]).to_list(None)
+        aging_buckets = {label: 0 for _, label in QUOTE_AGING_BUCKETS}
+        aging_buckets[QUOTE_AGING_OLDEST] = 0
+        aging_buckets.update({a["_id"]: a["count"] for a in aging_rows})
+        
+        pending_quotes = await db.sales_enquiries.find(
+            {"status": {"$in": FOLLOW_UP_STATUSES}},
+            {"_id": 0, "enquiry_no": 1, "company_name": 1, "value": 1, "date": 1, "status": 1, "created_at": 1}
+        ).sort("created_at", -1).to_list(10)
         
         return {
             "summary": {
                 "total_quotes": total_quotes,
-                "accepted_count": len(accepted),
-                "declined_count": len(declined),
-                "pending_count": len(pending),
+                "accepted_count": accepted_count,
+                "declined_count": slice_total(rows, status="declined"),
+                "pending_count": slice_total(rows, status=FOLLOW_UP_STATUSES),
                 "win_rate": round(win_rate, 1),
                 "avg_quote_value": round(avg_quote_value, 0)
             },
             "value_breakdown": {
                 "total_value": total_quote_value,
-                "accepted_value": accepted_value,
-                "declined_value": declined_value,
-                "pending_value": pending_value
+                "accepted_value": slice_total(rows, "value", status=WON_STATUSES),
+                "declined_value": slice_total(rows, "value", status="declined"),
+                "pending_value": slice_total(rows, "value", status=FOLLOW_UP_STATUSES)
             },
             "aging": aging_buckets,
             "pending_quotes": [
@@ -525,7 +430,7 @@ async def get_quote_analysis():
                     "date": q.get("date"),
                     "status": q.get("status"),
                     "days_pending": safe_datetime_diff(now, q.get("created_at"))
-                } for q in sorted(pending, key=lambda x: x.get("created_at") or now, reverse=True)[:10]
+                } for q in pending_quotes
             ]
         }
     except Exception as e:
@@ -538,67 +443,46 @@ async def get_quote_analysis():
 async def get_order_analysis():
     """Get order analysis - orders are accepted/invoiced enquiries"""
     try:
-        # Orders = accepted or invoiced enquiries
-        orders = await db.sales_enquiries.find(
-            {"status": {"$in": ["accepted", "invoiced"]}},
-            {"_id": 0}
-        ).sort("created_at", -1).to_list(1000)
+        won = {"status": {"$in": WON_STATUSES}}
+        rows = await cube_slice(db, "enquiry", ["month", "category"], won)
+        customers = await cube_slice(db, "enquiry", ["customer"], won)
         
-        total_orders = len(orders)
-        total_value = sum(o.get("value", 0) or 0 for o in orders)
+        total_orders = slice_total(rows)
+        total_value = slice_total(rows, "value")
         avg_order_value = (total_value / total_orders) if total_orders > 0 else 0
         
-        # Orders by company
-        company_orders = {}
-        for o in orders:
-            company = o.get("company_name", "Unknown")
-            if company not in company_orders:
-                company_orders[company] = {"count": 0, "value": 0}
-            company_orders[company]["count"] += 1
-            company_orders[company]["value"] += o.get("value", 0) or 0
-        
-        # Sort by value
         top_customers = sorted(
-            [{"name": k, **v} for k, v in company_orders.items()],
+            [{"name": c["customer_name"] or "Unknown", "count": c["count"], "value": c["value"]} for c in customers],
             key=lambda x: x["value"],
             reverse=True
         )[:10]
         
         # Repeat customers (more than 1 order)
-        repeat_customers = [c for c in company_orders.items() if c[1]["count"] > 1]
-        repeat_rate = (len(repeat_customers) / len(company_orders) * 100) if company_orders else 0
-        
-        # Monthly order trend
-        monthly_orders = {}
-        for o in orders:
-            if o.get("created_at"):
-                month_key = o["created_at"].strftime("%Y-%m")
-                if month_key not in monthly_orders:
-                    monthly_orders[month_key] = {"count": 0, "value": 0}
-                monthly_orders[month_key]["count"] += 1
-                monthly_orders[month_key]["value"] += o.get("value", 0) or 0
-        
-        # Sort by month
+        repeat_customers = [c for c in customers if c["count"] > 1]
+        repeat_rate = (len(repeat_customers) / len(customers) * 100) if customers else 0
+        
+        # Monthly order trend, last 12 months with orders
         monthly_trend = [
-            {"month": k, **v} 
-            for k, v in sorted(monthly_orders.items())
-        ][-12:]  # Last 12 months
+            {"month": k, **v} for k, v in sorted((k, v) for k, v in rollup(rows, "month").items() if k)
+        ][-12:]
         
         # Category breakdown
         category_orders = {}
-        for o in orders:
-            cat = o.get("category", "Uncategorized") or "Uncategorized"
-            if cat not in category_orders:
-                category_orders[cat] = {"count": 0, "value": 0}
-            category_orders[cat]["count"] += 1
-            category_orders[cat]["value"] += o.get("value", 0) or 0
+        for cat, v in rollup(rows, "category").items():
+            bucket = category_orders.setdefault(cat or "Uncategorized", {"count": 0, "value": 0})
+            bucket["count"] += v["count"]
+            bucket["value"] += v["value"]
+        
+        recent_orders = await db.sales_enquiries.find(
+            won, {"_id": 0, "enquiry_no": 1, "company_name": 1, "value": 1, "date": 1, "category": 1, "status": 1}
+        ).sort("created_at", -1).to_list(10)
         
         return {
             "summary": {
                 "total_orders": total_orders,
                 "total_value": total_value,
                 "avg_order_value": round(avg_order_value, 0),
-                "unique_customers": len(company_orders),
+                "unique_customers": len(customers),
                 "repeat_customers": len(repeat_customers),
                 "repeat_rate": round(repeat_rate, 1)
             },
@@ -613,7 +497,7 @@ async def get_order_analysis():
                     "date": o.get("date"),
                     "category": o.get("category"),
                     "status": o.get("status")
-                } for o in orders[:10]
+                } for o in recent_orders
             ]
         }
     except Exception as e:
@@ -626,29 +510,14 @@ async def get_order_analysis():
 async def get_projections():
     """Get order and billing projections based on historical data"""
     try:
-        # Get historical monthly data (last 12 months)
-        twelve_months_ago = datetime.now(timezone.utc) - timedelta(days=365)
-        
-        # Monthly revenue from orders
-        monthly_pipeline = db.sales_enquiries.aggregate([
-            {"$match": {
-                "status": {"$in": ["accepted", "invoiced"]},
-                "created_at": {"$gte": twelve_months_ago}
-            }},
-            {"$group": {
-                "_id": {
-                    "year": {"$year": "$created_at"},
-                    "month": {"$month": "$created_at"}
-                },
-                "revenue": {"$sum": {"$ifNull": ["$value", 0]}},
-                "count": {"$sum": 1}
-            }},
-            {"$sort": {"_id.year": 1, "_id.month": 1}}
-        ])
-        monthly_data = await monthly_pipeline.to_list(12)
+        # Monthly revenue from orders (last 12 months)
+        monthly_data = await cube_slice(
+            db, "enquiry", ["month"], {"status": {"$in": WON_STATUSES}, "month": {"$gte": months_back(12)}}
+        )
+        monthly_data.sort(key=lambda m: m["month"])
         
         # Calculate average monthly revenue
-        revenues = [m["revenue"] for m in monthly_data if m["revenue"] > 0]
+        revenues = [m["value"] for m in monthly_data if m["value"] > 0]
         avg_monthly_revenue = sum(revenues) / len(revenues) if revenues else 0
         
         # Calculate growth rate
@@ -660,11 +529,8 @@ async def get_projections():
             growth_rate = 0
         
         # Pipeline value (pending enquiries)
-        pipeline_result = await db.sales_enquiries.aggregate([
-            {"$match": {"status": {"$nin": ["declined", "accepted", "invoiced"]}}},
-            {"$group": {"_id": None, "total": {"$sum": {"$ifNull": ["$value", 0]}}}}
-        ]).to_list(1)
-        pipeline_value = pipeline_result[0]["total"] if pipeline_result else 0
+        pending = await cube_slice(db, "enquiry", ["status"], {"status": {"$nin": CLOSED_STATUSES}})
+        pipeline_value = slice_total(pending, "value")
         
         # Weighted pipeline (by status probability)
         status_weights = {
@@ -677,14 +543,8 @@ async def get_projections():
             "negotiation": 0.7
         }
         
-        pending_enquiries = await db.sales_enquiries.find(
-            {"status": {"$nin": ["declined", "accepted", "invoiced"]}},
-            {"_id": 0, "status": 1, "value": 1}
-        ).to_list(1000)
-        
         weighted_pipeline = sum(
-            (e.get("value", 0) or 0) * status_weights.get(e.get("status", "new"), 0.1)
-            for e in pending_enquiries
+            p["value"] * status_weights.get(p["status"] or "new", 0.1) for p in pending
         )
         
         # Project next 3 months
@@ -702,8 +562,8 @@ async def get_projections():
         return {
             "historical": [
                 {
-                    "month": f"{m['_id']['year']}-{m['_id']['month']:02d}",
-                    "revenue": m["revenue"],
+                    "month": m["month"],
+                    "revenue": m["value"],
                     "orders": m["count"]
                 } for m in monthly_data
             ],
@@ -715,7 +575,7 @@ async def get_projections():
             },
             "projections": projections,
             "pipeline_breakdown": {
-                status: len([e for e in pending_enquiries if e.get("status") == status])
+                status: slice_total(pending, status=status)
                 for status in status_weights.keys()
             }
         }
@@ -725,75 +585,83 @@ async def get_projections():
 
 # ============== NEW CUSTOMER TARGETING ==============
 
+CUSTOMER_METRICS_JOB = "customers.metrics"
+
+
+@scheduled_job(CUSTOMER_METRICS_JOB, "30 2 * * *", "Rebuild per-customer enquiry metrics behind targeting segments")
+async def rebuild_customer_metrics_job():
+    return {"customers": await rebuild_customer_metrics(db)}
+
+
+def _segment_entry(segment: str, row: dict, now: datetime) -> dict:
+    """List entry of a segment row in the shape the targeting view has always returned"""
+    if segment == "dormant":
+        return {"customer_id": row["customer_id"], "name": row.get("name"), "contact": row.get("contact_person"),
+                "phone": row.get("phone"), "last_enquiry_at": row.get("last_enquiry_at")}
+    if segment == "high_value":
+        return {"customer_id": row["customer_id"], "name": row.get("name"), "total_value": row.get("won_value", 0),
+                "orders": row.get("won_orders", 0)}
+    if segment == "needs_follow_up":
+        return {"customer_id": row["customer_id"], "name": row.get("name"), "open_quotes": row.get("open_quotes", 0),
+                "days_pending": safe_datetime_diff(now, row.get("oldest_open_quote_at"))}
+    return {k: row.get(k) for k in ("customer_id", "name", "contact_person", "phone", "email", "location", "city")}
+
+
 @router.get("/customer-targeting")
-async def get_customer_targeting():
-    """Get insights for targeting new customers and nurturing existing ones"""
+async def get_customer_targeting(segment: Optional[str] = None, skip: int = 0, limit: int = 20):
+    """
+    Get insights for targeting new customers and nurturing existing ones.
+
+    Counts and lists come from customer_metrics (see utils/customer_metrics.py).
+    Without `segment` this returns the summary with the first page of each list;
+    with one of prospect, active, dormant, high_value or needs_follow_up it
+    returns that segment paginated by skip/limit.
+    """
+    if segment and segment not in SEGMENTS:
+        raise HTTPException(status_code=400, detail=f"Unknown segment: {segment}")
+    skip, limit = max(0, skip), max(1, min(limit, 500))
     try:
-        # All customers
-        all_customers = await db.clients.find(
-            {"customer_type": "domestic"},
-            {"_id": 0, "id": 1, "name": 1, "contact_person": 1, "phone": 1, "email": 1, "location": 1, "city": 1}
-        ).to_list(1000)
-        
-        # Customers with enquiries
-        customers_with_enquiries = await db.sales_enquiries.distinct("company_name")
-        
-        # Identify prospects (customers with no enquiries)
-        prospects = [
-            c for c in all_customers 
-            if c.get("name") and c["name"] not in customers_with_enquiries
-        ]
-        
-        # Dormant customers (no enquiry in last 6 months but had before)
-        six_months_ago = datetime.now(timezone.utc) - timedelta(days=180)
-        recent_customers = await db.sales_enquiries.distinct("company_name", {
-            "created_at": {"$gte": six_months_ago}
-        })
-        
-        dormant = [
-            c for c in all_customers
-            if c.get("name") in customers_with_enquiries and c.get("name") not in recent_customers
-        ]
-        
-        # High-value customers (top 20% by order value)
-        customer_values = await db.sales_enquiries.aggregate([
-            {"$match": {"status": {"$in": ["accepted", "invoiced"]}}},
-            {"$group": {
-                "_id": "$company_name",
-                "total_value": {"$sum": {"$ifNull": ["$value", 0]}},
-                "order_count": {"$sum": 1}
-            }},
-            {"$sort": {"total_value": -1}}
-        ]).to_list(1000)
-        
-        top_20_threshold = len(customer_values) // 5
-        high_value_customers = customer_values[:max(top_20_threshold, 1)]
-        
-        # Customers needing follow-up (quoted but not accepted for >14 days)
+        now = datetime.now(timezone.utc)
+        filters = segment_filters(await high_value_threshold(db), now)
+
+        if segment:
+            rows = await segment_customers(db, segment, filters, skip, limit)
+            return {
+                "segment": segment,
+                "customers": [_segment_entry(segment, r, now) for r in rows],
+                "total": await db.customer_metrics.count_documents(filters[segment]),
+                "skip": skip,
+                "limit": limit
+            }
+
+        counts = await segment_counts(db, filters)
+
+        # Enquiries quoted but not accepted for >14 days, oldest first
         follow_up_needed = await db.sales_enquiries.find(
             {
-                "status": {"$in": ["quoted", "negotiation"]},
-                "created_at": {"$lt": datetime.now(timezone.utc) - timedelta(days=14)}
+                "status": {"$in": FOLLOW_UP_STATUSES},
+                "created_at": {"$lt": now - timedelta(days=FOLLOW_UP_DAYS)}
             },
-            {"_id": 0}
-        ).sort("created_at", 1).to_list(50)
-        
+            {"_id": 0, "enquiry_no": 1, "company_name": 1, "value": 1, "status": 1, "created_at": 1}
+        ).sort("created_at", 1).to_list(10)
+
         return {
             "summary": {
-                "total_customers": len(all_customers),
-                "active_customers": len(recent_customers),
-                "prospects": len(prospects),
-                "dormant_customers": len(dormant),
-                "high_value_customers": len(high_value_customers)
+                "total_customers": counts["total"],
+                "active_customers": counts["active"],
+                "prospects": counts["prospect"],
+                "dormant_customers": counts["dormant"],
+                "high_value_customers": counts["high_value"],
+                "needs_follow_up": counts["needs_follow_up"]
             },
-            "prospects": prospects[:20],  # Top 20 prospects
+            "prospects": [
+                _segment_entry("prospect", r, now) for r in await segment_customers(db, "prospect", filters, 0, limit)
+            ],
             "dormant_customers": [
-                {"name": d.get("name"), "contact": d.get("contact_person"), "phone": d.get("phone")}
-                for d in dormant[:20]
+                _segment_entry("dormant", r, now) for r in await segment_customers(db, "dormant", filters, 0, limit)
             ],
             "high_value_customers": [
-                {"name": c["_id"], "total_value": c["total_value"], "orders": c["order_count"]}
-                for c in high_value_customers[:10]
+                _segment_entry("high_value", r, now) for r in await segment_customers(db, "high_value", filters, 0, 10)
             ],
             "follow_up_needed": [
                 {
@@ -801,8 +669,8 @@ async def get_customer_targeting():
                     "company_name": f.get("company_name"),
                     "value": f.get("value"),
                     "status": f.get("status"),
-                    "days_pending": safe_datetime_diff(datetime.now(timezone.utc), f.get("created_at"))
-                } for f in follow_up_needed[:10]
+                    "days_pending": safe_datetime_diff(now, f.get("created_at"))
+                } for f in follow_up_needed
             ]
         }
     except Exception as e:
@@ -818,58 +686,39 @@ async def get_customers_with_analytics(
     limit: int = 50,
     skip: int = 0
 ):
-    """Get customer list with their analytics summary"""
+    """Get customer list with their analytics summary, paginated and sortable on the precomputed metrics"""
+    if sort_by not in SORT_FIELDS:
+        raise HTTPException(status_code=400, detail=f"sort_by must be one of: {', '.join(SORT_FIELDS)}")
+    skip, limit = max(0, skip), max(1, min(limit, 1000))
     try:
-        # Build query
-        query = {"customer_type": "domestic"}
+        query = {}
         if search:
-            query["name"] = Regex(re.escape(search), "i")
+            query["customer_id"] = {"$in": await search_entity_ids(db, "customer", search)}
         
-        # Get customers
-        customers = await db.clients.find(query, {"_id": 0}).skip(skip).limit(limit).to_list(limit)
-        total = await db.clients.count_documents(query)
+        field, direction = SORT_FIELDS[sort_by]
+        rows = await db.customer_metrics.find(query, {"_id": 0}).sort(
+            [(field, direction), ("name", 1)]
+        ).skip(skip).limit(limit).to_list(limit)
+        total = await db.customer_metrics.count_documents(query)
         
-        # Enrich with analytics
-        enriched = []
-        for c in customers:
-            customer_name = c.get("name", "")
-            
-            # Get enquiry stats using exact match for better performance
-            enquiry_stats = await db.sales_enquiries.aggregate([
-                {"$match": {"company_name": customer_name}},
-                {"$group": {
-                    "_id": None,
-                    "total_enquiries": {"$sum": 1},
-                    "total_value": {"$sum": {"$ifNull": ["$value", 0]}},
-                    "won": {"$sum": {"$cond": [{"$in": ["$status", ["accepted", "invoiced"]]}, 1, 0]}},
-                    "pending": {"$sum": {"$cond": [
-                        {"$and": [
-                            {"$ne": ["$status", "accepted"]},
-                            {"$ne": ["$status", "invoiced"]},
-                            {"$ne": ["$status", "declined"]}
-                        ]}, 
-                        1, 
-                        0
-                    ]}}
-                }}
-            ]).to_list(1)
-            
-            stats = enquiry_stats[0] if enquiry_stats else {
-                "total_enquiries": 0, "total_value": 0, "won": 0, "pending": 0
-            }
-            
-            enriched.append({
-                **c,
+        # Full client documents for the page, in page order
+        clients = {c["id"]: c for c in await find_by_ids(db.clients, [r["customer_id"] for r in rows])}
+        customers = [
+            {
+                **clients[r["customer_id"]],
                 "analytics": {
-                    "total_enquiries": stats.get("total_enquiries", 0),
-                    "total_value": stats.get("total_value", 0),
-                    "won_orders": stats.get("won", 0),
-                    "pending_enquiries": stats.get("pending", 0)
+                    "total_enquiries": r.get("total_enquiries", 0),
+                    "total_value": r.get("total_value", 0),
+                    "won_orders": r.get("won_orders", 0),
+                    "pending_enquiries": r.get("pending_enquiries", 0),
+                    "last_enquiry_at": r.get("last_enquiry_at")
                 }
-            })
+            }
+            for r in rows if r["customer_id"] in clients
+        ]
         
         return {
-            "customers": enriched,
+            "customers": customers,
             "total": total,
             "page": skip // limit + 1,
             "pages": (total + limit - 1) // limit
@@ -887,7 +736,7 @@ async def get_customers_simple(
     try:
         query = {"customer_type": "domestic"}
         if search:
-            query["name"] = Regex(re.escape(search), "i")
+            query["id"] = {"$in": await search_entity_ids(db, "customer", search)}
         
         customers = await db.clients.find(
             query, 
@@ -902,3 +751,22 @@ async def get_customers_simple(
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+# ============== CUSTOMER IDENTITY RESOLUTION ==============
+
+@router.post("/resolve-identities")
+async def resolve_customer_identities(current_user: dict = Depends(require_admin)):
+    """Re-cluster customer name variants and backfill customer_id on related collections (admin only)"""
+    stats = await run_customer_resolution(db)
+    # Merges move enquiries between customers
+    stats["customer_metrics"] = await rebuild_customer_metrics(db)
+    stats["sales_cube"] = await rebuild_sales_cube(db)
+    return {"message": "Customer identities resolved", **stats}
+
+
+@router.get("/resolve-identities/history")
+async def get_customer_resolution_history(limit: int = 10, current_user: dict = Depends(require_admin)):
+    """Recent customer identity resolution runs"""
+    runs = await db.customer_resolution_runs.find({}, {"_id": 0}).sort("run_at", -1).to_list(limit)
+    return {"runs": runs}
@@ -10,11 +10,25 @@ from datetime import datetime, timezone
 import uuid
 
 from core.database import db
-from core.security import get_password_hash, verify_password, create_access_token
+from core.security import get_password_hash, verify_password, create_access_token, require_admin
 from utils.auth import get_current_user
+from utils.indexes import index, register_indexes
+from utils.customer_documents import (
+    REPORT_DOC_TYPES, REPORT_TYPE_ALIASES, ensure_customer_documents, rebuild_all_customer_documents,
+    refresh_customer_documents, customer_document_ids, has_document_access,
+    customer_document_counts, list_customer_documents,
+)
 
 router = APIRouter(prefix="/customer-portal", tags=["Customer Portal"])
 
+register_indexes(__name__, {
+    "shared_documents": [
+        index("id"),
+        index("customer_id", ("shared_at", -1)),
+        index("customer_id", "document_id"),
+    ],
+})
+
 
 # ========== MODELS ==========
 
@@ -179,33 +193,23 @@ async def get_customer_profile(token: str):
 async def get_customer_amcs(token: str):
     """Get all AMCs linked to the customer"""
     customer = await get_current_customer(token)
+    await ensure_customer_documents(db, customer)
     
-    # Find AMCs where customer email or company matches
-    customer_email = customer.get("email", "")
-    customer_company = customer.get("company_name", "")
-    
-    # Also check linked_amcs array
-    linked_amc_ids = customer.get("linked_amcs", [])
-    
-    # Query AMCs
-    query = {
-        "$or": [
-            {"customer_info.email": customer_email},
-            {"customer_info.customer_name": {"$regex": customer_company, "$options": "i"}},
-            {"id": {"$in": linked_amc_ids}}
-        ]
-    }
-    
-    amcs = await db.amcs.find(query, {"_id": 0}).to_list(100)
+    amc_ids = await customer_document_ids(db, customer["id"], "amc_report")
+    amcs = await db.amcs.find({"id": {"$in": amc_ids}}, {"_id": 0}).to_list(None)
     
     # Enrich with project info
+    project_ids = list({amc["project_id"] for amc in amcs if amc.get("project_id")})
+    projects = {
+        p["id"]: p for p in await db.projects.find(
+            {"id": {"$in": project_ids}},
+            {"_id": 0, "id": 1, "project_name": 1, "client": 1, "location": 1}
+        ).to_list(None)
+    }
     for amc in amcs:
-        project = await db.projects.find_one(
-            {"id": amc.get("project_id")},
-            {"_id": 0, "project_name": 1, "client": 1, "location": 1}
-        )
+        project = projects.get(amc.get("project_id"))
         if project:
-            amc["project"] = project
+            amc["project"] = {k: v for k, v in project.items() if k != "id"}
     
     return {
         "amcs": amcs,
@@ -225,20 +229,8 @@ async def get_customer_amc_detail(amc_id: str, token: str):
         raise HTTPException(status_code=404, detail="AMC not found")
     
     # Verify customer has access to this AMC
-    customer_email = customer.get("email", "")
-    customer_company = customer.get("company_name", "")
-    linked_amcs = customer.get("linked_amcs", [])
-    
-    amc_customer_email = amc.get("customer_info", {}).get("email", "")
-    amc_customer_name = amc.get("customer_info", {}).get("customer_name", "")
-    
-    has_access = (
-        amc_customer_email == customer_email or
-        customer_company.lower() in amc_customer_name.lower() or
-        amc_id in linked_amcs
-    )
-    
-    if not has_access:
+    await ensure_customer_documents(db, customer)
+    if not await has_document_access(db, customer["id"], ["amc_report"], amc_id):
         raise HTTPException(status_code=403, detail="Access denied to this AMC")
     
     # Get project details
@@ -263,20 +255,8 @@ async def get_amc_service_history(amc_id: str, token: str):
     if not amc:
         raise HTTPException(status_code=404, detail="AMC not found")
     
-    customer_email = customer.get("email", "")
-    customer_company = customer.get("company_name", "")
-    linked_amcs = customer.get("linked_amcs", [])
-    
-    amc_customer_email = amc.get("customer_info", {}).get("email", "")
-    amc_customer_name = amc.get("customer_info", {}).get("customer_name", "")
-    
-    has_access = (
-        amc_customer_email == customer_email or
-        customer_company.lower() in amc_customer_name.lower() or
-        amc_id in linked_amcs
-    )
-    
-    if not has_access:
+    await ensure_customer_documents(db, customer)
+    if not await has_document_access(db, customer["id"], ["amc_report"], amc_id):
         raise HTTPException(status_code=403, detail="Access denied to this AMC")
     
     # Get service visits
@@ -343,6 +323,7 @@ async def share_document_with_customer(share_data: ShareDocumentRequest, current
     }
     
     await db.shared_documents.insert_one(share_doc)
+    await refresh_customer_documents(db, [share_data.customer_id])
     
     # Optionally create notification for customer
     notification = {
@@ -363,10 +344,11 @@ async def share_document_with_customer(share_data: ShareDocumentRequest, current
 @router.delete("/admin/share-document/{share_id}")
 async def unshare_document(share_id: str, current_user: dict = Depends(get_current_user)):
     """Remove document sharing (Admin only)"""
-    result = await db.shared_documents.delete_one({"id": share_id})
+    share = await db.shared_documents.find_one_and_delete({"id": share_id}, {"_id": 0, "customer_id": 1})
     
-    if result.deleted_count == 0:
+    if not share:
         raise HTTPException(status_code=404, detail="Shared document not found")
+    await refresh_customer_documents(db, [share.get("customer_id")])
     
     return {"message": "Document unshared successfully"}
 
@@ -496,129 +478,45 @@ async def get_customers_list_for_sharing(current_user: dict = Depends(get_curren
 
 
 @router.get("/reports")
-async def get_customer_reports(token: str, report_type: Optional[str] = None):
-    """Get all reports accessible to the customer"""
+async def get_customer_reports(
+    token: str,
+    report_type: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 100
+):
+    """
+    Get reports accessible to the customer, newest first.
+
+    Reads the precomputed customer_document_index (see utils/customer_documents.py).
+
+    Args:
+        report_type: Optional filter (test, ir, calibration, wcc, amc)
+        skip: Number of reports to skip (pagination)
+        limit: Page size (max 500)
+    """
     customer = await get_current_customer(token)
-    customer_id = customer.get("id")
-    
-    # First get customer's AMCs
-    customer_email = customer.get("email", "")
-    customer_company = customer.get("company_name", "")
-    linked_amcs = customer.get("linked_amcs", [])
-    
-    amc_query = {
-        "$or": [
-            {"customer_info.email": customer_email},
-            {"customer_info.customer_name": {"$regex": customer_company, "$options": "i"}},
-            {"id": {"$in": linked_amcs}}
-        ]
-    }
+    await ensure_customer_documents(db, customer)
     
-    amcs = await db.amcs.find(amc_query, {"_id": 0, "service_visits": 1, "project_id": 1}).to_list(100)
-    
-    # Collect all report IDs from service visits
-    test_report_ids = []
-    ir_report_ids = []
-    project_ids = []
-    
-    for amc in amcs:
-        project_ids.append(amc.get("project_id"))
-        for visit in amc.get("service_visits", []):
-            test_report_ids.extend(visit.get("test_report_ids", []))
-            ir_report_ids.extend(visit.get("ir_thermography_report_ids", []))
-    
-    # Get explicitly shared documents for this customer
-    shared_docs = await db.shared_documents.find(
-        {"customer_id": customer_id},
-        {"_id": 0}
-    ).to_list(100)
+    if report_type and report_type not in REPORT_TYPE_ALIASES:
+        raise HTTPException(status_code=400, detail=f"Unknown report type: {report_type}")
+    doc_types = [REPORT_TYPE_ALIASES[report_type]] if report_type else REPORT_DOC_TYPES
     
-    shared_test_ids = [d["document_id"] for d in shared_docs if d.get("document_type") == "test_report"]
-    shared_ir_ids = [d["document_id"] for d in shared_docs if d.get("document_type") == "ir_thermography"]
-    shared_wcc_ids = [d["document_id"] for d in shared_docs if d.get("document_type") == "wcc"]
-    shared_calibration_ids = [d["document_id"] for d in shared_docs if d.get("document_type") == "calibration"]
-    shared_amc_ids = [d["document_id"] for d in shared_docs if d.get("document_type") == "amc_report"]
-    
-    # Merge shared IDs with auto-matched IDs
-    test_report_ids = list(set(test_report_ids + shared_test_ids))
-    ir_report_ids = list(set(ir_report_ids + shared_ir_ids))
-    
-    reports = []
-    
-    # Get test reports
-    if not report_type or report_type == "test":
-        test_reports = await db.test_reports.find(
-            {"$or": [{"id": {"$in": test_report_ids}}, {"project_id": {"$in": project_ids}}]},
-            {"_id": 0}
-        ).to_list(100)
-        for r in test_reports:
-            r["report_category"] = "test_report"
-        reports.extend(test_reports)
-    
-    # Get IR thermography reports
-    if not report_type or report_type == "ir":
-        ir_reports = await db.ir_thermography_reports.find(
-            {"$or": [{"id": {"$in": ir_report_ids}}, {"project_id": {"$in": project_ids}}]},
-            {"_id": 0}
-        ).to_list(100)
-        for r in ir_reports:
-            r["report_category"] = "ir_thermography"
-        reports.extend(ir_reports)
-    
-    # Get calibration certificates
-    if not report_type or report_type == "calibration":
-        calibration_query = {"$or": [{"project_id": {"$in": project_ids}}]}
-        if shared_calibration_ids:
-            calibration_query["$or"].append({"id": {"$in": shared_calibration_ids}})
-        calibration_reports = await db.calibration_reports.find(
-            calibration_query,
-            {"_id": 0}
-        ).to_list(100)
-        for r in calibration_reports:
-            r["report_category"] = "calibration"
-        reports.extend(calibration_reports)
-    
-    # Get WCC (Work Completion Certificates)
-    if not report_type or report_type == "wcc":
-        wcc_query = {"$or": [{"project_id": {"$in": project_ids}}]}
-        if shared_wcc_ids:
-            wcc_query["$or"].append({"id": {"$in": shared_wcc_ids}})
-        wccs = await db.work_completion_certificates.find(
-            wcc_query,
-            {"_id": 0}
-        ).to_list(100)
-        for r in wccs:
-            r["report_category"] = "wcc"
-        reports.extend(wccs)
-    
-    # Get AMC Reports
-    if not report_type or report_type == "amc":
-        amc_report_query = {"$or": []}
-        if project_ids:
-            amc_report_query["$or"].append({"project_id": {"$in": project_ids}})
-        if shared_amc_ids:
-            amc_report_query["$or"].append({"id": {"$in": shared_amc_ids}})
-        if linked_amcs:
-            amc_report_query["$or"].append({"id": {"$in": linked_amcs}})
-        
-        # Only query if we have conditions
-        if amc_report_query["$or"]:
-            amc_reports = await db.amcs.find(
-                amc_report_query,
-                {"_id": 0, "id": 1, "amc_no": 1, "customer_name": 1, "customer_info": 1, 
-                 "contract_details": 1, "project_id": 1, "created_at": 1}
-            ).to_list(100)
-            for r in amc_reports:
-                r["report_category"] = "amc_report"
-                r["report_no"] = r.get("amc_no", "")
-                # Get customer name from customer_info if not directly available
-                if not r.get("customer_name"):
-                    r["customer_name"] = r.get("customer_info", {}).get("customer_name", "")
-            reports.extend(amc_reports)
+    page = await list_customer_documents(
+        db, customer["id"], doc_types, skip=max(skip, 0), limit=max(1, min(limit, 500))
+    )
+    reports = page["items"]
+    for r in reports:
+        if r["report_category"] == "amc_report":
+            r["report_no"] = r.get("amc_no", "")
+            # Get customer name from customer_info if not directly available
+            if not r.get("customer_name"):
+                r["customer_name"] = r.get("customer_info", {}).get("customer_name", "")
     
     return {
         "reports": reports,
-        "total": len(reports)
+        "total": page["total"],
+        "skip": skip,
+        "limit": limit
     }
 
 
@@ -626,39 +524,23 @@ async def get_customer_reports(token: str, report_type: Optional[str] = None):
 async def get_customer_report_detail(report_id: str, token: str, report_type: str = "test"):
     """Get detailed report information"""
     customer = await get_current_customer(token)
-    
-    # Get customer's project IDs
-    customer_email = customer.get("email", "")
-    customer_company = customer.get("company_name", "")
-    linked_amcs = customer.get("linked_amcs", [])
-    
-    amc_query = {
-        "$or": [
-            {"customer_info.email": customer_email},
-            {"customer_info.customer_name": {"$regex": customer_company, "$options": "i"}},
-            {"id": {"$in": linked_amcs}}
-        ]
-    }
-    
-    amcs = await db.amcs.find(amc_query, {"_id": 0, "project_id": 1}).to_list(100)
-    project_ids = [a.get("project_id") for a in amcs]
+    await ensure_customer_documents(db, customer)
     
     # Find the report based on type
-    report = None
     collection_map = {
-        "test": "test_reports",
-        "ir": "ir_thermography_reports",
-        "calibration": "calibration_reports"
+        "test": ("test_reports", "test_report"),
+        "ir": ("ir_thermography_reports", "ir_thermography"),
+        "calibration": ("calibration_reports", "calibration")
     }
     
-    collection_name = collection_map.get(report_type, "test_reports")
+    collection_name, doc_type = collection_map.get(report_type, collection_map["test"])
     report = await db[collection_name].find_one({"id": report_id}, {"_id": 0})
     
     if not report:
         raise HTTPException(status_code=404, detail="Report not found")
     
     # Verify access
-    if report.get("project_id") not in project_ids:
+    if not await has_document_access(db, customer["id"], [doc_type], report_id):
         raise HTTPException(status_code=403, detail="Access denied to this report")
     
     return report
@@ -670,30 +552,42 @@ async def get_customer_report_detail(report_id: str, token: str, report_type: st
 async def get_customer_dashboard(token: str):
     """Get customer dashboard summary"""
     customer = await get_current_customer(token)
+    await ensure_customer_documents(db, customer)
     
-    customer_email = customer.get("email", "")
-    customer_company = customer.get("company_name", "")
-    linked_amcs = customer.get("linked_amcs", [])
-    
-    amc_query = {
-        "$or": [
-            {"customer_info.email": customer_email},
-            {"customer_info.customer_name": {"$regex": customer_company, "$options": "i"}},
-            {"id": {"$in": linked_amcs}}
-        ]
-    }
+    # AMC status counts come straight from the index
+    amc_entries = await db.customer_document_index.find(
+        {"customer_id": customer["id"], "doc_type": "amc_report"},
+        {"_id": 0, "doc_id": 1, "status": 1}
+    ).to_list(None)
     
-    # Get AMC stats
-    amcs = await db.amcs.find(amc_query, {"_id": 0}).to_list(100)
+    total_amcs = len(amc_entries)
+    active_amcs = sum(1 for a in amc_entries if a.get("status") == "active")
+    expired_amcs = sum(1 for a in amc_entries if a.get("status") == "expired")
     
-    total_amcs = len(amcs)
-    active_amcs = sum(1 for a in amcs if a.get("status") == "active")
-    expired_amcs = sum(1 for a in amcs if a.get("status") == "expired")
+    upcoming_visits = await _upcoming_visits(customer["id"])
+    counts = await customer_document_counts(db, customer["id"])
     
-    # Get upcoming service visits
+    return {
+        "total_amcs": total_amcs,
+        "active_amcs": active_amcs,
+        "expired_amcs": expired_amcs,
+        "upcoming_visits": upcoming_visits,
+        "recent_reports_count": counts.get("test_report", 0),
+        "customer_name": customer.get("name"),
+        "company_name": customer.get("company_name")
+    }
+
+
+async def _upcoming_visits(customer_id: str, limit: int = 5) -> List[dict]:
+    """Next scheduled service visits across the customer's AMCs"""
     today = datetime.now().strftime("%Y-%m-%d")
-    upcoming_visits = []
+    amc_ids = await customer_document_ids(db, customer_id, "amc_report")
+    amcs = await db.amcs.find(
+        {"id": {"$in": amc_ids}},
+        {"_id": 0, "id": 1, "amc_no": 1, "service_visits": 1}
+    ).to_list(None)
     
+    upcoming_visits = []
     for amc in amcs:
         for visit in amc.get("service_visits", []):
             if visit.get("status") == "scheduled" and visit.get("visit_date", "") >= today:
@@ -706,23 +600,7 @@ async def get_customer_dashboard(token: str):
     
     # Sort by date
     upcoming_visits.sort(key=lambda x: x.get("visit_date", ""))
-    upcoming_visits = upcoming_visits[:5]
-    
-    # Count recent reports
-    project_ids = [a.get("project_id") for a in amcs]
-    recent_reports_count = await db.test_reports.count_documents({
-        "project_id": {"$in": project_ids}
-    })
-    
-    return {
-        "total_amcs": total_amcs,
-        "active_amcs": active_amcs,
-        "expired_amcs": expired_amcs,
-        "upcoming_visits": upcoming_visits,
-        "recent_reports_count": recent_reports_count,
-        "customer_name": customer.get("name"),
-        "company_name": customer.get("company_name")
-    }
+    return upcoming_visits[:limit]
 
 
 # ========== ADMIN ROUTES (For linking customers) ==========
@@ -758,6 +636,7 @@ async def admin_link_amc_to_customer(data: dict):
         {"id": customer_id},
         {"$addToSet": {"linked_amcs": amc_id}}
     )
+    await refresh_customer_documents(db, [customer_id])
     
     return {"message": "AMC linked successfully"}
 
@@ -776,46 +655,38 @@ async def admin_unlink_amc_from_customer(data: dict):
         {"id": customer_id},
         {"$pull": {"linked_amcs": amc_id}}
     )
+    await refresh_customer_documents(db, [customer_id])
     
     return {"message": "AMC unlinked successfully"}
 
 
+@router.post("/admin/rebuild-document-index")
+async def admin_rebuild_document_index(customer_id: Optional[str] = None, current_user: dict = Depends(require_admin)):
+    """Admin: Rebuild the customer document index for one customer or all customers"""
+    if customer_id:
+        await refresh_customer_documents(db, [customer_id])
+        return {"message": "Document index rebuilt", "customers": 1}
+    count = await rebuild_all_customer_documents(db)
+    return {"message": "Document index rebuilt", "customers": count}
+
+
 # ========== HELPER: GET CUSTOMER'S PROJECT IDS ==========
 
 async def get_customer_project_ids(customer: dict) -> List[str]:
-    """Get all project IDs accessible to a customer"""
-    project_ids = []
-    
-    # Method 1: Directly linked projects (from Customer Hub)
-    linked_projects = customer.get("linked_projects", [])
-    project_ids.extend(linked_projects)
-    
-    # Method 2: Projects from linked AMCs
-    linked_amcs = customer.get("linked_amcs", [])
-    if linked_amcs:
-        amcs = await db.amcs.find({"id": {"$in": linked_amcs}}, {"_id": 0, "project_id": 1}).to_list(100)
-        for amc in amcs:
-            if amc.get("project_id") and amc["project_id"] not in project_ids:
-                project_ids.append(amc["project_id"])
-    
-    # Method 3: Auto-match by company name
-    customer_company = customer.get("company_name", "")
-    if customer_company:
-        matching_projects = await db.projects.find(
-            {"client": {"$regex": customer_company, "$options": "i"}},
-            {"_id": 0, "id": 1}
-        ).to_list(200)
-        for p in matching_projects:
-            if p["id"] not in project_ids:
-                project_ids.append(p["id"])
-    
-    return project_ids
+    """
+    Get all project IDs accessible to a customer.
+
+    Hub-linked projects, projects of linked AMCs and projects of the same
+    canonical customer, as recorded in the customer document index.
+    """
+    await ensure_customer_documents(db, customer)
+    return await customer_document_ids(db, customer["id"], "project")
 
 
 # ========== WCC (WORK COMPLETION CERTIFICATES) ==========
 
 @router.get("/wcc")
-async def get_customer_wcc(token: str):
+async def get_customer_wcc(token: str, skip: int = 0, limit: int = 100):
     """Get all Work Completion Certificates for customer's projects"""
     customer = await get_current_customer(token)
     
@@ -824,31 +695,24 @@ async def get_customer_wcc(token: str):
     if "wcc" not in doc_access:
         raise HTTPException(status_code=403, detail="WCC access not enabled for this account")
     
-    project_ids = await get_customer_project_ids(customer)
-    
-    if not project_ids:
-        return {"wcc": [], "total": 0}
-    
-    wccs = await db.work_completion_certificates.find(
-        {"project_id": {"$in": project_ids}},
-        {"_id": 0}
-    ).sort("created_at", -1).to_list(100)
+    await ensure_customer_documents(db, customer)
+    page = await list_customer_documents(db, customer["id"], ["wcc"], skip=max(skip, 0), limit=max(1, min(limit, 500)))
     
-    return {"wcc": wccs, "total": len(wccs)}
+    return {"wcc": page["items"], "total": page["total"]}
 
 
 @router.get("/wcc/{wcc_id}")
 async def get_customer_wcc_detail(wcc_id: str, token: str):
     """Get detailed WCC information"""
     customer = await get_current_customer(token)
-    project_ids = await get_customer_project_ids(customer)
+    await ensure_customer_documents(db, customer)
     
     wcc = await db.work_completion_certificates.find_one({"id": wcc_id}, {"_id": 0})
     
     if not wcc:
         raise HTTPException(status_code=404, detail="WCC not found")
     
-    if wcc.get("project_id") not in project_ids:
+    if not await has_document_access(db, customer["id"], ["wcc"], wcc_id):
         raise HTTPException(status_code=403, detail="Access denied to this WCC")
     
     return wcc
@@ -993,62 +857,46 @@ async def get_project_progress(project_id: str, token: str):
 async def get_customer_dashboard_full(token: str):
     """Get full customer dashboard with all stats"""
     customer = await get_current_customer(token)
-    project_ids = await get_customer_project_ids(customer)
+    await ensure_customer_documents(db, customer)
+    customer_id = customer["id"]
     
-    # Count documents
-    amc_count = await db.amcs.count_documents({"project_id": {"$in": project_ids}}) if project_ids else 0
-    active_amcs = await db.amcs.count_documents({"project_id": {"$in": project_ids}, "status": "active"}) if project_ids else 0
-    wcc_count = await db.work_completion_certificates.count_documents({"project_id": {"$in": project_ids}}) if project_ids else 0
-    report_count = await db.test_reports.count_documents({"project_id": {"$in": project_ids}}) if project_ids else 0
+    # Count documents from one indexed scan of the customer's entries
+    counts = await customer_document_counts(db, customer_id)
+    status_rows = await db.customer_document_index.aggregate([
+        {"$match": {"customer_id": customer_id, "doc_type": {"$in": ["project", "amc_report"]}}},
+        {"$group": {"_id": {"doc_type": "$doc_type", "status": "$status"}, "count": {"$sum": 1}}}
+    ]).to_list(None)
+    by_status = {(row["_id"]["doc_type"], row["_id"].get("status")): row["count"] for row in status_rows}
     
     # Projects summary
-    projects = []
-    if project_ids:
-        projects = await db.projects.find(
-            {"id": {"$in": project_ids}},
-            {"_id": 0, "id": 1, "pid_no": 1, "project_name": 1, "status": 1, "completion_percentage": 1}
-        ).to_list(10)
-    
-    ongoing_projects = sum(1 for p in projects if p.get("status") == "Ongoing")
-    completed_projects = sum(1 for p in projects if p.get("status") == "Completed")
-    
-    # Upcoming service visits from AMCs
-    today = datetime.now().strftime("%Y-%m-%d")
-    upcoming_visits = []
-    
-    if project_ids:
-        amcs = await db.amcs.find(
-            {"project_id": {"$in": project_ids}},
-            {"_id": 0, "id": 1, "amc_no": 1, "service_visits": 1}
-        ).to_list(100)
-        
-        for amc in amcs:
-            for visit in amc.get("service_visits", []):
-                if visit.get("status") == "scheduled" and visit.get("visit_date", "") >= today:
-                    upcoming_visits.append({
-                        "amc_id": amc.get("id"),
-                        "amc_no": amc.get("amc_no"),
-                        "visit_date": visit.get("visit_date"),
-                        "visit_type": visit.get("visit_type")
-                    })
-        
-        upcoming_visits.sort(key=lambda x: x.get("visit_date", ""))
-        upcoming_visits = upcoming_visits[:5]
+    recent = await list_customer_documents(db, customer_id, ["project"], limit=5, hydrate=False)
+    projects = [
+        {"id": e["doc_id"], "title": e.get("title"), "status": e.get("status"), "date": e.get("date")}
+        for e in recent["items"]
+    ]
+    if projects:
+        details = {
+            p["id"]: p for p in await db.projects.find(
+                {"id": {"$in": [p["id"] for p in projects]}},
+                {"_id": 0, "id": 1, "pid_no": 1, "project_name": 1, "status": 1, "completion_percentage": 1}
+            ).to_list(5)
+        }
+        projects = [details[p["id"]] for p in projects if p["id"] in details]
     
     return {
         "customer_name": customer.get("name"),
         "company_name": customer.get("company_name"),
         "stats": {
-            "total_projects": len(project_ids),
-            "ongoing_projects": ongoing_projects,
-            "completed_projects": completed_projects,
-            "total_amcs": amc_count,
-            "active_amcs": active_amcs,
-            "total_wcc": wcc_count,
-            "total_reports": report_count
+            "total_projects": counts.get("project", 0),
+            "ongoing_projects": by_status.get(("project", "Ongoing"), 0),
+            "completed_projects": by_status.get(("project", "Completed"), 0),
+            "total_amcs": counts.get("amc_report", 0),
+            "active_amcs": by_status.get(("amc_report", "active"), 0),
+            "total_wcc": counts.get("wcc", 0),
+            "total_reports": counts.get("test_report", 0)
         },
-        "recent_projects": projects[:5],
-        "upcoming_visits": upcoming_visits,
+        "recent_projects": projects,
+        "upcoming_visits": await _upcoming_visits(customer_id),
         "document_access": customer.get("document_access", ["amc", "wcc", "test_reports", "service_reports", "projects"])
     }
 
@@ -1096,39 +944,9 @@ async def download_test_report_pdf(report_id: str, token: str):
     """Download test report PDF for customer portal"""
     customer = await get_current_customer(token)
     
-    # Check if customer has access to this report (via shared_documents or linked AMCs)
-    shared_doc = await db.shared_documents.find_one({
-        "customer_id": customer["id"],
-        "document_type": "test_report",
-        "document_id": report_id
-    })
-    
-    # Also check if report is linked via AMC
-    has_access = shared_doc is not None
-    
-    if not has_access:
-        # Check if report is part of customer's AMC service visits
-        customer_email = customer.get("email", "")
-        customer_company = customer.get("company_name", "")
-        linked_amcs = customer.get("linked_amcs", [])
-        
-        amcs = await db.amcs.find({
-            "$or": [
-                {"customer_info.email": customer_email},
-                {"customer_info.customer_name": {"$regex": customer_company, "$options": "i"}},
-                {"id": {"$in": linked_amcs}}
-            ]
-        }).to_list(100)
-        
-        for amc in amcs:
-            for visit in amc.get("service_visits", []):
-                if report_id in visit.get("test_report_ids", []):
-                    has_access = True
-                    break
-            if has_access:
-                break
-    
-    if not has_access:
+    # Check access (shared, attached to an AMC visit or on one of the customer's projects)
+    await ensure_customer_documents(db, customer)
+    if not await has_document_access(db, customer["id"], ["test_report"], report_id):
         raise HTTPException(status_code=403, detail="Access denied to this report")
     
     # Get the report
@@ -1161,31 +979,8 @@ async def download_amc_report_pdf(report_id: str, token: str):
     customer = await get_current_customer(token)
     
     # Check access
-    shared_doc = await db.shared_documents.find_one({
-        "customer_id": customer["id"],
-        "document_type": "amc_report",
-        "document_id": report_id
-    })
-    
-    has_access = shared_doc is not None
-    
-    if not has_access:
-        # Check if AMC belongs to customer
-        customer_email = customer.get("email", "")
-        customer_company = customer.get("company_name", "")
-        linked_amcs = customer.get("linked_amcs", [])
-        
-        amc = await db.amcs.find_one({
-            "id": report_id,
-            "$or": [
-                {"customer_info.email": customer_email},
-                {"customer_info.customer_name": {"$regex": customer_company, "$options": "i"}},
-                {"id": {"$in": linked_amcs}}
-            ]
-        })
-        has_access = amc is not None
-    
-    if not has_access:
+    await ensure_customer_documents(db, customer)
+    if not await has_document_access(db, customer["id"], ["amc_report"], report_id):
         raise HTTPException(status_code=403, detail="Access denied to this report")
     
     # Use the AMC PDF generator
@@ -1206,13 +1001,8 @@ async def download_ir_thermography_pdf(report_id: str, token: str):
     customer = await get_current_customer(token)
     
     # Check access
-    shared_doc = await db.shared_documents.find_one({
-        "customer_id": customer["id"],
-        "document_type": "ir_thermography", 
-        "document_id": report_id
-    })
-    
-    if not shared_doc:
+    await ensure_customer_documents(db, customer)
+    if not await has_document_access(db, customer["id"], ["ir_thermography"], report_id):
         raise HTTPException(status_code=403, detail="Access denied to this report")
     
     # Get the report and generate PDF
@@ -1238,13 +1028,8 @@ async def download_wcc_pdf(report_id: str, token: str):
     customer = await get_current_customer(token)
     
     # Check access
-    shared_doc = await db.shared_documents.find_one({
-        "customer_id": customer["id"],
-        "document_type": "wcc",
-        "document_id": report_id
-    })
-    
-    if not shared_doc:
+    await ensure_customer_documents(db, customer)
+    if not await has_document_access(db, customer["id"], ["wcc"], report_id):
         raise HTTPException(status_code=403, detail="Access denied to this report")
     
     # Get WCC and generate PDF
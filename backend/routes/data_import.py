@@ -2,11 +2,17 @@
 Data Import API for migrating data from preview to production
 This is a one-time use endpoint for importing exported data
 """
-from fastapi import APIRouter, HTTPException, Depends, UploadFile, File
-from typing import List, Dict, Any
+from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Request
+from fastapi.responses import StreamingResponse
+from typing import List, Dict, Any, Optional
+from datetime import datetime, timezone
 import json
 import os
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import InsertOne, ReplaceOne
+from pymongo.errors import BulkWriteError
+
+from utils.ndjson import iter_ndjson_lines, decode_line, StreamEncoder
 
 router = APIRouter(prefix="/api/data-import", tags=["Data Import"])
 
@@ -20,12 +26,28 @@ db = client[DB_NAME]
 # Secret key for import authorization (change this in production!)
 IMPORT_SECRET_KEY = os.environ.get("DATA_IMPORT_KEY", "smarthub-enerzia-import-2026")
 
+# Documents per write for batched and streaming imports
+IMPORT_BATCH_SIZE = 1000
+MAX_STREAM_BATCH_SIZE = 10000
+
 async def verify_import_key(key: str):
     """Verify the import authorization key"""
     if key != IMPORT_SECRET_KEY:
         raise HTTPException(status_code=403, detail="Invalid import authorization key")
     return True
 
+async def insert_in_batches(collection, documents: List[Dict[Any, Any]]) -> int:
+    """Insert documents in fixed-size unordered batches, dropping their _id"""
+    inserted_count = 0
+    for start in range(0, len(documents), IMPORT_BATCH_SIZE):
+        batch = documents[start:start + IMPORT_BATCH_SIZE]
+        # Remove _id fields to let MongoDB generate new ones
+        for doc in batch:
+            doc.pop('_id', None)
+        result = await collection.insert_many(batch, ordered=False)
+        inserted_count += len(result.inserted_ids)
+    return inserted_count
+
 @router.post("/collection/{collection_name}")
 async def import_collection(
     collection_name: str,
@@ -55,16 +77,7 @@ async def import_collection(
             deleted_count = 0
         
         # Insert new data
-        if data:
-            # Remove _id fields to let MongoDB generate new ones
-            for doc in data:
-                if '_id' in doc:
-                    del doc['_id']
-            
-            result = await collection.insert_many(data)
-            inserted_count = len(result.inserted_ids)
-        else:
-            inserted_count = 0
+        inserted_count = await insert_in_batches(collection, data)
         
         return {
             "success": True,
@@ -106,16 +119,7 @@ async def import_bulk(
                 deleted_count = 0
             
             # Insert new data
-            if documents:
-                # Remove _id fields to let MongoDB generate new ones
-                for doc in documents:
-                    if '_id' in doc:
-                        del doc['_id']
-                
-                result = await collection.insert_many(documents)
-                inserted_count = len(result.inserted_ids)
-            else:
-                inserted_count = 0
+            inserted_count = await insert_in_batches(collection, documents)
             
             results[collection_name] = {
                 "success": True,
@@ -154,3 +158,178 @@ async def get_import_status():
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get status: {str(e)}")
+
+
+# ==================== STREAMING NDJSON IMPORT / EXPORT ====================
+
+async def _write_stream_batch(collection, batch: List[dict], upsert: bool) -> Dict[str, Any]:
+    """Write one batch, replacing by `id` when upserting; returns counters and write errors"""
+    if upsert:
+        operations = [
+            ReplaceOne({"id": doc["id"]}, doc, upsert=True) if doc.get("id") else InsertOne(doc)
+            for doc in batch
+        ]
+    else:
+        operations = [InsertOne(doc) for doc in batch]
+    
+    try:
+        result = await collection.bulk_write(operations, ordered=False)
+        details = result.bulk_api_result
+    except BulkWriteError as e:
+        details = e.details or {}
+    return {
+        "inserted": details.get("nInserted", 0),
+        "upserted": details.get("nUpserted", 0),
+        "replaced": details.get("nModified", 0),
+        "errors": [w.get("errmsg", "Write failed") for w in details.get("writeErrors", [])],
+    }
+
+
+@router.post("/stream/{collection_name}")
+async def stream_import_collection(
+    collection_name: str,
+    request: Request,
+    key: str,
+    upsert: bool = False,
+    offset: int = 0,
+    batch_size: int = IMPORT_BATCH_SIZE,
+    gzip: bool = False,
+    import_id: Optional[str] = None,
+    clear_existing: bool = False
+):
+    """
+    Stream NDJSON documents into a collection with bounded memory
+    
+    The request body is read incrementally and written in batches of
+    `batch_size`; the next chunk is only read once the previous batch is
+    stored, so a fast client cannot outrun the database.
+    
+    Args:
+        collection_name: Name of the MongoDB collection
+        key: Authorization key for import
+        upsert: Replace documents with the same `id` instead of inserting duplicates
+        offset: Byte offset in the source file where this body starts (for resumed uploads)
+        batch_size: Documents per write
+        gzip: Body is gzip-compressed (also honoured via Content-Encoding: gzip)
+        import_id: Optional id under which progress is recorded after every batch
+        clear_existing: If True, delete all existing documents before import (ignored when resuming)
+    """
+    await verify_import_key(key)
+    batch_size = max(1, min(batch_size, MAX_STREAM_BATCH_SIZE))
+    gzip = gzip or request.headers.get("content-encoding", "").lower() == "gzip"
+    collection = db[collection_name]
+    
+    deleted_count = 0
+    if clear_existing and offset == 0:
+        deleted_count = (await collection.delete_many({})).deleted_count
+    
+    totals = {"inserted": 0, "upserted": 0, "replaced": 0}
+    errors = []
+    committed_offset = offset
+    batch: List[dict] = []
+    batch_end = offset
+    
+    async def flush():
+        nonlocal batch, committed_offset
+        if not batch:
+            return
+        outcome = await _write_stream_batch(collection, batch, upsert)
+        for field in totals:
+            totals[field] += outcome[field]
+        errors.extend(outcome["errors"][:10])
+        committed_offset = batch_end
+        batch = []
+        if import_id:
+            await db.data_import_progress.update_one(
+                {"import_id": import_id},
+                {"$set": {
+                    "import_id": import_id,
+                    "collection": collection_name,
+                    "committed_offset": committed_offset,
+                    "totals": totals,
+                    "updated_at": datetime.now(timezone.utc).isoformat()
+                }},
+                upsert=True
+            )
+    
+    try:
+        async for line_no, line, end_offset in iter_ndjson_lines(request.stream(), gzip=gzip):
+            try:
+                doc = decode_line(line)
+            except ValueError as e:
+                errors.append(f"Line {line_no}: invalid JSON ({e})")
+                continue
+            if not isinstance(doc, dict):
+                errors.append(f"Line {line_no}: expected a JSON object")
+                continue
+            doc.pop("_id", None)
+            batch.append(doc)
+            batch_end = offset + end_offset
+            if len(batch) >= batch_size:
+                await flush()
+        await flush()
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Import failed after offset {committed_offset}: {str(e)}"
+        )
+    
+    return {
+        "success": True,
+        "collection": collection_name,
+        "deleted_count": deleted_count,
+        "inserted_count": totals["inserted"] + totals["upserted"],
+        "replaced_count": totals["replaced"],
+        "committed_offset": committed_offset,
+        "errors": errors[:50] if errors else None
+    }
+
+
+@router.get("/stream/progress/{import_id}")
+async def get_stream_import_progress(import_id: str, key: str):
+    """Get the last committed byte offset of a streaming import, for resuming"""
+    await verify_import_key(key)
+    progress = await db.data_import_progress.find_one({"import_id": import_id}, {"_id": 0})
+    if not progress:
+        raise HTTPException(status_code=404, detail="No progress recorded for this import")
+    return progress
+
+
+@router.get("/stream/{collection_name}/export")
+async def stream_export_collection(
+    collection_name: str,
+    key: str,
+    gzip: bool = False,
+    batch_size: int = IMPORT_BATCH_SIZE
+):
+    """
+    Stream a collection out as NDJSON (optionally gzip), one cursor batch at a time
+    """
+    await verify_import_key(key)
+    batch_size = max(1, min(batch_size, MAX_STREAM_BATCH_SIZE))
+    collection = db[collection_name]
+    
+    async def generate():
+        encoder = StreamEncoder(gzip=gzip)
+        cursor = collection.find({}, {"_id": 0}).batch_size(batch_size)
+        batch = []
+        async for doc in cursor:
+            batch.append(doc)
+            if len(batch) >= batch_size:
+                chunk = encoder.encode(batch)
+                batch = []
+                if chunk:
+                    yield chunk
+        chunk = encoder.encode(batch)
+        if chunk:
+            yield chunk
+        tail = encoder.finish()
+        if tail:
+            yield tail
+    
+    extension = "ndjson.gz" if gzip else "ndjson"
+    return StreamingResponse(
+        generate(),
+        media_type="application/gzip" if gzip else "application/x-ndjson",
+        headers={"Content-Disposition": f"attachment; filename={collection_name}.{extension}"}
+    )
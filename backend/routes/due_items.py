@@ -0,0 +1,70 @@
+"""
+Due Items Routes
+Cross-contract view of upcoming inspections, meter calibrations and AMC
+service visits backed by the due_items collection (see utils/due_items.py).
+"""
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+
+from core.database import db
+from core.security import require_auth, require_admin
+from utils.due_items import DUE_SOURCES, due_summary, due_within, rebuild_due_items
+
+router = APIRouter(prefix="/api/due-items", tags=["Due-Items"])
+
+
+def _parse_kinds(kinds: Optional[str]):
+    if not kinds:
+        return None
+    parsed = [k.strip() for k in kinds.split(",") if k.strip()]
+    unknown = [k for k in parsed if k not in DUE_SOURCES]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown due item kinds: {', '.join(unknown)}")
+    return parsed
+
+
+@router.get("")
+async def get_due_items(
+    days: int = 30,
+    kinds: Optional[str] = None,
+    customer_id: Optional[str] = None,
+    include_overdue: bool = True,
+    skip: int = 0,
+    limit: int = 100,
+    current_user: dict = Depends(require_auth)
+):
+    """
+    Items due in the next `days` days across every contract, soonest first.
+
+    Args:
+        days: Horizon in days from today (inclusive)
+        kinds: Optional comma-separated kinds (inspection, calibration, amc_visit)
+        customer_id: Restrict to one customer
+        include_overdue: Include items whose due date has already passed
+    """
+    if days < 0:
+        raise HTTPException(status_code=400, detail="days must not be negative")
+    limit = max(1, min(limit, 500))
+    return await due_within(
+        db, days, _parse_kinds(kinds), customer_id=customer_id,
+        include_overdue=include_overdue, skip=max(0, skip), limit=limit
+    )
+
+
+@router.get("/summary")
+async def get_due_summary(
+    days_ahead: int = 30,
+    kind: Optional[str] = None,
+    current_user: dict = Depends(require_auth)
+):
+    """Overdue, today, week, month and horizon counts"""
+    kinds = _parse_kinds(kind)
+    return await due_summary(db, kinds[0] if kinds else None, days_ahead)
+
+
+@router.post("/rebuild")
+async def rebuild_due_index(kinds: Optional[str] = None, current_user: dict = Depends(require_admin)):
+    """Regenerate due items from the source collections (admin only)"""
+    counts = await rebuild_due_items(db, _parse_kinds(kinds))
+    return {"message": "Due items rebuilt", "indexed": counts}
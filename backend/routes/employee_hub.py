@@ -14,12 +14,25 @@ router = APIRouter(prefix="/api/employee", tags=["Employee Hub"])
 
 # MongoDB connection
 from motor.motor_asyncio import AsyncIOMotorClient
+from utils.approvals import Transition, Workflow, apply_transition
+from utils.indexes import index, register_indexes
 
 MONGO_URL = os.environ.get("MONGO_URL")
 DB_NAME = os.environ.get("DB_NAME", "enerzia_erp")
 client = AsyncIOMotorClient(MONGO_URL)
 db = client[DB_NAME]
 
+register_indexes(__name__, {
+    "attendance": [
+        index("user_id", "date"),
+    ],
+    "leave_requests": [
+        index("user_id", "status", ("applied_on", -1)),
+        index("emp_id", ("applied_on", -1)),
+        index("status", ("applied_on", -1)),
+    ],
+})
+
 
 # ============= MODELS =============
 
@@ -149,6 +162,48 @@ def serialize_doc(doc):
     return doc
 
 
+# ============= APPROVAL WORKFLOWS =============
+# Requests are matched by ObjectId or by their string id; only pending
+# requests can be approved or rejected
+
+def _request_workflow(collection: str, label: str) -> Workflow:
+    return Workflow(
+        collection=collection,
+        label=label,
+        id_fields=("_id", "id"),
+        notify_department="HR",
+        transitions={
+            "approve": Transition("approved", ("pending",), "approved_by", "approved_at"),
+            "reject": Transition("rejected", ("pending",), "approved_by", "rejected_at"),
+        },
+    )
+
+
+REQUEST_WORKFLOWS = {
+    "permission": _request_workflow("permission_requests", "permission request"),
+    "transport": _request_workflow("transport_requests", "transport request"),
+    "leave": _request_workflow("leave_requests", "leave request"),
+    "expenses": _request_workflow("expense_claims", "expense claim"),
+}
+
+
+class BulkRequestAction(BaseModel):
+    request_type: str  # permission, transport, leave, expenses
+    action: str  # approve, reject
+    ids: List[str]
+    approved_by: str
+
+
+async def transition_request(request_type: str, request_id: str, action: str, approved_by: str,
+                             not_found_detail: str, extra: Optional[dict] = None):
+    """Approve or reject one pending request, raising 404 when none matched"""
+    result = await apply_transition(
+        db, REQUEST_WORKFLOWS[request_type], [request_id], action, actor=approved_by, extra=extra
+    )
+    if not result.succeeded:
+        raise HTTPException(status_code=404, detail=not_found_detail)
+
+
 # ============= ADVANCE REQUEST MODELS =============
 # Employee requests advance → Finance approves → Finance records payment
 # Pooled balance system - carries forward until used
@@ -352,46 +407,14 @@ async def create_permission_request(request: PermissionRequest, user_id: str, us
 @router.put("/permission/{request_id}/approve")
 async def approve_permission_request(request_id: str, approved_by: str):
     """Approve a permission request - handles both ObjectId and string id formats"""
-    result = None
-    try:
-        result = await db.permission_requests.update_one(
-            {"_id": ObjectId(request_id), "status": "pending"},
-            {"$set": {"status": "approved", "approved_by": approved_by, "approved_at": datetime.now(timezone.utc).isoformat()}}
-        )
-    except Exception:
-        pass
-    
-    if not result or result.modified_count == 0:
-        result = await db.permission_requests.update_one(
-            {"id": request_id, "status": "pending"},
-            {"$set": {"status": "approved", "approved_by": approved_by, "approved_at": datetime.now(timezone.utc).isoformat()}}
-        )
-    
-    if not result or result.modified_count == 0:
-        raise HTTPException(status_code=404, detail="Request not found or already processed")
+    await transition_request("permission", request_id, "approve", approved_by, "Request not found or already processed")
     return {"message": "Request approved"}
 
 
 @router.put("/permission/{request_id}/reject")
 async def reject_permission_request(request_id: str, approved_by: str):
     """Reject a permission request - handles both ObjectId and string id formats"""
-    result = None
-    try:
-        result = await db.permission_requests.update_one(
-            {"_id": ObjectId(request_id), "status": "pending"},
-            {"$set": {"status": "rejected", "approved_by": approved_by, "rejected_at": datetime.now(timezone.utc).isoformat()}}
-        )
-    except Exception:
-        pass
-    
-    if not result or result.modified_count == 0:
-        result = await db.permission_requests.update_one(
-            {"id": request_id, "status": "pending"},
-            {"$set": {"status": "rejected", "approved_by": approved_by, "rejected_at": datetime.now(timezone.utc).isoformat()}}
-        )
-    
-    if not result or result.modified_count == 0:
-        raise HTTPException(status_code=404, detail="Request not found or already processed")
+    await transition_request("permission", request_id, "reject", approved_by, "Request not found or already processed")
     return {"message": "Request rejected"}
 
 
@@ -435,50 +458,17 @@ async def create_transport_request(request: TransportRequest, user_id: str, user
 @router.put("/transport/{request_id}/approve")
 async def approve_transport_request(request_id: str, approved_by: str, vehicle: Optional[str] = None):
     """Approve a transport request - handles both ObjectId and string id formats"""
-    update_data = {"status": "approved", "approved_by": approved_by, "approved_at": datetime.now(timezone.utc).isoformat()}
-    if vehicle:
-        update_data["vehicle"] = vehicle
-    
-    result = None
-    try:
-        result = await db.transport_requests.update_one(
-            {"_id": ObjectId(request_id), "status": "pending"},
-            {"$set": update_data}
-        )
-    except Exception:
-        pass
-    
-    if not result or result.modified_count == 0:
-        result = await db.transport_requests.update_one(
-            {"id": request_id, "status": "pending"},
-            {"$set": update_data}
-        )
-    
-    if not result or result.modified_count == 0:
-        raise HTTPException(status_code=404, detail="Request not found or already processed")
+    await transition_request(
+        "transport", request_id, "approve", approved_by, "Request not found or already processed",
+        extra={"vehicle": vehicle} if vehicle else None
+    )
     return {"message": "Request approved"}
 
 
 @router.put("/transport/{request_id}/reject")
 async def reject_transport_request(request_id: str, approved_by: str):
     """Reject a transport request - handles both ObjectId and string id formats"""
-    result = None
-    try:
-        result = await db.transport_requests.update_one(
-            {"_id": ObjectId(request_id), "status": "pending"},
-            {"$set": {"status": "rejected", "approved_by": approved_by, "rejected_at": datetime.now(timezone.utc).isoformat()}}
-        )
-    except Exception:
-        pass
-    
-    if not result or result.modified_count == 0:
-        result = await db.transport_requests.update_one(
-            {"id": request_id, "status": "pending"},
-            {"$set": {"status": "rejected", "approved_by": approved_by, "rejected_at": datetime.now(timezone.utc).isoformat()}}
-        )
-    
-    if not result or result.modified_count == 0:
-        raise HTTPException(status_code=404, detail="Request not found or already processed")
+    await transition_request("transport", request_id, "reject", approved_by, "Request not found or already processed")
     return {"message": "Request rejected"}
 
 
@@ -527,50 +517,14 @@ async def create_leave_request(request: LeaveRequest, user_id: str, user_name: s
 @router.put("/leave/{request_id}/approve")
 async def approve_leave_request(request_id: str, approved_by: str):
     """Approve a leave request - handles both ObjectId and string id formats"""
-    # Try to find and update using ObjectId first, then by string id
-    result = None
-    try:
-        result = await db.leave_requests.update_one(
-            {"_id": ObjectId(request_id), "status": "pending"},
-            {"$set": {"status": "approved", "approved_by": approved_by, "approved_at": datetime.now(timezone.utc).isoformat()}}
-        )
-    except Exception:
-        pass
-    
-    # If ObjectId didn't work, try with string id field
-    if not result or result.modified_count == 0:
-        result = await db.leave_requests.update_one(
-            {"id": request_id, "status": "pending"},
-            {"$set": {"status": "approved", "approved_by": approved_by, "approved_at": datetime.now(timezone.utc).isoformat()}}
-        )
-    
-    if not result or result.modified_count == 0:
-        raise HTTPException(status_code=404, detail="Leave request not found or already processed")
+    await transition_request("leave", request_id, "approve", approved_by, "Leave request not found or already processed")
     return {"message": "Leave request approved"}
 
 
 @router.put("/leave/{request_id}/reject")
 async def reject_leave_request(request_id: str, approved_by: str):
     """Reject a leave request - handles both ObjectId and string id formats"""
-    # Try to find and update using ObjectId first, then by string id
-    result = None
-    try:
-        result = await db.leave_requests.update_one(
-            {"_id": ObjectId(request_id), "status": "pending"},
-            {"$set": {"status": "rejected", "approved_by": approved_by, "rejected_at": datetime.now(timezone.utc).isoformat()}}
-        )
-    except Exception:
-        pass
-    
-    # If ObjectId didn't work, try with string id field
-    if not result or result.modified_count == 0:
-        result = await db.leave_requests.update_one(
-            {"id": request_id, "status": "pending"},
-            {"$set": {"status": "rejected", "approved_by": approved_by, "rejected_at": datetime.now(timezone.utc).isoformat()}}
-        )
-    
-    if not result or result.modified_count == 0:
-        raise HTTPException(status_code=404, detail="Leave request not found or already processed")
+    await transition_request("leave", request_id, "reject", approved_by, "Leave request not found or already processed")
     return {"message": "Leave request rejected"}
 
 
@@ -645,49 +599,33 @@ async def create_expense_claim(claim: ExpenseClaim, user_id: str, user_name: str
 @router.put("/expenses/{claim_id}/approve")
 async def approve_expense_claim(claim_id: str, approved_by: str):
     """Approve an expense claim - handles both ObjectId and string id formats"""
-    result = None
-    try:
-        result = await db.expense_claims.update_one(
-            {"_id": ObjectId(claim_id), "status": "pending"},
-            {"$set": {"status": "approved", "approved_by": approved_by, "approved_at": datetime.now(timezone.utc).isoformat()}}
-        )
-    except Exception:
-        pass
-    
-    if not result or result.modified_count == 0:
-        result = await db.expense_claims.update_one(
-            {"id": claim_id, "status": "pending"},
-            {"$set": {"status": "approved", "approved_by": approved_by, "approved_at": datetime.now(timezone.utc).isoformat()}}
-        )
-    
-    if not result or result.modified_count == 0:
-        raise HTTPException(status_code=404, detail="Claim not found or already processed")
+    await transition_request("expenses", claim_id, "approve", approved_by, "Claim not found or already processed")
     return {"message": "Claim approved"}
 
 
 @router.put("/expenses/{claim_id}/reject")
 async def reject_expense_claim(claim_id: str, approved_by: str):
     """Reject an expense claim - handles both ObjectId and string id formats"""
-    result = None
-    try:
-        result = await db.expense_claims.update_one(
-            {"_id": ObjectId(claim_id), "status": "pending"},
-            {"$set": {"status": "rejected", "approved_by": approved_by, "rejected_at": datetime.now(timezone.utc).isoformat()}}
-        )
-    except Exception:
-        pass
-    
-    if not result or result.modified_count == 0:
-        result = await db.expense_claims.update_one(
-            {"id": claim_id, "status": "pending"},
-            {"$set": {"status": "rejected", "approved_by": approved_by, "rejected_at": datetime.now(timezone.utc).isoformat()}}
-        )
-    
-    if not result or result.modified_count == 0:
-        raise HTTPException(status_code=404, detail="Claim not found or already processed")
+    await transition_request("expenses", claim_id, "reject", approved_by, "Claim not found or already processed")
     return {"message": "Claim rejected"}
 
 
+@router.post("/requests/bulk-action")
+async def bulk_request_action(data: BulkRequestAction):
+    """Approve or reject many pending requests of one type in a single update"""
+    workflow = REQUEST_WORKFLOWS.get(data.request_type)
+    if not workflow:
+        raise HTTPException(status_code=400, detail=f"Invalid request type. Must be one of: {list(REQUEST_WORKFLOWS)}")
+    try:
+        result = await apply_transition(db, workflow, data.ids, data.action, actor=data.approved_by, notify=True)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {
+        "message": f"{len(result.succeeded)} {workflow.label}s {result.to_state}",
+        **result.summary()
+    }
+
+
 # ============= MONTHLY EXPENSE SHEETS =============
 # New system for monthly project expense submissions with receipt attachments
 
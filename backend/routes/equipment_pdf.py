@@ -4,7 +4,6 @@ Generates professional PDF reports for all equipment types.
 Includes email functionality to send reports to customers.
 """
 import io
-import os
 import base64
 import asyncio
 from datetime import datetime, timezone
@@ -19,7 +18,6 @@ from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph,
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
 from reportlab.pdfgen import canvas
-import requests
 import resend
 
 import sys
@@ -29,6 +27,7 @@ from core.database import db
 from core.security import require_auth
 from core.config import settings
 from routes.pdf_base import format_date_ddmmyyyy
+from routes.pdf_assets import registry as pdf_assets
 
 router = APIRouter(prefix="/equipment-report", tags=["Equipment Reports"])
 
@@ -145,6 +144,114 @@ from routes.pdf_base import (
 HEADER_LIGHT_GRAY = colors.HexColor('#e5e7eb')  # Light grey for all table headers
 HEADER_DARK_TEXT = colors.HexColor('#374151')   # Dark grey text for headers
 
+# Shared TableStyle templates. A TableStyle is only read when applied to a
+# table, so one instance serves every table and every render.
+
+# Header row (bold, grey) over a centered grid
+HEADER_ROW_GRID_STYLE = TableStyle([
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 0), (-1, -1), 8),
+    ('BACKGROUND', (0, 0), (-1, 0), LIGHT_GRAY),
+    ('GRID', (0, 0), (-1, -1), 0.5, BORDER_COLOR),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
+    ('TOPPADDING', (0, 0), (-1, -1), 4),
+])
+
+# Label/value pairs: columns 0 and 2 are bold grey labels
+LABEL_COLUMNS_GRID_STYLE = TableStyle([
+    ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+    ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+    ('FONTNAME', (2, 0), (2, -1), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 8),
+    ('GRID', (0, 0), (-1, -1), 0.5, BORDER_COLOR),
+    ('BACKGROUND', (0, 0), (0, -1), LIGHT_GRAY),
+    ('BACKGROUND', (2, 0), (2, -1), LIGHT_GRAY),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
+    ('TOPPADDING', (0, 0), (-1, -1), 4),
+])
+
+# Numbered checklist: grey header row, centered S.No and status columns
+CHECKLIST_GRID_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), LIGHT_GRAY),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 8),
+    ('ALIGN', (0, 0), (0, -1), 'CENTER'),
+    ('ALIGN', (2, 0), (2, -1), 'CENTER'),
+    ('GRID', (0, 0), (-1, -1), 0.5, BORDER_COLOR),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 3),
+    ('TOPPADDING', (0, 0), (-1, -1), 3),
+])
+
+# Measurement grid: grey header row and grey row label
+HEADER_ROW_FIRST_LABEL_GRID_STYLE = TableStyle([
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTNAME', (0, 1), (0, 1), 'Helvetica-Bold'),
+    ('FONTNAME', (1, 1), (-1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 0), (-1, -1), 8),
+    ('BACKGROUND', (0, 0), (-1, 0), LIGHT_GRAY),
+    ('BACKGROUND', (0, 1), (0, 1), LIGHT_GRAY),
+    ('GRID', (0, 0), (-1, -1), 0.5, BORDER_COLOR),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 5),
+    ('TOPPADDING', (0, 0), (-1, -1), 5),
+])
+
+# Header row over a centered grid, default padding
+COMPACT_HEADER_ROW_GRID_STYLE = TableStyle([
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 8),
+    ('GRID', (0, 0), (-1, -1), 0.5, BORDER_COLOR),
+    ('BACKGROUND', (0, 0), (-1, 0), LIGHT_GRAY),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+])
+
+# Label/value pairs with default padding
+COMPACT_LABEL_COLUMNS_GRID_STYLE = TableStyle([
+    ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 0), (-1, -1), 8),
+    ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+    ('FONTNAME', (2, 0), (2, -1), 'Helvetica-Bold'),
+    ('GRID', (0, 0), (-1, -1), 0.5, BORDER_COLOR),
+    ('BACKGROUND', (0, 0), (0, -1), LIGHT_GRAY),
+    ('BACKGROUND', (2, 0), (2, -1), LIGHT_GRAY),
+])
+
+# Relay setting tables (8pt)
+RELAY_HEADER_GRID_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), HEADER_LIGHT_GRAY),
+    ('TEXTCOLOR', (0, 0), (-1, 0), HEADER_DARK_TEXT),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 8),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('GRID', (0, 0), (-1, -1), 0.5, BORDER_COLOR),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 5),
+    ('TOPPADDING', (0, 0), (-1, -1), 5),
+    ('LEFTPADDING', (0, 0), (-1, -1), 6),
+    ('RIGHTPADDING', (0, 0), (-1, -1), 6),
+])
+
+# Relay pickup/trip tables with many columns (7pt)
+RELAY_SMALL_HEADER_GRID_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), HEADER_LIGHT_GRAY),
+    ('TEXTCOLOR', (0, 0), (-1, 0), HEADER_DARK_TEXT),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 7),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('GRID', (0, 0), (-1, -1), 0.5, BORDER_COLOR),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
+    ('TOPPADDING', (0, 0), (-1, -1), 4),
+    ('LEFTPADDING', (0, 0), (-1, -1), 4),
+    ('RIGHTPADDING', (0, 0), (-1, -1), 4),
+])
+
 # Equipment type display names and prefixes
 EQUIPMENT_INFO = {
     'transformer': {'name': 'Transformer', 'prefix': 'TRN', 'title': 'TRANSFORMER TEST REPORT'},
@@ -200,20 +307,11 @@ class EquipmentNumberedCanvas(BaseNumberedCanvas):
 
 
 def get_logo_image(logo_url, width=120):
-    """Fetch and create logo image element."""
+    """Create logo image element from the cached company logo."""
     try:
-        # First try local file path
-        local_path = '/app/backend/uploads/company_logo.png'
-        if os.path.exists(local_path):
-            img = Image(local_path, width=width, height=width*0.35)
-            return img
-        
-        # Then try URL
-        if logo_url and logo_url.startswith('http'):
-            response = requests.get(logo_url, timeout=5)
-            if response.status_code == 200:
-                img_data = io.BytesIO(response.content)
-                return Image(img_data, width=width, height=width*0.35)
+        logo = pdf_assets.company_logo(logo_url)
+        if logo:
+            return logo.image(width, width*0.35)
     except Exception as e:
         print(f"Error loading logo: {e}")
     return None
@@ -823,19 +921,7 @@ def create_acb_insulation_resistance_section(report, styles, width):
     ]
     col_width = width / 5
     cb_open_table = Table(cb_open_data, colWidths=[col_width, col_width, col_width, col_width, col_width])
-    cb_open_table.setStyle(TableStyle([
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTNAME', (0, 1), (0, 1), 'Helvetica-Bold'),
-        ('FONTNAME', (1, 1), (-1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 0), (-1, -1), 8),
-        ('BACKGROUND', (0, 0), (-1, 0), LIGHT_GRAY),
-        ('BACKGROUND', (0, 1), (0, 1), LIGHT_GRAY),
-        ('GRID', (0, 0), (-1, -1), 0.5, BORDER_COLOR),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 5),
-        ('TOPPADDING', (0, 0), (-1, -1), 5),
-    ]))
+    cb_open_table.setStyle(HEADER_ROW_FIRST_LABEL_GRID_STYLE)
     elements.append(cb_open_table)
     elements.append(Spacer(1, 8))
     
@@ -846,19 +932,7 @@ def create_acb_insulation_resistance_section(report, styles, width):
         ['Measured (MΩ)', cb_close_pe.get('R-E', ''), cb_close_pe.get('Y-E', ''), cb_close_pe.get('B-E', ''), cb_close_pe.get('N-E', '')]
     ]
     cb_close_pe_table = Table(cb_close_pe_data, colWidths=[col_width, col_width, col_width, col_width, col_width])
-    cb_close_pe_table.setStyle(TableStyle([
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTNAME', (0, 1), (0, 1), 'Helvetica-Bold'),
-        ('FONTNAME', (1, 1), (-1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 0), (-1, -1), 8),
-        ('BACKGROUND', (0, 0), (-1, 0), LIGHT_GRAY),
-        ('BACKGROUND', (0, 1), (0, 1), LIGHT_GRAY),
-        ('GRID', (0, 0), (-1, -1), 0.5, BORDER_COLOR),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 5),
-        ('TOPPADDING', (0, 0), (-1, -1), 5),
-    ]))
+    cb_close_pe_table.setStyle(HEADER_ROW_FIRST_LABEL_GRID_STYLE)
     elements.append(cb_close_pe_table)
     elements.append(Spacer(1, 8))
     
@@ -870,19 +944,7 @@ def create_acb_insulation_resistance_section(report, styles, width):
     ]
     col_width_4 = width / 4
     cb_close_pp_table = Table(cb_close_pp_data, colWidths=[col_width_4, col_width_4, col_width_4, col_width_4])
-    cb_close_pp_table.setStyle(TableStyle([
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTNAME', (0, 1), (0, 1), 'Helvetica-Bold'),
-        ('FONTNAME', (1, 1), (-1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 0), (-1, -1), 8),
-        ('BACKGROUND', (0, 0), (-1, 0), LIGHT_GRAY),
-        ('BACKGROUND', (0, 1), (0, 1), LIGHT_GRAY),
-        ('GRID', (0, 0), (-1, -1), 0.5, BORDER_COLOR),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 5),
-        ('TOPPADDING', (0, 0), (-1, -1), 5),
-    ]))
+    cb_close_pp_table.setStyle(HEADER_ROW_FIRST_LABEL_GRID_STYLE)
     elements.append(cb_close_pp_table)
     
     elements.append(Paragraph("* Acceptance Criteria: ≥1000 MΩ/Volt", styles['Normal_Small']))
@@ -918,17 +980,7 @@ def create_acb_coil_resistance_section(report, styles, width):
         coil_table_data.insert(0, ['Ambient Temp (°C):', ambient_temp, ''])
     
     coil_table = Table(coil_table_data, colWidths=[width*0.34, width*0.33, width*0.33])
-    coil_table.setStyle(TableStyle([
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 0), (-1, -1), 8),
-        ('BACKGROUND', (0, 0), (-1, 0), LIGHT_GRAY),
-        ('GRID', (0, 0), (-1, -1), 0.5, BORDER_COLOR),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
-        ('TOPPADDING', (0, 0), (-1, -1), 4),
-    ]))
+    coil_table.setStyle(HEADER_ROW_GRID_STYLE)
     elements.append(coil_table)
     elements.append(Spacer(1, 10))
     
@@ -979,17 +1031,7 @@ def create_acb_contact_resistance_section(report, styles, width):
     ]
     
     contact_table = Table(contact_table_data, colWidths=[width*0.28, width*0.18, width*0.18, width*0.18, width*0.18])
-    contact_table.setStyle(TableStyle([
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 0), (-1, -1), 8),
-        ('BACKGROUND', (0, 0), (-1, 0), LIGHT_GRAY),
-        ('GRID', (0, 0), (-1, -1), 0.5, BORDER_COLOR),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
-        ('TOPPADDING', (0, 0), (-1, -1), 4),
-    ]))
+    contact_table.setStyle(HEADER_ROW_GRID_STYLE)
     elements.append(contact_table)
     
     elements.append(Paragraph("* Acceptance Criteria: Not available in manual. Approx <0.1Ω", styles['Normal_Small']))
@@ -1023,18 +1065,7 @@ def create_acb_micrologic_trip_section(report, styles, width):
             ['Feeder Name:', switchboard.get('feeder_name', ''), '', '']
         ]
         sw_table = Table(sw_data, colWidths=[width*0.18, width*0.32, width*0.18, width*0.32])
-        sw_table.setStyle(TableStyle([
-            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTNAME', (2, 0), (2, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 8),
-            ('GRID', (0, 0), (-1, -1), 0.5, BORDER_COLOR),
-            ('BACKGROUND', (0, 0), (0, -1), LIGHT_GRAY),
-            ('BACKGROUND', (2, 0), (2, -1), LIGHT_GRAY),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
-            ('TOPPADDING', (0, 0), (-1, -1), 4),
-        ]))
+        sw_table.setStyle(LABEL_COLUMNS_GRID_STYLE)
         elements.append(sw_table)
         elements.append(Spacer(1, 6))
     
@@ -1047,18 +1078,7 @@ def create_acb_micrologic_trip_section(report, styles, width):
             ['Rated Current:', breaker.get('rated_current', ''), '', '']
         ]
         br_table = Table(br_data, colWidths=[width*0.18, width*0.32, width*0.18, width*0.32])
-        br_table.setStyle(TableStyle([
-            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTNAME', (2, 0), (2, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 8),
-            ('GRID', (0, 0), (-1, -1), 0.5, BORDER_COLOR),
-            ('BACKGROUND', (0, 0), (0, -1), LIGHT_GRAY),
-            ('BACKGROUND', (2, 0), (2, -1), LIGHT_GRAY),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
-            ('TOPPADDING', (0, 0), (-1, -1), 4),
-        ]))
+        br_table.setStyle(LABEL_COLUMNS_GRID_STYLE)
         elements.append(br_table)
         elements.append(Spacer(1, 6))
     
@@ -1071,18 +1091,7 @@ def create_acb_micrologic_trip_section(report, styles, width):
             ['Serial No:', trip_unit.get('serial_no', ''), '', '']
         ]
         tu_table = Table(tu_data, colWidths=[width*0.18, width*0.32, width*0.18, width*0.32])
-        tu_table.setStyle(TableStyle([
-            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTNAME', (2, 0), (2, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 8),
-            ('GRID', (0, 0), (-1, -1), 0.5, BORDER_COLOR),
-            ('BACKGROUND', (0, 0), (0, -1), LIGHT_GRAY),
-            ('BACKGROUND', (2, 0), (2, -1), LIGHT_GRAY),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
-            ('TOPPADDING', (0, 0), (-1, -1), 4),
-        ]))
+        tu_table.setStyle(LABEL_COLUMNS_GRID_STYLE)
         elements.append(tu_table)
         elements.append(Spacer(1, 6))
     
@@ -1100,18 +1109,7 @@ def create_acb_micrologic_trip_section(report, styles, width):
             ['Ground Fault Delay (Tg):', protection.get('ground_fault_delay_tg', ''), '', '']
         ]
         ps_table = Table(ps_data, colWidths=[width*0.22, width*0.28, width*0.22, width*0.28])
-        ps_table.setStyle(TableStyle([
-            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTNAME', (2, 0), (2, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 8),
-            ('GRID', (0, 0), (-1, -1), 0.5, BORDER_COLOR),
-            ('BACKGROUND', (0, 0), (0, -1), LIGHT_GRAY),
-            ('BACKGROUND', (2, 0), (2, -1), LIGHT_GRAY),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
-            ('TOPPADDING', (0, 0), (-1, -1), 4),
-        ]))
+        ps_table.setStyle(LABEL_COLUMNS_GRID_STYLE)
         elements.append(ps_table)
         elements.append(Spacer(1, 6))
     
@@ -1318,13 +1316,7 @@ def create_mccb_insulation_resistance_section(report, styles, width):
             ['Value (MΩ)', cb_open.get("R-R'", '-'), cb_open.get("Y-Y'", '-'), cb_open.get("B-B'", '-'), cb_open.get("N-N'", '-')]
         ]
         open_table = Table(open_data, colWidths=[width*0.2, width*0.2, width*0.2, width*0.2, width*0.2])
-        open_table.setStyle(TableStyle([
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 8),
-            ('GRID', (0, 0), (-1, -1), 0.5, BORDER_COLOR),
-            ('BACKGROUND', (0, 0), (-1, 0), LIGHT_GRAY),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ]))
+        open_table.setStyle(COMPACT_HEADER_ROW_GRID_STYLE)
         elements.append(open_table)
         elements.append(Spacer(1, 6))
     
@@ -1358,13 +1350,7 @@ def create_mccb_coil_resistance_section(report, styles, width):
         ['RESISTANCE (Ω)', str(close_coil), str(trip_coil)]
     ]
     table = Table(data, colWidths=[width*0.34, width*0.33, width*0.33])
-    table.setStyle(TableStyle([
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 8),
-        ('GRID', (0, 0), (-1, -1), 0.5, BORDER_COLOR),
-        ('BACKGROUND', (0, 0), (-1, 0), LIGHT_GRAY),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-    ]))
+    table.setStyle(COMPACT_HEADER_ROW_GRID_STYLE)
     elements.append(table)
     
     if ambient:
@@ -1403,13 +1389,7 @@ def create_mccb_contact_resistance_section(report, styles, width):
          contact_data.get('n_phase', '-')]
     ]
     table = Table(data, colWidths=[width*0.28, width*0.18, width*0.18, width*0.18, width*0.18])
-    table.setStyle(TableStyle([
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 8),
-        ('GRID', (0, 0), (-1, -1), 0.5, BORDER_COLOR),
-        ('BACKGROUND', (0, 0), (-1, 0), LIGHT_GRAY),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-    ]))
+    table.setStyle(COMPACT_HEADER_ROW_GRID_STYLE)
     elements.append(table)
     
     elements.append(Paragraph("* Acceptance Criteria: Not available in manual. Approx <0.1Ω", styles['Normal_Small']))
@@ -1465,15 +1445,7 @@ def create_mccb_micrologic_trip_section(report, styles, width):
             ['Rated Current', breaker.get('rated_current', ''), '', '']
         ]
         br_table = Table(br_data, colWidths=[width*0.18, width*0.32, width*0.18, width*0.32])
-        br_table.setStyle(TableStyle([
-            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 0), (-1, -1), 8),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTNAME', (2, 0), (2, -1), 'Helvetica-Bold'),
-            ('GRID', (0, 0), (-1, -1), 0.5, BORDER_COLOR),
-            ('BACKGROUND', (0, 0), (0, -1), LIGHT_GRAY),
-            ('BACKGROUND', (2, 0), (2, -1), LIGHT_GRAY),
-        ]))
+        br_table.setStyle(COMPACT_LABEL_COLUMNS_GRID_STYLE)
         elements.append(br_table)
         elements.append(Spacer(1, 6))
     
@@ -1486,15 +1458,7 @@ def create_mccb_micrologic_trip_section(report, styles, width):
             ['Serial No.', trip_unit.get('serial_no', ''), '', '']
         ]
         tu_table = Table(tu_data, colWidths=[width*0.18, width*0.32, width*0.18, width*0.32])
-        tu_table.setStyle(TableStyle([
-            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 0), (-1, -1), 8),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTNAME', (2, 0), (2, -1), 'Helvetica-Bold'),
-            ('GRID', (0, 0), (-1, -1), 0.5, BORDER_COLOR),
-            ('BACKGROUND', (0, 0), (0, -1), LIGHT_GRAY),
-            ('BACKGROUND', (2, 0), (2, -1), LIGHT_GRAY),
-        ]))
+        tu_table.setStyle(COMPACT_LABEL_COLUMNS_GRID_STYLE)
         elements.append(tu_table)
         elements.append(Spacer(1, 6))
     
@@ -1509,15 +1473,7 @@ def create_mccb_micrologic_trip_section(report, styles, width):
             ['Ground Fault Pickup (Ig)', protection.get('ground_fault_pickup_ig', ''), 'Ground Fault Delay (tg)', protection.get('ground_fault_delay_tg', '')]
         ]
         ps_table = Table(ps_data, colWidths=[width*0.22, width*0.28, width*0.22, width*0.28])
-        ps_table.setStyle(TableStyle([
-            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 0), (-1, -1), 8),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTNAME', (2, 0), (2, -1), 'Helvetica-Bold'),
-            ('GRID', (0, 0), (-1, -1), 0.5, BORDER_COLOR),
-            ('BACKGROUND', (0, 0), (0, -1), LIGHT_GRAY),
-            ('BACKGROUND', (2, 0), (2, -1), LIGHT_GRAY),
-        ]))
+        ps_table.setStyle(COMPACT_LABEL_COLUMNS_GRID_STYLE)
         elements.append(ps_table)
         elements.append(Spacer(1, 6))
     
@@ -1703,17 +1659,7 @@ def create_lightning_arrestor_checklist_section(report, styles, width):
             ])
     
     table = Table(data, colWidths=[width*0.08, width*0.52, width*0.15, width*0.25])
-    table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), LIGHT_GRAY),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 8),
-        ('ALIGN', (0, 0), (0, -1), 'CENTER'),
-        ('ALIGN', (2, 0), (2, -1), 'CENTER'),
-        ('GRID', (0, 0), (-1, -1), 0.5, BORDER_COLOR),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 3),
-        ('TOPPADDING', (0, 0), (-1, -1), 3),
-    ]))
+    table.setStyle(CHECKLIST_GRID_STYLE)
     
     elements.append(table)
     elements.append(Spacer(1, 10))
@@ -1795,17 +1741,7 @@ def create_relay_checklist_section(report, styles, width):
             ])
     
     table = Table(data, colWidths=[width*0.08, width*0.52, width*0.15, width*0.25])
-    table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), LIGHT_GRAY),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 8),
-        ('ALIGN', (0, 0), (0, -1), 'CENTER'),
-        ('ALIGN', (2, 0), (2, -1), 'CENTER'),
-        ('GRID', (0, 0), (-1, -1), 0.5, BORDER_COLOR),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 3),
-        ('TOPPADDING', (0, 0), (-1, -1), 3),
-    ]))
+    table.setStyle(CHECKLIST_GRID_STYLE)
     
     elements.append(table)
     elements.append(Spacer(1, 10))
@@ -1879,19 +1815,7 @@ def create_relay_settings_section(report, styles, width):
             
             # Use full width with equal distribution for 5 columns
             setting_table = Table(setting_data, colWidths=[width*0.20]*5)
-            setting_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), HEADER_LIGHT_GRAY),
-                ('TEXTCOLOR', (0, 0), (-1, 0), HEADER_DARK_TEXT),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, -1), 8),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('GRID', (0, 0), (-1, -1), 0.5, BORDER_COLOR),
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 5),
-                ('TOPPADDING', (0, 0), (-1, -1), 5),
-                ('LEFTPADDING', (0, 0), (-1, -1), 6),
-                ('RIGHTPADDING', (0, 0), (-1, -1), 6),
-            ]))
+            setting_table.setStyle(RELAY_HEADER_GRID_STYLE)
             elements.append(setting_table)
             elements.append(Spacer(1, 10))
         
@@ -1916,19 +1840,7 @@ def create_relay_settings_section(report, styles, width):
             # 7 columns - distribute evenly across full width
             col_w = width / 7
             pickup_table = Table(pickup_data, colWidths=[col_w]*7)
-            pickup_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), HEADER_LIGHT_GRAY),
-                ('TEXTCOLOR', (0, 0), (-1, 0), HEADER_DARK_TEXT),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, -1), 7),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('GRID', (0, 0), (-1, -1), 0.5, BORDER_COLOR),
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
-                ('TOPPADDING', (0, 0), (-1, -1), 4),
-                ('LEFTPADDING', (0, 0), (-1, -1), 4),
-                ('RIGHTPADDING', (0, 0), (-1, -1), 4),
-            ]))
+            pickup_table.setStyle(RELAY_SMALL_HEADER_GRID_STYLE)
             elements.append(pickup_table)
             elements.append(Spacer(1, 10))
         
@@ -1953,19 +1865,7 @@ def create_relay_settings_section(report, styles, width):
             # 7 columns - distribute evenly across full width
             col_w = width / 7
             char_table = Table(char_data, colWidths=[col_w]*7)
-            char_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), HEADER_LIGHT_GRAY),
-                ('TEXTCOLOR', (0, 0), (-1, 0), HEADER_DARK_TEXT),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, -1), 7),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('GRID', (0, 0), (-1, -1), 0.5, BORDER_COLOR),
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
-                ('TOPPADDING', (0, 0), (-1, -1), 4),
-                ('LEFTPADDING', (0, 0), (-1, -1), 4),
-                ('RIGHTPADDING', (0, 0), (-1, -1), 4),
-            ]))
+            char_table.setStyle(RELAY_SMALL_HEADER_GRID_STYLE)
             elements.append(char_table)
             elements.append(Spacer(1, 10))
         
@@ -2022,19 +1922,7 @@ def create_relay_settings_section(report, styles, width):
             
             # Use full width with equal distribution for 5 columns
             feeder_setting_table = Table(feeder_setting_data, colWidths=[width*0.20]*5)
-            feeder_setting_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), HEADER_LIGHT_GRAY),
-                ('TEXTCOLOR', (0, 0), (-1, 0), HEADER_DARK_TEXT),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, -1), 8),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('GRID', (0, 0), (-1, -1), 0.5, BORDER_COLOR),
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 5),
-                ('TOPPADDING', (0, 0), (-1, -1), 5),
-                ('LEFTPADDING', (0, 0), (-1, -1), 6),
-                ('RIGHTPADDING', (0, 0), (-1, -1), 6),
-            ]))
+            feeder_setting_table.setStyle(RELAY_HEADER_GRID_STYLE)
             elements.append(feeder_setting_table)
             elements.append(Spacer(1, 10))
         
@@ -2056,19 +1944,7 @@ def create_relay_settings_section(report, styles, width):
             
             # Use full width with equal distribution for 5 columns
             feeder_pickup_table = Table(feeder_pickup_data, colWidths=[width*0.20]*5)
-            feeder_pickup_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), HEADER_LIGHT_GRAY),
-                ('TEXTCOLOR', (0, 0), (-1, 0), HEADER_DARK_TEXT),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, -1), 8),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('GRID', (0, 0), (-1, -1), 0.5, BORDER_COLOR),
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 5),
-                ('TOPPADDING', (0, 0), (-1, -1), 5),
-                ('LEFTPADDING', (0, 0), (-1, -1), 6),
-                ('RIGHTPADDING', (0, 0), (-1, -1), 6),
-            ]))
+            feeder_pickup_table.setStyle(RELAY_HEADER_GRID_STYLE)
             elements.append(feeder_pickup_table)
             elements.append(Spacer(1, 10))
         
@@ -2093,19 +1969,7 @@ def create_relay_settings_section(report, styles, width):
             # 7 columns - distribute evenly across full width
             col_w = width / 7
             feeder_char_table = Table(feeder_char_data, colWidths=[col_w]*7)
-            feeder_char_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), HEADER_LIGHT_GRAY),
-                ('TEXTCOLOR', (0, 0), (-1, 0), HEADER_DARK_TEXT),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, -1), 7),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('GRID', (0, 0), (-1, -1), 0.5, BORDER_COLOR),
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
-                ('TOPPADDING', (0, 0), (-1, -1), 4),
-                ('LEFTPADDING', (0, 0), (-1, -1), 4),
-                ('RIGHTPADDING', (0, 0), (-1, -1), 4),
-            ]))
+            feeder_char_table.setStyle(RELAY_SMALL_HEADER_GRID_STYLE)
             elements.append(feeder_char_table)
             elements.append(Spacer(1, 10))
         
@@ -2466,17 +2330,7 @@ def create_apfc_checklist_section(report, styles, width):
             ])
     
     table = Table(data, colWidths=[width*0.08, width*0.52, width*0.15, width*0.25])
-    table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), LIGHT_GRAY),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 8),
-        ('ALIGN', (0, 0), (0, -1), 'CENTER'),
-        ('ALIGN', (2, 0), (2, -1), 'CENTER'),
-        ('GRID', (0, 0), (-1, -1), 0.5, BORDER_COLOR),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 3),
-        ('TOPPADDING', (0, 0), (-1, -1), 3),
-    ]))
+    table.setStyle(CHECKLIST_GRID_STYLE)
     
     elements.append(table)
     elements.append(Spacer(1, 10))
@@ -2555,17 +2409,7 @@ def create_dg_checklist_section(report, styles, width):
             ])
     
     table = Table(data, colWidths=[width*0.08, width*0.52, width*0.15, width*0.25])
-    table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), LIGHT_GRAY),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 8),
-        ('ALIGN', (0, 0), (0, -1), 'CENTER'),
-        ('ALIGN', (2, 0), (2, -1), 'CENTER'),
-        ('GRID', (0, 0), (-1, -1), 0.5, BORDER_COLOR),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 3),
-        ('TOPPADDING', (0, 0), (-1, -1), 3),
-    ]))
+    table.setStyle(CHECKLIST_GRID_STYLE)
     
     elements.append(table)
     elements.append(Spacer(1, 10))
@@ -2747,17 +2591,7 @@ def create_vcb_contact_resistance_section(report, styles, width):
     ]
     
     table = Table(data, colWidths=[width*0.25, width*0.375, width*0.375])
-    table.setStyle(TableStyle([
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 0), (-1, -1), 8),
-        ('BACKGROUND', (0, 0), (-1, 0), LIGHT_GRAY),
-        ('GRID', (0, 0), (-1, -1), 0.5, BORDER_COLOR),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
-        ('TOPPADDING', (0, 0), (-1, -1), 4),
-    ]))
+    table.setStyle(HEADER_ROW_GRID_STYLE)
     elements.append(table)
     elements.append(Paragraph("* Acceptance Criteria: As per manufacturer specifications", styles['Normal_Small']))
     elements.append(Spacer(1, 10))
@@ -2860,17 +2694,7 @@ def create_vcb_breaker_timings_section(report, styles, width):
     ]
     
     table = Table(data, colWidths=[width*0.40, width*0.20, width*0.20, width*0.20])
-    table.setStyle(TableStyle([
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 0), (-1, -1), 8),
-        ('BACKGROUND', (0, 0), (-1, 0), LIGHT_GRAY),
-        ('GRID', (0, 0), (-1, -1), 0.5, BORDER_COLOR),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
-        ('TOPPADDING', (0, 0), (-1, -1), 4),
-    ]))
+    table.setStyle(HEADER_ROW_GRID_STYLE)
     elements.append(table)
     elements.append(Paragraph("* Acceptance Criteria: As per manufacturer specifications", styles['Normal_Small']))
     elements.append(Spacer(1, 10))
@@ -2900,17 +2724,7 @@ def create_vcb_operational_checks_section(report, styles, width):
     ]
     
     table = Table(data, colWidths=[width*0.40, width*0.30, width*0.30])
-    table.setStyle(TableStyle([
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 0), (-1, -1), 8),
-        ('BACKGROUND', (0, 0), (-1, 0), LIGHT_GRAY),
-        ('GRID', (0, 0), (-1, -1), 0.5, BORDER_COLOR),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
-        ('TOPPADDING', (0, 0), (-1, -1), 4),
-    ]))
+    table.setStyle(HEADER_ROW_GRID_STYLE)
     elements.append(table)
     
     # ON/OFF Operation (moved from service checks)
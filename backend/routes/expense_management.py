@@ -17,6 +17,9 @@ import io
 import base64
 from pathlib import Path
 from motor.motor_asyncio import AsyncIOMotorClient
+from utils.approvals import INVALID_STATE, Transition, Workflow, apply_transition
+from utils.indexes import index, register_indexes
+from utils.order_ledger import refresh_order_ledger
 
 # MongoDB connection
 mongo_url = os.environ.get('MONGO_URL')
@@ -25,6 +28,30 @@ db = client[os.environ.get('DB_NAME', 'enerzia_erp')]
 
 router = APIRouter(prefix="/api/expense-management", tags=["Expense Management"])
 
+register_indexes(__name__, {
+    "expenses_v2": [
+        index("id", unique=True),
+        index("order_id", "approval_status"),
+        index("approval_status", "submitted_at"),
+        index(("created_at", -1)),
+    ],
+})
+
+EXPENSE_WORKFLOW = Workflow(
+    collection="expenses_v2",
+    label="expense",
+    status_field="approval_status",
+    history_field="approval_history",
+    updated_field="updated_at",
+    iso_timestamps=False,
+    notify_department="ACCOUNTS",
+    transitions={
+        "approve": Transition("approved", ("submitted", "info_requested"), "approved_by", "approved_at"),
+        "reject": Transition("rejected", ("submitted", "info_requested")),
+        "request_info": Transition("info_requested", ("submitted", "info_requested")),
+    },
+)
+
 # Upload directory
 UPLOADS_DIR = Path("/app/uploads/expenses")
 UPLOADS_DIR.mkdir(parents=True, exist_ok=True)
@@ -402,49 +429,22 @@ async def submit_for_approval(expense_id: str, submitted_by: str = ""):
 @router.put("/expenses/{expense_id}/approve")
 async def approve_expense(expense_id: str, data: ApprovalAction):
     """Approve, reject, or request info for an expense"""
-    expense = await db.expenses_v2.find_one({"id": expense_id})
-    if not expense:
+    try:
+        result = await apply_transition(
+            db, EXPENSE_WORKFLOW, [expense_id], data.action,
+            actor=data.approved_by, comments=data.comments, fields=["order_id"],
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    if result.failed:
+        failure = result.failed[0]
+        if failure["error"] == INVALID_STATE:
+            raise HTTPException(status_code=400, detail=f"Cannot process expense in '{failure.get('status')}' status")
         raise HTTPException(status_code=404, detail="Expense not found")
     
-    if expense.get("approval_status") not in ["submitted", "info_requested"]:
-        raise HTTPException(status_code=400, detail=f"Cannot process expense in '{expense.get('approval_status')}' status")
-    
-    valid_actions = ["approve", "reject", "request_info"]
-    if data.action not in valid_actions:
-        raise HTTPException(status_code=400, detail=f"Invalid action. Must be one of: {valid_actions}")
-    
-    # Map action to status
-    status_map = {
-        "approve": "approved",
-        "reject": "rejected",
-        "request_info": "info_requested"
-    }
-    new_status = status_map[data.action]
-    
-    # Add to approval history
-    history_entry = {
-        "action": data.action,
-        "by": data.approved_by,
-        "at": datetime.now(timezone.utc).isoformat(),
-        "comments": data.comments or ""
-    }
-    
-    update_data = {
-        "approval_status": new_status,
-        "updated_at": datetime.now(timezone.utc)
-    }
-    
-    if data.action == "approve":
-        update_data["approved_by"] = data.approved_by
-        update_data["approved_at"] = datetime.now(timezone.utc)
-    
-    await db.expenses_v2.update_one(
-        {"id": expense_id},
-        {
-            "$set": update_data,
-            "$push": {"approval_history": history_entry}
-        }
-    )
+    if result.to_state == "approved":
+        await refresh_order_ledger(db, [result.documents[expense_id].get("order_id")])
     
     updated = await db.expenses_v2.find_one({"id": expense_id}, {"_id": 0})
     return {"message": f"Expense {data.action}d", "expense": updated}
@@ -473,43 +473,19 @@ async def get_approval_queue(
 
 @router.post("/bulk-approve")
 async def bulk_approve(data: BulkApproveRequest):
-    """Bulk approve multiple expenses"""
-    approved_count = 0
-    failed = []
-    
-    for expense_id in data.expense_ids:
-        try:
-            expense = await db.expenses_v2.find_one({"id": expense_id})
-            if expense and expense.get("approval_status") == "submitted":
-                history_entry = {
-                    "action": "approve",
-                    "by": data.approved_by,
-                    "at": datetime.now(timezone.utc).isoformat(),
-                    "comments": data.comments or "Bulk approved"
-                }
-                
-                await db.expenses_v2.update_one(
-                    {"id": expense_id},
-                    {
-                        "$set": {
-                            "approval_status": "approved",
-                            "approved_by": data.approved_by,
-                            "approved_at": datetime.now(timezone.utc),
-                            "updated_at": datetime.now(timezone.utc)
-                        },
-                        "$push": {"approval_history": history_entry}
-                    }
-                )
-                approved_count += 1
-            else:
-                failed.append({"id": expense_id, "reason": "Not in submitted status"})
-        except Exception as e:
-            failed.append({"id": expense_id, "reason": str(e)})
+    """Bulk approve multiple expenses with one status-guarded update"""
+    result = await apply_transition(
+        db, EXPENSE_WORKFLOW, data.expense_ids, "approve",
+        actor=data.approved_by, comments=data.comments or "Bulk approved",
+        fields=["order_id"], notify=True,
+    )
+    await refresh_order_ledger(db, (doc.get("order_id") for doc in result.documents.values()))
     
     return {
-        "message": f"Approved {approved_count} expenses",
-        "approved_count": approved_count,
-        "failed": failed
+        "message": f"Approved {len(result.succeeded)} expenses",
+        "approved_count": len(result.succeeded),
+        "approved": result.succeeded,
+        "failed": [{"id": f["id"], "reason": f["reason"]} for f in result.failed]
     }
 
 
@@ -576,41 +552,23 @@ async def get_expense_dashboard_stats():
 @router.get("/dashboard/order-expenses")
 async def get_order_expenses_summary(limit: int = 20):
     """Get expenses grouped by order"""
-    pipeline = [
-        {"$match": {"approval_status": "approved"}},
-        {"$group": {
-            "_id": "$order_id",
-            "order_no": {"$first": "$order_no"},
-            "customer_name": {"$first": "$customer_name"},
-            "total_expenses": {"$sum": "$amount"},
-            "expense_count": {"$sum": 1}
-        }},
-        {"$sort": {"total_expenses": -1}},
-        {"$limit": limit}
-    ]
-    
-    result = await db.expenses_v2.aggregate(pipeline).to_list(limit)
+    # Approved expenses_v2 totals and budgets are precomputed per order in the ledger
+    cursor = db.order_ledger.find(
+        {"expense_v2_count": {"$gt": 0}},
+        {"_id": 0}
+    ).sort("expense_v2_total", -1).limit(limit)
     
-    # Enrich with order budget data
     enriched = []
-    for item in result:
-        lifecycle = await db.order_lifecycle.find_one({"sales_order_id": item["_id"]}, {"_id": 0})
-        order = await db.sales_orders.find_one({"id": item["_id"]}, {"_id": 0})
-        
-        execution_budget = 0
-        if lifecycle and lifecycle.get("execution_budget"):
-            budget = lifecycle["execution_budget"]
-            order_value = order.get("total_amount", 0) if order else 0
-            if budget.get("type") == "percentage":
-                execution_budget = order_value * (budget.get("value", 0) / 100)
-            else:
-                execution_budget = budget.get("value", 0)
-        
+    async for ledger in cursor:
         enriched.append({
-            **item,
-            "execution_budget": execution_budget,
-            "variance": execution_budget - item["total_expenses"],
-            "order_value": order.get("total_amount", 0) if order else 0
+            "_id": ledger["order_id"],
+            "order_no": ledger.get("order_no"),
+            "customer_name": ledger.get("customer_name"),
+            "total_expenses": ledger["expense_v2_total"],
+            "expense_count": ledger["expense_v2_count"],
+            "execution_budget": ledger["execution_budget"],
+            "variance": ledger["execution_budget"] - ledger["expense_v2_total"],
+            "order_value": ledger["order_value"]
         })
     
     return {"orders": enriched}
@@ -0,0 +1,41 @@
+"""
+Export Job Routes
+Status and download of background exports started by the Excel/CSV/PDF
+export endpoints when a result is too large to stream inline (utils/report_exports.py).
+"""
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse
+
+from core.database import db
+from core.security import require_auth
+from utils.report_exports import get_export_job, job_path, job_summary
+
+router = APIRouter(prefix="/api/export-jobs", tags=["Export Jobs"])
+
+
+async def _get_visible_job(job_id: str, user: dict) -> dict:
+    job = await get_export_job(db, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Export job not found")
+    # Jobs without a recorded owner are visible to admins only
+    if job.get("created_by") != user.get("id") and user.get("role") not in ["admin", "super_admin"]:
+        raise HTTPException(status_code=403, detail="Access denied to this export")
+    return job
+
+
+@router.get("/{job_id}")
+async def get_export_status(job_id: str, current_user: dict = Depends(require_auth)):
+    """Export job status; download_url is set once the file is ready"""
+    return job_summary(await _get_visible_job(job_id, current_user))
+
+
+@router.get("/{job_id}/download")
+async def download_export(job_id: str, current_user: dict = Depends(require_auth)):
+    """Download a finished export"""
+    job = await _get_visible_job(job_id, current_user)
+    if job["status"] != "done":
+        raise HTTPException(status_code=409, detail=f"Export is {job['status']}")
+    path = job_path(job)
+    if not path.exists():
+        raise HTTPException(status_code=410, detail="Export file has expired")
+    return FileResponse(path, media_type=job["media_type"], filename=job["filename"])
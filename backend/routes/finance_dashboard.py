@@ -7,13 +7,18 @@ Finance Dashboard Module (Phase 4)
 - Financial KPIs
 """
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 from typing import List, Optional, Dict
 from datetime import datetime, timezone, timedelta
 import uuid
 import os
 from motor.motor_asyncio import AsyncIOMotorClient
+from core.security import require_admin
+from utils import columnar
+from utils.approvals import NOT_FOUND, Transition, Workflow, apply_transition
+from utils.order_ledger import expenses_by_category, get_order_ledger, reconcile_order_ledger
+from utils.streaming import iter_cursor
 
 # MongoDB connection
 mongo_url = os.environ.get('MONGO_URL')
@@ -38,52 +43,14 @@ async def get_employees_for_dropdown():
     employees = await cursor.to_list(500)
     return {"employees": employees}
 
-def calculate_budget_amount(order_value: float, budget: dict) -> float:
-    """Calculate budget amount from percentage or value"""
-    if not budget:
-        return 0
-    if budget.get("type") == "percentage":
-        return order_value * (budget.get("value", 0) / 100)
-    return budget.get("value", 0)
-
-
 async def get_order_costs(order_id: str) -> dict:
-    """Get all costs associated with an order"""
-    # Purchase costs from purchase_orders_v2
-    po_pipeline = [
-        {"$match": {"sales_order_id": order_id, "status": {"$ne": "cancelled"}}},
-        {"$group": {"_id": None, "total": {"$sum": "$total_amount"}}}
-    ]
-    po_result = await db.purchase_orders_v2.aggregate(po_pipeline).to_list(1)
-    purchase_cost = po_result[0]["total"] if po_result else 0
-    
-    # Expenses from expenses_v2 (new expense management system)
-    exp_pipeline = [
-        {"$match": {"order_id": order_id, "approval_status": "approved"}},
-        {"$group": {"_id": "$category", "total": {"$sum": "$amount"}}}
-    ]
-    exp_result = await db.expenses_v2.aggregate(exp_pipeline).to_list(100)
-    expenses_by_category = {e["_id"]: e["total"] for e in exp_result}
-    total_expenses = sum(expenses_by_category.values())
-    
-    # Also check order_expenses (older system) for backward compatibility
-    old_exp_pipeline = [
-        {"$match": {"order_id": order_id, "approved": True}},
-        {"$group": {"_id": "$category", "total": {"$sum": "$amount"}}}
-    ]
-    old_exp_result = await db.order_expenses.aggregate(old_exp_pipeline).to_list(100)
-    for e in old_exp_result:
-        if e["_id"] in expenses_by_category:
-            expenses_by_category[e["_id"]] += e["total"]
-        else:
-            expenses_by_category[e["_id"]] = e["total"]
-        total_expenses += e["total"]
-    
+    """Get all costs associated with an order (from its ledger row)"""
+    ledger = await get_order_ledger(db, order_id) or {}
     return {
-        "purchase_cost": purchase_cost,
-        "execution_expenses": total_expenses,
-        "expenses_by_category": expenses_by_category,
-        "total_cost": purchase_cost + total_expenses
+        "purchase_cost": ledger.get("purchase_cost", 0),
+        "execution_expenses": ledger.get("execution_expenses", 0),
+        "expenses_by_category": expenses_by_category(ledger),
+        "total_cost": ledger.get("total_cost", 0)
     }
 
 
@@ -194,61 +161,39 @@ async def get_order_profitability(
     sort_by: str = "profit"  # profit, revenue, margin
 ):
     """Get order-wise P&L analysis"""
-    # Get orders with lifecycle
     query = {}
     if status:
-        query["status"] = status
-    
-    orders = await db.sales_orders.find(query, {"_id": 0}).sort("created_at", -1).limit(limit).to_list(limit)
-    
+        query["order_status"] = status
+
     profitability_data = []
     
-    for order in orders:
-        order_id = order.get("id")
-        order_value = order.get("total_amount", 0)
-        
-        # Get lifecycle data
-        lifecycle = await db.order_lifecycle.find_one({"sales_order_id": order_id}, {"_id": 0})
-        
-        # Get costs
-        costs = await get_order_costs(order_id)
-        
-        # Calculate targets
-        purchase_target = 0
-        execution_target = 0
-        target_profit = 0
-        
-        if lifecycle:
-            purchase_target = calculate_budget_amount(order_value, lifecycle.get("purchase_budget"))
-            execution_target = calculate_budget_amount(order_value, lifecycle.get("execution_budget"))
-            target_profit = calculate_budget_amount(order_value, lifecycle.get("target_profit"))
-        
-        # Calculate actuals
-        actual_profit = order_value - costs["total_cost"]
-        profit_margin = (actual_profit / order_value * 100) if order_value > 0 else 0
+    # Ledger rows carry the order fields, costs, budgets and payments
+    async for ledger in db.order_ledger.find(query, {"_id": 0}).sort("created_at", -1).limit(limit):
+        order_value = ledger["order_value"]
+        purchase_target = ledger["purchase_budget"]
+        execution_target = ledger["execution_budget"]
+        target_profit = ledger["target_profit"]
+        actual_profit = ledger["actual_profit"]
         
         # Calculate variance
         profit_variance = actual_profit - target_profit if target_profit else actual_profit
-        purchase_savings = purchase_target - costs["purchase_cost"] if purchase_target else 0
-        execution_savings = execution_target - costs["execution_expenses"] if execution_target else 0
+        purchase_savings = purchase_target - ledger["purchase_cost"] if purchase_target else 0
+        execution_savings = execution_target - ledger["execution_expenses"] if execution_target else 0
         
-        # Payment status
-        paid_amount = 0
-        if lifecycle and lifecycle.get("payment_milestones"):
-            paid_amount = sum(m.get("paid_amount", 0) for m in lifecycle["payment_milestones"])
+        paid_amount = ledger["paid_amount"]
         
         profitability_data.append({
-            "order_id": order_id,
-            "order_no": order.get("order_no"),
-            "customer_name": order.get("customer_name"),
-            "order_date": order.get("date"),
-            "status": lifecycle.get("status", "new") if lifecycle else order.get("status", "new"),
+            "order_id": ledger["order_id"],
+            "order_no": ledger.get("order_no"),
+            "customer_name": ledger.get("customer_name"),
+            "order_date": ledger.get("order_date"),
+            "status": (ledger.get("lifecycle_status") or "new") if ledger["has_lifecycle"] else (ledger.get("order_status") or "new"),
             "order_value": order_value,
-            "purchase_cost": costs["purchase_cost"],
-            "execution_expenses": costs["execution_expenses"],
-            "total_cost": costs["total_cost"],
+            "purchase_cost": ledger["purchase_cost"],
+            "execution_expenses": ledger["execution_expenses"],
+            "total_cost": ledger["total_cost"],
             "actual_profit": actual_profit,
-            "profit_margin": round(profit_margin, 1),
+            "profit_margin": ledger["profit_margin"],
             "target_profit": target_profit,
             "profit_variance": profit_variance,
             "purchase_target": purchase_target,
@@ -377,66 +322,38 @@ async def get_cash_flow_projection(months: int = 6):
 @router.get("/savings-analysis")
 async def get_savings_analysis():
     """Get comprehensive savings analysis - Budget vs Actual"""
-    # Get all orders with lifecycle configurations
-    pipeline = [
-        {"$lookup": {
-            "from": "sales_orders",
-            "localField": "sales_order_id",
-            "foreignField": "id",
-            "as": "order"
-        }},
-        {"$unwind": "$order"},
-        {"$project": {
-            "_id": 0,
-            "sales_order_id": 1,
-            "order_no": "$order.order_no",
-            "customer": "$order.customer_name",
-            "order_value": "$order.total_amount",
-            "purchase_budget": 1,
-            "execution_budget": 1,
-            "target_profit": 1,
-            "status": 1
-        }}
-    ]
-    
-    lifecycles = await db.order_lifecycle.aggregate(pipeline).to_list(200)
-    
     savings_data = []
     total_purchase_budget = 0
     total_purchase_actual = 0
     total_execution_budget = 0
     total_execution_actual = 0
     
-    for lc in lifecycles:
-        order_value = lc.get("order_value", 0)
-        order_id = lc.get("sales_order_id")
-        
-        # Calculate budgets
-        purchase_budget = calculate_budget_amount(order_value, lc.get("purchase_budget"))
-        execution_budget = calculate_budget_amount(order_value, lc.get("execution_budget"))
+    # Every order with a lifecycle configuration, from the ledger
+    async for ledger in iter_cursor(db.order_ledger.find({"has_lifecycle": True}, {"_id": 0})):
+        purchase_budget = ledger["purchase_budget"]
+        execution_budget = ledger["execution_budget"]
+        purchase_actual = ledger["purchase_cost"]
+        execution_actual = ledger["execution_expenses"]
         
-        # Get actuals
-        costs = await get_order_costs(order_id)
-        
-        purchase_savings = purchase_budget - costs["purchase_cost"]
-        execution_savings = execution_budget - costs["execution_expenses"]
+        purchase_savings = purchase_budget - purchase_actual
+        execution_savings = execution_budget - execution_actual
         
         total_purchase_budget += purchase_budget
-        total_purchase_actual += costs["purchase_cost"]
+        total_purchase_actual += purchase_actual
         total_execution_budget += execution_budget
-        total_execution_actual += costs["execution_expenses"]
+        total_execution_actual += execution_actual
         
         savings_data.append({
-            "order_no": lc.get("order_no"),
-            "customer": lc.get("customer"),
-            "order_value": order_value,
-            "status": lc.get("status", "new"),
+            "order_no": ledger.get("order_no"),
+            "customer": ledger.get("customer_name"),
+            "order_value": ledger["order_value"],
+            "status": ledger.get("lifecycle_status") or "new",
             "purchase_budget": purchase_budget,
-            "purchase_actual": costs["purchase_cost"],
+            "purchase_actual": purchase_actual,
             "purchase_savings": purchase_savings,
             "purchase_savings_percent": round((purchase_savings / purchase_budget * 100) if purchase_budget else 0, 1),
             "execution_budget": execution_budget,
-            "execution_actual": costs["execution_expenses"],
+            "execution_actual": execution_actual,
             "execution_savings": execution_savings,
             "execution_savings_percent": round((execution_savings / execution_budget * 100) if execution_budget else 0, 1),
             "total_savings": purchase_savings + execution_savings
@@ -689,50 +606,39 @@ async def get_department_performance():
 
 @router.get("/monthly-trends")
 async def get_monthly_trends(months: int = 12):
-    """Get monthly revenue, cost, and profit trends"""
+    """Get monthly revenue, cost, and profit trends (bucketed from the columnar snapshots)"""
     now = datetime.now(timezone.utc)
     trends = []
     
+    orders = await columnar.snapshot_frame(db, "sales_orders")
+    purchase_orders = await columnar.snapshot_frame(db, "purchase_orders_v2")
+    expense_rows = await columnar.snapshot_frame(db, "expenses_v2")
+    revenue_by_month = columnar.bucket_sum(orders[orders["status"] != "cancelled"], "created_at", "month", ["total_amount"])
+    purchase_by_month = columnar.bucket_sum(
+        purchase_orders[purchase_orders["status"] != "cancelled"], "created_at", "month", ["total_amount"]
+    )
+    expenses_by_month = columnar.bucket_sum(
+        expense_rows[expense_rows["approval_status"] == "approved"], "created_at", "month", ["amount"]
+    )
+    
     for i in range(months - 1, -1, -1):
-        # Calculate month start and end
+        # Calculate month start
         target_date = now - timedelta(days=30 * i)
         month_start = datetime(target_date.year, target_date.month, 1, tzinfo=timezone.utc)
-        if target_date.month == 12:
-            month_end = datetime(target_date.year + 1, 1, 1, tzinfo=timezone.utc)
-        else:
-            month_end = datetime(target_date.year, target_date.month + 1, 1, tzinfo=timezone.utc)
-        
-        # Revenue
-        revenue_pipeline = [
-            {"$match": {"created_at": {"$gte": month_start, "$lt": month_end}, "status": {"$nin": ["cancelled"]}}},
-            {"$group": {"_id": None, "total": {"$sum": "$total_amount"}, "count": {"$sum": 1}}}
-        ]
-        revenue_result = await db.sales_orders.aggregate(revenue_pipeline).to_list(1)
-        revenue = revenue_result[0]["total"] if revenue_result else 0
-        orders_count = revenue_result[0]["count"] if revenue_result else 0
+        month = month_start.strftime("%Y-%m")
         
-        # Purchase cost
-        po_pipeline = [
-            {"$match": {"created_at": {"$gte": month_start, "$lt": month_end}, "status": {"$ne": "cancelled"}}},
-            {"$group": {"_id": None, "total": {"$sum": "$total_amount"}}}
-        ]
-        po_result = await db.purchase_orders_v2.aggregate(po_pipeline).to_list(1)
-        purchase = po_result[0]["total"] if po_result else 0
-        
-        # Expenses
-        exp_pipeline = [
-            {"$match": {"created_at": {"$gte": month_start, "$lt": month_end}, "approval_status": "approved"}},
-            {"$group": {"_id": None, "total": {"$sum": "$amount"}}}
-        ]
-        exp_result = await db.expenses_v2.aggregate(exp_pipeline).to_list(1)
-        expenses = exp_result[0]["total"] if exp_result else 0
+        revenue_row = revenue_by_month.get(month, {})
+        revenue = revenue_row.get("total_amount", 0)
+        orders_count = revenue_row.get("count", 0)
+        purchase = purchase_by_month.get(month, {}).get("total_amount", 0)
+        expenses = expenses_by_month.get(month, {}).get("amount", 0)
         
         total_cost = purchase + expenses
         profit = revenue - total_cost
         margin = (profit / revenue * 100) if revenue > 0 else 0
         
         trends.append({
-            "month": month_start.strftime("%Y-%m"),
+            "month": month,
             "month_name": month_start.strftime("%b %Y"),
             "revenue": revenue,
             "purchase": purchase,
@@ -753,8 +659,9 @@ async def get_financial_kpis():
     overview = await get_finance_overview()
     
     # Average order value
-    orders = await db.sales_orders.find({"status": {"$nin": ["cancelled"]}}, {"total_amount": 1}).to_list(1000)
-    avg_order_value = sum(o.get("total_amount", 0) for o in orders) / len(orders) if orders else 0
+    orders = await columnar.snapshot_frame(db, "sales_orders")
+    order_values = orders.loc[orders["status"] != "cancelled", "total_amount"]
+    avg_order_value = float(order_values.mean()) if len(order_values) else 0
     
     # Collection efficiency
     payment_status = await get_payment_status()
@@ -790,6 +697,12 @@ async def get_financial_kpis():
     }
 
 
+@router.post("/ledger/reconcile")
+async def reconcile_ledger(dry_run: bool = False, current_user: dict = Depends(require_admin)):
+    """Recompute every order ledger row; rows that drifted from their sources are rewritten unless dry_run"""
+    return await reconcile_order_ledger(db, fix=not dry_run)
+
+
 # ============== EXPENSE SHEET APPROVAL ENDPOINTS (Finance Module) ==============
 # These endpoints handle the finance workflow for employee expense sheets
 # Workflow: Employee submits -> Finance verifies -> Finance approves -> Finance pays
@@ -806,6 +719,37 @@ class PaymentRequest(PydanticBaseModel):
     paid_by: str
 
 
+class ExpenseSheetBulkAction(PydanticBaseModel):
+    """Verify, approve or reject several expense sheets at once"""
+    sheet_ids: List[str]
+    action: str  # verify, approve, reject
+    by: str
+    reason: str = ""
+
+
+EXPENSE_SHEET_WORKFLOW = Workflow(
+    collection="expense_sheets",
+    label="expense sheet",
+    id_fields=("_id", "id"),
+    notify_department="ACCOUNTS",
+    transitions={
+        "verify": Transition("verified", ("pending",), "verified_by", "verified_at"),
+        "approve": Transition("approved", ("verified",), "approved_by", "approved_at"),
+        "reject": Transition("rejected", ("pending", "verified"), "rejected_by", "rejected_at"),
+    },
+)
+
+
+async def transition_expense_sheet(sheet_id: str, action: str, actor: str, invalid_detail: str, extra: Optional[dict] = None):
+    """Apply one EXPENSE_SHEET_WORKFLOW step to a single sheet; invalid_detail may use {status}"""
+    result = await apply_transition(db, EXPENSE_SHEET_WORKFLOW, [sheet_id], action, actor=actor, extra=extra)
+    if result.failed:
+        failure = result.failed[0]
+        if failure["error"] == NOT_FOUND:
+            raise HTTPException(status_code=404, detail="Expense sheet not found")
+        raise HTTPException(status_code=400, detail=invalid_detail.format(status=failure.get("status")))
+
+
 async def find_expense_sheet(sheet_id: str):
     """Helper to find expense sheet by id (supports both ObjectId and string id)"""
     sheet = None
@@ -854,29 +798,33 @@ async def get_expense_sheet_detail(sheet_id: str):
     return serialize_expense_sheet(sheet)
 
 
+@finance_router.post("/expense-sheets/bulk-action")
+async def bulk_expense_sheet_action(data: ExpenseSheetBulkAction):
+    """
+    Apply one workflow step to many expense sheets in a single update
+    Same transitions as the per-sheet endpoints: pending -> verified -> approved,
+    pending/verified -> rejected
+    """
+    extra = {"rejection_reason": data.reason} if data.action == "reject" else None
+    try:
+        result = await apply_transition(
+            db, EXPENSE_SHEET_WORKFLOW, data.sheet_ids, data.action, actor=data.by, extra=extra, notify=True
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"message": f"{len(result.succeeded)} expense sheets {result.to_state}", **result.summary()}
+
+
 @finance_router.put("/expense-sheets/{sheet_id}/verify")
 async def verify_expense_sheet(sheet_id: str, verified_by: str):
     """
     Verify an expense sheet - first step of finance approval
     Status: pending -> verified
     """
-    sheet = await find_expense_sheet(sheet_id)
-    if not sheet:
-        raise HTTPException(status_code=404, detail="Expense sheet not found")
-    
-    if sheet.get("status") != "pending":
-        raise HTTPException(status_code=400, detail=f"Cannot verify sheet with status: {sheet.get('status')}. Sheet must be in 'pending' status.")
-    
-    update_data = {
-        "status": "verified",
-        "verified_by": verified_by,
-        "verified_at": datetime.now(timezone.utc).isoformat()
-    }
-    
-    try:
-        await db.expense_sheets.update_one({"_id": ObjectId(sheet_id)}, {"$set": update_data})
-    except Exception:
-        await db.expense_sheets.update_one({"id": sheet_id}, {"$set": update_data})
+    await transition_expense_sheet(
+        sheet_id, "verify", verified_by,
+        "Cannot verify sheet with status: {status}. Sheet must be in 'pending' status."
+    )
     
     return {"message": "Expense sheet verified successfully", "status": "verified"}
 
@@ -887,23 +835,10 @@ async def approve_expense_sheet(sheet_id: str, approved_by: str):
     Approve an expense sheet - second step of finance approval
     Status: verified -> approved
     """
-    sheet = await find_expense_sheet(sheet_id)
-    if not sheet:
-        raise HTTPException(status_code=404, detail="Expense sheet not found")
-    
-    if sheet.get("status") != "verified":
-        raise HTTPException(status_code=400, detail=f"Cannot approve sheet with status: {sheet.get('status')}. Sheet must be verified first.")
-    
-    update_data = {
-        "status": "approved",
-        "approved_by": approved_by,
-        "approved_at": datetime.now(timezone.utc).isoformat()
-    }
-    
-    try:
-        await db.expense_sheets.update_one({"_id": ObjectId(sheet_id)}, {"$set": update_data})
-    except Exception:
-        await db.expense_sheets.update_one({"id": sheet_id}, {"$set": update_data})
+    await transition_expense_sheet(
+        sheet_id, "approve", approved_by,
+        "Cannot approve sheet with status: {status}. Sheet must be verified first."
+    )
     
     return {"message": "Expense sheet approved successfully", "status": "approved"}
 
@@ -915,24 +850,10 @@ async def reject_expense_sheet(sheet_id: str, rejected_by: str, reason: str = ""
     Status: pending/verified -> rejected
     Employee can then edit and resubmit
     """
-    sheet = await find_expense_sheet(sheet_id)
-    if not sheet:
-        raise HTTPException(status_code=404, detail="Expense sheet not found")
-    
-    if sheet.get("status") not in ["pending", "verified"]:
-        raise HTTPException(status_code=400, detail=f"Cannot reject sheet with status: {sheet.get('status')}")
-    
-    update_data = {
-        "status": "rejected",
-        "rejected_by": rejected_by,
-        "rejected_at": datetime.now(timezone.utc).isoformat(),
-        "rejection_reason": reason
-    }
-    
-    try:
-        await db.expense_sheets.update_one({"_id": ObjectId(sheet_id)}, {"$set": update_data})
-    except Exception:
-        await db.expense_sheets.update_one({"id": sheet_id}, {"$set": update_data})
+    await transition_expense_sheet(
+        sheet_id, "reject", rejected_by,
+        "Cannot reject sheet with status: {status}", extra={"rejection_reason": reason}
+    )
     
     return {"message": "Expense sheet rejected", "status": "rejected"}
 
@@ -11,6 +11,12 @@ import uuid
 import os
 import calendar
 
+from utils import columnar
+from utils.streaming import fetch_page, iter_cursor, page_response, stream_list_response
+from utils.indexes import index, register_indexes
+from utils.approvals import Transition, Workflow, apply_transition
+from utils.scheduler import cached_view, invalidate_view, scheduled_job, store_view
+
 router = APIRouter(prefix="/api/hr", tags=["HR Payroll"])
 
 # MongoDB connection
@@ -21,6 +27,22 @@ DB_NAME = os.environ.get("DB_NAME", "enerzia_erp")
 client = AsyncIOMotorClient(MONGO_URL)
 db = client[DB_NAME]
 
+register_indexes(__name__, {
+    "hr_employees": [
+        index("id"),
+        index("emp_id"),
+        index("status", "emp_id"),
+    ],
+    "hr_payroll": [
+        index("id"),
+        index("year", "month", "emp_id"),
+        index("emp_id", ("year", -1), ("month", -1)),
+    ],
+    "attendance": [
+        index("user_id", "year", "month"),
+    ],
+})
+
 
 # ============= CONSTANTS =============
 
@@ -227,17 +249,21 @@ def get_days_in_month(month: int, year: int) -> int:
 @router.get("/employees")
 async def get_all_employees(
     status: Optional[str] = None,
-    department: Optional[str] = None
+    department: Optional[str] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None
 ):
-    """Get all employees with optional filters"""
+    """Get all employees with optional filters, streamed; pass limit/cursor to page through them"""
     query = {}
     if status:
         query["status"] = status
     if department:
         query["department"] = department
     
-    employees = await db.hr_employees.find(query, {"_id": 0}).sort("emp_id", 1).to_list(1000)
-    return employees
+    if limit:
+        employees, next_cursor = await fetch_page(db.hr_employees, query, {"_id": 0}, "emp_id", 1, limit, cursor)
+        return page_response(employees, next_cursor)
+    return stream_list_response(iter_cursor(db.hr_employees.find(query, {"_id": 0}).sort([("emp_id", 1), ("id", 1)])))
 
 
 @router.get("/employees/{emp_id}")
@@ -269,6 +295,7 @@ async def create_employee(employee: EmployeeCreate):
     doc["gross_salary"] = calculate_gross_salary(doc.get("salary", {}))
     
     await db.hr_employees.insert_one(doc)
+    await invalidate_view(db, CELEBRATIONS_VIEW)
     
     # Remove MongoDB _id before returning
     doc.pop("_id", None)
@@ -296,6 +323,7 @@ async def update_employee(emp_id: str, updates: EmployeeUpdate):
     
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Employee not found")
+    await invalidate_view(db, CELEBRATIONS_VIEW)
     
     updated = await db.hr_employees.find_one(
         {"$or": [{"emp_id": emp_id}, {"id": emp_id}]},
@@ -314,6 +342,7 @@ async def delete_employee(emp_id: str):
     
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Employee not found")
+    await invalidate_view(db, CELEBRATIONS_VIEW)
     
     return {"message": "Employee deactivated successfully"}
 
@@ -684,6 +713,7 @@ async def run_payroll(payroll: PayrollRun):
         
         # Save payroll record
         await db.hr_payroll.insert_one(payroll_record)
+        columnar.mark_stale("hr_payroll")
         payroll_record.pop("_id", None)
         payroll_records.append(payroll_record)
         
@@ -743,91 +773,69 @@ async def get_payroll_record(record_id: str):
 
 # ============= BIRTHDAY/ANNIVERSARY ALERTS =============
 
-@router.get("/celebrations")
-async def get_celebrations(days_ahead: int = 30):
-    """Get upcoming birthdays and work anniversaries"""
-    today = datetime.now()
-    
-    employees = await db.hr_employees.find(
-        {"status": "active"},
-        {"_id": 0, "emp_id": 1, "name": 1, "department": 1, "date_of_birth": 1, "join_date": 1}
-    ).to_list(1000)
-    
+CELEBRATIONS_VIEW = "hr.celebrations"
+# The stored view covers a full year; requests filter it to their window
+CELEBRATIONS_HORIZON_DAYS = 366
+
+
+def _parse_employee_date(value) -> Optional[date]:
+    """DD-MM-YYYY, DD/MM/YYYY or YYYY-MM-DD"""
+    for fmt in ["%d-%m-%Y", "%d/%m/%Y", "%Y-%m-%d"]:
+        try:
+            return datetime.strptime(value, fmt).date()
+        except (TypeError, ValueError):
+            continue
+    return None
+
+
+def _next_occurrence(day: date, today: date) -> date:
+    """The date's next anniversary on or after today (29 Feb falls on 28 Feb in other years)"""
+    for year in (today.year, today.year + 1):
+        try:
+            occurrence = day.replace(year=year)
+        except ValueError:
+            occurrence = date(year, 2, 28)
+        if occurrence >= today:
+            return occurrence
+    return occurrence
+
+
+def build_celebrations(employees: List[dict], today: date, days_ahead: int) -> dict:
+    """Birthdays and work anniversaries within days_ahead of today, soonest first"""
     birthdays = []
     anniversaries = []
     
     for emp in employees:
-        # Check birthday
-        dob_str = emp.get("date_of_birth", "")
-        if dob_str:
-            try:
-                # Parse DD-MM-YYYY or DD/MM/YYYY
-                for fmt in ["%d-%m-%Y", "%d/%m/%Y", "%Y-%m-%d"]:
-                    try:
-                        dob = datetime.strptime(dob_str, fmt)
-                        break
-                    except:
-                        continue
-                else:
-                    dob = None
-                
-                if dob:
-                    # This year's birthday
-                    this_year_bday = dob.replace(year=today.year)
-                    if this_year_bday < today:
-                        this_year_bday = this_year_bday.replace(year=today.year + 1)
-                    
-                    days_until = (this_year_bday - today).days
-                    if 0 <= days_until <= days_ahead:
-                        birthdays.append({
-                            "emp_id": emp["emp_id"],
-                            "name": emp["name"],
-                            "department": emp.get("department", ""),
-                            "date": this_year_bday.strftime("%d-%m-%Y"),
-                            "days_until": days_until,
-                            "type": "birthday"
-                        })
-            except:
-                pass
+        dob = _parse_employee_date(emp.get("date_of_birth"))
+        if dob:
+            birthday = _next_occurrence(dob, today)
+            days_until = (birthday - today).days
+            if days_until <= days_ahead:
+                birthdays.append({
+                    "emp_id": emp["emp_id"],
+                    "name": emp["name"],
+                    "department": emp.get("department", ""),
+                    "date": birthday.strftime("%d-%m-%Y"),
+                    "days_until": days_until,
+                    "type": "birthday"
+                })
         
-        # Check work anniversary
-        join_str = emp.get("join_date", "")
-        if join_str:
-            try:
-                for fmt in ["%d-%m-%Y", "%d/%m/%Y", "%Y-%m-%d"]:
-                    try:
-                        join_date = datetime.strptime(join_str, fmt)
-                        break
-                    except:
-                        continue
-                else:
-                    join_date = None
-                
-                if join_date:
-                    # This year's anniversary
-                    this_year_anniv = join_date.replace(year=today.year)
-                    if this_year_anniv < today:
-                        this_year_anniv = this_year_anniv.replace(year=today.year + 1)
-                    
-                    days_until = (this_year_anniv - today).days
-                    years = today.year - join_date.year
-                    if this_year_anniv.year > today.year:
-                        years += 1
-                    
-                    if 0 <= days_until <= days_ahead and years > 0:
-                        anniversaries.append({
-                            "emp_id": emp["emp_id"],
-                            "name": emp["name"],
-                            "department": emp.get("department", ""),
-                            "date": this_year_anniv.strftime("%d-%m-%Y"),
-                            "days_until": days_until,
-                            "years": years,
-                            "type": "anniversary"
-                        })
-            except:
-                pass
-    
-    # Sort by days_until
+        join_date = _parse_employee_date(emp.get("join_date"))
+        if join_date:
+            anniversary = _next_occurrence(join_date, today)
+            days_until = (anniversary - today).days
+            years = anniversary.year - join_date.year
+            if days_until <= days_ahead and years > 0:
+                anniversaries.append({
+                    "emp_id": emp["emp_id"],
+                    "name": emp["name"],
+                    "department": emp.get("department", ""),
+                    "date": anniversary.strftime("%d-%m-%Y"),
+                    "days_until": days_until,
+                    "years": years,
+                    "type": "anniversary"
+                })
+    
     birthdays.sort(key=lambda x: x["days_until"])
     anniversaries.sort(key=lambda x: x["days_until"])
     
@@ -838,6 +846,37 @@ async def get_celebrations(days_ahead: int = 30):
     }
 
 
+async def compute_celebrations(today: date, days_ahead: int = CELEBRATIONS_HORIZON_DAYS) -> dict:
+    employees = await db.hr_employees.find(
+        {"status": "active"},
+        {"_id": 0, "emp_id": 1, "name": 1, "department": 1, "date_of_birth": 1, "join_date": 1}
+    ).to_list(None)
+    return build_celebrations(employees, today, days_ahead)
+
+
+@scheduled_job(CELEBRATIONS_VIEW, "5 0 * * *", "Upcoming birthdays and work anniversaries for the next year")
+async def precompute_celebrations():
+    today = date.today()
+    data = await compute_celebrations(today)
+    await store_view(db, CELEBRATIONS_VIEW, data, today.isoformat())
+    return {"birthdays": len(data["birthdays"]), "anniversaries": len(data["anniversaries"])}
+
+
+@router.get("/celebrations")
+async def get_celebrations(days_ahead: int = 30):
+    """Get upcoming birthdays and work anniversaries (precomputed daily)"""
+    today = date.today()
+    if days_ahead > CELEBRATIONS_HORIZON_DAYS:
+        return await compute_celebrations(today, days_ahead)
+    
+    data = await cached_view(db, CELEBRATIONS_VIEW, today.isoformat(), lambda: compute_celebrations(today))
+    return {
+        "birthdays": [b for b in data["birthdays"] if b["days_until"] <= days_ahead],
+        "anniversaries": [a for a in data["anniversaries"] if a["days_until"] <= days_ahead],
+        "today": data["today"]
+    }
+
+
 # ============= REPORTS =============
 
 @router.get("/reports/statutory/{month}/{year}")
@@ -969,6 +1008,23 @@ class OvertimeUpdate(BaseModel):
     amount: Optional[float] = None
 
 
+class OvertimeBulkAction(BaseModel):
+    overtime_ids: List[str]
+    action: str  # approve, reject
+    approved_by: Optional[str] = None
+
+
+OVERTIME_WORKFLOW = Workflow(
+    collection="hr_overtime",
+    label="overtime request",
+    notify_department="HR",
+    transitions={
+        "approve": Transition("approved", ("pending",), at_field="approved_at"),
+        "reject": Transition("rejected", ("pending",), at_field="rejected_at"),
+    },
+)
+
+
 @router.get("/overtime/calculate-rate/{emp_id}")
 async def get_employee_ot_rate(emp_id: str):
     """Get calculated OT rate for an employee based on their gross salary"""
@@ -1108,17 +1164,9 @@ async def update_overtime(overtime_id: str, updates: OvertimeUpdate):
 @router.put("/overtime/{overtime_id}/approve")
 async def approve_overtime(overtime_id: str):
     """Approve overtime request"""
-    result = await db.hr_overtime.update_one(
-        {"id": overtime_id, "status": "pending"},
-        {
-            "$set": {
-                "status": "approved",
-                "approved_at": datetime.now(timezone.utc).isoformat()
-            }
-        }
-    )
+    result = await apply_transition(db, OVERTIME_WORKFLOW, [overtime_id], "approve")
     
-    if result.matched_count == 0:
+    if result.failed:
         raise HTTPException(status_code=404, detail="Overtime record not found or already processed")
     
     return {"message": "Overtime approved successfully"}
@@ -1127,22 +1175,26 @@ async def approve_overtime(overtime_id: str):
 @router.put("/overtime/{overtime_id}/reject")
 async def reject_overtime(overtime_id: str):
     """Reject overtime request"""
-    result = await db.hr_overtime.update_one(
-        {"id": overtime_id, "status": "pending"},
-        {
-            "$set": {
-                "status": "rejected",
-                "rejected_at": datetime.now(timezone.utc).isoformat()
-            }
-        }
-    )
+    result = await apply_transition(db, OVERTIME_WORKFLOW, [overtime_id], "reject")
     
-    if result.matched_count == 0:
+    if result.failed:
         raise HTTPException(status_code=404, detail="Overtime record not found or already processed")
     
     return {"message": "Overtime rejected"}
 
 
+@router.post("/overtime/bulk-action")
+async def bulk_overtime_action(data: OvertimeBulkAction):
+    """Approve or reject many pending overtime records in a single update"""
+    try:
+        result = await apply_transition(
+            db, OVERTIME_WORKFLOW, data.overtime_ids, data.action, actor=data.approved_by, notify=True
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"message": f"{len(result.succeeded)} overtime records {result.to_state}", **result.summary()}
+
+
 @router.delete("/overtime/{overtime_id}")
 async def delete_overtime(overtime_id: str):
     """Delete overtime record"""
@@ -1309,17 +1361,12 @@ async def preview_bulk_payroll(data: BulkPayrollPreview):
     if data.department:
         query["department"] = {"$regex": data.department, "$options": "i"}
     
-    employees = await db.hr_employees.find(query, {"_id": 0}).to_list(500)
-    
-    if not employees:
-        raise HTTPException(status_code=404, detail="No active employees found")
-    
     preview_records = []
     total_gross = 0
     total_deductions = 0
     total_net = 0
     
-    for emp in employees:
+    async for emp in iter_cursor(db.hr_employees.find(query, {"_id": 0}).sort("emp_id", 1)):
         emp_id = emp.get("emp_id", emp.get("id"))
         
         # Get attendance if enabled
@@ -1426,6 +1473,9 @@ async def preview_bulk_payroll(data: BulkPayrollPreview):
         total_deductions += total_ded
         total_net += net
     
+    if not preview_records:
+        raise HTTPException(status_code=404, detail="No active employees found")
+    
     return {
         "month": month,
         "year": year,
@@ -1479,6 +1529,7 @@ async def run_bulk_payroll(data: BulkPayrollRun):
         "month": month,
         "year": year
     })
+    columnar.mark_stale("hr_payroll")
     await db.hr_payroll_runs.delete_many({
         "month": month,
         "year": year,
@@ -1553,6 +1604,7 @@ async def run_bulk_payroll(data: BulkPayrollRun):
         }
         
         await db.hr_payroll.insert_one(payroll_doc)
+        columnar.mark_stale("hr_payroll")
         payroll_doc.pop("_id", None)
         payroll_records.append(payroll_doc)
     
@@ -1620,6 +1672,7 @@ async def finalize_payroll(month: int, year: int, finalized_by: str = "Admin"):
         {"month": month, "year": year},
         {"$set": {"status": "finalized"}}
     )
+    columnar.mark_stale("hr_payroll")
     
     return {
         "message": f"Payroll for {month}/{year} has been finalized",
@@ -1661,6 +1714,7 @@ async def unlock_payroll(month: int, year: int, unlocked_by: str = "Admin"):
         {"month": month, "year": year},
         {"$set": {"status": "processed"}}
     )
+    columnar.mark_stale("hr_payroll")
     
     return {
         "message": f"Payroll for {month}/{year} has been unlocked",
@@ -1695,13 +1749,11 @@ async def get_payroll_dashboard(month: int, year: int):
     Get comprehensive payroll dashboard for a month
     Includes summary, department breakdown, comparison with previous month
     """
-    # Get current month payroll records
-    records = await db.hr_payroll.find(
-        {"month": month, "year": year},
-        {"_id": 0}
-    ).to_list(500)
+    # Current and previous month rows of the payroll snapshot
+    payroll = await columnar.snapshot_frame(db, "hr_payroll")
+    records = payroll[(payroll["month"] == month) & (payroll["year"] == year)]
     
-    if not records:
+    if records.empty:
         return {
             "month": month,
             "year": year,
@@ -1716,49 +1768,47 @@ async def get_payroll_dashboard(month: int, year: int):
     )
     
     # Calculate summary
-    total_gross = sum(r.get("gross_salary", 0) for r in records)
-    total_net = sum(r.get("net_salary", 0) for r in records)
-    total_deductions = sum(r.get("total_deductions", 0) for r in records)
-    total_epf_employee = sum(r.get("deductions", {}).get("epf", 0) for r in records)
-    total_esic_employee = sum(r.get("deductions", {}).get("esic", 0) for r in records)
-    total_pt = sum(r.get("deductions", {}).get("professional_tax", 0) for r in records)
-    total_lop = sum(r.get("deductions", {}).get("lop_deduction", 0) for r in records)
-    total_advance_emi = sum(r.get("deductions", {}).get("advance_emi", 0) for r in records)
-    total_epf_employer = sum(r.get("employer_contributions", {}).get("epf", 0) for r in records)
-    total_esic_employer = sum(r.get("employer_contributions", {}).get("esic", 0) for r in records)
-    total_ctc = sum(r.get("ctc", 0) for r in records)
+    sums = columnar.totals(records, [
+        "gross_salary", "net_salary", "total_deductions", "ctc",
+        "deductions.epf", "deductions.esic", "deductions.professional_tax",
+        "deductions.lop_deduction", "deductions.advance_emi",
+        "employer_contributions.epf", "employer_contributions.esic",
+    ])
+    total_gross = sums["gross_salary"]
+    total_net = sums["net_salary"]
+    total_deductions = sums["total_deductions"]
+    total_epf_employee = sums["deductions.epf"]
+    total_esic_employee = sums["deductions.esic"]
+    total_pt = sums["deductions.professional_tax"]
+    total_lop = sums["deductions.lop_deduction"]
+    total_advance_emi = sums["deductions.advance_emi"]
+    total_epf_employer = sums["employer_contributions.epf"]
+    total_esic_employer = sums["employer_contributions.esic"]
+    total_ctc = sums["ctc"]
     
     # Department-wise breakdown
-    dept_breakdown = {}
-    for r in records:
-        dept = r.get("department", "Unknown")
-        if dept not in dept_breakdown:
-            dept_breakdown[dept] = {
-                "employee_count": 0,
-                "gross": 0,
-                "net": 0,
-                "deductions": 0,
-                "epf": 0,
-                "esic": 0
-            }
-        dept_breakdown[dept]["employee_count"] += 1
-        dept_breakdown[dept]["gross"] += r.get("gross_salary", 0)
-        dept_breakdown[dept]["net"] += r.get("net_salary", 0)
-        dept_breakdown[dept]["deductions"] += r.get("total_deductions", 0)
-        dept_breakdown[dept]["epf"] += r.get("deductions", {}).get("epf", 0)
-        dept_breakdown[dept]["esic"] += r.get("deductions", {}).get("esic", 0)
+    dept_breakdown = {
+        (dept if dept is not None else "Unknown"): {
+            "employee_count": row["count"],
+            "gross": row["gross_salary"],
+            "net": row["net_salary"],
+            "deductions": row["total_deductions"],
+            "epf": row["deductions.epf"],
+            "esic": row["deductions.esic"]
+        }
+        for dept, row in columnar.group_sum(
+            records, "department", ["gross_salary", "net_salary", "total_deductions", "deductions.epf", "deductions.esic"]
+        ).items()
+    }
     
     # Get previous month for comparison
     prev_month = month - 1 if month > 1 else 12
     prev_year = year if month > 1 else year - 1
     
-    prev_records = await db.hr_payroll.find(
-        {"month": prev_month, "year": prev_year},
-        {"_id": 0}
-    ).to_list(500)
-    
-    prev_gross = sum(r.get("gross_salary", 0) for r in prev_records) if prev_records else 0
-    prev_net = sum(r.get("net_salary", 0) for r in prev_records) if prev_records else 0
+    prev_records = payroll[(payroll["month"] == prev_month) & (payroll["year"] == prev_year)]
+    prev_sums = columnar.totals(prev_records, ["gross_salary", "net_salary"])
+    prev_gross = prev_sums["gross_salary"]
+    prev_net = prev_sums["net_salary"]
     
     # Calculate month-over-month change
     gross_change = ((total_gross - prev_gross) / prev_gross * 100) if prev_gross > 0 else 0
@@ -1775,7 +1825,7 @@ async def get_payroll_dashboard(month: int, year: int):
             "total_net": round(total_net, 2),
             "total_deductions": round(total_deductions, 2),
             "total_ctc": round(total_ctc, 2),
-            "avg_salary": round(total_net / len(records), 2) if records else 0
+            "avg_salary": round(total_net / len(records), 2)
         },
         "deductions_breakdown": {
             "epf_employee": round(total_epf_employee, 2),
@@ -13,6 +13,8 @@ import os
 import base64
 from io import BytesIO
 
+from utils.customer_documents import add_project_document, remove_document
+
 router = APIRouter()
 
 # Updated Risk Classification based on Delta T
@@ -301,6 +303,7 @@ async def create_ir_thermography_report(report_data: IRThermographyCreate):
     }
     
     await db.test_reports.insert_one(report_doc)
+    await add_project_document(db, "test_report", report_doc)
     
     # Return without _id
     report_doc.pop("_id", None)
@@ -378,6 +381,7 @@ async def delete_ir_thermography_report(report_id: str):
     
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Report not found")
+    await remove_document(db, "test_report", report_id)
     
     return {"message": "Report deleted successfully"}
 
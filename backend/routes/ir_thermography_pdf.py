@@ -28,12 +28,13 @@ from routes.pdf_base import format_date_ddmmyyyy
 # Import template settings functions for cover page designs
 from routes.pdf_template_settings import (
     get_pdf_settings_sync, 
-    get_logo_path as get_template_logo_path,
     get_primary_color,
     get_report_design,
     draw_decorative_design,
     get_company_info
 )
+from routes.pdf_assets import registry as pdf_assets
+from routes.pdf_styles import memoized_styles
 
 router = APIRouter()
 
@@ -43,12 +44,27 @@ COMPANY_ADDRESS = "No.9, Akshaya, Sundaresan Nagar, ELumalai Chettiar Road, Madu
 COMPANY_WEBSITE = "www.enerzia.com"
 COMPANY_CERTIFICATIONS = "(An ISO 9001:2015, ISO 45001:2018 certified company)"
 
+# Shared TableStyle templates. A TableStyle is only read when applied to a
+# table, so one instance serves every table and every render.
+
+# Full-width blue section banner
+SECTION_HEADER_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#1e3a5f')),
+    ('TEXTCOLOR', (0, 0), (-1, -1), colors.white),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 12),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
+    ('TOPPADDING', (0, 0), (-1, -1), 10),
+])
+
 
 def get_db():
     from server import db
     return db
 
 
+@memoized_styles
 def get_styles():
     """Get custom styles for the PDF"""
     styles = getSampleStyleSheet()
@@ -132,26 +148,17 @@ def get_styles():
     return styles
 
 
-def get_logo_path():
-    """Get the path to the company logo"""
+def get_logo():
+    """Get the company logo as a cached PDFAsset"""
     base_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     assets_path = os.path.join(base_path, 'assets')
     
-    # Try JPG first, then PNG
-    jpg_path = os.path.join(assets_path, 'enerzia_logo.jpg')
-    png_path = os.path.join(assets_path, 'enerzia_logo.png')
-    
-    if os.path.exists(jpg_path):
-        return jpg_path
-    elif os.path.exists(png_path):
-        return png_path
-    
-    # Fallback to uploads folder
-    uploads_path = '/app/backend/uploads/company_logo.png'
-    if os.path.exists(uploads_path):
-        return uploads_path
-    
-    return None
+    # Try JPG first, then PNG, then fallback to uploads folder
+    return (
+        pdf_assets.file(os.path.join(assets_path, 'enerzia_logo.jpg'))
+        or pdf_assets.file(os.path.join(assets_path, 'enerzia_logo.png'))
+        or pdf_assets.file('/app/backend/uploads/company_logo.png')
+    )
 
 
 class IRThermographyCanvas(canvas.Canvas):
@@ -186,10 +193,10 @@ class IRThermographyCanvas(canvas.Canvas):
             header_y = page_height - 25
             
             # Draw logo on right side
-            logo_path = get_logo_path()
-            if logo_path and os.path.exists(logo_path):
+            logo = get_logo()
+            if logo:
                 try:
-                    self.drawImage(logo_path, page_width - margin - 100, header_y - 25, 
+                    self.drawImage(logo.scaled(100, 35), page_width - margin - 100, header_y - 25, 
                                   width=100, height=35, preserveAspectRatio=True, mask='auto')
                 except Exception as e:
                     print(f"Error drawing logo: {e}")
@@ -330,10 +337,10 @@ def draw_cover_page(canvas_obj, doc, report, org_settings):
     # =====================================================
     c.saveState()
     
-    logo_path = get_template_logo_path(pdf_settings) or get_logo_path()
-    if logo_path and os.path.exists(logo_path):
+    logo = pdf_assets.template_logo(pdf_settings) or get_logo()
+    if logo:
         try:
-            c.drawImage(logo_path, 35, height - 90, width=180, height=60, 
+            c.drawImage(logo.scaled(180, 60), 35, height - 90, width=180, height=60, 
                        preserveAspectRatio=True, mask='auto')
         except Exception as e:
             print(f"Error drawing cover logo: {e}")
@@ -534,15 +541,7 @@ def create_document_details_section(report, styles):
         [['DOCUMENT IDENTIFICATION & DETAILS']],
         colWidths=[515]
     )
-    header_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#1e3a5f')),
-        ('TEXTCOLOR', (0, 0), (-1, -1), colors.white),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 12),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
-        ('TOPPADDING', (0, 0), (-1, -1), 10),
-    ]))
+    header_table.setStyle(SECTION_HEADER_STYLE)
     elements.append(header_table)
     elements.append(Spacer(1, 10))
     
@@ -610,15 +609,7 @@ def create_table_of_contents(report, styles):
         [['CONTENTS']],
         colWidths=[515]
     )
-    header_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#1e3a5f')),
-        ('TEXTCOLOR', (0, 0), (-1, -1), colors.white),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 12),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
-        ('TOPPADDING', (0, 0), (-1, -1), 10),
-    ]))
+    header_table.setStyle(SECTION_HEADER_STYLE)
     elements.append(header_table)
     elements.append(Spacer(1, 15))
     
@@ -671,15 +662,7 @@ def create_executive_summary(report, styles):
         [['SECTION - A: EXECUTIVE SUMMARY']],
         colWidths=[515]
     )
-    header_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#1e3a5f')),
-        ('TEXTCOLOR', (0, 0), (-1, -1), colors.white),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 12),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
-        ('TOPPADDING', (0, 0), (-1, -1), 10),
-    ]))
+    header_table.setStyle(SECTION_HEADER_STYLE)
     elements.append(header_table)
     elements.append(Spacer(1, 15))
     
@@ -813,15 +796,7 @@ def create_inspection_summary_table(report, styles):
         [[title]],
         colWidths=[515]
     )
-    header_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#1e3a5f')),
-        ('TEXTCOLOR', (0, 0), (-1, -1), colors.white),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 12),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
-        ('TOPPADDING', (0, 0), (-1, -1), 10),
-    ]))
+    header_table.setStyle(SECTION_HEADER_STYLE)
     elements.append(header_table)
     elements.append(Spacer(1, 10))
     
@@ -904,15 +879,7 @@ def create_fundamentals_methodology_section(report, styles):
         [['SECTION - C: THERMAL IMAGING SURVEY – FUNDAMENTALS & METHODOLOGY']],
         colWidths=[515]
     )
-    header_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#1e3a5f')),
-        ('TEXTCOLOR', (0, 0), (-1, -1), colors.white),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 12),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
-        ('TOPPADDING', (0, 0), (-1, -1), 10),
-    ]))
+    header_table.setStyle(SECTION_HEADER_STYLE)
     elements.append(header_table)
     elements.append(Spacer(1, 15))
     
@@ -1027,15 +994,7 @@ def create_risk_categorization_section(styles):
         [['SECTION - D: THERMAL IMAGES – RISK CATEGORIZATION PROCEDURE']],
         colWidths=[515]
     )
-    header_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#1e3a5f')),
-        ('TEXTCOLOR', (0, 0), (-1, -1), colors.white),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 12),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
-        ('TOPPADDING', (0, 0), (-1, -1), 10),
-    ]))
+    header_table.setStyle(SECTION_HEADER_STYLE)
     elements.append(header_table)
     elements.append(Spacer(1, 15))
     
@@ -1186,15 +1145,7 @@ def create_individual_inspection_pages(report, styles):
             [['SECTION - E: THERMAL IMAGES & INTERPRETATIONS']],
             colWidths=[515]
         )
-        header_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#1e3a5f')),
-            ('TEXTCOLOR', (0, 0), (-1, -1), colors.white),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
-            ('TOPPADDING', (0, 0), (-1, -1), 10),
-        ]))
+        header_table.setStyle(SECTION_HEADER_STYLE)
         elements.append(header_table)
         elements.append(Spacer(1, 15))
     
@@ -1422,7 +1373,12 @@ def append_calibration_certificate(buffer, report, exclude_closing_pages=False):
         from PyPDF2 import PdfReader, PdfWriter
         
         calibration_cert = report.get('calibration_certificate')
-        
+
+        # Nothing to append: skip re-reading and re-writing the whole report
+        if exclude_closing_pages or not (calibration_cert and calibration_cert.startswith('data:')):
+            buffer.seek(0)
+            return buffer
+
         # Create PDF writer and add pages
         writer = PdfWriter()
         
@@ -1530,11 +1486,10 @@ def append_calibration_certificate(buffer, report, exclude_closing_pages=False):
             back_cover_elements.append(Spacer(1, 180))
             
             # Company Logo - centered
-            logo_path = "/app/backend/assets/enerzia_logo.jpg"
+            logo = pdf_assets.file("/app/backend/assets/enerzia_logo.jpg")
             try:
-                if os.path.exists(logo_path):
-                    logo = Image(logo_path, width=200, height=80)
-                    logo_table = Table([[logo]], colWidths=[515])
+                if logo:
+                    logo_table = Table([[logo.image(200, 80)]], colWidths=[515])
                     logo_table.setStyle(TableStyle([
                         ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
                         ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
@@ -1643,135 +1598,15 @@ def append_calibration_certificate(buffer, report, exclude_closing_pages=False):
         return buffer
 
 
-async def generate_ir_thermography_pdf_internal(report_id: str, exclude_closing_pages: bool = False):
-    """Internal function to generate IR Thermography PDF buffer (for AMC PDF attachment)
+def render_ir_thermography_pdf(report: dict, org_settings: dict, draw_cover: bool = True,
+                               exclude_closing_pages: bool = False) -> BytesIO:
+    """Render an IR Thermography report to a PDF buffer
     
     Args:
-        report_id: The ID of the IR Thermography report
-        exclude_closing_pages: If True, excludes Section F (Statutory Documents) and Back Cover.
-                               Use this when embedding in AMC reports to avoid duplicate sections.
+        draw_cover: Draw the designed cover page background on page 1.
+        exclude_closing_pages: If True, skip the appended calibration certificate
+                               (used when embedding in AMC reports).
     """
-    try:
-        db = get_db()
-        
-        # First try test_reports collection
-        report = await db.test_reports.find_one({"id": report_id})
-        
-        # If not found, try ir_thermography_reports collection
-        if not report:
-            report = await db.ir_thermography_reports.find_one({"id": report_id})
-        
-        if not report:
-            print(f"IR Thermography report not found: {report_id}")
-            return None
-        
-        # Get organization settings
-        org_settings = await db.settings.find_one({"type": "organization"}) or {}
-        
-        # Create buffer
-        buffer = BytesIO()
-        
-        # Get styles
-        styles = get_styles()
-        
-        # Calculate summary if not present
-        if 'summary' not in report or not report['summary']:
-            inspection_items = report.get('inspection_items', [])
-            summary = {
-                'total_items': len(inspection_items),
-                'critical': 0,
-                'warning': 0,
-                'check_monitor': 0,
-                'normal': 0
-            }
-            
-            for item in inspection_items:
-                risk = item.get('risk_category', '').lower().replace(' & ', '_').replace(' ', '_')
-                if 'critical' in risk:
-                    summary['critical'] += 1
-                elif 'warning' in risk:
-                    summary['warning'] += 1
-                elif 'check' in risk or 'monitor' in risk:
-                    summary['check_monitor'] += 1
-                else:
-                    summary['normal'] += 1
-            
-            report['summary'] = summary
-        
-        # Create custom canvas class
-        def make_canvas(*args, **kwargs):
-            return IRThermographyCanvas(*args, report_data=report, **kwargs)
-        
-        # Create document
-        doc = SimpleDocTemplate(
-            buffer,
-            pagesize=A4,
-            rightMargin=30,
-            leftMargin=30,
-            topMargin=70,
-            bottomMargin=50
-        )
-        
-        # Build elements
-        elements = []
-        
-        # 1. Cover page
-        elements.extend(create_cover_page(report, org_settings, styles))
-        
-        # 2. Document details
-        elements.extend(create_document_details_section(report, styles))
-        
-        # 3. Table of Contents
-        elements.extend(create_table_of_contents(report, styles))
-        
-        # 4. Executive Summary
-        elements.extend(create_executive_summary(report, styles))
-        
-        # 5. Inspection Summary Table
-        elements.extend(create_inspection_summary_table(report, styles))
-        
-        # 6. Fundamentals & Methodology
-        elements.extend(create_fundamentals_methodology_section(report, styles))
-        
-        # 7. Risk Categorization
-        elements.extend(create_risk_categorization_section(styles))
-        
-        # 8. Individual Inspection Pages
-        elements.extend(create_individual_inspection_pages(report, styles))
-        
-        # Build PDF
-        doc.build(elements, canvasmaker=make_canvas)
-        
-        # Append calibration certificate if present (skip when embedding in AMC)
-        if not exclude_closing_pages:
-            buffer = append_calibration_certificate(buffer, report)
-        buffer.seek(0)
-        
-        return buffer
-    except Exception as e:
-        print(f"Error generating IR Thermography PDF: {e}")
-        return None
-
-
-@router.get("/{report_id}/pdf")
-async def generate_ir_thermography_pdf(report_id: str):
-    """Generate PDF for IR Thermography report"""
-    db = get_db()
-    
-    # First try test_reports collection
-    report = await db.test_reports.find_one({"id": report_id})
-    
-    # If not found, try ir_thermography_reports collection
-    if not report:
-        report = await db.ir_thermography_reports.find_one({"id": report_id})
-    
-    if not report:
-        raise HTTPException(status_code=404, detail="Report not found")
-    
-    # Get organization settings
-    org_settings = await db.settings.find_one({"type": "organization"}) or {}
-    
-    # Create buffer
     buffer = BytesIO()
     
     # Get styles
@@ -1843,16 +1678,71 @@ async def generate_ir_thermography_pdf(report_id: str):
     elements.extend(create_individual_inspection_pages(report, styles))
     
     # Build PDF with cover page handler
-    doc.build(
-        elements,
-        onFirstPage=lambda canvas, doc: draw_cover_page(canvas, doc, report, org_settings),
-        canvasmaker=make_canvas
-    )
+    build_kwargs = {'canvasmaker': make_canvas}
+    if draw_cover:
+        build_kwargs['onFirstPage'] = lambda canvas, doc: draw_cover_page(canvas, doc, report, org_settings)
+    doc.build(elements, **build_kwargs)
     
     # Append calibration certificate if present
-    buffer = append_calibration_certificate(buffer, report)
+    if not exclude_closing_pages:
+        buffer = append_calibration_certificate(buffer, report)
     
     buffer.seek(0)
+    return buffer
+
+
+async def generate_ir_thermography_pdf_internal(report_id: str, exclude_closing_pages: bool = False):
+    """Internal function to generate IR Thermography PDF buffer (for AMC PDF attachment)
+    
+    Args:
+        report_id: The ID of the IR Thermography report
+        exclude_closing_pages: If True, excludes Section F (Statutory Documents) and Back Cover.
+                               Use this when embedding in AMC reports to avoid duplicate sections.
+    """
+    try:
+        db = get_db()
+        
+        # First try test_reports collection
+        report = await db.test_reports.find_one({"id": report_id})
+        
+        # If not found, try ir_thermography_reports collection
+        if not report:
+            report = await db.ir_thermography_reports.find_one({"id": report_id})
+        
+        if not report:
+            print(f"IR Thermography report not found: {report_id}")
+            return None
+        
+        # Get organization settings
+        org_settings = await db.settings.find_one({"type": "organization"}) or {}
+        
+        return render_ir_thermography_pdf(
+            report, org_settings, draw_cover=False, exclude_closing_pages=exclude_closing_pages
+        )
+    except Exception as e:
+        print(f"Error generating IR Thermography PDF: {e}")
+        return None
+
+
+@router.get("/{report_id}/pdf")
+async def generate_ir_thermography_pdf(report_id: str):
+    """Generate PDF for IR Thermography report"""
+    db = get_db()
+    
+    # First try test_reports collection
+    report = await db.test_reports.find_one({"id": report_id})
+    
+    # If not found, try ir_thermography_reports collection
+    if not report:
+        report = await db.ir_thermography_reports.find_one({"id": report_id})
+    
+    if not report:
+        raise HTTPException(status_code=404, detail="Report not found")
+    
+    # Get organization settings
+    org_settings = await db.settings.find_one({"type": "organization"}) or {}
+    
+    buffer = render_ir_thermography_pdf(report, org_settings)
     
     # Generate filename
     report_no = report.get('report_no', 'IR_Report')
@@ -12,6 +12,8 @@ import uuid
 
 from core.database import db
 from utils.permissions import require_permission
+from utils.scheduler import cached_view, invalidate_view, scheduled_job, store_view
+from utils.search import search_entity_ids
 
 router = APIRouter(prefix="/api/lead-management", tags=["Lead Management"])
 
@@ -160,6 +162,7 @@ async def create_followup(data: FollowUpCreate, current_user: dict = Depends(req
     }
     
     await db.followups.insert_one(followup)
+    await invalidate_view(db, OVERDUE_FOLLOWUPS_VIEW)
     
     return {"message": "Follow-up created successfully", "id": followup["id"]}
 
@@ -275,24 +278,41 @@ async def get_upcoming_followups(days: int = 7, assigned_to: Optional[str] = Non
     return {"followups": followups, "count": len(followups)}
 
 
-@router.get("/followups/overdue")
-async def get_overdue_followups(assigned_to: Optional[str] = None, current_user: dict = Depends(require_permission("sales_dept", "lead_management"))):
-    """Get overdue follow-ups"""
-    
-    today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
-    
+OVERDUE_FOLLOWUPS_VIEW = "leads.overdue_followups"
+
+
+async def compute_overdue_followups(today: datetime) -> List[dict]:
     query = {
         "scheduled_date": {"$lt": today},
         "status": {"$in": ["scheduled", "pending"]}
     }
+    cursor = db.followups.find(query).sort("scheduled_date", 1)
+    return [serialize_followup(doc) async for doc in cursor]
+
+
+def _start_of_day() -> datetime:
+    return datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+@scheduled_job(OVERDUE_FOLLOWUPS_VIEW, "0 * * * *", "Follow-ups still open after their scheduled day")
+async def precompute_overdue_followups():
+    today = _start_of_day()
+    followups = await compute_overdue_followups(today)
+    await store_view(db, OVERDUE_FOLLOWUPS_VIEW, followups, today.date().isoformat())
+    return {"overdue": len(followups)}
+
+
+@router.get("/followups/overdue")
+async def get_overdue_followups(assigned_to: Optional[str] = None, current_user: dict = Depends(require_permission("sales_dept", "lead_management"))):
+    """Get overdue follow-ups (precomputed; follow-up writes invalidate the view)"""
     
-    if assigned_to:
-        query["assigned_to"] = assigned_to
+    today = _start_of_day()
+    followups = await cached_view(
+        db, OVERDUE_FOLLOWUPS_VIEW, today.date().isoformat(), lambda: compute_overdue_followups(today)
+    )
     
-    cursor = db.followups.find(query).sort("scheduled_date", 1)
-    followups = []
-    async for doc in cursor:
-        followups.append(serialize_followup(doc))
+    if assigned_to:
+        followups = [f for f in followups if f.get("assigned_to") == assigned_to]
     
     return {"followups": followups, "count": len(followups)}
 
@@ -425,6 +445,7 @@ async def update_followup(followup_id: str, data: FollowUpUpdate, current_user:
         {"id": followup_id},
         {"$set": update_data}
     )
+    await invalidate_view(db, OVERDUE_FOLLOWUPS_VIEW)
     
     return {"message": "Follow-up updated successfully"}
 
@@ -447,6 +468,7 @@ async def complete_followup(followup_id: str, outcome: str, next_action: Optiona
             "updated_at": datetime.now(timezone.utc)
         }}
     )
+    await invalidate_view(db, OVERDUE_FOLLOWUPS_VIEW)
     
     return {"message": "Follow-up marked as completed"}
 
@@ -479,6 +501,7 @@ async def reschedule_followup(followup_id: str, new_date: datetime, new_time: Op
             "$push": {"comments": comment}
         }
     )
+    await invalidate_view(db, OVERDUE_FOLLOWUPS_VIEW)
     
     return {"message": "Follow-up rescheduled successfully"}
 
@@ -506,6 +529,7 @@ async def add_comment(followup_id: str, data: FollowUpComment, current_user: dic
             "$set": {"updated_at": datetime.now(timezone.utc)}
         }
     )
+    await invalidate_view(db, OVERDUE_FOLLOWUPS_VIEW)
     
     return {"message": "Comment added successfully", "comment_id": comment["id"]}
 
@@ -517,6 +541,7 @@ async def delete_followup(followup_id: str, current_user: dict = Depends(require
     result = await db.followups.delete_one({"id": followup_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Follow-up not found")
+    await invalidate_view(db, OVERDUE_FOLLOWUPS_VIEW)
     
     return {"message": "Follow-up deleted successfully"}
 
@@ -565,19 +590,11 @@ async def search_customers(search: str = "", limit: int = 20, current_user: dict
     if not search or len(search) < 1:
         return {"customers": [], "total": 0}
     
-    # Search in clients collection (main customer database)
-    query = {
-        "$or": [
-            {"name": {"$regex": search, "$options": "i"}},
-            {"company_name": {"$regex": search, "$options": "i"}},
-            {"contact_person": {"$regex": search, "$options": "i"}},
-            {"email": {"$regex": search, "$options": "i"}},
-        ]
-    }
-    
-    cursor = db.clients.find(query, {"_id": 0}).limit(limit)
+    # Ranked ids from the search index, then load those clients in rank order
+    ids = await search_entity_ids(db, "customer", search, limit=limit)
+    docs = {doc["id"]: doc async for doc in db.clients.find({"id": {"$in": ids}}, {"_id": 0})}
     customers = []
-    async for doc in cursor:
+    for doc in (docs[i] for i in ids if i in docs):
         customer_type = doc.get("customer_type", "domestic")
         customers.append({
             "id": doc.get("id"),
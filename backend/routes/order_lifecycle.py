@@ -19,6 +19,15 @@ import os
 import io
 from motor.motor_asyncio import AsyncIOMotorClient
 
+from utils import columnar
+from utils.search import refresh_search_index, search_entity_ids
+from utils.customer_identity import assign_customer_id
+from utils.order_ledger import (
+    calculate_budget_amount, expenses_by_category, get_order_ledger, get_order_ledgers, refresh_order_ledger
+)
+from utils.streaming import find_by_ids, iter_cursor
+from utils.indexes import index, register_indexes
+
 # MongoDB connection
 mongo_url = os.environ.get('MONGO_URL')
 client = AsyncIOMotorClient(mongo_url)
@@ -26,6 +35,12 @@ db = client[os.environ.get('DB_NAME', 'enerzia_erp')]
 
 router = APIRouter(prefix="/api/order-lifecycle", tags=["Order Lifecycle Management"])
 
+register_indexes(__name__, {
+    "order_lifecycle": [
+        index("sales_order_id"),
+    ],
+})
+
 
 # ============== MODELS ==============
 
@@ -123,71 +138,33 @@ class ExpenseCreate(BaseModel):
 
 # ============== HELPER FUNCTIONS ==============
 
-def calculate_budget_amount(order_value: float, budget: dict) -> float:
-    """Calculate budget amount from percentage or value"""
-    if not budget:
-        return 0
-    if budget.get("type") == "percentage":
-        return order_value * (budget.get("value", 0) / 100)
-    return budget.get("value", 0)
-
-
-async def get_order_financials(order_id: str) -> dict:
-    """Calculate order financials (revenue, costs, profit)"""
-    # Get order lifecycle data
-    lifecycle = await db.order_lifecycle.find_one({"sales_order_id": order_id}, {"_id": 0})
-    
-    # Get sales order for revenue
-    sales_order = await db.sales_orders.find_one({"id": order_id}, {"_id": 0})
-    order_value = sales_order.get("total_amount", 0) if sales_order else 0
-    
-    # Get purchase costs (from purchase orders linked to this order)
-    purchase_pipeline = [
-        {"$match": {"order_id": order_id}},
-        {"$group": {"_id": None, "total": {"$sum": "$total_amount"}}}
-    ]
-    purchase_result = await db.purchase_orders.aggregate(purchase_pipeline).to_list(1)
-    purchase_cost = purchase_result[0]["total"] if purchase_result else 0
-    
-    # Get expenses
-    expense_pipeline = [
-        {"$match": {"order_id": order_id, "approved": True}},
-        {"$group": {"_id": "$category", "total": {"$sum": "$amount"}}}
-    ]
-    expense_result = await db.order_expenses.aggregate(expense_pipeline).to_list(100)
-    expenses_by_category = {e["_id"]: e["total"] for e in expense_result}
-    total_expenses = sum(expenses_by_category.values())
-    
-    # Calculate totals
-    total_cost = purchase_cost + total_expenses
-    actual_profit = order_value - total_cost
-    profit_margin = (actual_profit / order_value * 100) if order_value > 0 else 0
-    
-    # Calculate savings
-    purchase_target = 0
-    execution_target = 0
-    if lifecycle:
-        purchase_target = calculate_budget_amount(order_value, lifecycle.get("purchase_budget"))
-        execution_target = calculate_budget_amount(order_value, lifecycle.get("execution_budget"))
-    
-    purchase_savings = purchase_target - purchase_cost if purchase_target > 0 else 0
-    execution_savings = execution_target - total_expenses if execution_target > 0 else 0
+def order_financials(ledger: dict) -> dict:
+    """Order financials (revenue, costs, profit) from its ledger row"""
+    purchase_target = ledger.get("purchase_budget", 0)
+    execution_target = ledger.get("execution_budget", 0)
+    purchase_cost = ledger.get("purchase_cost", 0)
+    total_expenses = ledger.get("execution_expenses", 0)
     
     return {
-        "order_value": order_value,
+        "order_value": ledger.get("order_value", 0),
         "purchase_target": purchase_target,
         "purchase_actual": purchase_cost,
-        "purchase_savings": purchase_savings,
+        "purchase_savings": purchase_target - purchase_cost if purchase_target > 0 else 0,
         "execution_target": execution_target,
         "execution_actual": total_expenses,
-        "execution_savings": execution_savings,
-        "total_cost": total_cost,
-        "actual_profit": actual_profit,
-        "profit_margin": round(profit_margin, 1),
-        "expenses_by_category": expenses_by_category
+        "execution_savings": execution_target - total_expenses if execution_target > 0 else 0,
+        "total_cost": ledger.get("total_cost", 0),
+        "actual_profit": ledger.get("actual_profit", 0),
+        "profit_margin": ledger.get("profit_margin", 0),
+        "expenses_by_category": expenses_by_category(ledger)
     }
 
 
+async def get_order_financials(order_id: str) -> dict:
+    """Calculate order financials (revenue, costs, profit)"""
+    return order_financials(await get_order_ledger(db, order_id) or {})
+
+
 # ============== ORDER LIFECYCLE ENDPOINTS ==============
 
 @router.get("/orders")
@@ -203,26 +180,27 @@ async def get_orders_with_lifecycle(
     if status:
         query["status"] = status
     if search:
-        query["$or"] = [
-            {"order_no": {"$regex": search, "$options": "i"}},
-            {"customer_name": {"$regex": search, "$options": "i"}}
-        ]
+        query["id"] = {"$in": await search_entity_ids(db, "order", search)}
     
     # Get sales orders
     cursor = db.sales_orders.find(query, {"_id": 0}).sort("created_at", -1).skip(skip).limit(limit)
     orders = await cursor.to_list(length=limit)
     total = await db.sales_orders.count_documents(query)
     
-    # Enrich with lifecycle data
+    # Enrich with lifecycle data and precomputed financials
+    order_ids = [order["id"] for order in orders]
+    lifecycles = {
+        lc["sales_order_id"]: lc
+        for lc in await find_by_ids(db.order_lifecycle, order_ids, {"_id": 0}, field="sales_order_id")
+    }
+    ledgers = await get_order_ledgers(db, order_ids)
+    
     enriched_orders = []
     for order in orders:
-        lifecycle = await db.order_lifecycle.find_one({"sales_order_id": order["id"]}, {"_id": 0})
-        financials = await get_order_financials(order["id"])
-        
-        # Calculate payment status
-        paid_amount = 0
-        if lifecycle and lifecycle.get("payment_milestones"):
-            paid_amount = sum(m.get("paid_amount", 0) for m in lifecycle["payment_milestones"])
+        lifecycle = lifecycles.get(order["id"])
+        ledger = ledgers.get(order["id"], {})
+        financials = order_financials(ledger)
+        paid_amount = ledger.get("paid_amount", 0)
         
         payment_percentage = (paid_amount / order.get("total_amount", 1) * 100) if order.get("total_amount") else 0
         
@@ -253,7 +231,7 @@ async def get_order_details(order_id: str):
     expenses = await db.order_expenses.find({"order_id": order_id}, {"_id": 0}).sort("date", -1).to_list(500)
     
     # Get purchase orders
-    purchase_orders = await db.purchase_orders.find({"order_id": order_id}, {"_id": 0}).to_list(100)
+    purchase_orders = await db.purchase_orders_v2.find({"sales_order_id": order_id}, {"_id": 0}).to_list(100)
     
     # Get linked project
     linked_project = None
@@ -356,7 +334,11 @@ async def create_or_update_lifecycle(order_id: str, data: OrderLifecycleCreate):
             "created_at": datetime.now(timezone.utc),
             "updated_at": datetime.now(timezone.utc)
         }
+        project["customer_id"] = sales_order.get("customer_id")
+        await assign_customer_id(db, "projects", project)
         await db.projects.insert_one(project)
+        await refresh_search_index(db, "projects", [project_id])
+        columnar.mark_stale("projects")
         
         # Update lifecycle with project link
         await db.order_lifecycle.update_one(
@@ -366,6 +348,7 @@ async def create_or_update_lifecycle(order_id: str, data: OrderLifecycleCreate):
         
         lifecycle_data["linked_project_id"] = project_id
     
+    await refresh_order_ledger(db, [order_id])
     lifecycle = await db.order_lifecycle.find_one({"sales_order_id": order_id}, {"_id": 0})
     return {"message": message, "lifecycle": lifecycle}
 
@@ -429,6 +412,7 @@ async def update_lifecycle(order_id: str, data: OrderLifecycleUpdate):
         {"sales_order_id": order_id},
         {"$set": update_data}
     )
+    await refresh_order_ledger(db, [order_id])
     
     lifecycle = await db.order_lifecycle.find_one({"sales_order_id": order_id}, {"_id": 0})
     return {"message": "Lifecycle updated", "lifecycle": lifecycle}
@@ -448,6 +432,7 @@ async def update_lifecycle_status(order_id: str, status: str):
     
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Lifecycle not found")
+    await refresh_order_ledger(db, [order_id])
     
     return {"message": "Status updated", "status": status}
 
@@ -477,6 +462,7 @@ async def update_payment_milestone(order_id: str, milestone_id: str, status: str
         {"sales_order_id": order_id},
         {"$set": {"payment_milestones": milestones, "updated_at": datetime.now(timezone.utc)}}
     )
+    await refresh_order_ledger(db, [order_id])
     
     return {"message": "Payment milestone updated", "milestones": milestones}
 
@@ -561,24 +547,27 @@ async def update_expense(expense_id: str, data: dict):
         raise HTTPException(status_code=404, detail="Expense not found")
     
     expense = await db.order_expenses.find_one({"id": expense_id}, {"_id": 0})
+    await refresh_order_ledger(db, [expense.get("order_id")])
     return {"message": "Expense updated", "expense": expense}
 
 
 @router.put("/expenses/{expense_id}/approve")
 async def approve_expense(expense_id: str, approved_by: str):
     """Approve an expense"""
-    result = await db.order_expenses.update_one(
+    expense = await db.order_expenses.find_one_and_update(
         {"id": expense_id},
         {"$set": {
             "approved": True,
             "approved_by": approved_by,
             "approved_date": datetime.now().strftime("%Y-%m-%d"),
             "updated_at": datetime.now(timezone.utc)
-        }}
+        }},
+        projection={"_id": 0, "order_id": 1}
     )
     
-    if result.matched_count == 0:
+    if not expense:
         raise HTTPException(status_code=404, detail="Expense not found")
+    await refresh_order_ledger(db, [expense.get("order_id")])
     
     return {"message": "Expense approved"}
 
@@ -586,9 +575,10 @@ async def approve_expense(expense_id: str, approved_by: str):
 @router.delete("/expenses/{expense_id}")
 async def delete_expense(expense_id: str):
     """Delete an expense"""
-    result = await db.order_expenses.delete_one({"id": expense_id})
-    if result.deleted_count == 0:
+    expense = await db.order_expenses.find_one_and_delete({"id": expense_id}, {"_id": 0, "order_id": 1})
+    if not expense:
         raise HTTPException(status_code=404, detail="Expense not found")
+    await refresh_order_ledger(db, [expense.get("order_id")])
     return {"message": "Expense deleted"}
 
 
@@ -742,21 +732,16 @@ async def get_dashboard_stats():
 @router.get("/dashboard/profitability")
 async def get_profitability_report(limit: int = 20):
     """Get order-wise profitability report"""
-    # Get recent orders
-    orders = await db.sales_orders.find({}, {"_id": 0}).sort("created_at", -1).limit(limit).to_list(limit)
-    
+    # Ledger rows of the most recent orders
     profitability = []
-    for order in orders:
-        financials = await get_order_financials(order["id"])
-        lifecycle = await db.order_lifecycle.find_one({"sales_order_id": order["id"]}, {"_id": 0})
-        
+    async for ledger in db.order_ledger.find({}, {"_id": 0}).sort("created_at", -1).limit(limit):
         profitability.append({
-            "order_no": order.get("order_no"),
-            "customer": order.get("customer_name"),
-            "order_date": order.get("date"),
-            "order_value": order.get("total_amount", 0),
-            "status": lifecycle.get("status", "new") if lifecycle else "new",
-            **financials
+            "order_no": ledger.get("order_no"),
+            "customer": ledger.get("customer_name"),
+            "order_date": ledger.get("order_date"),
+            "order_value": ledger.get("order_value", 0),
+            "status": (ledger.get("lifecycle_status") or "new") if ledger.get("has_lifecycle") else "new",
+            **order_financials(ledger)
         })
     
     return {"profitability": profitability}
@@ -765,28 +750,6 @@ async def get_profitability_report(limit: int = 20):
 @router.get("/dashboard/savings-report")
 async def get_savings_report():
     """Get purchase and execution savings report"""
-    # Get all orders with lifecycle
-    pipeline = [
-        {"$lookup": {
-            "from": "sales_orders",
-            "localField": "sales_order_id",
-            "foreignField": "id",
-            "as": "order"
-        }},
-        {"$unwind": "$order"},
-        {"$project": {
-            "_id": 0,
-            "order_no": "$order.order_no",
-            "customer": "$order.customer_name",
-            "order_value": "$order.total_amount",
-            "purchase_budget": 1,
-            "execution_budget": 1,
-            "status": 1
-        }}
-    ]
-    
-    lifecycles = await db.order_lifecycle.aggregate(pipeline).to_list(100)
-    
     total_purchase_target = 0
     total_purchase_actual = 0
     total_execution_target = 0
@@ -794,26 +757,12 @@ async def get_savings_report():
     
     savings_details = []
     
-    for lc in lifecycles:
-        order_value = lc.get("order_value", 0)
-        
-        purchase_target = calculate_budget_amount(order_value, lc.get("purchase_budget"))
-        execution_target = calculate_budget_amount(order_value, lc.get("execution_budget"))
-        
-        # Get actuals
-        # Purchase actual from purchase_orders
-        po_result = await db.purchase_orders.aggregate([
-            {"$match": {"order_id": lc.get("sales_order_id")}},
-            {"$group": {"_id": None, "total": {"$sum": "$total_amount"}}}
-        ]).to_list(1)
-        purchase_actual = po_result[0]["total"] if po_result else 0
-        
-        # Execution actual from expenses
-        exp_result = await db.order_expenses.aggregate([
-            {"$match": {"order_id": lc.get("sales_order_id"), "approved": True}},
-            {"$group": {"_id": None, "total": {"$sum": "$amount"}}}
-        ]).to_list(1)
-        execution_actual = exp_result[0]["total"] if exp_result else 0
+    # Every order with a lifecycle, actuals precomputed in the ledger
+    async for ledger in iter_cursor(db.order_ledger.find({"has_lifecycle": True}, {"_id": 0})):
+        purchase_target = ledger["purchase_budget"]
+        execution_target = ledger["execution_budget"]
+        purchase_actual = ledger["purchase_cost"]
+        execution_actual = ledger["execution_expenses"]
         
         purchase_savings = purchase_target - purchase_actual
         execution_savings = execution_target - execution_actual
@@ -824,9 +773,9 @@ async def get_savings_report():
         total_execution_actual += execution_actual
         
         savings_details.append({
-            "order_no": lc.get("order_no"),
-            "customer": lc.get("customer"),
-            "order_value": order_value,
+            "order_no": ledger.get("order_no"),
+            "customer": ledger.get("customer_name"),
+            "order_value": ledger["order_value"],
             "purchase_target": purchase_target,
             "purchase_actual": purchase_actual,
             "purchase_savings": purchase_savings,
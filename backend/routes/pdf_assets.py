@@ -0,0 +1,190 @@
+"""
+PDF Asset Registry - Process-wide cache of logos and branding images for PDF reports.
+
+Logo files are resolved on the local filesystem once, read once and kept as
+decoded ImageReader objects keyed by content hash. Down-scaled variants for a
+given draw size are cached too, so large uploaded logos are not re-embedded at
+full resolution in every report.
+
+Resolution is repeated only when the PDF template settings (branding logo or
+updated_at) or the requested logo URL change, or after invalidate() is called
+by the logo upload endpoints. Rendering never performs network requests:
+logo URLs are mapped to files in the uploads directories.
+"""
+import hashlib
+import io
+import os
+import threading
+from typing import Dict, Iterable, Optional, Tuple
+
+from reportlab.lib.utils import ImageReader
+from reportlab.platypus import Image
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Directories uploaded files are served from (/api/uploads/... and /uploads/...)
+UPLOAD_DIRS = ['/app/uploads', '/app/backend/uploads', os.path.join(BACKEND_DIR, 'uploads')]
+
+# Company logo files used by the report generators before a URL-based logo
+LEGACY_LOGO_PATHS = [
+    '/app/backend/uploads/company_logo.png',
+    '/app/backend/uploads/enerzia_logo_2025.png',
+]
+
+DEFAULT_LOGO_PATHS = [
+    os.path.join(BACKEND_DIR, 'assets', 'enerzia_logo.jpg'),
+    os.path.join(BACKEND_DIR, 'assets', 'enerzia_logo.png'),
+]
+
+# Scaled variants are rendered at this resolution (dots per inch of the drawn size)
+SCALE_DPI = 200
+
+
+class PDFAsset:
+    """One image file decoded once and shared by all renders"""
+
+    def __init__(self, path: str, data: bytes):
+        self.path = path
+        self.data = data
+        self.content_hash = hashlib.sha256(data).hexdigest()
+        self.reader = ImageReader(io.BytesIO(data))
+        self.size = self.reader.getSize()
+        self._scaled: Dict[Tuple[int, int], ImageReader] = {}
+        self._lock = threading.Lock()
+
+    def scaled(self, width: float, height: float) -> ImageReader:
+        """
+        ImageReader for drawing at width x height points.
+
+        Images larger than needed at SCALE_DPI are down-sampled once per size.
+        Smaller images use the shared original, except JPEGs, which are
+        embedded as-is from the cached bytes through a fresh reader (reportlab
+        seeks a JPEG reader's file handle while writing).
+        """
+        target = (max(1, int(width * SCALE_DPI / 72)), max(1, int(height * SCALE_DPI / 72)))
+        if self.size[0] <= target[0] and self.size[1] <= target[1]:
+            if self.reader.jpeg_fh() is not None:
+                return ImageReader(io.BytesIO(self.data))
+            return self.reader
+        with self._lock:
+            if target not in self._scaled:
+                image = self.reader._image.copy()
+                image.thumbnail(target)
+                self._scaled[target] = ImageReader(image)
+            return self._scaled[target]
+
+    def image(self, width: float, height: float, **kwargs) -> Image:
+        """Platypus Image flowable drawing the cached (scaled) reader"""
+        return CachedImage(self.scaled(width, height), width=width, height=height, **kwargs)
+
+
+class CachedImage(Image):
+    """Image flowable built from an already-decoded ImageReader instead of a file"""
+
+    def __init__(self, reader: ImageReader, width=None, height=None, kind='direct', mask='auto', hAlign='CENTER'):
+        self.hAlign = hAlign
+        self._mask = mask
+        self._drawing = None
+        self._file = None
+        self._dpi = False
+        self._img = reader
+        self.filename = repr(reader)
+        self._setup(width, height, kind, 0)
+
+
+class PDFAssetRegistry:
+    """Resolves logical logo names to PDFAssets, caching both lookups and decoded images"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._assets: Dict[str, PDFAsset] = {}          # content hash -> asset
+        self._path_hashes: Dict[str, str] = {}          # file path -> content hash
+        self._resolved: Dict[tuple, Optional[str]] = {}  # lookup key -> content hash
+        self._settings_signature = None
+
+    def invalidate(self):
+        """Forget all resolutions and decoded images (e.g. after a logo upload)"""
+        with self._lock:
+            self._assets.clear()
+            self._path_hashes.clear()
+            self._resolved.clear()
+            self._settings_signature = None
+
+    def _load(self, path: str) -> Optional[PDFAsset]:
+        if path in self._path_hashes:
+            return self._assets.get(self._path_hashes[path])
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            asset = PDFAsset(path, data)
+        except Exception as e:
+            print(f"Error loading PDF asset {path}: {e}")
+            return None
+        # Identical files under different names share one decoded asset
+        asset = self._assets.setdefault(asset.content_hash, asset)
+        self._path_hashes[path] = asset.content_hash
+        return asset
+
+    def _resolve(self, key: tuple, candidates: Iterable[Optional[str]]) -> Optional[PDFAsset]:
+        with self._lock:
+            if key in self._resolved:
+                content_hash = self._resolved[key]
+                return self._assets.get(content_hash) if content_hash else None
+            asset = None
+            for path in candidates:
+                if path and os.path.isfile(path):
+                    asset = self._load(path)
+                    if asset:
+                        break
+            self._resolved[key] = asset.content_hash if asset else None
+            return asset
+
+    def _check_settings(self, settings: dict):
+        branding = (settings or {}).get('branding', {}) or {}
+        signature = (branding.get('logo_url'), (settings or {}).get('updated_at'))
+        if signature != self._settings_signature:
+            with self._lock:
+                self._resolved = {k: v for k, v in self._resolved.items() if k[0] != 'template'}
+                self._settings_signature = signature
+
+    def template_logo(self, settings: dict) -> Optional[PDFAsset]:
+        """Logo configured in PDF template settings, falling back to the bundled default"""
+        self._check_settings(settings)
+        logo_url = ((settings or {}).get('branding', {}) or {}).get('logo_url')
+        return self._resolve(('template', logo_url), list(upload_paths(logo_url)) + DEFAULT_LOGO_PATHS)
+
+    def company_logo(self, logo_url: Optional[str] = None) -> Optional[PDFAsset]:
+        """Organization logo: legacy local files first, then the uploaded logo_url file"""
+        return self._resolve(('company', logo_url), LEGACY_LOGO_PATHS + list(upload_paths(logo_url)))
+
+    def upload(self, url: Optional[str]) -> Optional[PDFAsset]:
+        """File behind an uploads URL only (no fallbacks)"""
+        return self._resolve(('upload', url), list(upload_paths(url)))
+
+    def file(self, path: str) -> Optional[PDFAsset]:
+        """Any other static image (cover images, fixed logos) by path"""
+        return self._resolve(('file', path), [path])
+
+
+def upload_paths(url: Optional[str]):
+    """Local file candidates for an uploads URL; remote hosts are never contacted"""
+    if not url:
+        return
+    relative = url.split('?', 1)[0]
+    if relative.startswith('http'):
+        # Only files served by this application can be resolved locally
+        marker = '/uploads/'
+        if marker not in relative:
+            return
+        relative = relative[relative.index(marker):]
+    for prefix in ('/api/uploads/', '/uploads/'):
+        if relative.startswith(prefix):
+            relative = relative[len(prefix):]
+            break
+    else:
+        relative = relative.split('/')[-1]
+    for directory in UPLOAD_DIRS:
+        yield os.path.join(directory, relative)
+
+
+registry = PDFAssetRegistry()
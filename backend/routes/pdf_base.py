@@ -2,8 +2,6 @@
 PDF Base Module - Shared styles, colors, and utilities for all PDF reports.
 This module consolidates common PDF generation code to reduce duplication.
 """
-import io
-import os
 import base64
 from datetime import datetime, timezone
 from reportlab.lib import colors
@@ -13,7 +11,6 @@ from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph,
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
 from reportlab.pdfgen import canvas
-import requests
 
 import sys
 sys.path.insert(0, '/app/backend')
@@ -33,6 +30,8 @@ from routes.pdf_template_settings import (
     REPORT_TYPES,
     REPORT_TYPE_LABELS
 )
+from routes.pdf_assets import registry as pdf_assets
+from routes.pdf_styles import memoized_styles
 
 
 # ============ TEMPLATE SETTINGS CACHE ============
@@ -68,6 +67,11 @@ def get_pdf_logo_path():
     return get_logo_path(settings)
 
 
+def get_pdf_logo():
+    """Get the template logo as a cached PDFAsset (decoded once per process)"""
+    return pdf_assets.template_logo(get_template_settings())
+
+
 def get_pdf_primary_color():
     """Get primary color (orange accent) from template settings"""
     settings = get_template_settings()
@@ -186,6 +190,7 @@ COL_LABEL_WIDTH = 0.18
 COL_VALUE_WIDTH = 0.32
 
 
+@memoized_styles
 def create_base_styles():
     """Create standard paragraph styles for all PDF reports."""
     styles = getSampleStyleSheet()
@@ -441,46 +446,18 @@ class BaseNumberedCanvas(canvas.Canvas):
 
 
 def get_logo_image(logo_url, width=80):
-    """Fetch and return logo image for PDF.
+    """Return the organization logo as an Image flowable for PDF.
     
     Tries in order:
     1. Local file paths (company_logo.png, enerzia_logo_2025.png)
-    2. URL starting with /api/uploads/
-    3. Full HTTP URL
-    """
-    from reportlab.platypus import Image
-    
-    # First try common local file paths
-    local_paths = [
-        '/app/backend/uploads/company_logo.png',
-        '/app/backend/uploads/enerzia_logo_2025.png'
-    ]
-    
-    for local_path in local_paths:
-        if os.path.exists(local_path):
-            try:
-                img = Image(local_path, width=width, height=width*0.35)
-                return img
-            except Exception as e:
-                print(f"Error loading local logo {local_path}: {e}")
-    
-    # Then try URL-based loading
-    if logo_url:
-        try:
-            if logo_url.startswith('/api/uploads/'):
-                full_url = f"https://crm-lead-manager-6.preview.emergentagent.com{logo_url}"
-                response = requests.get(full_url, timeout=5)
-                if response.status_code == 200:
-                    img_data = io.BytesIO(response.content)
-                    return Image(img_data, width=width, height=width*0.35)
-            elif logo_url.startswith('http'):
-                response = requests.get(logo_url, timeout=5)
-                if response.status_code == 200:
-                    img_data = io.BytesIO(response.content)
-                    return Image(img_data, width=width, height=width*0.35)
-        except Exception as e:
-            print(f"Error loading logo from URL {logo_url}: {e}")
+    2. Uploaded file behind a /api/uploads/ or /uploads/ URL
     
+    The file is read and decoded once per process (see pdf_assets); remote
+    URLs are never fetched while rendering.
+    """
+    logo = pdf_assets.company_logo(logo_url)
+    if logo:
+        return logo.image(width, width*0.35)
     return None
 
 
@@ -0,0 +1,256 @@
+"""
+PDF Gantt Chart - Vector-drawn timeline flowable for schedule reports.
+
+A day-per-column Table needs one BACKGROUND style command per highlighted
+cell, so long schedules produce tens of thousands of commands and hundreds
+of pages. GanttChart instead draws each bar as one rectangle spanning its
+date range, with row labels truncated and date offsets computed once when
+the rows are built.
+
+gantt_pages() picks a day, week or month scale for the timeline length and
+returns one GanttChart per horizontal page; each chart splits vertically
+across frames and repeats its date header on every page.
+"""
+import calendar
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from reportlab.lib import colors
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.platypus import Flowable
+
+HEADER_BG = colors.HexColor('#1e3a5f')
+GRID_COLOR = colors.HexColor('#cbd5e1')
+PHASE_LABEL_BG = colors.HexColor('#f1f5f9')
+SUBITEM_LABEL_BG = colors.HexColor('#f8fafc')
+PROGRESS_COLOR = colors.HexColor('#1e40af')
+LABEL_COLOR = colors.HexColor('#333333')
+
+HEADER_HEIGHT = 20
+PHASE_ROW_HEIGHT = 22
+SUBITEM_ROW_HEIGHT = 16
+LABEL_FONT = 'Helvetica'
+LABEL_FONT_BOLD = 'Helvetica-Bold'
+LABEL_FONT_SIZE = 7
+HEADER_FONT_SIZE = 6.5
+LABEL_PADDING = 4
+
+# scale -> (days per column, columns per page); month columns follow the calendar
+SCALES = {
+    'day': (1, 25),
+    'week': (7, 26),
+    'month': (31, 18),
+}
+# Auto scale uses the finest scale that keeps the chart within this many pages across
+AUTO_MAX_PAGES = 2
+
+
+@dataclass
+class GanttRow:
+    """One bar; start and end are inclusive day offsets from the timeline start"""
+    kind: str  # phase, subitem
+    label: str
+    detail: str
+    start: Optional[int]
+    end: Optional[int]
+    color: colors.Color
+
+    @property
+    def height(self) -> int:
+        return PHASE_ROW_HEIGHT if self.kind == 'phase' else SUBITEM_ROW_HEIGHT
+
+
+@dataclass(frozen=True)
+class GanttColumn:
+    start: int  # day offset, inclusive
+    end: int  # day offset, exclusive
+    label: str
+
+
+def lighter(color: colors.Color) -> colors.Color:
+    """Sub-item shade of a phase colour"""
+    return colors.Color(
+        min(255, int(color.red * 255 * 0.6 + 100)) / 255,
+        min(255, int(color.green * 255 * 0.6 + 100)) / 255,
+        min(255, int(color.blue * 255 * 0.6 + 100)) / 255,
+    )
+
+
+def fit_text(text: str, font: str, size: float, width: float) -> str:
+    """Truncate text with an ellipsis so it fits in width points"""
+    if stringWidth(text, font, size) <= width:
+        return text
+    low, high = 0, len(text)
+    while low < high:
+        mid = (low + high + 1) // 2
+        if stringWidth(text[:mid] + '…', font, size) <= width:
+            low = mid
+        else:
+            high = mid - 1
+    return text[:low].rstrip() + '…'
+
+
+def make_row(kind: str, label: str, detail: str, start: Optional[datetime], end: Optional[datetime],
+             origin: datetime, color: colors.Color, label_width: float) -> GanttRow:
+    """Row with its label fitted to the label column and its dates as day offsets"""
+    has_dates = start is not None and end is not None and end >= start
+    detail_width = stringWidth(detail, LABEL_FONT_BOLD, LABEL_FONT_SIZE) + LABEL_PADDING if detail else 0
+    indent = 0 if kind == 'phase' else 8
+    font = LABEL_FONT_BOLD if kind == 'phase' else LABEL_FONT
+    return GanttRow(
+        kind=kind,
+        label=fit_text(label, font, LABEL_FONT_SIZE, label_width - 2 * LABEL_PADDING - indent - detail_width),
+        detail=detail,
+        start=(start - origin).days if has_dates else None,
+        end=(end - origin).days if has_dates else None,
+        color=color,
+    )
+
+
+def _columns(scale: str, origin: datetime, total_days: int) -> List[GanttColumn]:
+    if scale == 'month':
+        columns = []
+        year, month = origin.year, origin.month
+        while True:
+            first = datetime(year, month, 1)
+            next_first = first + timedelta(days=calendar.monthrange(year, month)[1])
+            start, end = max(0, (first - origin).days), min(total_days, (next_first - origin).days)
+            if start >= total_days:
+                return columns
+            columns.append(GanttColumn(start, end, first.strftime('%b %y')))
+            year, month = next_first.year, next_first.month
+    step = SCALES[scale][0]
+    return [
+        GanttColumn(offset, min(offset + step, total_days), (origin + timedelta(days=offset)).strftime('%d/%m'))
+        for offset in range(0, total_days, step)
+    ]
+
+
+def choose_scale(total_days: int) -> str:
+    for scale, (days_per_column, columns_per_page) in SCALES.items():
+        if total_days <= days_per_column * columns_per_page * AUTO_MAX_PAGES:
+            return scale
+    return 'month'
+
+
+class GanttChart(Flowable):
+    """Label column plus a slice of the timeline; splits by rows across frames"""
+
+    def __init__(self, rows: List[GanttRow], columns: List[GanttColumn], points_per_day: float,
+                 label_width: float, scale: str):
+        super().__init__()
+        self.rows = rows
+        self.columns = columns
+        self.points_per_day = points_per_day
+        self.label_width = label_width
+        self.scale = scale
+        self.first_day = columns[0].start
+        self.last_day = columns[-1].end
+        self.chart_width = (self.last_day - self.first_day) * points_per_day
+        self.hAlign = 'LEFT'
+
+    def _height(self, rows: List[GanttRow]) -> float:
+        return HEADER_HEIGHT + sum(r.height for r in rows)
+
+    def wrap(self, availWidth, availHeight):
+        self.width = self.label_width + self.chart_width
+        self.height = self._height(self.rows)
+        return self.width, self.height
+
+    def split(self, availWidth, availHeight):
+        used, count = HEADER_HEIGHT, 0
+        for row in self.rows:
+            if used + row.height > availHeight:
+                break
+            used += row.height
+            count += 1
+        if count == 0 or count == len(self.rows):
+            return [] if count == 0 else [self]
+        return [
+            GanttChart(self.rows[:count], self.columns, self.points_per_day, self.label_width, self.scale),
+            GanttChart(self.rows[count:], self.columns, self.points_per_day, self.label_width, self.scale),
+        ]
+
+    def _x(self, day: int) -> float:
+        return self.label_width + (day - self.first_day) * self.points_per_day
+
+    def draw(self):
+        c = self.canv
+        top = self.height
+
+        # Header row
+        c.setFillColor(HEADER_BG)
+        c.rect(0, top - HEADER_HEIGHT, self.width, HEADER_HEIGHT, stroke=0, fill=1)
+        c.setFillColor(colors.white)
+        c.setFont(LABEL_FONT_BOLD, LABEL_FONT_SIZE)
+        c.drawString(LABEL_PADDING, top - HEADER_HEIGHT + 7, 'Phase / Sub-Item')
+        c.setFont(LABEL_FONT_BOLD, HEADER_FONT_SIZE)
+        for column in self.columns:
+            left, right = self._x(column.start), self._x(column.end)
+            # Partial first/last months can be too narrow for a label
+            if stringWidth(column.label, LABEL_FONT_BOLD, HEADER_FONT_SIZE) < right - left:
+                c.drawCentredString((left + right) / 2, top - HEADER_HEIGHT + 7, column.label)
+
+        # Label backgrounds, bars and label text, top to bottom
+        y = top - HEADER_HEIGHT
+        for row in self.rows:
+            y -= row.height
+            c.setFillColor(PHASE_LABEL_BG if row.kind == 'phase' else SUBITEM_LABEL_BG)
+            c.rect(0, y, self.label_width, row.height, stroke=0, fill=1)
+
+            if row.start is not None and row.end >= self.first_day and row.start < self.last_day:
+                start = max(row.start, self.first_day)
+                end = min(row.end + 1, self.last_day)
+                inset = 3 if row.kind == 'phase' else 3.5
+                c.setFillColor(row.color)
+                c.rect(self._x(start), y + inset, (end - start) * self.points_per_day, row.height - 2 * inset,
+                       stroke=0, fill=1)
+
+            text_y = y + row.height / 2 - 2.5
+            c.setFillColor(LABEL_COLOR)
+            if row.kind == 'phase':
+                c.setFont(LABEL_FONT_BOLD, LABEL_FONT_SIZE)
+                c.drawString(LABEL_PADDING, text_y, row.label)
+            else:
+                c.setFont(LABEL_FONT, LABEL_FONT_SIZE)
+                c.drawString(LABEL_PADDING + 8, text_y, row.label)
+            if row.detail:
+                c.setFillColor(PROGRESS_COLOR)
+                c.setFont(LABEL_FONT_BOLD, LABEL_FONT_SIZE)
+                c.drawRightString(self.label_width - LABEL_PADDING, text_y, row.detail)
+
+        # Grid: one path for every line
+        path = c.beginPath()
+        for column in self.columns:
+            path.moveTo(self._x(column.start), 0)
+            path.lineTo(self._x(column.start), top)
+        path.moveTo(self.width, 0)
+        path.lineTo(self.width, top)
+        path.moveTo(0, 0)
+        path.lineTo(0, top)
+        y = top
+        for height in [HEADER_HEIGHT] + [r.height for r in self.rows]:
+            path.moveTo(0, y)
+            path.lineTo(self.width, y)
+            y -= height
+        path.moveTo(0, 0)
+        path.lineTo(self.width, 0)
+        c.setStrokeColor(GRID_COLOR)
+        c.setLineWidth(0.5)
+        c.drawPath(path, stroke=1, fill=0)
+
+
+def gantt_pages(rows: List[GanttRow], origin: datetime, total_days: int, width: float,
+                label_width: float = 180, scale: str = 'auto') -> Tuple[str, List[GanttChart]]:
+    """(scale used, one chart per horizontal page) for a timeline of total_days from origin"""
+    if scale not in SCALES:
+        scale = choose_scale(total_days)
+    days_per_column, columns_per_page = SCALES[scale]
+    points_per_day = (width - label_width) / (days_per_column * columns_per_page)
+    columns = _columns(scale, origin, total_days)
+    charts = [
+        GanttChart(rows, columns[i:i + columns_per_page], points_per_day, label_width, scale)
+        for i in range(0, len(columns), columns_per_page)
+    ]
+    return scale, charts
@@ -0,0 +1,58 @@
+"""
+PDF Style Catalog - Memoized paragraph style sheets shared by PDF generators.
+
+Style sheet builders (create_base_styles, get_amc_styles, ...) construct the
+same few dozen ParagraphStyle objects on every render. Decorating a builder
+with @memoized_styles builds its sheet once per distinct argument tuple
+(report type, design, colours, ...) and hands each caller a lightweight view
+of the shared sheet.
+
+The view is a separate StyleSheet1, so callers may still styles.add() their
+own styles without affecting other renders. The ParagraphStyle objects
+themselves are shared and must be treated as read-only: derive a new style
+with ParagraphStyle(name, parent=styles['X'], ...) instead of assigning to
+styles['X'].fontSize. (reportlab requires a parent style to have exactly the
+child's class, so the shared styles cannot be swapped for a frozen subclass.)
+"""
+import functools
+import threading
+from typing import Callable, Dict
+
+from reportlab.lib.styles import StyleSheet1
+
+
+def stylesheet_view(styles: StyleSheet1) -> StyleSheet1:
+    """New StyleSheet1 sharing the styles of another"""
+    view = StyleSheet1()
+    view.byName = dict(styles.byName)
+    view.byAlias = dict(styles.byAlias)
+    return view
+
+
+_catalog: Dict[tuple, StyleSheet1] = {}
+_catalog_lock = threading.RLock()  # builders may call other memoized builders
+
+
+def memoized_styles(builder: Callable[..., StyleSheet1]) -> Callable[..., StyleSheet1]:
+    """Cache a style sheet builder per argument tuple; arguments must be hashable"""
+    name = f"{builder.__module__}.{builder.__qualname__}"
+
+    @functools.wraps(builder)
+    def wrapper(*args, **kwargs):
+        key = (name, args, tuple(sorted(kwargs.items())))
+        styles = _catalog.get(key)
+        if styles is None:
+            with _catalog_lock:
+                styles = _catalog.get(key)
+                if styles is None:
+                    styles = builder(*args, **kwargs)
+                    _catalog[key] = styles
+        return stylesheet_view(styles)
+
+    return wrapper
+
+
+def clear_style_catalog():
+    """Drop all cached style sheets (tests and benchmarks)"""
+    with _catalog_lock:
+        _catalog.clear()
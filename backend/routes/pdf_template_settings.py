@@ -24,6 +24,8 @@ from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.platypus import Paragraph
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
 
+from routes.pdf_assets import registry as pdf_assets
+
 router = APIRouter(prefix="/api/pdf-template", tags=["PDF Template Settings"])
 
 # MongoDB connections
@@ -576,6 +578,8 @@ async def update_template_settings(update: PDFTemplateUpdate):
         {"$set": current},
         upsert=True
     )
+    if update.branding:
+        pdf_assets.invalidate()
     
     return {"message": "Settings updated successfully", "settings": current}
 
@@ -627,6 +631,7 @@ async def upload_pdf_logo(file: UploadFile = File(...)):
         }},
         upsert=True
     )
+    pdf_assets.invalidate()
     
     return {"message": "Logo uploaded successfully", "logo_url": logo_url, "filename": filename}
 
@@ -725,10 +730,10 @@ def draw_cover_page_preview(c, width, height, settings, report_type, design_id,
     
     # Logo (if enabled)
     if cover_settings.get('show_logo', True):
-        logo_path = get_logo_path(settings)
-        if logo_path and os.path.exists(logo_path):
+        logo = pdf_assets.template_logo(settings)
+        if logo:
             try:
-                c.drawImage(logo_path, 35, height - 90, width=180, height=60, 
+                c.drawImage(logo.scaled(180, 60), 35, height - 90, width=180, height=60, 
                            preserveAspectRatio=True, mask='auto')
             except Exception as e:
                 print(f"Error drawing logo: {e}")
@@ -820,10 +825,10 @@ def draw_content_page_preview(c, width, height, settings, report_type):
         header_y = height - 30
         
         if hf_settings.get('show_header_logo', True):
-            logo_path = get_logo_path(settings)
-            if logo_path and os.path.exists(logo_path):
+            logo = pdf_assets.template_logo(settings)
+            if logo:
                 try:
-                    c.drawImage(logo_path, width - margin - 100, header_y - 20, 
+                    c.drawImage(logo.scaled(100, 35), width - margin - 100, header_y - 20, 
                                width=100, height=35, preserveAspectRatio=True, mask='auto')
                 except (IOError, OSError):
                     pass
@@ -895,10 +900,10 @@ def draw_back_cover_preview(c, width, height, settings):
     
     # Logo
     if back_settings.get('show_logo', True):
-        logo_path = get_logo_path(settings)
-        if logo_path and os.path.exists(logo_path):
+        logo = pdf_assets.template_logo(settings)
+        if logo:
             try:
-                c.drawImage(logo_path, width / 2 - 100, height - 200, width=200, height=70, 
+                c.drawImage(logo.scaled(200, 70), width / 2 - 100, height - 200, width=200, height=70, 
                            preserveAspectRatio=True, mask='auto')
             except (IOError, OSError):
                 pass
@@ -0,0 +1,114 @@
+"""
+Performance Routes
+Prometheus metrics and the slow-request log collected by utils/perf.py, and
+event-loop stalls detected by utils/loop_watchdog.py, index usage for the
+indexes declared through utils/indexes.py, the size of this worker's
+columnar analytics snapshots (utils/columnar.py) and the state of its change
+feed (utils/change_feed.py).
+"""
+import hmac
+import os
+
+from typing import Optional
+
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+from fastapi.security import HTTPAuthorizationCredentials
+
+from core.database import db
+from core.security import require_admin, require_auth, security
+from utils import columnar, perf, responses
+from utils.indexes import apply_indexes, index_usage_report
+from utils.loop_watchdog import watchdog
+from utils import scheduler
+from utils.change_feed import change_feed
+
+router = APIRouter(prefix="/api/admin/performance", tags=["Performance"])
+
+# /metrics is served at the root for Prometheus scrapers
+metrics_router = APIRouter(tags=["Performance"])
+
+# Bearer token for Prometheus scrapers; without it /metrics needs an admin login
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+
+
+@metrics_router.get("/metrics", include_in_schema=False)
+async def prometheus_metrics(credentials: Optional[HTTPAuthorizationCredentials] = Depends(security)):
+    """
+    Request, Mongo, cache, event-loop, scheduled-job, snapshot, change-feed and compression metrics in Prometheus text format.
+
+    Scrapers send METRICS_TOKEN as a bearer token; any other caller needs an admin JWT.
+    """
+    supplied = credentials.credentials if credentials else ""
+    if not (METRICS_TOKEN and hmac.compare_digest(supplied, METRICS_TOKEN)):
+        await require_admin(await require_auth(credentials))
+    body = (perf.render_metrics() + watchdog.render_metrics() + scheduler.render_metrics()
+            + columnar.render_metrics() + change_feed.render_metrics() + responses.render_metrics())
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4")
+
+
+@router.get("/slow-requests")
+async def get_slow_requests(limit: int = 50, current_user: dict = Depends(require_admin)):
+    """Most recent slow requests with their Mongo query breakdown, newest first"""
+    entries = list(perf.slow_requests)[::-1][:max(1, min(limit, perf.SLOW_LOG_SIZE))]
+    return {
+        "thresholds": {"seconds": perf.SLOW_REQUEST_SECONDS, "mongo_commands": perf.SLOW_REQUEST_QUERIES},
+        "count": len(entries),
+        "requests": entries,
+    }
+
+
+@router.get("/routes")
+async def get_route_summary(limit: int = 50, current_user: dict = Depends(require_admin)):
+    """Per-route averages, routes issuing the most Mongo commands per request first"""
+    return {"routes": perf.route_summary(limit)}
+
+
+@router.get("/loop-stalls")
+async def get_loop_stalls(limit: int = 20, current_user: dict = Depends(require_admin)):
+    """Event-loop stall counts per route and the top blocking call sites with sample stacks"""
+    return watchdog.report(max(1, min(limit, 100)))
+
+
+@router.get("/indexes")
+async def get_index_usage(collection: Optional[str] = None, current_user: dict = Depends(require_admin)):
+    """$indexStats usage per index, with unused, unregistered and missing indexes called out"""
+    report = await index_usage_report(db, [collection] if collection else None)
+    return {
+        "collections": report,
+        "missing": sum(len(c["missing"]) for c in report),
+        "unused": sum(len(c["unused"]) for c in report),
+    }
+
+
+@router.post("/indexes/apply")
+async def apply_registered_indexes(current_user: dict = Depends(require_admin)):
+    """Create registered indexes that are missing, e.g. after restoring a dump"""
+    return await apply_indexes(db)
+
+
+@router.get("/analytics-snapshots")
+async def get_analytics_snapshots(current_user: dict = Depends(require_admin)):
+    """Rows, memory and refresh counts of the columnar snapshots held by the worker serving this request"""
+    snapshots = columnar.snapshot_stats()
+    return {
+        "enabled": columnar.COLUMNAR_ENABLED,
+        "refresh_seconds": columnar.REFRESH_SECONDS,
+        "full_reload_seconds": columnar.FULL_RELOAD_SECONDS,
+        "memory_bytes": sum(s["memory_bytes"] for s in snapshots),
+        "snapshots": snapshots,
+    }
+
+
+@router.get("/change-feed")
+async def get_change_feed_status(current_user: dict = Depends(require_admin)):
+    """Source, leadership and change counts of the change feed in the worker serving this request"""
+    return change_feed.status()
+
+
+@router.post("/reset")
+async def reset_performance_metrics(current_user: dict = Depends(require_admin)):
+    """Clear collected metrics, the slow-request log and loop stall statistics"""
+    perf.reset_metrics()
+    watchdog.reset()
+    return {"message": "Performance metrics reset"}
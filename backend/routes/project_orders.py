@@ -11,6 +11,12 @@ from pydantic import BaseModel, Field
 from typing import List, Optional
 from datetime import datetime, timezone
 from motor.motor_asyncio import AsyncIOMotorClient
+
+from utils import columnar
+from utils.search import refresh_search_index
+from utils.order_ledger import refresh_order_ledger
+from utils.sales_cube import refresh_sales_cube
+from utils.customer_identity import assign_customer_id
 import uuid
 import os
 
@@ -326,7 +332,11 @@ async def create_project_from_order(data: OrderHandoffCreate):
         "updated_at": datetime.now(timezone.utc).isoformat()
     }
     
+    project["customer_id"] = order.get("customer_id")
+    await assign_customer_id(db, "projects", project)
     await db.projects.insert_one(project)
+    await refresh_search_index(db, "projects", [project["id"]])
+    columnar.mark_stale("projects")
     
     # Update order status to indicate handoff
     await db.sales_orders.update_one(
@@ -338,6 +348,8 @@ async def create_project_from_order(data: OrderHandoffCreate):
             "updated_at": datetime.now(timezone.utc)
         }}
     )
+    await refresh_order_ledger(db, [data.order_id])
+    await refresh_sales_cube(db, "order", [data.order_id])
     
     # Update order_lifecycle if exists
     await db.order_lifecycle.update_one(
@@ -444,6 +456,8 @@ async def record_weekly_billing(data: WeeklyBillingCreate):
                 "updated_at": datetime.now(timezone.utc)
             }}
         )
+        await refresh_order_ledger(db, [project["linked_order_id"]])
+        await refresh_sales_cube(db, "order", [project["linked_order_id"]])
         
         # Update order lifecycle
         lifecycle_status = "execution"
@@ -10,9 +10,22 @@ import uuid
 
 from core.database import db
 from core.security import get_current_user, require_auth
+from utils import columnar
+from utils.streaming import iter_batches
+from utils.indexes import index, register_indexes
 
 router = APIRouter(prefix="/project-profit", tags=["Project Profit"])
 
+register_indexes(__name__, {
+    "project_budgets": [
+        index("project_id"),
+    ],
+    "project_costs": [
+        index("id"),
+        index("project_id"),
+    ],
+})
+
 
 # ==================== MODELS ====================
 
@@ -352,11 +365,13 @@ async def get_project_profit_analysis(project_id: str, current_user: dict = Depe
 async def get_profit_dashboard(current_user: dict = Depends(require_auth)):
     """Get overall profit dashboard across all projects"""
     
-    # Get all projects with budgets
-    budgets = await db.project_budgets.find({}, {"_id": 0}).to_list(500)
-    
-    # Get all costs
-    all_costs = await db.project_costs.find({}, {"_id": 0}).to_list(2000)
+    # Actual cost per project, summed in the database
+    cost_totals = {
+        row["_id"]: row["total"]
+        async for row in db.project_costs.aggregate([
+            {"$group": {"_id": "$project_id", "total": {"$sum": "$amount"}}}
+        ])
+    }
     
     # Aggregate by project
     project_summaries = []
@@ -364,42 +379,44 @@ async def get_profit_dashboard(current_user: dict = Depends(require_auth)):
     total_budget = 0
     total_actual = 0
     
-    for budget in budgets:
-        project_id = budget.get("project_id")
-        project = await db.projects.find_one({"id": project_id}, {"_id": 0, "pid_no": 1, "project_name": 1, "client": 1, "status": 1})
-        
-        if not project:
-            continue
-        
-        order_value = budget.get("order_value", 0)
-        budget_total = (budget.get("material_budget", 0) + budget.get("labor_budget", 0) + 
-                       budget.get("subcontractor_budget", 0) + budget.get("travel_budget", 0) + 
-                       budget.get("overhead_budget", 0) + budget.get("contingency_budget", 0))
-        
-        # Get costs for this project
-        project_costs = [c for c in all_costs if c.get("project_id") == project_id]
-        actual_total = sum(c.get("amount", 0) for c in project_costs)
-        
-        gross_profit = order_value - actual_total
-        margin = (gross_profit / order_value * 100) if order_value > 0 else 0
-        
-        project_summaries.append({
-            "project_id": project_id,
-            "pid_no": project.get("pid_no"),
-            "project_name": project.get("project_name"),
-            "client": project.get("client"),
-            "status": project.get("status"),
-            "order_value": order_value,
-            "budget": budget_total,
-            "actual_cost": actual_total,
-            "gross_profit": gross_profit,
-            "profit_margin": round(margin, 2),
-            "budget_status": budget.get("status", "draft")
-        })
-        
-        total_revenue += order_value
-        total_budget += budget_total
-        total_actual += actual_total
+    snapshot = await columnar.snapshot_frame(db, "projects")
+    project_fields = ["pid_no", "project_name", "client", "status"]
+    async for budgets in iter_batches(db.project_budgets.find({}, {"_id": 0})):
+        projects = columnar.rows(snapshot, [b.get("project_id") for b in budgets], project_fields)
+        for budget in budgets:
+            project_id = budget.get("project_id")
+            project = projects.get(project_id)
+            
+            if not project:
+                continue
+            
+            order_value = budget.get("order_value", 0)
+            budget_total = (budget.get("material_budget", 0) + budget.get("labor_budget", 0) + 
+                           budget.get("subcontractor_budget", 0) + budget.get("travel_budget", 0) + 
+                           budget.get("overhead_budget", 0) + budget.get("contingency_budget", 0))
+            
+            actual_total = cost_totals.get(project_id, 0)
+            
+            gross_profit = order_value - actual_total
+            margin = (gross_profit / order_value * 100) if order_value > 0 else 0
+            
+            project_summaries.append({
+                "project_id": project_id,
+                "pid_no": project.get("pid_no"),
+                "project_name": project.get("project_name"),
+                "client": project.get("client"),
+                "status": project.get("status"),
+                "order_value": order_value,
+                "budget": budget_total,
+                "actual_cost": actual_total,
+                "gross_profit": gross_profit,
+                "profit_margin": round(margin, 2),
+                "budget_status": budget.get("status", "draft")
+            })
+            
+            total_revenue += order_value
+            total_budget += budget_total
+            total_actual += actual_total
     
     # Sort by profit margin
     project_summaries.sort(key=lambda x: x["profit_margin"], reverse=True)
@@ -421,14 +438,21 @@ async def get_profit_dashboard(current_user: dict = Depends(require_auth)):
 
 # ==================== HELPER FUNCTIONS ====================
 
+async def sum_field(collection, query: dict, field: str) -> float:
+    """Sum a numeric field over every matching document"""
+    rows = await collection.aggregate([
+        {"$match": query},
+        {"$group": {"_id": None, "total": {"$sum": f"${field}"}}}
+    ]).to_list(1)
+    return rows[0]["total"] if rows else 0
+
+
 async def update_project_actual_expenses(project_id: str):
     """Update project's actual_expenses from all cost entries"""
-    costs = await db.project_costs.find({"project_id": project_id}, {"_id": 0}).to_list(500)
-    total = sum(c.get("amount", 0) for c in costs)
+    total = await sum_field(db.project_costs, {"project_id": project_id}, "amount")
     
     # Also get travel expenses
-    travel = await db.travel_logs.find({"project_id": project_id}, {"_id": 0, "total_expenses": 1}).to_list(100)
-    travel_total = sum(t.get("total_expenses", 0) for t in travel)
+    travel_total = await sum_field(db.travel_logs, {"project_id": project_id}, "total_expenses")
     
     total_expenses = total + travel_total
     
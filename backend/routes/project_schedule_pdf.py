@@ -16,17 +16,15 @@ from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT, TA_JUSTIFY
 from reportlab.graphics.shapes import Drawing, Rect, Line
 from reportlab.pdfgen import canvas
 from io import BytesIO
-from datetime import datetime, timedelta
+from datetime import datetime
 from fastapi import APIRouter, HTTPException
 from fastapi.responses import StreamingResponse
-import os
-import math
 
 # Import from pdf_base including template settings helpers
 from routes.pdf_base import (
     format_date_ddmmyyyy,
     get_template_settings,
-    get_pdf_logo_path,
+    get_pdf_logo,
     get_pdf_primary_color,
     get_pdf_company_name,
     get_pdf_website,
@@ -44,6 +42,8 @@ from routes.pdf_template_settings import (
     get_report_design,
     DESIGN_OPTIONS
 )
+from routes.pdf_styles import memoized_styles
+from routes.pdf_gantt import gantt_pages, lighter, make_row
 
 router = APIRouter()
 
@@ -86,6 +86,7 @@ def get_db():
     return db
 
 
+@memoized_styles
 def get_schedule_styles():
     """Get custom styles for Project Schedule report"""
     styles = getSampleStyleSheet()
@@ -189,7 +190,7 @@ def draw_cover_page(canvas_obj, doc, schedule, project):
     template_settings = get_template_settings()
     cover_settings = get_cover_page_settings()
     company_info = get_pdf_company_info()
-    logo_path = get_pdf_logo_path()
+    logo = get_pdf_logo()
     company_name = get_pdf_company_name()
     website = get_pdf_website()
     
@@ -218,9 +219,9 @@ def draw_cover_page(canvas_obj, doc, schedule, project):
     # =====================================================
     # COMPANY LOGO - Top Left
     # =====================================================
-    if cover_settings.get('show_logo', True) and logo_path and os.path.exists(logo_path):
+    if cover_settings.get('show_logo', True) and logo:
         try:
-            c.drawImage(logo_path, 35, height - 90, width=180, height=60, 
+            c.drawImage(logo.scaled(180, 60), 35, height - 90, width=180, height=60, 
                        preserveAspectRatio=True, mask='auto')
         except Exception as e:
             print(f"Error drawing cover logo: {e}")
@@ -403,7 +404,7 @@ def draw_header_footer(canvas_obj, doc, schedule, page_num, is_landscape=False):
     
     # Get template settings
     hf_settings = get_header_footer_settings()
-    logo_path = get_pdf_logo_path()
+    logo = get_pdf_logo()
     company_name = get_pdf_company_name()
     website = get_pdf_website()
     dark_blue = PRIMARY_BLUE
@@ -433,11 +434,11 @@ def draw_header_footer(canvas_obj, doc, schedule, page_num, is_landscape=False):
     header_y = height - 30
     
     # Draw logo on right side
-    if hf_settings.get('show_header_logo', True) and logo_path and os.path.exists(logo_path):
+    if hf_settings.get('show_header_logo', True) and logo:
         logo_width = 100
         logo_height = 35
         try:
-            c.drawImage(logo_path, width - margin - logo_width, header_y - 20, 
+            c.drawImage(logo.scaled(logo_width, logo_height), width - margin - logo_width, header_y - 20, 
                        width=logo_width, height=logo_height, preserveAspectRatio=True, mask='auto')
         except Exception as e:
             print(f"Error drawing logo: {e}")
@@ -560,6 +561,47 @@ def create_status_paragraph(status, styles):
     return Paragraph(f'<font color="{hex_color}"><b>{status_text}</b></font>', styles['ScheduleTableCellCenter'])
 
 
+def build_gantt_rows(phases, project_start, label_width=180):
+    """Gantt rows for every phase and its sub-items, with dates parsed once"""
+    rows = []
+    for idx, phase in enumerate(phases):
+        color = PHASE_COLORS[idx % len(PHASE_COLORS)]
+        sub_color = lighter(color)
+        sub_items = phase.get('subItems', []) or []
+        
+        sub_dates = [
+            (parse_date(sub.get('start_date', '')) or parse_date(sub.get('start', '')),
+             parse_date(sub.get('end_date', '')) or parse_date(sub.get('end', '')))
+            for sub in sub_items
+        ]
+        
+        phase_start_date = parse_date(phase.get('start', '')) or parse_date(phase.get('start_date', ''))
+        phase_end_date = parse_date(phase.get('end', '')) or parse_date(phase.get('end_date', ''))
+        
+        # If no dates, infer from sub-items
+        if not phase_start_date or not phase_end_date:
+            for sub_s, sub_e in sub_dates:
+                if sub_s and (not phase_start_date or sub_s < phase_start_date):
+                    phase_start_date = sub_s
+                if sub_e and (not phase_end_date or sub_e > phase_end_date):
+                    phase_end_date = sub_e
+        
+        rows.append(make_row(
+            'phase', phase.get('name', '')[:30], f"{phase.get('progress', 0)}%",
+            phase_start_date, phase_end_date, project_start, color, label_width
+        ))
+        
+        for sub_idx, (sub_item, (sub_start, sub_end)) in enumerate(zip(sub_items, sub_dates)):
+            sub_desc = (sub_item.get('description') or f'Sub-item {sub_idx + 1}')[:35]
+            sub_qty = sub_item.get('qty', '') or sub_item.get('quantity', '')
+            sub_unit = sub_item.get('unit', '')
+            qty_str = f" ({sub_qty} {sub_unit})" if sub_qty else ""
+            rows.append(make_row(
+                'subitem', f"{sub_desc}{qty_str}", '', sub_start, sub_end, project_start, sub_color, label_width
+            ))
+    return rows
+
+
 def generate_project_schedule_pdf(schedule_data, project_data=None):
     """Generate a comprehensive Project Schedule PDF report"""
     
@@ -1028,7 +1070,7 @@ def generate_project_schedule_pdf(schedule_data, project_data=None):
             elements.append(Spacer(1, 15))
         
         # =====================================================
-        # GANTT CHART - DAY-WISE WITH PAGINATION
+        # GANTT CHART - VECTOR BARS WITH HORIZONTAL PAGINATION
         # Start on a NEW PAGE after Phase Breakdown
         # =====================================================
         project_start = parse_date(schedule_data.get('start_date', ''))
@@ -1037,24 +1079,19 @@ def generate_project_schedule_pdf(schedule_data, project_data=None):
         if project_start and project_end:
             total_days = (project_end - project_start).days + 1  # Include end date
             if total_days > 0:
-                # Max days per page (landscape can fit about 25-30 day columns)
-                max_days_per_page = 25
-                num_pages = math.ceil(total_days / max_days_per_page)
+                gantt_rows = build_gantt_rows(phases, project_start)
+                scale, gantt_charts = gantt_pages(
+                    gantt_rows, project_start, total_days, landscape_width - 80,
+                    scale=schedule_data.get('gantt_scale', 'auto')
+                )
+                num_pages = len(gantt_charts)
                 
-                for page_idx in range(num_pages):
+                for page_idx, gantt_chart in enumerate(gantt_charts):
                     # Always start Gantt chart on a new page
                     elements.append(PageBreak())
                     
                     elements.append(Spacer(1, 20))
                     
-                    # Calculate date range for this page
-                    page_start_day = page_idx * max_days_per_page
-                    page_end_day = min((page_idx + 1) * max_days_per_page, total_days)
-                    num_days_this_page = page_end_day - page_start_day
-                    
-                    page_start_date = project_start + timedelta(days=page_start_day)
-                    page_end_date = project_start + timedelta(days=page_end_day - 1)
-                    
                     # Header with page info if multiple pages
                     if num_pages > 1:
                         header_text = f'TIMELINE VISUALIZATION (GANTT CHART) - Page {page_idx + 1}/{num_pages}'
@@ -1076,151 +1113,13 @@ def generate_project_schedule_pdf(schedule_data, project_data=None):
                     elements.append(gantt_header_table)
                     elements.append(Spacer(1, 15))
                     
-                    # Build Gantt header row with daily date labels
-                    gantt_headers = [Paragraph('<font color="white"><b>Phase / Sub-Item</b></font>', styles['ScheduleTableCellBold'])]
-                    current_date = page_start_date
-                    for d in range(num_days_this_page):
-                        # Show date as DD/MM format
-                        day_str = current_date.strftime('%d/%m')
-                        gantt_headers.append(Paragraph(f'<font color="white"><b>{day_str}</b></font>', styles['ScheduleTableCellCenter']))
-                        current_date += timedelta(days=1)
-                    
-                    gantt_data = [gantt_headers]
-                    row_types = []  # Track if row is 'phase' or 'subitem'
-                    
-                    # Add phase rows with their sub-items
-                    for idx, phase in enumerate(phases):
-                        phase_name = phase.get('name', '')[:30]
-                        phase_start_str = phase.get('start', '') or phase.get('start_date', '')
-                        phase_end_str = phase.get('end', '') or phase.get('end_date', '')
-                        progress = phase.get('progress', 0)
-                        
-                        # Phase name with progress
-                        row = [Paragraph(f"<b>{phase_name}</b><br/><font size='7' color='#1e40af'>{progress}%</font>", styles['PhaseName'])]
-                        
-                        # Empty cells for days - color will be applied via TableStyle
-                        for d in range(num_days_this_page):
-                            row.append('')
-                        
-                        gantt_data.append(row)
-                        row_types.append(('phase', idx))
-                        
-                        # Add sub-items for this phase
-                        sub_items = phase.get('subItems', [])
-                        for sub_idx, sub_item in enumerate(sub_items):
-                            sub_desc = sub_item.get('description', f'Sub-item {sub_idx + 1}')[:35]
-                            sub_qty = sub_item.get('qty', '') or sub_item.get('quantity', '')
-                            sub_unit = sub_item.get('unit', '')
-                            qty_str = f" ({sub_qty} {sub_unit})" if sub_qty else ""
-                            
-                            sub_row = [Paragraph(f"<font size='7'>{sub_desc}</font>{qty_str}", styles['ScheduleTableCell'])]
-                            
-                            for d in range(num_days_this_page):
-                                sub_row.append('')
-                            
-                            gantt_data.append(sub_row)
-                            row_types.append(('subitem', idx))
-                    
-                    # Calculate column widths for landscape - day columns
-                    # Use fixed width based on max_days_per_page for consistency across all pages
-                    phase_col_width = 180
-                    available_width = landscape_width - 80 - phase_col_width
-                    day_col_width = available_width / max_days_per_page  # Fixed width for all pages
-                    gantt_col_widths = [phase_col_width] + [day_col_width] * num_days_this_page
-                    
-                    # Calculate row heights
-                    row_heights = [28]  # Header
-                    for rt in row_types:
-                        if rt[0] == 'phase':
-                            row_heights.append(36)
-                        else:
-                            row_heights.append(26)
-                    
-                    gantt_table = Table(gantt_data, colWidths=gantt_col_widths, rowHeights=row_heights)
-                    
-                    gantt_styles = [
-                        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1e3a5f')),  # Dark blue header
-                        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-                        ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-                        ('ALIGN', (0, 1), (0, -1), 'LEFT'),
-                        ('ALIGN', (1, 1), (-1, -1), 'CENTER'),
-                        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                        ('FONTSIZE', (0, 0), (-1, 0), 7),
-                        ('FONTSIZE', (0, 1), (-1, -1), 7),
-                        ('TOPPADDING', (0, 0), (-1, -1), 4),
-                        ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
-                        ('LEFTPADDING', (0, 0), (-1, -1), 3),
-                        ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#cbd5e1')),
-                        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                    ]
-                    
-                    # Color the phase and sub-item bars based on date overlap
-                    data_row_idx = 1  # Start after header
-                    for row_info in row_types:
-                        row_type, phase_idx = row_info
-                        phase = phases[phase_idx]
-                        color = PHASE_COLORS[phase_idx % len(PHASE_COLORS)]
-                        
-                        if row_type == 'phase':
-                            gantt_styles.append(('BACKGROUND', (0, data_row_idx), (0, data_row_idx), colors.HexColor('#f1f5f9')))
-                            phase_start_date = parse_date(phase.get('start', '')) or parse_date(phase.get('start_date', ''))
-                            phase_end_date = parse_date(phase.get('end', '')) or parse_date(phase.get('end_date', ''))
-                            
-                            # If no dates, try to infer from sub-items
-                            if not phase_start_date or not phase_end_date:
-                                sub_items = phase.get('subItems', [])
-                                for sub in sub_items:
-                                    sub_s = parse_date(sub.get('start_date', '')) or parse_date(sub.get('start', ''))
-                                    sub_e = parse_date(sub.get('end_date', '')) or parse_date(sub.get('end', ''))
-                                    if sub_s and (not phase_start_date or sub_s < phase_start_date):
-                                        phase_start_date = sub_s
-                                    if sub_e and (not phase_end_date or sub_e > phase_end_date):
-                                        phase_end_date = sub_e
-                            
-                            # Color cells for days that fall within phase dates
-                            for col_idx in range(1, num_days_this_page + 1):
-                                cell_date = page_start_date + timedelta(days=(col_idx - 1))
-                                
-                                if phase_start_date and phase_end_date:
-                                    if phase_start_date <= cell_date <= phase_end_date:
-                                        gantt_styles.append(('BACKGROUND', (col_idx, data_row_idx), (col_idx, data_row_idx), color))
-                        else:
-                            # Sub-item row
-                            gantt_styles.append(('BACKGROUND', (0, data_row_idx), (0, data_row_idx), colors.HexColor('#f8fafc')))
-                            
-                            # Get sub-item from phase
-                            sub_items = phase.get('subItems', [])
-                            sub_count = sum(1 for r in row_types[:data_row_idx] if r[0] == 'subitem' and r[1] == phase_idx)
-                            if sub_count > 0 and sub_count <= len(sub_items):
-                                sub_item = sub_items[sub_count - 1]
-                                sub_start = parse_date(sub_item.get('start_date', '')) or parse_date(sub_item.get('start', ''))
-                                sub_end = parse_date(sub_item.get('end_date', '')) or parse_date(sub_item.get('end', ''))
-                                
-                                # Lighter color for sub-items
-                                lighter_color = colors.HexColor(
-                                    '#{:02x}{:02x}{:02x}'.format(
-                                        min(255, int(color.red * 255 * 0.6 + 100)),
-                                        min(255, int(color.green * 255 * 0.6 + 100)),
-                                        min(255, int(color.blue * 255 * 0.6 + 100))
-                                    )
-                                )
-                                
-                                for col_idx in range(1, num_days_this_page + 1):
-                                    cell_date = page_start_date + timedelta(days=(col_idx - 1))
-                                    
-                                    if sub_start and sub_end:
-                                        if sub_start <= cell_date <= sub_end:
-                                            gantt_styles.append(('BACKGROUND', (col_idx, data_row_idx), (col_idx, data_row_idx), lighter_color))
-                        
-                        data_row_idx += 1
-                    
-                    gantt_table.setStyle(TableStyle(gantt_styles))
-                    gantt_table.hAlign = 'LEFT'  # Left-align the table from margin
-                    elements.append(gantt_table)
+                    # Rows continue on following pages with the date header repeated
+                    elements.append(gantt_chart)
                     elements.append(Spacer(1, 10))
                 
                 # Legend with color samples
-                legend_text = "<b>Legend:</b> Darker colored blocks represent phase timelines. Lighter blocks represent sub-item/task timelines within each phase."
+                scale_text = {'day': 'one column per day', 'week': 'one column per week', 'month': 'one column per month'}[scale]
+                legend_text = f"<b>Legend:</b> Darker colored bars represent phase timelines. Lighter bars represent sub-item/task timelines within each phase. Scale: {scale_text}."
                 elements.append(Paragraph(legend_text, styles['ScheduleBodyText']))
     
     # =====================================================
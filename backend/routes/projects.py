@@ -8,8 +8,6 @@ from typing import Optional, List
 from datetime import datetime, timezone
 from pydantic import BaseModel, Field, ConfigDict
 import uuid
-import pandas as pd
-import io
 
 # Absolute imports from core modules
 from core.database import db
@@ -17,6 +15,11 @@ from core.security import get_current_user, require_auth
 from core.websocket import broadcast_update
 from core.utils import can_access_department, get_user_departments
 from core.config import settings
+from utils import columnar
+from utils.search import refresh_search_index
+from utils.customer_identity import assign_customer_id, relink_customer_id
+from utils.report_exports import ExportColumn, XLSX_MEDIA_TYPE, csv_chunks, export_file, write_xlsx
+from utils.streaming import fetch_page, iter_batches, iter_cursor, page_response, stream_list_response
 
 
 # ==================== MODELS (inline for self-containment) ====================
@@ -193,7 +196,10 @@ async def create_project(project: ProjectCreate):
     doc['created_at'] = doc['created_at'].isoformat()
     doc['updated_at'] = doc['updated_at'].isoformat()
     
+    await assign_customer_id(db, "projects", doc)
     await db.projects.insert_one(doc)
+    await refresh_search_index(db, "projects", [project_obj.id])
+    columnar.mark_stale("projects")
     await broadcast_update("project", "create", {"id": project_obj.id, "pid_no": project_obj.pid_no})
     
     return project_obj
@@ -204,9 +210,16 @@ async def get_projects(
     status: Optional[str] = None, 
     category: Optional[str] = None,
     department: Optional[str] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    format: str = "json",
     current_user: dict = Depends(get_current_user)
 ):
-    """Get all projects with optional filters"""
+    """
+    Get all projects with optional filters, newest first, streamed as a JSON array
+    (or NDJSON with format=ndjson). Pass limit, then the previous page's
+    X-Next-Cursor as cursor, to page through them.
+    """
     query = {}
     if status:
         query['status'] = status
@@ -222,14 +235,18 @@ async def get_projects(
     if department:
         query['department'] = department
     
-    projects = await db.projects.find(query, {"_id": 0}).sort("created_at", -1).to_list(1000)
-    
-    for project in projects:
+    def serialize(project):
         if isinstance(project.get('created_at'), str):
             project['created_at'] = datetime.fromisoformat(project['created_at'])
         project['balance'] = project.get('po_amount', 0) - project.get('invoiced_amount', 0)
+        return Project(**project).model_dump(mode="json")
+    
+    if limit:
+        projects, next_cursor = await fetch_page(db.projects, query, {"_id": 0}, "created_at", -1, limit, cursor)
+        return page_response(projects, next_cursor, serialize, format)
     
-    return projects
+    projects_cursor = db.projects.find(query, {"_id": 0}).sort([("created_at", -1), ("id", -1)])
+    return stream_list_response(iter_cursor(projects_cursor), serialize, format)
 
 
 @router.get("/{project_id}", response_model=Project)
@@ -282,6 +299,9 @@ async def update_project(project_id: str, update_data: ProjectUpdate):
     
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Project not found")
+    await refresh_search_index(db, "projects", [project_id])
+    await relink_customer_id(db, "projects", project_id, update_dict)
+    columnar.mark_stale("projects")
     
     updated_project = await db.projects.find_one({"id": project_id}, {"_id": 0})
     if isinstance(updated_project.get('created_at'), str):
@@ -300,62 +320,51 @@ async def delete_project(project_id: str):
     result = await db.projects.delete_one({"id": project_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Project not found")
+    await refresh_search_index(db, "projects", [project_id])
+    columnar.mark_stale("projects")
     
     await broadcast_update("project", "delete", {"id": project_id})
     
     return {"message": "Project deleted successfully"}
 
 
+PROJECT_EXPORT_COLUMNS = [
+    ExportColumn(field, lambda p, field=field: p.get(field), width)
+    for field, width in [
+        ('pid_no', 14), ('category', 10), ('po_number', 18), ('client', 30), ('location', 20),
+        ('project_name', 40), ('vendor', 20), ('status', 14), ('engineer_in_charge', 22),
+        ('po_amount', 14), ('balance', 14), ('invoiced_amount', 16), ('completion_percentage', 22),
+        ('this_week_billing', 18), ('budget', 14), ('actual_expenses', 16), ('pid_savings', 14),
+        ('weekly_actions', 50)
+    ]
+]
+PROJECT_EXPORT_PROJECTION = {"_id": 0, **{c.header: 1 for c in PROJECT_EXPORT_COLUMNS}}
+
+
 @router.get("/export/excel")
-async def export_projects_excel():
-    """Export all projects to Excel with styling"""
-    from openpyxl.styles import Font, Alignment, PatternFill
-    
-    projects = await db.projects.find({}, {"_id": 0}).to_list(1000)
-    
-    if not projects:
+async def export_projects_excel(async_job: bool = False, current_user: dict = Depends(get_current_user)):
+    """
+    Export all projects to Excel with styling. Rows stream from the cursor into a
+    write-only workbook; large exports run as a background job (202 with a download link).
+    """
+    rows = await db.projects.count_documents({})
+    if not rows:
         raise HTTPException(status_code=404, detail="No projects found to export")
     
-    df = pd.DataFrame(projects)
-    
-    column_order = [
-        'pid_no', 'category', 'po_number', 'client', 'location', 'project_name',
-        'vendor', 'status', 'engineer_in_charge', 'po_amount', 'balance',
-        'invoiced_amount', 'completion_percentage', 'this_week_billing',
-        'budget', 'actual_expenses', 'pid_savings', 'weekly_actions'
-    ]
-    
-    available_cols = [col for col in column_order if col in df.columns]
-    df = df[available_cols]
-    
-    output = io.BytesIO()
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        df.to_excel(writer, sheet_name='Projects', index=False)
-        
-        workbook = writer.book
-        worksheet = writer.sheets['Projects']
-        
-        for cell in worksheet[1]:
-            cell.font = Font(bold=True, color="FFFFFF")
-            cell.fill = PatternFill(start_color="0F172A", end_color="0F172A", fill_type="solid")
-            cell.alignment = Alignment(horizontal="center")
-        
-        for column in worksheet.columns:
-            max_length = 0
-            column_letter = column[0].column_letter
-            for cell in column:
-                try:
-                    if len(str(cell.value)) > max_length:
-                        max_length = len(str(cell.value))
-                except (TypeError, AttributeError):
-                    pass
-            adjusted_width = min(max_length + 2, 50)
-            worksheet.column_dimensions[column_letter].width = adjusted_width
-    
-    output.seek(0)
+    async def write(fileobj):
+        batches = iter_batches(db.projects.find({}, PROJECT_EXPORT_PROJECTION))
+        return await write_xlsx(fileobj, batches, PROJECT_EXPORT_COLUMNS, 'Projects')
     
+    filename = f"projects_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+    return await export_file(db, "projects_excel", filename, XLSX_MEDIA_TYPE, write, rows, async_job, current_user)
+
+
+@router.get("/export/csv")
+async def export_projects_csv():
+    """Export all projects as CSV, streamed to the client batch by batch"""
+    batches = iter_batches(db.projects.find({}, PROJECT_EXPORT_PROJECTION))
     return StreamingResponse(
-        output,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        headers={"Content-Disposition": f"attachment; filename=projects_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"}
+        csv_chunks(batches, PROJECT_EXPORT_COLUMNS),
+        media_type="text/csv",
+        headers={"Content-Disposition": f"attachment; filename=projects_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"}
     )
@@ -15,6 +15,9 @@ from bson import ObjectId
 import uuid
 import os
 from motor.motor_asyncio import AsyncIOMotorClient
+from utils.indexes import index, register_indexes
+from utils.order_ledger import refresh_order_ledger
+from utils.streaming import iter_cursor
 
 # MongoDB connection
 mongo_url = os.environ.get('MONGO_URL')
@@ -23,6 +26,25 @@ db = client[os.environ.get('DB_NAME', 'enerzia_erp')]
 
 router = APIRouter(prefix="/api/purchase-module", tags=["Purchase Module"])
 
+register_indexes(__name__, {
+    "purchase_requests": [
+        index("id", unique=True),
+        index("sales_order_id"),
+        index(("created_at", -1)),
+        index("status", ("created_at", -1)),
+    ],
+    "purchase_orders_v2": [
+        index("id", unique=True),
+        index("sales_order_id"),
+        index(("created_at", -1)),
+        index("status", ("created_at", -1)),
+    ],
+    "grn": [
+        index("id", unique=True),
+        index("purchase_order_id"),
+    ],
+})
+
 
 # ============== MODELS ==============
 
@@ -557,6 +579,7 @@ async def create_purchase_order(data: PurchaseOrderCreate):
     
     await db.purchase_orders_v2.insert_one(po)
     po.pop("_id", None)
+    await refresh_order_ledger(db, [po["sales_order_id"]])
     
     # Update request status if linked
     if data.purchase_request_id:
@@ -641,6 +664,7 @@ async def create_po_from_quote(quote_id: str):
     
     await db.purchase_orders_v2.insert_one(po)
     po.pop("_id", None)
+    await refresh_order_ledger(db, [po["sales_order_id"]])
     
     # Update request status
     await db.purchase_requests.update_one(
@@ -667,15 +691,18 @@ async def update_purchase_order(po_id: str, data: dict):
     update_data = {k: v for k, v in data.items() if v is not None and k not in ["id", "po_no", "created_at"]}
     update_data["updated_at"] = datetime.now(timezone.utc)
     
-    result = await db.purchase_orders_v2.update_one(
+    # The previous sales order is refreshed too in case the PO was relinked
+    previous = await db.purchase_orders_v2.find_one_and_update(
         {"id": po_id},
-        {"$set": update_data}
+        {"$set": update_data},
+        projection={"_id": 0, "sales_order_id": 1}
     )
     
-    if result.matched_count == 0:
+    if not previous:
         raise HTTPException(status_code=404, detail="Purchase order not found")
     
     po = await db.purchase_orders_v2.find_one({"id": po_id}, {"_id": 0})
+    await refresh_order_ledger(db, [previous.get("sales_order_id"), po.get("sales_order_id")])
     return {"message": "Order updated", "order": po}
 
 
@@ -686,13 +713,15 @@ async def update_po_status(po_id: str, status: str):
     if status not in valid_statuses:
         raise HTTPException(status_code=400, detail=f"Invalid status. Must be one of: {valid_statuses}")
     
-    result = await db.purchase_orders_v2.update_one(
+    po = await db.purchase_orders_v2.find_one_and_update(
         {"id": po_id},
-        {"$set": {"status": status, "updated_at": datetime.now(timezone.utc)}}
+        {"$set": {"status": status, "updated_at": datetime.now(timezone.utc)}},
+        projection={"_id": 0, "sales_order_id": 1}
     )
     
-    if result.matched_count == 0:
+    if not po:
         raise HTTPException(status_code=404, detail="Purchase order not found")
+    await refresh_order_ledger(db, [po.get("sales_order_id")])
     
     return {"message": "Status updated", "status": status}
 
@@ -700,9 +729,10 @@ async def update_po_status(po_id: str, status: str):
 @router.delete("/orders/{po_id}")
 async def delete_purchase_order(po_id: str):
     """Delete a purchase order"""
-    result = await db.purchase_orders_v2.delete_one({"id": po_id})
-    if result.deleted_count == 0:
+    po = await db.purchase_orders_v2.find_one_and_delete({"id": po_id}, {"_id": 0, "sales_order_id": 1})
+    if not po:
         raise HTTPException(status_code=404, detail="Purchase order not found")
+    await refresh_order_ledger(db, [po.get("sales_order_id")])
     return {"message": "Order deleted"}
 
 
@@ -877,39 +907,14 @@ async def get_purchase_dashboard_stats():
 @router.get("/dashboard/savings")
 async def get_purchase_savings():
     """Get purchase savings analysis - Budget vs Actual"""
-    # Get all orders with lifecycle that have purchase budgets
-    pipeline = [
-        {"$lookup": {
-            "from": "sales_orders",
-            "localField": "sales_order_id",
-            "foreignField": "id",
-            "as": "order"
-        }},
-        {"$unwind": "$order"},
-        {"$match": {"purchase_budget": {"$exists": True, "$ne": None}}}
-    ]
-    
-    lifecycles = await db.order_lifecycle.aggregate(pipeline).to_list(100)
-    
     savings_details = []
     total_budget = 0
     total_actual = 0
     
-    for lc in lifecycles:
-        order_value = lc["order"].get("total_amount", 0)
-        budget = lc.get("purchase_budget", {})
-        
-        if budget.get("type") == "percentage":
-            purchase_budget = order_value * (budget.get("value", 0) / 100)
-        else:
-            purchase_budget = budget.get("value", 0)
-        
-        # Get actual purchase from POs
-        po_result = await db.purchase_orders_v2.aggregate([
-            {"$match": {"sales_order_id": lc["sales_order_id"], "status": {"$ne": "cancelled"}}},
-            {"$group": {"_id": None, "total": {"$sum": "$total_amount"}}}
-        ]).to_list(1)
-        actual_purchase = po_result[0]["total"] if po_result else 0
+    # Orders whose lifecycle has a purchase budget, actuals precomputed in the ledger
+    async for ledger in iter_cursor(db.order_ledger.find({"has_purchase_budget": True}, {"_id": 0})):
+        purchase_budget = ledger["purchase_budget"]
+        actual_purchase = ledger["purchase_cost"]
         
         savings = purchase_budget - actual_purchase
         savings_percent = (savings / purchase_budget * 100) if purchase_budget > 0 else 0
@@ -918,9 +923,9 @@ async def get_purchase_savings():
         total_actual += actual_purchase
         
         savings_details.append({
-            "order_no": lc["order"].get("order_no"),
-            "customer": lc["order"].get("customer_name"),
-            "order_value": order_value,
+            "order_no": ledger.get("order_no"),
+            "customer": ledger.get("customer_name"),
+            "order_value": ledger["order_value"],
             "purchase_budget": purchase_budget,
             "actual_purchase": actual_purchase,
             "savings": savings,
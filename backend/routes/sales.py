@@ -16,7 +16,24 @@ import uuid
 import os
 import io
 from motor.motor_asyncio import AsyncIOMotorClient
+from core.security import get_current_user, require_admin
 from utils.permissions import require_permission
+from utils.report_exports import (
+    ExportColumn, PDF_EXPORT_ASYNC_THRESHOLD, XLSX_MEDIA_TYPE, build_pdf, chunked_tables, csv_chunks, export_file, write_xlsx
+)
+from utils.streaming import iter_batches
+from utils.order_ledger import refresh_order_ledger
+from utils.indexes import index, register_indexes
+from utils.search import refresh_search_index, index_documents
+from utils.customer_identity import assign_customer_id, assign_customer_ids, relink_customer_id
+from utils.customer_metrics import refresh_customer_metrics, refresh_enquiry_customer_metrics
+from utils.sales_cube import (
+    cube_slice, month_key, parse_fiscal_year, rebuild_sales_cube, refresh_sales_cube, slice_total,
+)
+from utils.scheduler import scheduled_job
+from utils.bulk_import import (
+    Column, ImportReport, read_excel_upload, normalize_frame, frame_records, insert_in_chunks
+)
 
 # MongoDB connection
 mongo_url = os.environ.get('MONGO_URL')
@@ -25,6 +42,24 @@ db = client[os.environ.get('DB_NAME', 'enerzia_erp')]
 
 router = APIRouter(prefix="/api/sales", tags=["Sales"])
 
+register_indexes(__name__, {
+    "sales_enquiries": [
+        index("id", unique=True),
+        index(("created_at", -1)),
+        index("status", ("created_at", -1)),
+    ],
+    "sales_quotations": [
+        index("id", unique=True),
+        index("enquiry_id"),
+    ],
+    "sales_orders": [
+        index("id", unique=True),
+        index("order_no"),
+        index(("created_at", -1)),
+        index("status", ("created_at", -1)),
+    ],
+})
+
 
 # ============== MODELS ==============
 
@@ -342,35 +377,17 @@ async def get_enquiries(
 @router.get("/enquiries/stats")
 async def get_enquiry_stats(current_user: dict = Depends(require_permission("sales_dept", "enquiries"))):
     """Get enquiry statistics - Sales department only"""
-    total = await db.sales_enquiries.count_documents({})
-    new_count = await db.sales_enquiries.count_documents({"status": "new"})
-    quoted = await db.sales_enquiries.count_documents({"status": "quoted"})
-    accepted = await db.sales_enquiries.count_documents({"status": "accepted"})
-    declined = await db.sales_enquiries.count_documents({"status": "declined"})
-    
-    # This month's enquiries
-    now = datetime.now()
-    month_start = datetime(now.year, now.month, 1, tzinfo=timezone.utc)
-    this_month = await db.sales_enquiries.count_documents({
-        "created_at": {"$gte": month_start}
-    })
-    
-    # Total value of new enquiries
-    pipeline = [
-        {"$match": {"status": {"$in": ["new", "quoted", "site_visited"]}}},
-        {"$group": {"_id": None, "total_value": {"$sum": {"$ifNull": ["$value", 0]}}}}
-    ]
-    result = await db.sales_enquiries.aggregate(pipeline).to_list(1)
-    pipeline_value = result[0]["total_value"] if result else 0
+    rows = await cube_slice(db, "enquiry", ["status", "month"])
     
     return {
-        "total": total,
-        "new": new_count,
-        "quoted": quoted,
-        "accepted": accepted,
-        "declined": declined,
-        "this_month": this_month,
-        "pipeline_value": pipeline_value
+        "total": slice_total(rows),
+        "new": slice_total(rows, status="new"),
+        "quoted": slice_total(rows, status="quoted"),
+        "accepted": slice_total(rows, status="accepted"),
+        "declined": slice_total(rows, status="declined"),
+        "this_month": slice_total(rows, month=month_key(datetime.now())),
+        # Total value of open enquiries
+        "pipeline_value": slice_total(rows, "value", status=["new", "quoted", "site_visited"])
     }
 
 
@@ -413,8 +430,12 @@ async def create_enquiry(data: EnquiryCreate, current_user: dict = Depends(requi
         "updated_at": datetime.now(timezone.utc)
     }
     
+    await assign_customer_id(db, "sales_enquiries", enquiry)
     await db.sales_enquiries.insert_one(enquiry)
     enquiry.pop("_id", None)
+    await refresh_search_index(db, "sales_enquiries", [enquiry["id"]])
+    await refresh_customer_metrics(db, [enquiry.get("customer_id")])
+    await refresh_sales_cube(db, "enquiry", [enquiry["id"]])
     
     return {"message": "Enquiry created successfully", "enquiry": enquiry}
 
@@ -425,40 +446,37 @@ async def update_enquiry(enquiry_id: str, data: EnquiryUpdate, current_user: dic
     update_data = {k: v for k, v in data.model_dump().items() if v is not None}
     update_data["updated_at"] = datetime.now(timezone.utc)
     
-    result = await db.sales_enquiries.update_one(
+    previous = await db.sales_enquiries.find_one_and_update(
         {"id": enquiry_id},
-        {"$set": update_data}
+        {"$set": update_data},
+        {"_id": 0, "customer_id": 1}
     )
     
-    if result.matched_count == 0:
+    if previous is None:
         raise HTTPException(status_code=404, detail="Enquiry not found")
+    await refresh_search_index(db, "sales_enquiries", [enquiry_id])
+    await relink_customer_id(db, "sales_enquiries", enquiry_id, update_data)
     
     enquiry = await db.sales_enquiries.find_one({"id": enquiry_id}, {"_id": 0})
+    # A renamed company can move the enquiry to another customer
+    await refresh_customer_metrics(db, [previous.get("customer_id"), enquiry.get("customer_id")])
+    await refresh_sales_cube(db, "enquiry", [enquiry_id])
     return {"message": "Enquiry updated successfully", "enquiry": enquiry}
 
 
 @router.delete("/enquiries/{enquiry_id}")
 async def delete_enquiry(enquiry_id: str, current_user: dict = Depends(require_permission("sales_dept", "enquiries"))):
     """Delete an enquiry - Sales department only"""
-    result = await db.sales_enquiries.delete_one({"id": enquiry_id})
-    if result.deleted_count == 0:
+    enquiry = await db.sales_enquiries.find_one_and_delete({"id": enquiry_id}, {"_id": 0, "customer_id": 1})
+    if enquiry is None:
         raise HTTPException(status_code=404, detail="Enquiry not found")
+    await refresh_search_index(db, "sales_enquiries", [enquiry_id])
+    await refresh_customer_metrics(db, [enquiry.get("customer_id")])
+    await refresh_sales_cube(db, "enquiry", [enquiry_id])
     return {"message": "Enquiry deleted successfully"}
 
 
-@router.get("/enquiries/export/pdf")
-async def export_enquiries_pdf(
-    status: Optional[str] = None,
-    search: Optional[str] = None
-):
-    """Export enquiries to PDF"""
-    from reportlab.lib.pagesizes import A4, landscape
-    from reportlab.lib import colors
-    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-    from reportlab.lib.units import inch
-    
-    # Build query
+def _enquiry_export_query(status: Optional[str], search: Optional[str]) -> dict:
     query = {}
     if status:
         query["status"] = status
@@ -468,155 +486,139 @@ async def export_enquiries_pdf(
             {"company_name": {"$regex": search, "$options": "i"}},
             {"description": {"$regex": search, "$options": "i"}}
         ]
+    return query
+
+
+@router.get("/enquiries/export/pdf")
+async def export_enquiries_pdf(
+    status: Optional[str] = None,
+    search: Optional[str] = None,
+    async_job: bool = False,
+    current_user: Optional[dict] = Depends(get_current_user)
+):
+    """Export enquiries to PDF, all matches in chunked tables"""
+    from reportlab.lib.pagesizes import A4, landscape
+    from reportlab.lib import colors
+    from reportlab.platypus import SimpleDocTemplate, TableStyle, Paragraph, Spacer
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib.units import inch
     
-    cursor = db.sales_enquiries.find(query, {"_id": 0}).sort("created_at", -1).limit(500)
-    enquiries = await cursor.to_list(length=500)
+    query = _enquiry_export_query(status, search)
     
-    # Create PDF
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=landscape(A4), rightMargin=30, leftMargin=30, topMargin=30, bottomMargin=30)
-    elements = []
-    styles = getSampleStyleSheet()
-    
-    # Title
-    title_style = ParagraphStyle('Title', parent=styles['Heading1'], fontSize=16, alignment=1)
-    elements.append(Paragraph("Enquiries Report", title_style))
-    elements.append(Spacer(1, 20))
-    
-    # Date
-    date_style = ParagraphStyle('Date', parent=styles['Normal'], fontSize=10, alignment=1)
-    elements.append(Paragraph(f"Generated on: {datetime.now().strftime('%d/%m/%Y %H:%M')}", date_style))
-    elements.append(Spacer(1, 20))
-    
-    # Table data
-    headers = ['Enquiry No', 'Date', 'Company', 'Description', 'Value (₹)', 'Priority', 'Status', 'Assigned To']
-    data = [headers]
-    
-    for enq in enquiries:
-        value = f"₹{enq.get('value', 0):,.0f}" if enq.get('value') else '-'
-        desc = enq.get('description', '')[:40] + '...' if len(enq.get('description', '')) > 40 else enq.get('description', '')
-        priority = enq.get('priority', '-').title() if enq.get('priority') else '-'
-        data.append([
-            enq.get('enquiry_no', ''),
-            enq.get('date', ''),
-            enq.get('company_name', ''),
-            desc,
-            value,
-            priority,
-            enq.get('status', '').replace('_', ' ').title(),
-            enq.get('assigned_to', '-')
+    async def write(fileobj):
+        doc = SimpleDocTemplate(fileobj, pagesize=landscape(A4), rightMargin=30, leftMargin=30, topMargin=30, bottomMargin=30)
+        elements = []
+        styles = getSampleStyleSheet()
+        
+        # Title
+        title_style = ParagraphStyle('Title', parent=styles['Heading1'], fontSize=16, alignment=1)
+        elements.append(Paragraph("Enquiries Report", title_style))
+        elements.append(Spacer(1, 20))
+        
+        # Date
+        date_style = ParagraphStyle('Date', parent=styles['Normal'], fontSize=10, alignment=1)
+        elements.append(Paragraph(f"Generated on: {datetime.now().strftime('%d/%m/%Y %H:%M')}", date_style))
+        elements.append(Spacer(1, 20))
+        
+        # Table data
+        headers = ['Enquiry No', 'Date', 'Company', 'Description', 'Value (₹)', 'Priority', 'Status', 'Assigned To']
+        rows = []
+        
+        async for batch in iter_batches(db.sales_enquiries.find(query, {"_id": 0}).sort("created_at", -1)):
+            for enq in batch:
+                value = f"₹{enq.get('value', 0):,.0f}" if enq.get('value') else '-'
+                desc = enq.get('description', '')[:40] + '...' if len(enq.get('description', '')) > 40 else enq.get('description', '')
+                priority = enq.get('priority', '-').title() if enq.get('priority') else '-'
+                rows.append([
+                    enq.get('enquiry_no', ''),
+                    enq.get('date', ''),
+                    enq.get('company_name', ''),
+                    desc,
+                    value,
+                    priority,
+                    enq.get('status', '').replace('_', ' ').title(),
+                    enq.get('assigned_to', '-')
+                ])
+        
+        # Create tables
+        table_style = TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1e293b')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 9),
+            ('FONTSIZE', (0, 1), (-1, -1), 8),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 10),
+            ('TOPPADDING', (0, 0), (-1, 0), 10),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.white),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#e2e8f0')),
+            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f8fafc')]),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
         ])
+        col_widths = [1.1*inch, 0.8*inch, 1.6*inch, 2.2*inch, 0.9*inch, 0.7*inch, 1*inch, 1.2*inch]
+        elements.extend(chunked_tables(headers, rows, col_widths, table_style))
+        
+        await build_pdf(doc, elements)
+        return len(rows)
     
-    # Create table
-    table = Table(data, colWidths=[1.1*inch, 0.8*inch, 1.6*inch, 2.2*inch, 0.9*inch, 0.7*inch, 1*inch, 1.2*inch])
-    table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1e293b')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 9),
-        ('FONTSIZE', (0, 1), (-1, -1), 8),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 10),
-        ('TOPPADDING', (0, 0), (-1, 0), 10),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.white),
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#e2e8f0')),
-        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f8fafc')]),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-    ]))
-    elements.append(table)
-    
-    doc.build(elements)
-    buffer.seek(0)
-    
-    return StreamingResponse(
-        buffer,
-        media_type="application/pdf",
-        headers={"Content-Disposition": f"attachment; filename=enquiries_{datetime.now().strftime('%Y%m%d')}.pdf"}
+    filename = f"enquiries_{datetime.now().strftime('%Y%m%d')}.pdf"
+    rows = await db.sales_enquiries.count_documents(query)
+    return await export_file(
+        db, "enquiries_pdf", filename, "application/pdf", write, rows, async_job, current_user, PDF_EXPORT_ASYNC_THRESHOLD
     )
 
 
+ENQUIRY_EXPORT_COLUMNS = [
+    ExportColumn('Enquiry No', lambda e: e.get('enquiry_no', ''), 15),
+    ExportColumn('Date', lambda e: e.get('date', ''), 12),
+    ExportColumn('Target Date', lambda e: e.get('target_date', ''), 12),
+    ExportColumn('Company', lambda e: e.get('company_name', ''), 25),
+    ExportColumn('Location', lambda e: e.get('location', ''), 20),
+    ExportColumn('Description', lambda e: e.get('description', ''), 40),
+    ExportColumn('Value (₹)', lambda e: e.get('value', 0) or '', 12),
+    ExportColumn('Contact Person', lambda e: e.get('contact_person', ''), 18),
+    ExportColumn('Phone', lambda e: e.get('contact_phone', ''), 15),
+    ExportColumn('Email', lambda e: e.get('contact_email', ''), 25),
+    ExportColumn('Priority', lambda e: (e.get('priority', '') or '').title(), 10),
+    ExportColumn('Status', lambda e: e.get('status', '').replace('_', ' ').title(), 15),
+    ExportColumn('Category', lambda e: e.get('category', ''), 12),
+    ExportColumn('Department', lambda e: e.get('department', ''), 15),
+    ExportColumn('Assigned To', lambda e: e.get('assigned_to', ''), 18),
+    ExportColumn('Remarks', lambda e: e.get('remarks', ''), 30),
+]
+
+
 @router.get("/enquiries/export/excel")
 async def export_enquiries_excel(
     status: Optional[str] = None,
-    search: Optional[str] = None
+    search: Optional[str] = None,
+    async_job: bool = False,
+    current_user: Optional[dict] = Depends(get_current_user)
 ):
-    """Export enquiries to Excel"""
-    from openpyxl import Workbook
-    from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
-    
-    # Build query
-    query = {}
-    if status:
-        query["status"] = status
-    if search:
-        query["$or"] = [
-            {"enquiry_no": {"$regex": search, "$options": "i"}},
-            {"company_name": {"$regex": search, "$options": "i"}},
-            {"description": {"$regex": search, "$options": "i"}}
-        ]
-    
-    cursor = db.sales_enquiries.find(query, {"_id": 0}).sort("created_at", -1).limit(1000)
-    enquiries = await cursor.to_list(length=1000)
-    
-    # Create workbook
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Enquiries"
+    """Export enquiries to Excel, streaming rows from the cursor into a write-only workbook"""
+    from openpyxl.styles import Border, Side
     
-    # Headers - Complete list of fields
-    headers = ['Enquiry No', 'Date', 'Target Date', 'Company', 'Location', 'Description', 
-               'Value (₹)', 'Contact Person', 'Phone', 'Email', 'Priority', 'Status', 
-               'Category', 'Department', 'Assigned To', 'Remarks']
+    query = _enquiry_export_query(status, search)
+    thin = Side(style='thin', color='e2e8f0')
+    thin_border = Border(left=thin, right=thin, top=thin, bottom=thin)
     
-    header_fill = PatternFill(start_color="1e293b", end_color="1e293b", fill_type="solid")
-    header_font = Font(color="FFFFFF", bold=True)
-    thin_border = Border(
-        left=Side(style='thin', color='e2e8f0'),
-        right=Side(style='thin', color='e2e8f0'),
-        top=Side(style='thin', color='e2e8f0'),
-        bottom=Side(style='thin', color='e2e8f0')
-    )
-    
-    for col, header in enumerate(headers, 1):
-        cell = ws.cell(row=1, column=col, value=header)
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = Alignment(horizontal='center', vertical='center')
-        cell.border = thin_border
-    
-    # Data rows
-    for row, enq in enumerate(enquiries, 2):
-        ws.cell(row=row, column=1, value=enq.get('enquiry_no', '')).border = thin_border
-        ws.cell(row=row, column=2, value=enq.get('date', '')).border = thin_border
-        ws.cell(row=row, column=3, value=enq.get('target_date', '')).border = thin_border
-        ws.cell(row=row, column=4, value=enq.get('company_name', '')).border = thin_border
-        ws.cell(row=row, column=5, value=enq.get('location', '')).border = thin_border
-        ws.cell(row=row, column=6, value=enq.get('description', '')).border = thin_border
-        ws.cell(row=row, column=7, value=enq.get('value', 0) or '').border = thin_border
-        ws.cell(row=row, column=8, value=enq.get('contact_person', '')).border = thin_border
-        ws.cell(row=row, column=9, value=enq.get('contact_phone', '')).border = thin_border
-        ws.cell(row=row, column=10, value=enq.get('contact_email', '')).border = thin_border
-        ws.cell(row=row, column=11, value=(enq.get('priority', '') or '').title()).border = thin_border
-        ws.cell(row=row, column=12, value=enq.get('status', '').replace('_', ' ').title()).border = thin_border
-        ws.cell(row=row, column=13, value=enq.get('category', '')).border = thin_border
-        ws.cell(row=row, column=14, value=enq.get('department', '')).border = thin_border
-        ws.cell(row=row, column=15, value=enq.get('assigned_to', '')).border = thin_border
-        ws.cell(row=row, column=16, value=enq.get('remarks', '')).border = thin_border
-    
-    # Adjust column widths
-    column_widths = [15, 12, 12, 25, 20, 40, 12, 18, 15, 25, 10, 15, 12, 15, 18, 30]
-    for i, width in enumerate(column_widths, 1):
-        ws.column_dimensions[ws.cell(row=1, column=i).column_letter].width = width
-    
-    # Save to buffer
-    buffer = io.BytesIO()
-    wb.save(buffer)
-    buffer.seek(0)
+    async def write(fileobj):
+        batches = iter_batches(db.sales_enquiries.find(query, {"_id": 0}).sort("created_at", -1))
+        return await write_xlsx(fileobj, batches, ENQUIRY_EXPORT_COLUMNS, "Enquiries", "1e293b", thin_border)
     
+    filename = f"enquiries_{datetime.now().strftime('%Y%m%d')}.xlsx"
+    rows = await db.sales_enquiries.count_documents(query)
+    return await export_file(db, "enquiries_excel", filename, XLSX_MEDIA_TYPE, write, rows, async_job, current_user)
+
+
+@router.get("/enquiries/export/csv")
+async def export_enquiries_csv(status: Optional[str] = None, search: Optional[str] = None):
+    """Export enquiries as CSV, streamed to the client batch by batch"""
+    batches = iter_batches(db.sales_enquiries.find(_enquiry_export_query(status, search), {"_id": 0}).sort("created_at", -1))
     return StreamingResponse(
-        buffer,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        headers={"Content-Disposition": f"attachment; filename=enquiries_{datetime.now().strftime('%Y%m%d')}.xlsx"}
+        csv_chunks(batches, ENQUIRY_EXPORT_COLUMNS),
+        media_type="text/csv",
+        headers={"Content-Disposition": f"attachment; filename=enquiries_{datetime.now().strftime('%Y%m%d')}.csv"}
     )
 
 
@@ -723,119 +725,102 @@ async def download_bulk_template():
     )
 
 
+# Column order of the bulk upload template
+ENQUIRY_TEMPLATE_FIELDS = [
+    "date", "target_date", "company_name", "location", "description", "value",
+    "contact_person", "contact_phone", "contact_email", "priority", "status",
+    "category", "department", "assigned_to", "remarks",
+]
+
+ENQUIRY_IMPORT_COLUMNS = {
+    "date": Column(["date"], kind="date", default=lambda i: datetime.now().strftime('%Y-%m-%d')),
+    "target_date": Column(["target_date"], kind="date"),
+    "company_name": Column(["company_name"], kind="optional_str"),
+    "location": Column(["location"], kind="optional_str"),
+    "description": Column(["description"], kind="optional_str"),
+    "value": Column(["value"], kind="optional_float"),
+    "contact_person": Column(["contact_person"], kind="optional_str"),
+    "contact_phone": Column(["contact_phone"], kind="optional_str"),
+    "contact_email": Column(["contact_email"], kind="optional_str"),
+    "priority": Column(["priority"], kind="lower"),
+    "status": Column(["status"], kind="lower", default="new"),
+    "category": Column(["category"], kind="optional_str"),
+    "department": Column(["department"], kind="optional_str"),
+    "assigned_to": Column(["assigned_to"], kind="optional_str"),
+    "remarks": Column(["remarks"], kind="optional_str"),
+}
+
+VALID_ENQUIRY_STATUSES = ['new', 'price_enquiry', 'site_visit_needed', 'site_visited',
+                          'under_progress', 'quoted', 'negotiation', 'accepted', 'declined', 'invoiced']
+VALID_ENQUIRY_PRIORITIES = ['high', 'medium', 'low']
+
+
 @router.post("/enquiries/bulk/upload")
-async def bulk_upload_enquiries(file: UploadFile = File(...)):
+async def bulk_upload_enquiries(file: UploadFile = File(...), dry_run: bool = False):
     """Upload Excel file with multiple enquiries"""
-    from openpyxl import load_workbook
-    
     if not file.filename.endswith(('.xlsx', '.xls')):
         raise HTTPException(status_code=400, detail="Please upload an Excel file (.xlsx or .xls)")
     
     try:
         contents = await file.read()
-        wb = load_workbook(io.BytesIO(contents))
-        ws = wb.active
+        df = read_excel_upload(contents, header=None).iloc[1:]
         
-        imported = 0
-        errors = []
+        # Columns are positional (matching the template), so name them by index
+        df = df.iloc[:, :len(ENQUIRY_TEMPLATE_FIELDS)]
+        df.columns = ENQUIRY_TEMPLATE_FIELDS[:df.shape[1]]
+        df = df.dropna(how="all").reset_index().rename(columns={"index": "sheet_index"})
         
-        # Skip header row - Column order matches template:
-        # Date, Target Date, Company Name, Location, Description, Value, 
-        # Contact Person, Phone, Email, Priority, Status, Category, Department, Assigned To, Remarks
-        for row_num, row in enumerate(ws.iter_rows(min_row=2, values_only=True), start=2):
-            # Skip empty rows
-            if not row or not any(row):
-                continue
-            
-            # Extract values (matching new template column order)
-            date_val = row[0] if len(row) > 0 else None
-            target_date_val = row[1] if len(row) > 1 else None
-            company_name = row[2] if len(row) > 2 else None
-            location = row[3] if len(row) > 3 else None
-            description = row[4] if len(row) > 4 else None
-            value = row[5] if len(row) > 5 else None
-            contact_person = row[6] if len(row) > 6 else None
-            contact_phone = row[7] if len(row) > 7 else None
-            contact_email = row[8] if len(row) > 8 else None
-            priority = row[9] if len(row) > 9 else None
-            status = row[10] if len(row) > 10 else None
-            category = row[11] if len(row) > 11 else None
-            department = row[12] if len(row) > 12 else None
-            assigned_to = row[13] if len(row) > 13 else None
-            remarks = row[14] if len(row) > 14 else None
-            
-            # Validate required fields
-            if not company_name or not description:
-                errors.append(f"Row {row_num}: Company Name and Description are required")
-                continue
-            
-            # Format date
-            if isinstance(date_val, datetime):
-                date_str = date_val.strftime('%Y-%m-%d')
-            elif date_val:
-                date_str = str(date_val)
-            else:
-                date_str = datetime.now().strftime('%Y-%m-%d')
-            
-            if isinstance(target_date_val, datetime):
-                target_date_str = target_date_val.strftime('%Y-%m-%d')
-            else:
-                target_date_str = str(target_date_val) if target_date_val else None
-            
-            # Parse value
-            try:
-                value_float = float(value) if value else None
-            except (ValueError, TypeError):
-                value_float = None
-            
-            # Validate and set status
-            valid_statuses = ['new', 'price_enquiry', 'site_visit_needed', 'site_visited', 
-                           'under_progress', 'quoted', 'negotiation', 'accepted', 'declined', 'invoiced']
-            status_str = str(status).lower() if status else 'new'
-            if status_str not in valid_statuses:
-                status_str = 'new'
-            
-            # Validate priority
-            valid_priorities = ['high', 'medium', 'low']
-            priority_str = str(priority).lower() if priority else None
-            if priority_str and priority_str not in valid_priorities:
-                priority_str = None
-            
-            # Generate enquiry number
-            enquiry_no = await get_next_enquiry_number()
-            
-            enquiry = {
-                "id": str(uuid.uuid4()),
-                "enquiry_no": enquiry_no,
-                "date": date_str,
-                "target_date": target_date_str,
-                "company_name": str(company_name),
-                "customer_id": None,
-                "location": str(location) if location else None,
-                "description": str(description),
-                "value": value_float,
-                "contact_person": str(contact_person) if contact_person else None,
-                "contact_phone": str(contact_phone) if contact_phone else None,
-                "contact_email": str(contact_email) if contact_email else None,
-                "remarks": str(remarks) if remarks else None,
-                "priority": priority_str,
-                "status": status_str,
-                "category": str(category) if category else None,
-                "department": str(department) if department else None,
-                "assigned_to": str(assigned_to) if assigned_to else None,
-                "quotation_id": None,
-                "order_id": None,
-                "created_at": datetime.now(timezone.utc),
-                "updated_at": datetime.now(timezone.utc)
-            }
+        report = ImportReport(total_rows=len(df), dry_run=dry_run)
+        frame = normalize_frame(df, ENQUIRY_IMPORT_COLUMNS)
+        
+        # Validate required fields
+        has_required = frame["company_name"].notna() & frame["description"].notna()
+        for sheet_index in df.loc[~has_required, "sheet_index"]:
+            report.errors.append(f"Row {sheet_index + 1}: Company Name and Description are required")
+        frame = frame[has_required]
+        sheet_rows = (df.loc[has_required, "sheet_index"] - 1).tolist()
+        
+        # Unknown statuses fall back to "new", unknown priorities are dropped
+        frame["status"] = frame["status"].where(frame["status"].isin(VALID_ENQUIRY_STATUSES), "new")
+        frame["priority"] = frame["priority"].where(frame["priority"].isin(VALID_ENQUIRY_PRIORITIES), None)
+        report.valid = len(frame)
+        
+        if not dry_run and len(frame):
+            # Reserve a contiguous block of enquiry numbers with a single lookup
+            first_no = await get_next_enquiry_number()
+            prefix, first_num = first_no.rsplit("/", 1)
+            first_num = int(first_num)
+            now = datetime.now(timezone.utc)
             
-            await db.sales_enquiries.insert_one(enquiry)
-            imported += 1
+            enquiries = []
+            for offset, record in enumerate(frame_records(frame)):
+                enquiries.append({
+                    "id": str(uuid.uuid4()),
+                    "enquiry_no": f"{prefix}/{str(first_num + offset).zfill(4)}",
+                    **record,
+                    "customer_id": None,
+                    "quotation_id": None,
+                    "order_id": None,
+                    "created_at": now,
+                    "updated_at": now
+                })
+            await assign_customer_ids(db, "sales_enquiries", enquiries)
+            await insert_in_chunks(db.sales_enquiries, enquiries, report, positions=sheet_rows)
+            await index_documents(db, "sales_enquiries", enquiries)
+            await refresh_customer_metrics(db, [e.get("customer_id") for e in enquiries])
+            await refresh_sales_cube(db, "enquiry", [e["id"] for e in enquiries])
         
+        message = (
+            f"Dry run: {report.valid} enquiries would be imported" if dry_run
+            else f"Successfully imported {report.imported} enquiries"
+        )
         return {
-            "message": f"Successfully imported {imported} enquiries",
-            "imported": imported,
-            "errors": errors[:10]  # Return first 10 errors
+            "message": message,
+            "imported": report.imported,
+            "valid": report.valid,
+            "total_rows": report.total_rows,
+            "dry_run": dry_run,
+            "errors": report.errors[:10]  # Return first 10 errors
         }
         
     except Exception as e:
@@ -873,26 +858,15 @@ async def get_quotations(
 @router.get("/quotations/stats")
 async def get_quotation_stats(current_user: dict = Depends(require_permission("sales_dept", "quotations"))):
     """Get quotation statistics - Sales department only"""
-    total = await db.sales_quotations.count_documents({})
-    draft = await db.sales_quotations.count_documents({"status": "draft"})
-    sent = await db.sales_quotations.count_documents({"status": "sent"})
-    accepted = await db.sales_quotations.count_documents({"status": "accepted"})
-    rejected = await db.sales_quotations.count_documents({"status": "rejected"})
-    
-    # Total value
-    pipeline = [
-        {"$group": {"_id": None, "total_value": {"$sum": {"$ifNull": ["$total_amount", 0]}}}}
-    ]
-    result = await db.sales_quotations.aggregate(pipeline).to_list(1)
-    total_value = result[0]["total_value"] if result else 0
+    rows = await cube_slice(db, "quotation", ["status"])
     
     return {
-        "total": total,
-        "draft": draft,
-        "sent": sent,
-        "accepted": accepted,
-        "rejected": rejected,
-        "total_value": total_value
+        "total": slice_total(rows),
+        "draft": slice_total(rows, status="draft"),
+        "sent": slice_total(rows, status="sent"),
+        "accepted": slice_total(rows, status="accepted"),
+        "rejected": slice_total(rows, status="rejected"),
+        "total_value": slice_total(rows, "value")
     }
 
 
@@ -983,6 +957,7 @@ async def create_quotation(data: QuotationCreate, current_user: dict = Depends(r
         "updated_at": datetime.now(timezone.utc)
     }
     
+    await assign_customer_id(db, "sales_quotations", quotation)
     await db.sales_quotations.insert_one(quotation)
     
     # Update enquiry if linked
@@ -991,6 +966,11 @@ async def create_quotation(data: QuotationCreate, current_user: dict = Depends(r
             {"id": data.enquiry_id},
             {"$set": {"quotation_id": quotation["id"], "status": "quoted", "updated_at": datetime.now(timezone.utc)}}
         )
+    await refresh_search_index(db, "sales_quotations", [quotation["id"]])
+    await refresh_search_index(db, "sales_enquiries", [data.enquiry_id])
+    await refresh_enquiry_customer_metrics(db, [data.enquiry_id])
+    await refresh_sales_cube(db, "quotation", [quotation["id"]])
+    await refresh_sales_cube(db, "enquiry", [data.enquiry_id])
     
     quotation.pop("_id", None)
     return {"message": "Quotation created successfully", "quotation": quotation}
@@ -1009,6 +989,9 @@ async def update_quotation(quotation_id: str, data: QuotationUpdate, current_use
     
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Quotation not found")
+    await refresh_search_index(db, "sales_quotations", [quotation_id])
+    await relink_customer_id(db, "sales_quotations", quotation_id, update_data)
+    await refresh_sales_cube(db, "quotation", [quotation_id])
     
     quotation = await db.sales_quotations.find_one({"id": quotation_id}, {"_id": 0})
     return {"message": "Quotation updated successfully", "quotation": quotation}
@@ -1029,6 +1012,11 @@ async def delete_quotation(quotation_id: str, current_user: dict = Depends(requi
         )
     
     await db.sales_quotations.delete_one({"id": quotation_id})
+    await refresh_search_index(db, "sales_quotations", [quotation_id])
+    await refresh_search_index(db, "sales_enquiries", [quotation.get("enquiry_id")])
+    await refresh_enquiry_customer_metrics(db, [quotation.get("enquiry_id")])
+    await refresh_sales_cube(db, "quotation", [quotation_id])
+    await refresh_sales_cube(db, "enquiry", [quotation.get("enquiry_id")])
     return {"message": "Quotation deleted successfully"}
 
 
@@ -1049,6 +1037,7 @@ async def convert_quotation_to_order(quotation_id: str, current_user: dict = Dep
         "order_no": order_no,
         "quotation_id": quotation_id,
         "enquiry_id": quotation.get("enquiry_id"),
+        "customer_id": quotation.get("customer_id"),
         "customer_name": quotation["customer_name"],
         "customer_address": quotation.get("customer_address"),
         "customer_gst": quotation.get("customer_gst"),
@@ -1074,6 +1063,7 @@ async def convert_quotation_to_order(quotation_id: str, current_user: dict = Dep
         "updated_at": datetime.now(timezone.utc)
     }
     
+    await assign_customer_id(db, "sales_orders", order)
     await db.sales_orders.insert_one(order)
     
     # Update quotation
@@ -1088,6 +1078,14 @@ async def convert_quotation_to_order(quotation_id: str, current_user: dict = Dep
             {"id": quotation["enquiry_id"]},
             {"$set": {"order_id": order["id"], "status": "accepted", "updated_at": datetime.now(timezone.utc)}}
         )
+    await refresh_search_index(db, "sales_orders", [order["id"]])
+    await refresh_order_ledger(db, [order["id"]])
+    await refresh_sales_cube(db, "order", [order["id"]])
+    await refresh_search_index(db, "sales_quotations", [quotation_id])
+    await refresh_search_index(db, "sales_enquiries", [quotation.get("enquiry_id")])
+    await refresh_enquiry_customer_metrics(db, [quotation.get("enquiry_id")])
+    await refresh_sales_cube(db, "quotation", [quotation_id])
+    await refresh_sales_cube(db, "enquiry", [quotation.get("enquiry_id")])
     
     order.pop("_id", None)
     return {"message": "Order created from quotation", "order": order}
@@ -1127,36 +1125,16 @@ async def get_orders(
 @router.get("/orders/stats")
 async def get_order_stats():
     """Get order statistics"""
-    total = await db.sales_orders.count_documents({})
-    pending = await db.sales_orders.count_documents({"status": "pending"})
-    confirmed = await db.sales_orders.count_documents({"status": "confirmed"})
-    processing = await db.sales_orders.count_documents({"status": "processing"})
-    delivered = await db.sales_orders.count_documents({"status": "delivered"})
-    
-    # Total value
-    pipeline = [
-        {"$match": {"status": {"$ne": "cancelled"}}},
-        {"$group": {"_id": None, "total_value": {"$sum": {"$ifNull": ["$total_amount", 0]}}}}
-    ]
-    result = await db.sales_orders.aggregate(pipeline).to_list(1)
-    total_value = result[0]["total_value"] if result else 0
-    
-    # Paid amount
-    pipeline_paid = [
-        {"$match": {"payment_status": "paid"}},
-        {"$group": {"_id": None, "paid_value": {"$sum": {"$ifNull": ["$total_amount", 0]}}}}
-    ]
-    result_paid = await db.sales_orders.aggregate(pipeline_paid).to_list(1)
-    paid_value = result_paid[0]["paid_value"] if result_paid else 0
+    rows = await cube_slice(db, "order", ["status"])
     
     return {
-        "total": total,
-        "pending": pending,
-        "confirmed": confirmed,
-        "processing": processing,
-        "delivered": delivered,
-        "total_value": total_value,
-        "paid_value": paid_value
+        "total": slice_total(rows),
+        "pending": slice_total(rows, status="pending"),
+        "confirmed": slice_total(rows, status="confirmed"),
+        "processing": slice_total(rows, status="processing"),
+        "delivered": slice_total(rows, status="delivered"),
+        "total_value": slice_total(rows, "value") - slice_total(rows, "value", status="cancelled"),
+        "paid_value": slice_total(rows, "paid_value")
     }
 
 
@@ -1233,8 +1211,12 @@ async def create_order(data: OrderCreate):
         "updated_at": datetime.now(timezone.utc)
     }
     
+    await assign_customer_id(db, "sales_orders", order)
     await db.sales_orders.insert_one(order)
     order.pop("_id", None)
+    await refresh_search_index(db, "sales_orders", [order["id"]])
+    await refresh_order_ledger(db, [order["id"]])
+    await refresh_sales_cube(db, "order", [order["id"]])
     
     return {"message": "Order created successfully", "order": order}
 
@@ -1252,6 +1234,10 @@ async def update_order(order_id: str, data: OrderUpdate):
     
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Order not found")
+    await refresh_search_index(db, "sales_orders", [order_id])
+    await relink_customer_id(db, "sales_orders", order_id, update_data)
+    await refresh_order_ledger(db, [order_id])
+    await refresh_sales_cube(db, "order", [order_id])
     
     order = await db.sales_orders.find_one({"id": order_id}, {"_id": 0})
     return {"message": "Order updated successfully", "order": order}
@@ -1279,6 +1265,10 @@ async def delete_order(order_id: str):
         )
     
     await db.sales_orders.delete_one({"id": order_id})
+    await refresh_search_index(db, "sales_orders", [order_id])
+    await refresh_order_ledger(db, [order_id])
+    await refresh_sales_cube(db, "order", [order_id])
+    await refresh_sales_cube(db, "enquiry", [order.get("enquiry_id")])
     return {"message": "Order deleted successfully"}
 
 
@@ -1345,44 +1335,24 @@ async def get_target_achievements(fiscal_year: str):
     # Get targets
     targets = await db.sales_targets.find({"fiscal_year": fiscal_year}, {"_id": 0}).to_list(length=100)
     
-    # Calculate achievements from orders
-    # Parse fiscal year to get date range
     try:
-        fy_parts = fiscal_year.split("-")
-        fy_start_year = int(fy_parts[0])
-        if fy_start_year < 100:
-            fy_start_year += 2000
-        start_date = datetime(fy_start_year, 4, 1, tzinfo=timezone.utc)
-        end_date = datetime(fy_start_year + 1, 3, 31, 23, 59, 59, tzinfo=timezone.utc)
-    except (ValueError, IndexError):
+        fy_start_year = parse_fiscal_year(fiscal_year)
+    except ValueError:
         raise HTTPException(status_code=400, detail="Invalid fiscal year format. Use YY-YY or YYYY-YY")
     
-    # Get orders in this fiscal year grouped by month and category
-    pipeline = [
-        {"$match": {
-            "created_at": {"$gte": start_date, "$lte": end_date},
-            "status": {"$ne": "cancelled"}
-        }},
-        {"$group": {
-            "_id": {
-                "month": {"$month": "$created_at"},
-                "category": "$category"
-            },
-            "total": {"$sum": "$total_amount"}
-        }}
-    ]
-    
-    achievements_raw = await db.sales_orders.aggregate(pipeline).to_list(length=100)
+    # Order value in this fiscal year by month and category
+    achievements_raw = await cube_slice(
+        db, "order", ["month", "category"], {"fiscal_year": fy_start_year, "status": {"$ne": "cancelled"}}
+    )
     
     # Format achievements
     month_names = ["", "jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"]
     achievements = {}
     for item in achievements_raw:
-        cat = item["_id"]["category"] or "Uncategorized"
-        month = month_names[item["_id"]["month"]]
-        if cat not in achievements:
-            achievements[cat] = {}
-        achievements[cat][month] = item["total"]
+        cat = item["category"] or "Uncategorized"
+        month = month_names[int(item["month"][5:])]
+        achievements.setdefault(cat, {})
+        achievements[cat][month] = achievements[cat].get(month, 0) + item["value"]
     
     return {
         "fiscal_year": fiscal_year,
@@ -1393,45 +1363,43 @@ async def get_target_achievements(fiscal_year: str):
 
 # ============== DASHBOARD STATS ==============
 
+@scheduled_job("sales.cube", "45 2 * * *", "Rebuild the sales pipeline cube behind the sales dashboards")
+async def rebuild_sales_cube_job():
+    return await rebuild_sales_cube(db)
+
+
+@router.post("/cube/rebuild")
+async def rebuild_sales_cube_endpoint(current_user: dict = Depends(require_admin)):
+    """Regenerate the sales pipeline cube from enquiries, quotations and orders (admin only)"""
+    counts = await rebuild_sales_cube(db)
+    return {"message": "Sales cube rebuilt", "documents": counts}
+
+
 @router.get("/dashboard/stats")
 async def get_dashboard_stats():
     """Get overall sales dashboard statistics"""
-    # Enquiry stats
-    total_enquiries = await db.sales_enquiries.count_documents({})
-    new_enquiries = await db.sales_enquiries.count_documents({"status": "new"})
-    
-    # Quotation stats
-    total_quotations = await db.sales_quotations.count_documents({})
-    active_quotations = await db.sales_quotations.count_documents({"status": {"$in": ["draft", "sent"]}})
-    
-    # Order stats
-    total_orders = await db.sales_orders.count_documents({})
-    pending_orders = await db.sales_orders.count_documents({"status": {"$in": ["pending", "confirmed", "processing"]}})
-    
-    # Revenue this month
-    now = datetime.now()
-    month_start = datetime(now.year, now.month, 1, tzinfo=timezone.utc)
-    pipeline = [
-        {"$match": {
-            "created_at": {"$gte": month_start},
-            "status": {"$ne": "cancelled"}
-        }},
-        {"$group": {"_id": None, "revenue": {"$sum": "$total_amount"}}}
-    ]
-    result = await db.sales_orders.aggregate(pipeline).to_list(1)
-    monthly_revenue = result[0]["revenue"] if result else 0
+    enquiries = await cube_slice(db, "enquiry", ["status"])
+    quotations = await cube_slice(db, "quotation", ["status"])
+    orders = await cube_slice(db, "order", ["status", "month"])
     
+    total_enquiries = slice_total(enquiries)
     # Conversion rate (enquiries to orders)
-    total_with_orders = await db.sales_enquiries.count_documents({"order_id": {"$ne": None}})
+    total_with_orders = slice_total(enquiries, "converted")
     conversion_rate = (total_with_orders / total_enquiries * 100) if total_enquiries > 0 else 0
     
+    this_month = month_key(datetime.now())
+    monthly_revenue = (
+        slice_total(orders, "value", month=this_month)
+        - slice_total(orders, "value", month=this_month, status="cancelled")
+    )
+    
     return {
         "total_enquiries": total_enquiries,
-        "new_enquiries": new_enquiries,
-        "total_quotations": total_quotations,
-        "active_quotations": active_quotations,
-        "total_orders": total_orders,
-        "pending_orders": pending_orders,
+        "new_enquiries": slice_total(enquiries, status="new"),
+        "total_quotations": slice_total(quotations),
+        "active_quotations": slice_total(quotations, status=["draft", "sent"]),
+        "total_orders": slice_total(orders),
+        "pending_orders": slice_total(orders, status=["pending", "confirmed", "processing"]),
         "monthly_revenue": monthly_revenue,
         "conversion_rate": round(conversion_rate, 1)
     }
@@ -5,9 +5,11 @@ Handles equipment inspection scheduling and tracking
 from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel
 from typing import List, Optional
-from datetime import datetime, timezone, timedelta
+from datetime import datetime, timezone
 import uuid
 
+from utils.due_items import due_summary, format_due_date, next_occurrence, refresh_due_items
+
 router = APIRouter()
 
 
@@ -64,33 +66,8 @@ def get_db():
 
 
 def calculate_next_due_date(current_date: str, frequency: str) -> str:
-    """Calculate the next due date based on frequency"""
-    try:
-        if not current_date:
-            base_date = datetime.now()
-        else:
-            # Handle multiple date formats
-            for fmt in ["%Y-%m-%d", "%d-%m-%Y", "%d/%m/%Y"]:
-                try:
-                    base_date = datetime.strptime(current_date, fmt)
-                    break
-                except ValueError:
-                    continue
-            else:
-                base_date = datetime.now()
-        
-        frequency_map = {
-            "monthly": 30,
-            "quarterly": 90,
-            "half-yearly": 180,
-            "yearly": 365
-        }
-        
-        days_to_add = frequency_map.get(frequency.lower(), 365)
-        next_date = base_date + timedelta(days=days_to_add)
-        return next_date.strftime("%Y-%m-%d")
-    except Exception:
-        return (datetime.now() + timedelta(days=365)).strftime("%Y-%m-%d")
+    """Calculate the next due date based on frequency (calendar months for monthly and longer)"""
+    return format_due_date(next_occurrence(current_date, frequency))
 
 
 @router.get("")
@@ -133,49 +110,20 @@ async def get_scheduled_inspections(
 async def get_inspections_dashboard(
     days_ahead: int = 30
 ):
-    """Get inspection dashboard statistics"""
+    """Get inspection dashboard statistics (one $facet over the due_items index)"""
     db = get_db()
     
-    today = datetime.now().strftime("%Y-%m-%d")
-    future_date = (datetime.now() + timedelta(days=days_ahead)).strftime("%Y-%m-%d")
-    week_date = (datetime.now() + timedelta(days=7)).strftime("%Y-%m-%d")
-    month_date = (datetime.now() + timedelta(days=30)).strftime("%Y-%m-%d")
-    
-    # Count by status
-    total_active = await db.scheduled_inspections.count_documents({"status": "active"})
-    paused = await db.scheduled_inspections.count_documents({"status": "paused"})
-    
-    # Overdue (active and next_due_date < today)
-    overdue = await db.scheduled_inspections.count_documents({
-        "status": "active",
-        "next_due_date": {"$lt": today}
-    })
-    
-    # Due today
-    due_today = await db.scheduled_inspections.count_documents({
-        "status": "active",
-        "next_due_date": today
-    })
-    
-    # This week
-    this_week = await db.scheduled_inspections.count_documents({
-        "status": "active",
-        "next_due_date": {"$gte": today, "$lte": week_date}
-    })
-    
-    # This month
-    this_month = await db.scheduled_inspections.count_documents({
-        "status": "active",
-        "next_due_date": {"$gte": today, "$lte": month_date}
-    })
+    summary = await due_summary(db, "inspection", days_ahead)
     
     return {
-        "total_active": total_active,
-        "overdue": overdue,
-        "due_today": due_today,
-        "this_week": this_week,
-        "this_month": this_month,
-        "paused": paused
+        "total_active": summary["open"],
+        "overdue": summary["overdue"],
+        "due_today": summary["due_today"],
+        "this_week": summary["this_week"],
+        "this_month": summary["this_month"],
+        "due_within_days": summary["within_horizon"],
+        "days_ahead": days_ahead,
+        "paused": summary["paused"]
     }
 
 
@@ -215,6 +163,7 @@ async def create_scheduled_inspection(data: ScheduledInspectionCreate):
     }
     
     await db.scheduled_inspections.insert_one(inspection)
+    await refresh_due_items(db, "inspection", [inspection["id"]])
     
     # Remove MongoDB _id before returning
     inspection.pop("_id", None)
@@ -235,6 +184,7 @@ async def update_scheduled_inspection(inspection_id: str, data: dict):
     
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Inspection not found")
+    await refresh_due_items(db, "inspection", [inspection_id])
     
     updated = await db.scheduled_inspections.find_one(
         {"id": inspection_id}, {"_id": 0}
@@ -268,29 +218,35 @@ async def complete_inspection(inspection_id: str, data: dict = None):
         }}
     )
     
-    # Calculate and create next inspection
+    # Next occurrence from the recurrence rule; it stays active so dashboards count it
     next_due = calculate_next_due_date(completion_date, inspection.get("frequency", "yearly"))
     
     next_inspection = {
         "id": str(uuid.uuid4()),
+        "title": inspection.get("title"),
         "equipment_id": inspection.get("equipment_id"),
         "equipment_type": inspection.get("equipment_type"),
         "equipment_name": inspection.get("equipment_name"),
         "location": inspection.get("location"),
         "customer_id": inspection.get("customer_id"),
         "customer_name": inspection.get("customer_name"),
+        "project_id": inspection.get("project_id"),
+        "project_name": inspection.get("project_name"),
         "inspection_type": inspection.get("inspection_type"),
         "frequency": inspection.get("frequency"),
         "last_inspection_date": completion_date,
         "next_due_date": next_due,
         "assigned_to": inspection.get("assigned_to"),
-        "status": "scheduled",
+        "assigned_to_id": inspection.get("assigned_to_id"),
+        "reminder_days": inspection.get("reminder_days"),
+        "status": "active",
         "notes": "",
         "created_at": datetime.now(timezone.utc).isoformat(),
         "updated_at": datetime.now(timezone.utc).isoformat()
     }
     
     await db.scheduled_inspections.insert_one(next_inspection)
+    await refresh_due_items(db, "inspection", [inspection_id, next_inspection["id"]])
     next_inspection.pop("_id", None)
     
     return {
@@ -309,5 +265,6 @@ async def delete_scheduled_inspection(inspection_id: str):
     
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Inspection not found")
+    await refresh_due_items(db, "inspection", [inspection_id])
     
     return {"message": "Inspection deleted successfully"}
@@ -0,0 +1,39 @@
+"""
+Scheduler Routes
+Registered background jobs, their run history and manual runs for the
+in-process scheduler in utils/scheduler.py (admin only).
+"""
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+
+from core.database import db
+from core.security import require_admin
+from utils.scheduler import JOBS, job_status, scheduler
+
+router = APIRouter(prefix="/api/admin/scheduler", tags=["Scheduler"])
+
+
+@router.get("/jobs")
+async def list_jobs(current_user: dict = Depends(require_admin)):
+    """Every registered job with its schedule, next run on this worker and latest run"""
+    return {"jobs": await job_status(db)}
+
+
+@router.get("/runs")
+async def list_runs(job: Optional[str] = None, limit: int = 50, current_user: dict = Depends(require_admin)):
+    """Recorded runs, newest first"""
+    query = {"job": job} if job else {}
+    limit = max(1, min(limit, 500))
+    runs = await db.scheduler_runs.find(query, {"_id": 0}).sort("started_at", -1).limit(limit).to_list(limit)
+    return {"runs": runs, "count": len(runs)}
+
+
+@router.post("/jobs/{name}/run")
+async def run_job(name: str, current_user: dict = Depends(require_admin)):
+    """Run a job now on this worker and return the recorded run"""
+    if name not in JOBS:
+        raise HTTPException(status_code=404, detail="Job not found")
+    run = await scheduler.run_now(name, db)
+    run.pop("_id", None)
+    return run
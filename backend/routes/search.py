@@ -0,0 +1,59 @@
+"""
+Unified Search Routes
+Ranked, typed search across customers, enquiries, quotations, orders and
+projects backed by the search_index collection (see utils/search.py).
+"""
+import time
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+
+from core.database import db
+from core.security import require_auth, require_admin
+from utils.search import SEARCH_ENTITIES, search_entities, rebuild_search_index
+
+router = APIRouter(prefix="/api/search", tags=["Search"])
+
+
+@router.get("")
+async def unified_search(
+    q: str = "",
+    types: Optional[str] = None,
+    limit: int = 20,
+    current_user: dict = Depends(require_auth)
+):
+    """
+    Search all indexed entities.
+
+    Args:
+        q: Search text; every word must match a whole word or word prefix
+        types: Optional comma-separated entity types (customer, enquiry, quotation, order, project)
+        limit: Maximum number of hits
+    """
+    started = time.perf_counter()
+    entity_types = None
+    if types:
+        entity_types = [t.strip() for t in types.split(",") if t.strip()]
+        unknown = [t for t in entity_types if t not in SEARCH_ENTITIES]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown search types: {', '.join(unknown)}")
+
+    limit = max(1, min(limit, 100))
+    results = await search_entities(db, q, entity_types, limit=limit)
+
+    return {
+        "query": q,
+        "results": results,
+        "total": len(results),
+        "took_ms": round((time.perf_counter() - started) * 1000, 2)
+    }
+
+
+@router.post("/reindex")
+async def reindex_search(types: Optional[str] = None, current_user: dict = Depends(require_admin)):
+    """Rebuild the search index from the source collections (admin only)"""
+    entity_types = [t.strip() for t in types.split(",")] if types else None
+    if entity_types and any(t not in SEARCH_ENTITIES for t in entity_types):
+        raise HTTPException(status_code=400, detail="Unknown search type")
+    counts = await rebuild_search_index(db, entity_types)
+    return {"message": "Search index rebuilt", "indexed": counts}
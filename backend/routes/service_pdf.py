@@ -4,7 +4,6 @@ Complete implementation with ALL fields including Service Provider Details
 Uses shared pdf_base module for common styles and canvas.
 """
 import io
-import os
 import base64
 from datetime import datetime
 from reportlab.lib import colors
@@ -12,18 +11,20 @@ from reportlab.lib.pagesizes import A4
 from reportlab.lib.styles import ParagraphStyle
 from reportlab.lib.enums import TA_LEFT, TA_CENTER, TA_RIGHT
 from reportlab.lib.units import mm
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
 from reportlab.platypus import Image as RLImage
 from reportlab.pdfgen import canvas
-import requests
 
 # Import shared PDF components
 from routes.pdf_base import (
     BORDER_COLOR, LIGHT_GRAY, DARK_TEXT, GRAY_TEXT, PRIMARY_COLOR,
     create_base_styles, BaseNumberedCanvas, get_logo_image as base_get_logo_image
 )
+from routes.pdf_assets import registry as pdf_assets
+from routes.pdf_styles import memoized_styles
 
 
+@memoized_styles
 def get_styles():
     """Create paragraph styles for the PDF - using base styles with measurement text addition."""
     styles = create_base_styles()
@@ -60,23 +61,12 @@ class ServiceNumberedCanvas(BaseNumberedCanvas):
 
 
 def get_logo_image(org_settings, width=100):
-    """Fetch and create logo image element."""
+    """Create logo image element from the cached company logo."""
     try:
-        local_paths = [
-            '/app/backend/uploads/company_logo.png',
-            '/app/backend/uploads/enerzia_logo_2025.png'
-        ]
-        for local_path in local_paths:
-            if os.path.exists(local_path):
-                img = Image(local_path, width=width, height=width*0.35)
-                return img
-        
         logo_url = org_settings.get('logo_url', '') if org_settings else ''
-        if logo_url and logo_url.startswith('http'):
-            response = requests.get(logo_url, timeout=5)
-            if response.status_code == 200:
-                img_data = io.BytesIO(response.content)
-                return Image(img_data, width=width, height=width*0.35)
+        logo = pdf_assets.company_logo(logo_url)
+        if logo:
+            return logo.image(width, width*0.35)
     except Exception as e:
         print(f"Error loading logo: {e}")
     return None
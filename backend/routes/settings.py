@@ -13,6 +13,11 @@ import os
 
 from motor.motor_asyncio import AsyncIOMotorClient
 
+from utils.search import refresh_search_index, index_documents
+from utils.customer_identity import link_unlinked_records, name_key, register_client, unregister_client
+from utils.customer_metrics import refresh_customer_metrics
+from routes.pdf_assets import registry as pdf_assets
+
 router = APIRouter(prefix="/settings", tags=["Settings"])
 
 # MongoDB connection
@@ -228,6 +233,7 @@ async def upload_organization_logo(file: UploadFile = File(...)):
         {"$set": {"logo_url": logo_url}},
         upsert=True
     )
+    pdf_assets.invalidate()
     
     return {
         "logo_url": logo_url,
@@ -252,6 +258,7 @@ async def delete_organization_logo():
         {"$set": {"logo_url": None}},
         upsert=True
     )
+    pdf_assets.invalidate()
     
     return {"message": "Logo deleted successfully"}
 
@@ -657,6 +664,9 @@ async def create_client(client: ClientCreate):
     await db.clients.insert_one(doc)
     # Remove _id before returning (MongoDB adds it during insert)
     doc.pop('_id', None)
+    await refresh_search_index(db, "clients", [doc["id"]])
+    await register_client(db, doc)
+    await refresh_customer_metrics(db, [doc["id"]])
     return doc
 
 
@@ -676,8 +686,11 @@ async def update_client(client_id: str, updates: dict):
     
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Client not found")
+    await refresh_search_index(db, "clients", [client_id])
     
     updated = await db.clients.find_one({"id": client_id}, {"_id": 0})
+    await register_client(db, updated)
+    await refresh_customer_metrics(db, [client_id])
     return updated
 
 
@@ -687,6 +700,9 @@ async def delete_client(client_id: str):
     result = await db.clients.delete_one({"id": client_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Client not found")
+    await refresh_search_index(db, "clients", [client_id])
+    await unregister_client(db, client_id)
+    await refresh_customer_metrics(db, [client_id])
     return {"message": "Client deleted successfully"}
 
 
@@ -696,17 +712,26 @@ async def seed_clients():
     projects = await db.projects.find({}, {"client": 1, "_id": 0}).to_list(10000)
     unique_clients = set(p.get('client', '') for p in projects if p.get('client'))
     
-    existing = await db.clients.find({}, {"name": 1, "_id": 0}).to_list(1000)
-    existing_names = set(c.get('name', '') for c in existing)
+    existing = await db.clients.find({}, {"name": 1, "_id": 0}).to_list(None)
+    # Compare normalized names so "ABC Pvt Ltd" and "ABC Private Limited" are one client
+    existing_keys = set(name_key(c.get('name')) for c in existing)
     
-    added = 0
+    added = []
     for name in unique_clients:
-        if name and name not in existing_names:
+        key = name_key(name)
+        if key and key not in existing_keys:
             client = Client(name=name)
             doc = client.model_dump()
             doc['created_at'] = doc['created_at'].isoformat()
             await db.clients.insert_one(doc)
-            added += 1
+            await register_client(db, doc, backfill=False)
+            existing_keys.add(key)
+            added.append(doc)
+    await index_documents(db, "clients", added)
+    if added:
+        await link_unlinked_records(db, [c["id"] for c in added])
+    await refresh_customer_metrics(db, [c["id"] for c in added])
+    added = len(added)
     
     return {"message": f"Added {added} clients", "total": len(unique_clients)}
 
@@ -13,6 +13,7 @@ sys.path.insert(0, '/app/backend')
 
 from core.database import db
 from core.security import require_auth
+from utils.customer_documents import add_project_document, remove_document
 
 router = APIRouter(prefix="/test-reports", tags=["Test Reports"])
 
@@ -246,6 +247,7 @@ async def create_test_report(
     doc['updated_at'] = doc['updated_at'].isoformat()
     
     await db.test_reports.insert_one(doc)
+    await add_project_document(db, "test_report", doc)
     
     return {"message": "Test report created", "id": report.id, "report_no": report.report_no}
 
@@ -270,6 +272,7 @@ async def update_test_report(
         {"id": report_id},
         {"$set": report_data}
     )
+    await add_project_document(db, "test_report", {**existing, **report_data})
     
     return {"message": "Test report updated"}
 
@@ -285,6 +288,7 @@ async def delete_test_report(
         raise HTTPException(status_code=404, detail="Test report not found")
     
     await db.test_reports.delete_one({"id": report_id})
+    await remove_document(db, "test_report", report_id)
     
     return {"message": "Test report deleted"}
 
@@ -33,12 +33,34 @@ router = APIRouter(prefix="/api/travel-log", tags=["Travel Log"])
 
 # MongoDB connection
 from motor.motor_asyncio import AsyncIOMotorClient
+from utils.approvals import Transition, Workflow, apply_transition
+from utils.indexes import index, register_indexes
 
 MONGO_URL = os.environ.get("MONGO_URL")
 DB_NAME = os.environ.get("DB_NAME", "enerzia_erp")
 client = AsyncIOMotorClient(MONGO_URL)
 db = client[DB_NAME]
 
+register_indexes(__name__, {
+    "travel_logs": [
+        index("user_id", "date"),
+        index("user_id", ("created_at", -1)),
+        index("status", ("created_at", -1)),
+        index(("created_at", -1)),
+        index("project_id"),
+    ],
+})
+
+TRIP_WORKFLOW = Workflow(
+    collection="travel_logs",
+    label="trip",
+    id_fields=("_id",),
+    notify_department="HR",
+    transitions={
+        "approve": Transition("approved", ("pending",), "approved_by", "approved_at"),
+    },
+)
+
 # Upload directory
 UPLOADS_DIR = "/app/uploads/travel-photos"
 os.makedirs(UPLOADS_DIR, exist_ok=True)
@@ -507,17 +529,12 @@ async def resubmit_trip(
 
 @router.put("/bulk-approve")
 async def bulk_approve_trips(trip_ids: List[str], approved_by: str):
-    """Bulk approve multiple trips"""
-    for trip_id in trip_ids:
-        await db.travel_logs.update_one(
-            {"_id": ObjectId(trip_id)},
-            {"$set": {
-                "status": "approved",
-                "approved_by": approved_by,
-                "approved_at": datetime.now(timezone.utc).isoformat()
-            }}
-        )
-    return {"message": f"{len(trip_ids)} trips approved"}
+    """Bulk approve pending trips with one status-guarded update"""
+    result = await apply_transition(db, TRIP_WORKFLOW, trip_ids, "approve", actor=approved_by, notify=True)
+    return {
+        "message": f"{len(result.succeeded)} trips approved",
+        **result.summary()
+    }
 
 
 # ============= REPORTS =============
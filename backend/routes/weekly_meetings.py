@@ -22,6 +22,9 @@ from reportlab.platypus import (
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.enums import TA_CENTER
 
+from routes.pdf_assets import registry as pdf_assets
+from utils import columnar
+
 router = APIRouter(prefix="/weekly-meetings", tags=["Weekly-Meetings"])
 
 # MongoDB connection - import from environment
@@ -232,21 +235,18 @@ async def get_weekly_meeting_summary():
     
     last_week_completed = last_week_completed[:20]
     
-    # Calculate billing summary
-    all_projects = await db.projects.find({}, {"_id": 0, "po_amount": 1, "invoiced_amount": 1, "this_week_billing": 1, "category": 1}).to_list(1000)
-    
-    total_po_amount = sum(p.get("po_amount", 0) for p in all_projects)
-    total_invoiced = sum(p.get("invoiced_amount", 0) for p in all_projects)
-    this_week_billing = sum(p.get("this_week_billing", 0) for p in all_projects)
+    # Calculate billing summary from the projects snapshot
+    projects = await columnar.snapshot_frame(db, "projects")
+    sums = columnar.totals(projects, ["po_amount", "invoiced_amount", "this_week_billing"])
+    total_po_amount = sums["po_amount"]
+    total_invoiced = sums["invoiced_amount"]
+    this_week_billing = sums["this_week_billing"]
     
     # Get category breakdown for billing
-    category_billing = {}
-    for p in all_projects:
-        cat = p.get("category", "Other")
-        if cat not in category_billing:
-            category_billing[cat] = {"po_amount": 0, "invoiced": 0}
-        category_billing[cat]["po_amount"] += p.get("po_amount", 0)
-        category_billing[cat]["invoiced"] += p.get("invoiced_amount", 0)
+    category_billing = {
+        (category if category is not None else "Other"): {"po_amount": row["po_amount"], "invoiced": row["invoiced_amount"]}
+        for category, row in columnar.group_sum(projects, "category", ["po_amount", "invoiced_amount"]).items()
+    }
     
     # Get recent meetings
     recent_meetings = await db.weekly_meetings.find(
@@ -367,15 +367,11 @@ async def generate_weekly_meeting_pdf(meeting_id: str):
     org_name = org_settings.get("name", "Enerzia Power Solutions") if org_settings else "Enerzia Power Solutions"
     
     # Get logo
-    logo_path = None
-    default_logo_path = "/app/backend/uploads/enerzia_logo_2025.png"
+    logo = None
     if org_settings and org_settings.get("logo_url"):
-        logo_filename = org_settings.get("logo_url", "").split("/")[-1]
-        potential_path = f"/app/backend/uploads/{logo_filename}"
-        if os.path.exists(potential_path):
-            logo_path = potential_path
-    if not logo_path and os.path.exists(default_logo_path):
-        logo_path = default_logo_path
+        logo = pdf_assets.upload(org_settings["logo_url"])
+    if not logo:
+        logo = pdf_assets.file("/app/backend/uploads/enerzia_logo_2025.png")
     
     # Create PDF
     buffer = io.BytesIO()
@@ -398,9 +394,9 @@ async def generate_weekly_meeting_pdf(meeting_id: str):
             canvas = self.canv
             
             # Header with logo
-            if logo_path and os.path.exists(logo_path):
+            if logo:
                 try:
-                    canvas.drawImage(logo_path, margin, page_height - 60, width=100, height=35, preserveAspectRatio=True, mask='auto')
+                    canvas.drawImage(logo.scaled(100, 35), margin, page_height - 60, width=100, height=35, preserveAspectRatio=True, mask='auto')
                 except (IOError, OSError):
                     pass
             
@@ -6,6 +6,7 @@ import shutil
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import InsertOne, UpdateOne, DeleteOne
 import os
 import logging
 from pathlib import Path
@@ -15,23 +16,44 @@ import uuid
 from datetime import datetime, timezone, timedelta
 from enum import Enum
 import pandas as pd
-import io
+import numpy as np
 import random
 import string
 import asyncio
-from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment, PatternFill
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import letter, A4
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image as RLImage
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 from reportlab.lib.enums import TA_CENTER, TA_RIGHT
-import requests
 from passlib.context import CryptContext
 import jwt
 import resend
 
+# Registers the Mongo command listener; must precede every MongoClient creation
+from utils.perf import PerformanceMiddleware, monitor_event_loop
+from utils.loop_watchdog import watchdog as loop_watchdog
+from utils.bulk_import import (
+    Column, ImportReport, read_excel_upload, normalize_frame, frame_records,
+    validate_batch, compute_keyed_diff, bulk_write_transaction
+)
+from utils.cache import invalidate_project_caches
+from utils.search import refresh_search_index
+from utils.customer_identity import assign_customer_id, assign_customer_ids, relink_customer_id
+from utils.streaming import fetch_page, find_by_ids, iter_batches, iter_cursor, page_response, stream_list_response
+from utils import columnar
+from routes.projects import PROJECT_EXPORT_COLUMNS, PROJECT_EXPORT_PROJECTION
+from utils.report_exports import (
+    PDF_EXPORT_ASYNC_THRESHOLD, XLSX_MEDIA_TYPE, build_pdf, chunked_tables, export_file, write_xlsx
+)
+from utils.customer_documents import add_project_document, remove_document
+from utils.database import create_indexes
+from utils.scheduler import cached_view, scheduled_job, scheduler, store_view, time_bucket
+from utils.change_feed import change_feed
+from utils.order_ledger import refresh_order_ledger
+from utils.responses import CompressionMiddleware, FastJSONResponse
+from routes.pdf_assets import registry as pdf_assets
+
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -90,7 +112,7 @@ class ConnectionManager:
 manager = ConnectionManager()
 
 # Create the main app without a prefix
-app = FastAPI()
+app = FastAPI(default_response_class=FastJSONResponse)
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
@@ -1375,6 +1397,14 @@ async def broadcast_update(entity_type: str, action: str, data: dict = None):
     await manager.broadcast(message)
 
 
+async def broadcast_change(entity_type: str, action: str, ids: List[str]):
+    """Relay writes picked up by the change feed (imports, syncs, scripts) to connected clients"""
+    await broadcast_update(entity_type, action, {"ids": ids, "source": "change_feed"})
+
+
+change_feed.add_listener(broadcast_change)
+
+
 @api_router.post("/projects/remove-duplicates")
 async def remove_duplicate_projects():
     """Remove duplicate PIDs, keeping only the first occurrence"""
@@ -1674,7 +1704,10 @@ async def create_project(project: ProjectCreate):
     doc['created_at'] = doc['created_at'].isoformat()
     doc['updated_at'] = doc['updated_at'].isoformat()
     
+    await assign_customer_id(db, "projects", doc)
     await db.projects.insert_one(doc)
+    await refresh_search_index(db, "projects", [project_obj.id])
+    columnar.mark_stale("projects")
     
     # If linked to a sales order, update the order_lifecycle with linked project
     if project_dict.get('linked_order_id'):
@@ -1687,6 +1720,7 @@ async def create_project(project: ProjectCreate):
             }},
             upsert=True
         )
+        await refresh_order_ledger(db, [project_dict['linked_order_id']])
     
     # Broadcast real-time update
     await broadcast_update("project", "create", {"id": project_obj.id, "pid_no": project_obj.pid_no})
@@ -1699,8 +1733,15 @@ async def get_projects(
     status: Optional[str] = None, 
     category: Optional[str] = None,
     department: Optional[str] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    format: str = "json",
     current_user: dict = Depends(get_current_user)
 ):
+    """
+    Projects newest first, streamed as a JSON array (or NDJSON with format=ndjson).
+    Pass limit (and the X-Next-Cursor of the previous page as cursor) to page through them.
+    """
     query = {}
     if status:
         query['status'] = status
@@ -1719,16 +1760,20 @@ async def get_projects(
     if department:
         query['department'] = department
     
-    # Sort by created_at descending (newest first)
-    projects = await db.projects.find(query, {"_id": 0}).sort("created_at", -1).to_list(1000)
-    
-    for project in projects:
+    def serialize(project):
         if isinstance(project.get('created_at'), str):
             project['created_at'] = datetime.fromisoformat(project['created_at'])
         # Auto-calculate balance amount = PO Amount - Invoiced Amount
         project['balance'] = project.get('po_amount', 0) - project.get('invoiced_amount', 0)
+        return Project(**project).model_dump(mode="json")
+    
+    # Sort by created_at descending (newest first)
+    if limit:
+        projects, next_cursor = await fetch_page(db.projects, query, {"_id": 0}, "created_at", -1, limit, cursor)
+        return page_response(projects, next_cursor, serialize, format)
     
-    return projects
+    projects_cursor = db.projects.find(query, {"_id": 0}).sort([("created_at", -1), ("id", -1)])
+    return stream_list_response(iter_cursor(projects_cursor), serialize, format)
 
 
 @api_router.get("/projects/{project_id}", response_model=Project)
@@ -1847,6 +1892,9 @@ async def update_project(project_id: str, update_data: ProjectUpdate):
     
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Project not found")
+    await refresh_search_index(db, "projects", [project_id])
+    await relink_customer_id(db, "projects", project_id, update_dict)
+    columnar.mark_stale("projects")
     
     updated_project = await db.projects.find_one({"id": project_id}, {"_id": 0})
     if isinstance(updated_project.get('created_at'), str):
@@ -1865,6 +1913,8 @@ async def delete_project(project_id: str):
     result = await db.projects.delete_one({"id": project_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Project not found")
+    await refresh_search_index(db, "projects", [project_id])
+    columnar.mark_stale("projects")
     
     # Broadcast real-time update
     await broadcast_update("project", "delete", {"id": project_id})
@@ -1921,116 +1971,93 @@ async def get_dashboard_stats():
 
 # Excel Export
 @api_router.get("/projects/export/excel")
-async def export_projects_excel():
-    """Export all projects to Excel"""
-    projects = await db.projects.find({}, {"_id": 0}).to_list(1000)
-    
-    # Convert to DataFrame
-    df = pd.DataFrame(projects)
-    
-    # Reorder columns
-    column_order = [
-        'pid_no', 'category', 'po_number', 'client', 'location', 'project_name',
-        'vendor', 'status', 'engineer_in_charge', 'po_amount', 'balance',
-        'invoiced_amount', 'completion_percentage', 'this_week_billing',
-        'budget', 'actual_expenses', 'pid_savings', 'weekly_actions'
-    ]
-    
-    # Keep only columns that exist
-    available_cols = [col for col in column_order if col in df.columns]
-    df = df[available_cols]
-    
-    # Create Excel file in memory
-    output = io.BytesIO()
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        df.to_excel(writer, sheet_name='Projects', index=False)
-        
-        # Get workbook and worksheet
-        workbook = writer.book
-        worksheet = writer.sheets['Projects']
-        
-        # Style headers
-        for cell in worksheet[1]:
-            cell.font = Font(bold=True, color="FFFFFF")
-            cell.fill = PatternFill(start_color="0F172A", end_color="0F172A", fill_type="solid")
-            cell.alignment = Alignment(horizontal="center")
-        
-        # Auto-adjust column widths
-        for column in worksheet.columns:
-            max_length = 0
-            column_letter = column[0].column_letter
-            for cell in column:
-                try:
-                    if len(str(cell.value)) > max_length:
-                        max_length = len(str(cell.value))
-                except:
-                    pass
-            adjusted_width = min(max_length + 2, 50)
-            worksheet.column_dimensions[column_letter].width = adjusted_width
-    
-    output.seek(0)
+async def export_projects_excel(async_job: bool = False, current_user: dict = Depends(get_current_user)):
+    """
+    Export all projects to Excel. Rows stream from the cursor into a write-only
+    workbook; large exports run as a background job (202 with a download link).
+    """
+    async def write(fileobj):
+        batches = iter_batches(db.projects.find({}, PROJECT_EXPORT_PROJECTION))
+        return await write_xlsx(fileobj, batches, PROJECT_EXPORT_COLUMNS, 'Projects')
     
-    return StreamingResponse(
-        output,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        headers={
-            "Content-Disposition": f"attachment; filename=projects_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-        }
-    )
+    filename = f"projects_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+    rows = await db.projects.count_documents({})
+    return await export_file(db, "projects_excel", filename, XLSX_MEDIA_TYPE, write, rows, async_job, current_user)
 
 
 # Excel Import
+PROJECT_IMPORT_COLUMN_MAPPING = {
+    'pid no': 'pid_no',
+    'pid_no': 'pid_no',
+    'pid': 'pid_no',
+    'project name': 'project_name',
+    'projectname': 'project_name',
+    'engineer in charge': 'engineer_in_charge',
+    'engineer': 'engineer_in_charge',
+    'po amount': 'po_amount',
+    'poamount': 'po_amount',
+    'po number': 'po_number',
+    'ponumber': 'po_number',
+    'invoiced amount': 'invoiced_amount',
+    'invoicedamount': 'invoiced_amount',
+    'this week billing': 'this_week_billing',
+    'thisweekbilling': 'this_week_billing',
+    'actual expenses': 'actual_expenses',
+    'actualexpenses': 'actual_expenses',
+    'expenses': 'actual_expenses',
+    'weekly actions': 'weekly_actions',
+    'weeklyactions': 'weekly_actions',
+    'actions': 'weekly_actions',
+    'completion percentage': 'completion_percentage',
+    'completion': 'completion_percentage',
+    'profit loss': 'pid_savings',
+    'profit/loss': 'pid_savings',
+    'pid expenses': 'pid_savings',
+}
+
+PROJECT_IMPORT_COLUMNS = {
+    'pid_no': Column(['pid_no'], kind='optional_str'),
+    'category': Column(['category'], default='PSS'),
+    'po_number': Column(['po_number']),
+    'client': Column(['client'], default='Unknown'),
+    'location': Column(['location'], default='Unknown'),
+    'project_name': Column(['project_name'], default='Untitled Project'),
+    'vendor': Column(['vendor'], default='TBD'),
+    'status': Column(['status'], default='Need to Start'),
+    'engineer_in_charge': Column(['engineer_in_charge'], default='Unassigned'),
+    'po_amount': Column(['po_amount'], kind='float', default=0),
+    'balance': Column(['balance'], kind='float', default=0),
+    'invoiced_amount': Column(['invoiced_amount'], kind='float', default=0),
+    'completion_percentage': Column(['completion_percentage'], kind='float', default=0),
+    'this_week_billing': Column(['this_week_billing'], kind='float', default=0),
+    'budget': Column(['budget'], kind='float', default=0),
+    'actual_expenses': Column(['actual_expenses'], kind='float', default=0),
+    'weekly_actions': Column(['weekly_actions']),
+}
+
+
 @api_router.post("/projects/import/excel")
-async def import_projects_excel(file: UploadFile = File(...)):
+async def import_projects_excel(file: UploadFile = File(...), dry_run: bool = False):
     """
-    Import projects from Excel file with smart sync:
-    1. REMOVES all existing non-completed (ongoing) projects
-    2. UPDATES existing PIDs if they exist (including completed projects)
-    3. ADDS new PIDs from Excel
+    Import projects from Excel file with smart sync keyed on PID:
+    1. ADDS new PIDs from Excel
+    2. UPDATES existing PIDs (including completed projects) when a field changed,
+       preserving their id and created_at
+    3. REMOVES non-completed (ongoing) projects that are NOT in Excel
     4. Keeps completed projects that are NOT in Excel unchanged
+    
+    The changes are applied as one bulk write inside a transaction and the
+    response lists what changed. With dry_run=true nothing is written.
     """
     if not file.filename.endswith(('.xlsx', '.xls')):
         raise HTTPException(status_code=400, detail="Only Excel files are supported")
     
     try:
         contents = await file.read()
-        df = pd.read_excel(io.BytesIO(contents))
-        
-        # Make column names case-insensitive and strip spaces
-        df.columns = df.columns.str.strip().str.lower()
-        
-        # Map common column variations
-        column_mapping = {
-            'pid no': 'pid_no',
-            'pid_no': 'pid_no',
-            'pid': 'pid_no',
-            'project name': 'project_name',
-            'projectname': 'project_name',
-            'engineer in charge': 'engineer_in_charge',
-            'engineer': 'engineer_in_charge',
-            'po amount': 'po_amount',
-            'poamount': 'po_amount',
-            'po number': 'po_number',
-            'ponumber': 'po_number',
-            'invoiced amount': 'invoiced_amount',
-            'invoicedamount': 'invoiced_amount',
-            'this week billing': 'this_week_billing',
-            'thisweekbilling': 'this_week_billing',
-            'actual expenses': 'actual_expenses',
-            'actualexpenses': 'actual_expenses',
-            'expenses': 'actual_expenses',
-            'weekly actions': 'weekly_actions',
-            'weeklyactions': 'weekly_actions',
-            'actions': 'weekly_actions',
-            'completion percentage': 'completion_percentage',
-            'completion': 'completion_percentage',
-            'profit loss': 'pid_savings',
-            'profit/loss': 'pid_savings',
-            'pid expenses': 'pid_savings',
-        }
+        df = read_excel_upload(contents)
         
         # Rename columns based on mapping
-        df = df.rename(columns=column_mapping)
+        df = df.rename(columns=PROJECT_IMPORT_COLUMN_MAPPING)
         
         # Required columns (relaxed requirement)
         required_cols = ['pid_no', 'project_name']
@@ -2041,108 +2068,116 @@ async def import_projects_excel(file: UploadFile = File(...)):
                 detail=f"Missing required columns: {', '.join(missing_cols)}. Available columns: {', '.join(df.columns)}"
             )
         
-        # Get Excel PIDs for reference
-        excel_pids = set(str(row.get('pid_no', '')).strip() for _, row in df.iterrows() if pd.notna(row.get('pid_no')))
+        report = ImportReport(total_rows=len(df), dry_run=dry_run)
+        frame = normalize_frame(df, PROJECT_IMPORT_COLUMNS)
         
-        # Step 1: Delete all non-completed projects (clean slate for ongoing projects)
-        delete_result = await db.projects.delete_many({"status": {"$ne": "Completed"}})
-        deleted_count = delete_result.deleted_count
-        logger.info(f"Deleted {deleted_count} non-completed projects before import")
+        # Skip rows without PID and duplicate PIDs within the sheet
+        missing_pid = frame['pid_no'].isna()
+        duplicate_pid = frame['pid_no'].duplicated() & ~missing_pid
+        for position in np.flatnonzero(missing_pid.to_numpy()):
+            report.add_error(int(position), "Missing PID number, skipped")
+        for position in np.flatnonzero(duplicate_pid.to_numpy()):
+            report.add_error(int(position), f"Duplicate PID {frame['pid_no'].iloc[position]} in Excel, skipped")
+        positions = np.flatnonzero((~missing_pid & ~duplicate_pid).to_numpy()).tolist()
+        frame = frame.iloc[positions].copy()
         
-        # Step 2: Get remaining completed projects (to check for updates)
-        completed_projects = await db.projects.find({"status": "Completed"}, {"pid_no": 1, "_id": 0}).to_list(10000)
-        completed_pids = set(p.get('pid_no') for p in completed_projects if p.get('pid_no'))
+        # Convert decimal completion (0-1) to percentage, derive PID savings
+        # (unparseable cells stay as-is so validation reports the row)
+        cp = pd.to_numeric(frame['completion_percentage'], errors='coerce')
+        frame['completion_percentage'] = frame['completion_percentage'].where(~((cp > 0) & (cp <= 1)), cp * 100)
+        budget = pd.to_numeric(frame['budget'], errors='coerce')
+        expenses = pd.to_numeric(frame['actual_expenses'], errors='coerce')
+        frame['pid_savings'] = (budget - expenses).fillna(0)
         
-        # Process each row
-        imported_count = 0
-        updated_count = 0
-        errors = []
-        processed_pids = set()
+        # Validate all rows in batches
+        docs, doc_positions = validate_batch(frame_records(frame), Project, report, positions=positions)
         
-        for index, row in df.iterrows():
-            try:
-                # Get PID
-                pid_no = str(row.get('pid_no', '')).strip() if pd.notna(row.get('pid_no')) else ''
-                
-                # Skip rows without PID
-                if not pid_no:
-                    errors.append(f"Row {index + 2}: Missing PID number, skipped")
-                    continue
-                
-                # Skip if already processed in this import (duplicate in Excel)
-                if pid_no in processed_pids:
-                    errors.append(f"Row {index + 2}: Duplicate PID {pid_no} in Excel, skipped")
-                    continue
-                
-                # Handle completion_percentage - convert decimal to percentage if needed
-                raw_cp = float(row.get('completion_percentage', 0)) if pd.notna(row.get('completion_percentage')) else 0
-                completion_percentage = raw_cp * 100 if 0 < raw_cp <= 1 else raw_cp
-                
-                project_data = {
-                    'pid_no': pid_no,
-                    'category': str(row.get('category', 'PSS')).strip() if pd.notna(row.get('category')) else 'PSS',
-                    'po_number': str(row.get('po_number', '')) if pd.notna(row.get('po_number')) else None,
-                    'client': str(row.get('client', 'Unknown')),
-                    'location': str(row.get('location', 'Unknown')),
-                    'project_name': str(row.get('project_name', 'Untitled Project')),
-                    'vendor': str(row.get('vendor', 'TBD')),
-                    'status': str(row.get('status', 'Need to Start')).strip() if pd.notna(row.get('status')) else 'Need to Start',
-                    'engineer_in_charge': str(row.get('engineer_in_charge', 'Unassigned')),
-                    'po_amount': float(row.get('po_amount', 0)) if pd.notna(row.get('po_amount')) else 0,
-                    'balance': float(row.get('balance', 0)) if pd.notna(row.get('balance')) else 0,
-                    'invoiced_amount': float(row.get('invoiced_amount', 0)) if pd.notna(row.get('invoiced_amount')) else 0,
-                    'completion_percentage': completion_percentage,
-                    'this_week_billing': float(row.get('this_week_billing', 0)) if pd.notna(row.get('this_week_billing')) else 0,
-                    'budget': float(row.get('budget', 0)) if pd.notna(row.get('budget')) else 0,
-                    'actual_expenses': float(row.get('actual_expenses', 0)) if pd.notna(row.get('actual_expenses')) else 0,
-                    'weekly_actions': str(row.get('weekly_actions', '')) if pd.notna(row.get('weekly_actions')) else None,
-                    'updated_at': datetime.now(timezone.utc).isoformat()
-                }
-                
-                # Calculate PID savings
-                project_data['pid_savings'] = project_data['budget'] - project_data['actual_expenses']
-                
-                # Check if this PID exists in completed projects - UPDATE if so
-                if pid_no in completed_pids:
-                    # Update existing completed project with new data
-                    await db.projects.update_one(
-                        {"pid_no": pid_no},
-                        {"$set": project_data}
-                    )
-                    updated_count += 1
-                    logger.info(f"Updated existing project: {pid_no}")
-                else:
-                    # Create new project
-                    project = Project(**project_data)
-                    doc = project.model_dump()
-                    doc['created_at'] = doc['created_at'].isoformat()
-                    doc['updated_at'] = doc['updated_at'].isoformat()
-                    
-                    await db.projects.insert_one(doc)
-                    imported_count += 1
-                
-                processed_pids.add(pid_no)
-                
-            except Exception as e:
-                errors.append(f"Row {index + 2}: {str(e)}")
+        # Only sync columns the sheet actually provides so absent columns keep stored values
+        sync_fields = [
+            f for f, spec in PROJECT_IMPORT_COLUMNS.items()
+            if any(alias in df.columns for alias in spec.aliases)
+        ]
+        if 'budget' in sync_fields or 'actual_expenses' in sync_fields:
+            sync_fields.append('pid_savings')
+        
+        # Diff the sheet against the current collection on pid_no. Completed
+        # projects missing from the sheet are kept, everything else is synced.
+        # PIDs whose row failed validation are still in the sheet and are kept.
+        projection = {"_id": 1, "id": 1, "status": 1, **{f: 1 for f in sync_fields}}
+        existing = await db.projects.find({}, projection).to_list(None)
+        diff = compute_keyed_diff(
+            existing, docs, key='pid_no', compare_fields=sync_fields,
+            deletable=lambda doc: doc.get('status') != 'Completed',
+            keep=frame['pid_no'].tolist()
+        )
+        
+        await assign_customer_ids(db, "projects", diff.inserts)
+        now = datetime.now(timezone.utc).isoformat()
+        operations = (
+            [InsertOne(doc) for doc in diff.inserts]
+            + [UpdateOne({"_id": current["_id"]}, {"$set": {**changed, "updated_at": now}})
+               for current, changed in diff.updates]
+            + [DeleteOne({"_id": doc["_id"]}) for doc in diff.deletes]
+        )
+        
+        changes = {
+            "inserted": [doc['pid_no'] for doc in diff.inserts],
+            "updated": [{"pid_no": current['pid_no'], "fields": sorted(changed)} for current, changed in diff.updates],
+            "deleted": [doc.get('pid_no') for doc in diff.deletes],
+        }
         
-        # Broadcast real-time update for all changes
-        await broadcast_update("project", "bulk_import", {"count": imported_count + updated_count})
+        transactional = False
+        if not dry_run and operations:
+            # Apply inserts, updates and deletes together so readers never see a partial sync
+            result = await bulk_write_transaction(client, db.projects, operations)
+            transactional = result["transactional"]
+            logger.info(
+                f"Project import applied: {result['inserted']} inserted, {result['modified']} updated, "
+                f"{result['deleted']} deleted"
+            )
+            for doc in diff.inserts:
+                doc.pop('_id', None)
+            await refresh_search_index(
+                db, "projects",
+                [doc['id'] for doc in diff.inserts]
+                + [current.get('id') for current, _ in diff.updates]
+                + [doc.get('id') for doc in diff.deletes]
+            )
+            columnar.mark_stale("projects")
+            
+            # One coalesced change event for the whole import
+            await invalidate_project_caches()
+            await broadcast_update("project", "bulk_import", {
+                "inserted": len(diff.inserts),
+                "updated": len(diff.updates),
+                "deleted": len(diff.deletes),
+            })
+        
+        imported_count = len(diff.inserts)
+        updated_count = len(diff.updates)
+        deleted_count = len(diff.deletes)
         
         # Build response message
-        message = f"Import complete: {imported_count} new projects added"
+        message = "Dry run" if dry_run else "Import complete"
+        message += f": {imported_count} new projects added"
         if updated_count > 0:
             message += f", {updated_count} existing projects updated"
+        if diff.unchanged > 0:
+            message += f", {diff.unchanged} unchanged"
         if deleted_count > 0:
-            message += f". {deleted_count} old ongoing projects were removed"
+            message += f". {deleted_count} ongoing projects not in the sheet were removed"
         
         return {
             "message": message,
             "imported": imported_count,
             "updated": updated_count,
             "deleted": deleted_count,
-            "total_rows": len(df),
-            "errors": errors if errors else None
+            "unchanged": diff.unchanged,
+            "total_rows": report.total_rows,
+            "dry_run": dry_run,
+            "transactional": transactional,
+            "changes": changes,
+            "errors": report.errors if report.errors else None
         }
         
     except HTTPException:
@@ -2154,138 +2189,138 @@ async def import_projects_excel(file: UploadFile = File(...)):
 
 # PDF Export
 @api_router.get("/projects/export/pdf")
-async def export_projects_pdf():
-    """Export project status report to PDF"""
-    projects = await db.projects.find({}, {"_id": 0}).to_list(1000)
-    
-    # Create PDF in memory
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=30, leftMargin=30, topMargin=30, bottomMargin=18)
-    
-    # Container for elements
-    elements = []
-    
-    # Styles
-    styles = getSampleStyleSheet()
-    
-    # Try to add logo from organization settings
-    try:
-        org_settings = await db.organization_settings.find_one({}, {"_id": 0})
-        logo_url = org_settings.get("logo_url") if org_settings else None
-        if logo_url:
-            logo_response = requests.get(logo_url, timeout=5)
-            if logo_response.status_code == 200:
-                logo_buffer = io.BytesIO(logo_response.content)
-                logo = RLImage(logo_buffer, width=1.5*inch, height=0.6*inch)
-                elements.append(logo)
+async def export_projects_pdf(async_job: bool = False, current_user: dict = Depends(get_current_user)):
+    """Export project status report to PDF, all projects in chunked tables"""
+    async def write(fileobj):
+        doc = SimpleDocTemplate(fileobj, pagesize=A4, rightMargin=30, leftMargin=30, topMargin=30, bottomMargin=18)
+        
+        # Container for elements
+        elements = []
+        
+        # Styles
+        styles = getSampleStyleSheet()
+        
+        # Try to add logo from organization settings
+        try:
+            org_settings = await db.organization_settings.find_one({}, {"_id": 0})
+            logo_url = org_settings.get("logo_url") if org_settings else None
+            logo = pdf_assets.upload(logo_url)
+            if logo:
+                elements.append(logo.image(1.5*inch, 0.6*inch))
                 elements.append(Spacer(1, 10))
-    except:
-        pass
-    
-    # Company name
-    company_style = ParagraphStyle(
-        'CompanyName',
-        parent=styles['Normal'],
-        fontSize=10,
-        textColor=colors.HexColor('#0F172A'),
-        spaceAfter=5
-    )
-    elements.append(Paragraph("<b>Enerzia Power Solutions</b>", company_style))
-    elements.append(Spacer(1, 5))
-    
-    # Title
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=24,
-        textColor=colors.HexColor('#0F172A'),
-        spaceAfter=20,
-        alignment=TA_CENTER
-    )
-    
-    elements.append(Paragraph("Projects & Services Status Report", title_style))
-    elements.append(Paragraph(f"Generated on: {datetime.now().strftime('%B %d, %Y')}", styles['Normal']))
-    elements.append(Spacer(1, 20))
-    
-    # Summary stats
-    total_projects = len(projects)
-    total_budget = sum(p.get('budget', 0) for p in projects)
-    total_expenses = sum(p.get('actual_expenses', 0) for p in projects)
-    total_pid_savings = sum(p.get('pid_savings', 0) for p in projects)
-    
-    summary_data = [
-        ['Metric', 'Value'],
-        ['Total Projects', str(total_projects)],
-        ['Total Budget', f'Rs {total_budget:,.2f}'],
-        ['Total Expenses', f'Rs {total_expenses:,.2f}'],
-        ['Total PID Savings', f'Rs {total_pid_savings:,.2f}'],
-    ]
-    
-    summary_table = Table(summary_data, colWidths=[3*inch, 3*inch])
-    summary_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#0F172A')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 12),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black)
-    ]))
-    
-    elements.append(summary_table)
-    elements.append(Spacer(1, 30))
-    
-    # Projects table
-    elements.append(Paragraph("Projects Details", styles['Heading2']))
-    elements.append(Spacer(1, 12))
-    
-    # Prepare project data
-    project_data = [['PID', 'Project', 'Status', 'Completion', 'Budget', 'PID Savings']]
-    
-    for project in projects[:20]:  # Limit to first 20 for PDF
-        project_data.append([
-            str(project.get('pid_no', ''))[:15],
-            str(project.get('project_name', ''))[:30],
-            str(project.get('status', ''))[:15],
-            f"{project.get('completion_percentage', 0)}%",
-            f"Rs {project.get('budget', 0):,.0f}",
-            f"Rs {project.get('pid_savings', 0):,.0f}"
-        ])
-    
-    projects_table = Table(project_data, colWidths=[0.8*inch, 2*inch, 1*inch, 0.8*inch, 1*inch, 1*inch])
-    projects_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#0F172A')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 9),
-        ('FONTSIZE', (0, 1), (-1, -1), 8),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.white),
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey)
-    ]))
-    
-    elements.append(projects_table)
-    
-    if len(projects) > 20:
+        except:
+            pass
+        
+        # Company name
+        company_style = ParagraphStyle(
+            'CompanyName',
+            parent=styles['Normal'],
+            fontSize=10,
+            textColor=colors.HexColor('#0F172A'),
+            spaceAfter=5
+        )
+        elements.append(Paragraph("<b>Enerzia Power Solutions</b>", company_style))
+        elements.append(Spacer(1, 5))
+        
+        # Title
+        title_style = ParagraphStyle(
+            'CustomTitle',
+            parent=styles['Heading1'],
+            fontSize=24,
+            textColor=colors.HexColor('#0F172A'),
+            spaceAfter=20,
+            alignment=TA_CENTER
+        )
+        
+        elements.append(Paragraph("Projects & Services Status Report", title_style))
+        elements.append(Paragraph(f"Generated on: {datetime.now().strftime('%B %d, %Y')}", styles['Normal']))
+        elements.append(Spacer(1, 20))
+        
+        # Summary stats, totalled in the database
+        totals = await db.projects.aggregate([
+            {"$group": {
+                "_id": None,
+                "count": {"$sum": 1},
+                "budget": {"$sum": "$budget"},
+                "expenses": {"$sum": "$actual_expenses"},
+                "pid_savings": {"$sum": "$pid_savings"}
+            }}
+        ]).to_list(1)
+        totals = totals[0] if totals else {"count": 0, "budget": 0, "expenses": 0, "pid_savings": 0}
+        
+        summary_data = [
+            ['Metric', 'Value'],
+            ['Total Projects', str(totals['count'])],
+            ['Total Budget', f"Rs {totals['budget']:,.2f}"],
+            ['Total Expenses', f"Rs {totals['expenses']:,.2f}"],
+            ['Total PID Savings', f"Rs {totals['pid_savings']:,.2f}"],
+        ]
+        
+        summary_table = Table(summary_data, colWidths=[3*inch, 3*inch])
+        summary_table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#0F172A')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 12),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black)
+        ]))
+        
+        elements.append(summary_table)
+        elements.append(Spacer(1, 30))
+        
+        # Projects table
+        elements.append(Paragraph("Projects Details", styles['Heading2']))
         elements.append(Spacer(1, 12))
-        elements.append(Paragraph(f"Note: Showing first 20 of {len(projects)} projects. Export to Excel for complete data.", styles['Italic']))
-    
-    # Build PDF
-    doc.build(elements)
-    buffer.seek(0)
-    
-    return StreamingResponse(
-        buffer,
-        media_type="application/pdf",
-        headers={
-            "Content-Disposition": f"attachment; filename=project_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-        }
+        
+        # Prepare project data
+        header = ['PID', 'Project', 'Status', 'Completion', 'Budget', 'PID Savings']
+        project_rows = []
+        projection = {"_id": 0, "pid_no": 1, "project_name": 1, "status": 1,
+                      "completion_percentage": 1, "budget": 1, "pid_savings": 1}
+        async for batch in iter_batches(db.projects.find({}, projection)):
+            for project in batch:
+                project_rows.append([
+                    str(project.get('pid_no', ''))[:15],
+                    str(project.get('project_name', ''))[:30],
+                    str(project.get('status', ''))[:15],
+                    f"{project.get('completion_percentage', 0)}%",
+                    f"Rs {project.get('budget', 0):,.0f}",
+                    f"Rs {project.get('pid_savings', 0):,.0f}"
+                ])
+        
+        table_style = TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#0F172A')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 9),
+            ('FONTSIZE', (0, 1), (-1, -1), 8),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.white),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey)
+        ])
+        col_widths = [0.8*inch, 2*inch, 1*inch, 0.8*inch, 1*inch, 1*inch]
+        elements.extend(chunked_tables(header, project_rows, col_widths, table_style))
+        
+        # Build PDF
+        await build_pdf(doc, elements)
+        return len(project_rows)
+    
+    filename = f"project_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
+    rows = await db.projects.count_documents({})
+    return await export_file(
+        db, "projects_pdf", filename, "application/pdf", write, rows, async_job, current_user, PDF_EXPORT_ASYNC_THRESHOLD
     )
 
 
 # Custom Reports
+CUSTOM_REPORT_GROUPS = {"status", "category", "client"}
+CUSTOM_REPORT_PROJECT_LIMIT = 1000
+
+
 @api_router.get("/reports/custom")
 async def generate_custom_report(
     report_type: str = "all",  # all, status, category, client, budget
@@ -2293,84 +2328,47 @@ async def generate_custom_report(
     end_date: Optional[str] = None,
     group_by: Optional[str] = None  # week, month, status, category, client
 ):
-    """Generate custom reports with various filters"""
-    query = {}
+    """Generate custom reports with various filters (totals from the projects columnar snapshot)"""
+    frame = await columnar.snapshot_frame(db, "projects")
     
     # Date filtering
-    if start_date or end_date:
-        query['created_at'] = {}
+    try:
         if start_date:
-            query['created_at']['$gte'] = start_date
+            frame = frame[frame["created_at"] >= pd.Timestamp(start_date, tz="UTC")]
         if end_date:
-            query['created_at']['$lte'] = end_date
-    
-    projects = await db.projects.find(query, {"_id": 0}).to_list(1000)
+            frame = frame[frame["created_at"] <= pd.Timestamp(end_date, tz="UTC")]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date. Use YYYY-MM-DD")
     
+    sums = columnar.totals(frame, ["budget", "actual_expenses", "pid_savings", "po_amount", "invoiced_amount"])
     result = {
-        "total_projects": len(projects),
-        "total_budget": sum(p.get('budget', 0) for p in projects),
-        "total_expenses": sum(p.get('actual_expenses', 0) for p in projects),
-        "total_pid_savings": sum(p.get('pid_savings', 0) for p in projects),
-        "total_po_amount": sum(p.get('po_amount', 0) for p in projects),
-        "total_invoiced": sum(p.get('invoiced_amount', 0) for p in projects),
+        "total_projects": len(frame),
+        "total_budget": sums["budget"],
+        "total_expenses": sums["actual_expenses"],
+        "total_pid_savings": sums["pid_savings"],
+        "total_po_amount": sums["po_amount"],
+        "total_invoiced": sums["invoiced_amount"],
         "data": []
     }
     
-    if group_by == "status":
-        # Group by status
-        status_groups = {}
-        for p in projects:
-            status = p.get('status', 'Unknown')
-            if status not in status_groups:
-                status_groups[status] = []
-            status_groups[status].append(p)
-        
-        for status, projs in status_groups.items():
-            result["data"].append({
-                "group": status,
-                "count": len(projs),
-                "budget": sum(p.get('budget', 0) for p in projs),
-                "expenses": sum(p.get('actual_expenses', 0) for p in projs),
-                "pid_savings": sum(p.get('pid_savings', 0) for p in projs),
-                "projects": projs
-            })
-    
-    elif group_by == "category":
-        # Group by category
-        category_groups = {}
-        for p in projects:
-            category = p.get('category', 'Unknown')
-            if category not in category_groups:
-                category_groups[category] = []
-            category_groups[category].append(p)
-        
-        for category, projs in category_groups.items():
-            result["data"].append({
-                "group": category,
-                "count": len(projs),
-                "budget": sum(p.get('budget', 0) for p in projs),
-                "expenses": sum(p.get('actual_expenses', 0) for p in projs),
-                "pid_savings": sum(p.get('pid_savings', 0) for p in projs),
-                "projects": projs
-            })
+    # Full documents only for the projects listed in the response
+    listed = frame.index[:CUSTOM_REPORT_PROJECT_LIMIT].tolist()
+    docs = {p["id"]: p for p in await find_by_ids(db.projects, listed)}
+    projects = [docs[i] for i in listed if i in docs]
     
-    elif group_by == "client":
-        # Group by client
-        client_groups = {}
+    if group_by in CUSTOM_REPORT_GROUPS:
+        groups = columnar.group_sum(frame, group_by, ["budget", "actual_expenses", "pid_savings"])
+        members = {}
         for p in projects:
-            client = p.get('client', 'Unknown')
-            if client not in client_groups:
-                client_groups[client] = []
-            client_groups[client].append(p)
-        
-        for client, projs in client_groups.items():
+            members.setdefault(p.get(group_by), []).append(p)
+        for group, row in groups.items():
             result["data"].append({
-                "group": client,
-                "count": len(projs),
-                "budget": sum(p.get('budget', 0) for p in projs),
-                "expenses": sum(p.get('actual_expenses', 0) for p in projs),
-                "pid_savings": sum(p.get('pid_savings', 0) for p in projs),
-                "projects": projs
+                "group": group if group is not None else "Unknown",
+                "count": row["count"],
+                "budget": row["budget"],
+                "expenses": row["actual_expenses"],
+                "pid_savings": row["pid_savings"],
+                "projects": members.get(group, [])
             })
     
     else:
@@ -2380,14 +2378,21 @@ async def generate_custom_report(
     return result
 
 
+async def get_billing_category_totals() -> dict:
+    """This-week billing summed per category across all projects, from the projects snapshot"""
+    totals = {'PSS': 0, 'AS': 0, 'OSS': 0, 'CS': 0}
+    groups = columnar.group_sum(await columnar.snapshot_frame(db, "projects"), "category", ["this_week_billing"])
+    for category in totals:
+        if category in groups:
+            totals[category] = groups[category]["this_week_billing"]
+    return totals
+
+
 # Weekly Billing Summary
-@api_router.get("/billing/weekly", response_model=List[WeeklyBilling])
-async def get_weekly_billing():
-    """Get weekly billing breakdown based on calendar weeks (Monday to Sunday)"""
+def build_weekly_billing(category_totals: dict) -> List[dict]:
+    """Weekly billing breakdown based on calendar weeks (Monday to Sunday)"""
     from datetime import datetime, timedelta
     
-    projects = await db.projects.find({}, {"_id": 0}).to_list(1000)
-    
     # Helper function to get week label (e.g., "Dec'25 Wk-1")
     def get_week_label(date):
         # Get the Monday of the week
@@ -2435,14 +2440,6 @@ async def get_weekly_billing():
     weeks = get_last_n_weeks(8)
     billing_data = []
     
-    # Calculate total billing per category for distribution
-    category_totals = {
-        'PSS': sum(p.get('this_week_billing', 0) for p in projects if p.get('category') == 'PSS'),
-        'AS': sum(p.get('this_week_billing', 0) for p in projects if p.get('category') == 'AS'),
-        'OSS': sum(p.get('this_week_billing', 0) for p in projects if p.get('category') == 'OSS'),
-        'CS': sum(p.get('this_week_billing', 0) for p in projects if p.get('category') == 'CS'),
-    }
-    
     # Distribute billing across weeks with some variation
     import random
     random.seed(42)  # For consistent results
@@ -2478,16 +2475,13 @@ async def get_weekly_billing():
         
         billing_data.append(week_billing)
     
-    return billing_data
+    return [week_billing.model_dump(by_alias=True) for week_billing in billing_data]
 
 
-@api_router.get("/billing/cumulative")
-async def get_cumulative_billing():
-    """Get cumulative billing trend based on calendar weeks"""
+def build_cumulative_billing(category_totals: dict) -> List[dict]:
+    """Cumulative billing trend based on calendar weeks"""
     from datetime import datetime, timedelta
     
-    projects = await db.projects.find({}, {"_id": 0}).to_list(1000)
-    
     # Helper function to get week label
     def get_week_label(date):
         monday = date - timedelta(days=date.weekday())
@@ -2515,14 +2509,6 @@ async def get_cumulative_billing():
     
     weeks = get_last_n_weeks(8)
     
-    # Calculate totals
-    category_totals = {
-        'PSS': sum(p.get('this_week_billing', 0) for p in projects if p.get('category') == 'PSS'),
-        'AS': sum(p.get('this_week_billing', 0) for p in projects if p.get('category') == 'AS'),
-        'OSS': sum(p.get('this_week_billing', 0) for p in projects if p.get('category') == 'OSS'),
-        'CS': sum(p.get('this_week_billing', 0) for p in projects if p.get('category') == 'CS'),
-    }
-    
     import random
     random.seed(42)
     
@@ -2555,6 +2541,41 @@ async def get_cumulative_billing():
     return cumulative_data
 
 
+BILLING_ROLLUP_VIEW = "billing.weekly_rollup"
+BILLING_ROLLUP_MINUTES = 15
+
+
+async def compute_billing_rollup() -> dict:
+    category_totals = await get_billing_category_totals()
+    return {
+        "weekly": build_weekly_billing(category_totals),
+        "cumulative": build_cumulative_billing(category_totals),
+    }
+
+
+@scheduled_job(BILLING_ROLLUP_VIEW, f"*/{BILLING_ROLLUP_MINUTES} * * * *", "Weekly and cumulative billing series")
+async def precompute_billing_rollup():
+    data = await compute_billing_rollup()
+    await store_view(db, BILLING_ROLLUP_VIEW, data, time_bucket(BILLING_ROLLUP_MINUTES))
+    return {"weeks": len(data["weekly"])}
+
+
+async def get_billing_rollup() -> dict:
+    return await cached_view(db, BILLING_ROLLUP_VIEW, time_bucket(BILLING_ROLLUP_MINUTES), compute_billing_rollup)
+
+
+@api_router.get("/billing/weekly", response_model=List[WeeklyBilling])
+async def get_weekly_billing():
+    """Get weekly billing breakdown based on calendar weeks (precomputed every 15 minutes)"""
+    return (await get_billing_rollup())["weekly"]
+
+
+@api_router.get("/billing/cumulative")
+async def get_cumulative_billing():
+    """Get cumulative billing trend based on calendar weeks (precomputed every 15 minutes)"""
+    return (await get_billing_rollup())["cumulative"]
+
+
 # ==================== PROJECT REQUIREMENTS ====================
 
 @api_router.get("/project-requirements")
@@ -2844,6 +2865,7 @@ async def create_work_completion_certificate(data: WorkCompletionCreate):
         ]
     
     await db.work_completion_certificates.insert_one(doc)
+    await add_project_document(db, "wcc", doc)
     
     # Remove MongoDB _id for response
     doc.pop('_id', None)
@@ -2885,6 +2907,7 @@ async def delete_work_completion_certificate(certificate_id: str):
     result = await db.work_completion_certificates.delete_one({"id": certificate_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Certificate not found")
+    await remove_document(db, "wcc", certificate_id)
     return {"message": "Certificate deleted successfully"}
 
 
@@ -3662,6 +3685,11 @@ from routes.hr_payslip_pdf import router as hr_payslip_pdf_router
 from routes.project_orders import router as project_orders_router
 from routes.user_access import router as user_access_router
 from routes.lead_management import router as lead_management_router
+from routes.search import router as search_router
+from routes.performance import router as performance_router, metrics_router
+from routes.export_jobs import router as export_jobs_router
+from routes.due_items import router as due_items_router
+from routes.scheduler import router as scheduler_router
 
 # The modular routers will handle their routes
 app.include_router(projects_router_v2, prefix="/api", tags=["Projects-V2"])
@@ -3711,6 +3739,12 @@ app.include_router(hr_payslip_pdf_router, tags=["HR-Payslip-PDF"])
 app.include_router(project_orders_router, tags=["Project-Orders-Integration"])
 app.include_router(user_access_router, tags=["User-Access-Control"])
 app.include_router(lead_management_router, tags=["Lead-Management"])
+app.include_router(search_router, tags=["Search"])
+app.include_router(performance_router)
+app.include_router(metrics_router)
+app.include_router(export_jobs_router)
+app.include_router(due_items_router)
+app.include_router(scheduler_router)
 
 # Include the main router with remaining routes
 app.include_router(api_router)
@@ -3726,8 +3760,15 @@ app.add_middleware(
     allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
+# ETags, 304s and gzip/brotli for JSON and text responses
+app.add_middleware(CompressionMiddleware)
+
+# Outermost: per-request timing, Mongo command and cache accounting
+app.add_middleware(PerformanceMiddleware)
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -3739,13 +3780,51 @@ logger = logging.getLogger(__name__)
 @app.on_event("startup")
 async def startup_db_client():
     """Initialize database indexes and cache on startup"""
+    asyncio.create_task(monitor_event_loop())
+    loop_watchdog.start(app)
+    
     try:
-        from utils.database import create_indexes
         await create_indexes(db)
         logger.info("Database indexes initialized successfully")
     except Exception as e:
         logger.error(f"Error initializing database indexes: {e}")
     
+    # Build the search index in the background on first start
+    from utils.search import initialize_search_index
+    asyncio.create_task(initialize_search_index(db))
+    
+    # Resolve customer identities and backfill customer_id on first start
+    from utils.customer_identity import initialize_customer_identity
+    asyncio.create_task(initialize_customer_identity(db))
+
+    # Build the per-order financial ledger on first start
+    from utils.order_ledger import initialize_order_ledger
+    asyncio.create_task(initialize_order_ledger(db))
+
+    # Build the inspection / calibration / AMC visit due-date index on first start
+    from utils.due_items import initialize_due_items
+    asyncio.create_task(initialize_due_items(db))
+
+    # Build per-customer enquiry metrics behind the targeting segments on first start
+    from utils.customer_metrics import initialize_customer_metrics
+    asyncio.create_task(initialize_customer_metrics(db))
+
+    # Build the sales pipeline cube behind the sales dashboards on first start
+    from utils.sales_cube import initialize_sales_cube
+    asyncio.create_task(initialize_sales_cube(db))
+
+    # Precomputation and housekeeping jobs (one worker runs each occurrence)
+    scheduler.start(db)
+
+    # Cache, snapshot, view and rollup invalidation for every write to the watched collections
+    change_feed.start(db)
+
+    try:
+        from utils.customer_documents import ensure_customer_document_indexes
+        await ensure_customer_document_indexes(db)
+    except Exception as e:
+        logger.error(f"Error initializing customer document index: {e}")
+    
     # Initialize cache
     try:
         from utils.cache import cache
@@ -3757,4 +3836,7 @@ async def startup_db_client():
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    loop_watchdog.stop()
+    await scheduler.stop()
+    await change_feed.stop()
     client.close()
@@ -0,0 +1,158 @@
+"""
+Bulk Approval API Tests
+- /api/employee/requests/bulk-action moves many pending requests in one update
+- Already-processed and unknown ids come back as per-id failures
+- Invalid actions are rejected before anything is written
+- Overtime, expense sheet and trip bulk endpoints share the same outcomes
+- Overlapping expense bulk approvals report every expense approved exactly once
+"""
+
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import pytest
+import requests
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+
+class TestBulkApprovals:
+    """Batched state transitions with per-id outcomes"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        """Setup - get auth token"""
+        self.session = requests.Session()
+        login_response = self.session.post(f"{BASE_URL}/api/auth/login", json={
+            "email": "admin@enerzia.com",
+            "password": "admin123"
+        })
+        assert login_response.status_code == 200, f"Login failed: {login_response.text}"
+        token = login_response.json().get("token")
+        self.session.headers.update({"Authorization": f"Bearer {token}"})
+
+    def _create_leave_requests(self, count):
+        ids = []
+        user_id = f"test_user_{uuid.uuid4().hex[:8]}"
+        for i in range(count):
+            day = (datetime.now() + timedelta(days=30 + i)).strftime("%Y-%m-%d")
+            response = self.session.post(
+                f"{BASE_URL}/api/employee/leave",
+                params={"user_id": user_id, "user_name": "TEST_bulk", "department": "Projects"},
+                json={"type": "Casual Leave", "from_date": day, "to_date": day, "reason": "TEST_bulk approval"}
+            )
+            assert response.status_code == 200, response.text
+            ids.append(response.json()["request"]["id"])
+        return ids
+
+    def test_bulk_approve_leave(self):
+        """Every pending request is approved in one call"""
+        ids = self._create_leave_requests(3)
+        response = self.session.post(f"{BASE_URL}/api/employee/requests/bulk-action", json={
+            "request_type": "leave",
+            "action": "approve",
+            "ids": ids,
+            "approved_by": "TEST_bulk"
+        })
+        assert response.status_code == 200, response.text
+        data = response.json()
+        assert data["updated_count"] == 3
+        assert sorted(data["updated"]) == sorted(ids)
+        assert data["failed"] == []
+        print(f"✓ Bulk approved {data['updated_count']} leave requests")
+
+    def test_processed_and_unknown_ids_fail(self):
+        """A second pass and unknown ids report failures instead of rewriting"""
+        ids = self._create_leave_requests(2)
+        payload = {"request_type": "leave", "action": "reject", "ids": ids, "approved_by": "TEST_bulk"}
+        first = self.session.post(f"{BASE_URL}/api/employee/requests/bulk-action", json=payload)
+        assert first.status_code == 200
+        assert first.json()["updated_count"] == 2
+
+        payload["action"] = "approve"
+        payload["ids"] = ids + ["does-not-exist"]
+        second = self.session.post(f"{BASE_URL}/api/employee/requests/bulk-action", json=payload)
+        assert second.status_code == 200
+        data = second.json()
+        assert data["updated_count"] == 0
+        errors = {f["id"]: f["error"] for f in data["failed"]}
+        assert errors == {ids[0]: "invalid_state", ids[1]: "invalid_state", "does-not-exist": "not_found"}
+        print("✓ Processed and unknown ids reported per id")
+
+    def test_invalid_action(self):
+        """Unknown actions and request types return 400"""
+        response = self.session.post(f"{BASE_URL}/api/employee/requests/bulk-action", json={
+            "request_type": "leave", "action": "pay", "ids": ["x"], "approved_by": "TEST_bulk"
+        })
+        assert response.status_code == 400
+        response = self.session.post(f"{BASE_URL}/api/employee/requests/bulk-action", json={
+            "request_type": "holiday", "action": "approve", "ids": ["x"], "approved_by": "TEST_bulk"
+        })
+        assert response.status_code == 400
+        print("✓ Invalid bulk actions rejected")
+
+    def test_other_bulk_endpoints(self):
+        """Overtime, expense sheet and trip bulk endpoints report unknown ids"""
+        missing = "0" * 24
+        overtime = self.session.post(f"{BASE_URL}/api/hr/overtime/bulk-action", json={
+            "overtime_ids": [missing], "action": "approve"
+        })
+        assert overtime.status_code == 200, overtime.text
+        assert overtime.json()["failed"][0]["error"] == "not_found"
+
+        sheets = self.session.post(f"{BASE_URL}/api/finance/expense-sheets/bulk-action", json={
+            "sheet_ids": [missing], "action": "verify", "by": "TEST_bulk"
+        })
+        assert sheets.status_code == 200, sheets.text
+        assert sheets.json()["failed"][0]["error"] == "not_found"
+
+        trips = self.session.put(
+            f"{BASE_URL}/api/travel-log/bulk-approve", params={"approved_by": "TEST_bulk"}, json=[missing]
+        )
+        assert trips.status_code == 200, trips.text
+        assert trips.json()["updated_count"] == 0
+        print("✓ Overtime, expense sheet and trip bulk endpoints respond")
+
+    def _create_submitted_expenses(self, count):
+        orders = self.session.get(f"{BASE_URL}/api/order-lifecycle/orders").json().get("orders", [])
+        if not orders:
+            pytest.skip("No sales orders available for testing")
+        ids = []
+        for i in range(count):
+            response = self.session.post(f"{BASE_URL}/api/expense-management/expenses", json={
+                "order_id": orders[0]["id"],
+                "category": "misc",
+                "description": f"TEST_bulk concurrent approval {i + 1}",
+                "amount": 100.0,
+                "date": datetime.now().strftime("%Y-%m-%d"),
+                "created_by": "TEST_bulk"
+            })
+            assert response.status_code == 200, response.text
+            expense_id = response.json()["expense"]["id"]
+            ids.append(expense_id)
+            self.session.put(f"{BASE_URL}/api/expense-management/expenses/{expense_id}/submit?submitted_by=TEST_bulk")
+        return ids
+
+    def test_overlapping_expense_approvals(self):
+        """Concurrent bulk approvals sharing an expense still report their own approvals"""
+        ids = self._create_submitted_expenses(6)
+        batches = [ids[:4], ids[2:]]
+        try:
+            with ThreadPoolExecutor(max_workers=2) as pool:
+                responses = list(pool.map(
+                    lambda batch: self.session.post(f"{BASE_URL}/api/expense-management/bulk-approve", json={
+                        "expense_ids": batch, "approved_by": "TEST_bulk"
+                    }),
+                    batches
+                ))
+            approved = []
+            for response in responses:
+                assert response.status_code == 200, response.text
+                approved += response.json()["approved"]
+            assert sorted(approved) == sorted(ids)
+            print("✓ Every expense reported approved by exactly one request")
+        finally:
+            for expense_id in ids:
+                self.session.delete(f"{BASE_URL}/api/expense-management/expenses/{expense_id}")
@@ -0,0 +1,175 @@
+"""
+Bulk Excel Import API Tests
+- Accounts invoice import (dry run and real import)
+- Per-row error reporting for invalid numeric cells
+- Sales enquiry bulk upload dry run
+- Non-numeric enquiry values are stored as empty
+"""
+
+import io
+import os
+import uuid
+
+import pytest
+import requests
+from openpyxl import Workbook
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+
+def _workbook_bytes(rows):
+    wb = Workbook()
+    ws = wb.active
+    for row in rows:
+        ws.append(row)
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    return buffer.getvalue()
+
+
+def _xlsx(content):
+    return {"file": ("import.xlsx", content, "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")}
+
+
+class TestBulkImport:
+    """Bulk import framework tests"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        """Setup - get auth token"""
+        self.session = requests.Session()
+        login_response = self.session.post(f"{BASE_URL}/api/auth/login", json={
+            "email": "admin@enerzia.com",
+            "password": "admin123"
+        })
+        assert login_response.status_code == 200, f"Login failed: {login_response.text}"
+        token = login_response.json().get("token")
+        self.session.headers.update({"Authorization": f"Bearer {token}"})
+        self.marker = f"TEST_BULK_{uuid.uuid4().hex[:6]}"
+        self.invoice_rows = [["Invoice No", "Customer Name", "Date", "Basic", "Total"]] + [
+            [f"{self.marker}-{i}", "Bulk Test Customer", "01/04/2025", 1000, 1180] for i in range(50)
+        ]
+
+    def test_invoice_import_dry_run_writes_nothing(self):
+        """Test POST /api/accounts/import/invoices?dry_run=true validates without inserting"""
+        response = self.session.post(
+            f"{BASE_URL}/api/accounts/import/invoices",
+            params={"dry_run": "true"},
+            files=_xlsx(_workbook_bytes(self.invoice_rows))
+        )
+        assert response.status_code == 200, f"Failed: {response.text}"
+        data = response.json()
+        assert data["dry_run"] is True
+        assert data["valid"] == 50
+        assert data["imported"] == 0
+
+        invoices = self.session.get(f"{BASE_URL}/api/accounts/invoices").json()
+        assert not any(inv["invoice_no"].startswith(self.marker) for inv in invoices)
+        print("✓ Dry run validated 50 rows without writing")
+
+    def test_invoice_import_reports_bad_rows(self):
+        """Test invalid numeric cells are reported per row and the rest are imported"""
+        rows = list(self.invoice_rows)
+        rows[3] = [f"{self.marker}-bad", "Bulk Test Customer", "01/04/2025", "not-a-number", 1180]
+        response = self.session.post(
+            f"{BASE_URL}/api/accounts/import/invoices",
+            files=_xlsx(_workbook_bytes(rows))
+        )
+        assert response.status_code == 200, f"Failed: {response.text}"
+        data = response.json()
+        assert data["imported"] == 49
+        assert data["errors"] and data["errors"][0].startswith("Row 4:")
+
+        # Cleanup
+        invoices = self.session.get(f"{BASE_URL}/api/accounts/invoices").json()
+        for inv in invoices:
+            if inv["invoice_no"].startswith(self.marker):
+                self.session.delete(f"{BASE_URL}/api/accounts/invoices/{inv['id']}")
+        print("✓ Bad row reported, remaining rows imported")
+
+    def test_enquiry_bulk_upload_dry_run(self):
+        """Test POST /api/sales/enquiries/bulk/upload?dry_run=true flags missing required fields"""
+        rows = [
+            ["Date", "Target Date", "Company Name", "Location", "Description"],
+            ["2025-04-01", None, f"{self.marker} Ltd", "Chennai", "Panel upgrade"],
+            ["2025-04-02", None, None, "Chennai", "Missing company"],
+        ]
+        response = self.session.post(
+            f"{BASE_URL}/api/sales/enquiries/bulk/upload",
+            params={"dry_run": "true"},
+            files=_xlsx(_workbook_bytes(rows))
+        )
+        assert response.status_code == 200, f"Failed: {response.text}"
+        data = response.json()
+        assert data["valid"] == 1
+        assert data["imported"] == 0
+        assert data["errors"] == ["Row 3: Company Name and Description are required"]
+        print("✓ Enquiry dry run reported missing required fields")
+
+    def test_enquiry_bulk_upload_non_numeric_value(self):
+        """Test a value cell such as 'TBD' is stored as None instead of the raw text"""
+        rows = [
+            ["Date", "Target Date", "Company Name", "Location", "Description", "Value"],
+            ["2025-04-01", None, f"{self.marker} Ltd", "Chennai", "Panel upgrade", "TBD"],
+        ]
+        response = self.session.post(
+            f"{BASE_URL}/api/sales/enquiries/bulk/upload",
+            files=_xlsx(_workbook_bytes(rows))
+        )
+        assert response.status_code == 200, f"Failed: {response.text}"
+        assert response.json()["imported"] == 1
+
+        enquiries = self.session.get(
+            f"{BASE_URL}/api/sales/enquiries", params={"search": self.marker}
+        ).json()["enquiries"]
+        try:
+            assert len(enquiries) == 1
+            assert enquiries[0]["value"] is None
+            print("✓ Non-numeric enquiry value stored as None")
+        finally:
+            for enquiry in enquiries:
+                self.session.delete(f"{BASE_URL}/api/sales/enquiries/{enquiry['id']}")
+
+    def test_project_import_dry_run_reports_diff(self):
+        """Test POST /api/projects/import/excel?dry_run=true returns the keyed diff without writing"""
+        projects_before = self.session.get(f"{BASE_URL}/api/projects").json()
+        rows = [
+            ["PID No", "Project Name", "Client"],
+            [f"{self.marker}/NEW", "Bulk Sync Test", "Bulk Test Customer"],
+        ]
+        response = self.session.post(
+            f"{BASE_URL}/api/projects/import/excel",
+            params={"dry_run": "true"},
+            files=_xlsx(_workbook_bytes(rows))
+        )
+        assert response.status_code == 200, f"Failed: {response.text}"
+        data = response.json()
+        assert data["dry_run"] is True
+        assert data["changes"]["inserted"] == [f"{self.marker}/NEW"]
+        assert data["deleted"] == len(data["changes"]["deleted"])
+
+        projects_after = self.session.get(f"{BASE_URL}/api/projects").json()
+        assert len(projects_after) == len(projects_before)
+        print(f"✓ Project sync dry run: {data['message']}")
+
+    def test_project_import_keeps_invalid_rows(self):
+        """Test an existing project whose sheet row fails validation is not deleted by the sync"""
+        projects = self.session.get(f"{BASE_URL}/api/projects").json()
+        ongoing = [p for p in projects if p.get("status") != "Completed" and p.get("pid_no")]
+        if not ongoing:
+            pytest.skip("No ongoing projects")
+        pid_no = ongoing[0]["pid_no"]
+        rows = [
+            ["PID No", "Project Name", "Budget"],
+            [pid_no, ongoing[0].get("project_name") or "Bulk Sync Test", "not a number"],
+        ]
+        response = self.session.post(
+            f"{BASE_URL}/api/projects/import/excel",
+            params={"dry_run": "true"},
+            files=_xlsx(_workbook_bytes(rows))
+        )
+        assert response.status_code == 200, f"Failed: {response.text}"
+        data = response.json()
+        assert data["errors"], "Expected the budget cell to fail validation"
+        assert pid_no not in data["changes"]["deleted"]
+        print(f"✓ Invalid row for {pid_no} kept out of the delete set")
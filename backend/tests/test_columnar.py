@@ -0,0 +1,98 @@
+"""
+Columnar Snapshot API Tests
+- Custom report totals and groups agree with each other and with the weekly meeting billing summary
+- A project update is reflected in the report on the next read
+- Monthly finance trends keep their shape
+- /api/admin/performance/analytics-snapshots reports rows and memory and requires admin
+"""
+
+import os
+
+import pytest
+import requests
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+SNAPSHOTS = {"projects", "sales_orders", "purchase_orders_v2", "expenses_v2", "hr_payroll"}
+
+
+class TestColumnarSnapshots:
+    """In-memory analytics over columnar snapshots"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        """Setup - get auth token"""
+        self.session = requests.Session()
+        login_response = self.session.post(f"{BASE_URL}/api/auth/login", json={
+            "email": "admin@enerzia.com",
+            "password": "admin123"
+        })
+        assert login_response.status_code == 200, f"Login failed: {login_response.text}"
+        token = login_response.json().get("token")
+        self.session.headers.update({"Authorization": f"Bearer {token}"})
+
+    def _report(self, **params):
+        response = self.session.get(f"{BASE_URL}/api/reports/custom", params=params)
+        assert response.status_code == 200, response.text
+        return response.json()
+
+    def test_report_groups_add_up(self):
+        """Group counts and budgets sum to the report totals"""
+        for group_by in ["status", "category", "client"]:
+            report = self._report(group_by=group_by)
+            assert sum(g["count"] for g in report["data"]) == report["total_projects"]
+            assert sum(g["budget"] for g in report["data"]) == pytest.approx(report["total_budget"])
+        print(f"✓ {report['total_projects']} projects grouped by status, category and client")
+
+    def test_weekly_summary_matches_report(self):
+        """The weekly meeting billing summary and the custom report read the same snapshot"""
+        report = self._report()
+        summary = self.session.get(f"{BASE_URL}/api/weekly-meetings/summary/current").json()
+        billing = summary["billing_summary"]
+        assert billing["total_po_amount"] == pytest.approx(report["total_po_amount"])
+        assert billing["total_invoiced"] == pytest.approx(report["total_invoiced"])
+        assert sum(c["po_amount"] for c in summary["category_billing"].values()) == pytest.approx(billing["total_po_amount"])
+        print("✓ Weekly meeting billing matches the custom report")
+
+    def test_invalid_date(self):
+        """Unparseable dates are rejected"""
+        response = self.session.get(f"{BASE_URL}/api/reports/custom", params={"start_date": "last week"})
+        assert response.status_code == 400
+        print("✓ Invalid report date rejected")
+
+    def test_project_update_visible(self):
+        """Updating a project moves the report totals immediately"""
+        projects = self._report()["data"]
+        if not projects:
+            pytest.skip("No projects")
+        project = projects[0]
+        before = self._report()["total_pid_savings"]
+        savings = project.get("pid_savings") or 0
+        response = self.session.put(f"{BASE_URL}/api/projects/{project['id']}", json={"pid_savings": savings + 100})
+        assert response.status_code == 200, response.text
+        try:
+            assert self._report()["total_pid_savings"] == pytest.approx(before + 100)
+        finally:
+            self.session.put(f"{BASE_URL}/api/projects/{project['id']}", json={"pid_savings": savings})
+        print("✓ Project update reflected in the snapshot")
+
+    def test_monthly_trends(self):
+        """Monthly trends come back one row per month"""
+        response = self.session.get(f"{BASE_URL}/api/finance-dashboard/monthly-trends", params={"months": 6})
+        assert response.status_code == 200
+        trends = response.json()["trends"]
+        assert len(trends) == 6
+        for row in trends:
+            assert row["total_cost"] == pytest.approx(row["purchase"] + row["expenses"])
+        print("✓ Monthly trends bucketed")
+
+    def test_snapshot_report(self):
+        """Snapshot sizes are reported to admins"""
+        assert requests.get(f"{BASE_URL}/api/admin/performance/analytics-snapshots").status_code in [401, 403]
+
+        self._report()
+        response = self.session.get(f"{BASE_URL}/api/admin/performance/analytics-snapshots")
+        assert response.status_code == 200
+        data = response.json()
+        assert {s["collection"] for s in data["snapshots"]} == SNAPSHOTS
+        assert data["memory_bytes"] == sum(s["memory_bytes"] for s in data["snapshots"])
+        print(f"✓ Snapshots use {data['memory_bytes']} bytes in this worker")
@@ -182,7 +182,27 @@ class TestCustomerPortalReports:
             )
             assert response.status_code == 200, f"Expected 200 for {report_type}, got {response.status_code}"
             print(f"✓ Reports filter by {report_type} works")
-    
+
+    def test_reports_pagination(self):
+        """Test reports are paginated from the document index"""
+        response = requests.get(
+            f"{BASE_URL}/api/customer-portal/reports",
+            params={"token": self.token, "skip": 0, "limit": 1}
+        )
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}: {response.text}"
+        data = response.json()
+        assert len(data["reports"]) <= 1
+        assert data["total"] >= len(data["reports"])
+        print(f"✓ Reports page of 1 out of {data['total']}")
+
+    def test_reports_unknown_type_rejected(self):
+        """Test an unknown report_type is rejected"""
+        response = requests.get(
+            f"{BASE_URL}/api/customer-portal/reports",
+            params={"token": self.token, "report_type": "invoice"}
+        )
+        assert response.status_code == 400
+
     def test_reports_without_token(self):
         """Test reports endpoint without authentication"""
         response = requests.get(f"{BASE_URL}/api/customer-portal/reports")
@@ -217,6 +237,30 @@ class TestCustomerPortalRegistration:
         print(f"✓ New customer registered: {unique_email}")
 
 
+class TestCustomerPortalAdmin:
+    """Customer Portal Admin Endpoint Tests"""
+    
+    def test_rebuild_document_index_without_token(self):
+        """Test the document index rebuild requires an admin login"""
+        response = requests.post(f"{BASE_URL}/api/customer-portal/admin/rebuild-document-index")
+        assert response.status_code in [401, 403], f"Expected 401 or 403, got {response.status_code}"
+        print("✓ Document index rebuild correctly requires authentication")
+    
+    def test_rebuild_document_index_as_admin(self):
+        """Test an admin can rebuild the document index"""
+        session = requests.Session()
+        login_response = session.post(f"{BASE_URL}/api/auth/login", json={
+            "email": "admin@enerzia.com",
+            "password": "admin123"
+        })
+        assert login_response.status_code == 200, f"Login failed: {login_response.text}"
+        session.headers.update({"Authorization": f"Bearer {login_response.json().get('token')}"})
+        response = session.post(f"{BASE_URL}/api/customer-portal/admin/rebuild-document-index")
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}: {response.text}"
+        assert "customers" in response.json()
+        print(f"✓ Document index rebuilt for {response.json()['customers']} customers")
+
+
 class TestDashboardAPIs:
     """Main Dashboard API Tests (for chart data)"""
     
@@ -0,0 +1,117 @@
+"""
+Due Items API Tests
+- /api/due-items lists inspections, meter calibrations and AMC visits by due date
+- Completing an inspection schedules the next occurrence and moves its due item
+- The inspection dashboard and calibration due-meters read the due_items index
+- /api/due-items/rebuild requires admin
+"""
+
+import os
+from datetime import datetime, timedelta
+
+import pytest
+import requests
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+
+class TestDueItems:
+    """Due-date index across inspections, calibration and AMC"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        """Setup - get auth token"""
+        self.session = requests.Session()
+        login_response = self.session.post(f"{BASE_URL}/api/auth/login", json={
+            "email": "admin@enerzia.com",
+            "password": "admin123"
+        })
+        assert login_response.status_code == 200, f"Login failed: {login_response.text}"
+        token = login_response.json().get("token")
+        self.session.headers.update({"Authorization": f"Bearer {token}"})
+
+    def _due_ids(self, days, kinds):
+        response = self.session.get(f"{BASE_URL}/api/due-items", params={"days": days, "kinds": kinds, "limit": 500})
+        assert response.status_code == 200, response.text
+        return response.json()
+
+    def test_horizon_sorted(self):
+        """Items come back soonest first with days remaining inside the horizon"""
+        data = self._due_ids(60, "inspection,calibration,amc_visit")
+        dates = [item["due_on"] for item in data["items"]]
+        assert dates == sorted(dates)
+        assert all(item["days_remaining"] <= 60 for item in data["items"])
+        print(f"✓ {data['total']} items due in the next 60 days")
+
+    def test_unknown_kind(self):
+        """Unknown kinds are rejected"""
+        response = self.session.get(f"{BASE_URL}/api/due-items", params={"kinds": "warranty"})
+        assert response.status_code == 400
+        print("✓ Unknown due item kind rejected")
+
+    def test_inspection_lifecycle(self):
+        """Create, complete and delete keep the inspection's due item in step"""
+        due = (datetime.now() + timedelta(days=2)).strftime("%Y-%m-%d")
+        created = self.session.post(f"{BASE_URL}/api/scheduled-inspections", json={
+            "title": "TEST_due inspection",
+            "location": "TEST site",
+            "inspection_type": "equipment",
+            "frequency": "monthly",
+            "next_due_date": due,
+        })
+        assert created.status_code == 200, created.text
+        inspection_id = created.json()["id"]
+
+        items = self._due_ids(7, "inspection")["items"]
+        assert any(i["source_id"] == inspection_id and i["due_on"] == due for i in items)
+
+        completed = self.session.put(
+            f"{BASE_URL}/api/scheduled-inspections/{inspection_id}/complete", json={"completion_date": due}
+        )
+        assert completed.status_code == 200, completed.text
+        next_inspection = completed.json()["next_inspection"]
+        assert next_inspection["status"] == "active"
+
+        items = self._due_ids(90, "inspection")["items"]
+        source_ids = {i["source_id"] for i in items}
+        assert inspection_id not in source_ids
+        assert next_inspection["id"] in source_ids
+
+        self.session.delete(f"{BASE_URL}/api/scheduled-inspections/{next_inspection['id']}")
+        items = self._due_ids(90, "inspection")["items"]
+        assert next_inspection["id"] not in {i["source_id"] for i in items}
+        print(f"✓ Next inspection due {next_inspection['next_due_date']}")
+
+    def test_dashboards(self):
+        """Inspection dashboard and summary return consistent counts"""
+        response = self.session.get(f"{BASE_URL}/api/scheduled-inspections/dashboard")
+        assert response.status_code == 200
+        data = response.json()
+        for key in ["total_active", "overdue", "due_today", "this_week", "this_month", "paused"]:
+            assert key in data
+        assert data["due_today"] <= data["this_week"] <= data["this_month"]
+
+        summary = self.session.get(f"{BASE_URL}/api/due-items/summary", params={"kind": "inspection"})
+        assert summary.status_code == 200
+        assert summary.json()["open"] == data["total_active"]
+        print(f"✓ Dashboard: {data['overdue']} overdue, {data['this_week']} this week")
+
+    def test_calibration_due_meters(self):
+        """Due meters come from the index, one row per meter"""
+        contracts = self.session.get(f"{BASE_URL}/api/calibration", params={"limit": 5}).json()["contracts"]
+        if not contracts:
+            pytest.skip("No calibration contracts available")
+        response = self.session.get(
+            f"{BASE_URL}/api/calibration/{contracts[0]['id']}/due-meters", params={"days_ahead": 365}
+        )
+        assert response.status_code == 200
+        meters = response.json()["due_meters"]
+        meter_ids = [m["meter_id"] for m in meters if m["meter_id"]]
+        assert len(set(meter_ids)) == len(meter_ids)
+        print(f"✓ {len(meters)} meters due within a year")
+
+    def test_rebuild_requires_admin(self):
+        """Anonymous callers cannot rebuild the index"""
+        response = requests.post(f"{BASE_URL}/api/due-items/rebuild")
+        assert response.status_code in [401, 403]
+        print("✓ Due items rebuild requires admin")
@@ -0,0 +1,109 @@
+"""
+Order Ledger API Tests
+- Finance profitability, savings and order-expense views read order_ledger rows
+- Approving an expense updates the order's ledger row on write
+- /api/finance-dashboard/ledger/reconcile reports drift and requires admin
+"""
+
+import os
+import uuid
+
+import pytest
+import requests
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+
+class TestOrderLedger:
+    """Ledger-backed finance views and reconciliation"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        """Setup - get auth token"""
+        self.session = requests.Session()
+        login_response = self.session.post(f"{BASE_URL}/api/auth/login", json={
+            "email": "admin@enerzia.com",
+            "password": "admin123"
+        })
+        assert login_response.status_code == 200, f"Login failed: {login_response.text}"
+        token = login_response.json().get("token")
+        self.session.headers.update({"Authorization": f"Bearer {token}"})
+
+    def test_order_profitability(self):
+        """Profitability rows keep their fields and consistent totals"""
+        response = self.session.get(f"{BASE_URL}/api/finance-dashboard/order-profitability", params={"limit": 20})
+        assert response.status_code == 200
+        data = response.json()
+        for order in data["orders"]:
+            assert order["total_cost"] == pytest.approx(order["purchase_cost"] + order["execution_expenses"], abs=0.05)
+            assert order["actual_profit"] == pytest.approx(order["order_value"] - order["total_cost"], abs=0.05)
+        print(f"✓ Order profitability returned {len(data['orders'])} orders")
+
+    def test_savings_views(self):
+        """Savings views are served from the ledger"""
+        for path in ["/api/finance-dashboard/savings-analysis", "/api/purchase-module/dashboard/savings",
+                     "/api/order-lifecycle/dashboard/savings-report"]:
+            response = self.session.get(f"{BASE_URL}{path}")
+            assert response.status_code == 200, f"{path}: {response.text}"
+        print("✓ Savings views respond")
+
+    def test_order_expenses_dashboard(self):
+        """Order expense summary is sorted by approved total"""
+        response = self.session.get(f"{BASE_URL}/api/expense-management/dashboard/order-expenses")
+        assert response.status_code == 200
+        totals = [o["total_expenses"] for o in response.json()["orders"]]
+        assert totals == sorted(totals, reverse=True)
+        print(f"✓ Order expense summary covers {len(totals)} orders")
+
+    def test_expense_approval_updates_ledger(self):
+        """An approved expense shows up in the order's financials immediately"""
+        orders = self.session.get(f"{BASE_URL}/api/sales/orders").json()
+        orders = orders.get("orders", orders) if isinstance(orders, dict) else orders
+        if not orders:
+            pytest.skip("No sales orders available")
+        order_id = orders[0]["id"]
+
+        def execution_expenses():
+            response = self.session.get(f"{BASE_URL}/api/order-lifecycle/orders/{order_id}")
+            assert response.status_code == 200
+            return response.json()["financials"]["execution_actual"]
+
+        before_total = execution_expenses()
+
+        amount = 123.45
+        created = self.session.post(f"{BASE_URL}/api/expense-management/expenses", json={
+            "order_id": order_id,
+            "category": "misc",
+            "description": f"TEST_ledger {uuid.uuid4().hex[:6]}",
+            "amount": amount,
+            "date": "2026-01-15",
+        })
+        assert created.status_code == 200, created.text
+        expense_id = created.json()["expense"]["id"]
+
+        submitted = self.session.put(f"{BASE_URL}/api/expense-management/expenses/{expense_id}/submit")
+        assert submitted.status_code == 200, submitted.text
+        approved = self.session.put(
+            f"{BASE_URL}/api/expense-management/expenses/{expense_id}/approve",
+            json={"action": "approve", "approved_by": "TEST_ledger"},
+        )
+        assert approved.status_code == 200, approved.text
+
+        assert execution_expenses() == pytest.approx(before_total + amount, abs=0.05)
+        print("✓ Approved expense reflected in ledger financials")
+
+    def test_reconcile_dry_run(self):
+        """Dry-run reconciliation reports without writing"""
+        response = self.session.post(f"{BASE_URL}/api/finance-dashboard/ledger/reconcile", params={"dry_run": True})
+        assert response.status_code == 200
+        data = response.json()
+        assert data["fixed"] is False
+        assert data["written"] == 0
+        assert data["checked"] >= data["drifted"]
+        print(f"✓ Reconcile checked {data['checked']} orders, {data['drifted']} drifted")
+
+    def test_reconcile_requires_admin(self):
+        """Anonymous callers cannot reconcile the ledger"""
+        response = requests.post(f"{BASE_URL}/api/finance-dashboard/ledger/reconcile")
+        assert response.status_code in [401, 403]
+        print("✓ Ledger reconcile requires admin")
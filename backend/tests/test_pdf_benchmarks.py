@@ -0,0 +1,36 @@
+"""
+PDF Generation Benchmark Tests
+- Every generator renders offline from synthetic fixtures
+- Wall time, peak RSS, page count and output size stay within benchmarks/pdf_budgets.json
+
+Slow machines can relax the time budgets with PDF_BENCH_TIME_SCALE=2.
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('MONGO_URL', 'mongodb://localhost:27017')
+os.environ.setdefault('DB_NAME', 'pdf_benchmarks')
+
+from benchmarks import pdf_suite  # noqa: E402
+
+BUDGETS = pdf_suite.load_budgets()
+CASES = pdf_suite.cases()
+
+
+def test_every_case_has_a_budget():
+    """New cases need a recorded budget"""
+    missing = sorted(set(CASES) - set(BUDGETS))
+    assert not missing, f"No budget for {missing}; run python -m benchmarks.pdf_suite --update-budgets"
+    print(f"✓ {len(CASES)} benchmark cases have budgets")
+
+
+@pytest.mark.parametrize("name", sorted(CASES))
+def test_pdf_within_budget(name):
+    """Render once in a separate process and compare against the golden budget"""
+    result = pdf_suite.run_case(name, CASES[name], repeat=1)
+    violations = pdf_suite.check_budget(result, BUDGETS.get(name))
+    assert not violations, f"{name}: {'; '.join(violations)}"
+    print(f"✓ {name}: {result['seconds']:.3f}s, {result['rss_mb']:.0f} MB, {result['pages']} pages, {result['bytes']} bytes")
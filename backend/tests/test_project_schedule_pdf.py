@@ -5,6 +5,9 @@ Tests the POST /api/project-schedule/pdf endpoint for comprehensive PDF generati
 import pytest
 import requests
 import os
+import io
+
+from PyPDF2 import PdfReader
 
 BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
 
@@ -54,8 +57,8 @@ class TestProjectSchedulePDF:
         
         assert response.status_code == 200, f"Expected 200, got {response.status_code}"
         assert response.headers.get('content-type') == 'application/pdf'
-        # PDF with phases should be larger
-        assert len(response.content) > 50000, "PDF with phases should be larger than 50KB"
+        # PDF with phases should be larger (Gantt bars are vector-drawn, not per-day table cells)
+        assert len(response.content) > 40000, "PDF with phases should be larger than 40KB"
     
     def test_pdf_generation_with_milestones(self):
         """Test PDF generation with milestones data"""
@@ -306,7 +309,7 @@ class TestProjectScheduleNewFeatures:
         assert response.status_code == 200, f"Customer info test failed: {response.status_code}"
         assert response.headers.get('content-type') == 'application/pdf'
         # PDF with customer info should be larger
-        assert len(response.content) > 50000, "PDF with customer info should be larger than 50KB"
+        assert len(response.content) > 40000, "PDF with customer info should be larger than 40KB"
     
     def test_pdf_generation_with_sub_items(self):
         """Test PDF generation with phase sub-items"""
@@ -348,7 +351,13 @@ class TestProjectScheduleNewFeatures:
         assert response.status_code == 200, f"Sub-items test failed: {response.status_code}"
         assert response.headers.get('content-type') == 'application/pdf'
         # PDF with sub-items should be larger
-        assert len(response.content) > 50000, "PDF with sub-items should be larger than 50KB"
+        assert len(response.content) > 40000, "PDF with sub-items should be larger than 40KB"
+        
+        # Gantt chart lists every phase and sub-item with a weekly scale for a 3 month schedule
+        text = "".join(page.extract_text() for page in PdfReader(io.BytesIO(response.content)).pages)
+        assert "TIMELINE VISUALIZATION (GANTT CHART)" in text
+        assert "Panel Board (10 nos)" in text
+        assert "one column per day" not in text and "one column per week" in text
     
     def test_pdf_generation_with_customer_info_and_sub_items(self):
         """Test PDF generation with both customer info and sub-items"""
@@ -415,7 +424,7 @@ class TestProjectScheduleNewFeatures:
         assert response.status_code == 200, f"Full features test failed: {response.status_code}"
         assert response.headers.get('content-type') == 'application/pdf'
         # PDF with all features should be larger
-        assert len(response.content) > 60000, "PDF with all features should be larger than 60KB"
+        assert len(response.content) > 45000, "PDF with all features should be larger than 45KB"
     
     def test_pdf_generation_empty_sub_items(self):
         """Test PDF generation with empty subItems arrays"""
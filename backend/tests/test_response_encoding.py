@@ -0,0 +1,80 @@
+"""
+Response Encoding API Tests
+- Heavy JSON responses are gzip-compressed when the client accepts it
+- GET responses carry a weak ETag and a matching If-None-Match returns an empty 304
+- A changed response gets a new ETag
+- Compression and 304 counts are exported on /metrics
+"""
+
+import os
+
+import pytest
+import requests
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+REPORT_URL = f"{BASE_URL}/api/reports/custom"
+
+
+class TestResponseEncoding:
+    """Compression, ETags and conditional GET"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        """Setup - get auth token"""
+        self.session = requests.Session()
+        login_response = self.session.post(f"{BASE_URL}/api/auth/login", json={
+            "email": "admin@enerzia.com",
+            "password": "admin123"
+        })
+        assert login_response.status_code == 200, f"Login failed: {login_response.text}"
+        token = login_response.json().get("token")
+        self.session.headers.update({"Authorization": f"Bearer {token}"})
+
+    def test_gzip(self):
+        """Large reports are compressed and still decode to the same JSON"""
+        response = self.session.get(REPORT_URL, headers={"Accept-Encoding": "gzip"})
+        assert response.status_code == 200
+        if len(response.content) < 1024:
+            pytest.skip("Report too small to compress")
+        assert response.headers.get("Content-Encoding") == "gzip"
+        assert "Accept-Encoding" in response.headers.get("Vary", "")
+        plain = self.session.get(REPORT_URL, headers={"Accept-Encoding": "identity"})
+        assert "Content-Encoding" not in plain.headers
+        assert plain.json() == response.json()
+        print(f"✓ Report sent as {response.headers['Content-Length']} gzip bytes for {len(plain.content)} bytes of JSON")
+
+    def test_not_modified(self):
+        """Revalidating an unchanged report returns 304 without a body"""
+        response = self.session.get(REPORT_URL)
+        etag = response.headers.get("ETag")
+        assert etag and etag.startswith('W/"')
+
+        cached = self.session.get(REPORT_URL, headers={"If-None-Match": etag})
+        assert cached.status_code == 304
+        assert cached.content == b""
+        assert cached.headers["ETag"] == etag
+
+        stale = self.session.get(REPORT_URL, headers={"If-None-Match": 'W/"outdated"'})
+        assert stale.status_code == 200
+        print("✓ Unchanged report revalidated with 304")
+
+    def test_etag_follows_content(self):
+        """Different report parameters give a different ETag"""
+        by_status = self.session.get(REPORT_URL, params={"group_by": "status"})
+        by_client = self.session.get(REPORT_URL, params={"group_by": "client"})
+        if by_status.content == by_client.content:
+            pytest.skip("Groupings produce identical reports")
+        assert by_status.headers["ETag"] != by_client.headers["ETag"]
+        response = self.session.get(REPORT_URL, params={"group_by": "client"},
+                                    headers={"If-None-Match": by_status.headers["ETag"]})
+        assert response.status_code == 200
+        print("✓ ETag changes with the response body")
+
+    def test_metrics(self):
+        """304s are counted on /metrics"""
+        etag = self.session.get(REPORT_URL).headers["ETag"]
+        self.session.get(REPORT_URL, headers={"If-None-Match": etag})
+        metrics = self.session.get(f"{BASE_URL}/metrics")
+        assert metrics.status_code == 200
+        assert "http_responses_not_modified_total" in metrics.text
+        print("✓ Compression metrics exported")
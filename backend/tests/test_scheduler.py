@@ -0,0 +1,84 @@
+"""
+Background Scheduler API Tests
+- /api/admin/scheduler/jobs lists the registered precomputation jobs
+- Manual runs are recorded in the run history and exported on /metrics
+- Precomputed views (celebrations, overdue follow-ups, billing) keep their response shapes
+"""
+
+import os
+
+import pytest
+import requests
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+EXPECTED_JOBS = {"hr.celebrations", "leads.overdue_followups", "customers.metrics", "billing.weekly_rollup"}
+
+
+class TestScheduler:
+    """Scheduled jobs, run history and precomputed views"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        """Setup - get auth token"""
+        self.session = requests.Session()
+        login_response = self.session.post(f"{BASE_URL}/api/auth/login", json={
+            "email": "admin@enerzia.com",
+            "password": "admin123"
+        })
+        assert login_response.status_code == 200, f"Login failed: {login_response.text}"
+        token = login_response.json().get("token")
+        self.session.headers.update({"Authorization": f"Bearer {token}"})
+
+    def test_jobs_registered(self):
+        """Every precomputation job is registered with a cron schedule"""
+        response = self.session.get(f"{BASE_URL}/api/admin/scheduler/jobs")
+        assert response.status_code == 200
+        jobs = {job["name"]: job for job in response.json()["jobs"]}
+        assert EXPECTED_JOBS <= set(jobs)
+        assert all(len(job["cron"].split()) == 5 for job in jobs.values())
+        print(f"✓ {len(jobs)} scheduled jobs registered")
+
+    def test_manual_run_recorded(self):
+        """A manual run succeeds and shows up in the run history"""
+        response = self.session.post(f"{BASE_URL}/api/admin/scheduler/jobs/hr.celebrations/run")
+        assert response.status_code == 200, response.text
+        run = response.json()
+        assert run["status"] == "success"
+        assert run["duration_ms"] >= 0
+
+        runs = self.session.get(f"{BASE_URL}/api/admin/scheduler/runs", params={"job": "hr.celebrations"}).json()["runs"]
+        assert any(r["id"] == run["id"] for r in runs)
+        print(f"✓ hr.celebrations ran in {run['duration_ms']}ms")
+
+    def test_unknown_job(self):
+        """Unknown jobs return 404"""
+        response = self.session.post(f"{BASE_URL}/api/admin/scheduler/jobs/nope/run")
+        assert response.status_code == 404
+        print("✓ Unknown job rejected")
+
+    def test_duration_metric(self):
+        """Job durations are exported on /metrics"""
+        self.session.post(f"{BASE_URL}/api/admin/scheduler/jobs/billing.weekly_rollup/run")
+        response = self.session.get(f"{BASE_URL}/metrics")
+        assert response.status_code == 200
+        assert 'scheduler_job_duration_seconds_count{job="billing.weekly_rollup"}' in response.text
+        print("✓ scheduler_job_duration_seconds exported")
+
+    def test_precomputed_views(self):
+        """Views served from the precomputed store keep their shapes"""
+        celebrations = self.session.get(f"{BASE_URL}/api/hr/celebrations", params={"days_ahead": 7}).json()
+        assert all(b["days_until"] <= 7 for b in celebrations["birthdays"])
+        assert all(a["days_until"] <= 7 for a in celebrations["anniversaries"])
+
+        weekly = self.session.get(f"{BASE_URL}/api/billing/weekly").json()
+        assert len(weekly) == 8 and "as" in weekly[0]
+        cumulative = self.session.get(f"{BASE_URL}/api/billing/cumulative").json()
+        assert [w["week"] for w in weekly] == [c["week"] for c in cumulative]
+        print("✓ Celebrations and billing rollups served")
+
+    def test_requires_admin(self):
+        """Anonymous callers cannot see or run jobs"""
+        assert requests.get(f"{BASE_URL}/api/admin/scheduler/jobs").status_code in [401, 403]
+        assert requests.post(f"{BASE_URL}/api/admin/scheduler/jobs/hr.celebrations/run").status_code in [401, 403]
+        print("✓ Scheduler endpoints require admin")
@@ -0,0 +1,88 @@
+"""
+Unified Search API Tests
+- GET /api/search ranked, typed hits
+- Index maintained on client create/delete
+- Exact matches survive the candidate cap
+- Type filter validation
+"""
+
+import os
+import uuid
+
+import pytest
+import requests
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+
+class TestUnifiedSearch:
+    """Search index and /api/search tests"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        """Setup - get auth token"""
+        self.session = requests.Session()
+        login_response = self.session.post(f"{BASE_URL}/api/auth/login", json={
+            "email": "admin@enerzia.com",
+            "password": "admin123"
+        })
+        assert login_response.status_code == 200, f"Login failed: {login_response.text}"
+        token = login_response.json().get("token")
+        self.session.headers.update({"Authorization": f"Bearer {token}"})
+        self.marker = f"zqsearch{uuid.uuid4().hex[:6]}"
+
+    def test_client_is_searchable_by_prefix_and_removed_on_delete(self):
+        """Test a new client is indexed on create and dropped on delete"""
+        create = self.session.post(f"{BASE_URL}/api/settings/clients", json={
+            "name": f"{self.marker} Engineering Works",
+            "contact_person": "Search Tester"
+        })
+        assert create.status_code == 200, f"Failed: {create.text}"
+        client_id = create.json()["id"]
+
+        response = self.session.get(f"{BASE_URL}/api/search", params={"q": self.marker[:8], "types": "customer"})
+        assert response.status_code == 200, f"Failed: {response.text}"
+        data = response.json()
+        assert any(hit["id"] == client_id and hit["type"] == "customer" for hit in data["results"])
+        assert "took_ms" in data
+
+        self.session.delete(f"{BASE_URL}/api/settings/clients/{client_id}")
+        response = self.session.get(f"{BASE_URL}/api/search", params={"q": self.marker})
+        assert not any(hit["id"] == client_id for hit in response.json()["results"])
+        print("✓ Client indexed on create and removed on delete")
+
+    def test_exact_match_survives_many_prefix_matches(self):
+        """Test an exact title match is returned first even when many more entries share its prefix"""
+        client_ids = []
+        try:
+            for i in range(12):
+                create = self.session.post(f"{BASE_URL}/api/settings/clients", json={
+                    "name": f"{self.marker}x{i} Trading", "contact_person": "Search Tester"
+                })
+                assert create.status_code == 200, f"Failed: {create.text}"
+                client_ids.append(create.json()["id"])
+            create = self.session.post(f"{BASE_URL}/api/settings/clients", json={"name": self.marker})
+            assert create.status_code == 200, f"Failed: {create.text}"
+            exact_id = create.json()["id"]
+            client_ids.append(exact_id)
+
+            response = self.session.get(
+                f"{BASE_URL}/api/search", params={"q": self.marker, "types": "customer", "limit": 2}
+            )
+            assert response.status_code == 200, f"Failed: {response.text}"
+            assert response.json()["results"][0]["id"] == exact_id
+        finally:
+            for client_id in client_ids:
+                self.session.delete(f"{BASE_URL}/api/settings/clients/{client_id}")
+        print("✓ Exact match ranked first among prefix matches")
+
+    def test_unknown_type_rejected(self):
+        """Test GET /api/search rejects unknown entity types"""
+        response = self.session.get(f"{BASE_URL}/api/search", params={"q": "test", "types": "invoice"})
+        assert response.status_code == 400
+
+    def test_empty_query_returns_no_results(self):
+        """Test GET /api/search with an empty query"""
+        response = self.session.get(f"{BASE_URL}/api/search", params={"q": "  "})
+        assert response.status_code == 200
+        assert response.json()["results"] == []
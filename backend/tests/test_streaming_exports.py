@@ -0,0 +1,100 @@
+"""
+Streaming Export API Tests
+- Project/enquiry Excel and PDF exports return complete files
+- CSV exports stream with a header row
+- async_job=true returns 202 with a job that can be polled and downloaded
+- Background jobs require a signed-in user
+"""
+
+import os
+import time
+
+import pytest
+import requests
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+
+class TestStreamingExports:
+    """Excel/CSV/PDF exports and background export jobs"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        """Setup - get auth token"""
+        self.session = requests.Session()
+        login_response = self.session.post(f"{BASE_URL}/api/auth/login", json={
+            "email": "admin@enerzia.com",
+            "password": "admin123"
+        })
+        assert login_response.status_code == 200, f"Login failed: {login_response.text}"
+        token = login_response.json().get("token")
+        self.session.headers.update({"Authorization": f"Bearer {token}"})
+
+    def test_projects_excel(self):
+        """Excel export is a valid xlsx archive"""
+        response = self.session.get(f"{BASE_URL}/api/projects/export/excel")
+        if response.status_code == 404:
+            pytest.skip("No projects to export")
+        assert response.status_code == 200
+        assert response.content[:2] == b"PK"
+        print(f"✓ Projects Excel export: {len(response.content)} bytes")
+
+    def test_projects_csv(self):
+        """CSV export starts with the column header"""
+        response = self.session.get(f"{BASE_URL}/api/projects/export/csv")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/csv")
+        header = response.content.decode("utf-8-sig").splitlines()[0]
+        assert header.startswith("pid_no,category")
+        print("✓ Projects CSV export streamed")
+
+    def test_projects_pdf(self):
+        """PDF export returns a PDF document"""
+        response = self.session.get(f"{BASE_URL}/api/projects/export/pdf")
+        assert response.status_code in [200, 202]
+        if response.status_code == 200:
+            assert response.content[:4] == b"%PDF"
+        print(f"✓ Projects PDF export: {response.status_code}")
+
+    def test_enquiries_exports(self):
+        """Enquiry Excel, CSV and PDF exports"""
+        for kind, magic in [("excel", b"PK"), ("pdf", b"%PDF")]:
+            response = self.session.get(f"{BASE_URL}/api/sales/enquiries/export/{kind}")
+            assert response.status_code in [200, 202]
+            if response.status_code == 200:
+                assert response.content[:len(magic)] == magic
+        response = self.session.get(f"{BASE_URL}/api/sales/enquiries/export/csv")
+        assert response.status_code == 200
+        print("✓ Enquiry exports returned")
+
+    def test_async_export_job(self):
+        """async_job=true runs in the background and yields a download link"""
+        response = self.session.get(f"{BASE_URL}/api/sales/enquiries/export/excel", params={"async_job": "true"})
+        assert response.status_code == 202
+        job = response.json()
+        assert job["status"] == "running"
+
+        for _ in range(60):
+            status = self.session.get(f"{BASE_URL}{job['status_url']}").json()
+            if status["status"] != "running":
+                break
+            time.sleep(1)
+        assert status["status"] == "done", status
+        assert status["download_url"]
+
+        download = self.session.get(f"{BASE_URL}{status['download_url']}")
+        assert download.status_code == 200
+        assert download.content[:2] == b"PK"
+        print(f"✓ Export job finished with {status['rows']} rows")
+
+    def test_unknown_job(self):
+        """Unknown job ids return 404"""
+        response = self.session.get(f"{BASE_URL}/api/export-jobs/does-not-exist")
+        assert response.status_code == 404
+        print("✓ Unknown export job returns 404")
+
+    def test_async_export_requires_login(self):
+        """Background jobs are only started for signed-in users"""
+        response = requests.get(f"{BASE_URL}/api/sales/enquiries/export/excel", params={"async_job": "true"})
+        assert response.status_code == 401
+        print("✓ Anonymous background export rejected")
@@ -0,0 +1,74 @@
+"""
+Streaming List API Tests
+- Large lists are streamed without a fixed cap
+- limit/cursor paging returns X-Next-Cursor until the last page
+- format=ndjson streams one JSON document per line
+"""
+
+import json
+import os
+
+import pytest
+import requests
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+
+class TestStreamingLists:
+    """Streamed and cursor-paginated list endpoints"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        """Setup - get auth token"""
+        self.session = requests.Session()
+        login_response = self.session.post(f"{BASE_URL}/api/auth/login", json={
+            "email": "admin@enerzia.com",
+            "password": "admin123"
+        })
+        assert login_response.status_code == 200, f"Login failed: {login_response.text}"
+        token = login_response.json().get("token")
+        self.session.headers.update({"Authorization": f"Bearer {token}"})
+
+    def test_projects_cursor_pages_match_full_list(self):
+        """Walking every page yields the same projects as the streamed list"""
+        response = self.session.get(f"{BASE_URL}/api/projects")
+        assert response.status_code == 200
+        full = [p["id"] for p in response.json()]
+
+        paged, cursor = [], None
+        while True:
+            params = {"limit": 25, **({"cursor": cursor} if cursor else {})}
+            response = self.session.get(f"{BASE_URL}/api/projects", params=params)
+            assert response.status_code == 200
+            page = response.json()
+            assert len(page) <= 25
+            paged += [p["id"] for p in page]
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+        assert paged == full
+        print(f"✓ {len(paged)} projects paged with cursors")
+
+    def test_projects_ndjson(self):
+        """format=ndjson returns one project per line"""
+        response = self.session.get(f"{BASE_URL}/api/projects", params={"format": "ndjson", "limit": 10})
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in response.text.splitlines() if line]
+        assert len(lines) <= 10
+        for project in lines:
+            assert "balance" in project
+        print(f"✓ NDJSON returned {len(lines)} projects")
+
+    def test_invalid_cursor(self):
+        """A malformed cursor is rejected"""
+        response = self.session.get(f"{BASE_URL}/api/projects", params={"limit": 5, "cursor": "not-a-cursor"})
+        assert response.status_code == 400
+        print("✓ Invalid cursor rejected")
+
+    def test_hr_employees_paging(self):
+        """HR employee list supports the same limit/cursor paging"""
+        response = self.session.get(f"{BASE_URL}/api/hr/employees", params={"limit": 5})
+        assert response.status_code == 200
+        assert len(response.json()) <= 5
+        print("✓ HR employees paged")
@@ -0,0 +1,261 @@
+"""
+Approval Workflows
+Declarative status transitions for approvable documents (expenses, trips,
+leave and other HR requests, expense sheets) applied to a whole batch at once.
+
+A Workflow names the collection, its status field and the allowed actions;
+each Transition lists the states it may start from. apply_transition()
+resolves the requested ids with one query, validates every document's
+current state, moves all eligible documents with a single update_many
+(filtered on the allowed source states, so a concurrent change is never
+overwritten), pushes the history entry when the workflow keeps one, and
+returns a per-id outcome. When the update misses some documents, each
+call's history entry id (or its at_field stamp) tells its own writes apart
+from a concurrent request's. Bulk endpoints pass notify=True to emit one
+notification for the batch instead of one per document.
+"""
+import logging
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from bson import ObjectId
+from bson.errors import InvalidId
+
+logger = logging.getLogger(__name__)
+
+NOT_FOUND = "not_found"
+INVALID_STATE = "invalid_state"
+
+
+@dataclass(frozen=True)
+class Transition:
+    """An action moving a document from any of from_states to to_state"""
+    to_state: str
+    from_states: Tuple[str, ...]
+    by_field: Optional[str] = None
+    at_field: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class Workflow:
+    collection: str
+    transitions: Dict[str, Transition]
+    label: str
+    status_field: str = "status"
+    # "_id" matches ObjectId strings, any other field matches the string as is
+    id_fields: Tuple[str, ...] = ("id",)
+    history_field: Optional[str] = None
+    updated_field: Optional[str] = None
+    # Some collections store approval times as datetimes, most as ISO strings
+    iso_timestamps: bool = True
+    notify_department: Optional[str] = None
+
+    def transition(self, action: str) -> Transition:
+        if action not in self.transitions:
+            raise ValueError(f"Invalid action. Must be one of: {list(self.transitions)}")
+        return self.transitions[action]
+
+
+@dataclass
+class TransitionResult:
+    action: str
+    to_state: str
+    succeeded: List[str] = field(default_factory=list)
+    failed: List[dict] = field(default_factory=list)
+    # Requested id -> document as read before the update (projected fields only)
+    documents: Dict[str, dict] = field(default_factory=dict)
+
+    def summary(self) -> dict:
+        return {
+            "action": self.action,
+            "status": self.to_state,
+            "updated_count": len(self.succeeded),
+            "updated": self.succeeded,
+            "failed": self.failed,
+        }
+
+
+def _id_query(workflow: Workflow, ids: List[str]) -> dict:
+    clauses = []
+    for id_field in workflow.id_fields:
+        if id_field == "_id":
+            object_ids = []
+            for value in ids:
+                try:
+                    object_ids.append(ObjectId(value))
+                except (InvalidId, TypeError):
+                    continue
+            if object_ids:
+                clauses.append({"_id": {"$in": object_ids}})
+        else:
+            clauses.append({id_field: {"$in": ids}})
+    if not clauses:
+        return {"_id": {"$in": []}}
+    return clauses[0] if len(clauses) == 1 else {"$or": clauses}
+
+
+def _same_stamp(stored, stamp) -> bool:
+    """Mongo returns datetimes naive, in UTC and truncated to milliseconds"""
+    if isinstance(stored, datetime) and isinstance(stamp, datetime):
+        if stored.tzinfo is None:
+            stored = stored.replace(tzinfo=timezone.utc)
+        return stored == stamp.replace(microsecond=stamp.microsecond // 1000 * 1000)
+    return stored == stamp
+
+
+def _requested_id(workflow: Workflow, doc: dict, wanted: set) -> Optional[str]:
+    for id_field in workflow.id_fields:
+        value = doc.get(id_field)
+        if value is not None and str(value) in wanted:
+            return str(value)
+    return None
+
+
+async def apply_transition(
+    db,
+    workflow: Workflow,
+    ids: Iterable[str],
+    action: str,
+    actor: Optional[str] = None,
+    comments: Optional[str] = None,
+    extra: Optional[dict] = None,
+    fields: Iterable[str] = (),
+    notify: bool = False,
+) -> TransitionResult:
+    """
+    Apply `action` to every document in `ids` with one read and one write.
+    Raises ValueError for an action the workflow does not define.
+    """
+    transition = workflow.transition(action)
+    requested = list(dict.fromkeys(str(i) for i in ids if i))
+    result = TransitionResult(action=action, to_state=transition.to_state)
+    if not requested:
+        return result
+
+    collection = db[workflow.collection]
+    projection = {f: 1 for f in (*workflow.id_fields, workflow.status_field, *fields)}
+    projection["_id"] = 1
+
+    wanted = set(requested)
+    found: Dict[str, dict] = {}
+    async for doc in collection.find(_id_query(workflow, requested), projection):
+        key = _requested_id(workflow, doc, wanted)
+        if key and key not in found:
+            found[key] = doc
+
+    eligible: Dict[str, dict] = {}
+    for key in requested:
+        doc = found.get(key)
+        if doc is None:
+            result.failed.append({"id": key, "error": NOT_FOUND, "reason": "Not found"})
+            continue
+        current = doc.get(workflow.status_field)
+        if current not in transition.from_states:
+            result.failed.append({
+                "id": key,
+                "error": INVALID_STATE,
+                "status": current,
+                "reason": f"Cannot {action.replace('_', ' ')} from '{current}' status",
+            })
+            continue
+        eligible[key] = doc
+
+    if eligible:
+        now = datetime.now(timezone.utc)
+        stamp = now.isoformat() if workflow.iso_timestamps else now
+        updates = {workflow.status_field: transition.to_state, **(extra or {})}
+        if transition.by_field:
+            updates[transition.by_field] = actor
+        if transition.at_field:
+            updates[transition.at_field] = stamp
+        if workflow.updated_field:
+            updates[workflow.updated_field] = now
+        operation = {"$set": updates}
+        entry_id = str(uuid.uuid4())
+        if workflow.history_field:
+            operation["$push"] = {workflow.history_field: {
+                "id": entry_id,
+                "action": action,
+                "by": actor,
+                "at": now.isoformat(),
+                "comments": comments or "",
+            }}
+
+        object_ids = [doc["_id"] for doc in eligible.values()]
+        update = await collection.update_many(
+            {"_id": {"$in": object_ids}, workflow.status_field: {"$in": list(transition.from_states)}},
+            operation,
+        )
+
+        moved = set(eligible)
+        if update.modified_count < len(eligible):
+            # Another writer changed some of them between the read and the write
+            check = {"_id": 1, workflow.status_field: 1}
+            if transition.at_field:
+                check[transition.at_field] = 1
+            after = {d["_id"]: d async for d in collection.find({"_id": {"$in": object_ids}}, check)}
+            marked = set()
+            if workflow.history_field:
+                marked = {d["_id"] async for d in collection.find(
+                    {"_id": {"$in": object_ids}, f"{workflow.history_field}.id": entry_id}, {"_id": 1}
+                )}
+            moved = set()
+            for key, doc in eligible.items():
+                latest = after.get(doc["_id"], {})
+                if workflow.history_field:
+                    own_write = doc["_id"] in marked
+                else:
+                    own_write = latest.get(workflow.status_field) == transition.to_state and (
+                        not transition.at_field or _same_stamp(latest.get(transition.at_field), stamp)
+                    )
+                if own_write:
+                    moved.add(key)
+                else:
+                    result.failed.append({
+                        "id": key,
+                        "error": INVALID_STATE,
+                        "status": latest.get(workflow.status_field),
+                        "reason": "Changed by another request",
+                    })
+
+        for key in requested:
+            if key in moved:
+                result.succeeded.append(key)
+                result.documents[key] = eligible[key]
+
+    if notify and result.succeeded and workflow.notify_department:
+        await _notify(db, workflow, result, actor)
+
+    return result
+
+
+async def _notify(db, workflow: Workflow, result: TransitionResult, actor: Optional[str]):
+    """One notification for the whole batch"""
+    count = len(result.succeeded)
+    noun = workflow.label if count == 1 else f"{workflow.label}s"
+    title = f"{count} {noun} {result.to_state.replace('_', ' ')}"
+    try:
+        await db.notifications.insert_one({
+            "id": str(uuid.uuid4()),
+            "type": "status_update",
+            "title": title,
+            "message": f"{title}{f' by {actor}' if actor else ''}",
+            "department": workflow.notify_department,
+            "from_department": None,
+            "reference_id": result.succeeded[0] if count == 1 else None,
+            "reference_ids": result.succeeded,
+            "reference_type": workflow.collection,
+            "is_read": False,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "created_by": actor,
+        })
+        from core.websocket import manager
+        await manager.broadcast({
+            "type": "notification",
+            "action": "new",
+            "data": {"department": workflow.notify_department, "title": title, "message": title},
+        })
+    except Exception as e:
+        logger.error(f"Error sending {workflow.collection} approval notification: {e}")
@@ -0,0 +1,366 @@
+"""
+Bulk Import Utilities
+Shared helpers for spreadsheet imports: vectorized column normalization,
+batched Pydantic validation, chunked unordered inserts and keyed diff sync.
+
+Usage:
+    df = read_excel_upload(contents)
+    frame = normalize_frame(df, {
+        "invoice_no": Column(["invoice no", "invoice_no"], kind="str"),
+        "amount": Column(["amount", "total"], kind="float", default=0),
+    })
+    report = await import_records(db.accounts_invoices, frame, Invoice, dry_run=False)
+"""
+import io
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Type
+
+import pandas as pd
+from pydantic import BaseModel, TypeAdapter, ValidationError
+from pymongo.errors import BulkWriteError, OperationFailure
+
+logger = logging.getLogger(__name__)
+
+# Excel row numbers start at 1 and the header occupies the first row
+EXCEL_ROW_OFFSET = 2
+
+DEFAULT_CHUNK_SIZE = 1000
+
+
+@dataclass
+class Column:
+    """
+    Describes how one target field is read from an uploaded sheet.
+
+    aliases:   header names to look for, in order of preference (lowercase)
+    kind:      "str", "lower", "float", "optional_float", "date" or "optional_str".
+               "float" keeps unparseable cells so validation reports the row;
+               "optional_float" turns them into the default.
+    default:   value used when the column is missing or the cell is empty.
+               May be a callable taking the 0-based row position.
+    """
+    aliases: Sequence[str]
+    kind: str = "str"
+    default: Any = None
+
+
+@dataclass
+class ImportReport:
+    """Outcome of a bulk import, serialisable into the existing response shape"""
+    total_rows: int = 0
+    valid: int = 0
+    imported: int = 0
+    updated: int = 0
+    dry_run: bool = False
+    errors: List[str] = field(default_factory=list)
+
+    def add_error(self, position: int, message: str):
+        self.errors.append(f"Row {position + EXCEL_ROW_OFFSET}: {message}")
+
+    def to_dict(self) -> dict:
+        return {
+            "total_rows": self.total_rows,
+            "valid": self.valid,
+            "imported": self.imported,
+            "updated": self.updated,
+            "dry_run": self.dry_run,
+            "errors": self.errors if self.errors else None,
+        }
+
+
+def read_excel_upload(contents: bytes, header: Optional[int] = 0) -> pd.DataFrame:
+    """Read an uploaded workbook and normalise header names to stripped lowercase"""
+    df = pd.read_excel(io.BytesIO(contents), header=header)
+    if header is not None:
+        df.columns = df.columns.astype(str).str.strip().str.lower()
+    return df
+
+
+def _pick_column(df: pd.DataFrame, aliases: Sequence[str]) -> Optional[pd.Series]:
+    """Return the first alias present in the frame, coalescing later aliases into gaps"""
+    present = [a for a in aliases if a in df.columns]
+    if not present:
+        return None
+    series = df[present[0]]
+    for alias in present[1:]:
+        series = series.where(series.notna(), df[alias])
+    return series
+
+
+def _default_series(index: pd.Index, default: Any) -> pd.Series:
+    if callable(default):
+        return pd.Series([default(i) for i in range(len(index))], index=index, dtype=object)
+    return pd.Series([default] * len(index), index=index, dtype=object)
+
+
+def _format_date(value: Any) -> Any:
+    if isinstance(value, (datetime, pd.Timestamp)):
+        return value.strftime('%Y-%m-%d')
+    return str(value)
+
+
+def normalize_column(series: Optional[pd.Series], index: pd.Index, spec: Column) -> pd.Series:
+    """Coerce a raw sheet column into its target type using vectorized operations"""
+    if series is None:
+        return _default_series(index, spec.default)
+
+    missing = series.isna()
+    if spec.kind in ("float", "optional_float"):
+        numeric = pd.to_numeric(series, errors="coerce")
+        unparseable = numeric.isna() & ~missing
+        if spec.kind == "float" and unparseable.any():
+            # Keep the raw cell so batch validation reports the row instead of zeroing it
+            return numeric.astype(object).where(~unparseable, series).where(~missing, spec.default)
+        if spec.default is None:
+            return numeric.astype(object).where(numeric.notna(), None)
+        return numeric.fillna(spec.default).astype(float)
+
+    if spec.kind == "date":
+        if pd.api.types.is_datetime64_any_dtype(series):
+            values = series.dt.strftime('%Y-%m-%d').astype(object)
+        else:
+            values = series.map(_format_date, na_action="ignore").astype(object)
+    else:
+        values = series.astype(str).str.strip().astype(object)
+        if spec.kind == "lower":
+            values = values.str.lower()
+        # Blank strings count as empty cells for optional fields
+        if spec.kind == "optional_str":
+            missing = missing | (values == "")
+
+    if not missing.any():
+        return values
+    return values.where(~missing, _default_series(index, spec.default))
+
+
+def normalize_frame(df: pd.DataFrame, columns: Dict[str, Column]) -> pd.DataFrame:
+    """Build a frame holding only the target fields, normalised column by column"""
+    data = {
+        name: normalize_column(_pick_column(df, spec.aliases), df.index, spec)
+        for name, spec in columns.items()
+    }
+    frame = pd.DataFrame(data, index=df.index)
+    return frame.astype(object).where(frame.notna(), None)
+
+
+def frame_records(frame: pd.DataFrame) -> List[dict]:
+    """Convert a normalised frame into plain dicts with NaN mapped to None"""
+    return frame.astype(object).where(frame.notna(), None).to_dict("records")
+
+
+def validate_batch(
+    records: List[dict],
+    model: Type[BaseModel],
+    report: ImportReport,
+    positions: Optional[List[int]] = None,
+    serialize: Optional[Callable[[dict], dict]] = None,
+) -> Tuple[List[dict], List[int]]:
+    """
+    Validate a batch of rows against a Pydantic model in one call.
+
+    Invalid rows are recorded in the report using their original sheet
+    position; valid rows are dumped to documents ready for insertion and
+    returned together with their sheet positions.
+    """
+    positions = positions if positions is not None else list(range(len(records)))
+    adapter = TypeAdapter(List[model])
+    try:
+        objects = adapter.validate_python(records)
+        valid_pairs = list(zip(positions, objects))
+    except ValidationError as e:
+        failed: Dict[int, str] = {}
+        for err in e.errors():
+            idx = err["loc"][0]
+            field_path = ".".join(str(p) for p in err["loc"][1:])
+            failed.setdefault(idx, f"{field_path}: {err['msg']}" if field_path else err["msg"])
+        for idx, message in failed.items():
+            report.add_error(positions[idx], message)
+        valid_pairs = [
+            (positions[i], model(**rec)) for i, rec in enumerate(records) if i not in failed
+        ]
+
+    docs = []
+    doc_positions = []
+    for position, obj in valid_pairs:
+        doc = obj.model_dump()
+        for key, value in doc.items():
+            if isinstance(value, datetime):
+                doc[key] = value.isoformat()
+        docs.append(serialize(doc) if serialize else doc)
+        doc_positions.append(position)
+    report.valid += len(docs)
+    return docs, doc_positions
+
+
+async def insert_in_chunks(
+    collection,
+    docs: List[dict],
+    report: ImportReport,
+    positions: Optional[List[int]] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> int:
+    """Insert documents with unordered insert_many calls, recording per-row failures"""
+    positions = positions if positions is not None else list(range(len(docs)))
+    inserted = 0
+    for start in range(0, len(docs), chunk_size):
+        chunk = docs[start:start + chunk_size]
+        try:
+            result = await collection.insert_many(chunk, ordered=False)
+            inserted += len(result.inserted_ids)
+        except BulkWriteError as e:
+            details = e.details or {}
+            inserted += details.get("nInserted", 0)
+            for write_error in details.get("writeErrors", []):
+                report.add_error(positions[start + write_error["index"]], write_error.get("errmsg", "Write failed"))
+    # insert_many adds _id to the passed dicts; keep callers free to return them as JSON
+    for doc in docs:
+        doc.pop("_id", None)
+    report.imported += inserted
+    return inserted
+
+
+async def bulk_write_in_chunks(collection, operations: list, chunk_size: int = DEFAULT_CHUNK_SIZE) -> dict:
+    """Apply write operations in unordered chunks and sum the result counters"""
+    totals = {"inserted": 0, "matched": 0, "modified": 0, "upserted": 0, "deleted": 0, "errors": []}
+    for start in range(0, len(operations), chunk_size):
+        chunk = operations[start:start + chunk_size]
+        try:
+            result = await collection.bulk_write(chunk, ordered=False)
+            details = result.bulk_api_result
+        except BulkWriteError as e:
+            details = e.details or {}
+            totals["errors"].extend(
+                {"index": start + w["index"], "error": w.get("errmsg", "Write failed")}
+                for w in details.get("writeErrors", [])
+            )
+        totals["inserted"] += details.get("nInserted", 0)
+        totals["matched"] += details.get("nMatched", 0)
+        totals["modified"] += details.get("nModified", 0)
+        totals["upserted"] += details.get("nUpserted", 0)
+        totals["deleted"] += details.get("nRemoved", 0)
+    return totals
+
+
+async def import_records(
+    collection,
+    frame: pd.DataFrame,
+    model: Type[BaseModel],
+    dry_run: bool = False,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    serialize: Optional[Callable[[dict], dict]] = None,
+) -> ImportReport:
+    """
+    Validate a normalised frame batch by batch and insert the valid rows.
+
+    With dry_run=True nothing is written; the report shows how many rows
+    would be imported and which rows would be rejected.
+    """
+    report = ImportReport(total_rows=len(frame), dry_run=dry_run)
+    records = frame_records(frame)
+
+    for start in range(0, len(records), chunk_size):
+        batch = records[start:start + chunk_size]
+        batch_positions = list(range(start, start + len(batch)))
+        docs, doc_positions = validate_batch(
+            batch, model, report, positions=batch_positions, serialize=serialize
+        )
+        if dry_run or not docs:
+            continue
+        await insert_in_chunks(collection, docs, report, positions=doc_positions, chunk_size=chunk_size)
+
+    return report
+
+
+@dataclass
+class KeyedDiff:
+    """Changes needed to bring a collection in line with an imported sheet"""
+    inserts: List[dict] = field(default_factory=list)
+    updates: List[Tuple[dict, dict]] = field(default_factory=list)  # (existing, changed fields)
+    deletes: List[dict] = field(default_factory=list)
+    unchanged: int = 0
+
+
+def _same_value(current: Any, incoming: Any) -> bool:
+    if isinstance(current, (int, float)) and isinstance(incoming, (int, float)):
+        return float(current) == float(incoming)
+    return current == incoming
+
+
+def compute_keyed_diff(
+    existing: List[dict],
+    incoming: List[dict],
+    key: str,
+    compare_fields: Sequence[str],
+    deletable: Optional[Callable[[dict], bool]] = None,
+    keep: Iterable = (),
+) -> KeyedDiff:
+    """
+    Diff incoming rows against existing documents on a business key.
+
+    Only fields listed in compare_fields are compared and written, so
+    identity fields such as id and created_at are preserved. Existing
+    documents missing from the sheet are deleted when deletable() allows it.
+    Keys in keep (sheet rows that failed validation) are never deleted.
+    """
+    diff = KeyedDiff()
+    current_by_key = {}
+    for doc in existing:
+        current_by_key.setdefault(doc.get(key), doc)
+
+    seen = set(keep)
+    for row in incoming:
+        row_key = row[key]
+        seen.add(row_key)
+        current = current_by_key.get(row_key)
+        if current is None:
+            diff.inserts.append(row)
+            continue
+        changed = {
+            f: row[f] for f in compare_fields
+            if f in row and not _same_value(current.get(f), row[f])
+        }
+        if changed:
+            diff.updates.append((current, changed))
+        else:
+            diff.unchanged += 1
+
+    if deletable:
+        diff.deletes = [
+            doc for doc_key, doc in current_by_key.items()
+            if doc_key not in seen and deletable(doc)
+        ]
+    return diff
+
+
+async def bulk_write_transaction(client, collection, operations: list) -> dict:
+    """
+    Apply operations as one unordered bulk write inside a session transaction.
+
+    Transactions need a replica set; on a standalone mongod the write falls
+    back to a plain bulk write so imports keep working in development.
+    """
+    if not operations:
+        return {"inserted": 0, "matched": 0, "modified": 0, "deleted": 0, "transactional": False}
+
+    async with await client.start_session() as session:
+        try:
+            async with session.start_transaction():
+                result = await collection.bulk_write(operations, ordered=False, session=session)
+            transactional = True
+        except OperationFailure as e:
+            # IllegalOperation: "Transaction numbers are only allowed on a replica set member or mongos"
+            if e.code != 20:
+                raise
+            logger.warning("Transactions not supported by this deployment, applying bulk write without one")
+            result = await collection.bulk_write(operations, ordered=False)
+            transactional = False
+
+    return {
+        "inserted": result.inserted_count,
+        "matched": result.matched_count,
+        "modified": result.modified_count,
+        "deleted": result.deleted_count,
+        "transactional": transactional,
+    }
@@ -11,6 +11,8 @@ from functools import wraps
 import asyncio
 import hashlib
 
+from utils.perf import record_cache_lookup
+
 logger = logging.getLogger(__name__)
 
 # Try to import redis
@@ -154,6 +156,7 @@ class CacheManager:
         """Get value from cache, deserialize JSON"""
         try:
             value = await self.client.get(key)
+            record_cache_lookup(bool(value))
             if value:
                 return json.loads(value)
             return None
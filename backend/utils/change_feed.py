@@ -0,0 +1,356 @@
+"""
+Change Feed
+Turns writes to MongoDB into the side effects that keep derived data fresh,
+in one place and whoever made the write: API routes, the Excel and data
+imports, the Zoho sync or scripts run straight against the database.
+
+CHANGE_ROUTES maps each watched collection to its effects:
+
+    cache_tags   CacheManager key prefixes to drop ("dashboard" -> dashboard:*)
+    snapshots    columnar snapshots to refresh (utils/columnar.py)
+    views        precomputed views to invalidate (utils/scheduler.py)
+    rollups      derived collections refreshed for the changed document ids
+                 (search index, sales cube, order ledger, due items, customer metrics)
+    entity       WebSocket data_update events sent to connected clients
+
+Changes come from a MongoDB change stream. On a standalone mongod, where
+change streams are unavailable, each collection is polled every POLL_SECONDS
+for documents whose updated_at moved past a watermark, read in pages of
+POLL_BATCH_SIZE ordered by that field so a large import is seen in full, and
+a falling document count stands in for deletes. Changes are coalesced for FLUSH_SECONDS and
+applied per collection and action.
+
+Every worker consumes the feed, since caches, snapshots and WebSocket clients
+are per process. Views and rollups live in the database and are applied by the
+worker holding the `change_feed_state` leader lease, which also stores the
+stream's resume token so writes made while no worker was up are replayed on
+the next start. Deleted documents carry no id in the feed; their rollup rows
+are repaired by the nightly rebuilds.
+
+Write paths keep their own synchronous refreshes for read-your-writes; the
+feed makes sure nothing else depends on them or on cache TTLs. Set
+CHANGE_FEED_ENABLED=false to run a worker without it.
+"""
+import asyncio
+import logging
+import os
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError, OperationFailure
+
+from utils import columnar, perf
+from utils.cache import cache
+from utils.customer_metrics import refresh_customer_metrics, refresh_enquiry_customer_metrics
+from utils.due_items import refresh_due_items
+from utils.indexes import index, register_indexes
+from utils.order_ledger import refresh_order_ledger
+from utils.sales_cube import refresh_sales_cube
+from utils.scheduler import WORKER_ID, invalidate_view
+from utils.search import refresh_search_index
+from utils.streaming import changed_since, fetch_page, find_by_ids
+
+logger = logging.getLogger(__name__)
+
+CHANGE_FEED_ENABLED = os.environ.get("CHANGE_FEED_ENABLED", "true").lower() not in ("0", "false", "no")
+FLUSH_SECONDS = float(os.environ.get("CHANGE_FEED_FLUSH_SECONDS", "1"))
+POLL_SECONDS = float(os.environ.get("CHANGE_FEED_POLL_SECONDS", "5"))
+LEASE_SECONDS = 30
+# Polls re-read this far behind the watermark to cover clock skew between writers
+POLL_OVERLAP = timedelta(seconds=5)
+POLL_BATCH_SIZE = 1000
+RESTART_DELAY_SECONDS = 5
+
+Rollup = Callable[[object, List[str]], Awaitable[object]]
+
+
+@dataclass(frozen=True)
+class ChangeRoute:
+    cache_tags: Tuple[str, ...] = ()
+    snapshots: Tuple[str, ...] = ()
+    views: Tuple[str, ...] = ()
+    rollups: Tuple[Rollup, ...] = ()
+    entity: Optional[str] = None
+    # Field the polling fallback watches; None detects inserts and deletes by count only
+    watermark: Optional[str] = "updated_at"
+
+
+def _search(collection: str) -> Rollup:
+    return lambda db, ids: refresh_search_index(db, collection, ids)
+
+
+def _cube(kind: str) -> Rollup:
+    return lambda db, ids: refresh_sales_cube(db, kind, ids)
+
+
+def _due(kind: str) -> Rollup:
+    return lambda db, ids: refresh_due_items(db, kind, ids)
+
+
+def _ledger_via(collection: str, order_field: str) -> Rollup:
+    """Refresh the ledger rows of the orders the changed documents belong to"""
+    async def refresh(db, ids):
+        docs = await find_by_ids(db[collection], ids, {"_id": 0, order_field: 1})
+        return await refresh_order_ledger(db, [d.get(order_field) for d in docs])
+    return refresh
+
+
+CHANGE_ROUTES: Dict[str, ChangeRoute] = {
+    "projects": ChangeRoute(
+        cache_tags=("dashboard", "projects"), snapshots=("projects",), views=("billing.weekly_rollup",),
+        rollups=(_search("projects"),), entity="project",
+    ),
+    "amcs": ChangeRoute(cache_tags=("amc",), rollups=(_due("amc_visit"),), entity="amc"),
+    "calibration_contracts": ChangeRoute(cache_tags=("calibration",), rollups=(_due("calibration"),), entity="calibration"),
+    "scheduled_inspections": ChangeRoute(rollups=(_due("inspection"),), entity="inspection"),
+    "clients": ChangeRoute(rollups=(_search("clients"), refresh_customer_metrics), entity="customer"),
+    "sales_enquiries": ChangeRoute(
+        rollups=(_search("sales_enquiries"), _cube("enquiry"), refresh_enquiry_customer_metrics), entity="enquiry",
+    ),
+    "sales_quotations": ChangeRoute(rollups=(_search("sales_quotations"), _cube("quotation")), entity="quotation"),
+    "sales_orders": ChangeRoute(
+        snapshots=("sales_orders",), rollups=(_search("sales_orders"), _cube("order"), refresh_order_ledger),
+        entity="order",
+    ),
+    "purchase_orders_v2": ChangeRoute(
+        snapshots=("purchase_orders_v2",), rollups=(_ledger_via("purchase_orders_v2", "sales_order_id"),),
+        entity="purchase_order",
+    ),
+    "expenses_v2": ChangeRoute(
+        snapshots=("expenses_v2",), rollups=(_ledger_via("expenses_v2", "order_id"),), entity="expense",
+    ),
+    "hr_payroll": ChangeRoute(snapshots=("hr_payroll",), entity="payroll", watermark=None),
+    "hr_employees": ChangeRoute(views=("hr.celebrations",), entity="employee"),
+    "followups": ChangeRoute(views=("leads.overdue_followups",), entity="followup"),
+}
+
+# Indexed watermarks keep the polling fallback and snapshot delta reads off collection scans
+register_indexes(__name__, {
+    name: [index(route.watermark)] for name, route in CHANGE_ROUTES.items() if route.watermark
+})
+
+ACTIONS = {"insert": "create", "update": "update", "replace": "update", "delete": "delete"}
+
+Listener = Callable[[str, str, List[str]], Awaitable[None]]
+
+
+class ChangeFeed:
+    def __init__(self):
+        self.db = None
+        self.mode = "stopped"
+        self._task: Optional[asyncio.Task] = None
+        self._flusher: Optional[asyncio.Task] = None
+        self._listeners: List[Listener] = []
+        # (collection, action) -> ids; an empty set still triggers the id-less effects
+        self._pending: Dict[Tuple[str, str], Set[str]] = defaultdict(set)
+        self._resume_token = None
+        self._events: Dict[str, int] = defaultdict(int)
+        self._flushes = 0
+        self.last_event_at: Optional[datetime] = None
+        self.leader = False
+
+    def add_listener(self, listener: Listener):
+        """Called with (entity, action, ids) for every flushed change of a collection with an entity"""
+        self._listeners.append(listener)
+
+    def start(self, db):
+        if not CHANGE_FEED_ENABLED or self._task:
+            return
+        self.db = db
+        self._task = asyncio.create_task(self._consume())
+        self._flusher = asyncio.create_task(self._flush_loop())
+        logger.info(f"Change feed started on {WORKER_ID} for {len(CHANGE_ROUTES)} collections")
+
+    async def stop(self):
+        for task in (self._task, self._flusher):
+            if task:
+                task.cancel()
+        self._task = self._flusher = None
+        self.mode = "stopped"
+
+    def record(self, collection: str, operation: str, doc_id: Optional[str]):
+        """Queue a change for the next flush"""
+        action = ACTIONS.get(operation)
+        if collection not in CHANGE_ROUTES or not action:
+            return
+        ids = self._pending[(collection, action)]
+        if doc_id:
+            ids.add(doc_id)
+        self._events[collection] += 1
+        self.last_event_at = datetime.now(timezone.utc)
+
+    # ---------------------------------------------------------------- sources
+
+    async def _consume(self):
+        try:
+            state = await self.db.change_feed_state.find_one({"_id": "resume_token"})
+            self._resume_token = state.get("token") if state else None
+        except Exception as e:
+            logger.error(f"Error loading change feed resume token: {e}")
+        while True:
+            try:
+                await self._watch()
+            except asyncio.CancelledError:
+                raise
+            except (OperationFailure, NotImplementedError) as e:
+                if self._resume_token is not None and isinstance(e, OperationFailure) and e.code == 286:
+                    # Resume point fell off the oplog; continue from now
+                    self._resume_token = None
+                    continue
+                logger.warning(f"Change streams unavailable ({e}); polling every {POLL_SECONDS:g}s")
+                await self._poll()
+            except Exception as e:
+                logger.error(f"Change stream failed, restarting: {e}")
+                await asyncio.sleep(RESTART_DELAY_SECONDS)
+
+    async def _watch(self):
+        pipeline = [
+            {"$match": {"ns.coll": {"$in": list(CHANGE_ROUTES)}, "operationType": {"$in": list(ACTIONS)}}},
+            {"$project": {"ns.coll": 1, "operationType": 1, "fullDocument.id": 1}},
+        ]
+        async with self.db.watch(pipeline, full_document="updateLookup", resume_after=self._resume_token) as stream:
+            self.mode = "change_stream"
+            async for change in stream:
+                self.record(change["ns"]["coll"], change["operationType"], (change.get("fullDocument") or {}).get("id"))
+                self._resume_token = stream.resume_token
+
+    async def _poll(self):
+        self.mode = "polling"
+        counts: Dict[str, int] = {}
+        # id -> watermark value from the previous poll, so the overlap window is not re-applied
+        seen: Dict[str, Dict[str, object]] = defaultdict(dict)
+        since = datetime.now(timezone.utc)
+        while True:
+            started = datetime.now(timezone.utc)
+            for name, route in CHANGE_ROUTES.items():
+                try:
+                    await self._poll_collection(name, route, since, counts, seen)
+                except Exception as e:
+                    logger.error(f"Error polling {name} for changes: {e}")
+            since = started
+            await asyncio.sleep(POLL_SECONDS)
+
+    async def _poll_collection(self, name: str, route: ChangeRoute, since: datetime, counts: dict, seen: dict):
+        collection = self.db[name]
+        count = await collection.estimated_document_count()
+        previous = counts.get(name)
+        counts[name] = count
+        changed = False
+        if route.watermark:
+            current = {}
+            page_cursor = None
+            while True:
+                docs, page_cursor = await fetch_page(
+                    collection, changed_since(route.watermark, since - POLL_OVERLAP),
+                    {"_id": 0, "id": 1, route.watermark: 1}, sort_field=route.watermark, direction=1,
+                    limit=POLL_BATCH_SIZE, cursor=page_cursor,
+                )
+                for doc in docs:
+                    if not doc.get("id"):
+                        continue
+                    current[doc["id"]] = doc.get(route.watermark)
+                    if seen[name].get(doc["id"]) != current[doc["id"]]:
+                        self.record(name, "update", doc["id"])
+                        changed = True
+                if not page_cursor:
+                    break
+            seen[name] = current
+        if previous is not None and count != previous and not changed:
+            self.record(name, "delete" if count < previous else "insert", None)
+
+    # ---------------------------------------------------------------- effects
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(FLUSH_SECONDS)
+            try:
+                await self.flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error applying change feed effects: {e}")
+
+    async def flush(self):
+        """Apply the effects of every change queued since the last flush"""
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, defaultdict(set)
+        token = self._resume_token
+        self.leader = await self._hold_lease()
+        for (collection, action), ids in pending.items():
+            await self.apply(collection, action, sorted(ids), leader=self.leader)
+        self._flushes += 1
+        if self.leader and token is not None:
+            await self.db.change_feed_state.replace_one({"_id": "resume_token"}, {"token": token}, upsert=True)
+
+    async def apply(self, collection: str, action: str, ids: List[str], leader: bool = True):
+        """Run a collection's effects for one batch of changes"""
+        route = CHANGE_ROUTES[collection]
+        effects: List[Tuple[str, Callable[[], Awaitable[object]]]] = []
+        effects += [(f"cache {tag}", lambda tag=tag: cache.invalidate_pattern(f"{tag}:*")) for tag in route.cache_tags]
+        columnar.mark_stale(*route.snapshots)
+        if route.entity:
+            effects += [("listener", lambda listener=listener: listener(route.entity, action, ids))
+                        for listener in self._listeners]
+        if leader:
+            effects += [(f"view {view}", lambda view=view: invalidate_view(self.db, view)) for view in route.views]
+            if ids:
+                effects += [("rollup", lambda rollup=rollup: rollup(self.db, ids)) for rollup in route.rollups]
+        for name, effect in effects:
+            try:
+                await effect()
+            except Exception as e:
+                logger.error(f"Error applying {name} for {collection} {action}: {e}")
+
+    async def _hold_lease(self) -> bool:
+        """Take or renew the leader lease; False while another worker holds it"""
+        now = datetime.now(timezone.utc)
+        try:
+            lease = await self.db.change_feed_state.find_one_and_update(
+                {"_id": "leader", "$or": [{"owner": WORKER_ID}, {"expires_at": {"$lt": now}}]},
+                {"$set": {"owner": WORKER_ID, "expires_at": now + timedelta(seconds=LEASE_SECONDS)}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+        except DuplicateKeyError:
+            return False
+        except Exception as e:
+            logger.error(f"Error renewing change feed lease: {e}")
+            return False
+        return bool(lease) and lease.get("owner") == WORKER_ID
+
+    # ---------------------------------------------------------------- reporting
+
+    def status(self) -> dict:
+        return {
+            "enabled": CHANGE_FEED_ENABLED,
+            "mode": self.mode,
+            "worker": WORKER_ID,
+            "leader": self.leader,
+            "flushes": self._flushes,
+            "last_event_at": self.last_event_at,
+            "events": dict(sorted(self._events.items())),
+            "collections": sorted(CHANGE_ROUTES),
+        }
+
+    def render_metrics(self) -> str:
+        """Change counts per collection in Prometheus text format, appended to /metrics"""
+        labels = perf._labels
+        lines = [
+            "# HELP change_feed_events_total Database changes seen by the worker's change feed",
+            "# TYPE change_feed_events_total counter",
+        ]
+        lines += [f"change_feed_events_total{labels(collection=name)} {count}"
+                  for name, count in sorted(self._events.items())]
+        lines += [
+            "# HELP change_feed_mode Source the change feed is reading from",
+            "# TYPE change_feed_mode gauge",
+            f"change_feed_mode{labels(mode=self.mode)} 1",
+        ]
+        return "\n".join(lines) + "\n"
+
+
+change_feed = ChangeFeed()
@@ -0,0 +1,313 @@
+"""
+Columnar Snapshots
+Per-worker, column-oriented copies of the collections the analytics endpoints
+sum over, held as pandas frames indexed by document id:
+
+    projects            budgets, expenses, PO / invoiced / billing amounts
+    sales_orders        order values and payment status
+    purchase_orders_v2  PO values
+    expenses_v2         expense amounts and approval status
+    hr_payroll          salaries, deductions and employer contributions
+
+Only the numeric, categorical and date fields listed in SNAPSHOTS are kept
+(numerics as float64, low-cardinality strings as pandas categories, dates as
+UTC datetime64), so a snapshot is a small fraction of the documents and
+group-bys and time bucketing run vectorized instead of looping over dicts.
+
+A snapshot is refreshed lazily when read and older than REFRESH_SECONDS:
+
+- collections with a watermark field re-read only documents whose updated_at
+  moved past the last refresh (datetime and ISO string values both), and
+  reload in full when the document count disagrees (deletes) or every
+  FULL_RELOAD_SECONDS as a backstop for writers that skip updated_at
+- collections without one (hr_payroll) reload in full
+
+Write paths in this worker, and the change feed (utils/change_feed.py) for
+writes anywhere else, call mark_stale() so the next read refreshes at once. With COLUMNAR_ANALYTICS=0 nothing is cached and snapshot_frame()
+builds a one-off frame from a projected query, so callers keep a single code
+path. Rows and memory of every snapshot are exported on /metrics.
+"""
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from utils import perf
+from utils.streaming import changed_since, iter_batches
+
+logger = logging.getLogger(__name__)
+
+COLUMNAR_ENABLED = os.environ.get("COLUMNAR_ANALYTICS", "1").lower() not in ("0", "false", "no", "off")
+REFRESH_SECONDS = float(os.environ.get("COLUMNAR_REFRESH_SECONDS", "30"))
+FULL_RELOAD_SECONDS = float(os.environ.get("COLUMNAR_FULL_RELOAD_SECONDS", "600"))
+# Re-read documents this far behind the watermark to cover clock skew between workers
+WATERMARK_OVERLAP = timedelta(seconds=5)
+LOAD_BATCH_SIZE = 2000
+
+
+@dataclass(frozen=True)
+class SnapshotSpec:
+    """Fields kept for a collection; dotted paths read nested values"""
+    collection: str
+    numeric: Tuple[str, ...] = ()
+    categorical: Tuple[str, ...] = ()
+    dates: Tuple[str, ...] = ()
+    # Free-text fields kept as plain object columns for row lookups
+    labels: Tuple[str, ...] = ()
+    watermark: Optional[str] = "updated_at"
+
+    @property
+    def fields(self) -> Tuple[str, ...]:
+        return self.numeric + self.categorical + self.dates + self.labels
+
+    @property
+    def projection(self) -> dict:
+        fields = {f: 1 for f in self.fields}
+        if self.watermark:
+            fields[self.watermark] = 1
+        return {"_id": 0, "id": 1, **fields}
+
+
+SNAPSHOTS: Dict[str, SnapshotSpec] = {
+    "projects": SnapshotSpec(
+        "projects",
+        numeric=("budget", "actual_expenses", "pid_savings", "po_amount", "invoiced_amount",
+                 "this_week_billing", "completion_percentage"),
+        categorical=("status", "category", "client"),
+        dates=("created_at",),
+        labels=("pid_no", "project_name"),
+    ),
+    "sales_orders": SnapshotSpec(
+        "sales_orders",
+        numeric=("total_amount",),
+        categorical=("status", "payment_status", "category", "customer_id"),
+        dates=("created_at",),
+    ),
+    "purchase_orders_v2": SnapshotSpec(
+        "purchase_orders_v2",
+        numeric=("total_amount", "received_amount"),
+        categorical=("status", "sales_order_id", "vendor_id"),
+        dates=("created_at",),
+    ),
+    "expenses_v2": SnapshotSpec(
+        "expenses_v2",
+        numeric=("amount",),
+        categorical=("category", "approval_status", "order_id"),
+        dates=("created_at",),
+    ),
+    "hr_payroll": SnapshotSpec(
+        "hr_payroll",
+        numeric=("month", "year", "gross_salary", "net_salary", "total_deductions", "ctc",
+                 "deductions.epf", "deductions.esic", "deductions.professional_tax",
+                 "deductions.lop_deduction", "deductions.advance_emi",
+                 "employer_contributions.epf", "employer_contributions.esic"),
+        categorical=("department", "status"),
+        # Payroll records carry no updated_at; every refresh is a full reload
+        watermark=None,
+    ),
+}
+
+
+def _value(doc: dict, path: str):
+    for key in path.split("."):
+        if not isinstance(doc, dict):
+            return None
+        doc = doc.get(key)
+    return doc
+
+
+def build_frame(spec: SnapshotSpec, docs: List[dict]) -> pd.DataFrame:
+    """Typed frame of the spec's columns, indexed by document id"""
+    docs = [d for d in docs if d.get("id")]
+    ids = pd.Index([d["id"] for d in docs], dtype=object, name="id")
+
+    def column(field, dtype=object):
+        return pd.Series([_value(d, field) for d in docs], index=ids, dtype=dtype)
+
+    columns: Dict[str, pd.Series] = {}
+    for field in spec.numeric:
+        columns[field] = pd.to_numeric(column(field), errors="coerce").fillna(0).astype("float64")
+    for field in spec.categorical:
+        columns[field] = column(field).astype("category")
+    for field in spec.dates:
+        columns[field] = pd.to_datetime(column(field), utc=True, errors="coerce", format="ISO8601")
+    for field in spec.labels:
+        columns[field] = column(field)
+    return pd.DataFrame(columns, index=ids)
+
+
+async def load_frame(db, spec: SnapshotSpec, query: Optional[dict] = None) -> pd.DataFrame:
+    """Read matching documents in batches straight into a frame"""
+    docs: List[dict] = []
+    async for batch in iter_batches(db[spec.collection].find(query or {}, spec.projection), LOAD_BATCH_SIZE):
+        docs.extend(batch)
+    return build_frame(spec, docs)
+
+
+class ColumnarSnapshot:
+    """One collection's frame in this worker, refreshed on read"""
+
+    def __init__(self, spec: SnapshotSpec):
+        self.spec = spec
+        self.frame: Optional[pd.DataFrame] = None
+        self.loaded_at = 0.0
+        self.refreshed_at = 0.0
+        self.watermark: Optional[datetime] = None
+        self.stale = True
+        self.full_loads = 0
+        self.delta_loads = 0
+        self._lock = asyncio.Lock()
+
+    def mark_stale(self):
+        self.stale = True
+
+    def _due(self, now: float) -> bool:
+        return self.frame is None or self.stale or now - self.refreshed_at >= REFRESH_SECONDS
+
+    async def get(self, db) -> pd.DataFrame:
+        if not self._due(time.monotonic()):
+            return self.frame
+        async with self._lock:
+            now = time.monotonic()
+            if self._due(now):
+                try:
+                    await self._refresh(db, now)
+                except Exception as e:
+                    if self.frame is None:
+                        raise
+                    # Serve the previous snapshot rather than fail the dashboard
+                    logger.error(f"Error refreshing {self.spec.collection} snapshot: {e}")
+        return self.frame
+
+    async def _refresh(self, db, now: float):
+        spec = self.spec
+        started = datetime.now(timezone.utc)
+        full = (
+            self.frame is None or not spec.watermark or self.watermark is None
+            or now - self.loaded_at >= FULL_RELOAD_SECONDS
+        )
+        if not full:
+            # Mark before reading so a write landing mid-refresh is picked up next time
+            self.stale = False
+            changed = await load_frame(db, spec, changed_since(spec.watermark, self.watermark - WATERMARK_OVERLAP))
+            frame = self.frame
+            if len(changed):
+                frame = pd.concat([frame.drop(index=changed.index, errors="ignore"), changed])
+                for field in spec.categorical:
+                    frame[field] = frame[field].astype("category")
+            if len(frame) == await db[spec.collection].estimated_document_count():
+                self.frame, self.watermark, self.refreshed_at = frame, started, now
+                self.delta_loads += 1
+                return
+            # Rows were deleted (or inserted without updated_at)
+        self.stale = False
+        self.frame = await load_frame(db, spec)
+        self.watermark, self.loaded_at, self.refreshed_at = started, now, now
+        self.full_loads += 1
+
+    def stats(self) -> dict:
+        frame = self.frame
+        return {
+            "collection": self.spec.collection,
+            "rows": len(frame) if frame is not None else 0,
+            "columns": len(frame.columns) if frame is not None else 0,
+            "memory_bytes": int(frame.memory_usage(deep=True).sum()) if frame is not None else 0,
+            "age_seconds": round(time.monotonic() - self.refreshed_at, 1) if frame is not None else None,
+            "full_loads": self.full_loads,
+            "delta_loads": self.delta_loads,
+        }
+
+
+_snapshots: Dict[str, ColumnarSnapshot] = {name: ColumnarSnapshot(spec) for name, spec in SNAPSHOTS.items()}
+
+
+async def snapshot_frame(db, name: str) -> pd.DataFrame:
+    """The current frame of a snapshot (a one-off load when snapshots are disabled)"""
+    if not COLUMNAR_ENABLED:
+        return await load_frame(db, SNAPSHOTS[name])
+    return await _snapshots[name].get(db)
+
+
+def mark_stale(*names: str):
+    """Refresh these snapshots on their next read (called after writes in this worker)"""
+    for name in names:
+        _snapshots[name].mark_stale()
+
+
+def snapshot_stats() -> List[dict]:
+    return [s.stats() for s in _snapshots.values()]
+
+
+# ---------------------------------------------------------------------------
+# Vectorized helpers
+# ---------------------------------------------------------------------------
+
+def _key(value):
+    """Group key as a plain Python value (None for missing)"""
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    return value.item() if hasattr(value, "item") else value
+
+
+def rows(frame: pd.DataFrame, ids, columns: Sequence[str]) -> Dict[str, dict]:
+    """id -> {column: plain value} for the ids present in the frame"""
+    picked = frame.loc[frame.index.intersection(list(ids)), list(columns)]
+    return {
+        row_id: {c: _key(v) for c, v in zip(columns, values)}
+        for row_id, values in zip(picked.index, picked.itertuples(index=False, name=None))
+    }
+
+
+def totals(frame: pd.DataFrame, columns: Sequence[str]) -> Dict[str, float]:
+    """Column sums as plain floats"""
+    sums = frame[list(columns)].sum()
+    return {c: float(sums[c]) for c in columns}
+
+
+def group_sum(frame: pd.DataFrame, by: str, columns: Sequence[str]) -> Dict[Any, dict]:
+    """group value -> {"count", *columns} summed per group; missing values group under None"""
+    grouped = frame.groupby(by, observed=True, dropna=False, sort=False)
+    sums = grouped[list(columns)].sum()
+    counts = grouped.size()
+    return {
+        _key(group): {"count": int(counts[group]), **{c: float(row[c]) for c in columns}}
+        for group, row in sums.iterrows()
+    }
+
+
+BUCKET_FORMATS = {"day": "%Y-%m-%d", "week": "%Y-%m-%d", "month": "%Y-%m", "year": "%Y"}
+
+
+def bucket_keys(dates: pd.Series, bucket: str) -> pd.Series:
+    """Bucket label of each date; weeks are labelled by their Monday"""
+    if bucket == "week":
+        dates = dates - pd.to_timedelta(dates.dt.weekday, unit="D")
+    return dates.dt.strftime(BUCKET_FORMATS[bucket])
+
+
+def bucket_sum(frame: pd.DataFrame, date_column: str, bucket: str, columns: Sequence[str]) -> Dict[str, dict]:
+    """bucket label -> {"count", *columns}; rows without a date are left out"""
+    dated = frame[frame[date_column].notna()]
+    return group_sum(dated.assign(_bucket=bucket_keys(dated[date_column], bucket)), "_bucket", columns)
+
+
+def render_metrics() -> str:
+    """Snapshot sizes in Prometheus text format, appended to /metrics"""
+    labels = perf._labels
+    stats = snapshot_stats()
+    lines = [
+        "# HELP columnar_snapshot_rows Rows held in the worker's columnar snapshot",
+        "# TYPE columnar_snapshot_rows gauge",
+    ]
+    lines += [f"columnar_snapshot_rows{labels(collection=s['collection'])} {s['rows']}" for s in stats]
+    lines += [
+        "# HELP columnar_snapshot_memory_bytes Memory used by the worker's columnar snapshot",
+        "# TYPE columnar_snapshot_memory_bytes gauge",
+    ]
+    lines += [f"columnar_snapshot_memory_bytes{labels(collection=s['collection'])} {s['memory_bytes']}" for s in stats]
+    return "\n".join(lines) + "\n"
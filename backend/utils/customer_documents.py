@@ -0,0 +1,294 @@
+"""
+Customer Document Index
+Precomputed `customer_document_index` collection listing every document a
+customer portal account may see:
+
+    {customer_id, doc_type, doc_id, project_id, date, title, status, source}
+
+A customer can see the projects linked to them (Customer Hub links, their
+AMCs' projects and projects of the same canonical customer), every report,
+certificate and AMC on those projects, reports attached to their AMC service
+visits, and documents explicitly shared with them.
+
+The portal reads this index with single indexed range scans. It is rebuilt
+per customer when links, AMCs or shares change, and new project documents
+(reports, WCCs) are appended to the customers that can see their project.
+"""
+import logging
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional
+
+from pymongo import ReplaceOne
+
+from utils.indexes import apply_indexes, index, register_indexes
+
+logger = logging.getLogger(__name__)
+
+# doc_type -> source collection, title fields and date fields (first non-empty wins)
+DOCUMENT_TYPES: Dict[str, dict] = {
+    "project": {"collection": "projects", "title": ["pid_no", "project_name"], "date": ["created_at"]},
+    "amc_report": {"collection": "amcs", "title": ["amc_no"], "date": ["created_at"]},
+    "test_report": {"collection": "test_reports", "title": ["report_no", "equipment_name", "equipment_type"],
+                    "date": ["created_at", "test_date"]},
+    "ir_thermography": {"collection": "ir_thermography_reports", "title": ["report_no", "report_type"],
+                        "date": ["created_at"]},
+    "calibration": {"collection": "calibration_reports", "title": ["certificate_no", "report_no"],
+                    "date": ["created_at"]},
+    "wcc": {"collection": "work_completion_certificates", "title": ["wcc_no", "project_name"],
+            "date": ["created_at", "date"]},
+}
+
+# Portal report_type filter values -> doc_type
+REPORT_TYPE_ALIASES = {
+    "test": "test_report",
+    "ir": "ir_thermography",
+    "calibration": "calibration",
+    "wcc": "wcc",
+    "amc": "amc_report",
+}
+
+REPORT_DOC_TYPES = ["test_report", "ir_thermography", "calibration", "wcc", "amc_report"]
+
+
+def _date_value(value) -> str:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value) if value else ""
+
+
+def build_entry(customer_id: str, doc_type: str, doc: dict, source: str, indexed_at: str) -> dict:
+    cfg = DOCUMENT_TYPES[doc_type]
+    title_parts = [str(doc[f]) for f in cfg["title"] if doc.get(f)]
+    date = next((doc[f] for f in cfg["date"] if doc.get(f)), None)
+    return {
+        "customer_id": customer_id,
+        "doc_type": doc_type,
+        "doc_id": doc["id"],
+        "project_id": doc["id"] if doc_type == "project" else doc.get("project_id"),
+        "date": _date_value(date),
+        "title": " - ".join(title_parts[:2]),
+        "status": doc.get("status"),
+        "source": source,
+        "indexed_at": indexed_at,
+    }
+
+
+def _projection(doc_type: str) -> dict:
+    cfg = DOCUMENT_TYPES[doc_type]
+    return {"_id": 0, "id": 1, "project_id": 1, "status": 1, **{f: 1 for f in cfg["title"] + cfg["date"]}}
+
+
+register_indexes(__name__, {
+    "customer_document_index": [
+        index("customer_id", "doc_type", "doc_id", unique=True),
+        index("customer_id", "doc_type", ("date", -1)),
+        index("customer_id", ("date", -1)),
+        index("doc_type", "project_id"),
+        index("doc_id"),
+    ],
+})
+
+
+async def ensure_customer_document_indexes(db):
+    await apply_indexes(db, ["customer_document_index"])
+
+
+async def rebuild_customer_documents(db, customer: dict) -> int:
+    """Recompute the document index entries of one portal customer"""
+    customer_id = customer["id"]
+    indexed_at = datetime.now(timezone.utc).isoformat()
+
+    # AMCs belonging to the customer
+    amc_match: List[dict] = [{"id": {"$in": customer.get("linked_amcs") or []}}]
+    if customer.get("email"):
+        amc_match.append({"customer_info.email": customer["email"]})
+    if customer.get("customer_id"):
+        amc_match.append({"customer_id": customer["customer_id"]})
+    amcs = await db.amcs.find(
+        {"$or": amc_match},
+        {"_id": 0, "id": 1, "project_id": 1,
+         "service_visits.test_report_ids": 1, "service_visits.ir_thermography_report_ids": 1}
+    ).to_list(None)
+
+    # Projects the customer can see
+    project_ids = set(customer.get("linked_projects") or [])
+    project_ids.update(a["project_id"] for a in amcs if a.get("project_id"))
+    if customer.get("customer_id"):
+        project_ids.update(
+            p["id"] for p in await db.projects.find(
+                {"customer_id": customer["customer_id"]}, {"_id": 0, "id": 1}
+            ).to_list(None)
+        )
+
+    # Documents reachable without a project: visit attachments, matched AMCs and shares
+    explicit: Dict[str, set] = {doc_type: set() for doc_type in DOCUMENT_TYPES}
+    explicit["amc_report"].update(a["id"] for a in amcs)
+    for amc in amcs:
+        for visit in amc.get("service_visits") or []:
+            explicit["test_report"].update(visit.get("test_report_ids") or [])
+            explicit["ir_thermography"].update(visit.get("ir_thermography_report_ids") or [])
+
+    shared_ids: Dict[str, set] = {doc_type: set() for doc_type in DOCUMENT_TYPES}
+    async for share in db.shared_documents.find({"customer_id": customer_id}, {"_id": 0}):
+        if share.get("document_type") in shared_ids:
+            shared_ids[share["document_type"]].add(share["document_id"])
+            explicit[share["document_type"]].add(share["document_id"])
+
+    operations = []
+    for doc_type, cfg in DOCUMENT_TYPES.items():
+        if doc_type == "project":
+            query = {"id": {"$in": list(project_ids)}}
+        else:
+            query = {"$or": [{"id": {"$in": list(explicit[doc_type])}},
+                             {"project_id": {"$in": list(project_ids)}}]}
+        async for doc in db[cfg["collection"]].find(query, _projection(doc_type)):
+            if not doc.get("id"):
+                continue
+            source = "shared" if doc["id"] in shared_ids[doc_type] else "linked"
+            entry = build_entry(customer_id, doc_type, doc, source, indexed_at)
+            operations.append(ReplaceOne(
+                {"customer_id": customer_id, "doc_type": doc_type, "doc_id": doc["id"]}, entry, upsert=True
+            ))
+
+    if operations:
+        await db.customer_document_index.bulk_write(operations, ordered=False)
+    # Entries not rewritten by this rebuild are no longer accessible
+    await db.customer_document_index.delete_many({"customer_id": customer_id, "indexed_at": {"$lt": indexed_at}})
+    await db.customers.update_one({"id": customer_id}, {"$set": {"documents_indexed_at": indexed_at}})
+    customer["documents_indexed_at"] = indexed_at
+    return len(operations)
+
+
+async def ensure_customer_documents(db, customer: dict):
+    """Build a customer's entries on first portal access"""
+    if not customer.get("documents_indexed_at"):
+        await rebuild_customer_documents(db, customer)
+
+
+async def refresh_customer_documents(db, customer_ids: Iterable[str]):
+    """Rebuild the entries of the given customers; failures are logged, not raised"""
+    ids = [i for i in set(customer_ids) if i]
+    if not ids:
+        return
+    try:
+        async for customer in db.customers.find({"id": {"$in": ids}}, {"_id": 0, "password_hash": 0}):
+            await rebuild_customer_documents(db, customer)
+    except Exception as e:
+        logger.error(f"Customer document index refresh failed: {e}")
+
+
+async def refresh_documents_for_amc(db, amc_id: str):
+    """Rebuild every customer an AMC (or its visits) is or was visible to"""
+    try:
+        amc = await db.amcs.find_one(
+            {"id": amc_id}, {"_id": 0, "project_id": 1, "customer_id": 1, "customer_info.email": 1}
+        )
+        match: List[dict] = [{"linked_amcs": amc_id}]
+        if amc:
+            if (amc.get("customer_info") or {}).get("email"):
+                match.append({"email": amc["customer_info"]["email"]})
+            if amc.get("customer_id"):
+                match.append({"customer_id": amc["customer_id"]})
+            if amc.get("project_id"):
+                match.append({"linked_projects": amc["project_id"]})
+        customer_ids = {c["id"] for c in await db.customers.find({"$or": match}, {"_id": 0, "id": 1}).to_list(None)}
+        customer_ids.update(await db.customer_document_index.distinct("customer_id", {"doc_id": amc_id}))
+    except Exception as e:
+        logger.error(f"Customer document index refresh failed for AMC {amc_id}: {e}")
+        return
+    await refresh_customer_documents(db, customer_ids)
+
+
+async def add_project_document(db, doc_type: str, doc: dict):
+    """Append a new or updated project document to every customer who can see its project"""
+    if not doc.get("id") or not doc.get("project_id"):
+        return
+    try:
+        customer_ids = await db.customer_document_index.distinct(
+            "customer_id", {"doc_type": "project", "doc_id": doc["project_id"]}
+        )
+        indexed_at = datetime.now(timezone.utc).isoformat()
+        operations = [
+            ReplaceOne(
+                {"customer_id": cid, "doc_type": doc_type, "doc_id": doc["id"]},
+                build_entry(cid, doc_type, doc, "linked", indexed_at),
+                upsert=True,
+            )
+            for cid in customer_ids
+        ]
+        if operations:
+            await db.customer_document_index.bulk_write(operations, ordered=False)
+    except Exception as e:
+        logger.error(f"Customer document index update failed for {doc_type} {doc.get('id')}: {e}")
+
+
+async def remove_document(db, doc_type: str, doc_id: str):
+    """Drop a deleted document from every customer's index"""
+    try:
+        await db.customer_document_index.delete_many({"doc_type": doc_type, "doc_id": doc_id})
+    except Exception as e:
+        logger.error(f"Customer document index delete failed for {doc_type} {doc_id}: {e}")
+
+
+async def customer_document_ids(db, customer_id: str, doc_type: str) -> List[str]:
+    entries = await db.customer_document_index.find(
+        {"customer_id": customer_id, "doc_type": doc_type}, {"_id": 0, "doc_id": 1}
+    ).to_list(None)
+    return [e["doc_id"] for e in entries]
+
+
+async def has_document_access(db, customer_id: str, doc_types: List[str], doc_id: str) -> Optional[dict]:
+    return await db.customer_document_index.find_one(
+        {"customer_id": customer_id, "doc_type": {"$in": doc_types}, "doc_id": doc_id}, {"_id": 0}
+    )
+
+
+async def customer_document_counts(db, customer_id: str) -> Dict[str, int]:
+    """Document counts per doc_type from one indexed scan"""
+    pipeline = [
+        {"$match": {"customer_id": customer_id}},
+        {"$group": {"_id": "$doc_type", "count": {"$sum": 1}}},
+    ]
+    return {row["_id"]: row["count"] async for row in db.customer_document_index.aggregate(pipeline)}
+
+
+async def list_customer_documents(
+    db,
+    customer_id: str,
+    doc_types: List[str],
+    skip: int = 0,
+    limit: int = 50,
+    hydrate: bool = True,
+) -> Dict[str, object]:
+    """
+    One page of a customer's documents, newest first.
+
+    With hydrate=True the full source documents are loaded for the page
+    (one $in query per document type) and tagged with `report_category`.
+    """
+    query = {"customer_id": customer_id, "doc_type": {"$in": doc_types}}
+    total = await db.customer_document_index.count_documents(query)
+    entries = await db.customer_document_index.find(query, {"_id": 0}) \
+        .sort([("date", -1), ("doc_id", 1)]).skip(skip).limit(limit).to_list(limit)
+    if not hydrate:
+        return {"items": entries, "total": total}
+
+    ids_by_type: Dict[str, List[str]] = {}
+    for entry in entries:
+        ids_by_type.setdefault(entry["doc_type"], []).append(entry["doc_id"])
+    docs: Dict[tuple, dict] = {}
+    for doc_type, ids in ids_by_type.items():
+        async for doc in db[DOCUMENT_TYPES[doc_type]["collection"]].find({"id": {"$in": ids}}, {"_id": 0}):
+            doc["report_category"] = doc_type
+            docs[(doc_type, doc["id"])] = doc
+    items = [docs[(e["doc_type"], e["doc_id"])] for e in entries if (e["doc_type"], e["doc_id"]) in docs]
+    return {"items": items, "total": total}
+
+
+async def rebuild_all_customer_documents(db) -> int:
+    """Rebuild the index for every portal customer"""
+    count = 0
+    async for customer in db.customers.find({}, {"_id": 0, "password_hash": 0}):
+        await rebuild_customer_documents(db, customer)
+        count += 1
+    return count
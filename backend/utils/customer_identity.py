@@ -0,0 +1,387 @@
+"""
+Customer Identity Resolution
+Clusters customer name variants into canonical customers and keeps an
+indexed `customer_id` on every collection that refers to a customer by name.
+
+The canonical customer is a `clients` document. Resolution keys are stored in
+the `customer_aliases` collection, so resolving a record is one indexed lookup:
+
+    name:<normalized company name>   e.g. "name:sri lakshmi textiles"
+    gst:<GST number>                 e.g. "gst:33AABCS1234F1Z5"
+    domain:<email domain>            business domains only (no gmail etc.)
+
+run_customer_resolution() rebuilds the clusters and aliases and backfills
+`customer_id`; write handlers call assign_customer_id() / register_client()
+to keep it maintained, and register_client() links records created before
+their client.
+"""
+import logging
+import re
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional
+
+from pymongo import UpdateOne
+
+from utils.indexes import apply_indexes, index, register_indexes
+from utils.search import normalize_text
+
+logger = logging.getLogger(__name__)
+
+# Collections that reference a customer, with the fields used to resolve them
+IDENTITY_TARGETS: Dict[str, dict] = {
+    "projects": {"name": "client"},
+    "sales_enquiries": {"name": "company_name", "email": "contact_email"},
+    "sales_quotations": {"name": "customer_name", "gst": "customer_gst", "email": "customer_email"},
+    "sales_orders": {"name": "customer_name", "gst": "customer_gst", "email": "customer_email"},
+    "customers": {"name": "company_name", "gst": "gst_number", "email": "email"},
+    "amcs": {"name": "customer_info.customer_name", "email": "customer_info.email"},
+}
+
+# Legal-form and filler words ignored when comparing company names
+NAME_STOPWORDS = {
+    "m", "s", "ms", "the", "pvt", "private", "ltd", "limited", "llp", "inc",
+    "co", "company", "corp", "corporation", "india", "p",
+}
+
+# Email domains shared by unrelated customers never identify a company
+PUBLIC_EMAIL_DOMAINS = {
+    "gmail.com", "yahoo.com", "yahoo.co.in", "hotmail.com", "outlook.com",
+    "rediffmail.com", "live.com", "icloud.com", "protonmail.com", "ymail.com",
+}
+
+_GST_PATTERN = re.compile(r"^[0-9]{2}[A-Z0-9]{13}$")
+
+
+def name_key(name) -> Optional[str]:
+    """Normalized company name with legal suffixes removed"""
+    tokens = [t for t in normalize_text(name).split() if t not in NAME_STOPWORDS]
+    return " ".join(tokens) or None
+
+
+def gst_key(gst) -> Optional[str]:
+    value = re.sub(r"\s+", "", str(gst or "")).upper()
+    return value if _GST_PATTERN.match(value) else None
+
+
+def domain_key(email) -> Optional[str]:
+    email = str(email or "").strip().lower()
+    if "@" not in email:
+        return None
+    domain = email.rsplit("@", 1)[1]
+    return domain if domain and domain not in PUBLIC_EMAIL_DOMAINS else None
+
+
+def identity_keys(name=None, gst=None, email=None) -> List[str]:
+    """Alias keys for a record, strongest first (GST, then name, then email domain)"""
+    keys = []
+    if gst_key(gst):
+        keys.append(f"gst:{gst_key(gst)}")
+    if name_key(name):
+        keys.append(f"name:{name_key(name)}")
+    if domain_key(email):
+        keys.append(f"domain:{domain_key(email)}")
+    return keys
+
+
+def _get_path(doc: dict, path: Optional[str]):
+    if not path:
+        return None
+    value = doc
+    for part in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def _record_keys(doc: dict, fields: dict) -> List[str]:
+    return identity_keys(
+        _get_path(doc, fields.get("name")),
+        _get_path(doc, fields.get("gst")),
+        _get_path(doc, fields.get("email")),
+    )
+
+
+def _pick(keys: List[str], aliases: Dict[str, str]) -> Optional[str]:
+    for key in keys:
+        if key in aliases:
+            return aliases[key]
+    return None
+
+
+register_indexes(__name__, {
+    "customer_aliases": [
+        index("key", unique=True),
+        index("customer_id"),
+    ],
+    **{collection_name: [index("customer_id")] for collection_name in IDENTITY_TARGETS},
+})
+
+
+async def ensure_identity_indexes(db):
+    """Create the customer_id indexes used by 360 views and the alias lookup index"""
+    await apply_indexes(db, ["customer_aliases", *IDENTITY_TARGETS])
+
+
+async def resolve_customer_id(db, name=None, gst=None, email=None) -> Optional[str]:
+    """Canonical customer id for a name/GST/email, or None if unknown"""
+    keys = identity_keys(name, gst, email)
+    if not keys:
+        return None
+    docs = await db.customer_aliases.find({"key": {"$in": keys}}, {"_id": 0}).to_list(len(keys))
+    return _pick(keys, {d["key"]: d["customer_id"] for d in docs})
+
+
+async def customer_cluster_ids(db, customer_id: str) -> List[str]:
+    """The canonical id plus ids of duplicate clients merged into it"""
+    merged = await db.clients.find({"merged_into": customer_id}, {"_id": 0, "id": 1}).to_list(None)
+    return [customer_id] + [c["id"] for c in merged]
+
+
+async def assign_customer_id(db, collection_name: str, doc: dict) -> Optional[str]:
+    """
+    Set doc["customer_id"] from the alias table when the caller did not link one.
+
+    Used by write handlers before inserting or after updating a document.
+    """
+    if doc.get("customer_id"):
+        return doc["customer_id"]
+    fields = IDENTITY_TARGETS[collection_name]
+    keys = _record_keys(doc, fields)
+    if not keys:
+        return None
+    docs = await db.customer_aliases.find({"key": {"$in": keys}}, {"_id": 0}).to_list(len(keys))
+    customer_id = _pick(keys, {d["key"]: d["customer_id"] for d in docs})
+    if customer_id:
+        doc["customer_id"] = customer_id
+    return customer_id
+
+
+async def assign_customer_ids(db, collection_name: str, docs: List[dict]) -> int:
+    """Batch version of assign_customer_id for imports (one alias query)"""
+    fields = IDENTITY_TARGETS[collection_name]
+    pending = [(doc, _record_keys(doc, fields)) for doc in docs if not doc.get("customer_id")]
+    all_keys = sorted({k for _, keys in pending for k in keys})
+    if not all_keys:
+        return 0
+    found = await db.customer_aliases.find({"key": {"$in": all_keys}}, {"_id": 0}).to_list(None)
+    aliases = {d["key"]: d["customer_id"] for d in found}
+    assigned = 0
+    for doc, keys in pending:
+        customer_id = _pick(keys, aliases)
+        if customer_id:
+            doc["customer_id"] = customer_id
+            assigned += 1
+    return assigned
+
+
+def _identity_changed(fields: dict, changed: Iterable[str]) -> bool:
+    """Whether an update touched any field (or parent object) the identity is resolved from"""
+    roots = {path.split(".")[0] for path in fields.values()}
+    return any(field.split(".")[0] in roots for field in changed)
+
+
+async def relink_customer_id(db, collection_name: str, doc_id: str, changed_fields: Iterable[str] = ()):
+    """
+    Re-resolve a stored document's customer_id after an update.
+
+    Unlinked documents are always resolved. Linked ones are re-resolved when
+    changed_fields touch their name, GST or email (e.g. a company rename),
+    unless the update set customer_id itself.
+    """
+    fields = IDENTITY_TARGETS[collection_name]
+    changed = set(changed_fields)
+    if "customer_id" in changed:
+        return
+    projection = {"_id": 0, "customer_id": 1, **{path: 1 for path in fields.values()}}
+    doc = await db[collection_name].find_one({"id": doc_id}, projection)
+    if not doc:
+        return
+    current = doc.pop("customer_id", None)
+    if current and not _identity_changed(fields, changed):
+        return
+    customer_id = await assign_customer_id(db, collection_name, doc)
+    if customer_id != current:
+        # A rename to an unknown company leaves the record unlinked rather than on the old customer
+        await db[collection_name].update_one({"id": doc_id}, {"$set": {"customer_id": customer_id}})
+
+
+async def register_client(db, client: dict, backfill: bool = True):
+    """
+    Add alias keys for a created or updated client without taking over existing
+    keys, then link records created before the client existed (backfill=False
+    leaves that to a later link_unlinked_records call, e.g. in batch seeding).
+    """
+    customer_id = client.get("merged_into") or client.get("id")
+    if not customer_id:
+        return
+    for key in identity_keys(client.get("name"), client.get("gst_number"), client.get("email")):
+        await db.customer_aliases.update_one(
+            {"key": key},
+            {"$setOnInsert": {"key": key, "customer_id": customer_id, "source": "client"}},
+            upsert=True,
+        )
+    if backfill:
+        await link_unlinked_records(db, [customer_id])
+
+
+async def link_unlinked_records(db, customer_ids: Optional[Iterable[str]] = None) -> int:
+    """
+    Link records without a customer_id whose name/GST/email now resolves,
+    restricted to customer_ids when given. Like the resolution backfill, one
+    update is issued per distinct name variant.
+    """
+    wanted = set(customer_ids) if customer_ids is not None else None
+    unlinked = {"$or": [{"customer_id": None}, {"customer_id": ""}]}
+    linked = 0
+    for collection_name, fields in IDENTITY_TARGETS.items():
+        collection = db[collection_name]
+        pipeline = [
+            {"$match": unlinked},
+            {"$group": {"_id": {role: f"${path}" for role, path in fields.items()}}},
+        ]
+        groups = []
+        async for group in collection.aggregate(pipeline):
+            values = group["_id"]
+            groups.append((values, identity_keys(values.get("name"), values.get("gst"), values.get("email"))))
+        all_keys = sorted({k for _, keys in groups for k in keys})
+        if not all_keys:
+            continue
+        found = await db.customer_aliases.find({"key": {"$in": all_keys}}, {"_id": 0}).to_list(None)
+        aliases = {d["key"]: d["customer_id"] for d in found}
+        for values, keys in groups:
+            customer_id = _pick(keys, aliases)
+            if not customer_id or (wanted is not None and customer_id not in wanted):
+                continue
+            match = dict(unlinked)
+            for role, path in fields.items():
+                match[path] = values.get(role)
+            result = await collection.update_many(match, {"$set": {"customer_id": customer_id}})
+            linked += result.modified_count
+    return linked
+
+
+async def unregister_client(db, client_id: str):
+    await db.customer_aliases.delete_many({"customer_id": client_id})
+
+
+def _cluster_clients(clients: List[dict]) -> Dict[str, str]:
+    """Union clients sharing a GST number or normalized name; returns id -> canonical id"""
+    parent = {c["id"]: c["id"] for c in clients}
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    owner: Dict[str, str] = {}
+    for client in clients:
+        # Email domains are deliberately not used to merge clients: consultants
+        # and group companies often share one
+        for key in identity_keys(client.get("name"), client.get("gst_number")):
+            if key in owner:
+                a, b = find(owner[key]), find(client["id"])
+                if a != b:
+                    # Oldest client (clients are sorted by created_at) stays canonical
+                    parent[b] = a
+            else:
+                owner[key] = client["id"]
+    return {client_id: find(client_id) for client_id in parent}
+
+
+async def run_customer_resolution(db) -> dict:
+    """
+    Rebuild customer clusters and aliases, then backfill customer_id everywhere.
+
+    Updates are issued per distinct name variant (update_many), so the cost is
+    proportional to the number of distinct customer names rather than records.
+    """
+    started = datetime.now(timezone.utc)
+    clients = await db.clients.find(
+        {}, {"_id": 0, "id": 1, "name": 1, "gst_number": 1, "email": 1, "created_at": 1}
+    ).to_list(None)
+    clients.sort(key=lambda c: str(c.get("created_at") or ""))
+    canonical = _cluster_clients(clients)
+
+    # Mark duplicates; clear stale marks on clients that are canonical again
+    merge_ops = [
+        UpdateOne({"id": cid}, {"$set": {"merged_into": target}} if target != cid else {"$unset": {"merged_into": ""}})
+        for cid, target in canonical.items()
+    ]
+    if merge_ops:
+        await db.clients.bulk_write(merge_ops, ordered=False)
+
+    aliases: Dict[str, str] = {}
+    for client in clients:
+        target = canonical[client["id"]]
+        for key in identity_keys(client.get("name"), client.get("gst_number")):
+            aliases.setdefault(key, target)
+        domain = domain_key(client.get("email"))
+        if domain:
+            # A domain shared by several canonical customers is ambiguous
+            key = f"domain:{domain}"
+            aliases[key] = target if aliases.get(key, target) == target else None
+    aliases = {k: v for k, v in aliases.items() if v}
+
+    await db.customer_aliases.delete_many({})
+    if aliases:
+        await db.customer_aliases.insert_many(
+            [{"key": k, "customer_id": v, "source": "resolution"} for k, v in aliases.items()]
+        )
+
+    stats = {"clients": len(clients), "merged_clients": sum(1 for c, t in canonical.items() if c != t),
+             "aliases": len(aliases), "collections": {}}
+
+    for collection_name, fields in IDENTITY_TARGETS.items():
+        stats["collections"][collection_name] = await _backfill_collection(db, collection_name, fields, aliases, canonical)
+
+    stats["duration_seconds"] = round((datetime.now(timezone.utc) - started).total_seconds(), 2)
+    await db.customer_resolution_runs.insert_one({**stats, "run_at": started.isoformat()})
+    logger.info(f"Customer resolution complete: {stats}")
+    return stats
+
+
+async def _backfill_collection(db, collection_name: str, fields: dict, aliases: Dict[str, str],
+                               canonical: Dict[str, str]) -> dict:
+    collection = db[collection_name]
+
+    # Re-point records linked to a client that was merged into another
+    remapped = 0
+    for client_id, target in canonical.items():
+        if client_id != target:
+            result = await collection.update_many({"customer_id": client_id}, {"$set": {"customer_id": target}})
+            remapped += result.modified_count
+
+    # Group unlinked records by their distinct name/GST/email combination
+    group_id = {role: f"${path}" for role, path in fields.items()}
+    pipeline = [
+        {"$match": {"$or": [{"customer_id": None}, {"customer_id": ""}]}},
+        {"$group": {"_id": group_id, "count": {"$sum": 1}}},
+    ]
+    linked = unresolved = 0
+    async for group in collection.aggregate(pipeline):
+        values = group["_id"]
+        keys = identity_keys(values.get("name"), values.get("gst"), values.get("email"))
+        customer_id = _pick(keys, aliases)
+        if not customer_id:
+            unresolved += group["count"]
+            continue
+        match = {"$or": [{"customer_id": None}, {"customer_id": ""}]}
+        for role, path in fields.items():
+            match[path] = values.get(role)
+        result = await collection.update_many(match, {"$set": {"customer_id": customer_id}})
+        linked += result.modified_count
+
+    return {"linked": linked, "remapped": remapped, "unresolved": unresolved}
+
+
+async def initialize_customer_identity(db):
+    """Create indexes and run the resolution once if aliases have never been built"""
+    try:
+        await ensure_identity_indexes(db)
+        if await db.customer_aliases.estimated_document_count() == 0:
+            await run_customer_resolution(db)
+    except Exception as e:
+        logger.error(f"Error initializing customer identity: {e}")
+
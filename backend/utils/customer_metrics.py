@@ -0,0 +1,247 @@
+"""
+Customer Metrics
+Maintains a `customer_metrics` collection with one row per domestic client
+holding its enquiry history rolled up on the canonical customer_id (see
+utils/customer_identity.py):
+
+    total_enquiries, total_value, won_orders, won_value, pending_enquiries,
+    open_quotes, first_enquiry_at, last_enquiry_at, oldest_open_quote_at
+
+Targeting used to pull every client plus distinct() lists of enquiry company
+names and compare them in Python, and the customer list ran one aggregation
+per customer. With the rows precomputed, every segment is an indexed range
+query that can be counted and paginated:
+
+- prospect         no enquiries yet
+- active           an enquiry within ACTIVE_DAYS
+- dormant          enquiries, but none within ACTIVE_DAYS
+- high_value       won value in the top HIGH_VALUE_SHARE of customers with wins
+- needs_follow_up  a quote open for more than FOLLOW_UP_DAYS
+
+Segments that depend on "now" are evaluated at query time against the stored
+dates, so rows only change when enquiries or clients do. Write paths call
+refresh_customer_metrics() with the customer ids they touched;
+rebuild_customer_metrics() regenerates everything (first start, nightly job
+and after identity resolution).
+"""
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional
+
+from pymongo import DeleteMany, ReplaceOne
+
+from utils.indexes import apply_indexes, index, register_indexes
+from utils.streaming import find_by_ids, iter_batches
+
+logger = logging.getLogger(__name__)
+
+REBUILD_BATCH_SIZE = 500
+
+SEGMENTED_CUSTOMER_TYPE = "domestic"
+ACTIVE_DAYS = 180
+FOLLOW_UP_DAYS = 14
+HIGH_VALUE_SHARE = 0.2
+
+WON_STATUSES = ["accepted", "invoiced"]
+CLOSED_STATUSES = WON_STATUSES + ["declined"]
+FOLLOW_UP_STATUSES = ["quoted", "negotiation"]
+
+SEGMENTS = ["prospect", "active", "dormant", "high_value", "needs_follow_up"]
+
+# Sort keys of the customer list: name -> (field, direction)
+SORT_FIELDS = {
+    "name": ("name", 1),
+    "enquiries": ("total_enquiries", -1),
+    "value": ("total_value", -1),
+    "orders": ("won_orders", -1),
+    "won_value": ("won_value", -1),
+    "last_enquiry": ("last_enquiry_at", -1),
+    "follow_up": ("oldest_open_quote_at", 1),
+}
+
+CLIENT_PROJECTION = {
+    "_id": 0, "id": 1, "name": 1, "contact_person": 1, "phone": 1, "email": 1,
+    "location": 1, "city": 1, "customer_type": 1, "merged_into": 1,
+}
+
+register_indexes(__name__, {
+    "customer_metrics": [
+        index("customer_id", unique=True),
+        index("canonical_id"),
+        index("is_canonical", "name"),
+        index("is_canonical", "total_enquiries"),
+        index("is_canonical", ("last_enquiry_at", -1)),
+        index("is_canonical", ("won_value", -1)),
+        index("is_canonical", "oldest_open_quote_at"),
+    ],
+})
+
+
+# ---------------------------------------------------------------------------
+# Maintenance
+# ---------------------------------------------------------------------------
+
+async def _enquiry_stats(db, canonical_ids: List[str]) -> Dict[str, dict]:
+    """Enquiry rollups for the given canonical customer ids, in one aggregation"""
+    if not canonical_ids:
+        return {}
+    stats = await db.sales_enquiries.aggregate([
+        {"$match": {"customer_id": {"$in": canonical_ids}}},
+        {"$group": {
+            "_id": "$customer_id",
+            "total_enquiries": {"$sum": 1},
+            "total_value": {"$sum": {"$ifNull": ["$value", 0]}},
+            "won_orders": {"$sum": {"$cond": [{"$in": ["$status", WON_STATUSES]}, 1, 0]}},
+            "won_value": {"$sum": {"$cond": [{"$in": ["$status", WON_STATUSES]}, {"$ifNull": ["$value", 0]}, 0]}},
+            "pending_enquiries": {"$sum": {"$cond": [{"$in": ["$status", CLOSED_STATUSES]}, 0, 1]}},
+            "open_quotes": {"$sum": {"$cond": [{"$in": ["$status", FOLLOW_UP_STATUSES]}, 1, 0]}},
+            "first_enquiry_at": {"$min": "$created_at"},
+            "last_enquiry_at": {"$max": "$created_at"},
+            # $min skips the nulls produced for enquiries that are not open quotes
+            "oldest_open_quote_at": {"$min": {"$cond": [{"$in": ["$status", FOLLOW_UP_STATUSES]}, "$created_at", None]}},
+        }},
+    ]).to_list(None)
+    return {s.pop("_id"): s for s in stats}
+
+
+EMPTY_STATS = {
+    "total_enquiries": 0, "total_value": 0, "won_orders": 0, "won_value": 0,
+    "pending_enquiries": 0, "open_quotes": 0,
+    "first_enquiry_at": None, "last_enquiry_at": None, "oldest_open_quote_at": None,
+}
+
+
+async def _write_rows(db, clients: List[dict], customer_ids: List[str]) -> int:
+    """Replace the rows of customer_ids with rows built from clients; other ids lose their rows"""
+    built_at = datetime.now(timezone.utc)
+    clients = [c for c in clients if c.get("customer_type") == SEGMENTED_CUSTOMER_TYPE]
+    stats = await _enquiry_stats(db, list({c.get("merged_into") or c["id"] for c in clients}))
+    operations = []
+    for c in clients:
+        canonical_id = c.get("merged_into") or c["id"]
+        row = {
+            "customer_id": c["id"],
+            "canonical_id": canonical_id,
+            "is_canonical": canonical_id == c["id"],
+            **{k: c.get(k) for k in ("name", "contact_person", "phone", "email", "location", "city")},
+            **EMPTY_STATS,
+            **stats.get(canonical_id, {}),
+            "built_at": built_at,
+        }
+        operations.append(ReplaceOne({"customer_id": c["id"]}, row, upsert=True))
+    # Deleted, merged-away or non-domestic clients (rows from a newer concurrent refresh are kept)
+    operations.append(DeleteMany({"customer_id": {"$in": customer_ids}, "built_at": {"$lt": built_at}}))
+    await db.customer_metrics.bulk_write(operations, ordered=True)
+    return len(clients)
+
+
+async def refresh_customer_metrics(db, customer_ids: Iterable[Optional[str]]) -> int:
+    """
+    Recompute the rows of the given customers (client ids or canonical ids).
+    Every client of the affected clusters is rewritten, since they share stats.
+    """
+    ids = list(dict.fromkeys(i for i in customer_ids if i))
+    if not ids:
+        return 0
+    try:
+        touched = await db.clients.find(
+            {"$or": [{"id": {"$in": ids}}, {"merged_into": {"$in": ids}}]}, {"_id": 0, "id": 1, "merged_into": 1}
+        ).to_list(None)
+        canonical_ids = list({c.get("merged_into") or c["id"] for c in touched})
+        clients = await db.clients.find(
+            {"$or": [{"id": {"$in": canonical_ids}}, {"merged_into": {"$in": canonical_ids}}]}, CLIENT_PROJECTION
+        ).to_list(None)
+        return await _write_rows(db, clients, list(dict.fromkeys(ids + [c["id"] for c in clients])))
+    except Exception as e:
+        # Derived data; rebuild_customer_metrics() repairs a failed refresh
+        logger.error(f"Error refreshing customer metrics for {ids}: {e}")
+        return 0
+
+
+async def refresh_enquiry_customer_metrics(db, enquiry_ids: Iterable[Optional[str]]) -> int:
+    """Refresh the customers of the given enquiries (for writes that only know the enquiry id)"""
+    try:
+        enquiries = await find_by_ids(db.sales_enquiries, enquiry_ids, {"_id": 0, "customer_id": 1})
+    except Exception as e:
+        logger.error(f"Error resolving enquiry customers for metrics: {e}")
+        return 0
+    return await refresh_customer_metrics(db, [e.get("customer_id") for e in enquiries])
+
+
+async def rebuild_customer_metrics(db) -> int:
+    """Regenerate every row; returns the number of rows written"""
+    started = datetime.now(timezone.utc)
+    count = 0
+    cursor = db.clients.find({"customer_type": SEGMENTED_CUSTOMER_TYPE}, CLIENT_PROJECTION)
+    async for clients in iter_batches(cursor, REBUILD_BATCH_SIZE):
+        count += await _write_rows(db, clients, [c["id"] for c in clients])
+    # Clients deleted or changed without a refresh
+    await db.customer_metrics.delete_many({"built_at": {"$lt": started}})
+    logger.info(f"Customer metrics rebuilt: {count} customers")
+    return count
+
+
+async def initialize_customer_metrics(db):
+    """Create customer metric indexes and build the collection once if it has never been populated"""
+    try:
+        await apply_indexes(db, ["customer_metrics"])
+        if await db.customer_metrics.estimated_document_count() == 0:
+            await rebuild_customer_metrics(db)
+    except Exception as e:
+        logger.error(f"Error initializing customer metrics: {e}")
+
+
+# ---------------------------------------------------------------------------
+# Segments
+# ---------------------------------------------------------------------------
+
+async def high_value_threshold(db) -> Optional[float]:
+    """Won value of the last customer inside the top HIGH_VALUE_SHARE; None when nobody has won yet"""
+    with_wins = {"is_canonical": True, "won_value": {"$gt": 0}}
+    count = await db.customer_metrics.count_documents(with_wins)
+    if not count:
+        return None
+    rank = max(int(count * HIGH_VALUE_SHARE), 1)
+    rows = await db.customer_metrics.find(with_wins, {"_id": 0, "won_value": 1}).sort(
+        "won_value", -1).skip(rank - 1).limit(1).to_list(1)
+    return rows[0]["won_value"] if rows else None
+
+
+def segment_filters(threshold: Optional[float], now: Optional[datetime] = None) -> Dict[str, dict]:
+    """segment -> customer_metrics filter over canonical customers"""
+    now = now or datetime.now(timezone.utc)
+    active_since = now - timedelta(days=ACTIVE_DAYS)
+    return {
+        "prospect": {"is_canonical": True, "total_enquiries": 0},
+        "active": {"is_canonical": True, "last_enquiry_at": {"$gte": active_since}},
+        "dormant": {"is_canonical": True, "total_enquiries": {"$gt": 0}, "last_enquiry_at": {"$not": {"$gte": active_since}}},
+        # No customer has a negative won value, so a missing threshold matches nobody
+        "high_value": {"is_canonical": True, "won_value": {"$gte": threshold} if threshold else {"$lt": 0}},
+        "needs_follow_up": {"is_canonical": True, "oldest_open_quote_at": {"$lt": now - timedelta(days=FOLLOW_UP_DAYS)}},
+    }
+
+
+# Default ordering of each segment's list
+SEGMENT_SORT = {
+    "prospect": [("name", 1)],
+    "active": [("last_enquiry_at", -1)],
+    "dormant": [("last_enquiry_at", -1)],
+    "high_value": [("won_value", -1)],
+    "needs_follow_up": [("oldest_open_quote_at", 1)],
+}
+
+
+async def segment_counts(db, filters: Dict[str, dict]) -> Dict[str, int]:
+    """Customer count of every segment plus the total, in one $facet"""
+    facets = {name: [{"$match": f}, {"$count": "count"}] for name, f in filters.items()}
+    facets["total"] = [{"$match": {"is_canonical": True}}, {"$count": "count"}]
+    result = await db.customer_metrics.aggregate([{"$facet": facets}]).to_list(1)
+    counts = result[0] if result else {}
+    return {name: (counts.get(name) or [{}])[0].get("count", 0) for name in facets}
+
+
+async def segment_customers(db, segment: str, filters: Dict[str, dict], skip: int = 0, limit: int = 20) -> List[dict]:
+    """One page of a segment's customers in its default order"""
+    return await db.customer_metrics.find(
+        filters[segment], {"_id": 0, "built_at": 0}
+    ).sort(SEGMENT_SORT[segment]).skip(skip).limit(limit).to_list(limit)
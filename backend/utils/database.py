@@ -4,104 +4,108 @@ Database utilities - MongoDB indexes and optimization
 import logging
 from motor.motor_asyncio import AsyncIOMotorClient
 
+from utils.indexes import apply_indexes, index, register_indexes
+
 logger = logging.getLogger(__name__)
 
 
+register_indexes(__name__, {
+    "projects": [
+        index("id", unique=True),
+        index("pid_no"),
+        index("status"),
+        index("category"),
+        index("department"),
+        index("created_at"),
+        index("client", "status"),
+    ],
+    "users": [
+        index("id", unique=True),
+        index("email", unique=True),
+        index("department"),
+        index("role"),
+    ],
+    "amcs": [
+        index("id", unique=True),
+        index("project_id"),
+        index("status"),
+        index("created_at"),
+        index("contract_details.end_date"),
+    ],
+    "test_reports": [
+        index("id", unique=True),
+        index("equipment_type"),
+        index("report_no"),
+        index("customer_name"),
+        index("created_at"),
+        index("equipment_type", ("created_at", -1)),
+    ],
+    "payment_requests": [
+        index("id", unique=True),
+        index("project_id"),
+        index("status"),
+        index("created_at"),
+        index("status", ("created_at", -1)),
+    ],
+    "work_completion_certificates": [
+        index("id", unique=True),
+        index("project_id"),
+        index("document_no"),
+    ],
+    "project_requirements": [
+        index("id", unique=True),
+        index("project_id"),
+        index("type"),
+        index("status"),
+        index("project_id", "status"),
+    ],
+    "weekly_meetings": [
+        index("id", unique=True),
+        index("department"),
+        index("meeting_date"),
+        index("department", ("meeting_date", -1)),
+    ],
+    "department_team": [
+        index("id", unique=True),
+        index("department"),
+        index("email"),
+    ],
+    "scheduled_inspections": [
+        index("id", unique=True),
+        index("equipment_id"),
+        index("status"),
+        index("next_due_date"),
+        index("status", "next_due_date"),
+    ],
+    "password_resets": [
+        index("email"),
+        index("created_at", ttl=3600),  # Auto-delete after 1 hour
+    ],
+    "notifications": [
+        index("id", unique=True),
+        index("user_id"),
+        index("is_read"),
+        index("user_id", "is_read", ("created_at", -1)),
+    ],
+    "customers": [
+        index("id", unique=True),
+        index("name"),
+        index("email"),
+    ],
+    "vendors": [
+        index("id", unique=True),
+        index("name"),
+    ],
+})
+
+
 async def create_indexes(db):
-    """Create database indexes for improved query performance"""
+    """Create every registered index for improved query performance"""
     try:
-        # Projects collection indexes
-        await db.projects.create_index("id", unique=True)
-        await db.projects.create_index("pid_no")
-        await db.projects.create_index("status")
-        await db.projects.create_index("category")
-        await db.projects.create_index("department")
-        await db.projects.create_index("created_at")
-        await db.projects.create_index([("client", 1), ("status", 1)])
-        
-        # Users collection indexes
-        await db.users.create_index("id", unique=True)
-        await db.users.create_index("email", unique=True)
-        await db.users.create_index("department")
-        await db.users.create_index("role")
-        
-        # AMC collection indexes
-        await db.amcs.create_index("id", unique=True)
-        await db.amcs.create_index("project_id")
-        await db.amcs.create_index("status")
-        await db.amcs.create_index("created_at")
-        await db.amcs.create_index([("contract_details.end_date", 1)])
-        
-        # Test reports collection indexes
-        await db.test_reports.create_index("id", unique=True)
-        await db.test_reports.create_index("equipment_type")
-        await db.test_reports.create_index("report_no")
-        await db.test_reports.create_index("customer_name")
-        await db.test_reports.create_index("created_at")
-        await db.test_reports.create_index([("equipment_type", 1), ("created_at", -1)])
-        
-        # Payment requests indexes
-        await db.payment_requests.create_index("id", unique=True)
-        await db.payment_requests.create_index("project_id")
-        await db.payment_requests.create_index("status")
-        await db.payment_requests.create_index("created_at")
-        await db.payment_requests.create_index([("status", 1), ("created_at", -1)])
-        
-        # Work completion certificates indexes
-        await db.work_completion_certificates.create_index("id", unique=True)
-        await db.work_completion_certificates.create_index("project_id")
-        await db.work_completion_certificates.create_index("document_no")
-        
-        # Project requirements indexes
-        await db.project_requirements.create_index("id", unique=True)
-        await db.project_requirements.create_index("project_id")
-        await db.project_requirements.create_index("type")
-        await db.project_requirements.create_index("status")
-        await db.project_requirements.create_index([("project_id", 1), ("status", 1)])
-        
-        # Weekly meetings indexes
-        await db.weekly_meetings.create_index("id", unique=True)
-        await db.weekly_meetings.create_index("department")
-        await db.weekly_meetings.create_index("meeting_date")
-        await db.weekly_meetings.create_index([("department", 1), ("meeting_date", -1)])
-        
-        # Department team members indexes
-        await db.department_team.create_index("id", unique=True)
-        await db.department_team.create_index("department")
-        await db.department_team.create_index("email")
-        
-        # Scheduled inspections indexes
-        await db.scheduled_inspections.create_index("id", unique=True)
-        await db.scheduled_inspections.create_index("equipment_id")
-        await db.scheduled_inspections.create_index("status")
-        await db.scheduled_inspections.create_index("next_due_date")
-        await db.scheduled_inspections.create_index([("status", 1), ("next_due_date", 1)])
-        
-        # Password resets indexes (TTL index for auto-cleanup)
-        await db.password_resets.create_index("email")
-        await db.password_resets.create_index(
-            "created_at", 
-            expireAfterSeconds=3600  # Auto-delete after 1 hour
-        )
-        
-        # Notifications indexes
-        await db.notifications.create_index("id", unique=True)
-        await db.notifications.create_index("user_id")
-        await db.notifications.create_index("is_read")
-        await db.notifications.create_index([("user_id", 1), ("is_read", 1), ("created_at", -1)])
-        
-        # Customers indexes
-        await db.customers.create_index("id", unique=True)
-        await db.customers.create_index("name")
-        await db.customers.create_index("email")
-        
-        # Vendors indexes
-        await db.vendors.create_index("id", unique=True)
-        await db.vendors.create_index("name")
-        
+        summary = await apply_indexes(db)
         logger.info("Database indexes created successfully")
-        return True
-        
+        return not summary["failed"]
+
     except Exception as e:
         logger.error(f"Error creating database indexes: {e}")
         return False
@@ -0,0 +1,393 @@
+"""
+Due Items Index
+Maintains a `due_items` collection with one row per upcoming obligation,
+keyed by a real date, across three sources:
+
+- inspection   one row per open scheduled inspection (scheduled_inspections)
+- calibration  one row per meter of an active calibration contract, due on
+               its latest certificate's next_due_date
+- amc_visit    one row per scheduled service visit of an active AMC
+
+The sources keep their dates as strings in several formats, and the meter and
+visit schedules live in nested arrays, so answering "what is due" used to mean
+walking every contract in Python. Rows here carry due_date as a datetime with
+compound indexes, so dashboards and horizon queries are single indexed reads.
+
+Write paths call refresh_due_items() with the kind and the source ids they
+changed; rebuild_due_items() regenerates everything (and runs on first start).
+Recurrence rules for the next occurrence live in next_occurrence().
+"""
+import calendar
+import logging
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Callable, Dict, Iterable, List, Optional
+
+from pymongo import DeleteMany, ReplaceOne
+
+from utils.indexes import apply_indexes, index, register_indexes
+from utils.streaming import find_by_ids, iter_batches
+
+logger = logging.getLogger(__name__)
+
+REBUILD_BATCH_SIZE = 500
+
+register_indexes(__name__, {
+    "due_items": [
+        index("kind", "source_id", "item_key", unique=True),
+        index("status", "due_date"),
+        index("kind", "status", "due_date"),
+        index("source_id", "due_date"),
+        index("customer_id", "due_date"),
+    ],
+})
+
+OPEN = "open"
+PAUSED = "paused"
+
+# frequency -> (months, days) between occurrences
+RECURRENCE = {
+    "daily": (0, 1),
+    "weekly": (0, 7),
+    "biweekly": (0, 14),
+    "fortnightly": (0, 14),
+    "monthly": (1, 0),
+    "bimonthly": (2, 0),
+    "quarterly": (3, 0),
+    "half_yearly": (6, 0),
+    "yearly": (12, 0),
+    "annual": (12, 0),
+}
+DEFAULT_FREQUENCY = "yearly"
+
+DATE_FORMATS = ("%Y-%m-%d", "%d-%m-%Y", "%d/%m/%Y", "%Y/%m/%d")
+
+
+def parse_due_date(value) -> Optional[datetime]:
+    """Midnight datetime for a stored date string (or date/datetime); None when unparseable"""
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        return datetime.combine(value.date(), time())
+    if isinstance(value, date):
+        return datetime.combine(value, time())
+    text = str(value).strip()
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(text[:10], fmt)
+        except ValueError:
+            continue
+    try:
+        return datetime.combine(datetime.fromisoformat(text).date(), time())
+    except ValueError:
+        return None
+
+
+def normalize_frequency(frequency: Optional[str]) -> str:
+    key = (frequency or "").strip().lower().replace("-", "_").replace(" ", "_")
+    return key if key in RECURRENCE else DEFAULT_FREQUENCY
+
+
+def add_months(value: datetime, months: int) -> datetime:
+    """Same day `months` later, clamped to the end of shorter months"""
+    month_index = value.month - 1 + months
+    year, month = value.year + month_index // 12, month_index % 12 + 1
+    return value.replace(year=year, month=month, day=min(value.day, calendar.monthrange(year, month)[1]))
+
+
+def next_occurrence(last_done, frequency: Optional[str]) -> datetime:
+    """Due date of the occurrence after one done on last_done (today when unknown)"""
+    base = parse_due_date(last_done) or today()
+    months, days = RECURRENCE[normalize_frequency(frequency)]
+    return add_months(base, months) + timedelta(days=days)
+
+
+def today() -> datetime:
+    return datetime.combine(date.today(), time())
+
+
+def format_due_date(value: datetime) -> str:
+    return value.strftime("%Y-%m-%d")
+
+
+# ---------------------------------------------------------------------------
+# Row builders, one per source
+# ---------------------------------------------------------------------------
+
+def _row(kind: str, source_id: str, item_key: str, due: datetime, status: str, **fields) -> dict:
+    return {
+        "kind": kind,
+        "source_id": source_id,
+        "item_key": item_key,
+        "due_date": due,
+        "due_on": format_due_date(due),
+        "status": status,
+        **fields,
+    }
+
+
+def inspection_rows(inspection: dict) -> List[dict]:
+    status = inspection.get("status") or "active"
+    if status not in ("active", "scheduled", "paused"):
+        return []
+    due = parse_due_date(inspection.get("next_due_date")) or parse_due_date(inspection.get("start_date"))
+    if not due:
+        return []
+    return [_row(
+        "inspection", inspection["id"], inspection["id"], due,
+        PAUSED if status == "paused" else OPEN,
+        title=inspection.get("title") or inspection.get("equipment_name") or inspection.get("inspection_type"),
+        customer_id=inspection.get("customer_id"),
+        customer_name=inspection.get("customer_name"),
+        location=inspection.get("location"),
+        assigned_to=inspection.get("assigned_to"),
+        frequency=inspection.get("frequency"),
+        last_done=inspection.get("last_inspection_date"),
+        detail={
+            "inspection_type": inspection.get("inspection_type"),
+            "equipment_type": inspection.get("equipment_type"),
+            "reminder_days": inspection.get("reminder_days"),
+        },
+    )]
+
+
+def calibration_rows(contract: dict) -> List[dict]:
+    """Latest certificate per meter; a meter without next_due_date recurs on the contract frequency"""
+    if contract.get("status", "active") != "active":
+        return []
+    details = contract.get("contract_details") or {}
+    customer = contract.get("customer_info") or {}
+    meters = {m.get("id"): m for m in contract.get("meter_list") or [] if m.get("id")}
+
+    latest: Dict[str, dict] = {}
+    for visit in contract.get("calibration_visits") or []:
+        for position, result in enumerate(visit.get("test_results") or []):
+            key = result.get("meter_id") or result.get("certificate_no") or f"{visit.get('id')}:{position}"
+            calibrated = parse_due_date(result.get("calibration_date")) or parse_due_date(visit.get("visit_date"))
+            due = parse_due_date(result.get("next_due_date"))
+            if not due and calibrated:
+                due = next_occurrence(calibrated, details.get("calibration_frequency"))
+            if not due:
+                continue
+            current = latest.get(key)
+            if current is None or (calibrated or datetime.min) >= current["calibrated"]:
+                latest[key] = {"result": result, "calibrated": calibrated or datetime.min, "due": due}
+
+    rows = []
+    for key, entry in latest.items():
+        result = entry["result"]
+        meter = meters.get(result.get("meter_id")) or {}
+        rows.append(_row(
+            "calibration", contract["id"], key, entry["due"], OPEN,
+            title=meter.get("tag_no") or result.get("meter_type") or meter.get("meter_type"),
+            customer_id=contract.get("customer_id"),
+            customer_name=customer.get("customer_name"),
+            location=meter.get("location") or customer.get("site_location"),
+            reference_no=contract.get("contract_no") or details.get("contract_no"),
+            frequency=details.get("calibration_frequency"),
+            last_done=result.get("calibration_date"),
+            detail={
+                "meter_id": result.get("meter_id"),
+                "meter_type": result.get("meter_type") or meter.get("meter_type"),
+                "serial_no": meter.get("serial_no"),
+                "certificate_no": result.get("certificate_no"),
+            },
+        ))
+    return rows
+
+
+def amc_visit_rows(amc: dict) -> List[dict]:
+    if amc.get("status", "active") != "active":
+        return []
+    customer = amc.get("customer_info") or {}
+    rows = []
+    for position, visit in enumerate(amc.get("service_visits") or []):
+        if visit.get("status") not in ("scheduled", "rescheduled"):
+            continue
+        due = parse_due_date(visit.get("visit_date"))
+        if not due:
+            continue
+        rows.append(_row(
+            "amc_visit", amc["id"], visit.get("visit_id") or f"#{position}", due, OPEN,
+            title=visit.get("visit_type"),
+            customer_id=amc.get("customer_id"),
+            customer_name=customer.get("customer_name"),
+            location=customer.get("site_location"),
+            reference_no=amc.get("amc_no"),
+            assigned_to=visit.get("technician_name"),
+            detail=visit,
+        ))
+    return rows
+
+
+@dataclass(frozen=True)
+class DueSource:
+    collection: str
+    projection: dict
+    build: Callable[[dict], List[dict]]
+
+
+DUE_SOURCES: Dict[str, DueSource] = {
+    "inspection": DueSource("scheduled_inspections", {"_id": 0}, inspection_rows),
+    "calibration": DueSource(
+        "calibration_contracts",
+        {"_id": 0, "id": 1, "contract_no": 1, "status": 1, "customer_id": 1, "contract_details": 1,
+         "customer_info": 1, "meter_list": 1, "calibration_visits": 1},
+        calibration_rows,
+    ),
+    "amc_visit": DueSource(
+        "amcs",
+        {"_id": 0, "id": 1, "amc_no": 1, "status": 1, "customer_id": 1, "customer_info": 1, "service_visits": 1},
+        amc_visit_rows,
+    ),
+}
+
+
+# ---------------------------------------------------------------------------
+# Maintenance
+# ---------------------------------------------------------------------------
+
+async def _write_rows(db, kind: str, source_ids: List[str], docs: List[dict]) -> int:
+    """Replace the rows of the given sources with rows built from docs"""
+    built_at = datetime.now(timezone.utc)
+    rows = [row for doc in docs for row in DUE_SOURCES[kind].build(doc)]
+    operations = [
+        ReplaceOne(
+            {"kind": kind, "source_id": row["source_id"], "item_key": row["item_key"]},
+            {**row, "built_at": built_at},
+            upsert=True,
+        )
+        for row in rows
+    ]
+    # Rows not rewritten above belong to completed, cancelled or deleted items;
+    # rows written by a newer concurrent refresh of the same sources are left alone
+    operations.append(DeleteMany({"kind": kind, "source_id": {"$in": source_ids}, "built_at": {"$lt": built_at}}))
+    await db.due_items.bulk_write(operations, ordered=True)
+    return len(rows)
+
+
+async def refresh_due_items(db, kind: str, source_ids: Iterable[Optional[str]]) -> int:
+    """Regenerate the due rows of the given source documents; deleted sources lose their rows"""
+    ids = list(dict.fromkeys(i for i in source_ids if i))
+    if not ids:
+        return 0
+    try:
+        source = DUE_SOURCES[kind]
+        docs = await find_by_ids(db[source.collection], ids, source.projection)
+        return await _write_rows(db, kind, ids, docs)
+    except Exception as e:
+        # Derived data; rebuild_due_items() repairs a failed refresh
+        logger.error(f"Error refreshing {kind} due items for {ids}: {e}")
+        return 0
+
+
+async def rebuild_due_items(db, kinds: Optional[List[str]] = None) -> Dict[str, int]:
+    """Regenerate every row of the given kinds (all by default); returns kind -> row count"""
+    counts = {}
+    for kind in kinds or list(DUE_SOURCES):
+        source = DUE_SOURCES[kind]
+        started = datetime.now(timezone.utc)
+        count = 0
+        async for docs in iter_batches(db[source.collection].find({}, source.projection), REBUILD_BATCH_SIZE):
+            count += await _write_rows(db, kind, [d["id"] for d in docs if d.get("id")], docs)
+        # Sources deleted without a refresh
+        await db.due_items.delete_many({"kind": kind, "built_at": {"$lt": started}})
+        counts[kind] = count
+    logger.info(f"Due items rebuilt: {counts}")
+    return counts
+
+
+async def initialize_due_items(db):
+    """Create due item indexes and build the collection once if it has never been populated"""
+    try:
+        await apply_indexes(db, ["due_items"])
+        if await db.due_items.estimated_document_count() == 0:
+            await rebuild_due_items(db)
+    except Exception as e:
+        logger.error(f"Error initializing due items: {e}")
+
+
+# ---------------------------------------------------------------------------
+# Queries
+# ---------------------------------------------------------------------------
+
+def _count(match: dict) -> List[dict]:
+    return [{"$match": match}, {"$count": "count"}]
+
+
+async def due_summary(db, kind: Optional[str] = None, days_ahead: int = 30) -> dict:
+    """Overdue / today / week / month / horizon counts in one $facet aggregation"""
+    start = today()
+    tomorrow = start + timedelta(days=1)
+    # Upper bounds are exclusive: "within 7 days" includes the seventh day
+    open_match = {"status": OPEN}
+    pipeline = [{"$match": {"kind": kind}}] if kind else []
+    pipeline.append({"$facet": {
+        "by_status": [{"$group": {"_id": "$status", "count": {"$sum": 1}}}],
+        "by_kind": [{"$match": open_match}, {"$group": {"_id": "$kind", "count": {"$sum": 1}}}],
+        "overdue": _count({**open_match, "due_date": {"$lt": start}}),
+        "due_today": _count({**open_match, "due_date": {"$gte": start, "$lt": tomorrow}}),
+        "this_week": _count({**open_match, "due_date": {"$gte": start, "$lt": start + timedelta(days=8)}}),
+        "this_month": _count({**open_match, "due_date": {"$gte": start, "$lt": start + timedelta(days=31)}}),
+        "within_horizon": _count({**open_match, "due_date": {"$gte": start, "$lt": tomorrow + timedelta(days=days_ahead)}}),
+    }})
+
+    facets = (await db.due_items.aggregate(pipeline).to_list(1) or [{}])[0]
+
+    def total(name: str) -> int:
+        counted = facets.get(name) or []
+        return counted[0]["count"] if counted else 0
+
+    by_status = {row["_id"]: row["count"] for row in facets.get("by_status", [])}
+    return {
+        "open": by_status.get(OPEN, 0),
+        "paused": by_status.get(PAUSED, 0),
+        "overdue": total("overdue"),
+        "due_today": total("due_today"),
+        "this_week": total("this_week"),
+        "this_month": total("this_month"),
+        "within_horizon": total("within_horizon"),
+        "days_ahead": days_ahead,
+        "by_kind": {row["_id"]: row["count"] for row in facets.get("by_kind", [])},
+    }
+
+
+def _with_days_remaining(row: dict, start: datetime) -> dict:
+    row["days_remaining"] = (row["due_date"] - start).days
+    return row
+
+
+async def due_within(
+    db,
+    days: int,
+    kinds: Optional[List[str]] = None,
+    source_id: Optional[str] = None,
+    customer_id: Optional[str] = None,
+    include_overdue: bool = True,
+    skip: int = 0,
+    limit: int = 100,
+) -> dict:
+    """Open items due on or before today + days, soonest first"""
+    start = today()
+    due_range = {"$lt": start + timedelta(days=days + 1)}
+    if not include_overdue:
+        due_range["$gte"] = start
+    query = {"status": OPEN, "due_date": due_range}
+    if kinds:
+        query["kind"] = kinds[0] if len(kinds) == 1 else {"$in": kinds}
+    if source_id:
+        query["source_id"] = source_id
+    if customer_id:
+        query["customer_id"] = customer_id
+
+    rows = await db.due_items.find(query, {"_id": 0, "built_at": 0}).sort(
+        [("due_date", 1), ("source_id", 1), ("item_key", 1)]
+    ).skip(skip).limit(limit).to_list(limit)
+    total = await db.due_items.count_documents(query)
+    return {
+        "items": [_with_days_remaining(row, start) for row in rows],
+        "total": total,
+        "days": days,
+        "skip": skip,
+        "limit": limit,
+    }
@@ -0,0 +1,153 @@
+"""
+Index Registry
+Modules declare the indexes their queries need next to the code that issues
+them, and apply_indexes() creates every registered index at startup.
+
+    register_indexes(__name__, {
+        "attendance": [
+            index(("user_id", 1), ("date", 1)),
+        ],
+    })
+
+Applying is idempotent. An index whose key pattern already exists (under any
+name) is left alone, and one that cannot be built (e.g. a unique index over
+duplicate data) is logged and skipped without blocking startup.
+
+index_usage_report() joins the registry with $indexStats so unused, missing
+and unregistered indexes show up in /api/admin/performance/indexes.
+benchmarks/index_audit.py replays endpoint queries through explain() and
+fails on collection scans.
+"""
+import logging
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from pymongo import IndexModel
+from pymongo.errors import OperationFailure
+
+logger = logging.getLogger(__name__)
+
+Key = Tuple[str, int]
+
+
+@dataclass(frozen=True)
+class IndexSpec:
+    keys: Tuple[Key, ...]
+    unique: bool = False
+    sparse: bool = False
+    expire_after_seconds: Optional[int] = None
+
+    @property
+    def name(self) -> str:
+        """Default MongoDB name for this key pattern"""
+        return "_".join(f"{field}_{direction}" for field, direction in self.keys)
+
+    def model(self) -> IndexModel:
+        options = {"name": self.name}
+        if self.unique:
+            options["unique"] = True
+        if self.sparse:
+            options["sparse"] = True
+        if self.expire_after_seconds is not None:
+            options["expireAfterSeconds"] = self.expire_after_seconds
+        return IndexModel(list(self.keys), **options)
+
+
+def index(*keys: Union[str, Key], unique: bool = False, sparse: bool = False, ttl: Optional[int] = None) -> IndexSpec:
+    """Declare an index; a bare field name means ascending"""
+    normalized = tuple((k, 1) if isinstance(k, str) else (k[0], k[1]) for k in keys)
+    return IndexSpec(normalized, unique=unique, sparse=sparse, expire_after_seconds=ttl)
+
+
+# collection -> {key pattern: (spec, declaring module)}
+_registry: Dict[str, Dict[Tuple[Key, ...], Tuple[IndexSpec, str]]] = {}
+
+
+def register_indexes(owner: str, indexes: Dict[str, List[IndexSpec]]):
+    """Add a module's index declarations; the first declaration of a key pattern wins"""
+    for collection, specs in indexes.items():
+        declared = _registry.setdefault(collection, {})
+        for spec in specs:
+            declared.setdefault(spec.keys, (spec, owner))
+
+
+def registered_indexes(collection: Optional[str] = None) -> Dict[str, List[Tuple[IndexSpec, str]]]:
+    names = [collection] if collection else sorted(_registry)
+    return {name: list(_registry.get(name, {}).values()) for name in names}
+
+
+def _key_pattern(info: dict) -> Tuple[Key, ...]:
+    return tuple((field, int(direction)) if isinstance(direction, (int, float)) else (field, direction)
+                 for field, direction in info["key"])
+
+
+async def apply_indexes(db, collections: Optional[Iterable[str]] = None) -> dict:
+    """Create registered indexes that do not exist yet; returns created/existing/failed counts"""
+    summary = {"created": 0, "existing": 0, "failed": []}
+    for collection in (collections or sorted(_registry)):
+        specs = [spec for spec, _ in _registry.get(collection, {}).values()]
+        if not specs:
+            continue
+        try:
+            existing = {_key_pattern(info) for info in (await db[collection].index_information()).values()}
+        except OperationFailure:
+            existing = set()
+        for spec in specs:
+            if spec.keys in existing:
+                summary["existing"] += 1
+                continue
+            try:
+                await db[collection].create_indexes([spec.model()])
+                summary["created"] += 1
+            except OperationFailure as e:
+                logger.error(f"Could not create index {collection}.{spec.name}: {e}")
+                summary["failed"].append(f"{collection}.{spec.name}: {e.details.get('errmsg', e) if e.details else e}")
+    logger.info(
+        f"Indexes applied: {summary['created']} created, {summary['existing']} existing, {len(summary['failed'])} failed"
+    )
+    return summary
+
+
+async def index_usage_report(db, collections: Optional[Iterable[str]] = None) -> List[dict]:
+    """
+    Per collection: every index with its $indexStats usage and whether it is
+    registered, plus registered indexes that are missing from the database.
+    """
+    if collections is None:
+        collections = sorted(set(_registry) | set(await db.list_collection_names()))
+    report = []
+    for collection in collections:
+        declared = _registry.get(collection, {})
+        try:
+            stats = await db[collection].aggregate([{"$indexStats": {}}]).to_list(None)
+        except OperationFailure:
+            stats = []
+        indexes = []
+        present = set()
+        for stat in stats:
+            keys = tuple((field, int(d) if isinstance(d, (int, float)) else d) for field, d in stat["key"].items())
+            present.add(keys)
+            owner = declared.get(keys, (None, None))[1]
+            indexes.append({
+                "name": stat["name"],
+                "key": dict(stat["key"]),
+                "ops": stat["accesses"]["ops"],
+                "since": stat["accesses"]["since"].isoformat() if stat["accesses"].get("since") else None,
+                "registered_by": owner,
+                "unused": stat["accesses"]["ops"] == 0 and stat["name"] != "_id_",
+            })
+        missing = [
+            {"name": spec.name, "key": dict(spec.keys), "registered_by": owner}
+            for keys, (spec, owner) in declared.items() if keys not in present
+        ]
+        if not indexes and not missing:
+            continue
+        indexes.sort(key=lambda i: -i["ops"])
+        report.append({
+            "collection": collection,
+            "indexes": indexes,
+            "missing": missing,
+            "unused": [i["name"] for i in indexes if i["unused"]],
+            "unregistered": [i["name"] for i in indexes if i["registered_by"] is None and i["name"] != "_id_"],
+        })
+    return report
@@ -0,0 +1,261 @@
+"""
+Event Loop Watchdog
+A daemon thread that detects event-loop stalls caused by blocking calls in
+async handlers (smtplib, sync pymongo, ReportLab builds, PIL, requests, ...).
+
+Every LOOP_WATCHDOG_INTERVAL_MS the thread posts a heartbeat callback to the
+loop. When a heartbeat has not run within LOOP_WATCHDOG_THRESHOLD_MS the loop
+is stalled: the thread captures the loop thread's stack and attributes it to
+the route being served (the endpoint on the stack, else the request owning
+the running task). The stall duration is taken when the heartbeat finally
+runs.
+
+Stalls are aggregated per route and per offender (route, innermost
+application frame, innermost frame) and served by
+/api/admin/performance/loop-stalls with a sample stack for each offender.
+"""
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from utils import perf
+
+logger = logging.getLogger(__name__)
+
+STALL_THRESHOLD = float(os.environ.get("LOOP_WATCHDOG_THRESHOLD_MS", "100")) / 1000
+CHECK_INTERVAL = float(os.environ.get("LOOP_WATCHDOG_INTERVAL_MS", "25")) / 1000
+MAX_STACK_DEPTH = 40
+MAX_OFFENDERS = 500
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _frame_label(frame: traceback.FrameSummary) -> str:
+    filename = frame.filename
+    if filename.startswith(BACKEND_DIR + os.sep):
+        filename = filename[len(BACKEND_DIR) + 1:]
+    return f"{filename}:{frame.lineno} in {frame.name}"
+
+
+def _is_application_frame(frame: traceback.FrameSummary) -> bool:
+    return (
+        frame.filename.startswith(BACKEND_DIR + os.sep)
+        and os.sep + "site-packages" + os.sep not in frame.filename
+        and not frame.filename.endswith(("loop_watchdog.py", "perf.py"))
+    )
+
+
+class _Stall:
+    def __init__(self, route: str, stack: List[traceback.FrameSummary]):
+        self.route = route
+        self.stack = stack
+        app_frames = [f for f in stack if _is_application_frame(f)]
+        self.app_frame = _frame_label(app_frames[-1]) if app_frames else "(no application frame)"
+        self.leaf_frame = _frame_label(stack[-1]) if stack else "(unknown)"
+
+
+class LoopWatchdog:
+    """Heartbeat-based stall detector for one event loop"""
+
+    def __init__(self, threshold: float = STALL_THRESHOLD, interval: float = CHECK_INTERVAL):
+        self.threshold = threshold
+        self.interval = interval
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._app = None
+        self._endpoint_routes: Optional[Dict[object, str]] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._posted: Optional[float] = None
+        self._stall: Optional[_Stall] = None
+        # Aggregates
+        self.stalls = 0
+        self.stalled_seconds = 0.0
+        self.max_stall = 0.0
+        self.started_at: Optional[str] = None
+        self._routes: Dict[str, List[float]] = {}           # route -> [count, seconds, max]
+        self._offenders: Dict[Tuple[str, str, str], dict] = {}
+
+    # ---------- lifecycle ----------
+
+    def start(self, app=None):
+        """Start watching the running loop; call from the loop thread (e.g. startup event)"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._app = app
+        self._stop.clear()
+        self.started_at = datetime.now(timezone.utc).isoformat()
+        self._thread = threading.Thread(target=self._run, name="loop-watchdog", daemon=True)
+        self._thread.start()
+        logger.info(f"Event loop watchdog started (threshold {self.threshold * 1000:.0f} ms)")
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=1)
+        self._thread = None
+
+    @property
+    def running(self) -> bool:
+        return bool(self._thread and self._thread.is_alive())
+
+    # ---------- detection ----------
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            with self._lock:
+                posted = self._posted
+                if posted is None:
+                    self._posted = time.monotonic()
+                    try:
+                        self._loop.call_soon_threadsafe(self._beat, self._posted)
+                    except RuntimeError:
+                        return  # loop closed
+                    continue
+                if self._stall is None and time.monotonic() - posted >= self.threshold:
+                    try:
+                        self._stall = self._capture()
+                    except Exception as e:
+                        logger.error(f"Loop watchdog stack capture failed: {e}")
+
+    def _beat(self, posted: float):
+        """Heartbeat, runs on the loop"""
+        lag = time.monotonic() - posted
+        with self._lock:
+            stall, self._stall = self._stall, None
+            self._posted = None
+            if stall is not None:
+                self._record(stall, lag)
+
+    def _capture(self) -> _Stall:
+        frame = sys._current_frames().get(self._loop_thread_id)
+        stack = traceback.extract_stack(frame)[-MAX_STACK_DEPTH:] if frame else []
+        return _Stall(self._current_route(frame), stack)
+
+    # ---------- attribution ----------
+
+    def _endpoints(self) -> Dict[object, str]:
+        if self._endpoint_routes is None:
+            routes = {}
+            for route in getattr(self._app, "routes", []):
+                endpoint = getattr(route, "endpoint", None)
+                code = getattr(endpoint, "__code__", None)
+                if code is not None:
+                    methods = ",".join(sorted(getattr(route, "methods", None) or []))
+                    routes.setdefault(code, f"{methods} {route.path}".strip())
+            self._endpoint_routes = routes
+        return self._endpoint_routes
+
+    def _current_route(self, frame) -> str:
+        # 1. An endpoint function on the blocked stack
+        endpoints = self._endpoints()
+        while frame is not None:
+            route = endpoints.get(frame.f_code)
+            if route:
+                return route
+            frame = frame.f_back
+
+        # 2. The request whose task is running on the loop
+        in_flight = perf.in_flight_requests()
+        try:
+            task = asyncio.current_task(self._loop)
+        except RuntimeError:
+            task = None
+        for metrics in in_flight:
+            if task is not None and metrics.task is task:
+                return f"{metrics.method} {perf.request_route(metrics)}"
+
+        # 3. Child tasks and background work
+        if len(in_flight) == 1:
+            metrics = in_flight[0]
+            return f"{metrics.method} {perf.request_route(metrics)}"
+        return "(background)" if not in_flight else "(unattributed)"
+
+    # ---------- aggregation ----------
+
+    def _record(self, stall: _Stall, seconds: float):
+        self.stalls += 1
+        self.stalled_seconds += seconds
+        self.max_stall = max(self.max_stall, seconds)
+
+        route_stats = self._routes.setdefault(stall.route, [0, 0.0, 0.0])
+        route_stats[0] += 1
+        route_stats[1] += seconds
+        route_stats[2] = max(route_stats[2], seconds)
+
+        key = (stall.route, stall.app_frame, stall.leaf_frame)
+        offender = self._offenders.get(key)
+        if offender is None:
+            if len(self._offenders) >= MAX_OFFENDERS:
+                return
+            offender = self._offenders[key] = {"count": 0, "seconds": 0.0, "max_seconds": 0.0}
+            logger.warning(
+                f"Event loop blocked {seconds * 1000:.0f} ms in {stall.route} at {stall.app_frame} ({stall.leaf_frame})"
+            )
+        offender["count"] += 1
+        offender["seconds"] += seconds
+        offender["max_seconds"] = max(offender["max_seconds"], seconds)
+        offender["last_at"] = datetime.now(timezone.utc).isoformat()
+        offender["stack"] = [_frame_label(f) for f in stall.stack]
+
+    def report(self, limit: int = 20) -> dict:
+        """Stall counts per route and the top offenders by total stalled time"""
+        with self._lock:
+            routes = [
+                {"route": route, "stalls": int(count), "stalled_ms": round(seconds * 1000, 1),
+                 "max_ms": round(longest * 1000, 1)}
+                for route, (count, seconds, longest) in self._routes.items()
+            ]
+            offenders = [
+                {"route": route, "app_frame": app_frame, "blocking_frame": leaf_frame,
+                 "stalls": o["count"], "stalled_ms": round(o["seconds"] * 1000, 1),
+                 "max_ms": round(o["max_seconds"] * 1000, 1), "last_at": o["last_at"], "stack": o["stack"]}
+                for (route, app_frame, leaf_frame), o in self._offenders.items()
+            ]
+            summary = {
+                "running": self.running,
+                "started_at": self.started_at,
+                "threshold_ms": round(self.threshold * 1000, 1),
+                "stalls": self.stalls,
+                "stalled_ms": round(self.stalled_seconds * 1000, 1),
+                "max_stall_ms": round(self.max_stall * 1000, 1),
+            }
+        routes.sort(key=lambda r: -r["stalled_ms"])
+        offenders.sort(key=lambda o: -o["stalled_ms"])
+        return {**summary, "routes": routes[:limit], "top_offenders": offenders[:limit]}
+
+    def reset(self):
+        with self._lock:
+            self.stalls = 0
+            self.stalled_seconds = 0.0
+            self.max_stall = 0.0
+            self._routes.clear()
+            self._offenders.clear()
+
+    def render_metrics(self) -> str:
+        """Stall counters in Prometheus text format, appended to /metrics"""
+        with self._lock:
+            routes = sorted(self._routes.items())
+            lines = [
+                "# HELP event_loop_stalls_total Event-loop stalls longer than the watchdog threshold",
+                "# TYPE event_loop_stalls_total counter",
+            ]
+            lines += [f"event_loop_stalls_total{{route=\"{perf._label(r)}\"}} {int(s[0])}" for r, s in routes]
+            lines += [
+                "# HELP event_loop_stall_seconds_total Time the event loop spent stalled",
+                "# TYPE event_loop_stall_seconds_total counter",
+            ]
+            lines += [f"event_loop_stall_seconds_total{{route=\"{perf._label(r)}\"}} {s[1]:.6f}" for r, s in routes]
+        return "\n".join(lines) + "\n"
+
+
+watchdog = LoopWatchdog()
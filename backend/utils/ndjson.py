@@ -0,0 +1,86 @@
+"""
+NDJSON Streaming Utilities
+Incremental parsing and encoding of newline-delimited JSON (optionally gzip)
+so bulk migrations run in constant memory.
+
+Documents are encoded as relaxed MongoDB Extended JSON, so datetimes
+round-trip between export and import.
+"""
+import zlib
+from typing import Any, AsyncIterable, AsyncIterator, Optional, Tuple
+
+from bson import json_util
+from bson.json_util import RELAXED_JSON_OPTIONS
+
+# wbits value telling zlib to expect/produce a gzip header
+GZIP_WBITS = 16 + zlib.MAX_WBITS
+
+
+def encode_document(doc: dict) -> bytes:
+    """Encode one document as an NDJSON line, dropping the Mongo _id"""
+    doc.pop("_id", None)
+    return (json_util.dumps(doc, json_options=RELAXED_JSON_OPTIONS) + "\n").encode("utf-8")
+
+
+def decode_line(line: bytes) -> Any:
+    """Decode one NDJSON line (plain JSON or Extended JSON)"""
+    return json_util.loads(line.decode("utf-8"))
+
+
+async def iter_ndjson_lines(
+    chunks: AsyncIterable[bytes],
+    gzip: bool = False,
+) -> AsyncIterator[Tuple[int, bytes, int]]:
+    """
+    Split a byte stream into NDJSON lines as chunks arrive.
+
+    Yields (line_no, line, end_offset) where end_offset is the position just
+    past the line in the uncompressed stream, so callers can record a resume
+    point after each committed batch. Blank lines are skipped.
+    """
+    decompressor = zlib.decompressobj(GZIP_WBITS) if gzip else None
+    buffer = b""
+    consumed = 0
+    line_no = 0
+
+    def _split(data: bytes, final: bool = False):
+        nonlocal buffer, consumed, line_no
+        buffer += data
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            consumed += len(line) + 1
+            line_no += 1
+            yield line
+        if final and buffer:
+            # Last line without a trailing newline
+            consumed += len(buffer)
+            line_no += 1
+            yield buffer
+            buffer = b""
+
+    async for chunk in chunks:
+        if not chunk:
+            continue
+        data = decompressor.decompress(chunk) if decompressor else chunk
+        for line in _split(data):
+            if line.strip():
+                yield line_no, line.strip(), consumed
+
+    tail = decompressor.flush() if decompressor else b""
+    for line in _split(tail, final=True):
+        if line.strip():
+            yield line_no, line.strip(), consumed
+
+
+class StreamEncoder:
+    """Turns documents into NDJSON byte chunks, optionally gzip-compressed"""
+
+    def __init__(self, gzip: bool = False, level: int = 6):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, GZIP_WBITS) if gzip else None
+
+    def encode(self, docs) -> bytes:
+        data = b"".join(encode_document(doc) for doc in docs)
+        return self._compressor.compress(data) if self._compressor else data
+
+    def finish(self) -> Optional[bytes]:
+        return self._compressor.flush() if self._compressor else None
@@ -0,0 +1,298 @@
+"""
+Order Ledger
+Maintains one `order_ledger` document per sales order with its precomputed
+financials: purchase cost (purchase_orders_v2), approved expenses by category
+(expenses_v2 and the older order_expenses), budgets from order_lifecycle,
+paid milestones and the resulting profit and margin.
+
+Write paths that change any of those sources call refresh_order_ledger()
+with the affected order ids; the finance, savings and profitability views
+read ledger rows instead of aggregating the raw collections per order.
+reconcile_order_ledger() recomputes every row in batches and repairs drift
+(it doubles as the full rebuild).
+
+Rows carry built_at, the time their sources were read. A refresh never
+replaces a row built from a later read, so concurrent writers cannot leave
+an older figure behind.
+"""
+import logging
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional
+
+from pymongo import DeleteMany, ReplaceOne
+from pymongo.errors import BulkWriteError
+
+from utils.indexes import apply_indexes, index, register_indexes
+from utils.streaming import find_by_ids, iter_batches, iter_cursor
+
+logger = logging.getLogger(__name__)
+
+REBUILD_BATCH_SIZE = 500
+
+DUPLICATE_KEY = 11000
+
+register_indexes(__name__, {
+    "order_ledger": [
+        index("order_id", unique=True),
+        index(("created_at", -1)),
+        index("order_status", ("created_at", -1)),
+        index("has_lifecycle"),
+        index(("expense_v2_total", -1)),
+    ],
+})
+
+ORDER_PROJECTION = {
+    "_id": 0, "id": 1, "order_no": 1, "customer_name": 1, "customer_id": 1,
+    "date": 1, "status": 1, "total_amount": 1, "created_at": 1,
+}
+
+LIFECYCLE_PROJECTION = {
+    "_id": 0, "sales_order_id": 1, "status": 1, "purchase_budget": 1,
+    "execution_budget": 1, "target_profit": 1, "payment_milestones": 1,
+}
+
+# Fields compared by reconcile; built_at differs on every build
+_VOLATILE_FIELDS = {"_id", "built_at"}
+
+
+def calculate_budget_amount(order_value: float, budget: dict) -> float:
+    """Calculate budget amount from percentage or value"""
+    if not budget:
+        return 0
+    if budget.get("type") == "percentage":
+        return order_value * (budget.get("value", 0) / 100)
+    return budget.get("value", 0)
+
+
+def expenses_by_category(ledger: dict) -> Dict[str, float]:
+    """Category -> approved expense total, as the views return it"""
+    return {e["category"]: e["amount"] for e in ledger.get("expenses_by_category", [])}
+
+
+def _money(value) -> float:
+    return round(value or 0, 2)
+
+
+def build_ledger(
+    order: dict,
+    lifecycle: Optional[dict],
+    purchase: Optional[dict],
+    expenses_v2: Dict[Optional[str], dict],
+    legacy_expenses: Dict[Optional[str], dict],
+    built_at: datetime,
+) -> dict:
+    """Ledger row for one order from its already-aggregated sources"""
+    order_value = order.get("total_amount", 0) or 0
+
+    categories: Dict[Optional[str], float] = {}
+    for source in (expenses_v2, legacy_expenses):
+        for category, group in source.items():
+            categories[category] = categories.get(category, 0) + group["total"]
+    execution_expenses = sum(categories.values())
+    purchase_cost = purchase["total"] if purchase else 0
+
+    lifecycle = lifecycle or {}
+    milestones = lifecycle.get("payment_milestones") or []
+    total_cost = purchase_cost + execution_expenses
+    actual_profit = order_value - total_cost
+
+    return {
+        "order_id": order["id"],
+        "order_no": order.get("order_no"),
+        "customer_name": order.get("customer_name"),
+        "customer_id": order.get("customer_id"),
+        "order_date": order.get("date"),
+        "order_status": order.get("status"),
+        "created_at": order.get("created_at"),
+        "order_value": order_value,
+        "has_lifecycle": bool(lifecycle),
+        "lifecycle_status": lifecycle.get("status"),
+        "purchase_cost": _money(purchase_cost),
+        "purchase_order_count": purchase["count"] if purchase else 0,
+        "expenses_by_category": [
+            {"category": category, "amount": _money(amount)}
+            for category, amount in sorted(categories.items(), key=lambda c: str(c[0]))
+        ],
+        "execution_expenses": _money(execution_expenses),
+        "expense_v2_total": _money(sum(g["total"] for g in expenses_v2.values())),
+        "expense_v2_count": sum(g["count"] for g in expenses_v2.values()),
+        "has_purchase_budget": lifecycle.get("purchase_budget") is not None,
+        "purchase_budget": _money(calculate_budget_amount(order_value, lifecycle.get("purchase_budget"))),
+        "execution_budget": _money(calculate_budget_amount(order_value, lifecycle.get("execution_budget"))),
+        "target_profit": _money(calculate_budget_amount(order_value, lifecycle.get("target_profit"))),
+        "paid_amount": _money(sum(m.get("paid_amount", 0) or 0 for m in milestones)),
+        "milestone_amount": _money(sum(m.get("amount", 0) or 0 for m in milestones)),
+        "total_cost": _money(total_cost),
+        "actual_profit": _money(actual_profit),
+        "profit_margin": round((actual_profit / order_value * 100) if order_value > 0 else 0, 1),
+        "built_at": built_at,
+    }
+
+
+async def _grouped_expenses(collection, match: dict) -> Dict[str, Dict[Optional[str], dict]]:
+    """order id -> category -> {total, count} for the matched expenses"""
+    grouped: Dict[str, Dict[Optional[str], dict]] = {}
+    pipeline = [
+        {"$match": match},
+        {"$group": {
+            "_id": {"order_id": "$order_id", "category": "$category"},
+            "total": {"$sum": "$amount"},
+            "count": {"$sum": 1},
+        }},
+    ]
+    async for row in collection.aggregate(pipeline):
+        grouped.setdefault(row["_id"]["order_id"], {})[row["_id"].get("category")] = row
+    return grouped
+
+
+async def build_ledgers(db, orders: List[dict]) -> List[dict]:
+    """Ledger rows for a batch of orders: four set-based queries regardless of batch size"""
+    built_at = datetime.now(timezone.utc)
+    order_ids = [o["id"] for o in orders]
+
+    purchases = {}
+    async for row in db.purchase_orders_v2.aggregate([
+        {"$match": {"sales_order_id": {"$in": order_ids}, "status": {"$ne": "cancelled"}}},
+        {"$group": {"_id": "$sales_order_id", "total": {"$sum": "$total_amount"}, "count": {"$sum": 1}}},
+    ]):
+        purchases[row["_id"]] = row
+
+    expenses_v2 = await _grouped_expenses(
+        db.expenses_v2, {"order_id": {"$in": order_ids}, "approval_status": "approved"}
+    )
+    legacy_expenses = await _grouped_expenses(
+        db.order_expenses, {"order_id": {"$in": order_ids}, "approved": True}
+    )
+    lifecycles = {
+        lc["sales_order_id"]: lc
+        for lc in await find_by_ids(db.order_lifecycle, order_ids, LIFECYCLE_PROJECTION, field="sales_order_id")
+    }
+
+    return [
+        build_ledger(
+            order,
+            lifecycles.get(order["id"]),
+            purchases.get(order["id"]),
+            expenses_v2.get(order["id"], {}),
+            legacy_expenses.get(order["id"], {}),
+            built_at,
+        )
+        for order in orders
+    ]
+
+
+async def _write_ledgers(db, ledgers: List[dict]) -> int:
+    """Upsert rows unless a row built from a later read is already stored"""
+    if not ledgers:
+        return 0
+    operations = [
+        ReplaceOne({"order_id": row["order_id"], "built_at": {"$lte": row["built_at"]}}, row, upsert=True)
+        for row in ledgers
+    ]
+    try:
+        result = await db.order_ledger.bulk_write(operations, ordered=False)
+        return result.upserted_count + result.modified_count
+    except BulkWriteError as e:
+        # A newer row matched the order id but not the built_at guard
+        errors = e.details.get("writeErrors", [])
+        if any(err.get("code") != DUPLICATE_KEY for err in errors):
+            raise
+        return e.details.get("nUpserted", 0) + e.details.get("nModified", 0)
+
+
+async def refresh_order_ledger(db, order_ids: Iterable[Optional[str]]) -> int:
+    """Recompute the ledger rows of the given orders; rows of deleted orders are removed"""
+    ids = list(dict.fromkeys(i for i in order_ids if i))
+    if not ids:
+        return 0
+    try:
+        orders = await find_by_ids(db.sales_orders, ids, ORDER_PROJECTION)
+        found = {o["id"] for o in orders}
+        missing = [i for i in ids if i not in found]
+        if missing:
+            await db.order_ledger.delete_many({"order_id": {"$in": missing}})
+        return await _write_ledgers(db, await build_ledgers(db, orders))
+    except Exception as e:
+        # The ledger is derived data; reconcile repairs a failed refresh
+        logger.error(f"Error refreshing order ledger for {ids}: {e}")
+        return 0
+
+
+async def get_order_ledgers(db, order_ids: Iterable[str]) -> Dict[str, dict]:
+    """order id -> ledger row, building rows that do not exist yet"""
+    ids = list(dict.fromkeys(i for i in order_ids if i))
+    rows = {r["order_id"]: r for r in await find_by_ids(db.order_ledger, ids, {"_id": 0}, field="order_id")}
+    missing = [i for i in ids if i not in rows]
+    if missing:
+        orders = await find_by_ids(db.sales_orders, missing, ORDER_PROJECTION)
+        built = await build_ledgers(db, orders)
+        await _write_ledgers(db, built)
+        rows.update({r["order_id"]: r for r in built})
+    return rows
+
+
+async def get_order_ledger(db, order_id: str) -> Optional[dict]:
+    return (await get_order_ledgers(db, [order_id])).get(order_id)
+
+
+def _comparable(row: dict) -> dict:
+    return {k: v for k, v in row.items() if k not in _VOLATILE_FIELDS}
+
+
+async def reconcile_order_ledger(db, fix: bool = True) -> dict:
+    """
+    Recompute every order's ledger row, rewrite rows that drifted from their
+    sources and delete rows whose order no longer exists. With an empty
+    collection this is a full rebuild.
+    """
+    started = datetime.now(timezone.utc)
+    checked = drifted = written = 0
+    drifted_ids: List[str] = []
+
+    async for orders in iter_batches(db.sales_orders.find({}, ORDER_PROJECTION), REBUILD_BATCH_SIZE):
+        expected = await build_ledgers(db, orders)
+        stored = {
+            r["order_id"]: r
+            for r in await find_by_ids(db.order_ledger, [o["id"] for o in orders], {"_id": 0}, field="order_id")
+        }
+        stale = [row for row in expected if _comparable(stored.get(row["order_id"], {})) != _comparable(row)]
+        checked += len(expected)
+        drifted += len(stale)
+        drifted_ids.extend(row["order_id"] for row in stale[:max(0, 20 - len(drifted_ids))])
+        if fix:
+            written += await _write_ledgers(db, stale)
+
+    # Rows of orders deleted without a refresh
+    order_ids = set()
+    async for order in iter_cursor(db.sales_orders.find({}, {"_id": 0, "id": 1}), 5000):
+        order_ids.add(order["id"])
+    orphans = []
+    async for row in iter_cursor(db.order_ledger.find({"built_at": {"$lt": started}}, {"_id": 0, "order_id": 1}), 5000):
+        if row["order_id"] not in order_ids:
+            orphans.append(row["order_id"])
+    if fix and orphans:
+        await db.order_ledger.bulk_write(
+            [DeleteMany({"order_id": {"$in": orphans[i:i + 1000]}}) for i in range(0, len(orphans), 1000)]
+        )
+
+    summary = {
+        "checked": checked,
+        "drifted": drifted,
+        "written": written,
+        "orphans": len(orphans),
+        "fixed": fix,
+        "sample_drifted": drifted_ids,
+        "seconds": round((datetime.now(timezone.utc) - started).total_seconds(), 2),
+    }
+    logger.info(f"Order ledger reconciled: {summary}")
+    return summary
+
+
+async def initialize_order_ledger(db):
+    """Create ledger indexes and build the ledger once if it has never been populated"""
+    try:
+        await apply_indexes(db, ["order_ledger"])
+        if await db.order_ledger.estimated_document_count() == 0:
+            await reconcile_order_ledger(db)
+    except Exception as e:
+        logger.error(f"Error initializing order ledger: {e}")
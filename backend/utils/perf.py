@@ -0,0 +1,429 @@
+"""
+Request Performance Instrumentation
+Per-request metrics for every HTTP request, collected by PerformanceMiddleware
+and a pymongo command listener:
+
+- trace id (taken from an X-Request-ID header or generated; echoed as X-Trace-Id)
+- wall time, status and response bytes
+- event-loop lag observed while the request was in flight
+- number and duration of MongoDB commands per collection/command
+- CacheManager hits and misses
+
+Aggregates per route template are rendered in Prometheus text format by
+render_metrics() (served at /metrics). Requests slower than
+PERF_SLOW_REQUEST_SECONDS or issuing more than PERF_SLOW_REQUEST_QUERIES Mongo
+commands are logged with their query breakdown and kept in a ring buffer for
+/api/admin/performance/slow-requests, so N+1 query patterns stand out.
+
+The command listener is registered when this module is imported and applies
+to MongoClients created afterwards, so server.py imports it before any client.
+"""
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Deque, Dict, List, Optional, Set, Tuple
+
+from pymongo import monitoring
+from starlette.datastructures import MutableHeaders
+
+logger = logging.getLogger(__name__)
+
+SLOW_REQUEST_SECONDS = float(os.environ.get("PERF_SLOW_REQUEST_SECONDS", "1.0"))
+SLOW_REQUEST_QUERIES = int(os.environ.get("PERF_SLOW_REQUEST_QUERIES", "25"))
+SLOW_LOG_SIZE = 200
+
+# Event-loop lag sampling interval and the smallest lag worth recording
+LOOP_SAMPLE_INTERVAL = 0.1
+LOOP_LAG_RESOLUTION = 0.005
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_current: ContextVar[Optional["RequestMetrics"]] = ContextVar("request_metrics", default=None)
+_lock = threading.Lock()
+
+
+class RequestMetrics:
+    """Measurements of one HTTP request"""
+
+    def __init__(self, trace_id: str, method: str, path: str, scope: Optional[dict] = None):
+        self.trace_id = trace_id
+        self.method = method
+        self.path = path
+        self.scope = scope
+        self.task = None
+        self.route = "unmatched"
+        self.status = 0
+        self.started = time.perf_counter()
+        self.seconds = 0.0
+        self.bytes_sent = 0
+        self.loop_lag = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        # (collection, command) -> [count, seconds]
+        self.commands: Dict[Tuple[str, str], List[float]] = {}
+
+    @property
+    def mongo_commands(self) -> int:
+        return int(sum(c for c, _ in self.commands.values()))
+
+    @property
+    def mongo_seconds(self) -> float:
+        return sum(s for _, s in self.commands.values())
+
+    def query_breakdown(self) -> List[dict]:
+        """Mongo commands grouped by collection and command, slowest first"""
+        rows = [
+            {"collection": collection, "command": command, "count": int(count), "ms": round(seconds * 1000, 2)}
+            for (collection, command), (count, seconds) in self.commands.items()
+        ]
+        return sorted(rows, key=lambda r: (-r["ms"], -r["count"]))
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "method": self.method,
+            "path": self.path,
+            "route": self.route,
+            "status": self.status,
+            "ms": round(self.seconds * 1000, 2),
+            "loop_lag_ms": round(self.loop_lag * 1000, 2),
+            "bytes": self.bytes_sent,
+            "mongo_commands": self.mongo_commands,
+            "mongo_ms": round(self.mongo_seconds * 1000, 2),
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+            "queries": self.query_breakdown(),
+        }
+
+
+def current_request() -> Optional[RequestMetrics]:
+    """Metrics of the request being handled in this context, if any"""
+    return _current.get()
+
+
+def current_trace_id() -> Optional[str]:
+    metrics = _current.get()
+    return metrics.trace_id if metrics else None
+
+
+def in_flight_requests() -> List[RequestMetrics]:
+    with _lock:
+        return list(_in_flight)
+
+
+def request_route(metrics: RequestMetrics) -> str:
+    """Route template of a request, also while it is still being handled"""
+    if metrics.route == "unmatched" and metrics.scope is not None:
+        return _route_template(metrics.scope)
+    return metrics.route
+
+
+# =============== AGGREGATES ===============
+
+class _RouteStats:
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.buckets = [0] * len(DURATION_BUCKETS)
+        self.statuses: Dict[int, int] = {}
+        self.bytes_sent = 0
+        self.loop_lag = 0.0
+        self.mongo_commands = 0
+        self.mongo_seconds = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def add(self, m: RequestMetrics):
+        self.count += 1
+        self.seconds += m.seconds
+        for i, bound in enumerate(DURATION_BUCKETS):
+            if m.seconds <= bound:
+                self.buckets[i] += 1
+        self.statuses[m.status] = self.statuses.get(m.status, 0) + 1
+        self.bytes_sent += m.bytes_sent
+        self.loop_lag += m.loop_lag
+        self.mongo_commands += m.mongo_commands
+        self.mongo_seconds += m.mongo_seconds
+        self.cache_hits += m.cache_hits
+        self.cache_misses += m.cache_misses
+
+
+_routes: Dict[Tuple[str, str], _RouteStats] = {}
+# (collection, command) -> [count, seconds, failures]
+_mongo_totals: Dict[Tuple[str, str], List[float]] = {}
+_cache_totals = {"hit": 0, "miss": 0}
+_loop_totals = {"lag_seconds": 0.0, "max_lag_seconds": 0.0, "stalls": 0}
+_in_flight: Set[RequestMetrics] = set()
+slow_requests: Deque[dict] = deque(maxlen=SLOW_LOG_SIZE)
+
+
+def _record_request(metrics: RequestMetrics):
+    with _lock:
+        _routes.setdefault((metrics.method, metrics.route), _RouteStats()).add(metrics)
+    if metrics.seconds >= SLOW_REQUEST_SECONDS or metrics.mongo_commands > SLOW_REQUEST_QUERIES:
+        entry = metrics.to_dict()
+        entry["at"] = datetime.now(timezone.utc).isoformat()
+        slow_requests.append(entry)
+        logger.warning(f"Slow request {metrics.method} {metrics.path}: {json.dumps(entry)}")
+
+
+def record_cache_lookup(hit: bool):
+    """Called by CacheManager.get for every lookup"""
+    with _lock:
+        _cache_totals["hit" if hit else "miss"] += 1
+    metrics = _current.get()
+    if metrics:
+        if hit:
+            metrics.cache_hits += 1
+        else:
+            metrics.cache_misses += 1
+
+
+def route_summary(limit: int = 50) -> List[dict]:
+    """Per-route aggregates, routes with the most Mongo commands per request first"""
+    with _lock:
+        rows = [
+            {
+                "method": method,
+                "route": route,
+                "requests": s.count,
+                "avg_ms": round(s.seconds * 1000 / s.count, 2),
+                "avg_mongo_commands": round(s.mongo_commands / s.count, 2),
+                "avg_mongo_ms": round(s.mongo_seconds * 1000 / s.count, 2),
+                "avg_loop_lag_ms": round(s.loop_lag * 1000 / s.count, 2),
+                "avg_bytes": s.bytes_sent // s.count,
+                "cache_hits": s.cache_hits,
+                "cache_misses": s.cache_misses,
+            }
+            for (method, route), s in _routes.items() if s.count
+        ]
+    rows.sort(key=lambda r: (-r["avg_mongo_commands"], -r["avg_ms"]))
+    return rows[:limit]
+
+
+# =============== MONGO COMMAND LISTENER ===============
+
+def _command_collection(event) -> str:
+    if event.command_name == "getMore":
+        return event.command.get("collection", "")
+    value = event.command.get(event.command_name)
+    return value if isinstance(value, str) else ""
+
+
+class MongoCommandListener(monitoring.CommandListener):
+    """
+    Attributes every Mongo command to the request that issued it.
+
+    Motor runs pymongo on executor threads with a copy of the caller's context,
+    so the request's RequestMetrics is visible in started(); it is carried to
+    succeeded()/failed() by connection and request id.
+    """
+
+    def __init__(self):
+        self._pending: Dict[tuple, Tuple[Optional[RequestMetrics], str]] = {}
+
+    def started(self, event):
+        self._pending[(event.connection_id, event.request_id)] = (_current.get(), _command_collection(event))
+
+    def _finished(self, event, failed: bool):
+        metrics, collection = self._pending.pop((event.connection_id, event.request_id), (None, ""))
+        key = (collection or "(admin)", event.command_name)
+        seconds = event.duration_micros / 1e6
+        with _lock:
+            totals = _mongo_totals.setdefault(key, [0, 0.0, 0])
+            totals[0] += 1
+            totals[1] += seconds
+            totals[2] += failed
+            if metrics:
+                per_request = metrics.commands.setdefault(key, [0, 0.0])
+                per_request[0] += 1
+                per_request[1] += seconds
+
+    def succeeded(self, event):
+        self._finished(event, failed=False)
+
+    def failed(self, event):
+        self._finished(event, failed=True)
+
+
+command_listener = MongoCommandListener()
+monitoring.register(command_listener)
+
+
+# =============== EVENT LOOP LAG ===============
+
+async def monitor_event_loop(interval: float = LOOP_SAMPLE_INTERVAL):
+    """
+    Sample event-loop lag: any oversleep of `interval` means the loop was busy
+    with blocking code. The lag is charged to every request in flight, since
+    each of them was delayed by it.
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        await asyncio.sleep(interval)
+        lag = loop.time() - started - interval
+        if lag < LOOP_LAG_RESOLUTION:
+            continue
+        with _lock:
+            _loop_totals["lag_seconds"] += lag
+            _loop_totals["max_lag_seconds"] = max(_loop_totals["max_lag_seconds"], lag)
+            _loop_totals["stalls"] += 1
+            for metrics in _in_flight:
+                metrics.loop_lag += lag
+
+
+# =============== ASGI MIDDLEWARE ===============
+
+def _route_template(scope) -> str:
+    """Path template of the matched route (bounded label cardinality)"""
+    endpoint = scope.get("endpoint")
+    app = scope.get("app")
+    if endpoint is None or app is None:
+        return "unmatched"
+    templates = getattr(app.state, "perf_route_templates", None)
+    if templates is None:
+        templates = {}
+        for route in app.router.routes:
+            target = getattr(route, "endpoint", None) or getattr(route, "app", None)
+            if target is not None and target not in templates:
+                suffix = "" if hasattr(route, "endpoint") else "/{path}"
+                templates[target] = route.path + suffix
+        app.state.perf_route_templates = templates
+    return templates.get(endpoint, "unmatched")
+
+
+class PerformanceMiddleware:
+    """Pure ASGI middleware measuring every HTTP request (see module docstring)"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = dict(scope.get("headers") or []).get(b"x-request-id", b"").decode("latin-1")
+        metrics = RequestMetrics(request_id[:64] or uuid.uuid4().hex, scope["method"], scope["path"], scope)
+        metrics.task = asyncio.current_task()
+        token = _current.set(metrics)
+        with _lock:
+            _in_flight.add(metrics)
+
+        async def send_with_metrics(message):
+            if message["type"] == "http.response.start":
+                metrics.status = message["status"]
+                MutableHeaders(scope=message).append("X-Trace-Id", metrics.trace_id)
+            elif message["type"] == "http.response.body":
+                metrics.bytes_sent += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        except Exception:
+            metrics.status = metrics.status or 500
+            raise
+        finally:
+            metrics.seconds = time.perf_counter() - metrics.started
+            metrics.route = _route_template(scope)
+            metrics.scope = metrics.task = None
+            with _lock:
+                _in_flight.discard(metrics)
+            _current.reset(token)
+            _record_request(metrics)
+
+
+# =============== PROMETHEUS EXPOSITION ===============
+
+def _label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _labels(**labels) -> str:
+    return "{" + ",".join(f'{k}="{_label(v)}"' for k, v in labels.items()) + "}"
+
+
+def render_metrics() -> str:
+    """All aggregates in Prometheus text exposition format (version 0.0.4)"""
+    lines = []
+
+    def metric(name: str, kind: str, help_text: str):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+
+    with _lock:
+        routes = sorted(_routes.items())
+        mongo = sorted(_mongo_totals.items())
+        cache = dict(_cache_totals)
+        loop = dict(_loop_totals)
+        in_flight = len(_in_flight)
+
+    metric("http_requests_total", "counter", "HTTP requests by route template and status")
+    for (method, route), s in routes:
+        for status, count in sorted(s.statuses.items()):
+            lines.append(f"http_requests_total{_labels(method=method, route=route, status=status)} {count}")
+
+    metric("http_request_duration_seconds", "histogram", "HTTP request wall time")
+    for (method, route), s in routes:
+        for bound, count in zip(DURATION_BUCKETS, s.buckets):
+            lines.append(f"http_request_duration_seconds_bucket{_labels(method=method, route=route, le=bound)} {count}")
+        lines.append(f"http_request_duration_seconds_bucket{_labels(method=method, route=route, le='+Inf')} {s.count}")
+        lines.append(f"http_request_duration_seconds_sum{_labels(method=method, route=route)} {s.seconds:.6f}")
+        lines.append(f"http_request_duration_seconds_count{_labels(method=method, route=route)} {s.count}")
+
+    per_route = (
+        ("http_response_bytes_total", "Response body bytes", "bytes_sent", "d"),
+        ("http_request_mongo_commands_total", "Mongo commands issued by requests", "mongo_commands", "d"),
+        ("http_request_mongo_seconds_total", "Time spent in Mongo commands by requests", "mongo_seconds", ".6f"),
+        ("http_request_loop_lag_seconds_total", "Event-loop lag observed while requests were in flight", "loop_lag", ".6f"),
+        ("http_request_cache_hits_total", "CacheManager hits by requests", "cache_hits", "d"),
+        ("http_request_cache_misses_total", "CacheManager misses by requests", "cache_misses", "d"),
+    )
+    for name, help_text, attr, fmt in per_route:
+        metric(name, "counter", help_text)
+        for (method, route), s in routes:
+            lines.append(f"{name}{_labels(method=method, route=route)} {getattr(s, attr):{fmt}}")
+
+    metric("http_requests_in_flight", "gauge", "HTTP requests currently being handled")
+    lines.append(f"http_requests_in_flight {in_flight}")
+
+    metric("mongodb_commands_total", "counter", "MongoDB commands by collection and command")
+    for (collection, command), (count, _, _) in mongo:
+        lines.append(f"mongodb_commands_total{_labels(collection=collection, command=command)} {int(count)}")
+    metric("mongodb_command_seconds_total", "counter", "MongoDB command duration by collection and command")
+    for (collection, command), (_, seconds, _) in mongo:
+        lines.append(f"mongodb_command_seconds_total{_labels(collection=collection, command=command)} {seconds:.6f}")
+    metric("mongodb_command_failures_total", "counter", "Failed MongoDB commands by collection and command")
+    for (collection, command), (_, _, failures) in mongo:
+        lines.append(f"mongodb_command_failures_total{_labels(collection=collection, command=command)} {int(failures)}")
+
+    metric("cache_lookups_total", "counter", "CacheManager lookups by result")
+    for result, count in sorted(cache.items()):
+        lines.append(f"cache_lookups_total{_labels(result=result)} {count}")
+
+    metric("event_loop_lag_seconds_total", "counter", "Accumulated event-loop lag")
+    lines.append(f"event_loop_lag_seconds_total {loop['lag_seconds']:.6f}")
+    metric("event_loop_lag_max_seconds", "gauge", "Largest event-loop lag sample")
+    lines.append(f"event_loop_lag_max_seconds {loop['max_lag_seconds']:.6f}")
+    metric("event_loop_lag_events_total", "counter", f"Event-loop lag samples above {LOOP_LAG_RESOLUTION}s")
+    lines.append(f"event_loop_lag_events_total {loop['stalls']}")
+
+    return "\n".join(lines) + "\n"
+
+
+def reset_metrics():
+    """Clear all aggregates and the slow-request log"""
+    with _lock:
+        _routes.clear()
+        _mongo_totals.clear()
+        _cache_totals.update(hit=0, miss=0)
+        _loop_totals.update(lag_seconds=0.0, max_lag_seconds=0.0, stalls=0)
+        slow_requests.clear()
@@ -0,0 +1,289 @@
+"""
+Streaming Exports
+Shared plumbing for Excel/CSV/PDF exports of large collections.
+
+- Rows are read from the cursor in batches (utils.streaming.iter_batches).
+- CSV is streamed to the client batch by batch as rows arrive.
+- XLSX is written through openpyxl's write-only mode into a spooled temp file
+  (memory up to SPOOL_BYTES, then disk) and streamed out in chunks.
+- PDF tables are split into CHUNK_ROWS-row Table flowables with a repeated
+  header, so ReportLab lays out one small table at a time instead of one huge
+  one. The build runs in a worker thread.
+- Exports larger than EXPORT_ASYNC_THRESHOLD rows (PDF_EXPORT_ASYNC_THRESHOLD
+  for PDFs), or requested with async_job=true, run as a background job
+  recorded in report_export_jobs. The client polls /api/export-jobs/{job_id}
+  and downloads from /api/export-jobs/{job_id}/download.
+"""
+import asyncio
+import csv
+import io
+import logging
+import os
+import tempfile
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, AsyncIterator, Awaitable, BinaryIO, Callable, List, Optional, Sequence
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse, StreamingResponse
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Font, PatternFill
+from openpyxl.utils import get_column_letter
+from reportlab.platypus import Table, TableStyle
+
+logger = logging.getLogger(__name__)
+
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+EXPORT_DIR = Path(os.environ.get("EXPORT_DIR", "/app/uploads/report-exports"))
+EXPORT_ASYNC_THRESHOLD = int(os.environ.get("EXPORT_ASYNC_THRESHOLD", "20000"))
+PDF_EXPORT_ASYNC_THRESHOLD = int(os.environ.get("PDF_EXPORT_ASYNC_THRESHOLD", "2000"))
+EXPORT_RETENTION_HOURS = int(os.environ.get("EXPORT_RETENTION_HOURS", "24"))
+
+SPOOL_BYTES = 8 * 1024 * 1024
+READ_CHUNK_BYTES = 64 * 1024
+CHUNK_ROWS = 200
+
+# Background export tasks, referenced so they are not garbage collected mid-run
+_running_jobs = set()
+
+
+@dataclass
+class ExportColumn:
+    """One exported column: header text, value getter and Excel width"""
+    header: str
+    value: Callable[[dict], Any]
+    width: float = 15
+
+
+def excel_value(value: Any) -> Any:
+    """Cell-safe value: scalars pass through, anything else is stringified"""
+    if isinstance(value, (str, int, float, datetime, type(None))):
+        return value
+    return str(value)
+
+
+# =============== CSV / XLSX ===============
+
+async def csv_chunks(batches: AsyncIterator[List[dict]], columns: Sequence[ExportColumn]) -> AsyncIterator[bytes]:
+    """CSV bytes, one chunk per cursor batch; starts with a UTF-8 BOM for Excel"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([c.header for c in columns])
+    yield ("\ufeff" + buffer.getvalue()).encode("utf-8")
+    async for batch in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([[excel_value(c.value(doc)) for c in columns] for doc in batch])
+        yield buffer.getvalue().encode("utf-8")
+
+
+async def write_xlsx(
+    fileobj: BinaryIO,
+    batches: AsyncIterator[List[dict]],
+    columns: Sequence[ExportColumn],
+    sheet_title: str,
+    header_color: str = "0F172A",
+    border: Optional[Border] = None,
+) -> int:
+    """Write batches to fileobj as a single-sheet write-only workbook; returns the row count"""
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet(sheet_title)
+
+    # Column widths must be set before the first row in write-only mode
+    for idx, column in enumerate(columns, start=1):
+        worksheet.column_dimensions[get_column_letter(idx)].width = column.width
+
+    header_font = Font(bold=True, color="FFFFFF")
+    header_fill = PatternFill(start_color=header_color, end_color=header_color, fill_type="solid")
+    header = []
+    for column in columns:
+        cell = WriteOnlyCell(worksheet, value=column.header)
+        cell.font = header_font
+        cell.fill = header_fill
+        cell.alignment = Alignment(horizontal="center", vertical="center")
+        if border:
+            cell.border = border
+        header.append(cell)
+    worksheet.append(header)
+
+    def bordered(value):
+        cell = WriteOnlyCell(worksheet, value=value)
+        cell.border = border
+        return cell
+
+    rows = 0
+    async for batch in batches:
+        for doc in batch:
+            values = [excel_value(c.value(doc)) for c in columns]
+            worksheet.append([bordered(v) for v in values] if border else values)
+        rows += len(batch)
+
+    await asyncio.to_thread(workbook.save, fileobj)
+    return rows
+
+
+# =============== PDF ===============
+
+def chunked_tables(
+    header: list,
+    rows: List[list],
+    col_widths: Sequence[float],
+    style: TableStyle,
+    chunk_rows: int = CHUNK_ROWS,
+) -> List[Table]:
+    """Split a long table into chunk_rows-row tables that each repeat the header"""
+    if not rows:
+        table = Table([header], colWidths=col_widths)
+        table.setStyle(style)
+        return [table]
+    tables = []
+    for start in range(0, len(rows), chunk_rows):
+        table = Table([header] + rows[start:start + chunk_rows], colWidths=col_widths, repeatRows=1)
+        table.setStyle(style)
+        tables.append(table)
+    return tables
+
+
+async def build_pdf(doc, elements: list):
+    """Run the ReportLab build in a worker thread so the event loop keeps serving"""
+    await asyncio.to_thread(doc.build, elements)
+
+
+# =============== RESPONSES ===============
+
+async def iter_file(fileobj: BinaryIO, chunk_size: int = READ_CHUNK_BYTES) -> AsyncIterator[bytes]:
+    """Read fileobj from the start in chunks, closing it when done"""
+    try:
+        fileobj.seek(0)
+        while True:
+            chunk = fileobj.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        fileobj.close()
+
+
+def file_response(fileobj: BinaryIO, media_type: str, filename: str) -> StreamingResponse:
+    return StreamingResponse(
+        iter_file(fileobj),
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
+
+
+async def export_file(
+    db,
+    kind: str,
+    filename: str,
+    media_type: str,
+    writer: Callable[[BinaryIO], Awaitable[int]],
+    rows: int,
+    async_job: bool = False,
+    user: Optional[dict] = None,
+    threshold: int = EXPORT_ASYNC_THRESHOLD,
+):
+    """
+    Produce an export with writer(fileobj). Small exports are written to a
+    spooled temp file and streamed back; those over threshold rows (or
+    async_job=True) start a background job and return 202 with its status
+    and download URLs. Jobs need a signed-in user and are readable by that
+    user and admins.
+    """
+    if async_job or rows > threshold:
+        job = await start_export_job(db, kind, filename, media_type, writer, rows, user)
+        return JSONResponse(status_code=202, content=job)
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_BYTES)
+    try:
+        await writer(spool)
+    except Exception:
+        spool.close()
+        raise
+    return file_response(spool, media_type, filename)
+
+
+# =============== BACKGROUND JOBS ===============
+
+def job_summary(job: dict) -> dict:
+    return {
+        "job_id": job["id"],
+        "kind": job["kind"],
+        "status": job["status"],
+        "filename": job["filename"],
+        "expected_rows": job.get("expected_rows"),
+        "rows": job.get("rows"),
+        "size_bytes": job.get("size_bytes"),
+        "error": job.get("error"),
+        "created_at": job["created_at"],
+        "finished_at": job.get("finished_at"),
+        "status_url": f"/api/export-jobs/{job['id']}",
+        "download_url": f"/api/export-jobs/{job['id']}/download" if job["status"] == "done" else None,
+    }
+
+
+def job_path(job: dict) -> Path:
+    return EXPORT_DIR / f"{job['id']}{Path(job['filename']).suffix}"
+
+
+async def start_export_job(
+    db,
+    kind: str,
+    filename: str,
+    media_type: str,
+    writer: Callable[[BinaryIO], Awaitable[int]],
+    expected_rows: Optional[int] = None,
+    user: Optional[dict] = None,
+) -> dict:
+    """Record an export job owned by user and run writer in the background"""
+    if not user or not user.get("id"):
+        raise HTTPException(status_code=401, detail="Sign in to run background exports")
+    await purge_expired_exports(db)
+    now = datetime.now(timezone.utc).isoformat()
+    job = {
+        "id": str(uuid.uuid4()),
+        "kind": kind,
+        "status": "running",
+        "filename": filename,
+        "media_type": media_type,
+        "expected_rows": expected_rows,
+        "created_by": user["id"],
+        "created_at": now,
+    }
+    await db.report_export_jobs.insert_one(dict(job))
+    task = asyncio.create_task(_run_export_job(db, job, writer))
+    _running_jobs.add(task)
+    task.add_done_callback(_running_jobs.discard)
+    return job_summary(job)
+
+
+async def _run_export_job(db, job: dict, writer: Callable[[BinaryIO], Awaitable[int]]):
+    path = job_path(job)
+    try:
+        EXPORT_DIR.mkdir(parents=True, exist_ok=True)
+        with open(path, "wb") as f:
+            rows = await writer(f)
+        update = {"status": "done", "rows": rows, "size_bytes": path.stat().st_size}
+    except Exception as e:
+        logger.error(f"Export job {job['id']} ({job['kind']}) failed: {e}")
+        path.unlink(missing_ok=True)
+        update = {"status": "failed", "error": str(e)}
+    update["finished_at"] = datetime.now(timezone.utc).isoformat()
+    await db.report_export_jobs.update_one({"id": job["id"]}, {"$set": update})
+
+
+async def get_export_job(db, job_id: str) -> Optional[dict]:
+    return await db.report_export_jobs.find_one({"id": job_id}, {"_id": 0})
+
+
+async def purge_expired_exports(db):
+    """Delete jobs and their files past the retention window (a job still running by then was orphaned by a restart)"""
+    cutoff = (datetime.now(timezone.utc) - timedelta(hours=EXPORT_RETENTION_HOURS)).isoformat()
+    expired = await db.report_export_jobs.find({"created_at": {"$lt": cutoff}}, {"_id": 0}).to_list(None)
+    for job in expired:
+        job_path(job).unlink(missing_ok=True)
+    if expired:
+        await db.report_export_jobs.delete_many({"id": {"$in": [j["id"] for j in expired]}})
@@ -0,0 +1,290 @@
+"""
+Response Encoding
+JSON serialization, compression and conditional GET for API responses.
+
+FastJSONResponse is the app's default response class. It serializes with
+orjson when installed (several times faster than the standard library, with
+numpy values and non-string keys handled natively) and falls back to
+Starlette's JSONResponse otherwise.
+
+CompressionMiddleware is a pure ASGI middleware that:
+
+- gives every complete 200 response to a GET or HEAD a weak ETag computed
+  from its body, and answers a matching If-None-Match with an empty 304, so
+  clients polling a dashboard download it only when it changed
+- compresses JSON, text, CSV and NDJSON bodies of at least
+  COMPRESS_MIN_BYTES with brotli (when the brotli package is installed and
+  the client accepts br) or gzip, off the event loop for large bodies
+- compresses streamed responses (streamed lists and exports) chunk by chunk,
+  without buffering them and without an ETag
+
+ETags are computed over the uncompressed body, so the gzip and brotli
+representations of a response share one weak validator. Compression and
+304 counts are exported on /metrics.
+"""
+import asyncio
+import gzip
+import hashlib
+import logging
+import os
+import threading
+import zlib
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import JSONResponse
+
+from utils import perf
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+    logger.warning("orjson not available, using the standard JSON encoder")
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+COMPRESS_MIN_BYTES = int(os.environ.get("COMPRESS_MIN_BYTES", "1024"))
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4
+# Bodies above this size are compressed in a worker thread
+OFFLOAD_BYTES = 256 * 1024
+
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+CONDITIONAL_METHODS = ("GET", "HEAD")
+
+
+if ORJSON_AVAILABLE:
+    class FastJSONResponse(JSONResponse):
+        def render(self, content) -> bytes:
+            return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+else:
+    FastJSONResponse = JSONResponse
+
+
+# =============== HELPERS ===============
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """Preferred content coding the client accepts: br, then gzip, else None"""
+    accepted = set()
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.strip().partition(";")
+        if params.replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        accepted.add(coding.strip())
+    if BROTLI_AVAILABLE and "br" in accepted:
+        return "br"
+    if "gzip" in accepted or "*" in accepted:
+        return "gzip"
+    return None
+
+
+def weak_etag(body: bytes) -> str:
+    return f'W/"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match comparison; weak comparison as RFC 9110 requires for GET"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+class _StreamCompressor:
+    """Incremental compressor for streamed bodies"""
+
+    def __init__(self, encoding: str):
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=BROTLI_QUALITY)
+            self._zlib = None
+        else:
+            self._brotli = None
+            self._zlib = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def chunk(self, data: bytes) -> bytes:
+        if self._zlib:
+            return self._zlib.compress(data) + self._zlib.flush(zlib.Z_SYNC_FLUSH)
+        return self._brotli.process(data) + self._brotli.flush()
+
+    def finish(self) -> bytes:
+        return self._zlib.flush() if self._zlib else self._brotli.finish()
+
+
+# =============== STATISTICS ===============
+
+_stats_lock = threading.Lock()
+_compressed = {}  # encoding -> [responses, bytes in, bytes out]
+_not_modified = 0
+
+
+def _record_compressed(encoding: str, size_in: int, size_out: int):
+    with _stats_lock:
+        row = _compressed.setdefault(encoding, [0, 0, 0])
+        row[0] += 1
+        row[1] += size_in
+        row[2] += size_out
+
+
+def _record_not_modified():
+    global _not_modified
+    with _stats_lock:
+        _not_modified += 1
+
+
+def render_metrics() -> str:
+    """Compression and 304 counts in Prometheus text format, appended to /metrics"""
+    labels = perf._labels
+    with _stats_lock:
+        compressed = sorted((k, list(v)) for k, v in _compressed.items())
+        not_modified = _not_modified
+    lines = [
+        "# HELP http_responses_compressed_total Responses sent with a content coding",
+        "# TYPE http_responses_compressed_total counter",
+    ]
+    lines += [f"http_responses_compressed_total{labels(encoding=e)} {row[0]}" for e, row in compressed]
+    lines += [
+        "# HELP http_response_bytes_uncompressed_total Body bytes before compression",
+        "# TYPE http_response_bytes_uncompressed_total counter",
+    ]
+    lines += [f"http_response_bytes_uncompressed_total{labels(encoding=e)} {row[1]}" for e, row in compressed]
+    lines += [
+        "# HELP http_response_bytes_compressed_total Body bytes after compression",
+        "# TYPE http_response_bytes_compressed_total counter",
+    ]
+    lines += [f"http_response_bytes_compressed_total{labels(encoding=e)} {row[2]}" for e, row in compressed]
+    lines += [
+        "# HELP http_responses_not_modified_total Conditional GETs answered with 304",
+        "# TYPE http_responses_not_modified_total counter",
+        f"http_responses_not_modified_total {not_modified}",
+    ]
+    return "\n".join(lines) + "\n"
+
+
+# =============== MIDDLEWARE ===============
+
+class CompressionMiddleware:
+    """Pure ASGI middleware adding ETags, 304s and compression (see module docstring)"""
+
+    def __init__(self, app, minimum_size: int = COMPRESS_MIN_BYTES):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        encoding = choose_encoding(headers.get("accept-encoding", ""))
+        conditional = scope["method"] in CONDITIONAL_METHODS
+        if not encoding and not conditional:
+            await self.app(scope, receive, send)
+            return
+        responder = _Responder(send, encoding, conditional, headers.get("if-none-match"), self.minimum_size)
+        await self.app(scope, receive, responder.send)
+
+
+class _Responder:
+    def __init__(self, send, encoding: Optional[str], conditional: bool, if_none_match: Optional[str], minimum_size: int):
+        self._send = send
+        self.encoding = encoding
+        self.conditional = conditional
+        self.if_none_match = if_none_match
+        self.minimum_size = minimum_size
+        self.start = None
+        self.passthrough = False
+        self.stream: Optional[_StreamCompressor] = None
+        self.stream_in = self.stream_out = 0
+
+    async def send(self, message):
+        if self.passthrough or message["type"] not in ("http.response.start", "http.response.body"):
+            await self._send(message)
+            return
+        if message["type"] == "http.response.start":
+            # Held until the first body message shows whether the response is complete
+            self.start = message
+            return
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.stream:
+            await self._send_stream_chunk(body, more_body)
+            return
+
+        start, self.start = self.start, None
+        headers = MutableHeaders(scope=start)
+        content_type = headers.get("content-type", "")
+        if (start["status"] != 200 or "content-encoding" in headers
+                or not content_type.startswith(COMPRESSIBLE_TYPES)):
+            self.passthrough = True
+            await self._send(start)
+            await self._send(message)
+            return
+
+        headers.add_vary_header("Accept-Encoding")
+        if more_body:
+            if self.encoding:
+                self.stream = _StreamCompressor(self.encoding)
+                headers["Content-Encoding"] = self.encoding
+                if "content-length" in headers:
+                    del headers["content-length"]
+            else:
+                self.passthrough = True
+            await self._send(start)
+            if self.stream:
+                await self._send_stream_chunk(body, more_body)
+            else:
+                await self._send(message)
+            return
+        await self._send_complete(start, headers, body)
+
+    async def _send_complete(self, start, headers: MutableHeaders, body: bytes):
+        if self.conditional and "etag" not in headers:
+            headers["ETag"] = weak_etag(body)
+            if "cache-control" not in headers:
+                # Cache, but revalidate on every use
+                headers["Cache-Control"] = "private, no-cache"
+        if self.conditional and etag_matches(self.if_none_match, headers["etag"]):
+            for name in ("content-length", "content-type"):
+                if name in headers:
+                    del headers[name]
+            start["status"] = 304
+            _record_not_modified()
+            await self._send(start)
+            await self._send({"type": "http.response.body", "body": b""})
+            return
+        if self.encoding and len(body) >= self.minimum_size:
+            if len(body) > OFFLOAD_BYTES:
+                compressed = await asyncio.to_thread(compress, body, self.encoding)
+            else:
+                compressed = compress(body, self.encoding)
+            _record_compressed(self.encoding, len(body), len(compressed))
+            headers["Content-Encoding"] = self.encoding
+            headers["Content-Length"] = str(len(compressed))
+            body = compressed
+        await self._send(start)
+        await self._send({"type": "http.response.body", "body": body})
+
+    async def _send_stream_chunk(self, body: bytes, more_body: bool):
+        data = self.stream.chunk(body) if body else b""
+        self.stream_in += len(body)
+        if not more_body:
+            data += self.stream.finish()
+        self.stream_out += len(data)
+        if not more_body:
+            _record_compressed(self.encoding, self.stream_in, self.stream_out)
+        await self._send({"type": "http.response.body", "body": data, "more_body": more_body})
@@ -0,0 +1,316 @@
+"""
+Sales Cube
+Pre-aggregated counts and values of sales enquiries, quotations and orders,
+kept in the `sales_cube` collection with one row per cell:
+
+    kind          enquiry | quotation | order
+    month         "YYYY-MM" of created_at (fiscal_year is its April-March
+                  start year, e.g. 2025 for FY 25-26)
+    category, department, status, assigned_to, priority
+    customer      canonical customer_id, or the customer name when unresolved
+
+Measures are count and value on every kind, plus converted (enquiries with
+an order), and paid_count / paid_value (orders with payment_status "paid").
+The sales and customer-management dashboards are slice queries over these
+rows (cube_slice) instead of rounds of count_documents over raw documents.
+
+Maintenance is incremental. `sales_cube_members` remembers the cell and
+measures each source document currently contributes; refresh_sales_cube()
+compares that with the document as it is now and moves the difference with
+$inc. A member is swapped with a compare-and-set on its read_at, so a refresh
+that read an older version of the document never overwrites a newer one and
+concurrent refreshes cannot apply the same delta twice. rebuild_sales_cube()
+regenerates members and cells from scratch (first start, nightly job and
+after customer identity resolution).
+"""
+import json
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from pymongo import DeleteMany, ReplaceOne, UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+from utils.indexes import apply_indexes, index, register_indexes
+from utils.streaming import find_by_ids, iter_batches
+
+logger = logging.getLogger(__name__)
+
+REBUILD_BATCH_SIZE = 500
+
+DIMENSIONS = ["month", "fiscal_year", "category", "department", "status", "assigned_to", "priority", "customer"]
+
+# kind -> source collection, the fields it is read with and its measures
+CUBE_SOURCES = {
+    "enquiry": {
+        "collection": "sales_enquiries",
+        "projection": {
+            "_id": 0, "id": 1, "created_at": 1, "category": 1, "department": 1, "status": 1, "assigned_to": 1,
+            "priority": 1, "customer_id": 1, "company_name": 1, "value": 1, "order_id": 1,
+        },
+        "measures": ["count", "value", "converted"],
+    },
+    "quotation": {
+        "collection": "sales_quotations",
+        "projection": {
+            "_id": 0, "id": 1, "created_at": 1, "category": 1, "status": 1, "customer_id": 1,
+            "customer_name": 1, "total_amount": 1,
+        },
+        "measures": ["count", "value"],
+    },
+    "order": {
+        "collection": "sales_orders",
+        "projection": {
+            "_id": 0, "id": 1, "created_at": 1, "category": 1, "status": 1, "customer_id": 1,
+            "customer_name": 1, "total_amount": 1, "payment_status": 1,
+        },
+        "measures": ["count", "value", "paid_count", "paid_value"],
+    },
+}
+
+register_indexes(__name__, {
+    "sales_cube": [
+        index("kind", "month"),
+        index("kind", "fiscal_year", "category"),
+        index("kind", "status"),
+        index("kind", "customer"),
+    ],
+    "sales_cube_members": [
+        index("cell"),
+    ],
+})
+
+
+def parse_created_at(value) -> Optional[datetime]:
+    """created_at as a datetime; older imports stored ISO strings"""
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, str) and value:
+        try:
+            return datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    return None
+
+
+def month_key(value: datetime) -> str:
+    return f"{value.year}-{value.month:02d}"
+
+
+def fiscal_year_of(value: datetime) -> int:
+    """Start year of the April-March fiscal year containing value"""
+    return value.year if value.month >= 4 else value.year - 1
+
+
+def parse_fiscal_year(fiscal_year: str) -> int:
+    """Start year of "25-26" / "2025-26"; raises ValueError for anything else"""
+    start = int(fiscal_year.split("-")[0])
+    return start + 2000 if start < 100 else start
+
+
+def months_back(count: int, now: Optional[datetime] = None) -> str:
+    """month key of the first of the last `count` months, current month included"""
+    now = now or datetime.now(timezone.utc)
+    index_ = now.year * 12 + now.month - 1 - (count - 1)
+    return f"{index_ // 12}-{index_ % 12 + 1:02d}"
+
+
+def _read_time() -> datetime:
+    """Now, at the millisecond precision (and naive UTC form) MongoDB stores and returns"""
+    now = datetime.now(timezone.utc)
+    return now.replace(microsecond=now.microsecond // 1000 * 1000, tzinfo=None)
+
+
+def _money(value) -> float:
+    return value if isinstance(value, (int, float)) else 0
+
+
+def contribution(kind: str, doc: dict) -> dict:
+    """The cell a source document falls into and what it adds to that cell"""
+    created = parse_created_at(doc.get("created_at"))
+    name = doc.get("company_name") if kind == "enquiry" else doc.get("customer_name")
+    dims = {
+        "month": month_key(created) if created else None,
+        "fiscal_year": fiscal_year_of(created) if created else None,
+        "category": doc.get("category"),
+        "department": doc.get("department"),
+        "status": doc.get("status"),
+        "assigned_to": doc.get("assigned_to"),
+        "priority": doc.get("priority"),
+        "customer": doc.get("customer_id") or name,
+    }
+    if kind == "enquiry":
+        value = _money(doc.get("value"))
+        measures = {"count": 1, "value": value, "converted": 1 if doc.get("order_id") else 0}
+    else:
+        value = _money(doc.get("total_amount"))
+        measures = {"count": 1, "value": value}
+        if kind == "order":
+            paid = doc.get("payment_status") == "paid"
+            measures.update({"paid_count": 1 if paid else 0, "paid_value": value if paid else 0})
+    return {
+        "kind": kind,
+        "cell": json.dumps([kind] + [dims[d] for d in DIMENSIONS], default=str),
+        "dims": dims,
+        "customer_name": name,
+        "measures": measures,
+    }
+
+
+# ---------------------------------------------------------------------------
+# Maintenance
+# ---------------------------------------------------------------------------
+
+def _cell_update(member: dict, sign: int) -> UpdateOne:
+    """Add (sign=1) or remove (sign=-1) a member's measures from its cell"""
+    inc = {k: sign * v for k, v in member["measures"].items()}
+    if sign < 0:
+        return UpdateOne({"_id": member["cell"]}, {"$inc": inc})
+    return UpdateOne(
+        {"_id": member["cell"]},
+        {"$inc": inc, "$set": {"kind": member["kind"], **member["dims"], "customer_name": member["customer_name"]}},
+        upsert=True,
+    )
+
+
+async def _swap_member(db, member_id: str, old: Optional[dict], new: Optional[dict]) -> bool:
+    """Replace old with new unless another refresh got there first"""
+    members = db.sales_cube_members
+    if old is None:
+        try:
+            await members.insert_one({"_id": member_id, **new})
+            return True
+        except DuplicateKeyError:
+            return False
+    match = {"_id": member_id, "read_at": old["read_at"]}
+    if new is None:
+        return (await members.delete_one(match)).deleted_count == 1
+    return (await members.replace_one(match, new)).matched_count == 1
+
+
+async def refresh_sales_cube(db, kind: str, source_ids: Iterable[Optional[str]]) -> int:
+    """Move the given documents' contributions to the cells they belong in now; returns cells touched"""
+    ids = list(dict.fromkeys(i for i in source_ids if i))
+    if not ids:
+        return 0
+    try:
+        source = CUBE_SOURCES[kind]
+        read_at = _read_time()
+        docs = {d["id"]: d for d in await find_by_ids(db[source["collection"]], ids, source["projection"])}
+        member_ids = {f"{kind}:{i}": i for i in ids}
+        olds = {m["_id"]: m for m in await db.sales_cube_members.find({"_id": {"$in": list(member_ids)}}).to_list(None)}
+
+        cell_ops, cells = [], set()
+        for member_id, source_id in member_ids.items():
+            old = olds.get(member_id)
+            if old and old["read_at"] >= read_at:
+                continue
+            new = {**contribution(kind, docs[source_id]), "read_at": read_at} if source_id in docs else None
+            if old and new and (old["cell"], old["measures"]) == (new["cell"], new["measures"]):
+                continue
+            if not old and not new:
+                continue
+            if not await _swap_member(db, member_id, old, new):
+                # A concurrent refresh read the document later than we did
+                continue
+            for member, sign in ((old, -1), (new, 1)):
+                if member:
+                    cell_ops.append(_cell_update(member, sign))
+                    cells.add(member["cell"])
+        if cell_ops:
+            cell_ops.append(DeleteMany({"_id": {"$in": list(cells)}, "count": {"$lte": 0}}))
+            await db.sales_cube.bulk_write(cell_ops, ordered=True)
+        return len(cells)
+    except Exception as e:
+        # Derived data; rebuild_sales_cube() repairs a failed refresh
+        logger.error(f"Error refreshing sales cube for {kind} {ids}: {e}")
+        return 0
+
+
+async def rebuild_sales_cube(db) -> Dict[str, int]:
+    """Regenerate every member and cell from the source collections; returns kind -> documents"""
+    started = _read_time()
+    counts = {}
+    for kind, source in CUBE_SOURCES.items():
+        count = 0
+        cursor = db[source["collection"]].find({}, source["projection"])
+        async for docs in iter_batches(cursor, REBUILD_BATCH_SIZE):
+            read_at = _read_time()
+            await db.sales_cube_members.bulk_write([
+                ReplaceOne({"_id": f"{kind}:{d['id']}"}, {**contribution(kind, d), "read_at": read_at}, upsert=True)
+                for d in docs if d.get("id")
+            ], ordered=False)
+            count += len(docs)
+        counts[kind] = count
+    # Documents deleted without a refresh
+    await db.sales_cube_members.delete_many({"read_at": {"$lt": started}})
+
+    sums = {m: {"$sum": f"$measures.{m}"} for m in ("count", "value", "converted", "paid_count", "paid_value")}
+    cells = await db.sales_cube_members.aggregate([
+        {"$group": {
+            "_id": "$cell",
+            "kind": {"$first": "$kind"},
+            "dims": {"$first": "$dims"},
+            "customer_name": {"$max": "$customer_name"},
+            **sums,
+        }},
+    ]).to_list(None)
+    operations = [
+        ReplaceOne({"_id": c["_id"]}, {
+            "kind": c["kind"], **c["dims"], "customer_name": c["customer_name"],
+            **{m: c[m] for m in CUBE_SOURCES[c["kind"]]["measures"]},
+            "built_at": started,
+        }, upsert=True)
+        for c in cells
+    ]
+    operations.append(DeleteMany({"built_at": {"$ne": started}}))
+    await db.sales_cube.bulk_write(operations, ordered=True)
+    logger.info(f"Sales cube rebuilt: {counts}, {len(cells)} cells")
+    return counts
+
+
+async def initialize_sales_cube(db):
+    """Create sales cube indexes and build it once if it has never been populated"""
+    try:
+        await apply_indexes(db, ["sales_cube", "sales_cube_members"])
+        if await db.sales_cube.estimated_document_count() == 0:
+            await rebuild_sales_cube(db)
+    except Exception as e:
+        logger.error(f"Error initializing sales cube: {e}")
+
+
+# ---------------------------------------------------------------------------
+# Queries
+# ---------------------------------------------------------------------------
+
+async def cube_slice(db, kind: str, by: Sequence[str] = (), match: Optional[dict] = None) -> List[dict]:
+    """
+    Sum the measures of `kind` over cells matching `match`, grouped by the
+    dimensions in `by`. Returns one dict per group with the dimensions and
+    measures (and customer_name when grouped by customer).
+    """
+    group = {m: {"$sum": f"${m}"} for m in CUBE_SOURCES[kind]["measures"]}
+    if "customer" in by:
+        group["customer_name"] = {"$max": "$customer_name"}
+    rows = await db.sales_cube.aggregate([
+        {"$match": {"kind": kind, **(match or {})}},
+        {"$group": {"_id": {d: f"${d}" for d in by} if by else None, **group}},
+    ]).to_list(None)
+    return [{**(row.pop("_id") or {}), **row} for row in rows]
+
+
+def slice_total(rows: List[dict], measure: str = "count", **where) -> float:
+    """Sum a measure over slice rows whose dimensions match where (values may be lists)"""
+    def matches(row):
+        return all(row.get(k) in v if isinstance(v, (list, set, tuple)) else row.get(k) == v for k, v in where.items())
+    return sum(row.get(measure, 0) for row in rows if matches(row))
+
+
+def rollup(rows: List[dict], dim: str, measures: Sequence[str] = ("count", "value")) -> Dict[Any, dict]:
+    """Re-group slice rows by one of their dimensions: value -> summed measures"""
+    groups: Dict[Any, dict] = {}
+    for row in rows:
+        group = groups.setdefault(row.get(dim), {m: 0 for m in measures})
+        for m in measures:
+            group[m] += row.get(m, 0)
+    return groups
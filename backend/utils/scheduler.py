@@ -0,0 +1,451 @@
+"""
+Background Job Scheduler
+An in-process asyncio scheduler for precomputation and housekeeping jobs.
+
+Modules declare jobs next to the code they precompute for:
+
+    @scheduled_job("hr.celebrations", "5 0 * * *", "Upcoming birthdays and anniversaries")
+    async def precompute_celebrations():
+        ...
+
+Schedules are five-field cron expressions (minute hour day-of-month month
+day-of-week) evaluated in the server's local time. Every worker runs the
+scheduler loop, but each occurrence runs exactly once: a worker claims it by
+moving the job's `scheduler_locks` document to the new slot with a lease, and
+the other workers' claims for that slot fail. An occurrence missed while no
+worker was up runs on the next start, and a job that has never run runs
+immediately so its views exist.
+
+Every run is recorded in `scheduler_runs` (kept for RUN_HISTORY_DAYS) and its
+duration is exported on /metrics as scheduler_job_duration_seconds.
+
+Jobs store their output with store_view(); readers use cached_view(), which
+returns the stored data while its as_of token matches (e.g. today's date) and
+rebuilds it in the request otherwise. Write paths call invalidate_view() when
+they change a view's inputs.
+
+Set SCHEDULER_ENABLED=false to run a worker without the loop.
+"""
+import asyncio
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, FrozenSet, List, Optional
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from utils import perf
+from utils.indexes import apply_indexes, index, register_indexes
+
+logger = logging.getLogger(__name__)
+
+SCHEDULER_ENABLED = os.environ.get("SCHEDULER_ENABLED", "true").lower() not in ("0", "false", "no")
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+# Longest sleep between checks, so stop() and clock changes are noticed
+MAX_SLEEP_SECONDS = 30
+LEASE_MARGIN_SECONDS = 60
+RUN_HISTORY_DAYS = 30
+
+register_indexes(__name__, {
+    "scheduler_runs": [
+        index("job", ("started_at", -1)),
+        index("started_at", ttl=RUN_HISTORY_DAYS * 86400),
+    ],
+})
+
+
+# =============== CRON EXPRESSIONS ===============
+
+_FIELD_RANGES = (("minute", 0, 59), ("hour", 0, 23), ("day", 1, 31), ("month", 1, 12), ("weekday", 0, 7))
+_ALIASES = {"@hourly": "0 * * * *", "@daily": "0 0 * * *", "@weekly": "0 0 * * 0", "@monthly": "0 0 1 * *"}
+
+
+def _parse_field(text: str, low: int, high: int, name: str) -> FrozenSet[int]:
+    values = set()
+    for part in text.split(","):
+        step = 1
+        if "/" in part:
+            part, step_text = part.split("/", 1)
+            step = int(step_text)
+            if step < 1:
+                raise ValueError(f"Invalid step in cron {name} field")
+        if part == "*":
+            start, end = low, high
+        elif "-" in part:
+            start, end = (int(v) for v in part.split("-", 1))
+        else:
+            start = int(part)
+            end = high if step > 1 else start
+        if not (low <= start <= end <= high):
+            raise ValueError(f"Cron {name} field out of range: {text}")
+        values.update(range(start, end + 1, step))
+    if name == "weekday":
+        # 7 is Sunday as well
+        values = {v % 7 for v in values}
+    return frozenset(values)
+
+
+@dataclass(frozen=True)
+class CronSchedule:
+    expression: str
+    minutes: FrozenSet[int]
+    hours: FrozenSet[int]
+    days: FrozenSet[int]
+    months: FrozenSet[int]
+    weekdays: FrozenSet[int]  # 0 = Sunday
+    any_day: bool
+    any_weekday: bool
+
+    @classmethod
+    def parse(cls, expression: str) -> "CronSchedule":
+        fields = _ALIASES.get(expression.strip(), expression).split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression needs 5 fields: {expression!r}")
+        parsed = [_parse_field(text, low, high, name) for text, (name, low, high) in zip(fields, _FIELD_RANGES)]
+        return cls(expression, *parsed, any_day=fields[2] == "*", any_weekday=fields[4] == "*")
+
+    def _day_matches(self, moment: datetime) -> bool:
+        day_ok = moment.day in self.days
+        weekday_ok = (moment.weekday() + 1) % 7 in self.weekdays
+        # Standard cron: when both are restricted either one may match
+        if not self.any_day and not self.any_weekday:
+            return day_ok or weekday_ok
+        return day_ok and weekday_ok
+
+    def next_after(self, moment: datetime) -> datetime:
+        """First matching minute strictly after moment (keeps moment's tzinfo)"""
+        candidate = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = candidate + timedelta(days=366 * 5)
+        while candidate < limit:
+            if candidate.month not in self.months:
+                year, month = (candidate.year + 1, 1) if candidate.month == 12 else (candidate.year, candidate.month + 1)
+                candidate = candidate.replace(year=year, month=month, day=1, hour=0, minute=0)
+            elif not self._day_matches(candidate):
+                candidate = candidate.replace(hour=0, minute=0) + timedelta(days=1)
+            elif candidate.hour not in self.hours:
+                candidate = candidate.replace(minute=0) + timedelta(hours=1)
+            elif candidate.minute not in self.minutes:
+                candidate += timedelta(minutes=1)
+            else:
+                return candidate
+        raise ValueError(f"Cron expression never matches: {self.expression!r}")
+
+
+# =============== JOB REGISTRY ===============
+
+@dataclass
+class Job:
+    name: str
+    schedule: CronSchedule
+    func: Callable[[], Awaitable[Any]]
+    description: str = ""
+    timeout: float = 600
+
+    @property
+    def lease(self) -> timedelta:
+        return timedelta(seconds=self.timeout + LEASE_MARGIN_SECONDS)
+
+
+JOBS: Dict[str, Job] = {}
+
+
+def scheduled_job(name: str, cron: str, description: str = "", timeout: float = 600):
+    """Register an async, argument-less function to run on a cron schedule"""
+    schedule = CronSchedule.parse(cron)
+
+    def decorator(func):
+        if name in JOBS and JOBS[name].func is not func:
+            logger.warning(f"Scheduled job {name} registered twice; keeping the latest")
+        JOBS[name] = Job(name, schedule, func, description or (func.__doc__ or "").strip(), timeout)
+        return func
+
+    return decorator
+
+
+# =============== METRICS ===============
+
+@dataclass
+class _JobStats:
+    runs: Dict[str, int] = field(default_factory=dict)
+    seconds: float = 0.0
+    count: int = 0
+    last_seconds: float = 0.0
+    last_success: Optional[float] = None
+
+
+_stats: Dict[str, _JobStats] = {}
+_stats_lock = threading.Lock()
+
+
+def _record(job: str, status: str, seconds: float):
+    with _stats_lock:
+        stats = _stats.setdefault(job, _JobStats())
+        stats.runs[status] = stats.runs.get(status, 0) + 1
+        stats.seconds += seconds
+        stats.count += 1
+        stats.last_seconds = seconds
+        if status == "success":
+            stats.last_success = time.time()
+
+
+def render_metrics() -> str:
+    """Job run counters and durations in Prometheus text format, appended to /metrics"""
+    labels = perf._labels
+    with _stats_lock:
+        stats = sorted((name, _JobStats(dict(s.runs), s.seconds, s.count, s.last_seconds, s.last_success))
+                       for name, s in _stats.items())
+    lines = [
+        "# HELP scheduler_job_runs_total Scheduled job runs by status",
+        "# TYPE scheduler_job_runs_total counter",
+    ]
+    for name, s in stats:
+        lines += [f"scheduler_job_runs_total{labels(job=name, status=status)} {count}"
+                  for status, count in sorted(s.runs.items())]
+    lines += [
+        "# HELP scheduler_job_duration_seconds Scheduled job run time",
+        "# TYPE scheduler_job_duration_seconds summary",
+    ]
+    for name, s in stats:
+        lines.append(f"scheduler_job_duration_seconds_sum{labels(job=name)} {s.seconds:.6f}")
+        lines.append(f"scheduler_job_duration_seconds_count{labels(job=name)} {s.count}")
+    lines += [
+        "# HELP scheduler_job_last_duration_seconds Duration of the latest run",
+        "# TYPE scheduler_job_last_duration_seconds gauge",
+    ]
+    lines += [f"scheduler_job_last_duration_seconds{labels(job=name)} {s.last_seconds:.6f}" for name, s in stats]
+    lines += [
+        "# HELP scheduler_job_last_success_timestamp_seconds Unix time of the latest successful run",
+        "# TYPE scheduler_job_last_success_timestamp_seconds gauge",
+    ]
+    lines += [f"scheduler_job_last_success_timestamp_seconds{labels(job=name)} {s.last_success:.0f}"
+              for name, s in stats if s.last_success]
+    return "\n".join(lines) + "\n"
+
+
+# =============== SCHEDULER ===============
+
+def _now() -> datetime:
+    """Aware local time; cron fields are matched against the server's wall clock"""
+    return datetime.now().astimezone()
+
+
+class JobScheduler:
+    def __init__(self):
+        self.db = None
+        self._task: Optional[asyncio.Task] = None
+        self._next: Dict[str, datetime] = {}
+        self._running: Dict[str, asyncio.Task] = {}
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self, db):
+        if not SCHEDULER_ENABLED or self.running:
+            return
+        self.db = db
+        self._task = asyncio.create_task(self._loop())
+        logger.info(f"Job scheduler started on {WORKER_ID} with {len(JOBS)} jobs")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+        for task in list(self._running.values()):
+            task.cancel()
+        self._task = None
+
+    def next_run(self, name: str) -> Optional[datetime]:
+        return self._next.get(name)
+
+    async def _initial_slot(self, job: Job, now: datetime) -> datetime:
+        lock = await self.db.scheduler_locks.find_one({"_id": job.name}, {"slot": 1})
+        if not lock:
+            # Never ran anywhere: run now so its views exist
+            return now.replace(second=0, microsecond=0)
+        last = lock["slot"]
+        if last.tzinfo is None:
+            last = last.replace(tzinfo=timezone.utc)
+        missed = job.schedule.next_after(last.astimezone(now.tzinfo))
+        return missed if missed <= now else job.schedule.next_after(now)
+
+    async def _loop(self):
+        try:
+            await apply_indexes(self.db, ["scheduler_runs"])
+            now = _now()
+            for job in JOBS.values():
+                self._next[job.name] = await self._initial_slot(job, now)
+        except Exception as e:
+            logger.error(f"Error starting job scheduler: {e}")
+            now = _now()
+            for job in JOBS.values():
+                self._next.setdefault(job.name, job.schedule.next_after(now))
+
+        while True:
+            now = _now()
+            for name, slot in list(self._next.items()):
+                if slot > now:
+                    continue
+                job = JOBS[name]
+                self._next[name] = job.schedule.next_after(max(slot, now))
+                if name in self._running:
+                    logger.warning(f"Scheduled job {name} still running; skipping {slot.isoformat()}")
+                    continue
+                task = asyncio.create_task(self._run_claimed(job, slot))
+                self._running[name] = task
+                task.add_done_callback(lambda _, n=name: self._running.pop(n, None))
+            wake = min(self._next.values(), default=now + timedelta(seconds=MAX_SLEEP_SECONDS))
+            await asyncio.sleep(min(MAX_SLEEP_SECONDS, max(0.5, (wake - _now()).total_seconds())))
+
+    async def _claim(self, job: Job, slot: datetime) -> bool:
+        """Take the job's lock for this slot; False when another worker has it or already ran it"""
+        now = datetime.now(timezone.utc)
+        try:
+            lock = await self.db.scheduler_locks.find_one_and_update(
+                {"_id": job.name, "slot": {"$lt": slot}, "locked_until": {"$lt": now}},
+                {"$set": {"slot": slot, "owner": WORKER_ID, "locked_until": now + job.lease, "acquired_at": now}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+        except DuplicateKeyError:
+            return False
+        return bool(lock) and lock.get("owner") == WORKER_ID
+
+    async def _release(self, job: Job):
+        await self.db.scheduler_locks.update_one(
+            {"_id": job.name, "owner": WORKER_ID},
+            {"$set": {"locked_until": datetime.now(timezone.utc)}},
+        )
+
+    async def _run_claimed(self, job: Job, slot: datetime):
+        try:
+            if not await self._claim(job, slot):
+                return
+        except Exception as e:
+            logger.error(f"Error claiming scheduled job {job.name}: {e}")
+            return
+        try:
+            await self.execute(job, slot, trigger="schedule")
+        finally:
+            try:
+                await self._release(job)
+            except Exception as e:
+                logger.error(f"Error releasing scheduled job {job.name}: {e}")
+
+    async def execute(self, job: Job, slot: Optional[datetime] = None, trigger: str = "manual") -> dict:
+        """Run a job now and record it in scheduler_runs; returns the run document"""
+        run = {
+            "id": str(uuid.uuid4()),
+            "job": job.name,
+            "slot": slot,
+            "trigger": trigger,
+            "worker": WORKER_ID,
+            "status": "running",
+            "started_at": datetime.now(timezone.utc),
+        }
+        await self.db.scheduler_runs.insert_one(dict(run))
+        started = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(job.func(), timeout=job.timeout)
+            run.update(status="success", result=result if isinstance(result, dict) else None)
+        except asyncio.TimeoutError:
+            run.update(status="timeout", error=f"Timed out after {job.timeout:.0f}s")
+        except asyncio.CancelledError:
+            run.update(status="cancelled")
+            raise
+        except Exception as e:
+            logger.exception(f"Scheduled job {job.name} failed")
+            run.update(status="failed", error=str(e))
+        finally:
+            seconds = time.perf_counter() - started
+            run.update(finished_at=datetime.now(timezone.utc), duration_ms=round(seconds * 1000, 1))
+            _record(job.name, run["status"], seconds)
+            try:
+                await self.db.scheduler_runs.update_one({"id": run["id"]}, {"$set": {
+                    k: run.get(k) for k in ("status", "result", "error", "finished_at", "duration_ms")
+                }})
+            except Exception as e:
+                logger.error(f"Error recording run of {job.name}: {e}")
+        return run
+
+    async def run_now(self, name: str, db) -> dict:
+        """Run a job immediately, outside its schedule and without the slot lock"""
+        if name not in JOBS:
+            raise KeyError(name)
+        # Also works on workers started with SCHEDULER_ENABLED=false
+        self.db = self.db if self.db is not None else db
+        return await self.execute(JOBS[name], trigger="manual")
+
+
+scheduler = JobScheduler()
+
+
+async def job_status(db) -> List[dict]:
+    """Every registered job with its next local run and its latest recorded run"""
+    latest = {}
+    async for row in db.scheduler_runs.aggregate([
+        {"$sort": {"started_at": -1}},
+        {"$group": {"_id": "$job", "run": {"$first": "$$ROOT"}}},
+    ]):
+        row["run"].pop("_id", None)
+        latest[row["_id"]] = row["run"]
+    return [
+        {
+            "name": job.name,
+            "cron": job.schedule.expression,
+            "description": job.description,
+            "timeout": job.timeout,
+            "next_run": scheduler.next_run(job.name),
+            "last_run": latest.get(job.name),
+        }
+        for job in sorted(JOBS.values(), key=lambda j: j.name)
+    ]
+
+
+# =============== PRECOMPUTED VIEWS ===============
+
+async def store_view(db, key: str, data: Any, as_of: str):
+    """Store a precomputed view; as_of identifies the period the data is valid for"""
+    await db.precomputed_views.replace_one(
+        {"_id": key},
+        {"data": data, "as_of": as_of, "computed_at": datetime.now(timezone.utc)},
+        upsert=True,
+    )
+
+
+async def load_view(db, key: str) -> Optional[dict]:
+    return await db.precomputed_views.find_one({"_id": key})
+
+
+async def invalidate_view(db, key: str):
+    """Drop a view whose inputs changed; the next read rebuilds it"""
+    try:
+        await db.precomputed_views.delete_one({"_id": key})
+    except Exception as e:
+        logger.error(f"Error invalidating view {key}: {e}")
+
+
+async def cached_view(db, key: str, as_of: str, build: Callable[[], Awaitable[Any]]) -> Any:
+    """The stored view when it is valid for as_of, else build it, store it and return it"""
+    view = await load_view(db, key)
+    if view and view.get("as_of") == as_of:
+        return view["data"]
+    data = await build()
+    try:
+        await store_view(db, key, data, as_of)
+    except Exception as e:
+        logger.error(f"Error storing view {key}: {e}")
+    return data
+
+
+def time_bucket(minutes: int, moment: Optional[datetime] = None) -> str:
+    """Label of the `minutes`-long period containing moment (local time)"""
+    moment = (moment or datetime.now()).replace(second=0, microsecond=0)
+    start = moment - timedelta(minutes=(moment.hour * 60 + moment.minute) % minutes)
+    return start.strftime("%Y-%m-%dT%H:%M")
@@ -0,0 +1,281 @@
+"""
+Search Index Utilities
+Maintains a `search_index` collection of normalized, tokenized search keys
+(whole tokens plus prefixes) for customers, enquiries, quotations, orders and
+projects, so searches use a multikey index instead of unanchored $regex scans.
+
+Write paths call refresh_search_index() after changing a document; the index
+can be rebuilt from scratch with rebuild_search_index().
+"""
+import logging
+import re
+import unicodedata
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional
+
+from pymongo import DeleteOne, ReplaceOne
+
+from utils.indexes import apply_indexes, index, register_indexes
+
+logger = logging.getLogger(__name__)
+
+# Prefix keys are generated up to this length; longer query tokens are
+# matched on their first MAX_PREFIX_LENGTH characters and verified in Python
+MAX_PREFIX_LENGTH = 15
+
+REBUILD_BATCH_SIZE = 1000
+
+# Key matches fetched per search, as a multiple of the number of hits returned
+CANDIDATE_MULTIPLIER = 3
+
+# entity type -> source collection, weighted searchable fields, display fields
+SEARCH_ENTITIES: Dict[str, dict] = {
+    "customer": {
+        "collection": "clients",
+        "fields": {"name": 3, "company_name": 3, "contact_person": 2, "email": 1, "gst_number": 1, "city": 1},
+        "title": ["company_name", "name"],
+        "subtitle": ["contact_person", "email"],
+    },
+    "enquiry": {
+        "collection": "sales_enquiries",
+        "fields": {"enquiry_no": 3, "company_name": 2, "contact_person": 1, "description": 1, "location": 1},
+        "title": ["enquiry_no"],
+        "subtitle": ["company_name"],
+    },
+    "quotation": {
+        "collection": "sales_quotations",
+        "fields": {"quotation_no": 3, "customer_name": 2, "subject": 1, "reference_no": 1},
+        "title": ["quotation_no"],
+        "subtitle": ["customer_name"],
+    },
+    "order": {
+        "collection": "sales_orders",
+        "fields": {"order_no": 3, "customer_name": 2, "po_number": 2},
+        "title": ["order_no"],
+        "subtitle": ["customer_name"],
+    },
+    "project": {
+        "collection": "projects",
+        "fields": {"pid_no": 3, "project_name": 2, "client": 2, "location": 1},
+        "title": ["pid_no"],
+        "subtitle": ["project_name", "client"],
+    },
+}
+
+COLLECTION_ENTITY = {cfg["collection"]: entity for entity, cfg in SEARCH_ENTITIES.items()}
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+
+
+def normalize_text(value) -> str:
+    """Lowercase, strip accents and collapse punctuation to single spaces"""
+    if value is None:
+        return ""
+    text = unicodedata.normalize("NFKD", str(value))
+    text = "".join(ch for ch in text if not unicodedata.combining(ch)).lower()
+    return _NON_ALNUM.sub(" ", text).strip()
+
+
+def tokenize(value) -> List[str]:
+    return normalize_text(value).split()
+
+
+def _token_keys(token: str) -> List[str]:
+    """A token plus all its prefixes up to MAX_PREFIX_LENGTH"""
+    keys = [token[:n] for n in range(1, min(len(token), MAX_PREFIX_LENGTH) + 1)]
+    if len(token) > MAX_PREFIX_LENGTH:
+        keys.append(token)
+    return keys
+
+
+def _first(doc: dict, fields: List[str]) -> Optional[str]:
+    for field in fields:
+        if doc.get(field):
+            return str(doc[field])
+    return None
+
+
+def build_index_entry(entity: str, doc: dict) -> Optional[dict]:
+    """Build the search_index document for one source document"""
+    cfg = SEARCH_ENTITIES[entity]
+    if not doc.get("id"):
+        return None
+
+    keys = set()
+    tokens: Dict[str, int] = {}
+    for field, weight in cfg["fields"].items():
+        for token in tokenize(doc.get(field)):
+            keys.update(_token_keys(token))
+            tokens[token] = max(tokens.get(token, 0), weight)
+
+    return {
+        "entity_type": entity,
+        "entity_id": doc["id"],
+        "title": _first(doc, cfg["title"]) or "",
+        "subtitle": _first(doc, cfg["subtitle"]),
+        "normalized_title": normalize_text(_first(doc, cfg["title"])),
+        "status": doc.get("status"),
+        "keys": sorted(keys),
+        "tokens": tokens,
+        "updated_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+register_indexes(__name__, {
+    "search_index": [
+        index("keys", "entity_type"),
+        index("entity_type", "entity_id", unique=True),
+        index("normalized_title", "entity_type"),
+    ],
+})
+
+
+async def ensure_search_indexes(db):
+    """Create the indexes backing the search_index collection"""
+    await apply_indexes(db, ["search_index"])
+
+
+async def index_documents(db, collection_name: str, docs: Iterable[dict]) -> int:
+    """Upsert search entries for already-loaded documents of a source collection"""
+    entity = COLLECTION_ENTITY.get(collection_name)
+    if not entity:
+        return 0
+    operations = []
+    for doc in docs:
+        entry = build_index_entry(entity, doc)
+        if entry:
+            operations.append(ReplaceOne(
+                {"entity_type": entity, "entity_id": entry["entity_id"]}, entry, upsert=True
+            ))
+    if operations:
+        await db.search_index.bulk_write(operations, ordered=False)
+    return len(operations)
+
+
+async def refresh_search_index(db, collection_name: str, ids: Iterable[str]):
+    """
+    Re-read the given documents and update their search entries.
+
+    Documents that no longer exist are removed from the index, so this is
+    the single call write handlers need after an insert, update or delete.
+    Failures are logged rather than raised so a write never fails on search.
+    """
+    entity = COLLECTION_ENTITY.get(collection_name)
+    ids = [i for i in ids if i]
+    if not entity or not ids:
+        return
+    try:
+        projection = {"_id": 0, "id": 1, "status": 1, **{f: 1 for f in SEARCH_ENTITIES[entity]["fields"]}}
+        docs = await db[collection_name].find({"id": {"$in": ids}}, projection).to_list(None)
+        await index_documents(db, collection_name, docs)
+        missing = set(ids) - {d["id"] for d in docs}
+        if missing:
+            await db.search_index.bulk_write(
+                [DeleteOne({"entity_type": entity, "entity_id": i}) for i in missing], ordered=False
+            )
+    except Exception as e:
+        logger.error(f"Search index refresh failed for {collection_name}: {e}")
+
+
+async def rebuild_search_index(db, entities: Optional[List[str]] = None) -> Dict[str, int]:
+    """Rebuild search entries for the given entity types (default: all) in batches"""
+    counts = {}
+    for entity in entities or list(SEARCH_ENTITIES):
+        cfg = SEARCH_ENTITIES[entity]
+        projection = {"_id": 0, "id": 1, "status": 1, **{f: 1 for f in cfg["fields"]}}
+        started = datetime.now(timezone.utc).isoformat()
+        indexed = 0
+        batch = []
+        async for doc in db[cfg["collection"]].find({}, projection).batch_size(REBUILD_BATCH_SIZE):
+            batch.append(doc)
+            if len(batch) >= REBUILD_BATCH_SIZE:
+                indexed += await index_documents(db, cfg["collection"], batch)
+                batch = []
+        indexed += await index_documents(db, cfg["collection"], batch)
+        # Entries not touched by this rebuild belong to deleted documents
+        await db.search_index.delete_many({"entity_type": entity, "updated_at": {"$lt": started}})
+        counts[entity] = indexed
+    return counts
+
+
+def _score(entry: dict, query_tokens: List[str], normalized_query: str) -> float:
+    tokens = entry.get("tokens", {})
+    score = 0.0
+    for q in query_tokens:
+        if q in tokens:
+            score += 2 * tokens[q]
+        else:
+            score += max((w for t, w in tokens.items() if t.startswith(q)), default=0)
+    title = entry.get("normalized_title", "")
+    if title == normalized_query:
+        score += 10
+    elif title.startswith(normalized_query):
+        score += 5
+    return score
+
+
+async def search_entities(
+    db,
+    query: str,
+    entity_types: Optional[List[str]] = None,
+    limit: int = 20,
+    candidate_limit: int = 200,
+) -> List[dict]:
+    """
+    Return ranked hits whose keys match every query token (as whole tokens or prefixes)
+    """
+    query_tokens = tokenize(query)
+    if not query_tokens:
+        return []
+
+    lookup_keys = sorted({t[:MAX_PREFIX_LENGTH] for t in query_tokens})
+    match: dict = {"keys": {"$all": lookup_keys}}
+    if entity_types:
+        match["entity_type"] = {"$in": entity_types}
+
+    normalized_query = " ".join(query_tokens)
+    pool = max(candidate_limit, limit * CANDIDATE_MULTIPLIER)
+    projection = {"_id": 0, "keys": 0}
+    # The key match is capped and unordered, so titles starting with the query
+    # and entries holding every query token whole are fetched first and always ranked
+    title_match = {**match, "normalized_title": {"$regex": f"^{re.escape(normalized_query)}"}}
+    token_match = {**match, **{f"tokens.{q}": {"$exists": True} for q in query_tokens}}
+    candidates: Dict[tuple, dict] = {}
+    for query_match, cap in ((title_match, limit), (token_match, limit), (match, pool)):
+        for entry in await db.search_index.find(query_match, projection).limit(cap).to_list(cap):
+            candidates.setdefault((entry["entity_type"], entry["entity_id"]), entry)
+
+    hits = []
+    for entry in candidates.values():
+        # Long tokens were looked up by their prefix; confirm the full token matches
+        if any(len(q) > MAX_PREFIX_LENGTH and not any(t.startswith(q) for t in entry.get("tokens", {}))
+               for q in query_tokens):
+            continue
+        hits.append({
+            "type": entry["entity_type"],
+            "id": entry["entity_id"],
+            "title": entry.get("title"),
+            "subtitle": entry.get("subtitle"),
+            "status": entry.get("status"),
+            "score": _score(entry, query_tokens, normalized_query),
+        })
+
+    hits.sort(key=lambda h: (-h["score"], h["title"] or ""))
+    return hits[:limit]
+
+
+async def search_entity_ids(db, entity: str, query: str, limit: int = 1000) -> List[str]:
+    """Ids of one entity type matching a query, best matches first"""
+    hits = await search_entities(db, query, [entity], limit=limit)
+    return [h["id"] for h in hits]
+
+
+async def initialize_search_index(db):
+    """Create search indexes and build the index once if it has never been populated"""
+    try:
+        await ensure_search_indexes(db)
+        if await db.search_index.estimated_document_count() == 0:
+            counts = await rebuild_search_index(db)
+            logger.info(f"Search index built: {counts}")
+    except Exception as e:
+        logger.error(f"Error initializing search index: {e}")
@@ -0,0 +1,221 @@
+"""
+Streaming Query Results
+Async generators over Motor cursors, keyset pagination with opaque cursor
+tokens, and streamed JSON array / NDJSON responses, so list endpoints return
+every matching document without a hard-coded to_list(N) cap and without
+buffering the whole result set.
+
+Paginated endpoints take explicit `limit` and `cursor` parameters and return
+the token for the following page in the X-Next-Cursor header (absent on the
+last page). Without `limit` the full result is streamed.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, AsyncIterable, AsyncIterator, Callable, Iterable, List, Optional, Tuple
+
+from bson import ObjectId, json_util
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+
+DEFAULT_BATCH_SIZE = 500
+MAX_PAGE_SIZE = 1000
+
+# Streamed responses are flushed in chunks of roughly this many bytes
+FLUSH_BYTES = 64 * 1024
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+# =============== CURSOR ITERATION ===============
+
+async def iter_cursor(cursor, batch_size: int = DEFAULT_BATCH_SIZE) -> AsyncIterator[dict]:
+    """Yield documents from a Motor cursor, fetching batch_size documents per round trip"""
+    async for doc in cursor.batch_size(batch_size):
+        yield doc
+
+
+async def iter_batches(cursor, batch_size: int = DEFAULT_BATCH_SIZE) -> AsyncIterator[List[dict]]:
+    """Yield lists of up to batch_size documents from a Motor cursor"""
+    batch = []
+    async for doc in cursor.batch_size(batch_size):
+        batch.append(doc)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def find_by_ids(collection, ids: Iterable[str], projection: Optional[dict] = None, field: str = "id") -> List[dict]:
+    """Fetch every document whose `field` is in ids; the result is bounded by the id list, not a fixed cap"""
+    unique_ids = list(dict.fromkeys(i for i in ids if i))
+    if not unique_ids:
+        return []
+    return await collection.find({field: {"$in": unique_ids}}, projection or {"_id": 0}).to_list(None)
+
+
+def changed_since(field: str, since: datetime) -> dict:
+    """Filter for field at or after since, whether stored as a datetime or an ISO string"""
+    return {"$or": [{field: {"$gte": since}}, {field: {"$gte": since.isoformat()}}]}
+
+
+# =============== KEYSET PAGINATION ===============
+
+# BSON comparison order of the types a sort key can hold, with their $type aliases
+_TYPE_ORDER = [
+    ("null", ()),
+    ("number", ("int", "long", "double", "decimal")),
+    ("string", ("string",)),
+    ("object", ("object",)),
+    ("objectId", ("objectId",)),
+    ("bool", ("bool",)),
+    ("date", ("date",)),
+]
+
+
+def _type_rank(value: Any) -> int:
+    if value is None:
+        return 0
+    if isinstance(value, bool):
+        return 5
+    if isinstance(value, (int, float)):
+        return 1
+    if isinstance(value, str):
+        return 2
+    if isinstance(value, dict):
+        return 3
+    if isinstance(value, ObjectId):
+        return 4
+    if isinstance(value, datetime):
+        return 6
+    raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def encode_cursor(doc: dict, sort_field: str, tie_field: str = "id") -> str:
+    """Opaque token positioned just after doc"""
+    raw = json_util.dumps([doc.get(sort_field), doc.get(tie_field)])
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str) -> Tuple[Any, Any]:
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        value, tie = json_util.loads(base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8"))
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return value, tie
+
+
+def after_cursor(query: dict, token: str, sort_field: str, direction: int = -1, tie_field: str = "id") -> dict:
+    """
+    Restrict query to documents that sort after the cursor position in
+    [(sort_field, direction), (tie_field, direction)] order. Documents whose
+    sort key has a different BSON type (e.g. legacy string dates next to
+    datetimes, or missing values) are included on the correct side.
+    """
+    value, tie = decode_cursor(token)
+    rank = _type_rank(value)
+    op = "$lt" if direction < 0 else "$gt"
+    later_ranks = range(0, rank) if direction < 0 else range(rank + 1, len(_TYPE_ORDER))
+
+    conditions = [{sort_field: value, tie_field: {op: tie}}]
+    if value is not None:
+        conditions.append({sort_field: {op: value}})
+    conditions += [{sort_field: {"$type": alias}} for r in later_ranks for alias in _TYPE_ORDER[r][1]]
+    if direction < 0 and rank > 0:
+        conditions.append({sort_field: None})
+    return {"$and": [query, {"$or": conditions}]} if query else {"$or": conditions}
+
+
+async def fetch_page(
+    collection,
+    query: dict,
+    projection: Optional[dict] = None,
+    sort_field: str = "created_at",
+    direction: int = -1,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    tie_field: str = "id",
+) -> Tuple[List[dict], Optional[str]]:
+    """One page of at most limit documents and the cursor for the next page (None on the last page)"""
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    if cursor:
+        query = after_cursor(query, cursor, sort_field, direction, tie_field)
+    docs = await collection.find(query, projection or {"_id": 0}).sort(
+        [(sort_field, direction), (tie_field, direction)]
+    ).limit(limit + 1).to_list(limit + 1)
+    if len(docs) <= limit:
+        return docs, None
+    docs = docs[:limit]
+    return docs, encode_cursor(docs[-1], sort_field, tie_field)
+
+
+# =============== STREAMED RESPONSES ===============
+
+def _dumps(doc: Any) -> str:
+    return json.dumps(jsonable_encoder(doc), separators=(",", ":"))
+
+
+async def json_array_chunks(docs: AsyncIterable[dict], transform: Optional[Callable[[dict], Any]] = None) -> AsyncIterator[bytes]:
+    """Encode documents as one JSON array, flushed every FLUSH_BYTES"""
+    buffer = ["["]
+    size = 1
+    first = True
+    async for doc in docs:
+        item = _dumps(transform(doc) if transform else doc)
+        buffer.append(item if first else "," + item)
+        size += len(item) + 1
+        first = False
+        if size >= FLUSH_BYTES:
+            yield "".join(buffer).encode("utf-8")
+            buffer, size = [], 0
+    buffer.append("]")
+    yield "".join(buffer).encode("utf-8")
+
+
+async def ndjson_chunks(docs: AsyncIterable[dict], transform: Optional[Callable[[dict], Any]] = None) -> AsyncIterator[bytes]:
+    """Encode documents as plain-JSON NDJSON lines, flushed every FLUSH_BYTES"""
+    buffer = []
+    size = 0
+    async for doc in docs:
+        line = _dumps(transform(doc) if transform else doc) + "\n"
+        buffer.append(line)
+        size += len(line)
+        if size >= FLUSH_BYTES:
+            yield "".join(buffer).encode("utf-8")
+            buffer, size = [], 0
+    if buffer:
+        yield "".join(buffer).encode("utf-8")
+
+
+def stream_list_response(
+    docs: AsyncIterable[dict],
+    transform: Optional[Callable[[dict], Any]] = None,
+    format: str = "json",
+    headers: Optional[dict] = None,
+) -> StreamingResponse:
+    """Stream docs as a JSON array (format="json") or NDJSON (format="ndjson")"""
+    if format == "ndjson":
+        return StreamingResponse(ndjson_chunks(docs, transform), media_type="application/x-ndjson", headers=headers)
+    if format != "json":
+        raise HTTPException(status_code=400, detail="format must be 'json' or 'ndjson'")
+    return StreamingResponse(json_array_chunks(docs, transform), media_type="application/json", headers=headers)
+
+
+async def iter_list(docs: List[dict]) -> AsyncIterator[dict]:
+    """Adapt an already fetched page to the streaming encoders"""
+    for doc in docs:
+        yield doc
+
+
+def page_response(
+    docs: List[dict],
+    next_cursor: Optional[str],
+    transform: Optional[Callable[[dict], Any]] = None,
+    format: str = "json",
+) -> StreamingResponse:
+    """A page in the same body shape as the unpaginated list, with X-Next-Cursor when more pages follow"""
+    headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None
+    return stream_list_response(iter_list(docs), transform, format, headers)
@@ -8,6 +8,9 @@ Usage:
 
 The import key default is: smarthub-enerzia-import-2026
 You can change it in the production .env file as DATA_IMPORT_KEY
+
+For large collections use ndjson_migrate.py, which streams NDJSON files
+in constant memory and can resume an interrupted import.
 """
 
 import requests
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Streaming NDJSON Migration Tool for Smarthub Enerzia
+Moves collections between environments in constant memory using the
+/api/data-import/stream endpoints.
+
+Usage:
+  # Export collections from the source environment
+  python3 ndjson_migrate.py export --url https://preview.example.com --out-dir ./ndjson --gzip projects amcs
+
+  # Import them into production (upsert by id), resumable if interrupted
+  python3 ndjson_migrate.py import --url https://smarthub.enerzia.com --data-dir ./ndjson --upsert --resume
+
+  # Convert the legacy JSON array exports in this folder to NDJSON
+  python3 ndjson_migrate.py convert --data-dir /app/data_export --out-dir ./ndjson
+
+The import key default is: smarthub-enerzia-import-2026
+You can change it in the production .env file as DATA_IMPORT_KEY
+"""
+
+import argparse
+import gzip
+import json
+import sys
+import zlib
+from pathlib import Path
+
+import requests
+
+from import_data_to_production import COLLECTIONS_ORDER
+
+CHUNK_SIZE = 256 * 1024
+DEFAULT_KEY = 'smarthub-enerzia-import-2026'
+
+
+def open_source(path: Path):
+    """Open an NDJSON file for binary reading, transparently decompressing .gz"""
+    return gzip.open(path, 'rb') if path.suffix == '.gz' else open(path, 'rb')
+
+
+def find_source(data_dir: Path, collection_name: str):
+    for name in (f"{collection_name}.ndjson", f"{collection_name}.ndjson.gz"):
+        path = data_dir / name
+        if path.exists():
+            return path
+    return None
+
+
+def read_chunks(handle, compress: bool):
+    """Yield file chunks for a streaming request body, optionally gzip-compressing them"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS) if compress else None
+    while True:
+        chunk = handle.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        yield compressor.compress(chunk) if compressor else chunk
+    if compressor:
+        yield compressor.flush()
+
+
+def get_resume_offset(base_url, import_id, key):
+    response = requests.get(
+        f"{base_url}/api/data-import/stream/progress/{import_id}", params={'key': key}, timeout=30
+    )
+    if response.status_code == 404:
+        return 0
+    response.raise_for_status()
+    return response.json().get('committed_offset', 0)
+
+
+def import_collection(base_url, collection_name, path: Path, args):
+    """Stream one NDJSON file into a collection, resuming from the last committed offset"""
+    import_id = f"{args.run_id}:{collection_name}"
+    offset = get_resume_offset(base_url, import_id, args.key) if args.resume else 0
+
+    params = {
+        'key': args.key,
+        'upsert': str(args.upsert).lower(),
+        'offset': offset,
+        'batch_size': args.batch_size,
+        'gzip': str(args.gzip_transfer).lower(),
+        'import_id': import_id,
+        'clear_existing': str(args.clear_existing).lower(),
+    }
+    with open_source(path) as handle:
+        if offset:
+            # Offsets count uncompressed bytes, so seeking works for .gz sources too
+            handle.seek(offset)
+        response = requests.post(
+            f"{base_url}/api/data-import/stream/{collection_name}",
+            params=params,
+            data=read_chunks(handle, args.gzip_transfer),
+            headers={'Content-Type': 'application/x-ndjson'},
+            timeout=args.timeout,
+        )
+    response.raise_for_status()
+    return offset, response.json()
+
+
+def export_collection(base_url, collection_name, out_dir: Path, args):
+    """Stream one collection from the server straight to disk"""
+    extension = 'ndjson.gz' if args.gzip else 'ndjson'
+    path = out_dir / f"{collection_name}.{extension}"
+    with requests.get(
+        f"{base_url}/api/data-import/stream/{collection_name}/export",
+        params={'key': args.key, 'gzip': str(args.gzip).lower(), 'batch_size': args.batch_size},
+        stream=True,
+        timeout=args.timeout,
+    ) as response:
+        response.raise_for_status()
+        written = 0
+        with open(path, 'wb') as out:
+            for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                out.write(chunk)
+                written += len(chunk)
+    return path, written
+
+
+def convert_legacy(data_dir: Path, out_dir: Path, collections):
+    """Rewrite legacy JSON array exports as NDJSON (one document per line)"""
+    for collection_name in collections:
+        source = data_dir / f"{collection_name}.json"
+        if not source.exists():
+            print(f"⚠️  {collection_name}: File not found, skipping")
+            continue
+        with open(source, 'r') as f:
+            documents = json.load(f)
+        target = out_dir / f"{collection_name}.ndjson"
+        with open(target, 'w') as out:
+            for doc in documents:
+                doc.pop('_id', None)
+                out.write(json.dumps(doc) + "\n")
+        print(f"✅ {collection_name}: {len(documents)} documents → {target}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Stream collections between Smarthub Enerzia environments')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    def common(p, needs_url=True):
+        if needs_url:
+            p.add_argument('--url', required=True, help='Server URL (e.g., https://smarthub.enerzia.com)')
+            p.add_argument('--key', default=DEFAULT_KEY, help='Import authorization key')
+            p.add_argument('--batch-size', type=int, default=1000, help='Documents per batch on the server')
+            p.add_argument('--timeout', type=int, default=3600, help='Request timeout in seconds')
+        p.add_argument('collections', nargs='*', help='Collections to process (default: all known)')
+
+    p_export = sub.add_parser('export', help='Export collections to NDJSON files')
+    common(p_export)
+    p_export.add_argument('--out-dir', default='./ndjson', help='Directory to write NDJSON files to')
+    p_export.add_argument('--gzip', action='store_true', help='Write gzip-compressed files')
+
+    p_import = sub.add_parser('import', help='Import NDJSON files into collections')
+    common(p_import)
+    p_import.add_argument('--data-dir', default='./ndjson', help='Directory containing NDJSON files')
+    p_import.add_argument('--upsert', action='store_true', help='Replace documents with the same id')
+    p_import.add_argument('--resume', action='store_true', help='Continue from the last committed offset')
+    p_import.add_argument('--run-id', default='migration', help='Identifier used to record progress for --resume')
+    p_import.add_argument('--gzip-transfer', action='store_true', help='Compress the request body on the fly')
+    p_import.add_argument('--clear-existing', action='store_true', help='Delete existing documents first')
+
+    p_convert = sub.add_parser('convert', help='Convert legacy JSON exports to NDJSON')
+    common(p_convert, needs_url=False)
+    p_convert.add_argument('--data-dir', default='/app/data_export', help='Directory containing JSON files')
+    p_convert.add_argument('--out-dir', default='./ndjson', help='Directory to write NDJSON files to')
+
+    args = parser.parse_args()
+    collections = args.collections or COLLECTIONS_ORDER
+
+    if args.command == 'convert':
+        out_dir = Path(args.out_dir)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        convert_legacy(Path(args.data_dir), out_dir, collections)
+        return
+
+    base_url = args.url.rstrip('/')
+    failures = 0
+
+    if args.command == 'export':
+        out_dir = Path(args.out_dir)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        for collection_name in collections:
+            try:
+                path, written = export_collection(base_url, collection_name, out_dir, args)
+                print(f"✅ {collection_name}: {written} bytes → {path}")
+            except requests.exceptions.RequestException as e:
+                failures += 1
+                print(f"❌ {collection_name}: {e}")
+
+    elif args.command == 'import':
+        data_dir = Path(args.data_dir)
+        for collection_name in collections:
+            path = find_source(data_dir, collection_name)
+            if not path:
+                print(f"⚠️  {collection_name}: File not found, skipping")
+                continue
+            try:
+                offset, result = import_collection(base_url, collection_name, path, args)
+                resumed = f" (resumed at byte {offset})" if offset else ""
+                print(f"✅ {collection_name}: {result.get('inserted_count', 0)} inserted, "
+                      f"{result.get('replaced_count', 0)} replaced{resumed}")
+                for error in result.get('errors') or []:
+                    print(f"   ⚠️  {error}")
+            except requests.exceptions.RequestException as e:
+                failures += 1
+                print(f"❌ {collection_name}: {e} - rerun with --resume to continue")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,5 @@
 import React, { useState, useEffect, useRef, useCallback } from 'react';
-import { projectsAPI } from '../services/api';
+import { projectsAPI, exportBlob } from '../services/api';
 import { Search, Filter, Loader2, ChevronRight, Plus, Edit, Download, Upload, FileText, FileSpreadsheet, Trash2, CheckCircle2, Clock, RefreshCw } from 'lucide-react';
 import { Progress } from '../components/ui/progress';
 import AddProjectModal from '../components/AddProjectModal';
@@ -55,7 +55,7 @@ const Projects = () => {
     try {
       setExporting(true);
       const response = await projectsAPI.exportExcel();
-      const url = window.URL.createObjectURL(new Blob([response.data]));
+      const url = window.URL.createObjectURL(new Blob([await exportBlob(response)]));
       const link = document.createElement('a');
       link.href = url;
       link.setAttribute('download', `projects_${new Date().toISOString().split('T')[0]}.xlsx`);
@@ -74,7 +74,7 @@ const Projects = () => {
     try {
       setExporting(true);
       const response = await projectsAPI.exportPDF();
-      const url = window.URL.createObjectURL(new Blob([response.data]));
+      const url = window.URL.createObjectURL(new Blob([await exportBlob(response)]));
       const link = document.createElement('a');
       link.href = url;
       link.setAttribute('download', `project_report_${new Date().toISOString().split('T')[0]}.pdf`);
@@ -1,5 +1,5 @@
 import React, { useState } from 'react';
-import { projectsAPI } from '../services/api';
+import { projectsAPI, exportBlob } from '../services/api';
 import { Download, Calendar, Filter, Loader2, FileSpreadsheet, FileText } from 'lucide-react';
 import { BarChart, Bar, PieChart, Pie, Cell, XAxis, YAxis, CartesianGrid, Tooltip, Legend, ResponsiveContainer } from 'recharts';
 import { DatePicker } from '../components/ui/date-picker';
@@ -44,7 +44,7 @@ const Reports = () => {
   const handleExportExcel = async () => {
     try {
       const response = await projectsAPI.exportExcel();
-      const url = window.URL.createObjectURL(new Blob([response.data]));
+      const url = window.URL.createObjectURL(new Blob([await exportBlob(response)]));
       const link = document.createElement('a');
       link.href = url;
       link.setAttribute('download', `report_${new Date().toISOString().split('T')[0]}.xlsx`);
@@ -59,7 +59,7 @@ const Reports = () => {
   const handleExportPDF = async () => {
     try {
       const response = await projectsAPI.exportPDF();
-      const url = window.URL.createObjectURL(new Blob([response.data]));
+      const url = window.URL.createObjectURL(new Blob([await exportBlob(response)]));
       const link = document.createElement('a');
       link.href = url;
       link.setAttribute('download', `report_${new Date().toISOString().split('T')[0]}.pdf`);
@@ -5,6 +5,7 @@ import {
   ChevronDown, Filter, ArrowRight, Download, FileSpreadsheet, Upload
 } from 'lucide-react';
 import { toast } from 'sonner';
+import { waitForExportJob } from '../../services/api';
 
 const API_URL = process.env.REACT_APP_BACKEND_URL;
 
@@ -375,7 +376,8 @@ const Enquiries = () => {
       
       if (!response.ok) throw new Error('Failed to generate PDF');
       
-      const blob = await response.blob();
+      // Large exports run as a background job (202) that is polled until ready
+      const blob = response.status === 202 ? await waitForExportJob(await response.json()) : await response.blob();
       const url = window.URL.createObjectURL(blob);
       const a = document.createElement('a');
       a.href = url;
@@ -400,7 +402,8 @@ const Enquiries = () => {
       
       if (!response.ok) throw new Error('Failed to generate Excel');
       
-      const blob = await response.blob();
+      // Large exports run as a background job (202) that is polled until ready
+      const blob = response.status === 202 ? await waitForExportJob(await response.json()) : await response.blob();
       const url = window.URL.createObjectURL(blob);
       const a = document.createElement('a');
       a.href = url;
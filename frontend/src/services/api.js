@@ -98,6 +98,32 @@ api.interceptors.response.use(
   }
 );
 
+// ============ BACKGROUND EXPORTS ============
+// Exports too large to stream inline answer 202 with a job; poll its
+// status_url until the file is ready, then fetch it from download_url.
+const EXPORT_POLL_INTERVAL_MS = 2000;
+const EXPORT_POLL_TIMEOUT_MS = 30 * 60 * 1000;
+const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
+
+export const waitForExportJob = async (job) => {
+  const deadline = Date.now() + EXPORT_POLL_TIMEOUT_MS;
+  let status = job;
+  while (status.status === 'running') {
+    if (Date.now() > deadline) throw new Error('Export is taking too long, please try again later');
+    await new Promise((resolve) => setTimeout(resolve, EXPORT_POLL_INTERVAL_MS));
+    status = (await api.get(status.status_url, { baseURL: BACKEND_URL })).data;
+  }
+  if (status.status !== 'done') throw new Error(status.error || 'Export failed');
+  const response = await api.get(status.download_url, { baseURL: BACKEND_URL, responseType: 'blob' });
+  return response.data;
+};
+
+// File contents of an export request made with responseType 'blob'
+export const exportBlob = async (response) => {
+  if (response.status !== 202) return response.data;
+  return waitForExportJob(JSON.parse(await response.data.text()));
+};
+
 // Authentication API
 export const authAPI = {
   login: (data) => api.post('/auth/login', data),